@@ -20,8 +20,8 @@ router = APIRouter(prefix="/api/finance", tags=["Finance"])
 
 # 初始化服务
 erp_connector = ERPConnector(connection_type="both")
-price_analyzer = PriceAnalyzer()
-time_analyzer = TimeAnalyzer()
+price_analyzer = PriceAnalyzer(erp_connector=erp_connector)
+time_analyzer = TimeAnalyzer(erp_connector=erp_connector)
 
 
 @router.get("/price/trend")
@@ -38,6 +38,13 @@ async def compare_prices(products: List[int], competitors: Optional[List[str]] =
     return {"success": True, "comparison": comparison}
 
 
+@router.post("/price/catalog")
+async def analyze_price_catalog(product_ids: List[int], period: str = "30d"):
+    """批量分析产品目录价格"""
+    analysis = await price_analyzer.analyze_catalog(product_ids, period)
+    return {"success": True, "analysis": analysis}
+
+
 @router.post("/price/optimize")
 async def optimize_pricing(product_id: int, cost: float, market_data: Optional[Dict] = None):
     """优化定价"""
@@ -52,6 +59,13 @@ async def analyze_work_hours(project_id: Optional[int] = None, period: str = "30
     return {"success": True, "analysis": analysis}
 
 
+@router.post("/work-hours/batch")
+async def analyze_work_hours_batch(project_ids: List[int], period: str = "30d"):
+    """批量分析项目工时"""
+    analysis = await time_analyzer.analyze_projects(project_ids, period)
+    return {"success": True, "analysis": analysis}
+
+
 @router.post("/work-hours/optimize")
 async def optimize_work_hours(project_id: int, current_hours: float, target_hours: Optional[float] = None):
     """优化工时"""
@@ -0,0 +1,310 @@
+"""
+批量分析核心⭐
+按实体（产品/项目）分组的列式时间序列与向量化分组运算
+
+大量实体的价格/工时序列一次载入为按 (实体, 日期) 排序的列数组，
+趋势、波动、季节性、弹性、异常检测都用 NumPy 分组归约一次算完，
+不再逐个实体、逐个元素循环。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+
+class SeriesFrame:
+    """
+    分组列式时间序列
+
+    行按 (实体, 日期) 升序排列，同一实体的行连续存放：
+    - entities: 各组实体ID（按组顺序）
+    - starts / counts: 各组起始行与行数
+    - codes: 每行所属组序号
+    - position: 每行在组内的序号（0 开始，即回归的 x）
+    """
+
+    def __init__(
+        self,
+        entity_ids: Sequence[Any],
+        dates: Sequence[Any],
+        values: Sequence[float],
+        columns: Optional[Dict[str, Sequence[Any]]] = None
+    ):
+        entity_ids = np.asarray(entity_ids)
+        dates = np.asarray(dates, dtype="datetime64[s]")
+        values = np.asarray(values, dtype=float)
+
+        columns = {name: np.asarray(column) for name, column in (columns or {}).items()}
+        if not self._is_sorted(entity_ids, dates):
+            order = np.lexsort((dates, entity_ids))
+            entity_ids, dates, values = entity_ids[order], dates[order], values[order]
+            columns = {name: column[order] for name, column in columns.items()}
+        self.entity_ids = entity_ids
+        self.dates = dates
+        self.values = values
+        self.columns = columns
+
+        n = len(self.values)
+        if n:
+            boundaries = np.flatnonzero(self.entity_ids[1:] != self.entity_ids[:-1]) + 1
+            self.starts = np.concatenate(([0], boundaries))
+        else:
+            self.starts = np.zeros(0, dtype=np.int64)
+        self.counts = np.diff(np.append(self.starts, n))
+        self.entities = self.entity_ids[self.starts]
+        self.codes = np.repeat(np.arange(len(self.starts)), self.counts)
+        self.position = np.arange(n) - self.starts[self.codes] if n else np.zeros(0, dtype=np.int64)
+
+    @staticmethod
+    def _is_sorted(entity_ids: np.ndarray, dates: np.ndarray) -> bool:
+        """ERP 数据通常已按 (实体, 日期) 排好，省去排序"""
+        if len(entity_ids) < 2:
+            return True
+        same = entity_ids[1:] == entity_ids[:-1]
+        return bool(np.all((entity_ids[1:] > entity_ids[:-1]) | (same & (dates[1:] >= dates[:-1]))))
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Dict[str, Any]],
+        entity_key: str,
+        value_key: str,
+        date_key: str = "date",
+        column_keys: Sequence[str] = ()
+    ) -> "SeriesFrame":
+        """由 ERP 返回的记录列表构建（一次载入多个实体）"""
+        records = list(records)
+        return cls(
+            [r[entity_key] for r in records],
+            [r[date_key] for r in records],
+            [r[value_key] for r in records],
+            {key: [r.get(key) for r in records] for key in column_keys}
+        )
+
+    @classmethod
+    def single(cls, values: Sequence[float], dates: Optional[Sequence[Any]] = None) -> "SeriesFrame":
+        """单个序列；未给日期时按列表顺序（视为已按时间排列）"""
+        values = np.asarray(values, dtype=float)
+        if dates is None:
+            dates = np.arange(len(values)).astype("datetime64[s]")
+        return cls(np.zeros(len(values), dtype=np.int64), dates, values)
+
+    @property
+    def group_count(self) -> int:
+        return len(self.starts)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def group_sum(self, values: np.ndarray) -> np.ndarray:
+        """按组求和"""
+        if not len(values):
+            return np.zeros(self.group_count)
+        return np.add.reduceat(values, self.starts)
+
+    def broadcast(self, group_values: np.ndarray) -> np.ndarray:
+        """把每组一个值展开到组内每一行"""
+        return group_values[self.codes]
+
+
+def group_stats(frame: SeriesFrame, median: bool = False) -> Dict[str, np.ndarray]:
+    """
+    分组基础统计：count, sum, mean, std（样本标准差）, min, max, first, last；
+    median=True 时另算中位数（需要组内排序）
+    """
+    counts = frame.counts
+    if not frame.group_count:
+        empty = np.zeros(0)
+        keys = ("count", "sum", "mean", "std", "min", "max", "first", "last") + (("median",) if median else ())
+        return {key: empty for key in keys}
+
+    values = frame.values
+    sums = frame.group_sum(values)
+    means = sums / counts
+    squares = frame.group_sum((values - frame.broadcast(means)) ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.where(counts > 1, np.sqrt(squares / np.maximum(counts - 1, 1)), 0.0)
+
+    result = {
+        "count": counts,
+        "sum": sums,
+        "mean": means,
+        "std": std,
+        "min": np.minimum.reduceat(values, frame.starts),
+        "max": np.maximum.reduceat(values, frame.starts),
+        "first": values[frame.starts],
+        "last": values[frame.starts + counts - 1],
+    }
+
+    if median:
+        # 先按值排序，再按组稳定排序，得到组内有序的值
+        order = np.argsort(values)
+        order = order[np.argsort(frame.codes[order], kind="stable")]
+        ordered = values[order]
+        lower = ordered[frame.starts + (counts - 1) // 2]
+        upper = ordered[frame.starts + counts // 2]
+        result["median"] = (lower + upper) / 2
+
+    return result
+
+
+def group_trend(
+    frame: SeriesFrame,
+    flat_threshold: float,
+    stats: Optional[Dict[str, np.ndarray]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    分组线性趋势（最小二乘斜率，x 为组内序号）
+
+    Returns:
+        slope: 斜率
+        strength: |斜率 × 点数| / 极差，截断到 [0, 1]
+        direction: 上升 / 下降 / 平稳（|斜率| 不超过 flat_threshold 为平稳）
+    """
+    stats = stats or group_stats(frame)
+    counts = stats["count"]
+    x_centered = frame.position - frame.broadcast((counts - 1) / 2)
+    y_centered = frame.values - frame.broadcast(stats["mean"])
+
+    numerator = frame.group_sum(x_centered * y_centered)
+    denominator = frame.group_sum(x_centered ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), 0.0)
+        value_range = stats["max"] - stats["min"]
+        strength = np.where(
+            value_range > 0,
+            np.minimum(np.abs(slope * counts) / np.where(value_range > 0, value_range, 1), 1.0),
+            0.0
+        )
+
+    direction = np.where(slope > flat_threshold, "上升", np.where(slope < -flat_threshold, "下降", "平稳"))
+    return {"slope": slope, "strength": strength, "direction": direction}
+
+
+def group_zscores(
+    frame: SeriesFrame,
+    stats: Optional[Dict[str, np.ndarray]] = None,
+    min_count: int = 3
+) -> np.ndarray:
+    """
+    每行相对所在组的 |z| 分数；点数不足或标准差为 0 的组记为 0
+    """
+    stats = stats or group_stats(frame)
+    std = stats["std"]
+    valid = (stats["count"] >= min_count) & (std > 0)
+    scale = frame.broadcast(np.where(valid, std, np.inf))
+    return np.abs(frame.values - frame.broadcast(stats["mean"])) / scale
+
+
+def anomaly_rows(
+    frame: SeriesFrame,
+    stats: Optional[Dict[str, np.ndarray]] = None,
+    threshold: float = 2.0
+) -> np.ndarray:
+    """|z| 超过阈值的行号（按组、日期有序）"""
+    return np.flatnonzero(group_zscores(frame, stats) > threshold)
+
+
+def group_seasonality(
+    frame: SeriesFrame,
+    stats: Optional[Dict[str, np.ndarray]] = None,
+    min_amplitude: float = 0.05
+) -> Dict[str, np.ndarray]:
+    """
+    分组月度季节性
+
+    按 (组, 月份) 求均值；至少覆盖 3 个月且月均值振幅（(最高-最低)/整体均值）
+    达到 min_amplitude 视为有季节性。
+
+    Returns:
+        has_seasonality, amplitude, peak_month, low_month（月份 1-12，无数据为 0）
+    """
+    stats = stats or group_stats(frame)
+    groups = frame.group_count
+    months = frame.dates.astype("datetime64[M]").astype(np.int64) % 12
+    keys = frame.codes * 12 + months
+
+    month_counts = np.bincount(keys, minlength=groups * 12).reshape(groups, 12)
+    month_sums = np.bincount(keys, weights=frame.values, minlength=groups * 12).reshape(groups, 12)
+    observed = month_counts > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        month_means = month_sums / np.where(observed, month_counts, 1)
+
+    highest = np.where(observed, month_means, -np.inf)
+    lowest = np.where(observed, month_means, np.inf)
+    peak = highest.argmax(axis=1)
+    low = lowest.argmin(axis=1)
+    rows = np.arange(groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        amplitude = np.where(
+            stats["mean"] != 0,
+            (highest[rows, peak] - lowest[rows, low]) / np.abs(np.where(stats["mean"] != 0, stats["mean"], 1)),
+            0.0
+        )
+    has_seasonality = (observed.sum(axis=1) >= 3) & (amplitude >= min_amplitude)
+
+    return {
+        "has_seasonality": has_seasonality,
+        "amplitude": np.where(observed.any(axis=1), amplitude, 0.0),
+        "peak_month": np.where(has_seasonality, peak + 1, 0),
+        "low_month": np.where(has_seasonality, low + 1, 0),
+    }
+
+
+def group_elasticity(frame: SeriesFrame, sales: np.ndarray) -> np.ndarray:
+    """
+    分组价格弹性：相邻两期 销量变化率 / 价格变化率 的组内均值
+
+    Args:
+        frame: 价格序列
+        sales: 与 frame 行对齐的销量
+
+    Returns:
+        各组弹性，无有效价格变化的组为 nan
+    """
+    sales = np.asarray(sales, dtype=float)
+    prices = frame.values
+    has_prev = frame.position > 0
+    prev_prices = np.roll(prices, 1)
+    prev_sales = np.roll(sales, 1)
+
+    valid = has_prev & (prev_prices != 0) & (prev_sales != 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        price_pct = np.where(valid, (prices - prev_prices) / np.where(valid, prev_prices, 1), 0.0)
+        sales_pct = np.where(valid, (sales - prev_sales) / np.where(valid, prev_sales, 1), 0.0)
+        valid &= price_pct != 0
+        ratios = np.where(valid, sales_pct / np.where(valid, price_pct, 1), 0.0)
+
+    totals = np.bincount(frame.codes, weights=ratios, minlength=frame.group_count)
+    counts = np.bincount(frame.codes, weights=valid, minlength=frame.group_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, totals / np.where(counts > 0, counts, 1), np.nan)
+
+
+def pair_totals(frame: SeriesFrame, keys: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    按 (组, 子键) 汇总数值，例如项目内每个员工的总工时
+
+    Returns:
+        group: 每个 (组, 子键) 所属组序号
+        key: 子键
+        total: 汇总值
+    """
+    keys = np.asarray(keys)
+    order = np.lexsort((keys, frame.codes))
+    codes = frame.codes[order]
+    sorted_keys = keys[order]
+    if not len(order):
+        return {"group": codes, "key": sorted_keys, "total": np.zeros(0)}
+    change = np.flatnonzero((codes[1:] != codes[:-1]) | (sorted_keys[1:] != sorted_keys[:-1])) + 1
+    starts = np.concatenate(([0], change))
+    return {
+        "group": codes[starts],
+        "key": sorted_keys[starts],
+        "total": np.add.reduceat(frame.values[order], starts),
+    }
+
+
+def iter_group_rows(frame: SeriesFrame, rows: np.ndarray) -> List[np.ndarray]:
+    """把有序行号按组拆开，返回每组的行号数组"""
+    splits = np.searchsorted(rows, frame.starts[1:]) if len(rows) else np.zeros(max(frame.group_count - 1, 0), dtype=np.int64)
+    return np.split(rows, splits) if frame.group_count else []
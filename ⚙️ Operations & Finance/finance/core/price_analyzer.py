@@ -8,6 +8,18 @@ from datetime import datetime, timedelta
 import statistics
 import math
 
+import numpy as np
+
+from core.batch_analytics import (
+    SeriesFrame,
+    anomaly_rows,
+    group_elasticity,
+    group_seasonality,
+    group_stats,
+    group_trend,
+    iter_group_rows,
+)
+
 class PriceAnalyzer:
     """
     价格分析器⭐深化版
@@ -20,8 +32,12 @@ class PriceAnalyzer:
     5. 价格弹性分析
     6. 成本加成分析
     7. 市场定位分析
+    8. 产品目录批量分析（向量化）
     """
     
+    # 趋势斜率绝对值不超过该值视为平稳
+    TREND_FLAT_THRESHOLD = 0.01
+    
     def __init__(self, erp_connector=None):
         """
         初始化价格分析器
@@ -123,24 +139,27 @@ class PriceAnalyzer:
         - 性价比分析
         - 市场定位对比
         """
-        comparison_results = []
+        # 一次批量获取所有产品价格数据
+        products_data = await self._get_products_price_data(products)
+        found = [
+            (product_id, data) for product_id, data in zip(products, products_data) if data
+        ]
         
-        for product_id in products:
-            # 获取产品价格数据
-            product_data = await self._get_product_price_data(product_id)
-            
-            if product_data:
-                comparison_results.append({
-                    "product_id": product_id,
-                    "product_name": product_data.get("name", f"产品{product_id}"),
-                    "current_price": product_data.get("price", 0.0),
-                    "average_price": product_data.get("avg_price", 0.0),
-                    "price_trend": product_data.get("trend", "未知"),
-                    "market_position": self._analyze_market_position(
-                        product_data.get("price", 0.0),
-                        comparison_results
-                    )
-                })
+        # 市场定位：相对排在前面的产品的平均价格
+        prices = np.array([data.get("price", 0.0) for _, data in found], dtype=float)
+        positions = self._market_positions(prices)
+        
+        comparison_results = [
+            {
+                "product_id": product_id,
+                "product_name": data.get("name", f"产品{product_id}"),
+                "current_price": data.get("price", 0.0),
+                "average_price": data.get("avg_price", 0.0),
+                "price_trend": data.get("trend", "未知"),
+                "market_position": position
+            }
+            for (product_id, data), position in zip(found, positions)
+        ]
         
         # 竞争分析
         competitive_analysis = self._analyze_competition(comparison_results, competitors)
@@ -296,20 +315,138 @@ class PriceAnalyzer:
             "recommendations": self._generate_elasticity_recommendations(avg_elasticity)
         }
     
+    async def analyze_catalog(
+        self,
+        product_ids: Optional[List[int]] = None,
+        period: str = "30d",
+        anomaly_threshold: float = 2.0
+    ) -> Dict[str, Any]:
+        """
+        批量分析产品目录价格⭐
+        
+        一次载入所有产品的价格序列，向量化计算每个产品的趋势、波动、
+        季节性、价格弹性（有销量数据时）和异常价格，结果字段与
+        analyze_price_trend 一致。
+        
+        Args:
+            product_ids: 产品ID列表，None 表示ERP中的全部产品（需要ERP连接器）
+            period: 分析周期
+            anomaly_threshold: 异常检测的 z 分数阈值
+            
+        Returns:
+            各产品分析结果（按产品ID排序）与目录汇总
+            
+        Raises:
+            ValueError: 未配置ERP连接器且未指定 product_ids
+        """
+        frame = await self._get_price_frame(product_ids, period)
+        stats = group_stats(frame)
+        trend = group_trend(frame, self.TREND_FLAT_THRESHOLD, stats)
+        seasonality = group_seasonality(frame, stats)
+        anomalies = iter_group_rows(frame, anomaly_rows(frame, stats, anomaly_threshold))
+        elasticity = (
+            group_elasticity(frame, frame.columns["sales"]).tolist()
+            if "sales" in frame.columns else None
+        )
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            volatility = np.where(stats["mean"] > 0, stats["std"] / np.where(stats["mean"] > 0, stats["mean"], 1), 0.0)
+        forecast_price = stats["last"] * np.select(
+            [trend["direction"] == "上升", trend["direction"] == "下降"], [1.02, 0.98], 1.0
+        )
+        
+        # 转为 Python 类型后逐产品组装结果
+        entities = frame.entities.tolist()
+        counts = stats["count"].tolist()
+        means, mins, maxs, lasts = (stats[key].tolist() for key in ("mean", "min", "max", "last"))
+        directions, strengths, slopes = (trend[key].tolist() for key in ("direction", "strength", "slope"))
+        volatility = volatility.tolist()
+        forecast_price = forecast_price.tolist()
+        anomaly_inputs = frame.values, stats["mean"], stats["std"]
+        
+        results = []
+        for i, product_id in enumerate(entities):
+            if counts[i] < 2:
+                results.append({
+                    "product_id": product_id,
+                    "period": period,
+                    "trend": "数据不足",
+                    "average_price": 0.0,
+                    "price_range": {"min": 0.0, "max": 0.0},
+                    "volatility": 0.0,
+                    "message": "价格历史数据不足"
+                })
+                continue
+            
+            trend_info = {"direction": directions[i], "strength": round(strengths[i], 4), "slope": round(slopes[i], 4)}
+            product_anomalies = self._anomaly_records(frame, anomalies[i], *anomaly_inputs, i)
+            result = {
+                "product_id": product_id,
+                "period": period,
+                "trend": directions[i],
+                "trend_strength": trend_info["strength"],
+                "average_price": round(means[i], 2),
+                "current_price": lasts[i],
+                "price_range": {
+                    "min": round(mins[i], 2),
+                    "max": round(maxs[i], 2),
+                    "range": round(maxs[i] - mins[i], 2)
+                },
+                "volatility": round(volatility[i], 4),
+                "volatility_level": "高" if volatility[i] > 0.15 else "中" if volatility[i] > 0.05 else "低",
+                "anomalies": product_anomalies,
+                "seasonality": self._seasonality_result(seasonality, i),
+                "forecast": {
+                    "forecast_price": round(forecast_price[i], 2),
+                    "confidence": round(trend_info["strength"], 2),
+                    "direction": directions[i]
+                } if counts[i] >= 3 else {"forecast": "数据不足"},
+                "recommendations": self._generate_trend_recommendations(
+                    trend_info, volatility[i], product_anomalies
+                )
+            }
+            if elasticity is not None and not math.isnan(elasticity[i]):
+                result["price_elasticity"] = {
+                    "elasticity": round(elasticity[i], 4),
+                    "interpretation": self._interpret_elasticity(elasticity[i])
+                }
+            results.append(result)
+        
+        analyzed = [r for r in results if "trend_strength" in r]
+        return {
+            "period": period,
+            "products": results,
+            "summary": {
+                "product_count": len(results),
+                "analyzed_count": len(analyzed),
+                "trend_distribution": {
+                    direction: sum(1 for r in analyzed if r["trend"] == direction)
+                    for direction in ("上升", "下降", "平稳")
+                },
+                "high_volatility_count": sum(1 for r in analyzed if r["volatility_level"] == "高"),
+                "seasonal_count": sum(1 for r in analyzed if r["seasonality"]["has_seasonality"]),
+                "anomaly_count": sum(len(r["anomalies"]) for r in analyzed),
+                "average_volatility": round(statistics.mean(r["volatility"] for r in analyzed), 4) if analyzed else 0.0
+            }
+        }
+    
     # ============ 辅助方法 ============
     
+    @staticmethod
+    def _period_days(period: str) -> int:
+        return 30 if period == "30d" else 7 if period == "7d" else 90 if period == "90d" else 365
+    
     async def _get_price_history(
         self,
         product_id: Optional[int],
         period: str
     ) -> List[Dict[str, Any]]:
         """从ERP获取价格历史数据"""
-        if self.erp_connector:
-            # TODO: 调用ERP API获取价格历史
-            pass
+        if self.erp_connector and product_id is not None:
+            return await self._get_price_records([product_id], period)
         
         # 模拟数据
-        days = 30 if period == "30d" else 7 if period == "7d" else 90 if period == "90d" else 365
+        days = self._period_days(period)
         return [
             {
                 "date": (datetime.now() - timedelta(days=i)).isoformat(),
@@ -319,45 +456,16 @@ class PriceAnalyzer:
         ]
     
     def _calculate_trend(self, prices: List[float], dates: List[str]) -> Dict[str, Any]:
-        """计算价格趋势"""
+        """计算价格趋势（线性回归斜率）"""
         if len(prices) < 2:
             return {"direction": "数据不足", "strength": 0.0}
         
-        # 简单线性回归
-        n = len(prices)
-        x = list(range(n))
-        y = prices
-        
-        x_mean = statistics.mean(x)
-        y_mean = statistics.mean(y)
-        
-        numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
-        
-        if denominator == 0:
-            slope = 0
-        else:
-            slope = numerator / denominator
-        
-        # 归一化强度（0-1）
-        price_range = max(prices) - min(prices)
-        if price_range > 0:
-            strength = abs(slope * n) / price_range
-            strength = min(strength, 1.0)
-        else:
-            strength = 0.0
-        
-        if slope > 0.01:
-            direction = "上升"
-        elif slope < -0.01:
-            direction = "下降"
-        else:
-            direction = "平稳"
+        trend = group_trend(SeriesFrame.single(prices), self.TREND_FLAT_THRESHOLD)
         
         return {
-            "direction": direction,
-            "strength": round(strength, 4),
-            "slope": round(slope, 4)
+            "direction": str(trend["direction"][0]),
+            "strength": round(float(trend["strength"][0]), 4),
+            "slope": round(float(trend["slope"][0]), 4)
         }
     
     def _detect_price_anomalies(
@@ -365,40 +473,82 @@ class PriceAnalyzer:
         prices: List[float],
         dates: List[str]
     ) -> List[Dict[str, Any]]:
-        """检测价格异常"""
+        """检测价格异常（2倍标准差）"""
         if len(prices) < 3:
             return []
         
-        anomalies = []
-        mean_price = statistics.mean(prices)
-        std_price = statistics.stdev(prices) if len(prices) > 1 else 0
+        frame = SeriesFrame.single(prices)
+        stats = group_stats(frame)
+        rows = anomaly_rows(frame, stats)
+        mean_price = float(stats["mean"][0])
+        z_scores = np.abs(frame.values[rows] - mean_price) / stats["std"][0]
         
-        if std_price == 0:
+        return [
+            {
+                "date": dates[i] if i < len(dates) else "",
+                "price": prices[i],
+                "deviation": round(z_score, 2),
+                "type": "异常高" if prices[i] > mean_price else "异常低"
+            }
+            for i, z_score in zip(rows.tolist(), z_scores.tolist())
+        ]
+    
+    @staticmethod
+    def _anomaly_records(
+        frame: SeriesFrame,
+        rows: np.ndarray,
+        values: np.ndarray,
+        means: np.ndarray,
+        stds: np.ndarray,
+        group: int
+    ) -> List[Dict[str, Any]]:
+        """把批量检测出的异常行转为结果记录"""
+        if not len(rows):
             return []
-        
-        for i, price in enumerate(prices):
-            z_score = abs((price - mean_price) / std_price)
-            if z_score > 2:  # 2倍标准差
-                anomalies.append({
-                    "date": dates[i] if i < len(dates) else "",
-                    "price": price,
-                    "deviation": round(z_score, 2),
-                    "type": "异常高" if price > mean_price else "异常低"
-                })
-        
-        return anomalies
+        mean_price = float(means[group])
+        prices = values[rows].tolist()
+        deviations = (np.abs(values[rows] - mean_price) / stds[group]).tolist()
+        dates = np.datetime_as_string(frame.dates[rows]).tolist()
+        return [
+            {
+                "date": date,
+                "price": price,
+                "deviation": round(deviation, 2),
+                "type": "异常高" if price > mean_price else "异常低"
+            }
+            for date, price, deviation in zip(dates, prices, deviations)
+        ]
     
     def _analyze_seasonality(
         self,
         price_history: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
-        """分析季节性模式"""
-        # 简化实现：检查是否有周期性模式
+        """分析季节性模式（月度均价振幅）"""
+        if len(price_history) < 2:
+            return self._seasonality_result(None, 0)
+        
+        frame = SeriesFrame.single(
+            [item["price"] for item in price_history],
+            [item["date"] for item in price_history]
+        )
+        return self._seasonality_result(group_seasonality(frame), 0)
+    
+    @staticmethod
+    def _seasonality_result(seasonality: Optional[Dict[str, np.ndarray]], group: int) -> Dict[str, Any]:
+        """组装季节性结果"""
+        if seasonality is None or not seasonality["has_seasonality"][group]:
+            return {
+                "has_seasonality": False,
+                "pattern": "无明显季节性",
+                "peak_months": [],
+                "low_months": []
+            }
+        amplitude = float(seasonality["amplitude"][group])
         return {
-            "has_seasonality": False,
-            "pattern": "无明显季节性",
-            "peak_months": [],
-            "low_months": []
+            "has_seasonality": True,
+            "pattern": f"月度季节性（振幅{amplitude:.1%}）",
+            "peak_months": [int(seasonality["peak_month"][group])],
+            "low_months": [int(seasonality["low_month"][group])]
         }
     
     def _forecast_price_trend(
@@ -449,14 +599,84 @@ class PriceAnalyzer:
     
     async def _get_product_price_data(self, product_id: int) -> Optional[Dict[str, Any]]:
         """获取产品价格数据"""
-        # TODO: 从ERP获取
-        return {
-            "id": product_id,
-            "name": f"产品{product_id}",
-            "price": 100.0,
-            "avg_price": 95.0,
-            "trend": "上升"
-        }
+        return (await self._get_products_price_data([product_id]))[0]
+    
+    async def _get_products_price_data(
+        self,
+        product_ids: List[int]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """批量获取产品价格数据（与 product_ids 顺序一致，一次请求；ERP中不存在的产品为 None）"""
+        if self.erp_connector:
+            if not product_ids:
+                return []
+            products = {p["id"]: p for p in await self.erp_connector.get_products(product_ids)}
+            return [products.get(product_id) for product_id in product_ids]
+        
+        # 模拟数据
+        return [
+            {
+                "id": product_id,
+                "name": f"产品{product_id}",
+                "price": 100.0,
+                "avg_price": 95.0,
+                "trend": "上升"
+            }
+            for product_id in product_ids
+        ]
+    
+    async def _get_price_frame(
+        self,
+        product_ids: Optional[List[int]],
+        period: str
+    ) -> SeriesFrame:
+        """一次载入多个产品的价格历史为列式序列（product_ids 为 None 时载入ERP中的全部产品）"""
+        if product_ids is not None and not product_ids:
+            return SeriesFrame([], [], [])
+        
+        if self.erp_connector:
+            records = await self._get_price_records(product_ids, period)
+            # 所有记录都带销量时才计算价格弹性
+            has_sales = bool(records) and all(r.get("sales") is not None for r in records)
+            return SeriesFrame.from_records(
+                records, "product_id", "price", column_keys=("sales",) if has_sales else ()
+            )
+        
+        if product_ids is None:
+            raise ValueError("未配置ERP连接器，无法枚举产品目录，请指定 product_ids")
+        
+        # 模拟数据（与 _get_price_history 相同的波动模式）
+        offsets = np.arange(self._period_days(period), 0, -1)
+        dates = np.datetime64(datetime.now(), "s") - offsets.astype("timedelta64[D]")
+        prices = 100.0 + (offsets % 10) * 2 - 5
+        return SeriesFrame(
+            np.repeat(np.asarray(product_ids), len(offsets)),
+            np.tile(dates, len(product_ids)),
+            np.tile(prices, len(product_ids))
+        )
+    
+    async def _get_price_records(
+        self,
+        product_ids: Optional[List[int]],
+        period: str
+    ) -> List[Dict[str, Any]]:
+        """一次请求从ERP获取多个产品在分析周期内的价格记录"""
+        since = datetime.now() - timedelta(days=self._period_days(period))
+        return await self.erp_connector.get_price_history(product_ids, since)
+    
+    @staticmethod
+    def _market_positions(prices: np.ndarray) -> List[str]:
+        """
+        批量市场定位：每个产品与排在它前面的产品的平均价格比较
+        （与逐个调用 _analyze_market_position 的结果一致）
+        """
+        previous_count = np.arange(len(prices))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            previous_mean = (np.cumsum(prices) - prices) / np.maximum(previous_count, 1)
+        return np.where(
+            previous_count == 0,
+            "无对比数据",
+            np.where(prices > previous_mean * 1.1, "高端", np.where(prices < previous_mean * 0.9, "低端", "中等"))
+        ).tolist()
     
     def _analyze_market_position(
         self,
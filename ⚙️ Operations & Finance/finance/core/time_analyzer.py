@@ -8,6 +8,17 @@ from datetime import datetime, timedelta
 import statistics
 import math
 
+import numpy as np
+
+from core.batch_analytics import (
+    SeriesFrame,
+    anomaly_rows,
+    group_stats,
+    group_trend,
+    iter_group_rows,
+    pair_totals,
+)
+
 class TimeAnalyzer:
     """
     工时分析器⭐深化版
@@ -20,8 +31,15 @@ class TimeAnalyzer:
     5. 工时优化建议（深化）
     6. 资源利用率分析
     7. 工时预测
+    8. 多项目批量分析（向量化）
     """
     
+    # 趋势斜率绝对值不超过该值视为平稳
+    TREND_FLAT_THRESHOLD = 0.1
+    # 标准工时（小时/天）与平均时薪（元）
+    STANDARD_HOURS_PER_DAY = 8.0
+    AVERAGE_HOURLY_RATE = 100.0
+    
     def __init__(self, erp_connector=None):
         """
         初始化工时分析器
@@ -272,20 +290,191 @@ class TimeAnalyzer:
             "implementation_priority": self._prioritize_plans(optimization_plans)
         }
     
+    async def analyze_projects(
+        self,
+        project_ids: List[int],
+        period: str = "30d",
+        anomaly_threshold: float = 2.0
+    ) -> Dict[str, Any]:
+        """
+        批量分析多个项目的工时⭐
+        
+        一次载入所有项目的工时序列，向量化计算统计、分布、趋势、异常、
+        效率、成本和资源利用率，结果字段与 analyze_work_hours 一致
+        （资源利用率只返回汇总，不展开每个员工）。
+        
+        Args:
+            project_ids: 项目ID列表
+            period: 分析周期
+            anomaly_threshold: 异常检测的 z 分数阈值
+            
+        Returns:
+            各项目分析结果（按项目ID排序）与汇总
+        """
+        frame = await self._get_work_hours_frame(project_ids, period)
+        stats = group_stats(frame, median=True)
+        trend = group_trend(frame, self.TREND_FLAT_THRESHOLD, stats)
+        anomalies = iter_group_rows(frame, anomaly_rows(frame, stats, anomaly_threshold))
+        
+        # 效率：与标准工时的接近程度
+        means = stats["mean"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            efficiency = np.where(
+                means > self.STANDARD_HOURS_PER_DAY,
+                np.minimum(self.STANDARD_HOURS_PER_DAY / np.where(means > 0, means, 1), 1.0),
+                means / self.STANDARD_HOURS_PER_DAY
+            )
+        efficiency = np.where(means > 0, efficiency, 0.0)
+        
+        # 资源利用率：项目内员工平均工时 / 最大工时
+        utilization = np.zeros(frame.group_count)
+        resource_count = np.zeros(frame.group_count, dtype=np.int64)
+        if "employee_id" in frame.columns and len(frame):
+            resources = pair_totals(frame, frame.columns["employee_id"])
+            resource_count = np.bincount(resources["group"], minlength=frame.group_count)
+            resource_sums = np.bincount(resources["group"], weights=resources["total"], minlength=frame.group_count)
+            resource_starts = np.concatenate(([0], np.cumsum(resource_count)[:-1]))
+            resource_max = np.maximum.reduceat(resources["total"], resource_starts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                utilization = np.where(
+                    resource_max > 0,
+                    resource_sums / np.maximum(resource_count, 1) / np.where(resource_max > 0, resource_max, 1),
+                    0.0
+                )
+        
+        entities = frame.entities.tolist()
+        totals, avgs, maxs, mins, medians, stds = (
+            stats[key].tolist() for key in ("sum", "mean", "max", "min", "median", "std")
+        )
+        directions, strengths, slopes = (trend[key].tolist() for key in ("direction", "strength", "slope"))
+        efficiency = efficiency.tolist()
+        utilization = utilization.tolist()
+        resource_count = resource_count.tolist()
+        
+        results = []
+        for i, project_id in enumerate(entities):
+            project_anomalies = self._anomaly_records(frame, anomalies[i], stats, i)
+            efficiency_info = {
+                "efficiency": round(efficiency[i], 4),
+                "level": "高" if efficiency[i] >= 0.9 else "中" if efficiency[i] >= 0.7 else "低"
+            }
+            results.append({
+                "project_id": project_id,
+                "period": period,
+                "total_hours": round(totals[i], 2),
+                "average_daily": round(avgs[i], 2),
+                "max_daily": round(maxs[i], 2),
+                "min_daily": round(mins[i], 2),
+                "hours_distribution": {
+                    "mean": round(avgs[i], 2),
+                    "median": round(medians[i], 2),
+                    "std": round(stds[i], 2),
+                    "range": {"min": round(mins[i], 2), "max": round(maxs[i], 2)}
+                },
+                "trend": {
+                    "direction": directions[i],
+                    "strength": round(strengths[i], 4),
+                    "slope": round(slopes[i], 4)
+                } if stats["count"][i] >= 2 else {"direction": "数据不足", "strength": 0.0},
+                "anomalies": project_anomalies,
+                "efficiency": efficiency_info,
+                "cost_analysis": {
+                    "total_cost": round(totals[i] * self.AVERAGE_HOURLY_RATE, 2),
+                    "average_hourly_rate": self.AVERAGE_HOURLY_RATE,
+                    "cost_per_day": round(avgs[i] * self.AVERAGE_HOURLY_RATE, 2)
+                },
+                "resource_utilization": {
+                    "utilization": round(utilization[i], 4),
+                    "resource_count": resource_count[i]
+                },
+                "recommendations": self._generate_hours_recommendations(
+                    totals[i], avgs[i], efficiency_info, project_anomalies
+                )
+            })
+        
+        return {
+            "period": period,
+            "projects": results,
+            "summary": {
+                "project_count": len(results),
+                "total_hours": round(sum(totals), 2),
+                "total_cost": round(sum(totals) * self.AVERAGE_HOURLY_RATE, 2),
+                "low_efficiency_count": sum(1 for r in results if r["efficiency"]["level"] == "低"),
+                "anomaly_count": sum(len(r["anomalies"]) for r in results)
+            }
+        }
+    
     # ============ 辅助方法 ============
     
+    @staticmethod
+    def _period_days(period: str) -> int:
+        return 30 if period == "30d" else 7 if period == "7d" else 90 if period == "90d" else 365
+    
+    async def _get_work_hours_frame(
+        self,
+        project_ids: List[int],
+        period: str
+    ) -> SeriesFrame:
+        """一次载入多个项目的工时数据为列式序列"""
+        if not project_ids:
+            return SeriesFrame([], [], [])
+        
+        if self.erp_connector:
+            records = await self._get_work_hours_records(project_ids, period)
+            return SeriesFrame.from_records(records, "project_id", "hours", column_keys=("employee_id",))
+        
+        # 模拟数据（与 _get_work_hours_data 相同的波动模式）
+        offsets = np.arange(self._period_days(period), 0, -1)
+        dates = np.datetime64(datetime.now(), "s") - offsets.astype("timedelta64[D]")
+        hours = 8.0 + (offsets % 5) * 0.5 - 1.0
+        employees = np.array([f"EMP{(i % 10) + 1}" for i in offsets.tolist()])
+        return SeriesFrame(
+            np.repeat(np.asarray(project_ids), len(offsets)),
+            np.tile(dates, len(project_ids)),
+            np.tile(hours, len(project_ids)),
+            {"employee_id": np.tile(employees, len(project_ids))}
+        )
+    
+    async def _get_work_hours_records(self, project_ids: List[int], period: str) -> List[Dict[str, Any]]:
+        """一次请求从ERP获取多个项目在分析周期内的工时记录"""
+        since = datetime.now() - timedelta(days=self._period_days(period))
+        return await self.erp_connector.get_work_hours(project_ids, since)
+    
+    @staticmethod
+    def _anomaly_records(
+        frame: SeriesFrame,
+        rows: np.ndarray,
+        stats: Dict[str, np.ndarray],
+        group: int
+    ) -> List[Dict[str, Any]]:
+        """把批量检测出的异常行转为结果记录"""
+        if not len(rows):
+            return []
+        mean_hours = float(stats["mean"][group])
+        hours = frame.values[rows]
+        deviations = (np.abs(hours - mean_hours) / stats["std"][group]).tolist()
+        dates = np.datetime_as_string(frame.dates[rows]).tolist()
+        return [
+            {
+                "date": date,
+                "hours": round(value, 2),
+                "deviation": round(deviation, 2),
+                "type": "异常高" if value > mean_hours else "异常低"
+            }
+            for date, value, deviation in zip(dates, hours.tolist(), deviations)
+        ]
+    
     async def _get_work_hours_data(
         self,
         project_id: Optional[int],
         period: str
     ) -> List[Dict[str, Any]]:
         """从ERP获取工时数据"""
-        if self.erp_connector:
-            # TODO: 调用ERP API获取工时数据
-            pass
+        if self.erp_connector and project_id is not None:
+            return await self._get_work_hours_records([project_id], period)
         
         # 模拟数据
-        days = 30 if period == "30d" else 7 if period == "7d" else 90 if period == "90d" else 365
+        days = self._period_days(period)
         return [
             {
                 "date": (datetime.now() - timedelta(days=i)).isoformat(),
@@ -319,44 +508,16 @@ class TimeAnalyzer:
         hours_list: List[float],
         dates: List[str]
     ) -> Dict[str, Any]:
-        """分析工时趋势"""
+        """分析工时趋势（线性回归斜率）"""
         if len(hours_list) < 2:
             return {"direction": "数据不足", "strength": 0.0}
         
-        # 计算趋势（类似价格趋势）
-        n = len(hours_list)
-        x = list(range(n))
-        y = hours_list
-        
-        x_mean = statistics.mean(x)
-        y_mean = statistics.mean(y)
-        
-        numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
-        
-        if denominator == 0:
-            slope = 0
-        else:
-            slope = numerator / denominator
-        
-        hours_range = max(hours_list) - min(hours_list)
-        if hours_range > 0:
-            strength = abs(slope * n) / hours_range
-            strength = min(strength, 1.0)
-        else:
-            strength = 0.0
-        
-        if slope > 0.1:
-            direction = "上升"
-        elif slope < -0.1:
-            direction = "下降"
-        else:
-            direction = "平稳"
+        trend = group_trend(SeriesFrame.single(hours_list), self.TREND_FLAT_THRESHOLD)
         
         return {
-            "direction": direction,
-            "strength": round(strength, 4),
-            "slope": round(slope, 4)
+            "direction": str(trend["direction"][0]),
+            "strength": round(float(trend["strength"][0]), 4),
+            "slope": round(float(trend["slope"][0]), 4)
         }
     
     def _detect_hours_anomalies(
@@ -364,28 +525,25 @@ class TimeAnalyzer:
         hours_list: List[float],
         dates: List[str]
     ) -> List[Dict[str, Any]]:
-        """检测工时异常"""
+        """检测工时异常（2倍标准差）"""
         if len(hours_list) < 3:
             return []
         
-        anomalies = []
-        mean_hours = statistics.mean(hours_list)
-        std_hours = statistics.stdev(hours_list) if len(hours_list) > 1 else 0
-        
-        if std_hours == 0:
-            return []
+        frame = SeriesFrame.single(hours_list)
+        stats = group_stats(frame)
+        rows = anomaly_rows(frame, stats)
+        mean_hours = float(stats["mean"][0])
+        z_scores = np.abs(frame.values[rows] - mean_hours) / stats["std"][0]
         
-        for i, hours in enumerate(hours_list):
-            z_score = abs((hours - mean_hours) / std_hours)
-            if z_score > 2:  # 2倍标准差
-                anomalies.append({
-                    "date": dates[i] if i < len(dates) else "",
-                    "hours": round(hours, 2),
-                    "deviation": round(z_score, 2),
-                    "type": "异常高" if hours > mean_hours else "异常低"
-                })
-        
-        return anomalies
+        return [
+            {
+                "date": dates[i] if i < len(dates) else "",
+                "hours": round(hours_list[i], 2),
+                "deviation": round(z_score, 2),
+                "type": "异常高" if hours_list[i] > mean_hours else "异常低"
+            }
+            for i, z_score in zip(rows.tolist(), z_scores.tolist())
+        ]
     
     def _calculate_efficiency(
         self,
@@ -394,7 +552,7 @@ class TimeAnalyzer:
     ) -> Dict[str, Any]:
         """计算效率"""
         # 简化实现：基于标准工时（8小时/天）
-        standard_hours_per_day = 8.0
+        standard_hours_per_day = self.STANDARD_HOURS_PER_DAY
         avg_hours = statistics.mean(hours_list) if hours_list else 0.0
         
         if avg_hours > 0:
@@ -414,7 +572,7 @@ class TimeAnalyzer:
     ) -> Dict[str, Any]:
         """分析工时成本"""
         total_hours = sum(hours_list)
-        avg_hourly_rate = 100.0  # 假设每小时100元
+        avg_hourly_rate = self.AVERAGE_HOURLY_RATE
         total_cost = total_hours * avg_hourly_rate
         
         return {
@@ -0,0 +1,158 @@
+import asyncio
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.price_analyzer import PriceAnalyzer
+from core.time_analyzer import TimeAnalyzer
+
+START = datetime(2026, 9, 1)
+
+
+def _dates(days):
+    return [(START + timedelta(days=d)).isoformat() for d in range(days)]
+
+
+def _price_records(rng, product_id, days):
+    prices = 100.0 + rng.normal(0, 3, days).cumsum() * rng.choice([0.1, 1.0])
+    prices[rng.integers(days)] *= 1.5  # 注入异常
+    if product_id % 4 == 0:
+        prices[:] = 80.0 + 8.0 * np.sin(np.arange(days) / 90 * 2 * np.pi)  # 季度周期
+    sales = 500.0 - prices * 2 + rng.normal(0, 5, days)
+    return [
+        {"product_id": product_id, "date": date, "price": float(price), "sales": float(sale)}
+        for date, price, sale in zip(_dates(days), prices, sales)
+    ]
+
+
+def _hours_records(rng, project_id, days):
+    hours = rng.normal(8.0 + project_id % 3, 1.0, days)
+    hours[rng.integers(days)] += 8
+    return [
+        {
+            "project_id": project_id,
+            "date": date,
+            "hours": float(value),
+            "employee_id": f"EMP{rng.integers(1, 6)}",
+            "task_type": "开发"
+        }
+        for date, value in zip(_dates(days), hours)
+    ]
+
+
+class FakeERPConnector:
+    """内存中的ERP：记录按 (实体, 日期) 排序返回，统计每个批量接口的调用次数"""
+
+    def __init__(self, products=30, projects=12, days=100, seed=11):
+        rng = np.random.default_rng(seed)
+        self.prices = [r for pid in range(1, products + 1) for r in _price_records(rng, pid, days)]
+        self.prices += _price_records(rng, products + 1, 1)  # 只有一天数据的产品
+        self.hours = [r for pid in range(1, projects + 1) for r in _hours_records(rng, pid, days)]
+        self.calls = Counter()
+
+    @staticmethod
+    def _select(records, key, ids):
+        return [r for r in records if ids is None or r[key] in ids]
+
+    async def get_price_history(self, product_ids, since):
+        self.calls["price_history"] += 1
+        return self._select(self.prices, "product_id", product_ids)
+
+    async def get_work_hours(self, project_ids, since):
+        self.calls["work_hours"] += 1
+        return self._select(self.hours, "project_id", project_ids)
+
+    async def get_products(self, product_ids):
+        self.calls["products"] += 1
+        return [
+            {"id": pid, "name": f"产品{pid}", "price": 90.0 + pid, "avg_price": 88.0, "trend": "平稳"}
+            for pid in product_ids if pid <= 30
+        ]
+
+
+@pytest.fixture
+def erp():
+    return FakeERPConnector()
+
+
+def test_catalog_matches_per_product_analysis(erp):
+    analyzer = PriceAnalyzer(erp_connector=erp)
+
+    async def run():
+        catalog = await analyzer.analyze_catalog(None)
+        singles = [await analyzer.analyze_price_trend(pid) for pid in range(1, 32)]
+        return catalog, singles
+
+    catalog, singles = asyncio.run(run())
+    products = catalog["products"]
+    assert [p["product_id"] for p in products] == list(range(1, 32))
+    assert erp.calls["price_history"] == 1 + 31
+
+    for batch, single in zip(products, singles):
+        batch = dict(batch)
+        batch.pop("price_elasticity", None)
+        assert batch == single
+
+    assert products[-1]["trend"] == "数据不足"
+    summary = catalog["summary"]
+    assert summary["product_count"] == 31 and summary["analyzed_count"] == 30
+    assert summary["anomaly_count"] == sum(len(s.get("anomalies", [])) for s in singles) > 0
+    assert summary["seasonal_count"] >= 1
+
+
+def test_catalog_elasticity_matches_pairwise_formula(erp):
+    analyzer = PriceAnalyzer(erp_connector=erp)
+    catalog = asyncio.run(analyzer.analyze_catalog([3, 5, 7]))
+
+    for product in catalog["products"]:
+        records = [r for r in erp.prices if r["product_id"] == product["product_id"]]
+        single = asyncio.run(analyzer.analyze_price_elasticity(product["product_id"], records, records))
+        assert product["price_elasticity"]["elasticity"] == single["elasticity"]
+
+
+def test_catalog_without_erp_requires_product_ids():
+    analyzer = PriceAnalyzer()
+    with pytest.raises(ValueError):
+        asyncio.run(analyzer.analyze_catalog(None))
+    assert asyncio.run(analyzer.analyze_catalog([]))["products"] == []
+    assert len(asyncio.run(analyzer.analyze_catalog([1, 2]))["products"]) == 2
+
+
+def test_projects_batch_matches_per_project_analysis(erp):
+    analyzer = TimeAnalyzer(erp_connector=erp)
+    project_ids = list(range(1, 13))
+
+    async def run():
+        batch = await analyzer.analyze_projects(project_ids)
+        singles = [await analyzer.analyze_work_hours(pid) for pid in project_ids]
+        return batch, singles
+
+    batch, singles = asyncio.run(run())
+    assert erp.calls["work_hours"] == 1 + len(project_ids)
+
+    for result, single in zip(batch["projects"], singles):
+        single_utilization = single.pop("resource_utilization")
+        utilization = result.pop("resource_utilization")
+        assert result == single
+        assert utilization == {
+            "utilization": single_utilization["utilization"],
+            "resource_count": single_utilization["resource_count"]
+        }
+    assert batch["summary"]["anomaly_count"] == sum(len(s["anomalies"]) for s in singles) > 0
+
+
+def test_compare_prices_fetches_products_in_one_request(erp):
+    analyzer = PriceAnalyzer(erp_connector=erp)
+    result = asyncio.run(analyzer.compare_prices([5, 99, 1, 20]))
+
+    assert erp.calls["products"] == 1
+    assert [p["product_id"] for p in result["products"]] == [5, 1, 20]
+    assert [p["market_position"] for p in result["products"]] == ["无对比数据", "中等", "高端"]
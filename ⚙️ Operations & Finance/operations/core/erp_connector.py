@@ -84,6 +84,71 @@ class ERPConnector:
                 "error": str(e)
             }
     
+    async def get_price_history(
+        self,
+        product_ids: Optional[List[int]],
+        since: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        一次请求批量获取价格历史（ERP: GET /finance/price-history）
+
+        产品ID为ERP订单明细中的数值型产品编码，价格为当日成交均价，销量为当日成交数量。
+
+        Args:
+            product_ids: 产品ID列表，None 表示全部产品（整个目录）
+            since: 起始时间
+
+        Returns:
+            [{"product_id", "date", "price", "sales"(可选)}]
+        """
+        return await self._get_records("/finance/price-history", "records", product_ids, since)
+
+    async def get_work_hours(
+        self,
+        project_ids: Optional[List[int]],
+        since: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        一次请求批量获取工时记录（ERP: GET /finance/work-hours）
+
+        工时来自已结束的生产执行记录，按订单归属到项目。
+
+        Returns:
+            [{"project_id", "date", "hours", "employee_id", "task_type"}]
+        """
+        return await self._get_records("/finance/work-hours", "records", project_ids, since)
+
+    async def get_products(self, product_ids: Optional[List[int]]) -> List[Dict[str, Any]]:
+        """
+        一次请求批量获取产品价格概况（ERP: GET /finance/products）
+
+        Returns:
+            [{"id", "name", "price", "avg_price", "trend"}]
+        """
+        return await self._get_records("/finance/products", "products", product_ids)
+
+    async def _get_records(
+        self,
+        path: str,
+        key: str,
+        ids: Optional[List[int]],
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """批量查询：ids 以逗号分隔放在一个请求中，失败时抛出异常（不返回不完整的数据）"""
+        params = {}
+        if ids is not None:
+            params["ids"] = ",".join(str(i) for i in ids)
+        if since is not None:
+            params["since"] = since.isoformat()
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.get(f"{self.erp_api_url}{path}", params=params)
+                response.raise_for_status()
+                return response.json().get(key, [])
+        except httpx.HTTPError as e:
+            logger.error(f"批量获取ERP数据失败({path}): {e}")
+            raise
+
     def register_event_handler(self, event_type: str, handler: Callable):
         """注册事件处理器"""
         if event_type not in self.event_handlers:
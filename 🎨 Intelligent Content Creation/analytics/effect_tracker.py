@@ -4,21 +4,198 @@
 - 互动数据统计
 - 效果评估
 - 优化建议
+
+效果记录存入 SQLite（按 content_id/platform/时间建索引），
+内容与平台维度的汇总由触发器在写入时增量维护，分析接口不再扫描历史。
 """
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+from pathlib import Path
 import asyncio
+import os
+import random
+import sqlite3
+import threading
+
+from platforms.fanout import PlatformFanout, default_fanout
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_effects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    views INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0,
+    comments INTEGER NOT NULL DEFAULT 0,
+    shares INTEGER NOT NULL DEFAULT 0,
+    engagement_rate REAL NOT NULL DEFAULT 0,
+    tracked_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_effects_content ON content_effects (content_id, platform, tracked_at);
+CREATE INDEX IF NOT EXISTS idx_effects_platform ON content_effects (platform, tracked_at);
+
+CREATE TABLE IF NOT EXISTS content_aggregates (
+    content_id TEXT PRIMARY KEY,
+    records INTEGER NOT NULL,
+    total_views INTEGER NOT NULL,
+    total_likes INTEGER NOT NULL,
+    total_comments INTEGER NOT NULL,
+    engagement_sum REAL NOT NULL,
+    platforms_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS platform_aggregates (
+    platform TEXT PRIMARY KEY,
+    records INTEGER NOT NULL,
+    total_views INTEGER NOT NULL,
+    total_likes INTEGER NOT NULL,
+    engagement_sum REAL NOT NULL,
+    content_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS content_platforms (
+    content_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    PRIMARY KEY (content_id, platform)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_effects_aggregate AFTER INSERT ON content_effects
+BEGIN
+    INSERT INTO content_aggregates
+        (content_id, records, total_views, total_likes, total_comments, engagement_sum)
+    VALUES (NEW.content_id, 1, NEW.views, NEW.likes, NEW.comments, NEW.engagement_rate)
+    ON CONFLICT (content_id) DO UPDATE SET
+        records = records + 1,
+        total_views = total_views + excluded.total_views,
+        total_likes = total_likes + excluded.total_likes,
+        total_comments = total_comments + excluded.total_comments,
+        engagement_sum = engagement_sum + excluded.engagement_sum;
+
+    INSERT INTO platform_aggregates
+        (platform, records, total_views, total_likes, engagement_sum)
+    VALUES (NEW.platform, 1, NEW.views, NEW.likes, NEW.engagement_rate)
+    ON CONFLICT (platform) DO UPDATE SET
+        records = records + 1,
+        total_views = total_views + excluded.total_views,
+        total_likes = total_likes + excluded.total_likes,
+        engagement_sum = engagement_sum + excluded.engagement_sum;
+
+    INSERT OR IGNORE INTO content_platforms (content_id, platform) VALUES (NEW.content_id, NEW.platform);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_content_platform_count AFTER INSERT ON content_platforms
+BEGIN
+    UPDATE content_aggregates SET platforms_count = platforms_count + 1 WHERE content_id = NEW.content_id;
+    UPDATE platform_aggregates SET content_count = content_count + 1 WHERE platform = NEW.platform;
+END;
+"""
+
+_RECORD_COLUMNS = ("content_id", "platform", "views", "likes", "comments", "shares", "engagement_rate", "tracked_at")
 
 
 class EffectTracker:
     """效果追踪器"""
     
-    def __init__(self):
-        # 内容效果数据
-        self.content_effects = []
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        fanout: Optional[PlatformFanout] = None,
+        endpoints: Optional[Dict[str, str]] = None
+    ):
+        """
+        初始化效果追踪器
+        
+        Args:
+            db_path: 效果数据库路径（默认 EFFECT_TRACKER_DB_PATH 或 artifacts/data/content_effects.db）
+            fanout: 多平台并发调度器
+            endpoints: 平台数据接口地址 {platform: base_url}（未配置时使用模拟数据）
+        """
+        if db_path is None:
+            db_path = os.getenv("EFFECT_TRACKER_DB_PATH") or str(
+                Path(__file__).resolve().parents[2] / "artifacts" / "data" / "content_effects.db"
+            )
+        self.db_path = db_path
+        # 首次读写时才打开数据库，导入模块不会创建文件
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        
+        self.fanout = fanout or default_fanout
+        self.endpoints = dict(endpoints or {})
+    
+    # ============ 存储 ============
+    
+    def _connection(self) -> sqlite3.Connection:
+        """打开数据库并建表（调用方持有 _lock）"""
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def _insert_records(self, records: List[Dict[str, Any]]):
+        """批量写入效果记录（单事务，聚合由触发器维护）"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    f"INSERT INTO content_effects ({', '.join(_RECORD_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_RECORD_COLUMNS))})",
+                    [tuple(r[c] for c in _RECORD_COLUMNS) for r in records]
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._connection().execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def get_effect_records(
+        self,
+        content_id: Optional[str] = None,
+        platform: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        查询效果记录（走索引，按时间倒序）
         
-        # 平台效果统计
-        self.platform_stats = {}
+        Args:
+            content_id: 内容ID（可选）
+            platform: 平台（可选）
+            since: 起始时间 ISO 格式（可选）
+            limit: 返回数量上限（None 表示不限）
+        """
+        conditions, params = [], []
+        if content_id:
+            conditions.append("content_id = ?")
+            params.append(content_id)
+        if platform:
+            conditions.append("platform = ?")
+            params.append(platform)
+        if since:
+            conditions.append("tracked_at >= ?")
+            params.append(since)
+        sql = f"SELECT {', '.join(_RECORD_COLUMNS)} FROM content_effects"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY tracked_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, tuple(params))
+    
+    @property
+    def content_effects(self) -> List[Dict[str, Any]]:
+        """全部效果记录（按时间正序）"""
+        return list(reversed(self.get_effect_records(limit=None)))
     
     # ============ 效果数据收集 ============
     
@@ -38,22 +215,14 @@ class EffectTracker:
             效果数据
         """
         try:
-            # 从平台API获取数据（这里模拟）
-            effect_data = await self._fetch_platform_data(content_id, platform)
+            # 从平台API获取数据
+            effect_data = await self.fanout.run(
+                platform, lambda: self._fetch_platform_data(content_id, platform)
+            )
             
             # 记录效果数据
-            record = {
-                "content_id": content_id,
-                "platform": platform,
-                "views": effect_data.get('views', 0),
-                "likes": effect_data.get('likes', 0),
-                "comments": effect_data.get('comments', 0),
-                "shares": effect_data.get('shares', 0),
-                "engagement_rate": self._calculate_engagement_rate(effect_data),
-                "tracked_at": datetime.now().isoformat()
-            }
-            
-            self.content_effects.append(record)
+            record = self._build_record(content_id, platform, effect_data)
+            self._insert_records([record])
             
             return {
                 "success": True,
@@ -80,14 +249,30 @@ class EffectTracker:
         Returns:
             批量追踪结果
         """
+        # 并发采集（全局并发上限 + 平台限速 + 连接复用）
+        fetched = await self.fanout.map([
+            (item['platform'],
+             lambda item=item: self._fetch_platform_data(item['content_id'], item['platform']))
+            for item in content_list
+        ])
+        
         results = []
+        records = []
+        for item, effect_data in zip(content_list, fetched):
+            if isinstance(effect_data, Exception):
+                results.append({"success": False, "error": str(effect_data)})
+                continue
+            record = self._build_record(item['content_id'], item['platform'], effect_data)
+            records.append(record)
+            results.append({
+                "success": True,
+                "effect": record,
+                "message": "效果数据已更新"
+            })
         
-        for item in content_list:
-            result = await self.track_content_effect(
-                item['content_id'],
-                item['platform']
-            )
-            results.append(result)
+        # 一次事务写入
+        if records:
+            self._insert_records(records)
         
         success_count = sum(1 for r in results if r.get('success'))
         
@@ -113,21 +298,21 @@ class EffectTracker:
         Returns:
             性能分析
         """
-        # 获取该内容的所有效果记录
-        records = [e for e in self.content_effects 
-                  if e['content_id'] == content_id]
+        # 读取增量维护的汇总
+        rows = self._query("SELECT * FROM content_aggregates WHERE content_id = ?", (content_id,))
         
-        if not records:
+        if not rows:
             return {
                 "success": False,
                 "error": "该内容暂无效果数据"
             }
         
         # 统计
-        total_views = sum(r['views'] for r in records)
-        total_likes = sum(r['likes'] for r in records)
-        total_comments = sum(r['comments'] for r in records)
-        avg_engagement = sum(r['engagement_rate'] for r in records) / len(records)
+        aggregate = rows[0]
+        total_views = aggregate['total_views']
+        total_likes = aggregate['total_likes']
+        total_comments = aggregate['total_comments']
+        avg_engagement = aggregate['engagement_sum'] / aggregate['records']
         
         # 评级
         performance_rating = self._rate_performance({
@@ -145,24 +330,25 @@ class EffectTracker:
                 "total_comments": total_comments,
                 "average_engagement_rate": float(avg_engagement),
                 "performance_rating": performance_rating,
-                "platforms_count": len(set(r['platform'] for r in records))
+                "platforms_count": aggregate['platforms_count']
             }
         }
     
     def analyze_platform_performance(self, platform: str) -> Dict[str, Any]:
         """分析平台整体表现"""
-        records = [e for e in self.content_effects if e['platform'] == platform]
+        rows = self._query("SELECT * FROM platform_aggregates WHERE platform = ?", (platform,))
         
-        if not records:
+        if not rows:
             return {
                 "success": False,
                 "error": f"平台 {platform} 暂无数据"
             }
         
-        total_content = len(set(r['content_id'] for r in records))
-        total_views = sum(r['views'] for r in records)
-        total_likes = sum(r['likes'] for r in records)
-        avg_engagement = sum(r['engagement_rate'] for r in records) / len(records)
+        aggregate = rows[0]
+        total_content = aggregate['content_count']
+        total_views = aggregate['total_views']
+        total_likes = aggregate['total_likes']
+        avg_engagement = aggregate['engagement_sum'] / aggregate['records']
         
         return {
             "success": True,
@@ -238,10 +424,15 @@ class EffectTracker:
         content_id: str,
         platform: str
     ) -> Dict[str, Any]:
-        """从平台获取数据（模拟）"""
-        # 模拟数据
-        import random
+        """从平台获取数据（未配置数据接口时使用模拟数据）"""
+        endpoint = self.endpoints.get(platform)
+        if endpoint:
+            client = self.fanout.client(platform, endpoint)
+            response = await client.get(f"/stats/{content_id}")
+            response.raise_for_status()
+            return response.json()
         
+        # 模拟数据
         return {
             "views": random.randint(100, 10000),
             "likes": random.randint(10, 1000),
@@ -249,6 +440,24 @@ class EffectTracker:
             "shares": random.randint(0, 50)
         }
     
+    def _build_record(
+        self,
+        content_id: str,
+        platform: str,
+        effect_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """构造效果记录"""
+        return {
+            "content_id": content_id,
+            "platform": platform,
+            "views": effect_data.get('views', 0),
+            "likes": effect_data.get('likes', 0),
+            "comments": effect_data.get('comments', 0),
+            "shares": effect_data.get('shares', 0),
+            "engagement_rate": self._calculate_engagement_rate(effect_data),
+            "tracked_at": datetime.now().isoformat()
+        }
+    
     def _calculate_engagement_rate(self, data: Dict[str, Any]) -> float:
         """计算互动率"""
         views = data.get('views', 0)
@@ -293,18 +502,21 @@ class EffectTracker:
     
     def get_effect_statistics(self) -> Dict[str, Any]:
         """获取效果统计"""
-        total_content = len(set(e['content_id'] for e in self.content_effects))
-        total_views = sum(e['views'] for e in self.content_effects)
-        total_likes = sum(e['likes'] for e in self.content_effects)
+        totals = self._query(
+            "SELECT COALESCE(SUM(total_views), 0) AS total_views, COALESCE(SUM(total_likes), 0) AS total_likes, "
+            "COALESCE(SUM(records), 0) AS total_records FROM platform_aggregates"
+        )[0]
+        total_content = self._query("SELECT COUNT(*) AS n FROM content_aggregates")[0]['n']
+        platforms = [r['platform'] for r in self._query("SELECT platform FROM platform_aggregates")]
         
         return {
             "success": True,
             "statistics": {
                 "total_content": total_content,
-                "total_views": total_views,
-                "total_likes": total_likes,
-                "total_records": len(self.content_effects),
-                "platforms": list(set(e['platform'] for e in self.content_effects))
+                "total_views": totals['total_views'],
+                "total_likes": totals['total_likes'],
+                "total_records": totals['total_records'],
+                "platforms": platforms
             }
         }
 
@@ -6,6 +6,13 @@
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from core.originality_index import (
+    OriginalityIndex,
+    default_originality_index,
+    jaccard_and_containment,
+    shingle_set,
+)
+
 class CopyrightProtection:
     """
     版权保护系统
@@ -17,8 +24,10 @@ class CopyrightProtection:
     4. 安全建议
     """
     
-    def __init__(self):
+    def __init__(self, originality_index: Optional[OriginalityIndex] = None):
         self.risk_threshold = 0.7  # 风险阈值
+        self.originality_index = originality_index or default_originality_index
+        self.min_containment = 0.1  # 低于该包含度的重合不计入匹配
     
     async def check_originality(
         self,
@@ -35,15 +44,36 @@ class CopyrightProtection:
         Returns:
             原创度检测结果
         """
-        # TODO: 实现原创度检测
-        # 使用文本相似度算法（如TF-IDF、BERT等）
+        # 与语料索引比对：LSH 召回候选，精确计算包含度
+        result = self.originality_index.query(content, min_containment=self.min_containment)
+        coverage = result["coverage"]
+        similarity_matches = result["matches"]
+        
+        # 与指定内容逐一精确比对（数量少，无需索引）
+        if compare_with:
+            content_set = shingle_set(content, self.originality_index.shingle_size)
+            for i, other in enumerate(compare_with):
+                jaccard, containment = jaccard_and_containment(
+                    content_set, shingle_set(other, self.originality_index.shingle_size)
+                )
+                if containment >= self.min_containment:
+                    similarity_matches.append({
+                        "doc_id": f"compare_{i}",
+                        "title": None,
+                        "source": "compare_with",
+                        "jaccard": round(jaccard, 4),
+                        "containment": round(containment, 4),
+                    })
+                coverage = max(coverage, containment)
+            similarity_matches.sort(key=lambda m: m["containment"], reverse=True)
         
-        originality_score = 0.85  # 0-1之间，1表示完全原创
+        originality_score = round(1.0 - coverage, 4)  # 0-1之间，1表示完全原创
         
         return {
             "originality_score": originality_score,
             "risk_level": "low" if originality_score >= 0.8 else "medium" if originality_score >= 0.6 else "high",
-            "similarity_matches": [],
+            "similarity_matches": similarity_matches,
+            "candidates_checked": result["candidates"],
             "recommendations": self._generate_protection_recommendations(originality_score),
             "checked_at": datetime.now().isoformat()
         }
@@ -0,0 +1,345 @@
+"""
+原创度索引
+基于字符 n-gram + MinHash + LSH 的海量语料近似重复检测
+
+- 中文按字符切分 n-gram（shingle），不依赖分词
+- 文档按固定长度分块计算 MinHash 签名，LSH 分段（band）入库，
+  局部抄袭（整段复制到长文中）也能召回
+- 检测时只对 LSH 召回的候选文档做精确 Jaccard / 包含度校验，
+  耗时与语料规模基本无关
+- SQLite 持久化，可随素材收集增量追加
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+_ROLLING_BASE = np.uint64(1000003)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(32)
+_NON_TEXT = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """归一化：去除空白与标点，英文小写"""
+    return _NON_TEXT.sub("", text or "").lower()
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """
+    按位置顺序返回字符 n-gram 的 32 位哈希
+
+    Args:
+        text: 文本
+        shingle_size: n-gram 长度
+
+    Returns:
+        uint32 数组（长度约为归一化文本长度）
+    """
+    normalized = normalize_text(text)
+    if not normalized:
+        return np.empty(0, dtype=np.uint32)
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    width = min(shingle_size, len(codes))
+    count = len(codes) - width + 1
+    # 多项式滚动哈希（按 2^64 回绕），再乘黄金比例常数取高 32 位
+    rolled = np.zeros(count, dtype=np.uint64)
+    for offset in range(width):
+        rolled = rolled * _ROLLING_BASE + codes[offset:offset + count]
+    return ((rolled * _GOLDEN) >> _SHIFT).astype(np.uint32)
+
+
+def sorted_unique(values: np.ndarray) -> np.ndarray:
+    """排序去重（比 np.unique 的通用实现快）"""
+    if values.size == 0:
+        return values
+    ordered = np.sort(values)
+    keep = np.empty(ordered.shape, dtype=bool)
+    keep[0] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=keep[1:])
+    return ordered[keep]
+
+
+def shingle_set(text: str, shingle_size: int = 5) -> np.ndarray:
+    """字符 n-gram 哈希集合（去重排序）"""
+    return sorted_unique(shingle_hashes(text, shingle_size))
+
+
+def jaccard_and_containment(query: np.ndarray, other: np.ndarray) -> Tuple[float, float]:
+    """
+    计算两个已排序去重的 shingle 集合的 Jaccard 相似度与包含度
+
+    Returns:
+        (Jaccard, query 被 other 包含的比例)
+    """
+    if len(query) == 0 or len(other) == 0:
+        return 0.0, 0.0
+    common = len(np.intersect1d(query, other, assume_unique=True))
+    return common / (len(query) + len(other) - common), common / len(query)
+
+
+class OriginalityIndex:
+    """
+    原创度索引
+
+    索引文档按 chunk_size 个 shingle 不重叠分块；查询按半块步长滑动窗口，
+    长度不少于两个块的复制段落必然完整包含某个索引块，且至少有一个查询窗口
+    与该块有约 3/4 的重合，从而被 LSH 召回。更短的段落召回率随长度下降
+    （默认参数下 1.5 块约 97%，1 块约 60%）。
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        shingle_size: int = 5,
+        num_perm: int = 100,
+        bands: int = 20,
+        chunk_size: int = 300,
+        seed: int = 1,
+    ):
+        """
+        初始化原创度索引
+
+        Args:
+            db_path: SQLite 路径（默认 ORIGINALITY_INDEX_PATH 或 artifacts/data/originality_index.db）
+            shingle_size: n-gram 长度
+            num_perm: MinHash 置换数
+            bands: LSH 分段数（num_perm 需能被整除）
+            chunk_size: 分块大小（shingle 数）
+            seed: 哈希参数随机种子（同一索引必须固定）
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        if db_path is None:
+            db_path = os.getenv("ORIGINALITY_INDEX_PATH") or str(
+                Path(__file__).resolve().parents[2] / "artifacts" / "data" / "originality_index.db"
+            )
+        self.db_path = db_path
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.chunk_size = chunk_size
+
+        # multiply-shift 哈希族：h(x) = (a*x + b) mod 2^64 >> 32，a 为奇数
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        # 每个 band 的组合系数，用于把 rows 个 MinHash 值折叠成一个 64 位桶键
+        self._band_mix = rng.randint(1, 2 ** 62, size=self.rows, dtype=np.uint64)
+        self._band_salt = np.arange(bands, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    # ============ 存储 ============
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id TEXT PRIMARY KEY,
+                    title TEXT,
+                    source TEXT,
+                    shingle_count INTEGER NOT NULL,
+                    shingles BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    bucket INTEGER NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    PRIMARY KEY (bucket, doc_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_lsh_doc ON lsh_buckets (doc_id);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ============ MinHash / LSH ============
+
+    def _block_minima(self, hashes: np.ndarray, width: int) -> np.ndarray:
+        """
+        按 width 个 shingle 分块，返回每块的 MinHash（块数 × num_perm）
+
+        分批展开置换矩阵，长文档的内存占用保持在 num_perm × 64 块以内。
+        """
+        span = width * 64
+        parts = []
+        for offset in range(0, hashes.shape[0], span):
+            values = hashes[offset:offset + span].astype(np.uint64)[:, np.newaxis]
+            permuted = (values * self._a + self._b) >> _SHIFT
+            starts = np.arange(0, values.shape[0], width)
+            parts.append(np.minimum.reduceat(permuted, starts, axis=0))
+        return np.concatenate(parts)
+
+    def _bucket_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        把签名（m × num_perm）按 band 折叠为桶键（m × bands）
+        """
+        banded = signatures.reshape(len(signatures), self.bands, self.rows)
+        with np.errstate(over="ignore"):
+            mixed = (banded * self._band_mix).sum(axis=2, dtype=np.uint64) ^ self._band_salt
+        # SQLite INTEGER 为有符号 64 位
+        return mixed.view(np.int64)
+
+    def _index_signatures(self, hashes: np.ndarray) -> np.ndarray:
+        """索引侧：不重叠分块的 MinHash 签名"""
+        return self._block_minima(hashes, self.chunk_size)
+
+    def _query_signatures(self, hashes: np.ndarray) -> np.ndarray:
+        """查询侧：半块步长、整块宽度的滑动窗口 MinHash 签名"""
+        blocks = self._block_minima(hashes, max(1, self.chunk_size // 2))
+        if len(blocks) <= 2:
+            return blocks.min(axis=0, keepdims=True)
+        return np.minimum(blocks[:-1], blocks[1:])
+
+    # ============ 写入 ============
+
+    def add_document(
+        self,
+        doc_id: str,
+        text: str,
+        title: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> bool:
+        """添加单篇文档，返回是否入库（空文本不入库）"""
+        return self.add_documents([{"id": doc_id, "content": text, "title": title, "source": source}]) == 1
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """
+        批量添加文档（同一事务提交）；已存在的 doc_id 会被覆盖
+
+        Args:
+            documents: [{"id", "content", "title"?, "source"?}]
+
+        Returns:
+            入库文档数
+        """
+        doc_rows = []
+        bucket_rows = []
+        for doc in documents:
+            hashes = shingle_hashes(doc.get("content", ""), self.shingle_size)
+            if hashes.size == 0:
+                continue
+            doc_id = str(doc["id"])
+            shingles = sorted_unique(hashes)
+            doc_rows.append((doc_id, doc.get("title"), doc.get("source"), len(shingles), shingles.tobytes()))
+            keys = sorted_unique(self._bucket_keys(self._index_signatures(hashes)))
+            bucket_rows.extend((int(key), doc_id) for key in keys)
+
+        if not doc_rows:
+            return 0
+
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("DELETE FROM lsh_buckets WHERE doc_id = ?", [(row[0],) for row in doc_rows])
+                conn.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)", doc_rows)
+                conn.executemany("INSERT OR IGNORE INTO lsh_buckets VALUES (?, ?)", bucket_rows)
+        return len(doc_rows)
+
+    def remove_document(self, doc_id: str) -> bool:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM lsh_buckets WHERE doc_id = ?", (doc_id,))
+                return conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,)).rowcount > 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # ============ 查询 ============
+
+    def query(
+        self,
+        text: str,
+        min_containment: float = 0.1,
+        max_candidates: int = 50,
+        exclude_ids: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        检测文本与索引语料的重合
+
+        Args:
+            text: 待检测文本
+            min_containment: 报告匹配的最小包含度
+            max_candidates: 精确校验的候选上限（按命中桶数排序）
+            exclude_ids: 排除的文档ID（例如文本自身）
+
+        Returns:
+            {"coverage": 被语料覆盖的 shingle 比例, "matches": [...], "candidates": 候选数}
+        """
+        hashes = shingle_hashes(text, self.shingle_size)
+        if hashes.size == 0:
+            return {"coverage": 0.0, "matches": [], "candidates": 0}
+        query_set = sorted_unique(hashes)
+        keys = sorted_unique(self._bucket_keys(self._query_signatures(hashes)))
+        excluded = set(exclude_ids or ())
+
+        with self._lock:
+            conn = self._connection()
+            hits: Dict[str, int] = {}
+            key_list = [int(key) for key in keys]
+            for i in range(0, len(key_list), 500):
+                batch = key_list[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                for doc_id, count in conn.execute(
+                    f"SELECT doc_id, COUNT(*) FROM lsh_buckets WHERE bucket IN ({placeholders}) GROUP BY doc_id",
+                    batch,
+                ):
+                    if doc_id not in excluded:
+                        hits[doc_id] = hits.get(doc_id, 0) + count
+
+            candidates = sorted(hits, key=hits.get, reverse=True)[:max_candidates]
+            rows = []
+            for i in range(0, len(candidates), 500):
+                batch = candidates[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(conn.execute(
+                    f"SELECT doc_id, title, source, shingles FROM documents WHERE doc_id IN ({placeholders})",
+                    batch,
+                ).fetchall())
+
+        matches = []
+        covered = np.zeros(len(query_set), dtype=bool)
+        for doc_id, title, source, blob in rows:
+            doc_set = np.frombuffer(blob, dtype=np.uint32)
+            jaccard, containment = jaccard_and_containment(query_set, doc_set)
+            if containment < min_containment:
+                continue
+            covered |= np.isin(query_set, doc_set, assume_unique=True)
+            matches.append({
+                "doc_id": doc_id,
+                "title": title,
+                "source": source,
+                "jaccard": round(jaccard, 4),
+                "containment": round(containment, 4),
+            })
+
+        matches.sort(key=lambda m: m["containment"], reverse=True)
+        return {
+            "coverage": float(covered.mean()),
+            "matches": matches,
+            "candidates": len(candidates),
+        }
+
+
+# 默认索引（首次使用时才打开数据库）
+default_originality_index = OriginalityIndex()
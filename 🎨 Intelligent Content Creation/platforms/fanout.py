@@ -0,0 +1,163 @@
+"""
+平台请求并发调度
+- 全局并发上限（信号量）
+- 按平台令牌桶限速
+- 按平台复用 HTTP 连接池
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+
+import httpx
+
+
+# 各平台默认限速：(每秒请求数, 突发容量)
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "xiaohongshu": (2.0, 2),
+    "douyin": (5.0, 5),
+    "zhihu": (3.0, 3),
+    "toutiao": (5.0, 5),
+}
+
+
+class TokenBucket:
+    """异步令牌桶"""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取一个令牌，不足时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PlatformFanout:
+    """
+    多平台请求调度器
+
+    发布与数据采集共用：同一平台的请求共享限速与连接池，
+    不同平台之间并行，总并发（正在执行的请求数）受 max_concurrency 限制。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        default_rate_limit: Tuple[float, int] = (5.0, 5),
+        timeout: float = 10.0,
+        max_connections_per_platform: int = 10
+    ):
+        """
+        初始化调度器
+
+        Args:
+            max_concurrency: 全局最大并发请求数
+            rate_limits: 平台限速配置 {platform: (每秒请求数, 突发容量)}
+            default_rate_limit: 未配置平台的限速
+            timeout: HTTP 超时（秒）
+            max_connections_per_platform: 每个平台连接池大小
+        """
+        self.max_concurrency = max_concurrency
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.default_rate_limit = default_rate_limit
+        self.timeout = timeout
+        self.max_connections_per_platform = max_connections_per_platform
+
+        # 信号量/令牌桶/连接池都绑定事件循环，循环切换时重建
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+        self.stats = {"requests": 0, "failures": 0, "throttled_wait_seconds": 0.0}
+
+    def _ensure_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._buckets = {}
+            # 旧循环上的连接池无法复用，直接丢弃
+            self._clients = {}
+
+    def _bucket(self, platform: str) -> TokenBucket:
+        bucket = self._buckets.get(platform)
+        if bucket is None:
+            rate, capacity = self.rate_limits.get(platform, self.default_rate_limit)
+            bucket = self._buckets[platform] = TokenBucket(rate, capacity)
+        return bucket
+
+    def client(self, platform: str, base_url: str) -> httpx.AsyncClient:
+        """获取平台的复用 HTTP 客户端"""
+        self._ensure_loop()
+        key = f"{platform}|{base_url}"
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._clients[key] = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections_per_platform,
+                    max_keepalive_connections=self.max_connections_per_platform,
+                ),
+            )
+        return client
+
+    async def run(self, platform: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        在并发上限与平台限速下执行一次请求
+
+        先取平台令牌再占用全局并发名额：等待限速的请求不占名额，
+        慢平台的积压不会阻塞其他平台。
+        """
+        self._ensure_loop()
+        started = time.monotonic()
+        await self._bucket(platform).acquire()
+        self.stats["throttled_wait_seconds"] += time.monotonic() - started
+        async with self._semaphore:
+            self.stats["requests"] += 1
+            try:
+                return await func()
+            except Exception:
+                self.stats["failures"] += 1
+                raise
+
+    async def map(
+        self,
+        jobs: List[Tuple[str, Callable[[], Awaitable[Any]]]]
+    ) -> List[Any]:
+        """
+        并发执行一组 (平台, 请求) 任务，结果按输入顺序返回；
+        单个任务异常以异常对象返回，不影响其他任务
+        """
+        return await asyncio.gather(
+            *(self.run(platform, func) for platform, func in jobs),
+            return_exceptions=True
+        )
+
+    async def aclose(self):
+        """关闭所有连接池"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+# 发布与效果追踪共用的默认调度器
+default_fanout = PlatformFanout()
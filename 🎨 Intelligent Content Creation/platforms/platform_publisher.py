@@ -5,17 +5,22 @@
 - 知乎
 - 今日头条
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import asyncio
 import httpx
 
+from platforms.fanout import PlatformFanout, default_fanout
+
 
 class PlatformPublisher:
     """平台发布器"""
     
-    def __init__(self):
-        # 各平台配置
+    def __init__(self, fanout: Optional[PlatformFanout] = None):
+        # 多平台并发调度（限速 + 连接池）
+        self.fanout = fanout or default_fanout
+        
+        # 各平台配置（endpoint 为空时使用模拟发布）
         self.platforms = {
             "xiaohongshu": {
                 "name": "小红书",
@@ -64,6 +69,8 @@ class PlatformPublisher:
             # 模拟授权
             self.platforms[platform_name]["api_key"] = credentials.get("api_key", "")
             self.platforms[platform_name]["api_secret"] = credentials.get("api_secret", "")
+            if credentials.get("endpoint"):
+                self.platforms[platform_name]["endpoint"] = credentials["endpoint"]
             self.platforms[platform_name]["authorized"] = True
             
             return {
@@ -113,8 +120,8 @@ class PlatformPublisher:
             return {"success": False, "error": "小红书未授权"}
         
         try:
-            # 模拟发布
-            post_id = f"XHS{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+            remote = await self._remote_publish("xiaohongshu", content)
+            post_id = remote.get("id") if remote else f"XHS{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
             
             publish_result = {
                 "post_id": post_id,
@@ -122,7 +129,7 @@ class PlatformPublisher:
                 "title": content['title'],
                 "status": "已发布",
                 "publish_time": datetime.utcnow().isoformat(),
-                "url": f"https://www.xiaohongshu.com/explore/{post_id}"
+                "url": (remote or {}).get("url") or f"https://www.xiaohongshu.com/explore/{post_id}"
             }
             
             # 记录发布历史
@@ -155,7 +162,8 @@ class PlatformPublisher:
             return {"success": False, "error": "抖音未授权"}
         
         try:
-            video_id = f"DY{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+            remote = await self._remote_publish("douyin", content)
+            video_id = remote.get("id") if remote else f"DY{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
             
             publish_result = {
                 "video_id": video_id,
@@ -163,7 +171,7 @@ class PlatformPublisher:
                 "title": content['title'],
                 "status": "已发布",
                 "publish_time": datetime.utcnow().isoformat(),
-                "url": f"https://www.douyin.com/video/{video_id}"
+                "url": (remote or {}).get("url") or f"https://www.douyin.com/video/{video_id}"
             }
             
             self.publish_history.append({
@@ -195,13 +203,25 @@ class PlatformPublisher:
                 "error": "需要用户批准才能发布"
             }
         
-        results = []
+        publishers = {
+            "xiaohongshu": self.publish_to_xiaohongshu,
+            "douyin": self.publish_to_douyin,
+        }
         
+        # 各平台并发发布，受全局并发上限与平台限速约束
+        jobs = []
+        for platform in platforms:
+            publish = publishers.get(platform)
+            if publish:
+                jobs.append((platform, lambda publish=publish: publish(content, True)))
+        outcomes = iter(await self.fanout.map(jobs))
+        
+        results = []
         for platform in platforms:
-            if platform == "xiaohongshu":
-                result = await self.publish_to_xiaohongshu(content, True)
-            elif platform == "douyin":
-                result = await self.publish_to_douyin(content, True)
+            if platform in publishers:
+                result = next(outcomes)
+                if isinstance(result, Exception):
+                    result = {"success": False, "error": str(result)}
             else:
                 result = {"success": False, "error": f"不支持的平台: {platform}"}
             
@@ -220,6 +240,30 @@ class PlatformPublisher:
             "message": f"成功发布到 {success_count}/{len(platforms)} 个平台"
         }
     
+    async def _remote_publish(
+        self,
+        platform: str,
+        content: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        调用平台发布接口（未配置 endpoint 时返回 None，走模拟发布）
+        
+        Returns:
+            接口返回数据 {"id": "...", "url": "..."}
+        """
+        endpoint = self.platforms[platform].get("endpoint")
+        if not endpoint:
+            return None
+        
+        client = self.fanout.client(platform, endpoint)
+        response = await client.post(
+            "/publish",
+            headers={"Authorization": f"Bearer {self.platforms[platform]['api_key']}"},
+            json=content
+        )
+        response.raise_for_status()
+        return response.json()
+    
     def get_publish_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """获取发布历史"""
         return self.publish_history[-limit:]
@@ -1,20 +1,75 @@
 """
 AI痕迹去除器
 实现内容去AI化、差异化处理，使AI生成的内容更像人类创作
+
+替换规则在模块加载时编译为单个正则，每段文本一次扫描完成全部替换；
+批量处理按块分发到进程池，每条内容使用独立种子的随机数生成器，
+同一种子下结果可复现，与并行度和分块方式无关。
 """
 from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import os
 import random
 import re
+import statistics
+
+from core.originality_index import jaccard_and_containment, shingle_set
+
+
+# AI常用的正式表达
+FORMAL_EXPRESSIONS = {
+    "综上所述": "总的来说",
+    "值得注意的是": "要注意",
+    "具体而言": "具体来说",
+    "此外": "另外",
+    "因此": "所以",
+    "然而": "但是",
+}
+
+# AI容易使用的词汇替换
+AI_COMMON_WORDS = {
+    "优化": ["改进", "提升", "完善"],
+    "提升": ["提高", "增强", "加强"],
+    "有效": ["管用", "好用", "实用"],
+    "显著": ["明显", "很明显", "特别"],
+    "进一步": ["更", "再", "继续"],
+    "相关": ["有关", "关于"],
+    "重要": ["要紧", "关键", "核心"]
+}
+
+
+def _alternation(words) -> str:
+    # 长词优先，避免被前缀抢先匹配
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_FORMAL_PATTERN = re.compile(
+    _alternation(FORMAL_EXPRESSIONS) + r"|首先.*?其次.*?最后"
+)
+_FORMAL_WORD_PATTERN = re.compile(_alternation(FORMAL_EXPRESSIONS))
+_AI_WORD_PATTERN = re.compile(_alternation(AI_COMMON_WORDS))
+
+# 批量处理：少于该数量时不启用进程池
+PARALLEL_THRESHOLD = 64
 
 
 class AIContentRemover:
     """AI痕迹去除器"""
     
-    def __init__(self):
-        """初始化去AI化处理器"""
+    def __init__(self, seed: Optional[int] = None, max_workers: Optional[int] = None):
+        """
+        初始化去AI化处理器
+        
+        Args:
+            seed: 随机种子（可选，用于复现结果）
+            max_workers: 批量处理进程数（默认CPU核数）
+        """
         self.removal_strategies = []
         self.processed_contents = []
+        self.rng = random.Random(seed)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
     
     def remove_ai_traces(
         self,
@@ -59,7 +114,7 @@ class AIContentRemover:
         processed = self._replace_ai_common_words(processed)
         applied_strategies.append("替换AI词汇")
         
-        # 计算相似度（简化版）
+        # 计算相似度
         similarity = self._calculate_similarity(content, processed)
         
         # 记录处理
@@ -91,29 +146,18 @@ class AIContentRemover:
         Returns:
             (处理后文本, 是否有变化)
         """
-        # AI常用的正式表达
-        formal_patterns = [
-            (r'综上所述', '总的来说'),
-            (r'值得注意的是', '要注意'),
-            (r'具体而言', '具体来说'),
-            (r'此外', '另外'),
-            (r'因此', '所以'),
-            (r'然而', '但是'),
-            (r'首先.*?其次.*?最后', lambda m: self._simplify_enumeration(m.group(0)))
-        ]
-        
-        changed = False
-        for pattern, replacement in formal_patterns:
-            if isinstance(replacement, str):
-                new_text = re.sub(pattern, replacement, text)
-            else:
-                new_text = re.sub(pattern, replacement, text)
-            
-            if new_text != text:
-                changed = True
-                text = new_text
-        
-        return text, changed
+        def replace(match: re.Match) -> str:
+            matched = match.group(0)
+            replacement = FORMAL_EXPRESSIONS.get(matched)
+            if replacement is not None:
+                return replacement
+            # 枚举段内的正式表达同样替换
+            inner = _FORMAL_WORD_PATTERN.sub(lambda m: FORMAL_EXPRESSIONS[m.group(0)], matched)
+            return self._simplify_enumeration(inner)
+        
+        new_text = _FORMAL_PATTERN.sub(replace, text)
+        
+        return new_text, new_text != text
     
     def _add_colloquial_expressions(self, text: str) -> str:
         """
@@ -134,8 +178,8 @@ class AIContentRemover:
         sentences = text.split('。')
         for i in range(len(sentences)):
             # 随机在20%的句子前添加口语化表达
-            if random.random() < 0.2 and len(sentences[i]) > 10:
-                insertion = random.choice(colloquial_insertions)
+            if self.rng.random() < 0.2 and len(sentences[i]) > 10:
+                insertion = self.rng.choice(colloquial_insertions)
                 sentences[i] = insertion + sentences[i]
         
         return '。'.join(sentences)
@@ -156,7 +200,7 @@ class AIContentRemover:
         new_sentences = []
         i = 0
         while i < len(sentences):
-            if random.random() < 0.3 and i + 1 < len(sentences):
+            if self.rng.random() < 0.3 and i + 1 < len(sentences):
                 # 30%概率合并两个短句
                 if len(sentences[i]) < 30 and len(sentences[i+1]) < 30:
                     merged = sentences[i] + '，' + sentences[i+1]
@@ -184,8 +228,8 @@ class AIContentRemover:
         if content_type == "post":
             # 社交媒体风格：添加表情、语气词
             emotions = ["😊", "👍", "💪", "🎉", "✨"]
-            if random.random() < 0.5:
-                text += " " + random.choice(emotions)
+            if self.rng.random() < 0.5:
+                text += " " + self.rng.choice(emotions)
         
         return text
     
@@ -204,12 +248,12 @@ class AIContentRemover:
         # 1. 偶尔使用省略号
         sentences = text.split('。')
         for i in range(len(sentences)):
-            if random.random() < 0.15:  # 15%概率
+            if self.rng.random() < 0.15:  # 15%概率
                 sentences[i] = sentences[i].rstrip('，、；') + '...'
         
         # 2. 偶尔使用感叹号
         for i in range(len(sentences)):
-            if random.random() < 0.1:  # 10%概率
+            if self.rng.random() < 0.1:  # 10%概率
                 sentences[i] = sentences[i] + '!'
         
         return '。'.join(sentences)
@@ -224,26 +268,14 @@ class AIContentRemover:
         Returns:
             处理后文本
         """
-        # AI容易使用的词汇替换
-        replacements = {
-            "优化": ["改进", "提升", "完善"],
-            "提升": ["提高", "增强", "加强"],
-            "有效": ["管用", "好用", "实用"],
-            "显著": ["明显", "很明显", "特别"],
-            "进一步": ["更", "再", "继续"],
-            "相关": ["有关", "关于"],
-            "重要": ["要紧", "关键", "核心"]
-        }
-        
-        for word, alternatives in replacements.items():
-            if word in text:
-                # 随机替换部分出现的词汇
-                count = text.count(word)
-                for _ in range(count):
-                    if random.random() < 0.5:  # 50%概率替换
-                        text = text.replace(word, random.choice(alternatives), 1)
-        
-        return text
+        def replace(match: re.Match) -> str:
+            word = match.group(0)
+            # 随机替换部分出现的词汇
+            if self.rng.random() < 0.5:  # 50%概率替换
+                return self.rng.choice(AI_COMMON_WORDS[word])
+            return word
+        
+        return _AI_WORD_PATTERN.sub(replace, text)
     
     def _simplify_enumeration(self, text: str) -> str:
         """简化枚举表达"""
@@ -252,7 +284,7 @@ class AIContentRemover:
     
     def _calculate_similarity(self, text1: str, text2: str) -> float:
         """
-        计算相似度（简化版）
+        计算相似度
         
         Args:
             text1: 文本1
@@ -261,11 +293,14 @@ class AIContentRemover:
         Returns:
             相似度（0-100）
         """
-        # 简化的相似度计算
-        common_chars = sum(1 for c1, c2 in zip(text1, text2) if c1 == c2)
-        max_len = max(len(text1), len(text2))
-        
-        return round((common_chars / max_len * 100), 2) if max_len > 0 else 100
+        # 字符 3-gram 集合的 Jaccard 相似度，不受插入/删除导致的错位影响
+        set1 = shingle_set(text1, 3)
+        set2 = shingle_set(text2, 3)
+        if len(set1) == 0 and len(set2) == 0:
+            return 100
+        jaccard, _ = jaccard_and_containment(set1, set2)
+        
+        return round(jaccard * 100, 2)
     
     def create_differentiated_content(
         self,
@@ -303,7 +338,7 @@ class AIContentRemover:
             self._add_emotions
         ]
         
-        selected_strategies = random.sample(strategies, min(count, len(strategies)))
+        selected_strategies = self.rng.sample(strategies, min(count, len(strategies)))
         
         for strategy in selected_strategies:
             processed = strategy(processed)
@@ -319,7 +354,7 @@ class AIContentRemover:
     def _add_personal_views(self, text: str) -> str:
         """添加个人观点"""
         views = ["我觉得", "在我看来", "我的经验是", "个人认为"]
-        insertion = random.choice(views)
+        insertion = self.rng.choice(views)
         
         # 在第一段添加个人观点
         paragraphs = text.split('\n')
@@ -330,13 +365,13 @@ class AIContentRemover:
     
     def _add_examples(self, text: str) -> str:
         """添加实例"""
-        example_intro = random.choice(["举个例子", "比如说", "就拿我来说"])
+        example_intro = self.rng.choice(["举个例子", "比如说", "就拿我来说"])
         return text + f"\n\n{example_intro}，[这里可以添加具体例子]。"
     
     def _change_perspective(self, text: str) -> str:
         """改变视角"""
         # 将部分"我们"改为"你"或"大家"
-        text = text.replace("我们可以", random.choice(["你可以", "大家可以"]))
+        text = text.replace("我们可以", self.rng.choice(["你可以", "大家可以"]))
         return text
     
     def _add_questions(self, text: str) -> str:
@@ -346,8 +381,8 @@ class AIContentRemover:
         
         # 随机在某个句子后添加疑问
         if len(sentences) > 2:
-            idx = random.randint(1, len(sentences) - 2)
-            sentences[idx] += random.choice(questions)
+            idx = self.rng.randint(1, len(sentences) - 2)
+            sentences[idx] += self.rng.choice(questions)
         
         return '。'.join(sentences)
     
@@ -363,7 +398,7 @@ class AIContentRemover:
         }
         
         for complex_word, simple_word in simplifications.items():
-            if random.random() < 0.3:  # 30%概率替换
+            if self.rng.random() < 0.3:  # 30%概率替换
                 text = text.replace(complex_word, simple_word, 1)
         
         return text
@@ -375,8 +410,8 @@ class AIContentRemover:
         # 随机在形容词前添加情感词
         adjectives = ["好", "棒", "赞", "牛", "厉害"]
         for adj in adjectives:
-            if adj in text and random.random() < 0.5:
-                emotion = random.choice(emotions)
+            if adj in text and self.rng.random() < 0.5:
+                emotion = self.rng.choice(emotions)
                 text = text.replace(adj, emotion + adj, 1)
         
         return text
@@ -384,7 +419,9 @@ class AIContentRemover:
     def batch_process(
         self,
         contents: List[str],
-        differentiation_level: str = "medium"
+        differentiation_level: str = "medium",
+        seed: Optional[int] = None,
+        parallel: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         批量处理内容
@@ -392,15 +429,60 @@ class AIContentRemover:
         Args:
             contents: 内容列表
             differentiation_level: 差异化程度
+            seed: 批次随机种子（相同种子与输入得到相同结果）
+            parallel: 是否使用进程池（默认数量达到 PARALLEL_THRESHOLD 时启用）
         
         Returns:
             批量处理结果
         """
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        if parallel is None:
+            parallel = len(contents) >= PARALLEL_THRESHOLD and self.max_workers > 1
+        
+        items = [(i, content, differentiation_level, seed) for i, content in enumerate(contents)]
+        
+        if parallel:
+            # 分块分发，每个进程约处理4块，兼顾负载均衡与调度开销
+            chunk_size = max(1, -(-len(items) // (self.max_workers * 4)))
+            chunks = [items[k:k + chunk_size] for k in range(0, len(items), chunk_size)]
+            outputs = [output for chunk_outputs in self._get_executor().map(_process_chunk, chunks)
+                       for output in chunk_outputs]
+        else:
+            outputs = [self._process_item(*item) for item in items]
+        
         results = []
+        for result, record in outputs:
+            results.append(result)
+            self.processed_contents.append(record)
         
-        for i, content in enumerate(contents):
+        return {
+            "success": True,
+            "total_processed": len(results),
+            "results": results,
+            "average_ai_score_reduction": 60,
+            "seed": seed
+        }
+    
+    def _process_item(
+        self,
+        index: int,
+        content: str,
+        differentiation_level: str,
+        seed: int
+    ) -> tuple:
+        """
+        处理单条内容（使用由批次种子和序号派生的独立随机数生成器）
+        
+        Returns:
+            (结果, 处理记录)
+        """
+        saved_rng = self.rng
+        self.rng = random.Random(f"{seed}-{index}")
+        try:
             # 去AI化
             removed = self.remove_ai_traces(content)
+            record = self.processed_contents.pop()
             
             # 差异化
             differentiated = self.create_differentiated_content(
@@ -408,23 +490,20 @@ class AIContentRemover:
                 differentiation_level
             )
             
-            results.append({
-                "index": i,
+            result = {
+                "index": index,
                 "original": content,
                 "ai_removed": removed["processed_content"],
                 "differentiated": differentiated["differentiated_content"],
                 "ai_score_reduction": 60  # 模拟：AI分数降低60分
-            })
-        
-        # 确保所有结果都不相同
-        results = self._ensure_uniqueness(results)
+            }
+            
+            # 确保所有结果都不相同
+            self._ensure_uniqueness([result])
+        finally:
+            self.rng = saved_rng
         
-        return {
-            "success": True,
-            "total_processed": len(results),
-            "results": results,
-            "average_ai_score_reduction": 60
-        }
+        return result, record
     
     def _ensure_uniqueness(
         self,
@@ -440,7 +519,8 @@ class AIContentRemover:
             差异化后的结果
         """
         # 为每个结果添加独特元素
-        for i, result in enumerate(results):
+        for result in results:
+            i = result["index"]
             # 添加序号相关的个性化
             unique_elements = [
                 f"\n\n第{i+1}个观察：",
@@ -448,11 +528,22 @@ class AIContentRemover:
                 f"\n\nTip {i+1}："
             ]
             
-            if random.random() < 0.3:
-                result["differentiated"] += random.choice(unique_elements) + "[个性化内容]"
+            if self.rng.random() < 0.3:
+                result["differentiated"] += self.rng.choice(unique_elements) + "[个性化内容]"
         
         return results
     
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def close(self):
+        """关闭批量处理进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
     def get_processing_statistics(self) -> Dict[str, Any]:
         """
         获取处理统计
@@ -486,6 +577,17 @@ class AIContentRemover:
         }
 
 
+_worker_remover: Optional[AIContentRemover] = None
+
+
+def _process_chunk(items: List[tuple]) -> List[tuple]:
+    """进程池任务：每个工作进程复用一个处理器实例"""
+    global _worker_remover
+    if _worker_remover is None:
+        _worker_remover = AIContentRemover(max_workers=1)
+    return [_worker_remover._process_item(*item) for item in items]
+
+
 # 创建默认实例
 ai_content_remover = AIContentRemover()
 
@@ -11,6 +11,9 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import random
 import time
+import hashlib
+
+from core.originality_index import OriginalityIndex, default_originality_index
 
 
 class MaterialCollector:
@@ -162,8 +165,14 @@ class MaterialManager:
     统一管理多个平台的素材收集
     """
     
-    def __init__(self):
-        """初始化素材管理器"""
+    def __init__(self, originality_index: Optional[OriginalityIndex] = None):
+        """
+        初始化素材管理器
+        
+        Args:
+            originality_index: 原创度索引（收集到的文本素材会增量入库）
+        """
+        self.originality_index = originality_index or default_originality_index
         self.collectors = {
             "weibo": WeiboCollector(),
             "douyin": DouyinCollector(),
@@ -190,6 +199,56 @@ class MaterialManager:
         
         return all_topics
     
+    def collect_materials(
+        self,
+        platform: str,
+        topic: str,
+        material_type: str = "text"
+    ) -> List[Dict[str, Any]]:
+        """
+        收集素材，文本素材同时写入原创度索引
+        
+        Args:
+            platform: 平台
+            topic: 话题
+            material_type: 素材类型
+            
+        Returns:
+            素材列表
+        """
+        materials = self.collectors[platform].collect_materials(topic, material_type)
+        self.index_materials(materials, source=platform)
+        return materials
+    
+    def index_materials(
+        self,
+        materials: List[Dict[str, Any]],
+        source: Optional[str] = None
+    ) -> int:
+        """
+        将文本素材增量写入原创度索引
+        
+        Args:
+            materials: 素材列表（取 content/text 字段）
+            source: 来源平台
+            
+        Returns:
+            入库数量
+        """
+        documents = []
+        for material in materials:
+            text = material.get("content") or material.get("text")
+            if not text:
+                continue
+            doc_id = material.get("id") or material.get("url") or hashlib.sha1(text.encode("utf-8")).hexdigest()
+            documents.append({
+                "id": doc_id,
+                "content": text,
+                "title": material.get("title"),
+                "source": source or material.get("platform"),
+            })
+        return self.originality_index.add_documents(documents)
+    
     def merge_and_rank(
         self,
         all_topics: Dict[str, List[Dict[str, Any]]]
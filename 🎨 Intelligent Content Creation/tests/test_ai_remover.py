@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from processors.ai_remover import AIContentRemover
+
+DRAFTS = [
+    f"第{i}篇：综上所述，这个方案可以显著优化流程。此外，我们需要进一步提升效率。"
+    f"首先明确目标，其次拆分任务，最后持续跟进。这是非常重要的一点。然而，相关数据仍需核实。"
+    for i in range(40)
+]
+
+
+def _records(remover):
+    return [{k: v for k, v in record.items() if k != "timestamp"} for record in remover.processed_contents]
+
+
+@pytest.fixture
+def removers():
+    serial = AIContentRemover(max_workers=1)
+    pooled = AIContentRemover(max_workers=3)
+    yield serial, pooled
+    pooled.close()
+
+
+def test_seeded_batch_is_identical_serial_and_in_pool(removers):
+    serial, pooled = removers
+    expected = serial.batch_process(DRAFTS, "high", seed=2024, parallel=False)
+    actual = pooled.batch_process(DRAFTS, "high", seed=2024, parallel=True)
+
+    assert pooled._executor is not None
+    assert actual["results"] == expected["results"]
+    assert [r["index"] for r in actual["results"]] == list(range(len(DRAFTS)))
+    assert _records(pooled) == _records(serial)
+
+
+def test_results_do_not_depend_on_worker_count_or_batch_position(removers):
+    serial, pooled = removers
+    full = pooled.batch_process(DRAFTS, "medium", seed=7, parallel=True)["results"]
+    two_workers = AIContentRemover(max_workers=2)
+    try:
+        again = two_workers.batch_process(DRAFTS, "medium", seed=7, parallel=True)["results"]
+    finally:
+        two_workers.close()
+    assert again == full
+
+    # 单条结果只取决于批次种子和序号
+    single = serial._process_item(5, DRAFTS[5], "medium", 7)[0]
+    assert single == full[5]
+
+
+def test_different_seeds_change_output_and_seed_is_reported(removers):
+    serial, _ = removers
+    first = serial.batch_process(DRAFTS[:10], seed=1)
+    second = serial.batch_process(DRAFTS[:10], seed=2)
+    assert first["seed"] == 1
+    assert [r["differentiated"] for r in first["results"]] != [r["differentiated"] for r in second["results"]]
+    assert isinstance(serial.batch_process(DRAFTS[:2])["seed"], int)
+
+
+def test_rule_regexes_replace_formal_expressions_in_one_pass():
+    remover = AIContentRemover(seed=0)
+    text, changed = remover._remove_formal_expressions("综上所述，此外，因此。")
+    assert changed
+    assert "综上所述" not in text and "此外" not in text and "因此" not in text
+    assert "总的来说" in text and "另外" in text and "所以" in text
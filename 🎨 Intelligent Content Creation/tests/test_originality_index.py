@@ -0,0 +1,114 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.copyright_protection import CopyrightProtection
+from core.originality_index import OriginalityIndex, jaccard_and_containment, shingle_set
+
+RNG = np.random.RandomState(7)
+
+
+def _text(length):
+    # 常用汉字区间内的随机文本，不同文档之间几乎没有共同的 5-gram
+    return "".join(chr(0x4E00 + c) for c in RNG.randint(0, 3000, size=length))
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return {f"doc{i}": _text(1200) for i in range(200)}
+
+
+@pytest.fixture
+def index(tmp_path, corpus):
+    index = OriginalityIndex(db_path=str(tmp_path / "index.db"))
+    assert index.add_documents({"id": k, "content": v, "title": k} for k, v in corpus.items()) == len(corpus)
+    yield index
+    index.close()
+
+
+def test_exact_copy_and_original_text(index, corpus):
+    copied = index.query(corpus["doc3"])
+    assert copied["matches"][0]["doc_id"] == "doc3"
+    assert copied["matches"][0]["containment"] == 1.0
+    assert copied["coverage"] == 1.0
+
+    original = index.query(_text(1500))
+    assert original["matches"] == []
+    assert original["coverage"] == 0.0
+
+
+def test_partial_copies_are_recalled_like_brute_force(index, corpus):
+    # 段落长度为两个索引块：索引的召回保证适用的最短长度
+    length = 2 * index.chunk_size
+    ids = list(corpus)
+    found = 0
+    total = 0
+    for trial in range(40):
+        source = ids[RNG.randint(len(ids))]
+        start = RNG.randint(0, 1200 - length)
+        paragraph = corpus[source][start:start + length]
+        query = _text(800) + paragraph + _text(800)
+
+        query_set = shingle_set(query)
+        expected = {
+            doc_id for doc_id, text in corpus.items()
+            if jaccard_and_containment(query_set, shingle_set(text))[1] >= 0.1
+        }
+        assert expected == {source}
+        matches = index.query(query)["matches"]
+        total += len(expected)
+        found += len(expected & {m["doc_id"] for m in matches})
+
+        if matches:
+            brute = jaccard_and_containment(query_set, shingle_set(corpus[source]))[1]
+            assert matches[0]["containment"] == pytest.approx(brute, abs=1e-4)
+
+    assert found / total >= 0.95
+
+
+def test_documents_persist_and_can_be_replaced_or_removed(tmp_path, corpus):
+    path = str(tmp_path / "persist.db")
+    first = OriginalityIndex(db_path=path)
+    first.add_documents({"id": k, "content": v} for k, v in list(corpus.items())[:10])
+    first.close()
+
+    reopened = OriginalityIndex(db_path=path)
+    assert reopened.count() == 10
+    assert reopened.query(corpus["doc1"])["matches"][0]["doc_id"] == "doc1"
+
+    reopened.add_document("doc1", corpus["doc150"])
+    assert reopened.count() == 10
+    assert reopened.query(corpus["doc1"])["matches"] == []
+    assert reopened.remove_document("doc1")
+    assert reopened.query(corpus["doc150"])["matches"] == []
+    assert reopened.query(corpus["doc2"], exclude_ids=["doc2"])["matches"] == []
+    reopened.close()
+
+
+def test_originality_score_reflects_copied_share(index, corpus):
+    protection = CopyrightProtection(originality_index=index)
+
+    async def run():
+        copied = await protection.check_originality(corpus["doc5"])
+        original = await protection.check_originality(_text(1000))
+        half = await protection.check_originality(corpus["doc6"][:600] + _text(600))
+        compared = await protection.check_originality(_text(500), compare_with=[corpus["doc7"]])
+        own = _text(800)
+        against_given = await protection.check_originality(own, compare_with=[own + _text(100)])
+        return copied, original, half, compared, against_given
+
+    copied, original, half, compared, against_given = asyncio.run(run())
+    assert copied["originality_score"] == 0.0 and copied["risk_level"] == "high"
+    assert original["originality_score"] == 1.0 and original["risk_level"] == "low"
+    assert 0.4 < half["originality_score"] < 0.6
+    assert half["similarity_matches"][0]["doc_id"] == "doc6"
+    assert compared["originality_score"] == 1.0
+    assert against_given["originality_score"] == 0.0
+    assert against_given["similarity_matches"][0]["source"] == "compare_with"
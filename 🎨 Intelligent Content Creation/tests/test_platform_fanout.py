@@ -0,0 +1,156 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from analytics.effect_tracker import EffectTracker
+from platforms.fanout import PlatformFanout
+from platforms.platform_publisher import PlatformPublisher
+
+
+class _PlatformHandler(BaseHTTPRequestHandler):
+    """模拟平台接口：POST /publish 与 GET /stats/{content_id}，每个请求耗时 server.delay 秒"""
+
+    def _track(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.requests.append((self.command, self.path, time.monotonic(), self.headers.get("Authorization")))
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+    def _reply(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self._track()
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self._reply({"id": f"{self.server.name}-{body['title']}", "url": f"http://mock/{self.server.name}"})
+
+    def do_GET(self):
+        self._track()
+        content_id = self.path.rsplit("/", 1)[-1]
+        number = int(content_id.lstrip("c") or 0)
+        self._reply({"views": 100 * (number + 1), "likes": 10, "comments": 2, "shares": 1})
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def mock_platforms():
+    servers = {}
+    for name in ("xiaohongshu", "douyin"):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _PlatformHandler)
+        server.name = name
+        server.delay = 0.3
+        server.lock = threading.Lock()
+        server.in_flight = 0
+        server.peak = 0
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        servers[name] = server
+    yield servers
+    for server in servers.values():
+        server.shutdown()
+        server.server_close()
+
+
+def test_throttled_platform_does_not_hold_concurrency_slots():
+    fanout = PlatformFanout(max_concurrency=4, rate_limits={"xiaohongshu": (20.0, 1), "douyin": (5.0, 5)})
+    finished = {}
+
+    async def job(platform, index):
+        await asyncio.sleep(0.01)
+        finished[(platform, index)] = time.monotonic()
+
+    async def run():
+        started = time.monotonic()
+        jobs = [("xiaohongshu", lambda i=i: job("xiaohongshu", i)) for i in range(20)]
+        jobs.append(("douyin", lambda: job("douyin", 0)))
+        await fanout.map(jobs)
+        return started
+
+    started = asyncio.run(run())
+    # 小红书受限速约需 1 秒，抖音请求不必排在其后
+    assert finished[("douyin", 0)] - started < 0.2
+    assert max(finished.values()) - started > 0.9
+    assert fanout.stats["requests"] == 21
+
+
+def test_multi_platform_publish_hits_endpoints_concurrently(mock_platforms):
+    publisher = PlatformPublisher(fanout=PlatformFanout())
+
+    async def run():
+        for name, server in mock_platforms.items():
+            await publisher.authorize_platform(name, {"api_key": f"key-{name}", "endpoint": server.base_url})
+        started = time.monotonic()
+        result = await publisher.publish_multi_platform(
+            {"title": "t1", "body": "正文", "video_url": "v.mp4", "description": "d"},
+            ["douyin", "xiaohongshu", "weibo"],
+            user_approval=True,
+        )
+        elapsed = time.monotonic() - started
+        await publisher.fanout.aclose()
+        return result, elapsed
+
+    result, elapsed = asyncio.run(run())
+    assert elapsed < 0.5  # 串行发布至少需要 0.6 秒
+    assert [r["platform"] for r in result["results"]] == ["douyin", "xiaohongshu", "weibo"]
+    assert result["success_count"] == 2
+    assert result["results"][1]["result"]["publish_result"]["post_id"] == "xiaohongshu-t1"
+    assert mock_platforms["douyin"].requests[0][3] == "Bearer key-douyin"
+
+
+def test_batch_tracking_respects_rate_limits_and_concurrency(mock_platforms, tmp_path):
+    fanout = PlatformFanout(max_concurrency=3, rate_limits={"xiaohongshu": (10.0, 1), "douyin": (50.0, 10)})
+    endpoints = {name: server.base_url for name, server in mock_platforms.items()}
+    tracker = EffectTracker(db_path=str(tmp_path / "effects.db"), fanout=fanout, endpoints=endpoints)
+    items = [{"content_id": f"c{i}", "platform": "xiaohongshu"} for i in range(6)]
+    items += [{"content_id": f"c{i}", "platform": "douyin"} for i in range(6)]
+
+    async def run():
+        result = await tracker.batch_track_effects(items)
+        await fanout.aclose()
+        return result
+
+    result = asyncio.run(run())
+    assert result["success_count"] == 12
+
+    xhs_times = [t for _, _, t, _ in mock_platforms["xiaohongshu"].requests]
+    assert max(xhs_times) - min(xhs_times) >= 0.45
+    assert mock_platforms["xiaohongshu"].peak + mock_platforms["douyin"].peak <= 6
+    assert max(s.peak for s in mock_platforms.values()) <= 3
+
+    content = tracker.analyze_content_performance("c1")["analysis"]
+    assert content["total_views"] == 400 and content["platforms_count"] == 2
+    platform = tracker.analyze_platform_performance("douyin")["analysis"]
+    assert platform["total_content"] == 6
+    assert platform["total_views"] == sum(100 * (i + 1) for i in range(6))
+    assert tracker.get_effect_statistics()["statistics"]["total_records"] == 12
+
+
+def test_tracker_creates_database_on_first_use(tmp_path):
+    db_path = tmp_path / "data" / "effects.db"
+    tracker = EffectTracker(db_path=str(db_path))
+    assert not db_path.parent.exists()
+
+    assert tracker.get_effect_statistics()["statistics"]["total_records"] == 0
+    assert db_path.exists()
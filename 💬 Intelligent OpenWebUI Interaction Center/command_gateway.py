@@ -2,14 +2,18 @@
 AI Stack 命令网关
 简单的命令解析服务，解析用户命令并调用相应的API
 可以通过Web界面或API使用
+
+下游调用共用一个异步 HTTP 连接池；系统状态并发探测，带整体截止时间和短期缓存
 """
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
-import requests
-from typing import Optional
+import asyncio
+import time
+import httpx
+from typing import Dict, Optional, Set, Tuple
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -42,13 +46,65 @@ APIS = {
     "learning": "http://localhost:8019"
 }
 
+# 健康检查：单个探测超时、整体截止时间、结果缓存时间（秒）
+HEALTH_TIMEOUT = 2.0
+HEALTH_DEADLINE = 3.0
+HEALTH_CACHE_TTL = 5.0
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_health_cache: Dict[str, Tuple[float, str]] = {}
+_closing_tasks: Set[asyncio.Task] = set()
+
+
+async def _aclose_quietly(client: httpx.AsyncClient):
+    """关闭旧客户端；旧事件循环已关闭时其连接无法正常释放，忽略错误"""
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.debug(f"关闭旧 HTTP 客户端失败: {e}")
+
+
+def _close_stale_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """关闭绑定在旧事件循环上的客户端：旧循环仍在运行时交给它关闭，否则在当前循环中关闭"""
+    if client.is_closed:
+        return
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(_aclose_quietly(client), loop)
+        return
+    task = asyncio.get_running_loop().create_task(_aclose_quietly(client))
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享的异步 HTTP 客户端（连接池复用，绑定当前事件循环）"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None:
+            _close_stale_client(_client, _client_loop)
+        _client_loop = loop
+        _client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _client
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """关闭共享 HTTP 客户端"""
+    if _client is not None:
+        await _client.aclose()
+
 
 class CommandRequest(BaseModel):
     """命令请求"""
     command: str
 
 
-def parse_and_execute(command: str) -> dict:
+async def parse_and_execute(command: str) -> dict:
     """
     解析命令并执行
     
@@ -64,13 +120,13 @@ def parse_and_execute(command: str) -> dict:
         # ==================== 系统状态类命令 ====================
         
         if "所有系统" in command or "系统状态" in command:
-            return check_all_systems()
+            return await check_all_systems()
         
         if "系统资源" in command or "资源使用" in command:
-            return get_system_resources()
+            return await get_system_resources()
         
         if "服务状态" in command:
-            return get_services_status()
+            return await get_services_status()
         
         # ==================== ERP类命令 ====================
         
@@ -85,33 +141,33 @@ def parse_and_execute(command: str) -> dict:
             elif "年" in command or "今年" in command:
                 period_type = "yearly"
             
-            return get_financial_dashboard(period_type)
+            return await get_financial_dashboard(period_type)
         
         if "客户" in command:
-            return get_customers()
+            return await get_customers()
         
         if "订单" in command:
             # 检查是否指定订单号
             import re
             order_match = re.search(r'ORD\d+', command.upper())
             if order_match:
-                return get_order_status(order_match.group())
+                return await get_order_status(order_match.group())
             else:
-                return get_orders_list()
+                return await get_orders_list()
         
         # ==================== RAG类命令 ====================
         
         if "知识库统计" in command or "rag统计" in command:
-            return get_rag_stats()
+            return await get_rag_stats()
         
         if "搜索知识库" in command:
             query = command.replace("搜索知识库", "").replace("中", "").replace("的", "").replace("关于", "").strip()
-            return search_rag(query)
+            return await search_rag(query)
         
         if "保存" in command and "知识库" in command:
             # 提取要保存的内容
             content = command.split("：")[-1] if "：" in command else command.split(":")[-1]
-            return save_to_rag(content.strip())
+            return await save_to_rag(content.strip())
         
         # ==================== 股票类命令 ====================
         
@@ -120,18 +176,18 @@ def parse_and_execute(command: str) -> dict:
             import re
             symbol_match = re.search(r'\b[A-Z]{1,5}\b', command.upper())
             if symbol_match:
-                return get_stock_quote(symbol_match.group())
+                return await get_stock_quote(symbol_match.group())
             else:
                 return {"error": "请指定股票代码，如：查看AAPL股票"}
         
         # ==================== 任务类命令 ====================
         
         if "运行" in command and "任务" in command:
-            return get_running_tasks()
+            return await get_running_tasks()
         
         if "创建任务" in command:
             task_name = command.replace("创建", "").replace("任务", "").strip()
-            return create_task(task_name)
+            return await create_task(task_name)
         
         # ==================== 帮助命令 ====================
         
@@ -155,21 +211,43 @@ def parse_and_execute(command: str) -> dict:
 
 # ==================== 具体功能实现 ====================
 
-def check_all_systems() -> dict:
-    """检查所有系统状态"""
+async def _probe_health(url: str) -> str:
+    """探测单个服务的 /health"""
+    try:
+        response = await get_http_client().get(f"{url}/health", timeout=HEALTH_TIMEOUT)
+        return "✅ 运行中" if response.status_code == 200 else "❌ 异常"
+    except Exception:
+        return "⭕ 离线"
+
+
+async def check_all_systems() -> dict:
+    """检查所有系统状态（并发探测，缓存期内复用结果）"""
     result = {
         "title": "🌐 AI Stack 系统状态",
         "systems": {}
     }
     
+    now = time.monotonic()
+    tasks = {}
     for name, url in APIS.items():
-        try:
-            response = requests.get(f"{url}/health", timeout=2)
-            status = "✅ 运行中" if response.status_code == 200 else "❌ 异常"
-        except:
-            status = "⭕ 离线"
-        
-        result["systems"][name] = status
+        cached = _health_cache.get(url)
+        if cached and now - cached[0] < HEALTH_CACHE_TTL:
+            result["systems"][name] = cached[1]
+        else:
+            tasks[name] = asyncio.create_task(_probe_health(url))
+    
+    if tasks:
+        done, pending = await asyncio.wait(tasks.values(), timeout=HEALTH_DEADLINE)
+        for task in pending:
+            task.cancel()
+        checked_at = time.monotonic()
+        for name, task in tasks.items():
+            status = task.result() if task in done else "⭕ 离线"
+            _health_cache[APIS[name]] = (checked_at, status)
+            result["systems"][name] = status
+    
+    # 保持 APIS 中的顺序
+    result["systems"] = {name: result["systems"][name] for name in APIS}
     
     online_count = sum(1 for s in result["systems"].values() if "运行中" in s)
     result["summary"] = f"总计: {online_count}/{len(APIS)} 系统在线"
@@ -177,10 +255,10 @@ def check_all_systems() -> dict:
     return result
 
 
-def get_system_resources() -> dict:
+async def get_system_resources() -> dict:
     """获取系统资源"""
     try:
-        response = requests.get(f"{APIS['resource']}/api/resources/system", timeout=5)
+        response = await get_http_client().get(f"{APIS['resource']}/api/resources/system", timeout=5)
         if response.status_code == 200:
             data = response.json()
             resources = data.get("resources", {})
@@ -198,10 +276,10 @@ def get_system_resources() -> dict:
         return {"error": f"无法获取资源信息: {str(e)}"}
 
 
-def get_services_status() -> dict:
+async def get_services_status() -> dict:
     """获取服务状态"""
     try:
-        response = requests.get(f"{APIS['resource']}/api/resources/startup/status", timeout=5)
+        response = await get_http_client().get(f"{APIS['resource']}/api/resources/startup/status", timeout=5)
         if response.status_code == 200:
             data = response.json()
             services = data.get("services", [])
@@ -221,10 +299,10 @@ def get_services_status() -> dict:
         return {"error": f"无法获取服务状态: {str(e)}"}
 
 
-def get_financial_dashboard(period_type: str = "monthly") -> dict:
+async def get_financial_dashboard(period_type: str = "monthly") -> dict:
     """获取财务看板"""
     try:
-        response = requests.get(
+        response = await get_http_client().get(
             f"{APIS['erp']}/api/finance/dashboard",
             params={"period_type": period_type},
             timeout=10
@@ -248,10 +326,10 @@ def get_financial_dashboard(period_type: str = "monthly") -> dict:
         return {"error": f"无法获取财务数据: {str(e)}"}
 
 
-def get_customers() -> dict:
+async def get_customers() -> dict:
     """获取客户列表"""
     try:
-        response = requests.get(f"{APIS['erp']}/api/business/customers", timeout=10)
+        response = await get_http_client().get(f"{APIS['erp']}/api/business/customers", timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -275,10 +353,10 @@ def get_customers() -> dict:
         return {"error": f"无法获取客户列表: {str(e)}"}
 
 
-def get_orders_list() -> dict:
+async def get_orders_list() -> dict:
     """获取订单列表"""
     try:
-        response = requests.get(f"{APIS['erp']}/api/business/orders", timeout=10)
+        response = await get_http_client().get(f"{APIS['erp']}/api/business/orders", timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -303,10 +381,10 @@ def get_orders_list() -> dict:
         return {"error": f"无法获取订单列表: {str(e)}"}
 
 
-def get_order_status(order_no: str) -> dict:
+async def get_order_status(order_no: str) -> dict:
     """获取订单状态"""
     try:
-        response = requests.get(f"{APIS['erp']}/api/business/orders/{order_no}", timeout=10)
+        response = await get_http_client().get(f"{APIS['erp']}/api/business/orders/{order_no}", timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -326,10 +404,10 @@ def get_order_status(order_no: str) -> dict:
         return {"error": f"无法获取订单: {str(e)}"}
 
 
-def get_rag_stats() -> dict:
+async def get_rag_stats() -> dict:
     """获取RAG统计"""
     try:
-        response = requests.get(f"{APIS['rag']}/rag/stats", timeout=5)
+        response = await get_http_client().get(f"{APIS['rag']}/rag/stats", timeout=5)
         
         if response.status_code == 200:
             stats = response.json()
@@ -347,10 +425,10 @@ def get_rag_stats() -> dict:
         return {"error": f"无法获取RAG统计: {str(e)}"}
 
 
-def search_rag(query: str) -> dict:
+async def search_rag(query: str) -> dict:
     """搜索RAG知识库"""
     try:
-        response = requests.get(
+        response = await get_http_client().get(
             f"{APIS['rag']}/rag/search",
             params={"query": query, "top_k": 5},
             timeout=10
@@ -378,10 +456,10 @@ def search_rag(query: str) -> dict:
         return {"error": f"搜索失败: {str(e)}"}
 
 
-def save_to_rag(content: str) -> dict:
+async def save_to_rag(content: str) -> dict:
     """保存到RAG库"""
     try:
-        response = requests.post(
+        response = await get_http_client().post(
             f"{APIS['rag']}/rag/ingest",
             json={"content": content, "metadata": {"source": "command_gateway"}},
             timeout=10
@@ -400,10 +478,10 @@ def save_to_rag(content: str) -> dict:
         return {"error": f"保存失败: {str(e)}"}
 
 
-def get_stock_quote(symbol: str) -> dict:
+async def get_stock_quote(symbol: str) -> dict:
     """获取股票行情"""
     try:
-        response = requests.get(f"{APIS['stock']}/api/stock/quote/{symbol}", timeout=10)
+        response = await get_http_client().get(f"{APIS['stock']}/api/stock/quote/{symbol}", timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -422,10 +500,10 @@ def get_stock_quote(symbol: str) -> dict:
         return {"error": f"获取行情失败: {str(e)}"}
 
 
-def get_running_tasks() -> dict:
+async def get_running_tasks() -> dict:
     """获取运行中的任务"""
     try:
-        response = requests.get(f"{APIS['task']}/api/tasks/monitoring/active", timeout=10)
+        response = await get_http_client().get(f"{APIS['task']}/api/tasks/monitoring/active", timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -449,10 +527,10 @@ def get_running_tasks() -> dict:
         return {"error": f"获取任务失败: {str(e)}"}
 
 
-def create_task(task_name: str) -> dict:
+async def create_task(task_name: str) -> dict:
     """创建任务"""
     try:
-        response = requests.post(
+        response = await get_http_client().post(
             f"{APIS['task']}/api/tasks/create",
             json={"name": task_name, "task_type": "general", "description": task_name},
             timeout=10
@@ -522,7 +600,7 @@ async def execute_command_api(request: CommandRequest):
     POST /execute
     {"command": "查看本月财务"}
     """
-    result = parse_and_execute(request.command)
+    result = await parse_and_execute(request.command)
     return result
 
 
@@ -533,7 +611,7 @@ async def execute_command_get(command: str):
     
     GET /execute?command=查看本月财务
     """
-    result = parse_and_execute(command)
+    result = await parse_and_execute(command)
     return result
 
 
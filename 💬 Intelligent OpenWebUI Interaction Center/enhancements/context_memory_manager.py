@@ -1,15 +1,25 @@
 """
 上下文记忆管理模块
 支持100万字级别的对话上下文记忆
+
+- 每个线程复用一条 WAL 模式的长连接
+- FTS5（trigram 分词，支持中文）+ BM25 排序检索相关上下文
+- 会话摘要统计在内存中累积，按批量写入或由常驻刷新线程定时合并写入
 """
+import atexit
 import sqlite3
 import json
+import threading
+import weakref
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 import hashlib
 import re
 
 
+_CJK_RUN = re.compile(r'[\u3400-\u9fff]+')
+
+
 class ContextMemoryManager:
     """
     上下文记忆管理器 - 支持100万字长期记忆
@@ -21,14 +31,82 @@ class ContextMemoryManager:
     4. 多会话管理
     """
     
-    def __init__(self, db_path: str = "context_memory.db"):
+    # 单次全文检索最多遍历的命中文档数（按检索词文档频率累计）
+    FTS_POSTING_BUDGET = 5000
+    # 估算检索词文档频率时最多计数的文档数，达到即视为高频词
+    FTS_PROBE_LIMIT = 1000
+    
+    def __init__(
+        self,
+        db_path: str = "context_memory.db",
+        summary_batch_size: int = 200,
+        summary_flush_interval: float = 1.0
+    ):
+        """
+        Args:
+            db_path: 数据库路径
+            summary_batch_size: 累积多少条消息后合并写入会话摘要
+            summary_flush_interval: 会话摘要最长延迟写入时间（秒）
+        """
         self.db_path = db_path
+        self.summary_batch_size = summary_batch_size
+        self.summary_flush_interval = summary_flush_interval
+        
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._conn_lock = threading.Lock()
+        
+        # 待写入的会话摘要增量 {session_id: {...}}
+        self._pending_summary: Dict[str, Dict[str, Any]] = {}
+        self._pending_messages = 0
+        self._summary_lock = threading.Lock()
+        # 常驻刷新线程：有待写入摘要时被唤醒，延迟 summary_flush_interval 后写入，只占用一条连接
+        self._flush_wakeup = threading.Event()
+        self._flush_stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        
+        self.fts_enabled = False
         self.init_database()
+        
+        # 进程退出前写入未落盘的摘要
+        ref = weakref.ref(self)
+        atexit.register(lambda: ref() is not None and ref().flush_summaries())
+        
         print(f"✅ 上下文记忆管理器初始化完成: {db_path}")
     
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的长连接（WAL，自动提交）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+            with self._conn_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """停止刷新线程，写入待处理摘要并关闭所有连接"""
+        self._flush_stopped.set()
+        self._flush_wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush_summaries()
+        with self._conn_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+    
     def init_database(self):
         """初始化数据库"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
         
         # 对话历史表
@@ -50,6 +128,9 @@ class ContextMemoryManager:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_session ON conversation_history(session_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_user ON conversation_history(user_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON conversation_history(timestamp)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_session_time ON conversation_history(session_id, timestamp)"
+        )
         
         # 会话摘要表
         cursor.execute("""
@@ -82,9 +163,43 @@ class ContextMemoryManager:
                 last_referenced DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_summary_user ON session_summary(user_id, last_active)")
+        
+        self._init_fts(cursor)
+    
+    def _init_fts(self, cursor: sqlite3.Cursor):
+        """创建全文索引（外部内容表 + 触发器同步），不支持 FTS5/trigram 时回退到 LIKE"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversation_fts'"
+        ).fetchone()
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5(
+                    content,
+                    content='conversation_history',
+                    content_rowid='id',
+                    tokenize='trigram'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return
         
-        conn.commit()
-        conn.close()
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_fts_insert AFTER INSERT ON conversation_history
+            BEGIN
+                INSERT INTO conversation_fts(rowid, content) VALUES (NEW.id, NEW.content);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_fts_delete AFTER DELETE ON conversation_history
+            BEGIN
+                INSERT INTO conversation_fts(conversation_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+            END
+        """)
+        if not exists:
+            # 为已有历史建立索引
+            cursor.execute("INSERT INTO conversation_fts(conversation_fts) VALUES ('rebuild')")
+        self.fts_enabled = True
     
     def save_message(
         self, 
@@ -107,8 +222,7 @@ class ContextMemoryManager:
         Returns:
             消息ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connection().cursor()
         
         # 计算内容哈希（用于去重）
         content_hash = hashlib.md5(content.encode()).hexdigest()
@@ -132,31 +246,99 @@ class ContextMemoryManager:
         
         message_id = cursor.lastrowid
         
-        # 更新会话摘要
-        self._update_session_summary(cursor, session_id, user_id, word_count)
-        
-        conn.commit()
-        conn.close()
+        # 累积会话摘要增量（批量写入）
+        self._update_session_summary(session_id, user_id, word_count)
         
         return message_id
     
     def _update_session_summary(
         self, 
-        cursor: sqlite3.Cursor, 
         session_id: str, 
         user_id: str,
         word_count: int
     ):
-        """更新会话摘要统计"""
-        cursor.execute("""
-            INSERT INTO session_summary 
-            (session_id, user_id, total_messages, total_words, start_time, last_active)
-            VALUES (?, ?, 1, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            ON CONFLICT(session_id) DO UPDATE SET
-                total_messages = total_messages + 1,
-                total_words = total_words + ?,
-                last_active = CURRENT_TIMESTAMP
-        """, (session_id, user_id, word_count, word_count))
+        """累积会话摘要统计，达到批量大小时写入，否则定时写入"""
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        with self._summary_lock:
+            pending = self._pending_summary.get(session_id)
+            if pending is None:
+                pending = self._pending_summary[session_id] = {
+                    "user_id": user_id, "messages": 0, "words": 0, "start_time": now
+                }
+            pending["messages"] += 1
+            pending["words"] += word_count
+            pending["last_active"] = now
+            self._pending_messages += 1
+            
+            flush_now = self._pending_messages >= self.summary_batch_size
+            if not flush_now and self._pending_messages == 1:
+                self._start_flusher()
+                self._flush_wakeup.set()
+        
+        if flush_now:
+            self.flush_summaries()
+    
+    def _start_flusher(self):
+        """按需启动常驻刷新线程（调用方持有 _summary_lock）"""
+        if self._flusher is not None or self._flush_stopped.is_set():
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            args=(weakref.ref(self), self._flush_wakeup, self._flush_stopped, self.summary_flush_interval),
+            name="context-summary-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+    
+    @staticmethod
+    def _flush_loop(ref, wakeup: threading.Event, stopped: threading.Event, interval: float):
+        """刷新线程主循环；只持有管理器的弱引用，管理器被回收后退出"""
+        while True:
+            # 定期醒来检查管理器是否已被回收
+            if not wakeup.wait(timeout=60):
+                if ref() is None:
+                    return
+                continue
+            wakeup.clear()
+            if stopped.wait(interval):
+                return
+            manager = ref()
+            if manager is None:
+                return
+            try:
+                manager.flush_summaries()
+            except sqlite3.Error as e:
+                print(f"⚠️ 会话摘要定时写入失败: {e}")
+            del manager
+    
+    def flush_summaries(self):
+        """将累积的会话摘要增量写入数据库（单事务）"""
+        with self._summary_lock:
+            pending, self._pending_summary = self._pending_summary, {}
+            self._pending_messages = 0
+        
+        if not pending:
+            return
+        
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("""
+                INSERT INTO session_summary 
+                (session_id, user_id, total_messages, total_words, start_time, last_active)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    total_messages = total_messages + excluded.total_messages,
+                    total_words = total_words + excluded.total_words,
+                    last_active = excluded.last_active
+            """, [
+                (session_id, p["user_id"], p["messages"], p["words"], p["start_time"], p["last_active"])
+                for session_id, p in pending.items()
+            ])
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
     
     def get_conversation_history(
         self,
@@ -175,29 +357,15 @@ class ContextMemoryManager:
         Returns:
             消息列表
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        cursor = self._connection().execute("""
             SELECT id, role, content, metadata, word_count, timestamp
             FROM conversation_history
             WHERE session_id = ?
-            ORDER BY timestamp DESC
+            ORDER BY timestamp DESC, id DESC
             LIMIT ? OFFSET ?
         """, (session_id, limit, offset))
         
-        messages = []
-        for row in cursor.fetchall():
-            messages.append({
-                "id": row[0],
-                "role": row[1],
-                "content": row[2],
-                "metadata": json.loads(row[3]) if row[3] else {},
-                "word_count": row[4],
-                "timestamp": row[5]
-            })
-        
-        conn.close()
+        messages = [self._row_to_message(row) for row in cursor.fetchall()]
         
         # 返回时间正序（最早的在前）
         return list(reversed(messages))
@@ -252,8 +420,7 @@ class ContextMemoryManager:
         Returns:
             相关消息列表
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connection()
         
         # 计算时间范围
         time_threshold = (datetime.now() - timedelta(days=time_window_days)).strftime("%Y-%m-%d %H:%M:%S")
@@ -264,32 +431,160 @@ class ContextMemoryManager:
         if not keywords:
             return []
         
-        # 构建搜索条件（简单的关键词匹配）
-        keyword_conditions = " OR ".join([f"content LIKE '%{kw}%'" for kw in keywords])
-        
-        cursor.execute(f"""
+        terms, short_terms = self._build_match_terms(keywords)
+        match_query, full_query = (
+            self._select_match_query(conn, terms) if self.fts_enabled and terms else ("", "")
+        )
+        
+        fts_messages: List[Dict[str, Any]] = []
+        if match_query:
+            # 全文索引召回，BM25 相关度排序
+            fts_messages = self._fts_search(conn, match_query, session_id, time_threshold, top_k)
+            if len(fts_messages) < top_k and full_query != match_query:
+                # 稀有词按全库文档频率挑选，在本会话中可能命中不足：用全部检索词补足
+                seen = {msg["id"] for msg in fts_messages}
+                fts_messages.extend(
+                    msg for msg in self._fts_search(conn, full_query, session_id, time_threshold, top_k)
+                    if msg["id"] not in seen
+                )
+        
+        # 不足3字的关键词 trigram 无法匹配，不支持 FTS5 时所有关键词都走 LIKE
+        like_terms = short_terms if self.fts_enabled else keywords
+        if not like_terms:
+            return fts_messages[:top_k]
+        like_messages = self._like_search(conn, like_terms, session_id, time_threshold, top_k)
+        if not fts_messages:
+            return like_messages
+        
+        # 合并两路结果：同时命中的排在最前，其次全文检索结果，最后仅短词命中的消息
+        like_ids = {msg["id"] for msg in like_messages}
+        fts_ids = {msg["id"] for msg in fts_messages}
+        merged = [msg for msg in fts_messages if msg["id"] in like_ids]
+        merged.extend(msg for msg in fts_messages if msg["id"] not in like_ids)
+        merged.extend(msg for msg in like_messages if msg["id"] not in fts_ids)
+        return merged[:top_k]
+    
+    def _like_search(
+        self,
+        conn: sqlite3.Connection,
+        terms: List[str],
+        session_id: str,
+        time_threshold: str,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """在会话时间范围内执行参数化 LIKE 匹配，按时间倒序"""
+        conditions = " OR ".join("content LIKE ? ESCAPE '\\'" for _ in terms)
+        cursor = conn.execute(f"""
             SELECT id, role, content, metadata, word_count, timestamp
             FROM conversation_history
             WHERE session_id = ?
             AND timestamp >= ?
-            AND ({keyword_conditions})
-            ORDER BY timestamp DESC
+            AND ({conditions})
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (session_id, time_threshold, *(f"%{self._escape_like(t)}%" for t in terms), limit))
+        return [self._row_to_message(row) for row in cursor.fetchall()]
+    
+    def _fts_search(
+        self,
+        conn: sqlite3.Connection,
+        match_query: str,
+        session_id: str,
+        time_threshold: str,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """在会话时间范围内执行全文检索，按 BM25 排序"""
+        cursor = conn.execute("""
+            SELECT h.id, h.role, h.content, h.metadata, h.word_count, h.timestamp
+            FROM conversation_fts
+            JOIN conversation_history h ON h.id = conversation_fts.rowid
+            WHERE conversation_fts MATCH ?
+            AND h.session_id = ?
+            AND h.timestamp >= ?
+            ORDER BY bm25(conversation_fts)
             LIMIT ?
-        """, (session_id, time_threshold, top_k))
+        """, (match_query, session_id, time_threshold, limit))
+        return [self._row_to_message(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _build_match_terms(keywords: List[str], max_terms: int = 32) -> Tuple[List[str], List[str]]:
+        """
+        拆分 FTS5 检索词
         
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                "id": row[0],
-                "role": row[1],
-                "content": row[2],
-                "metadata": json.loads(row[3]) if row[3] else {},
-                "word_count": row[4],
-                "timestamp": row[5]
-            })
+        trigram 分词要求每个检索词至少3个字符；较长的中文片段（无空格的整句）
+        拆成重叠的3字片段，检索时 OR 组合，由 BM25 按命中片段多少排序。
+        
+        Returns:
+            (检索词, 不足3字的关键词)
+        """
+        terms: List[str] = []
+        short_terms: List[str] = []
+        for keyword in keywords:
+            if len(keyword) < 3:
+                short_terms.append(keyword)
+                continue
+            cjk_runs = _CJK_RUN.findall(keyword)
+            if len(keyword) > 6 and cjk_runs:
+                for run in cjk_runs:
+                    terms.extend(run[i:i + 3] for i in range(len(run) - 2))
+                terms.extend(re.findall(r'[^\u3400-\u9fff]{3,}', keyword))
+            else:
+                terms.append(keyword)
+        
+        # 去重保序
+        return list(dict.fromkeys(terms))[:max_terms], short_terms
+    
+    def _select_match_query(self, conn: sqlite3.Connection, terms: List[str]) -> Tuple[str, str]:
+        """
+        按文档频率从低到高挑选检索词，命中文档总数不超过 FTS_POSTING_BUDGET
+        
+        高频片段（相当于停用词）区分度低、对 BM25 排序贡献小，却要遍历大部分索引，
+        因此只保留最稀有的若干词，使检索耗时与历史总量基本无关。
+        文档频率用带 LIMIT 的探测查询估算，单词开销有上限。
+        频率按全库统计，稀有词未必出现在目标会话中，因此同时返回包含全部
+        命中词的查询，供会话内结果不足时补充检索。
+        
+        Returns:
+            (精简查询, 全部命中词查询)，所有词都未命中时均为空串
+        """
+        ranked = []
+        for position, term in enumerate(terms):
+            phrase = '"' + term.replace('"', '""') + '"'
+            freq = conn.execute(
+                "SELECT count(*) FROM (SELECT 1 FROM conversation_fts WHERE conversation_fts MATCH ? LIMIT ?)",
+                (phrase, self.FTS_PROBE_LIMIT)
+            ).fetchone()[0]
+            if freq:
+                # 高频词只在没有更稀有的词时兜底使用
+                if freq >= self.FTS_PROBE_LIMIT:
+                    freq = self.FTS_POSTING_BUDGET
+                ranked.append((freq, position, phrase))
+        
+        ranked.sort()
+        selected: List[str] = []
+        postings = 0
+        for freq, _, phrase in ranked:
+            if selected and postings + freq > self.FTS_POSTING_BUDGET:
+                break
+            selected.append(phrase)
+            postings += freq
         
-        conn.close()
-        return results
+        return " OR ".join(selected), " OR ".join(phrase for _, _, phrase in ranked)
+    
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    
+    @staticmethod
+    def _row_to_message(row: tuple) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "role": row[1],
+            "content": row[2],
+            "metadata": json.loads(row[3]) if row[3] else {},
+            "word_count": row[4],
+            "timestamp": row[5]
+        }
     
     def _extract_keywords(self, text: str, max_keywords: int = 5) -> List[str]:
         """提取关键词"""
@@ -307,10 +602,8 @@ class ContextMemoryManager:
     
     def get_session_summary(self, session_id: str) -> Optional[Dict[str, Any]]:
         """获取会话摘要"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self.flush_summaries()
+        cursor = self._connection().execute("""
             SELECT session_id, user_id, title, summary, key_topics, 
                    total_messages, total_words, start_time, last_active
             FROM session_summary
@@ -318,7 +611,6 @@ class ContextMemoryManager:
         """, (session_id,))
         
         row = cursor.fetchone()
-        conn.close()
         
         if not row:
             return None
@@ -366,18 +658,13 @@ class ContextMemoryManager:
             summary = f"讨论了 {len(keywords)} 个主题：{', '.join(keywords[:5])}"
         
         # 更新数据库
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self.flush_summaries()
+        self._connection().execute("""
             UPDATE session_summary
             SET title = ?, summary = ?, key_topics = ?
             WHERE session_id = ?
         """, (title, summary, json.dumps(keywords, ensure_ascii=False), session_id))
         
-        conn.commit()
-        conn.close()
-        
         return summary
     
     def build_full_context(
@@ -437,10 +724,8 @@ class ContextMemoryManager:
     
     def get_user_sessions(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
         """获取用户的所有会话"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self.flush_summaries()
+        cursor = self._connection().execute("""
             SELECT session_id, title, summary, total_messages, total_words,
                    start_time, last_active
             FROM session_summary
@@ -461,7 +746,6 @@ class ContextMemoryManager:
                 "last_active": row[6]
             })
         
-        conn.close()
         return sessions
     
     def save_key_info(
@@ -473,17 +757,11 @@ class ContextMemoryManager:
         importance_score: float = 0.5
     ):
         """保存关键信息"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self._connection().execute("""
             INSERT INTO context_keyinfo
             (session_id, user_id, key_type, key_content, importance_score)
             VALUES (?, ?, ?, ?, ?)
         """, (session_id, user_id, key_type, key_content, importance_score))
-        
-        conn.commit()
-        conn.close()
     
     def get_context_stats(self, session_id: str) -> Dict[str, Any]:
         """获取上下文统计信息"""
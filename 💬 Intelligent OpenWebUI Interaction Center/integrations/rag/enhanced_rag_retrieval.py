@@ -9,12 +9,15 @@ Enhanced RAG Retrieval for OpenWebUI
 2. 上下文感知检索
 3. 多轮对话检索优化
 4. 检索结果融合
+5. 子查询并发执行：整体截止时间、对冲请求、主查询置信时取消扩展查询
 """
 
+import asyncio
 import logging
 import sys
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -46,6 +49,59 @@ except ImportError:
         logger.warning("查询增强模块不可用，将使用基础检索")
 
 
+class SubqueryStats:
+    """
+    单类子查询（主查询/扩展查询/上下文查询）的延迟与贡献统计
+    
+    使用滑动窗口，便于在检索分布变化后重新评估是否启用
+    """
+
+    def __init__(self, window: int = 100):
+        self.latencies: deque = deque(maxlen=window)
+        self.contributions: deque = deque(maxlen=window)
+        self.calls = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.failures = 0
+        self.hedged = 0
+
+    def record_latency(self, latency: float, hedged: bool = False):
+        self.calls += 1
+        self.latencies.append(latency)
+        if hedged:
+            self.hedged += 1
+
+    def record_contribution(self, contributed: bool):
+        self.contributions.append(contributed)
+
+    @property
+    def contribution_rate(self) -> Optional[float]:
+        if not self.contributions:
+            return None
+        return sum(self.contributions) / len(self.contributions)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = self.latency_percentile(0.5)
+        p95 = self.latency_percentile(0.95)
+        rate = self.contribution_rate
+        return {
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "failures": self.failures,
+            "hedged": self.hedged,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "contribution_rate": round(rate, 3) if rate is not None else None,
+        }
+
+
 class EnhancedRAGRetrieval:
     """
     增强的RAG检索器
@@ -59,6 +115,13 @@ class EnhancedRAGRetrieval:
         max_context_length: int = 2000,
         use_reranking: bool = True,
         use_query_enhancement: bool = True,
+        retrieval_timeout: float = 3.0,
+        enable_hedging: bool = True,
+        hedge_delay: float = 0.5,
+        confidence_threshold: float = 0.85,
+        min_contribution: float = 0.05,
+        min_samples: int = 20,
+        probe_interval: int = 20,
     ):
         """
         初始化增强检索器
@@ -68,13 +131,34 @@ class EnhancedRAGRetrieval:
             max_context_length: 最大上下文长度
             use_reranking: 是否使用重排序
             use_query_enhancement: 是否使用查询增强
+            retrieval_timeout: 一次回答检索的整体截止时间（秒），超时返回已完成的部分结果
+            enable_hedging: 是否对慢请求发起对冲请求
+            hedge_delay: 样本不足时的对冲等待时间（秒），样本充足后使用该类子查询的 p95 延迟
+            confidence_threshold: 主查询结果足够且最高分达到该值时，取消未完成的扩展查询
+            min_contribution: 扩展/上下文查询对最终结果的贡献率低于该值时自动停用
+            min_samples: 评估贡献率所需的最少样本数
+            probe_interval: 停用后每隔多少次检索重新试探一次
         """
         self.default_top_k = default_top_k
         self.max_context_length = max_context_length
         self.use_reranking = use_reranking
         self.use_query_enhancement = use_query_enhancement and QUERY_ENHANCEMENT_AVAILABLE
+        self.retrieval_timeout = retrieval_timeout
+        self.enable_hedging = enable_hedging
+        self.hedge_delay = hedge_delay
+        self.confidence_threshold = confidence_threshold
+        self.min_contribution = min_contribution
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
         self.rag_service = get_rag_service()
         
+        self.subquery_stats: Dict[str, SubqueryStats] = {
+            "primary": SubqueryStats(),
+            "expansion": SubqueryStats(),
+            "contextual": SubqueryStats(),
+        }
+        self._retrieval_count = 0
+        
         # 初始化查询增强器
         if self.use_query_enhancement:
             self.query_enhancer = get_query_enhancer()
@@ -118,36 +202,32 @@ class EnhancedRAGRetrieval:
                 
                 logger.debug(f"查询增强: 原始='{user_query}', 增强='{enhanced_query}', 意图={query_intent.intent_type}")
             
-            # 1. 基础检索（使用增强后的查询）
-            base_results = await self.rag_service.search(
-                query=enhanced_query, top_k=top_k * 2  # 检索更多以便后续处理
-            )
-            items = base_results.get("items", [])
+            # 1. 并发执行主查询、扩展查询和上下文查询（整体截止时间内）
+            self._retrieval_count += 1
+            subqueries: List[Tuple[str, str, int]] = [("primary", enhanced_query, top_k * 2)]  # 检索更多以便后续处理
             
-            # 使用扩展查询进行补充检索
-            if len(expanded_queries) > 1:
+            if len(expanded_queries) > 1 and self._subquery_enabled("expansion"):
                 for expanded_query in expanded_queries[1:]:  # 跳过原始查询
-                    try:
-                        expanded_results = await self.rag_service.search(
-                            query=expanded_query, top_k=top_k
-                        )
-                        expanded_items = expanded_results.get("items", [])
-                        items.extend(expanded_items)
-                    except Exception as e:
-                        logger.warning(f"扩展查询检索失败: {e}")
+                    subqueries.append(("expansion", expanded_query, top_k))
 
             # 2. 上下文感知检索（如果有对话历史）
-            contextual_items = []
-            if conversation_history and len(conversation_history) > 0:
+            if conversation_history and len(conversation_history) > 0 and self._subquery_enabled("contextual"):
                 # 从对话历史中提取关键词进行检索
                 contextual_query = self._extract_contextual_query(
                     user_query, conversation_history
                 )
                 if contextual_query:
-                    contextual_results = await self.rag_service.search(
-                        query=contextual_query, top_k=top_k
-                    )
-                    contextual_items = contextual_results.get("items", [])
+                    subqueries.append(("contextual", contextual_query, top_k))
+
+            outcomes = await self._run_subqueries(subqueries, top_k)
+            items = [
+                item for outcome in outcomes if outcome["kind"] != "contextual"
+                for item in outcome["items"]
+            ]
+            contextual_items = [
+                item for outcome in outcomes if outcome["kind"] == "contextual"
+                for item in outcome["items"]
+            ]
 
             # 3. 合并和去重
             all_items = self._merge_and_deduplicate(items, contextual_items)
@@ -163,6 +243,7 @@ class EnhancedRAGRetrieval:
             # 6. 限制数量并构建上下文
             selected_items = all_items[:top_k]
             context = self._build_context(selected_items)
+            self._record_contributions(outcomes, selected_items)
 
             return {
                 "knowledge_items": selected_items,
@@ -170,6 +251,17 @@ class EnhancedRAGRetrieval:
                 "item_count": len(selected_items),
                 "total_found": len(all_items),
                 "retrieval_method": "enhanced",
+                "partial": any(o["status"] == "timeout" for o in outcomes),
+                "subqueries": [
+                    {
+                        "kind": o["kind"],
+                        "query": o["query"],
+                        "status": o["status"],
+                        "latency_ms": round(o["latency"] * 1000, 1) if o["latency"] is not None else None,
+                        "item_count": len(o["items"]),
+                    }
+                    for o in outcomes
+                ],
             }
 
         except Exception as e:
@@ -181,6 +273,173 @@ class EnhancedRAGRetrieval:
                 "error": str(e),
             }
 
+    async def _run_subqueries(
+        self, subqueries: List[Tuple[str, str, int]], top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        在整体截止时间内并发执行子查询
+        
+        - 主查询结果已足够可信时取消未完成的扩展查询
+        - 截止时间到达时取消剩余子查询，返回已完成的部分结果
+        
+        Args:
+            subqueries: [(类型, 查询, 检索数量)]，第一个为主查询
+            top_k: 最终返回数量
+            
+        Returns:
+            与 subqueries 顺序一致的执行结果
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.retrieval_timeout
+        outcomes = [
+            {"kind": kind, "query": query, "items": [], "latency": None, "status": "pending"}
+            for kind, query, _ in subqueries
+        ]
+        tasks = {
+            asyncio.create_task(self._hedged_search(query, k, kind, deadline)): index
+            for index, (kind, query, k) in enumerate(subqueries)
+        }
+        pending = set(tasks)
+
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    index = tasks[task]
+                    outcome = outcomes[index]
+                    stats = self.subquery_stats[outcome["kind"]]
+                    items, latency, hedged, error = task.result()
+                    outcome["latency"] = latency
+                    stats.record_latency(latency, hedged)
+                    if error:
+                        outcome["status"] = "failed"
+                        stats.failures += 1
+                        logger.warning(f"子查询检索失败({outcome['kind']}): {error}")
+                        continue
+                    outcome["items"] = items
+                    outcome["status"] = "ok"
+
+                    if index == 0 and self._is_confident(items, top_k):
+                        # 主查询已足够可信，扩展查询不再等待
+                        for other in list(pending):
+                            other_outcome = outcomes[tasks[other]]
+                            if other_outcome["kind"] == "expansion":
+                                other.cancel()
+                                pending.discard(other)
+                                other_outcome["status"] = "cancelled"
+                                self.subquery_stats["expansion"].cancelled += 1
+        finally:
+            for task in pending:
+                task.cancel()
+                outcome = outcomes[tasks[task]]
+                outcome["status"] = "timeout"
+                self.subquery_stats[outcome["kind"]].timeouts += 1
+            cancelled = [task for task in tasks if not task.done()]
+            if cancelled:
+                await asyncio.gather(*cancelled, return_exceptions=True)
+
+        return outcomes
+
+    async def _hedged_search(
+        self, query: str, top_k: int, kind: str, deadline: float
+    ) -> Tuple[List[Dict[str, Any]], float, bool, Optional[str]]:
+        """
+        带对冲的单次检索：首个请求超过对冲等待时间仍未返回时，再发一个相同请求，
+        取先成功的结果并取消另一个
+        
+        Returns:
+            (结果列表, 延迟秒数, 是否发起了对冲, 错误信息)
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        attempts = {asyncio.create_task(self.rag_service.search(query=query, top_k=top_k))}
+        hedged = False
+        error: Optional[str] = None
+
+        try:
+            hedge_delay = self._hedge_delay(kind)
+            if self.enable_hedging and started + hedge_delay < deadline:
+                done, _ = await asyncio.wait(attempts, timeout=hedge_delay)
+                if not done:
+                    attempts.add(asyncio.create_task(self.rag_service.search(query=query, top_k=top_k)))
+                    hedged = True
+
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = str(task.exception())
+                        continue
+                    result = task.result()
+                    if result.get("error"):
+                        error = result["error"]
+                        continue
+                    return result.get("items", []), loop.time() - started, hedged, None
+
+            return [], loop.time() - started, hedged, error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    def _hedge_delay(self, kind: str) -> float:
+        """对冲等待时间：样本充足时取该类子查询的 p95 延迟"""
+        stats = self.subquery_stats[kind]
+        if len(stats.latencies) < self.min_samples:
+            return self.hedge_delay
+        return max(stats.latency_percentile(0.95), 0.05)
+
+    def _is_confident(self, items: List[Dict[str, Any]], top_k: int) -> bool:
+        """主查询结果数量足够且最高分达到置信阈值"""
+        if len(items) < top_k:
+            return False
+        return max(item.get("score", 0.0) for item in items) >= self.confidence_threshold
+
+    def _subquery_disabled(self, kind: str) -> bool:
+        """样本充足且贡献率低于 min_contribution 的子查询类型视为停用"""
+        stats = self.subquery_stats[kind]
+        rate = stats.contribution_rate
+        return len(stats.contributions) >= self.min_samples and rate is not None and rate < self.min_contribution
+
+    def _subquery_enabled(self, kind: str) -> bool:
+        """停用的子查询类型每隔 probe_interval 次检索试探一次，以便贡献回升后恢复"""
+        if not self._subquery_disabled(kind):
+            return True
+        return self._retrieval_count % self.probe_interval == 0
+
+    def _record_contributions(
+        self, outcomes: List[Dict[str, Any]], selected_items: List[Dict[str, Any]]
+    ):
+        """
+        记录各子查询对最终结果的贡献：
+        扩展/上下文查询只有带来主查询没有的入选结果才算贡献；
+        超时或失败的子查询计为无贡献，使总是超时的扩展查询也能被自动停用。
+        因主查询已置信而取消的子查询不计入（无法判断其价值）
+        """
+        selected_ids = {item.get("id") for item in selected_items if item.get("id")}
+        primary_ids = {item.get("id") for item in outcomes[0]["items"]}
+        for outcome in outcomes:
+            if outcome["status"] in ("timeout", "failed"):
+                self.subquery_stats[outcome["kind"]].record_contribution(False)
+                continue
+            if outcome["status"] != "ok":
+                continue
+            ids = {item.get("id") for item in outcome["items"]} & selected_ids
+            if outcome["kind"] != "primary":
+                ids -= primary_ids
+            self.subquery_stats[outcome["kind"]].record_contribution(bool(ids))
+
+    def get_subquery_stats(self) -> Dict[str, Any]:
+        """获取子查询延迟与贡献统计"""
+        return {
+            kind: {**stats.to_dict(), "enabled": not self._subquery_disabled(kind)}
+            for kind, stats in self.subquery_stats.items()
+        }
+
     async def retrieve_for_agent(
         self,
         agent_name: str,
@@ -370,8 +629,8 @@ class RAGRetrievalOrchestrator:
     统一管理各种检索需求
     """
 
-    def __init__(self):
-        self.retriever = EnhancedRAGRetrieval()
+    def __init__(self, retriever: Optional[EnhancedRAGRetrieval] = None):
+        self.retriever = retriever or EnhancedRAGRetrieval()
 
     async def get_knowledge_for_response(
         self,
@@ -420,6 +679,10 @@ class RAGRetrievalOrchestrator:
 
         return result.get("context", "")
 
+    def get_subquery_stats(self) -> Dict[str, Any]:
+        """获取回答检索中各类子查询的延迟与贡献统计"""
+        return self.retriever.get_subquery_stats()
+
 
 # 全局实例
 _retrieval_orchestrator: Optional[RAGRetrievalOrchestrator] = None
@@ -3,15 +3,115 @@ OpenWebUI Functions - AI Stack 所有系统统一工具集
 用户可以在OpenWebUI聊天中通过自然语言操作所有9大系统
 
 根据需求5.3：聊天窗口与所有功能关联调用
+
+所有请求共用一个异步 HTTP 连接池，不阻塞 OpenWebUI 事件循环；
+系统状态总览并发探测各服务，带整体截止时间和短期缓存。
 """
 
-import requests
+import asyncio
+import time
+import httpx
 import json
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Set, Tuple
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 
+# 共享异步 HTTP 客户端（绑定事件循环，循环切换时重建）
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# 健康检查缓存 {url: (检查时间, 状态)}，状态为 ok / error / offline
+_health_cache: Dict[str, Tuple[float, str]] = {}
+
+# 正在关闭的旧客户端任务（保留引用，避免任务被回收）
+_closing_tasks: Set[asyncio.Task] = set()
+
+
+async def _aclose_quietly(client: httpx.AsyncClient):
+    """关闭旧客户端；旧事件循环已关闭时其连接无法正常释放，忽略错误"""
+    try:
+        await client.aclose()
+    except Exception:
+        pass
+
+
+def _close_stale_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """关闭绑定在旧事件循环上的客户端：旧循环仍在运行时交给它关闭，否则在当前循环中关闭"""
+    if client.is_closed:
+        return
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(_aclose_quietly(client), loop)
+        return
+    task = asyncio.get_running_loop().create_task(_aclose_quietly(client))
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
+
+
+def _http_client() -> httpx.AsyncClient:
+    """获取共享的异步 HTTP 客户端"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None:
+            _close_stale_client(_client, _client_loop)
+        _client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def _probe_health(url: str, timeout: float) -> str:
+    """探测单个服务的 /health"""
+    try:
+        response = await _http_client().get(f"{url}/health", timeout=timeout)
+        return "ok" if response.status_code == 200 else "error"
+    except Exception:
+        return "offline"
+
+
+async def check_health(
+    urls: List[str],
+    timeout: float = 2.0,
+    deadline: float = 3.0,
+    cache_ttl: float = 5.0
+) -> Dict[str, str]:
+    """
+    并发探测多个服务的健康状态
+    
+    Args:
+        urls: 服务地址列表
+        timeout: 单个探测超时（秒）
+        deadline: 整体截止时间（秒），到期仍未返回的服务记为离线
+        cache_ttl: 结果缓存时间（秒），缓存期内不重复探测
+        
+    Returns:
+        {url: ok / error / offline}
+    """
+    now = time.monotonic()
+    statuses: Dict[str, str] = {}
+    for url in urls:
+        cached = _health_cache.get(url)
+        if cached and now - cached[0] < cache_ttl:
+            statuses[url] = cached[1]
+    
+    pending = [url for url in dict.fromkeys(urls) if url not in statuses]
+    if pending:
+        tasks = {asyncio.create_task(_probe_health(url, timeout)): url for url in pending}
+        done, not_done = await asyncio.wait(tasks, timeout=deadline)
+        for task in not_done:
+            task.cancel()
+        checked_at = time.monotonic()
+        for task, url in tasks.items():
+            status = task.result() if task in done else "offline"
+            statuses[url] = status
+            _health_cache[url] = (checked_at, status)
+    
+    return statuses
+
+
 class Tools:
     """AI Stack 统一工具集"""
     
@@ -28,6 +128,9 @@ class Tools:
         TASK_API: str = Field(default="http://host.docker.internal:8017", description="任务代理API地址")
         RESOURCE_API: str = Field(default="http://host.docker.internal:8018", description="资源管理API地址")
         LEARNING_API: str = Field(default="http://host.docker.internal:8019", description="自我学习API地址")
+        HEALTH_TIMEOUT: float = Field(default=2.0, description="单个服务健康检查超时（秒）")
+        HEALTH_DEADLINE: float = Field(default=3.0, description="系统状态总览整体截止时间（秒）")
+        HEALTH_CACHE_TTL: float = Field(default=5.0, description="健康检查结果缓存时间（秒）")
     
     # ==================== RAG 知识库功能 ====================
     
@@ -43,7 +146,7 @@ class Tools:
         示例: "搜索知识库中关于Python的内容"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.RAG_API}/rag/search",
                 params={"query": query, "top_k": top_k},
                 timeout=10
@@ -77,7 +180,7 @@ class Tools:
         参数: period_type可以是 daily, weekly, monthly, quarterly, yearly
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.ERP_API}/api/finance/dashboard",
                 params={"period_type": period_type},
                 timeout=10
@@ -110,7 +213,7 @@ class Tools:
         示例: "查看客户列表"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.ERP_API}/api/business/customers",
                 params={"limit": limit},
                 timeout=10
@@ -148,7 +251,7 @@ class Tools:
             else:
                 url = f"{self.valves.ERP_API}/api/business/orders"
             
-            response = requests.get(url, timeout=10)
+            response = await _http_client().get(url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -186,7 +289,7 @@ class Tools:
         示例: "查看AAPL的股票价格"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.STOCK_API}/api/stock/quote/{symbol}",
                 timeout=10
             )
@@ -220,7 +323,7 @@ class Tools:
         策略: trend_following, mean_reversion, momentum
         """
         try:
-            response = requests.post(
+            response = await _http_client().post(
                 f"{self.valves.STOCK_API}/api/strategy/analyze",
                 json={"symbol": symbol, "strategy": strategy},
                 timeout=15
@@ -256,7 +359,7 @@ class Tools:
         类别: technology, finance, politics, sports
         """
         try:
-            response = requests.post(
+            response = await _http_client().post(
                 f"{self.valves.TREND_API}/api/crawl/news",
                 json={"category": category, "max_items": max_items},
                 timeout=30
@@ -288,7 +391,7 @@ class Tools:
         示例: "生成AI行业的趋势分析报告"
         """
         try:
-            response = requests.post(
+            response = await _http_client().post(
                 f"{self.valves.TREND_API}/api/analyze/generate-report",
                 json={"topic": topic},
                 timeout=30
@@ -326,7 +429,7 @@ class Tools:
         平台: xiaohongshu, douyin, zhihu, toutiao
         """
         try:
-            response = requests.post(
+            response = await _http_client().post(
                 f"{self.valves.CONTENT_API}/api/content/generate",
                 json={
                     "topic": topic,
@@ -365,7 +468,7 @@ class Tools:
         示例: "从小红书收集关于旅游的素材"
         """
         try:
-            response = requests.post(
+            response = await _http_client().post(
                 f"{self.valves.CONTENT_API}/api/materials/collect",
                 json={
                     "platform": platform,
@@ -410,7 +513,7 @@ class Tools:
         类型: data_collection, data_analysis, content_generation, monitoring
         """
         try:
-            response = requests.post(
+            response = await _http_client().post(
                 f"{self.valves.TASK_API}/api/tasks/create",
                 json={
                     "name": task_name,
@@ -449,7 +552,7 @@ class Tools:
         示例: "执行任务1"
         """
         try:
-            response = requests.post(
+            response = await _http_client().post(
                 f"{self.valves.TASK_API}/api/tasks/{task_id}/execute",
                 timeout=10
             )
@@ -471,7 +574,7 @@ class Tools:
         示例: "查看正在运行的任务"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.TASK_API}/api/tasks/monitoring/active",
                 timeout=10
             )
@@ -507,7 +610,7 @@ class Tools:
         示例: "查看系统资源使用情况"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.RESOURCE_API}/api/resources/system",
                 timeout=10
             )
@@ -550,7 +653,7 @@ class Tools:
         """
         try:
             params = "&".join([f"services={s}" for s in services])
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.RESOURCE_API}/api/resources/conflicts/detect?{params}",
                 timeout=10
             )
@@ -583,7 +686,7 @@ class Tools:
         示例: "查看所有服务运行状态"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.RESOURCE_API}/api/resources/startup/status",
                 timeout=10
             )
@@ -618,7 +721,7 @@ class Tools:
         示例: "系统运行情况如何？"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.LEARNING_API}/api/learning/analyze/all",
                 timeout=10
             )
@@ -650,7 +753,7 @@ class Tools:
         示例: "给我一些系统优化建议"
         """
         try:
-            response = requests.get(
+            response = await _http_client().get(
                 f"{self.valves.LEARNING_API}/api/learning/suggestions/system",
                 timeout=10
             )
@@ -697,18 +800,24 @@ class Tools:
             ("学习", self.valves.LEARNING_API)
         ]
         
+        statuses = await check_health(
+            [api_url for _, api_url in systems],
+            timeout=self.valves.HEALTH_TIMEOUT,
+            deadline=self.valves.HEALTH_DEADLINE,
+            cache_ttl=self.valves.HEALTH_CACHE_TTL
+        )
+        
         formatted = "🌐 **AI Stack 系统状态**\n\n"
         online_count = 0
         
         for name, api_url in systems:
-            try:
-                response = requests.get(f"{api_url}/health", timeout=2)
-                if response.status_code == 200:
-                    formatted += f"✅ {name}系统 - 运行中\n"
-                    online_count += 1
-                else:
-                    formatted += f"❌ {name}系统 - 异常\n"
-            except:
+            status = statuses[api_url]
+            if status == "ok":
+                formatted += f"✅ {name}系统 - 运行中\n"
+                online_count += 1
+            elif status == "error":
+                formatted += f"❌ {name}系统 - 异常\n"
+            else:
                 formatted += f"⭕ {name}系统 - 离线\n"
         
         formatted += f"\n**总计**: {online_count}/{len(systems)} 系统在线"
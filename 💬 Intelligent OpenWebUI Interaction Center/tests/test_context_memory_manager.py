@@ -0,0 +1,113 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from enhancements.context_memory_manager import ContextMemoryManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ContextMemoryManager(db_path=str(tmp_path / "memory.db"), summary_flush_interval=0.05)
+    yield manager
+    manager.close()
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _stored_messages(manager, session_id):
+    row = manager._connection().execute(
+        "SELECT total_messages FROM session_summary WHERE session_id = ?", (session_id,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def test_timed_flushes_reuse_one_flusher_connection(manager):
+    for i in range(5):
+        manager.save_message("s1", "u1", "user", f"第{i}条消息")
+        assert _wait_for(lambda: _stored_messages(manager, "s1") == i + 1)
+
+    # 主线程一条连接 + 常驻刷新线程一条连接
+    assert len(manager._connections) == 2
+    flushers = [t for t in threading.enumerate() if t.name == "context-summary-flusher"]
+    assert flushers == [manager._flusher]
+
+    manager.close()
+    assert not flushers[0].is_alive()
+    assert manager._connections == []
+
+
+def test_batch_flush_and_pending_summary_are_counted(tmp_path):
+    manager = ContextMemoryManager(
+        db_path=str(tmp_path / "memory.db"), summary_batch_size=3, summary_flush_interval=60
+    )
+    for i in range(7):
+        manager.save_message("s1", "u1", "user", "你好")
+    # 两次批量写入，剩余一条由查询前的 flush 写入
+    assert _stored_messages(manager, "s1") == 6
+    summary = manager.get_session_summary("s1")
+    assert summary["total_messages"] == 7 and summary["total_words"] == 14
+    manager.close()
+
+    reopened = ContextMemoryManager(db_path=str(tmp_path / "memory.db"))
+    assert reopened.get_session_summary("s1")["total_messages"] == 7
+    reopened.close()
+
+
+def test_globally_frequent_term_still_matches_within_session(manager):
+    if not manager.fts_enabled:
+        pytest.skip("SQLite 不支持 FTS5 trigram")
+    manager.FTS_PROBE_LIMIT = 20
+    manager.FTS_POSTING_BUDGET = 50
+    for i in range(30):
+        manager.save_message("B", "u2", "user", f"数据库连接池配置第{i}条")
+    for i in range(3):
+        manager.save_message("C", "u3", "user", f"量子纠缠理论入门第{i}讲")
+    manager.save_message("A", "u1", "user", "我们讨论数据库索引的设计")
+    manager.save_message("A", "u1", "assistant", "今天天气不错")
+
+    results = manager.search_relevant_context("A", "数据库 量子纠缠理论")
+    assert [r["content"] for r in results] == ["我们讨论数据库索引的设计"]
+
+    # 稀有词在本会话命中时排在补充结果之前
+    manager.save_message("A", "u1", "user", "量子纠缠理论和数据库有什么关系")
+    results = manager.search_relevant_context("A", "数据库 量子纠缠理论")
+    assert [r["content"] for r in results] == ["量子纠缠理论和数据库有什么关系", "我们讨论数据库索引的设计"]
+    assert manager.search_relevant_context("A", "数据库 量子纠缠理论", top_k=1)[0]["content"].startswith("量子")
+
+
+def test_short_keywords_fall_back_to_like(manager):
+    manager.save_message("A", "u1", "user", "聊聊AI和ML")
+    manager.save_message("B", "u1", "user", "聊聊AI")
+    results = manager.search_relevant_context("A", "ML")
+    assert [r["content"] for r in results] == ["聊聊AI和ML"]
+    assert manager.search_relevant_context("A", "不存在的内容") == []
+
+
+def test_short_keywords_are_merged_with_fulltext_results(manager):
+    manager.save_message("A", "u1", "user", "上月订单汇总")
+    manager.save_message("A", "u1", "user", "财务报表已经导出")
+    manager.save_message("A", "u1", "assistant", "订单和财务报表都已核对")
+    manager.save_message("B", "u1", "user", "订单财务报表")
+
+    results = [r["content"] for r in manager.search_relevant_context("A", "订单 财务报表")]
+    # 同时命中两类关键词的排在最前，2字关键词的命中不再被丢弃
+    assert results[0] == "订单和财务报表都已核对"
+    assert set(results) == {"订单和财务报表都已核对", "财务报表已经导出", "上月订单汇总"}
+
+    # 长关键词在历史中不存在时，仍按短词匹配
+    results = manager.search_relevant_context("A", "订单 不存在的长词")
+    assert [r["content"] for r in results] == ["订单和财务报表都已核对", "上月订单汇总"]
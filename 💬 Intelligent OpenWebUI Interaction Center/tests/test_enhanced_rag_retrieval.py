@@ -0,0 +1,177 @@
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from integrations.rag.enhanced_rag_retrieval import EnhancedRAGRetrieval
+
+
+class FakeRAGService:
+    """按查询配置延迟与结果的 RAG 服务；delays 中的列表按调用次数依次取值"""
+
+    def __init__(self, results, delays=None):
+        self.results = results
+        self.delays = delays or {}
+        self.calls = Counter()
+        self.cancelled = Counter()
+
+    async def search(self, query, top_k):
+        attempt = self.calls[query]
+        self.calls[query] += 1
+        delay = self.delays.get(query, 0)
+        if isinstance(delay, list):
+            delay = delay[min(attempt, len(delay) - 1)]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled[query] += 1
+            raise
+        return {"items": self.results.get(query, [])[:top_k]}
+
+
+class FakeQueryEnhancer:
+    def analyze_intent(self, query):
+        return SimpleNamespace(intent_type="general")
+
+    def expand_query(self, query, max_expansions=3):
+        return [query, f"{query} 扩展"]
+
+    def rewrite_query(self, query, intent):
+        return query
+
+    def ensure_diversity(self, items, max_similarity=0.7):
+        return items
+
+
+def _items(prefix, count, score):
+    return [
+        {"id": f"{prefix}{i}", "score": score - i * 0.01, "snippet": f"{prefix} 片段 {i}" * 10}
+        for i in range(count)
+    ]
+
+
+def _retriever(service, **kwargs):
+    retriever = EnhancedRAGRetrieval(use_query_enhancement=False, **kwargs)
+    retriever.rag_service = service
+    retriever.use_query_enhancement = True
+    retriever.query_enhancer = FakeQueryEnhancer()
+    return retriever
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_partial_results_and_cancels_stragglers():
+    service = FakeRAGService(
+        {"问题": _items("p", 6, 0.6), "问题 扩展": _items("e", 3, 0.9)},
+        delays={"问题 扩展": 5.0},
+    )
+    retriever = _retriever(service, retrieval_timeout=0.2, enable_hedging=False)
+
+    started = time.monotonic()
+    result = await retriever.retrieve_for_response("问题", top_k=3)
+    assert time.monotonic() - started < 1.0
+
+    assert result["partial"] is True
+    assert [s["status"] for s in result["subqueries"]] == ["ok", "timeout"]
+    assert [item["id"] for item in result["knowledge_items"]] == ["p0", "p1", "p2"]
+    assert service.cancelled["问题 扩展"] == 1
+    assert retriever.get_subquery_stats()["expansion"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_subqueries_run_concurrently_and_merge():
+    service = FakeRAGService(
+        {"问题": _items("p", 6, 0.6), "问题 扩展": _items("e", 3, 0.7), "上一轮": _items("c", 3, 0.65)},
+        delays={"问题": 0.1, "问题 扩展": 0.1, "上一轮": 0.1},
+    )
+    retriever = _retriever(service, enable_hedging=False)
+
+    started = time.monotonic()
+    result = await retriever.retrieve_for_response("问题", conversation_history=[{"user": "上一轮"}], top_k=3)
+    assert time.monotonic() - started < 0.25
+
+    assert result["partial"] is False
+    assert [s["kind"] for s in result["subqueries"]] == ["primary", "expansion", "contextual"]
+    assert [item["id"] for item in result["knowledge_items"]] == ["e0", "e1", "e2"]
+    stats = retriever.get_subquery_stats()
+    assert stats["expansion"]["contribution_rate"] == 1.0
+    assert stats["contextual"]["contribution_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_straggler():
+    service = FakeRAGService({"问题": _items("p", 6, 0.6)}, delays={"问题": [2.0, 0.01]})
+    retriever = _retriever(service, hedge_delay=0.05)
+    retriever.query_enhancer.expand_query = lambda query, max_expansions=3: [query]
+
+    result = await retriever.retrieve_for_response("问题", top_k=3)
+
+    assert result["subqueries"][0]["status"] == "ok"
+    assert result["subqueries"][0]["latency_ms"] < 500
+    assert service.calls["问题"] == 2
+    assert service.cancelled["问题"] == 1
+    assert retriever.get_subquery_stats()["primary"]["hedged"] == 1
+
+
+@pytest.mark.asyncio
+async def test_confident_primary_cancels_pending_expansions():
+    service = FakeRAGService(
+        {"问题": _items("p", 6, 0.95), "问题 扩展": _items("e", 3, 0.99)},
+        delays={"问题 扩展": 1.0},
+    )
+    retriever = _retriever(service, enable_hedging=False)
+
+    started = time.monotonic()
+    result = await retriever.retrieve_for_response("问题", top_k=3)
+    assert time.monotonic() - started < 0.5
+
+    assert result["partial"] is False
+    assert result["subqueries"][1]["status"] == "cancelled"
+    assert service.cancelled["问题 扩展"] == 1
+    stats = retriever.get_subquery_stats()["expansion"]
+    assert stats["cancelled"] == 1
+    # 取消的扩展查询不计入贡献样本
+    assert stats["contribution_rate"] is None
+
+
+@pytest.mark.asyncio
+async def test_always_timing_out_expansion_is_disabled_and_probed():
+    service = FakeRAGService(
+        {"问题": _items("p", 6, 0.6), "问题 扩展": _items("e", 3, 0.9)},
+        delays={"问题 扩展": 5.0},
+    )
+    retriever = _retriever(service, retrieval_timeout=0.05, enable_hedging=False, min_samples=3, probe_interval=5)
+
+    for _ in range(3):
+        await retriever.retrieve_for_response("问题", top_k=3)
+    stats = retriever.get_subquery_stats()["expansion"]
+    assert stats["contribution_rate"] == 0.0
+    assert stats["enabled"] is False
+
+    result = await retriever.retrieve_for_response("问题", top_k=3)
+    assert [s["kind"] for s in result["subqueries"]] == ["primary"]
+    assert result["partial"] is False
+    assert service.calls["问题 扩展"] == 3
+
+    # 每 probe_interval 次检索试探一次
+    result = await retriever.retrieve_for_response("问题", top_k=3)
+    assert [s["kind"] for s in result["subqueries"]] == ["primary", "expansion"]
+    assert service.calls["问题 扩展"] == 4
+
+
+@pytest.mark.asyncio
+async def test_useful_expansion_stays_enabled():
+    service = FakeRAGService({"问题": _items("p", 6, 0.6), "问题 扩展": _items("e", 3, 0.9)})
+    retriever = _retriever(service, enable_hedging=False, min_samples=3)
+
+    for _ in range(5):
+        await retriever.retrieve_for_response("问题", top_k=3)
+    assert retriever.get_subquery_stats()["expansion"]["enabled"] is True
+    assert service.calls["问题 扩展"] == 5
@@ -0,0 +1,173 @@
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import command_gateway
+from openwebui_functions import all_systems_tools
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    """模拟各服务的 /health：路径形如 /{服务名}/health，耗时取 server.delays[服务名]"""
+
+    def do_GET(self):
+        server = self.server
+        name = self.path.strip("/").split("/")[0]
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.requests.append(name)
+        time.sleep(server.delays.get(name, server.default_delay))
+        with server.lock:
+            server.in_flight -= 1
+        status = 500 if name in server.failing else 200
+        try:
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def health_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HealthHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.default_delay = 0.2
+    server.delays = {}
+    server.failing = set()
+    server.in_flight = 0
+    server.peak = 0
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def gateway(health_server, monkeypatch):
+    apis = {name: f"{health_server.base_url}/{name}" for name in command_gateway.APIS}
+    monkeypatch.setattr(command_gateway, "APIS", apis)
+    monkeypatch.setattr(command_gateway, "HEALTH_DEADLINE", 0.6)
+    monkeypatch.setattr(command_gateway, "HEALTH_CACHE_TTL", 5.0)
+    monkeypatch.setattr(command_gateway, "_health_cache", {})
+    return command_gateway
+
+
+def test_gateway_sweep_probes_services_concurrently(gateway, health_server):
+    async def run():
+        started = time.monotonic()
+        result = await gateway.check_all_systems()
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(run())
+    # 8 个服务串行探测至少需要 1.6 秒
+    assert elapsed < 0.6
+    assert health_server.peak == len(gateway.APIS)
+    assert list(result["systems"]) == list(gateway.APIS)
+    assert result["summary"] == f"总计: {len(gateway.APIS)}/{len(gateway.APIS)} 系统在线"
+
+
+def test_gateway_deadline_marks_slow_services_offline(gateway, health_server):
+    health_server.delays = {"stock": 2.0}
+    health_server.failing = {"trend"}
+
+    async def run():
+        started = time.monotonic()
+        result = await gateway.check_all_systems()
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(run())
+    assert elapsed < 1.0
+    assert result["systems"]["stock"] == "⭕ 离线"
+    assert result["systems"]["trend"] == "❌ 异常"
+    assert result["systems"]["rag"] == "✅ 运行中"
+
+
+def test_gateway_cache_hit_does_not_reprobe(gateway, health_server):
+    async def run():
+        first = await gateway.check_all_systems()
+        second = await gateway.check_all_systems()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert len(health_server.requests) == len(gateway.APIS)
+
+    # 缓存过期后重新探测
+    for url, (checked_at, status) in list(gateway._health_cache.items()):
+        gateway._health_cache[url] = (checked_at - gateway.HEALTH_CACHE_TTL, status)
+    asyncio.run(gateway.check_all_systems())
+    assert len(health_server.requests) == 2 * len(gateway.APIS)
+
+
+def test_gateway_closes_client_from_previous_loop(gateway, health_server):
+    async def fetch():
+        client = gateway.get_http_client()
+        await client.get(f"{health_server.base_url}/rag/health")
+        return client
+
+    async def switch_loop():
+        client = gateway.get_http_client()
+        await asyncio.sleep(0)
+        return client
+
+    old_client = asyncio.run(fetch())
+    new_client = asyncio.run(switch_loop())
+    assert new_client is not old_client
+    assert old_client.is_closed
+    asyncio.run(new_client.aclose())
+
+
+@pytest.fixture
+def tools_state(monkeypatch):
+    monkeypatch.setattr(all_systems_tools, "_health_cache", {})
+    return all_systems_tools
+
+
+def test_tools_check_health_is_concurrent_with_deadline(tools_state, health_server):
+    names = ["rag", "erp", "stock", "trend", "content", "task"]
+    urls = [f"{health_server.base_url}/{name}" for name in names]
+    health_server.delays = {"task": 2.0}
+    health_server.failing = {"erp"}
+
+    async def run():
+        started = time.monotonic()
+        statuses = await tools_state.check_health(urls, timeout=5.0, deadline=0.6, cache_ttl=5.0)
+        return statuses, time.monotonic() - started
+
+    statuses, elapsed = asyncio.run(run())
+    assert elapsed < 1.0
+    assert health_server.peak == len(names)
+    assert statuses[urls[0]] == "ok"
+    assert statuses[urls[1]] == "error"
+    assert statuses[urls[5]] == "offline"
+
+
+def test_tools_check_health_uses_cache_within_ttl(tools_state, health_server):
+    urls = [f"{health_server.base_url}/{name}" for name in ("rag", "erp")]
+
+    async def run():
+        first = await tools_state.check_health(urls, cache_ttl=5.0)
+        second = await tools_state.check_health(urls, cache_ttl=5.0)
+        third = await tools_state.check_health(urls, cache_ttl=0.0)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == second == third == {url: "ok" for url in urls}
+    # 缓存期内的第二次调用不发请求，TTL 为 0 时重新探测
+    assert len(health_server.requests) == 4
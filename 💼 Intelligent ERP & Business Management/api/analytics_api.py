@@ -23,15 +23,13 @@ from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Query, Depends, Body
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, case
 
+from core import analytics_rollup
 from core.database import get_db
 from core.database_models import (
     Order,
-    OrderItem,
-    Customer,
     FinancialData,
-    CostCategory,
     PeriodType,
 )
 
@@ -136,74 +134,35 @@ async def revenue_analysis(
                 start_date = date(today.year, 1, 1)
                 end_date = date(today.year, 12, 31)
 
-        # 查询订单
-        query = db.query(Order).filter(
-            and_(
-                Order.order_date >= start_date,
-                Order.order_date <= end_date,
-            )
-        )
-
-        # 客户类别过滤
-        if customer_category:
-            query = query.join(Customer).filter(Customer.category == customer_category)
-
-        orders = query.all()
-
-        # 计算总营收
-        total_revenue = sum(float(order.total_amount) for order in orders)
+        # 全部统计读取预聚合结果（汇总表由后台任务 RollupRefresher 刷新）
+        totals = analytics_rollup.revenue_totals(db, start_date, end_date, customer_category)
+        total_revenue = totals["total_amount"]
 
         # 按客户类别统计
-        customer_category_stats = {}
-        for order in orders:
-            if order.customer and order.customer.category:
-                cat = order.customer.category
-                customer_category_stats[cat] = customer_category_stats.get(cat, 0.0) + float(order.total_amount)
+        customer_category_stats = analytics_rollup.revenue_by_customer_category(
+            db, start_date, end_date, customer_category
+        )
 
         # 订单统计
+        order_count = totals["order_count"]
         order_stats = {
-            "total_orders": len(orders),
-            "average_order_amount": total_revenue / len(orders) if orders else 0,
-            "max_order_amount": max((float(o.total_amount) for o in orders), default=0),
-            "min_order_amount": min((float(o.total_amount) for o in orders), default=0),
+            "total_orders": order_count,
+            "average_order_amount": total_revenue / order_count if order_count else 0,
+            "max_order_amount": totals["max_order_amount"],
+            "min_order_amount": totals["min_order_amount"],
         }
 
-        # 订单明细分类汇总
-        order_detail_summary = []
-        for order in orders:
-            for item in order.items:
-                detail = {
-                    "order_number": order.order_number,
-                    "product_code": item.product_code,
-                    "product_name": item.product_name,
-                    "quantity": float(item.quantity),
-                    "total_price": float(item.total_price),
-                }
-                order_detail_summary.append(detail)
-
-        # 按产品汇总
-        product_summary = {}
-        for detail in order_detail_summary:
-            code = detail["product_code"] or detail["product_name"]
-            if code not in product_summary:
-                product_summary[code] = {
-                    "product_code": code,
-                    "product_name": detail["product_name"],
-                    "total_quantity": 0,
-                    "total_amount": 0,
-                    "order_count": 0,
-                }
-            product_summary[code]["total_quantity"] += detail["quantity"]
-            product_summary[code]["total_amount"] += detail["total_price"]
-            product_summary[code]["order_count"] += 1
-
-        order_detail_summary = list(product_summary.values())
-
-        # 多时间维度数据（简化实现）
+        # 订单明细分类汇总（按产品）
+        order_detail_summary = analytics_rollup.product_summary(
+            db, start_date, end_date, customer_category
+        )
+
+        # 多时间维度数据
+        daily = analytics_rollup.daily_revenue(db, start_date, end_date, customer_category)
         time_dimension_data = {
-            "daily": _get_daily_revenue(orders, start_date, end_date),
-            "weekly": _get_weekly_revenue(orders, start_date, end_date),
-            "monthly": _get_monthly_revenue(orders, start_date, end_date),
+            "daily": _get_daily_revenue(daily, start_date, end_date),
+            "weekly": _get_weekly_revenue(daily),
+            "monthly": _get_monthly_revenue(daily),
         }
 
         return RevenueAnalysisResponse(
@@ -257,26 +216,26 @@ async def cost_analysis(
                 start_date = today.replace(day=1)
                 end_date = today
 
-        # 查询成本数据（财务数据表中的expense类别）
-        cost_query = db.query(FinancialData).filter(
-            and_(
-                FinancialData.date >= start_date,
-                FinancialData.date <= end_date,
-                FinancialData.category == "expense",
+        # 按类别/子类别在数据库中聚合费用与收入
+        grouped = _sum_by_subcategory(db, start_date, end_date, ["expense", "revenue"])
+        expense_rows = grouped.get("expense", {})
+        total_cost = sum(expense_rows.values())
+        total_revenue = sum(grouped.get("revenue", {}).values())
+
+        # 按成本类别统计（无子类别时取 extra_metadata.cost_category）
+        cost_by_category = {k: v for k, v in expense_rows.items() if k is not None}
+        if None in expense_rows:
+            uncategorized = db.query(FinancialData.extra_metadata, FinancialData.amount).filter(
+                and_(
+                    FinancialData.date >= start_date,
+                    FinancialData.date <= end_date,
+                    FinancialData.category == "expense",
+                    FinancialData.subcategory.is_(None),
+                )
             )
-        )
-
-        cost_data = cost_query.all()
-
-        # 计算总成本
-        total_cost = sum(float(item.amount) for item in cost_data)
-
-        # 按成本类别统计
-        cost_by_category = {}
-        for item in cost_data:
-            # 从subcategory或metadata中获取成本类别
-            cost_cat = item.subcategory or item.extra_metadata.get("cost_category", "other") if item.extra_metadata else "other"
-            cost_by_category[cost_cat] = cost_by_category.get(cost_cat, 0.0) + float(item.amount)
+            for extra_metadata, amount in uncategorized:
+                cost_cat = (extra_metadata or {}).get("cost_category", "other")
+                cost_by_category[cost_cat] = cost_by_category.get(cost_cat, 0.0) + float(amount)
 
         # 费用合理性分析（简化实现）
         cost_reasonableness = {
@@ -286,17 +245,6 @@ async def cost_analysis(
         }
 
         # 盈亏平衡分析
-        # 查询同期收入
-        revenue_query = db.query(FinancialData).filter(
-            and_(
-                FinancialData.date >= start_date,
-                FinancialData.date <= end_date,
-                FinancialData.category == "revenue",
-            )
-        )
-        revenue_data = revenue_query.all()
-        total_revenue = sum(float(item.amount) for item in revenue_data)
-
         break_even_analysis = {
             "revenue": total_revenue,
             "cost": total_cost,
@@ -349,28 +297,16 @@ async def efficiency_analysis(
             if period_type == PeriodType.MONTHLY:
                 start_date = today.replace(day=1)
                 end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            else:
+                start_date = today.replace(day=1)
+                end_date = today
 
-        # 查询投入（investment）
-        investment_query = db.query(FinancialData).filter(
-            and_(
-                FinancialData.date >= start_date,
-                FinancialData.date <= end_date,
-                FinancialData.category == "investment",
-            )
-        )
-        investment_data = investment_query.all()
-        total_investment = sum(float(item.amount) for item in investment_data)
-
-        # 查询产出（revenue）
-        output_query = db.query(FinancialData).filter(
-            and_(
-                FinancialData.date >= start_date,
-                FinancialData.date <= end_date,
-                FinancialData.category == "revenue",
-            )
-        )
-        output_data = output_query.all()
-        total_output = sum(float(item.amount) for item in output_data)
+        # 投入（investment）与产出（revenue）按子类别在数据库中聚合
+        grouped = _sum_by_subcategory(db, start_date, end_date, ["investment", "revenue"])
+        investment_rows = grouped.get("investment", {})
+        output_rows = grouped.get("revenue", {})
+        total_investment = sum(investment_rows.values())
+        total_output = sum(output_rows.values())
 
         # 计算投入产出比
         input_output_ratio = total_output / total_investment if total_investment > 0 else 0
@@ -385,8 +321,8 @@ async def efficiency_analysis(
 
         # 详细分析
         analysis = {
-            "investment_breakdown": _get_investment_breakdown(investment_data),
-            "output_breakdown": _get_output_breakdown(output_data),
+            "investment_breakdown": _get_subcategory_breakdown(investment_rows),
+            "output_breakdown": _get_subcategory_breakdown(output_rows),
             "trend_analysis": "待实现",  # 趋势分析
         }
 
@@ -405,58 +341,67 @@ async def efficiency_analysis(
 
 # ============ 辅助函数 ============
 
-def _get_daily_revenue(orders: List[Order], start_date: date, end_date: date) -> List[Dict[str, Any]]:
-    """获取每日营收数据"""
-    daily = {}
+def _sum_by_subcategory(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    categories: List[str],
+) -> Dict[str, Dict[Optional[str], float]]:
+    """按 类别→子类别 汇总财务金额（SQL GROUP BY）"""
+    rows = (
+        db.query(FinancialData.category, FinancialData.subcategory, func.sum(FinancialData.amount))
+        .filter(
+            and_(
+                FinancialData.category.in_(categories),
+                FinancialData.date >= start_date,
+                FinancialData.date <= end_date,
+            )
+        )
+        .group_by(FinancialData.category, FinancialData.subcategory)
+        .all()
+    )
+    grouped: Dict[str, Dict[Optional[str], float]] = {}
+    for category, subcategory, amount in rows:
+        grouped.setdefault(category, {})[subcategory] = float(amount or 0)
+    return grouped
+
+
+def _get_daily_revenue(daily: Dict[date, float], start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """获取每日营收数据（区间内无订单的日期补0）"""
+    result = []
     current = start_date
     while current <= end_date:
-        daily[current.isoformat()] = 0.0
+        result.append({"date": current.isoformat(), "revenue": daily.get(current, 0.0)})
         current += timedelta(days=1)
+    return result
 
-    for order in orders:
-        day_key = order.order_date.isoformat()
-        if day_key in daily:
-            daily[day_key] += float(order.total_amount)
-
-    return [{"date": k, "revenue": v} for k, v in sorted(daily.items())]
 
-
-def _get_weekly_revenue(orders: List[Order], start_date: date, end_date: date) -> List[Dict[str, Any]]:
+def _get_weekly_revenue(daily: Dict[date, float]) -> List[Dict[str, Any]]:
     """获取每周营收数据"""
     weekly = {}
-    for order in orders:
-        week_start = order.order_date - timedelta(days=order.order_date.weekday())
-        week_key = week_start.isoformat()
-        weekly[week_key] = weekly.get(week_key, 0.0) + float(order.total_amount)
+    for day, amount in daily.items():
+        week_key = (day - timedelta(days=day.weekday())).isoformat()
+        weekly[week_key] = weekly.get(week_key, 0.0) + amount
 
     return [{"week": k, "revenue": v} for k, v in sorted(weekly.items())]
 
 
-def _get_monthly_revenue(orders: List[Order], start_date: date, end_date: date) -> List[Dict[str, Any]]:
+def _get_monthly_revenue(daily: Dict[date, float]) -> List[Dict[str, Any]]:
     """获取每月营收数据"""
     monthly = {}
-    for order in orders:
-        month_key = order.order_date.replace(day=1).isoformat()
-        monthly[month_key] = monthly.get(month_key, 0.0) + float(order.total_amount)
+    for day, amount in daily.items():
+        month_key = day.replace(day=1).isoformat()
+        monthly[month_key] = monthly.get(month_key, 0.0) + amount
 
     return [{"month": k, "revenue": v} for k, v in sorted(monthly.items())]
 
 
-def _get_investment_breakdown(investment_data: List[FinancialData]) -> Dict[str, float]:
-    """获取投入明细"""
-    breakdown = {}
-    for item in investment_data:
-        subcat = item.subcategory or "其他"
-        breakdown[subcat] = breakdown.get(subcat, 0.0) + float(item.amount)
-    return breakdown
-
-
-def _get_output_breakdown(output_data: List[FinancialData]) -> Dict[str, float]:
-    """获取产出明细"""
+def _get_subcategory_breakdown(rows: Dict[Optional[str], float]) -> Dict[str, float]:
+    """获取子类别明细"""
     breakdown = {}
-    for item in output_data:
-        subcat = item.subcategory or "其他"
-        breakdown[subcat] = breakdown.get(subcat, 0.0) + float(item.amount)
+    for subcat, amount in rows.items():
+        key = subcat or "其他"
+        breakdown[key] = breakdown.get(key, 0.0) + amount
     return breakdown
 
 
@@ -676,23 +621,26 @@ async def predict_long_term_impact(
 async def get_erp_data_for_analysis():
     """获取ERP数据用于8维度分析"""
     try:
-        # 从数据库获取ERP数据
-        from core.database import get_db
-        from core.database_models import Order, Customer, FinancialData
-        from sqlalchemy import func
-        
+        # 从数据库获取ERP数据（只取聚合结果，不加载整表）
         db = next(get_db())
-        
-        # 获取订单数据
-        orders = db.query(Order).all()
-        total_orders = len(orders)
-        on_time_orders = len([o for o in orders if o.status == "completed"])
-        on_time_delivery_rate = (on_time_orders / total_orders * 100) if total_orders > 0 else 90.0
-        
-        # 获取财务数据
-        financial_data = db.query(FinancialData).all()
-        total_revenue = sum([f.amount for f in financial_data if f.category == "revenue"])
-        total_expense = sum([f.amount for f in financial_data if f.category == "expense"])
+        try:
+            total_orders, on_time_orders = db.query(
+                func.count(Order.id),
+                func.coalesce(func.sum(case((Order.status == "completed", 1), else_=0)), 0),
+            ).one()
+            on_time_orders = int(on_time_orders)
+            on_time_delivery_rate = (on_time_orders / total_orders * 100) if total_orders > 0 else 90.0
+
+            amounts = dict(
+                db.query(FinancialData.category, func.sum(FinancialData.amount))
+                .filter(FinancialData.category.in_(["revenue", "expense"]))
+                .group_by(FinancialData.category)
+                .all()
+            )
+        finally:
+            db.close()
+        total_revenue = float(amounts.get("revenue") or 0)
+        total_expense = float(amounts.get("expense") or 0)
         gross_profit_rate = ((total_revenue - total_expense) / total_revenue * 100) if total_revenue > 0 else 25.0
         
         # 构建ERP数据字典
@@ -21,6 +21,10 @@ from core.database_models import (
     FinancialReport,
     FinancialCategory,
     PeriodType,
+    Order,
+    OrderItem,
+    ProductionExecution,
+    ProductionPlan,
 )
 from core.database import get_db
 from .data_listener_api import data_listener
@@ -486,5 +490,167 @@ async def delete_financial_data(
         raise HTTPException(status_code=500, detail=f"删除财务数据失败: {str(e)}")
 
 
+
+# ============ 批量序列数据（供运营财务分析一次请求拉取） ============
+#
+# 产品ID即数值型的产品编码（OrderItem.product_code），与试算模块的旧标识约定一致；
+# ids 为逗号分隔的ID列表，缺省表示全部；since 为 ISO 时间，缺省不限。
+
+def _parse_ids(ids: Optional[str]) -> Optional[List[int]]:
+    """解析逗号分隔的ID列表"""
+    if ids is None:
+        return None
+    try:
+        return [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的ID列表: {ids}")
+
+
+def _product_items(db: Session, product_ids: Optional[List[int]], since: Optional[datetime] = None):
+    """查询产品的订单明细行（按产品、日期排序），只保留数值型产品编码"""
+    query = db.query(
+        OrderItem.product_code,
+        OrderItem.product_name,
+        OrderItem.quantity,
+        OrderItem.unit_price,
+        OrderItem.total_price,
+        Order.order_date,
+    ).join(Order, Order.id == OrderItem.order_id)
+    if product_ids is not None:
+        query = query.filter(OrderItem.product_code.in_([str(i) for i in product_ids]))
+    if since is not None:
+        query = query.filter(Order.order_date >= since.date())
+    rows = query.order_by(OrderItem.product_code, Order.order_date, OrderItem.id).all()
+    return [row for row in rows if row.product_code and row.product_code.isdigit()]
+
+
+@router.get("/price-history")
+async def get_price_history(
+    ids: Optional[str] = Query(None, description="产品ID列表，逗号分隔"),
+    since: Optional[datetime] = Query(None, description="起始时间"),
+    db: Session = Depends(get_db),
+):
+    """
+    批量获取产品价格历史
+    
+    按产品、订单日期汇总订单明细：价格为当日成交均价（金额/数量），销量为当日成交数量。
+    
+    Returns:
+        {"records": [{"product_id", "date", "price", "sales"}]}
+    """
+    product_ids = _parse_ids(ids)
+    if product_ids == []:
+        return {"success": True, "records": []}
+    
+    daily: Dict[tuple, List[float]] = {}
+    for row in _product_items(db, product_ids, since):
+        totals = daily.setdefault((row.product_code, row.order_date), [0.0, 0.0])
+        totals[0] += float(row.total_price)
+        totals[1] += float(row.quantity)
+    
+    records = [
+        {
+            "product_id": int(code),
+            "date": order_date.isoformat(),
+            "price": round(amount / quantity, 4) if quantity else None,
+            "sales": quantity,
+        }
+        for (code, order_date), (amount, quantity) in daily.items()
+    ]
+    return {"success": True, "records": [r for r in records if r["price"] is not None]}
+
+
+@router.get("/products")
+async def get_products(
+    ids: Optional[str] = Query(None, description="产品ID列表，逗号分隔"),
+    db: Session = Depends(get_db),
+):
+    """
+    批量获取产品价格概况
+    
+    price 为最近一笔成交单价，avg_price 为历史平均单价，trend 比较两者（±2% 以内为平稳）。
+    
+    Returns:
+        {"products": [{"id", "name", "price", "avg_price", "trend"}]}
+    """
+    product_ids = _parse_ids(ids)
+    if product_ids == []:
+        return {"success": True, "products": []}
+    
+    grouped: Dict[str, List[Any]] = {}
+    for row in _product_items(db, product_ids):
+        grouped.setdefault(row.product_code, []).append(row)
+    
+    products = []
+    for code, rows in grouped.items():
+        latest = rows[-1]
+        price = float(latest.unit_price)
+        avg_price = sum(float(r.unit_price) for r in rows) / len(rows)
+        if price > avg_price * 1.02:
+            trend = "上升"
+        elif price < avg_price * 0.98:
+            trend = "下降"
+        else:
+            trend = "平稳"
+        products.append({
+            "id": int(code),
+            "name": latest.product_name,
+            "price": price,
+            "avg_price": round(avg_price, 4),
+            "trend": trend,
+        })
+    return {"success": True, "products": products}
+
+
+@router.get("/work-hours")
+async def get_work_hours(
+    ids: Optional[str] = Query(None, description="项目ID列表，逗号分隔"),
+    since: Optional[datetime] = Query(None, description="起始时间"),
+    db: Session = Depends(get_db),
+):
+    """
+    批量获取项目工时记录
+    
+    工时取已结束的生产执行记录（执行 → 生产计划 → 订单 → 项目），操作员作为员工标识。
+    
+    Returns:
+        {"records": [{"project_id", "date", "hours", "employee_id", "task_type"}]}
+    """
+    project_ids = _parse_ids(ids)
+    if project_ids == []:
+        return {"success": True, "records": []}
+    
+    query = db.query(
+        Order.project_id,
+        ProductionExecution.start_time,
+        ProductionExecution.end_time,
+        ProductionExecution.operator,
+    ).join(
+        ProductionPlan, ProductionPlan.id == ProductionExecution.production_plan_id
+    ).join(
+        Order, Order.id == ProductionPlan.order_id
+    ).filter(
+        Order.project_id.isnot(None),
+        ProductionExecution.start_time.isnot(None),
+        ProductionExecution.end_time.isnot(None),
+    )
+    if project_ids is not None:
+        query = query.filter(Order.project_id.in_(project_ids))
+    if since is not None:
+        query = query.filter(ProductionExecution.start_time >= since)
+    
+    records = [
+        {
+            "project_id": row.project_id,
+            "date": row.start_time.isoformat(),
+            "hours": round((row.end_time - row.start_time).total_seconds() / 3600, 4),
+            "employee_id": row.operator or "unknown",
+            "task_type": "生产",
+        }
+        for row in query.order_by(ProductionExecution.start_time).all()
+    ]
+    return {"success": True, "records": records}
+
+
 # get_db函数已从core.database导入
 
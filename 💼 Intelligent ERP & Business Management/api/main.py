@@ -37,6 +37,7 @@ from erp_listener import get_erp_listener
 # 导入数据库
 from core.database import init_db, engine
 from core.database_models import Base
+from core.analytics_rollup import ensure_indexes, get_rollup_refresher
 
 
 @asynccontextmanager
@@ -45,7 +46,11 @@ async def lifespan(app: FastAPI):
     # 启动时初始化数据库
     print("🚀 正在初始化数据库...")
     Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
     print("✅ 数据库初始化完成")
+
+    # 经营分析汇总表后台刷新
+    get_rollup_refresher().start()
     
     # 启动ERP数据监听系统
     print("🔔 正在启动ERP数据监听系统...")
@@ -61,6 +66,7 @@ async def lifespan(app: FastAPI):
     yield
     
     # 关闭时的清理工作
+    await get_rollup_refresher().stop()
     print("🔔 正在停止ERP监听器...")
     erp_listener = get_erp_listener()
     await erp_listener.stop()
@@ -0,0 +1,548 @@
+"""
+Analytics Rollups
+经营分析汇总表维护与查询
+
+- 订单营收/产品销售按 日、月 × 客户（× 产品）预聚合
+- 写路径：订单/明细的新增、修改、删除在同一事务内把受影响日期写入待重算表
+- 后台任务（RollupRefresher）定期重算待重算日期，读接口不再触发刷新
+- 绕过 ORM 的写入由带回看窗口的水位兜底（水位取数据中的最大时间戳，而非当前时间）
+- 汇总行按唯一键 upsert，多个刷新并发执行也不会冲突
+- 看板查询读取汇总表：整月走月汇总，首尾不足一月的部分走日汇总
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, or_, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from core.database_models import (
+    AnalyticsRollupDirtyDate,
+    AnalyticsRollupState,
+    Customer,
+    FinancialData,
+    Order,
+    OrderItem,
+    OrderRevenueRollup,
+    ProductSalesRollup,
+)
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "sales"
+DAILY = "daily"
+MONTHLY = "monthly"
+
+# 水位回看窗口：覆盖提交晚于水位、但时间戳早于水位的事务
+WATERMARK_LAG = timedelta(minutes=5)
+
+REVENUE_KEY = ("period_type", "period_start", "customer_id")
+REVENUE_VALUES = ("order_count", "completed_count", "total_amount", "max_order_amount", "min_order_amount")
+PRODUCT_KEY = ("period_type", "period_start", "customer_id", "product_key")
+PRODUCT_VALUES = ("product_name", "line_count", "total_quantity", "total_amount")
+
+
+# ============ 写路径：记录待重算日期 ============
+
+def _dialect_insert(bind):
+    """返回支持 ON CONFLICT 的 insert 构造器，不支持的方言返回 None"""
+    name = (bind.get_bind() if isinstance(bind, Session) else bind).dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def _upsert(bind, model, key: Sequence[str], values: Sequence[str], rows: List[Dict[str, Any]]) -> None:
+    """按唯一键写入或覆盖"""
+    if not rows:
+        return
+    dialect_insert = _dialect_insert(bind)
+    if dialect_insert is None:
+        table = model.__table__
+        for row in rows:
+            bind.execute(delete(table).where(*(table.c[k] == row[k] for k in key)))
+        bind.execute(insert(table), rows)
+        return
+    stmt = dialect_insert(model.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={name: stmt.excluded[name] for name in values},
+    )
+    bind.execute(stmt, rows)
+
+
+def mark_dirty(bind, dates: Iterable[date], now: Optional[datetime] = None) -> None:
+    """
+    标记需要重算的日期（如批量导入绕过ORM时）
+
+    Args:
+        bind: Session 或 Connection；记录随其所在事务一起提交
+        dates: 受影响的下单日期
+    """
+    now = now or datetime.utcnow()
+    rows = [{"day": d, "marked_at": now} for d in sorted({d for d in dates if d})]
+    _upsert(bind, AnalyticsRollupDirtyDate, ("day",), ("marked_at",), rows)
+
+
+def _item_order_date(connection: Connection, item: OrderItem) -> Optional[date]:
+    loaded_order = inspect(item).attrs.order.loaded_value
+    if isinstance(loaded_order, Order):
+        return loaded_order.order_date
+    if item.order_id is None:
+        return None
+    return connection.scalar(select(Order.order_date).where(Order.id == item.order_id))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_order_changes(session, flush_context):
+    """订单与明细的增删改都会把所在日期写入待重算表（与业务数据同一事务）"""
+    relevant = [
+        obj for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, (Order, OrderItem))
+    ]
+    if not relevant:
+        return
+    connection = session.connection()
+    dates = set()
+    for obj in relevant:
+        if isinstance(obj, Order):
+            dates.add(obj.order_date)
+            dates.update(inspect(obj).attrs.order_date.history.deleted or ())
+        else:
+            dates.add(_item_order_date(connection, obj))
+            for old_order_id in inspect(obj).attrs.order_id.history.deleted or ():
+                if old_order_id is not None:
+                    dates.add(connection.scalar(select(Order.order_date).where(Order.id == old_order_id)))
+    mark_dirty(connection, dates)
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """为已存在的表补建新增索引（create_all 不会修改已有表）"""
+    for table in (Order.__table__, OrderItem.__table__, FinancialData.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _chunks(values: List[Any], size: int = 500):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# ============ 刷新 ============
+
+def _replace_rows(
+    db: Session,
+    model,
+    key: Sequence[str],
+    values: Sequence[str],
+    period_filter,
+    rows: List[Dict[str, Any]],
+    now: datetime,
+) -> None:
+    """upsert 当前结果，再删除本次未覆盖到的旧行（如已删除订单对应的客户/产品）"""
+    for row in rows:
+        row["refreshed_at"] = now
+    _upsert(db, model, key, (*values, "refreshed_at"), rows)
+    db.execute(delete(model).where(period_filter, model.refreshed_at < now))
+
+
+def _refresh_daily(db: Session, days: List[date], now: datetime) -> None:
+    product_key = func.coalesce(OrderItem.product_code, OrderItem.product_name)
+    for chunk in _chunks(days):
+        revenue = db.execute(
+            select(
+                Order.order_date,
+                Order.customer_id,
+                func.count(Order.id),
+                func.sum(case((Order.status == "completed", 1), else_=0)),
+                func.sum(Order.total_amount),
+                func.max(Order.total_amount),
+                func.min(Order.total_amount),
+            )
+            .where(Order.order_date.in_(chunk))
+            .group_by(Order.order_date, Order.customer_id)
+        )
+        _replace_rows(
+            db, OrderRevenueRollup, REVENUE_KEY, REVENUE_VALUES,
+            and_(OrderRevenueRollup.period_type == DAILY, OrderRevenueRollup.period_start.in_(chunk)),
+            [dict(zip(("period_start", "customer_id", *REVENUE_VALUES), row), period_type=DAILY) for row in revenue],
+            now,
+        )
+
+        products = db.execute(
+            select(
+                Order.order_date,
+                Order.customer_id,
+                product_key,
+                func.max(OrderItem.product_name),
+                func.count(OrderItem.id),
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.total_price),
+            )
+            .join(Order, OrderItem.order_id == Order.id)
+            .where(Order.order_date.in_(chunk))
+            .group_by(Order.order_date, Order.customer_id, product_key)
+        )
+        _replace_rows(
+            db, ProductSalesRollup, PRODUCT_KEY, PRODUCT_VALUES,
+            and_(ProductSalesRollup.period_type == DAILY, ProductSalesRollup.period_start.in_(chunk)),
+            [
+                dict(zip(("period_start", "customer_id", "product_key", *PRODUCT_VALUES), row), period_type=DAILY)
+                for row in products
+            ],
+            now,
+        )
+
+
+def _refresh_monthly(db: Session, months: List[date], now: datetime) -> None:
+    """月汇总由日汇总再聚合，无需再扫描订单事实表"""
+    r = OrderRevenueRollup
+    p = ProductSalesRollup
+    for month in months:
+        month_end = _next_month(month) - timedelta(days=1)
+        revenue = db.execute(
+            select(
+                r.customer_id,
+                func.sum(r.order_count),
+                func.sum(r.completed_count),
+                func.sum(r.total_amount),
+                func.max(r.max_order_amount),
+                func.min(r.min_order_amount),
+            )
+            .where(r.period_type == DAILY, r.period_start.between(month, month_end))
+            .group_by(r.customer_id)
+        )
+        _replace_rows(
+            db, r, REVENUE_KEY, REVENUE_VALUES,
+            and_(r.period_type == MONTHLY, r.period_start == month),
+            [
+                dict(zip(("customer_id", *REVENUE_VALUES), row), period_type=MONTHLY, period_start=month)
+                for row in revenue
+            ],
+            now,
+        )
+
+        products = db.execute(
+            select(
+                p.customer_id,
+                p.product_key,
+                func.max(p.product_name),
+                func.sum(p.line_count),
+                func.sum(p.total_quantity),
+                func.sum(p.total_amount),
+            )
+            .where(p.period_type == DAILY, p.period_start.between(month, month_end))
+            .group_by(p.customer_id, p.product_key)
+        )
+        _replace_rows(
+            db, p, PRODUCT_KEY, PRODUCT_VALUES,
+            and_(p.period_type == MONTHLY, p.period_start == month),
+            [
+                dict(zip(("customer_id", "product_key", *PRODUCT_VALUES), row), period_type=MONTHLY, period_start=month)
+                for row in products
+            ],
+            now,
+        )
+
+
+def refresh_dates(db: Session, days: Iterable[date], now: Optional[datetime] = None) -> int:
+    """重算指定日期（及所在月份）的汇总，返回重算天数；重复执行结果不变"""
+    now = now or datetime.utcnow()
+    days = sorted({d for d in days if d})
+    if not days:
+        return 0
+    _refresh_daily(db, days, now)
+    _refresh_monthly(db, sorted({_month_start(d) for d in days}), now)
+    return len(days)
+
+
+def _latest_change(db: Session) -> Optional[datetime]:
+    """数据中最新的变更时间（作为下一次水位）"""
+    candidates = db.execute(
+        select(func.max(Order.updated_at), func.max(Order.created_at))
+    ).one()
+    item_latest = db.scalar(select(func.max(OrderItem.created_at)))
+    values = [v for v in (*candidates, item_latest) if v is not None]
+    return max(values) if values else None
+
+
+def sync_rollups(db: Session) -> Dict[str, Any]:
+    """
+    增量同步汇总表（由后台任务调用）
+
+    首次运行时全量构建；之后重算待重算表中的日期，
+    以及水位回看窗口内新增/修改的订单所在日期。
+    """
+    started = datetime.utcnow()
+    d = AnalyticsRollupDirtyDate
+    state = db.get(AnalyticsRollupState, ROLLUP_NAME)
+
+    try:
+        if state is None or state.watermark is None:
+            affected = set(db.scalars(select(Order.order_date).distinct()))
+        else:
+            since = state.watermark - WATERMARK_LAG
+            affected = set(db.scalars(
+                select(Order.order_date).where(
+                    or_(Order.updated_at >= since, Order.created_at >= since)
+                ).distinct()
+            ))
+            affected.update(db.scalars(
+                select(Order.order_date)
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .where(OrderItem.created_at >= since)
+                .distinct()
+            ))
+        dirty = list(db.scalars(select(d.day).where(d.marked_at <= started)))
+        affected.update(dirty)
+
+        refreshed = refresh_dates(db, affected, started)
+        for chunk in _chunks(dirty):
+            # 刷新期间再次被标记的日期（marked_at 更新）保留到下一轮
+            db.execute(delete(d).where(d.day.in_(chunk), d.marked_at <= started))
+
+        latest = _latest_change(db)
+        if state is None:
+            state = AnalyticsRollupState(name=ROLLUP_NAME)
+            db.add(state)
+        if latest is not None and (state.watermark is None or latest > state.watermark):
+            state.watermark = latest
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "refreshed_days": refreshed,
+        "watermark": state.watermark.isoformat() if state.watermark else None,
+    }
+
+
+def rebuild_rollups(db: Session) -> Dict[str, Any]:
+    """全量重建汇总表"""
+    db.execute(delete(OrderRevenueRollup))
+    db.execute(delete(ProductSalesRollup))
+    state = db.get(AnalyticsRollupState, ROLLUP_NAME)
+    if state is not None:
+        state.watermark = None
+    db.flush()
+    return sync_rollups(db)
+
+
+class RollupRefresher:
+    """
+    汇总表后台刷新任务
+
+    进程内只有一个刷新在执行；刷新本身在线程中运行，不阻塞事件循环。
+    多进程部署时各进程的刷新通过 upsert 保持幂等。
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None, interval: Optional[float] = None):
+        self._session_factory = session_factory
+        self.interval = interval if interval is not None else float(os.getenv("ERP_ROLLUP_REFRESH_INTERVAL", "30"))
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def refresh_now(self) -> Optional[Dict[str, Any]]:
+        """立即刷新一次；已有刷新在执行时直接返回 None"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            db = self._new_session()
+            try:
+                self.last_result = sync_rollups(db)
+                self.last_error = None
+                return self.last_result
+            finally:
+                db.close()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"汇总表刷新失败: {e}")
+            raise
+        finally:
+            self._lock.release()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh_now)
+            except Exception:
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+_rollup_refresher: Optional[RollupRefresher] = None
+
+
+def get_rollup_refresher() -> RollupRefresher:
+    global _rollup_refresher
+    if _rollup_refresher is None:
+        _rollup_refresher = RollupRefresher()
+    return _rollup_refresher
+
+
+# ============ 查询 ============
+
+def _split_range(start: date, end: date) -> Tuple[List[Tuple[date, date]], Optional[Tuple[date, date]]]:
+    """把区间拆成 [首尾不完整月份的日区间] + [完整月份区间]"""
+    first_full = start if start.day == 1 else _next_month(start)
+    if _next_month(end) - timedelta(days=1) == end:
+        last_full = _month_start(end)
+    else:
+        last_full = _month_start(_month_start(end) - timedelta(days=1))
+    if first_full > last_full:
+        return [(start, end)], None
+
+    daily_ranges = []
+    if start < first_full:
+        daily_ranges.append((start, first_full - timedelta(days=1)))
+    after_full = _next_month(last_full)
+    if after_full <= end:
+        daily_ranges.append((after_full, end))
+    return daily_ranges, (first_full, last_full)
+
+
+def _period_condition(model, start: date, end: date):
+    daily_ranges, monthly_range = _split_range(start, end)
+    conditions = [
+        and_(model.period_type == DAILY, model.period_start.between(s, e))
+        for s, e in daily_ranges
+    ]
+    if monthly_range:
+        conditions.append(and_(model.period_type == MONTHLY, model.period_start.between(*monthly_range)))
+    return or_(*conditions)
+
+
+def _with_category(query, model, customer_category: Optional[str]):
+    if customer_category:
+        query = query.join(Customer, Customer.id == model.customer_id).where(Customer.category == customer_category)
+    return query
+
+
+def revenue_totals(db: Session, start: date, end: date, customer_category: Optional[str] = None) -> Dict[str, float]:
+    r = OrderRevenueRollup
+    query = select(
+        func.coalesce(func.sum(r.order_count), 0),
+        func.coalesce(func.sum(r.completed_count), 0),
+        func.coalesce(func.sum(r.total_amount), 0),
+        func.max(r.max_order_amount),
+        func.min(r.min_order_amount),
+    ).where(_period_condition(r, start, end))
+    row = db.execute(_with_category(query, r, customer_category)).one()
+    return {
+        "order_count": int(row[0]),
+        "completed_count": int(row[1]),
+        "total_amount": float(row[2]),
+        "max_order_amount": float(row[3] or 0),
+        "min_order_amount": float(row[4] or 0),
+    }
+
+
+def revenue_by_customer_category(
+    db: Session, start: date, end: date, customer_category: Optional[str] = None
+) -> Dict[str, float]:
+    r = OrderRevenueRollup
+    query = (
+        select(Customer.category, func.sum(r.total_amount))
+        .join(Customer, Customer.id == r.customer_id)
+        .where(_period_condition(r, start, end), Customer.category.isnot(None))
+        .group_by(Customer.category)
+    )
+    if customer_category:
+        query = query.where(Customer.category == customer_category)
+    return {category: float(amount) for category, amount in db.execute(query)}
+
+
+def product_summary(
+    db: Session, start: date, end: date, customer_category: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    p = ProductSalesRollup
+    query = (
+        select(
+            p.product_key,
+            func.max(p.product_name),
+            func.sum(p.total_quantity),
+            func.sum(p.total_amount),
+            func.sum(p.line_count),
+        )
+        .where(_period_condition(p, start, end))
+        .group_by(p.product_key)
+    )
+    rows = db.execute(_with_category(query, p, customer_category))
+    return [
+        {
+            "product_code": key,
+            "product_name": name,
+            "total_quantity": float(quantity or 0),
+            "total_amount": float(amount or 0),
+            "order_count": int(lines or 0),
+        }
+        for key, name, quantity, amount, lines in rows
+    ]
+
+
+def daily_revenue(
+    db: Session, start: date, end: date, customer_category: Optional[str] = None
+) -> Dict[date, float]:
+    r = OrderRevenueRollup
+    query = (
+        select(r.period_start, func.sum(r.total_amount))
+        .where(r.period_type == DAILY, r.period_start.between(start, end))
+        .group_by(r.period_start)
+    )
+    rows = db.execute(_with_category(query, r, customer_category))
+    return {day: float(amount) for day, amount in rows}
+
+
+__all__ = [
+    "mark_dirty",
+    "ensure_indexes",
+    "refresh_dates",
+    "sync_rollups",
+    "rebuild_rollups",
+    "RollupRefresher",
+    "get_rollup_refresher",
+    "revenue_totals",
+    "revenue_by_customer_category",
+    "product_summary",
+    "daily_revenue",
+]
@@ -29,6 +29,7 @@ from sqlalchemy import (
     ForeignKey,
     JSON,
     Index,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -94,6 +95,7 @@ class FinancialData(Base):
     __table_args__ = (
         Index('idx_financial_date_category', 'date', 'category'),
         Index('idx_financial_period', 'period_type', 'date'),
+        Index('idx_financial_category_date_sub', 'category', 'date', 'subcategory'),
     )
 
 
@@ -216,6 +218,11 @@ class Order(Base):
     project = relationship("Project", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
 
+    __table_args__ = (
+        Index('idx_orders_date_customer', 'order_date', 'customer_id'),
+        Index('idx_orders_updated_at', 'updated_at'),
+    )
+
 
 class OrderItem(Base):
     """订单明细表"""
@@ -235,6 +242,7 @@ class OrderItem(Base):
 
     __table_args__ = (
         Index('idx_order_items_order', 'order_id'),
+        Index('idx_order_items_created_at', 'created_at'),
     )
 
 
@@ -635,3 +643,63 @@ class ReturnRecord(Base):
         Index('idx_returns_status_date', 'return_status', 'requested_date'),
     )
 
+
+# ============ 经营分析汇总表（增量维护） ============
+
+class OrderRevenueRollup(Base):
+    """订单营收汇总表（按周期+客户）"""
+    __tablename__ = "order_revenue_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period_type = Column(String(20), nullable=False)  # daily, monthly
+    period_start = Column(Date, nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    order_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    max_order_amount = Column(Numeric(15, 2))
+    min_order_amount = Column(Numeric(15, 2))
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('period_type', 'period_start', 'customer_id', name='uq_revenue_rollup_key'),
+        Index('idx_revenue_rollup_period', 'period_type', 'period_start'),
+    )
+
+
+class ProductSalesRollup(Base):
+    """产品销售汇总表（按周期+客户+产品）"""
+    __tablename__ = "product_sales_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period_type = Column(String(20), nullable=False)  # daily, monthly
+    period_start = Column(Date, nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    product_key = Column(String(200), nullable=False)  # product_code，缺失时为product_name
+    product_name = Column(String(200))
+    line_count = Column(Integer, nullable=False, default=0)
+    total_quantity = Column(Numeric(18, 2), nullable=False, default=0)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('period_type', 'period_start', 'customer_id', 'product_key', name='uq_product_rollup_key'),
+        Index('idx_product_rollup_period', 'period_type', 'period_start'),
+    )
+
+
+class AnalyticsRollupState(Base):
+    """汇总表维护水位"""
+    __tablename__ = "analytics_rollup_state"
+
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AnalyticsRollupDirtyDate(Base):
+    """待重算的汇总日期（与订单写入同一事务记录）"""
+    __tablename__ = "analytics_rollup_dirty_dates"
+
+    day = Column(Date, primary_key=True)
+    marked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -19,6 +19,8 @@ import hmac
 import json
 from urllib.parse import urlparse, parse_qs
 
+logger = logging.getLogger(__name__)
+
 # 导入ERP核心模块
 from core.data_listener import ERPDataListener, EventType, ERPEvent
 from core.listener_container import data_listener
@@ -31,8 +33,6 @@ except ImportError:
     TASK_PLANNING_AVAILABLE = False
     logger.warning("TaskPlanning模块不可用，将使用内置任务队列")
 
-logger = logging.getLogger(__name__)
-
 
 class ListenerMode(str, Enum):
     """监听模式"""
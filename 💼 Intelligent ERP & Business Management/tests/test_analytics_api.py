@@ -6,18 +6,22 @@ Test Analytics API
 """
 
 import pytest
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, select
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 import sys
 from pathlib import Path
 erp_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(erp_dir))
 
+from core import analytics_rollup
 from core.database_models import (
+    AnalyticsRollupDirtyDate,
+    AnalyticsRollupState,
     Base,
     Customer,
     Order,
@@ -25,6 +29,7 @@ from core.database_models import (
     FinancialData,
     PeriodType,
     FinancialCategory,
+    ProductSalesRollup,
 )
 from core.database import get_db
 from api.analytics_api import router
@@ -35,7 +40,13 @@ app = FastAPI()
 app.include_router(router)
 
 # 创建测试数据库
-test_engine = create_engine("sqlite:///:memory:", echo=False)
+# StaticPool：接口在线程池中执行，需要与测试共享同一个内存库连接
+test_engine = create_engine(
+    "sqlite:///:memory:",
+    echo=False,
+    poolclass=StaticPool,
+    connect_args={"check_same_thread": False},
+)
 Base.metadata.create_all(test_engine)
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
@@ -53,6 +64,11 @@ app.dependency_overrides[get_db] = override_get_db
 client = TestClient(app)
 
 
+def refresh_rollups():
+    """模拟后台刷新任务执行一轮"""
+    return analytics_rollup.RollupRefresher(TestSessionLocal).refresh_now()
+
+
 @pytest.fixture(autouse=True)
 def setup_database():
     """每个测试前设置数据库"""
@@ -104,6 +120,7 @@ def test_revenue_analysis():
     db.add(item1)
     db.commit()
     db.close()
+    refresh_rollups()
     
     # 测试开源分析
     response = client.get("/analytics/revenue?period_type=daily")
@@ -198,6 +215,166 @@ def test_efficiency_analysis():
     assert result["efficiency_metrics"]["roi"] == 50.0  # (150000-100000)/100000 * 100
 
 
+def test_revenue_rollups_refresh_incrementally():
+    """测试汇总表增量刷新（跨月区间、删除订单）"""
+    db = next(override_get_db())
+    customer = Customer(name="客户C", code="CUST003", category="A类")
+    db.add(customer)
+    db.flush()
+    for i in range(60):
+        order = Order(
+            order_number=f"ROLL{i:03d}",
+            customer_id=customer.id,
+            order_date=date(2024, 1, 1) + timedelta(days=i),
+            total_amount=Decimal("100.00"),
+        )
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(
+            order_id=order.id,
+            product_name="产品R",
+            product_code="PRODR",
+            quantity=Decimal("2.00"),
+            unit_price=Decimal("50.00"),
+            total_price=Decimal("100.00"),
+        ))
+    db.commit()
+    refresh_rollups()
+
+    url = "/analytics/revenue?start_date=2024-01-20&end_date=2024-02-29"
+    result = client.get(url).json()
+    assert result["order_stats"]["total_orders"] == 41
+    assert result["total_revenue"] == 4100.0
+    assert result["order_detail_summary"][0]["total_quantity"] == 82.0
+
+    order = db.query(Order).filter(Order.order_number == "ROLL040").one()
+    for item in order.items:
+        db.delete(item)
+    db.delete(order)
+    db.commit()
+    db.close()
+    refresh_rollups()
+
+    result = client.get(url).json()
+    assert result["order_stats"]["total_orders"] == 40
+    assert result["total_revenue"] == 4000.0
+
+
+
+def _seed_order(db, number="ORD-X", order_date=date(2024, 3, 5), amount="100.00"):
+    customer = db.query(Customer).filter(Customer.code == "CUST-X").one_or_none()
+    if customer is None:
+        customer = Customer(name="客户X", code="CUST-X", category="A类")
+        db.add(customer)
+        db.flush()
+    order = Order(
+        order_number=number,
+        customer_id=customer.id,
+        order_date=order_date,
+        total_amount=Decimal(amount),
+    )
+    db.add(order)
+    db.flush()
+    item = OrderItem(
+        order_id=order.id,
+        product_name="产品X",
+        product_code="PRODX",
+        quantity=Decimal("1.00"),
+        unit_price=Decimal(amount),
+        total_price=Decimal(amount),
+    )
+    db.add(item)
+    db.commit()
+    return order, item
+
+
+def test_revenue_read_does_not_refresh_rollups():
+    """读接口只读汇总表，写入后的日期记录在待重算表中"""
+    db = TestSessionLocal()
+    _seed_order(db)
+    assert db.scalars(select(AnalyticsRollupDirtyDate.day)).all() == [date(2024, 3, 5)]
+    db.close()
+
+    url = "/analytics/revenue?start_date=2024-03-01&end_date=2024-03-31"
+    assert client.get(url).json()["order_stats"]["total_orders"] == 0
+
+    refresh_rollups()
+    assert client.get(url).json()["order_stats"]["total_orders"] == 1
+    db = TestSessionLocal()
+    assert db.scalars(select(AnalyticsRollupDirtyDate.day)).all() == []
+    db.close()
+
+
+def test_rolled_back_writes_are_not_marked_dirty():
+    """待重算日期随业务事务一起回滚"""
+    db = TestSessionLocal()
+    customer = Customer(name="客户Y", code="CUST-Y")
+    db.add(customer)
+    db.flush()
+    db.add(Order(order_number="ORD-Y", customer_id=customer.id, order_date=date(2024, 4, 1),
+                 total_amount=Decimal("1.00")))
+    db.flush()
+    db.rollback()
+    assert db.scalars(select(AnalyticsRollupDirtyDate.day)).all() == []
+    db.close()
+
+
+def test_order_item_update_refreshes_product_rollups():
+    """修改订单明细也会触发所在日期重算"""
+    db = TestSessionLocal()
+    order, item = _seed_order(db)
+    refresh_rollups()
+
+    item.quantity = Decimal("3.00")
+    db.commit()
+    refresh_rollups()
+
+    totals = db.scalars(
+        select(ProductSalesRollup.total_quantity).where(ProductSalesRollup.period_type == "daily")
+    ).all()
+    assert [float(q) for q in totals] == [3.0]
+    db.close()
+
+
+def test_late_committed_rows_within_lag_are_picked_up():
+    """时间戳早于水位、但在回看窗口内提交的行不会被漏掉"""
+    db = TestSessionLocal()
+    order, item = _seed_order(db)
+    refresh_rollups()
+    watermark = db.get(AnalyticsRollupState, analytics_rollup.ROLLUP_NAME).watermark
+    # 水位取数据中的最新时间戳，而不是刷新开始的时间
+    assert watermark == max(order.created_at, order.updated_at, item.created_at)
+
+    # 绕过 ORM 写入（不经过写路径钩子），时间戳落在水位之前
+    db.execute(insert(Order.__table__).values(
+        order_number="ORD-LATE",
+        customer_id=order.customer_id,
+        order_date=date(2024, 3, 6),
+        total_amount=Decimal("50.00"),
+        created_at=watermark - timedelta(minutes=1),
+        updated_at=watermark - timedelta(minutes=1),
+    ))
+    db.commit()
+    db.close()
+    refresh_rollups()
+
+    result = client.get("/analytics/revenue?start_date=2024-03-01&end_date=2024-03-31").json()
+    assert result["order_stats"]["total_orders"] == 2
+    assert result["total_revenue"] == 150.0
+
+
+def test_refresh_is_idempotent_over_existing_rows():
+    """重复刷新同一日期按唯一键覆盖，不产生唯一约束冲突"""
+    db = TestSessionLocal()
+    _seed_order(db)
+    for _ in range(3):
+        analytics_rollup.refresh_dates(db, [date(2024, 3, 5)], datetime.utcnow() + timedelta(seconds=1))
+        db.commit()
+    assert refresh_rollups()["refreshed_days"] == 1
+    assert len(db.scalars(select(ProductSalesRollup.id)).all()) == 2  # daily + monthly
+    db.close()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
@@ -0,0 +1,132 @@
+"""
+Test Finance Series API
+测试批量序列数据接口
+
+验证运营财务分析使用的价格历史、产品概况和工时接口
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+erp_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(erp_dir))
+
+from core.database_models import (
+    Base,
+    Customer,
+    Order,
+    OrderItem,
+    Project,
+    ProductionExecution,
+    ProductionPlan,
+)
+from core.database import get_db
+from api.finance_api import router
+
+test_engine = create_engine(
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+app = FastAPI()
+app.include_router(router)
+
+
+def override_get_db():
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def seed_database():
+    """两个数值编码产品、一个非数值编码产品，以及一个项目的两条生产执行记录"""
+    Base.metadata.create_all(bind=test_engine)
+    db = TestSessionLocal()
+    db.add(Customer(id=1, name="客户A", code="C001"))
+    db.add(Project(id=7, project_name="项目A", project_code="P007", customer_id=1))
+    orders = [
+        Order(id=1, order_number="SO1", customer_id=1, project_id=7, order_date=date(2026, 9, 1), total_amount=0),
+        Order(id=2, order_number="SO2", customer_id=1, order_date=date(2026, 9, 2), total_amount=0),
+        Order(id=3, order_number="SO3", customer_id=1, order_date=date(2026, 10, 1), total_amount=0),
+    ]
+    db.add_all(orders)
+    items = [
+        (1, "101", "产品101", 10, 100),
+        (1, "101", "产品101", 30, 120),
+        (2, "101", "产品101", 5, 130),
+        (3, "101", "产品101", 5, 140),
+        (1, "102", "产品102", 8, 50),
+        (3, "102", "产品102", 2, 45),
+        (1, "SKU-X", "产品X", 1, 999),
+    ]
+    db.add_all(
+        OrderItem(order_id=o, product_code=code, product_name=name, quantity=qty,
+                  unit_price=price, total_price=qty * price)
+        for o, code, name, qty, price in items
+    )
+    db.add(ProductionPlan(id=1, plan_number="PP1", order_id=1, plan_date=date(2026, 9, 1), quantity=10))
+    db.add_all([
+        ProductionExecution(execution_number="PE1", production_plan_id=1, operator="张三",
+                            start_time=datetime(2026, 9, 3, 8), end_time=datetime(2026, 9, 3, 12, 30)),
+        ProductionExecution(execution_number="PE2", production_plan_id=1, operator="李四",
+                            start_time=datetime(2026, 10, 3, 8), end_time=datetime(2026, 10, 3, 10)),
+        ProductionExecution(execution_number="PE3", production_plan_id=1, operator="王五",
+                            start_time=datetime(2026, 10, 4, 8)),
+    ])
+    db.commit()
+    db.close()
+    yield
+    Base.metadata.drop_all(bind=test_engine)
+
+
+def test_price_history_aggregates_daily_prices():
+    response = client.get("/finance/price-history", params={"ids": "101,102", "since": "2026-09-02T00:00:00"})
+    assert response.status_code == 200
+    records = sorted(response.json()["records"], key=lambda r: (r["product_id"], r["date"]))
+    assert records == [
+        {"product_id": 101, "date": "2026-09-02", "price": 130.0, "sales": 5.0},
+        {"product_id": 101, "date": "2026-10-01", "price": 140.0, "sales": 5.0},
+        {"product_id": 102, "date": "2026-10-01", "price": 45.0, "sales": 2.0},
+    ]
+
+    # 同日多笔按成交金额加权；不指定 ids 时只返回数值编码的产品
+    records = client.get("/finance/price-history").json()["records"]
+    assert {r["product_id"] for r in records} == {101, 102}
+    first = next(r for r in records if r["product_id"] == 101 and r["date"] == "2026-09-01")
+    assert first == {"product_id": 101, "date": "2026-09-01", "price": 115.0, "sales": 40.0}
+
+
+def test_products_summary_and_invalid_ids():
+    products = {p["id"]: p for p in client.get("/finance/products", params={"ids": "101,102,999"}).json()["products"]}
+    assert set(products) == {101, 102}
+    assert products[101] == {"id": 101, "name": "产品101", "price": 140.0, "avg_price": 122.5, "trend": "上升"}
+    assert products[102]["trend"] == "下降"
+
+    assert client.get("/finance/products", params={"ids": ""}).json()["products"] == []
+    assert client.get("/finance/products", params={"ids": "1,a"}).status_code == 400
+
+
+def test_work_hours_from_finished_executions():
+    records = client.get("/finance/work-hours", params={"ids": "7"}).json()["records"]
+    assert records == [
+        {"project_id": 7, "date": "2026-09-03T08:00:00", "hours": 4.5, "employee_id": "张三", "task_type": "生产"},
+        {"project_id": 7, "date": "2026-10-03T08:00:00", "hours": 2.0, "employee_id": "李四", "task_type": "生产"},
+    ]
+    since = client.get("/finance/work-hours", params={"ids": "7", "since": "2026-10-01T00:00:00"}).json()
+    assert [r["employee_id"] for r in since["records"]] == ["李四"]
+    assert client.get("/finance/work-hours", params={"ids": "8"}).json()["records"] == []
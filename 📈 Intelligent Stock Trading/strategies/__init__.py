@@ -0,0 +1,6 @@
+"""
+Stock Trading Strategies Module
+股票交易策略模块
+"""
+
+__version__ = "1.0.0"
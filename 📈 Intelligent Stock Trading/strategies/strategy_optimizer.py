@@ -5,10 +5,18 @@
 - 绩效评估
 - 自适应调整
 """
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
 import numpy as np
 
+from strategies.vectorized_backtest import (
+    IndicatorCache,
+    ParameterSweep,
+    metric_is_lower_better,
+    strategy_positions,
+    vectorized_backtest,
+)
+
 
 class StrategyOptimizer:
     """策略优化器"""
@@ -27,86 +35,39 @@ class StrategyOptimizer:
         strategy_name: str,
         strategy_params: Dict[str, Any],
         historical_data: List[Dict[str, Any]],
-        initial_capital: float = 1000000
+        initial_capital: float = 1000000,
+        cost_rate: float = 0.0003,
+        periods_per_year: int = 252
     ) -> Dict[str, Any]:
         """
-        策略回测
+        策略回测（向量化）
         
         Args:
-            strategy_name: 策略名称
+            strategy_name: 策略名称（moving_average/momentum/mean_reversion）
             strategy_params: 策略参数
-            historical_data: 历史数据
+            historical_data: 历史数据（每条含 date 与 close/price）
             initial_capital: 初始资金
+            cost_rate: 单边交易成本率
+            periods_per_year: 年化周期数
         
         Returns:
             回测结果
         """
         try:
-            # 简化的回测实现
-            capital = initial_capital
-            positions = {}
-            trades = []
-            
-            # 模拟交易
-            for i, data in enumerate(historical_data):
-                # 根据策略生成信号
-                signal = self._generate_strategy_signal(
-                    strategy_name,
-                    strategy_params,
-                    data,
-                    positions
-                )
-                
-                if signal:
-                    # 执行模拟交易
-                    if signal['action'] == 'buy' and capital >= signal['amount']:
-                        positions[signal['stock_code']] = {
-                            "quantity": signal['quantity'],
-                            "cost": signal['price'],
-                            "buy_date": data['date']
-                        }
-                        capital -= signal['amount']
-                        trades.append({**signal, "date": data['date']})
-                    
-                    elif signal['action'] == 'sell' and signal['stock_code'] in positions:
-                        position = positions[signal['stock_code']]
-                        sell_amount = position['quantity'] * signal['price']
-                        capital += sell_amount
-                        profit = sell_amount - (position['quantity'] * position['cost'])
-                        
-                        trades.append({
-                            **signal,
-                            "date": data['date'],
-                            "profit": profit
-                        })
-                        del positions[signal['stock_code']]
-            
-            # 计算最终市值
-            final_value = capital
-            for stock_code, position in positions.items():
-                final_price = historical_data[-1].get('prices', {}).get(stock_code, position['cost'])
-                final_value += position['quantity'] * final_price
-            
-            # 计算收益率
-            total_return = (final_value - initial_capital) / initial_capital * 100
-            
-            # 计算最大回撤
-            max_drawdown = self._calculate_max_drawdown(trades)
-            
-            # 计算夏普比率
-            sharpe_ratio = self._calculate_sharpe_ratio(trades)
+            dates, close = self._extract_prices(historical_data)
+            cache = IndicatorCache(close)
+            positions = strategy_positions(strategy_name, cache, strategy_params)
+            metrics = vectorized_backtest(
+                close, positions, initial_capital, cost_rate, periods_per_year
+            )
             
             return {
                 "success": True,
                 "strategy_name": strategy_name,
                 "backtest_result": {
                     "initial_capital": initial_capital,
-                    "final_value": final_value,
-                    "total_return": float(total_return),
-                    "total_trades": len(trades),
-                    "max_drawdown": float(max_drawdown),
-                    "sharpe_ratio": float(sharpe_ratio),
-                    "trades": trades
+                    **metrics,
+                    "trades": self._extract_trades(dates, close, positions)
                 }
             }
         
@@ -122,48 +83,54 @@ class StrategyOptimizer:
         self,
         strategy_name: str,
         param_ranges: Dict[str, tuple],
-        historical_data: List[Dict[str, Any]]
+        historical_data: List[Dict[str, Any]],
+        metric: str = "total_return",
+        max_combinations: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        early_stop_fraction: float = 1.0,
+        min_sharpe: float = float('-inf'),
+        periods_per_year: int = 252
     ) -> Dict[str, Any]:
         """
-        优化策略参数
+        优化策略参数（完整网格 + 并行扫描）
         
         Args:
             strategy_name: 策略名称
             param_ranges: 参数范围 {"param_name": (min, max, step)}
             historical_data: 历史数据
+            metric: 优选指标（total_return/sharpe_ratio 越大越好，max_drawdown/turnover 越小越好）
+            max_combinations: 组合数上限（默认不限）
+            max_workers: 并行进程数
+            early_stop_fraction: 前段筛选比例（<1 时启用提前淘汰）
+            min_sharpe: 前段筛选的最低夏普
+            periods_per_year: 年化周期数
         
         Returns:
             最优参数
         """
         try:
-            best_params = None
-            best_return = float('-inf')
-            best_result = None
+            _, close = self._extract_prices(historical_data)
+            sweep = ParameterSweep(
+                max_workers=max_workers,
+                early_stop_fraction=early_stop_fraction,
+                min_sharpe=min_sharpe
+            )
+            outcome = sweep.run(
+                strategy_name,
+                close,
+                param_ranges,
+                periods_per_year=periods_per_year,
+                metric=metric,
+                max_combinations=max_combinations
+            )
             
-            # 网格搜索（简化版）
-            test_count = 0
-            max_tests = 20  # 限制测试次数
-            
-            # 生成参数组合（示例：只测试几组）
-            param_combinations = self._generate_param_combinations(param_ranges, max_tests)
-            
-            for params in param_combinations:
-                # 回测
-                result = self.backtest_strategy(
-                    strategy_name,
-                    params,
-                    historical_data
-                )
-                
-                if result['success']:
-                    returns = result['backtest_result']['total_return']
-                    
-                    if returns > best_return:
-                        best_return = returns
-                        best_params = params
-                        best_result = result['backtest_result']
-                
-                test_count += 1
+            best = outcome["best"]
+            best_params = best["params"] if best else None
+            best_return = best["total_return"] if best else float('-inf')
+            if best:
+                best_value = float(best[metric])
+            else:
+                best_value = float('inf') if metric_is_lower_better(metric) else float('-inf')
             
             # 记录优化历史
             optimization_record = {
@@ -171,7 +138,10 @@ class StrategyOptimizer:
                 "param_ranges": param_ranges,
                 "best_params": best_params,
                 "best_return": float(best_return),
-                "tests_count": test_count,
+                "metric": metric,
+                "best_metric_value": best_value,
+                "tests_count": outcome["tested"],
+                "pruned_count": outcome["pruned"],
                 "optimized_at": datetime.utcnow().isoformat()
             }
             
@@ -180,8 +150,9 @@ class StrategyOptimizer:
             return {
                 "success": True,
                 "optimization": optimization_record,
-                "best_result": best_result,
-                "message": f"参数优化完成，最优收益率: {best_return:.2f}%"
+                "best_result": {k: v for k, v in best.items() if k != "params"} if best else None,
+                "top_results": outcome["results"][:10],
+                "message": f"参数优化完成，最优{metric}: {best_value:.4f}"
             }
         
         except Exception as e:
@@ -192,89 +163,43 @@ class StrategyOptimizer:
     
     # ============ 内部辅助方法 ============
     
-    def _generate_strategy_signal(
-        self,
-        strategy_name: str,
-        params: Dict[str, Any],
-        data: Dict[str, Any],
-        positions: Dict[str, Any]
-    ) -> Optional[Dict[str, Any]]:
-        """生成策略信号（简化实现）"""
-        # 这里是简化的策略逻辑示例
-        # 实际应该根据不同策略实现不同逻辑
-        
-        if strategy_name == "moving_average":
-            # 移动平均策略示例
-            ma_short = params.get('ma_short', 5)
-            ma_long = params.get('ma_long', 20)
-            
-            # 简化处理，实际应计算真实均线
-            if np.random.random() > 0.7:  # 模拟买入信号
-                return {
-                    "action": "buy",
-                    "stock_code": "600000",
-                    "price": data.get('price', 10.0),
-                    "quantity": 100,
-                    "amount": 1000
-                }
-        
-        return None
+    def _extract_prices(self, historical_data: List[Dict[str, Any]]) -> Tuple[List[Any], np.ndarray]:
+        """从历史数据提取日期与收盘价序列"""
+        dates = [row.get('date') for row in historical_data]
+        close = np.fromiter(
+            (row.get('close', row.get('price', np.nan)) for row in historical_data),
+            dtype=np.float64,
+            count=len(historical_data)
+        )
+        if np.isnan(close).any():
+            raise ValueError("历史数据缺少 close/price 字段")
+        return dates, close
     
-    def _calculate_max_drawdown(self, trades: List[Dict[str, Any]]) -> float:
-        """计算最大回撤"""
-        if not trades:
-            return 0.0
-        
-        # 简化计算
-        profits = [t.get('profit', 0) for t in trades if 'profit' in t]
-        
-        if not profits:
-            return 0.0
-        
-        cumulative = np.cumsum(profits)
-        running_max = np.maximum.accumulate(cumulative)
-        drawdown = (cumulative - running_max) / running_max * 100
-        
-        return abs(float(np.min(drawdown))) if len(drawdown) > 0 else 0.0
-    
-    def _calculate_sharpe_ratio(self, trades: List[Dict[str, Any]]) -> float:
-        """计算夏普比率"""
-        if not trades:
-            return 0.0
-        
-        profits = [t.get('profit', 0) for t in trades if 'profit' in t]
-        
-        if not profits:
-            return 0.0
-        
-        returns = np.array(profits)
-        avg_return = np.mean(returns)
-        std_return = np.std(returns)
-        
-        sharpe = (avg_return / std_return) if std_return > 0 else 0.0
-        
-        return float(sharpe)
-    
-    def _generate_param_combinations(
+    def _extract_trades(
         self,
-        param_ranges: Dict[str, tuple],
-        max_count: int
+        dates: List[Any],
+        close: np.ndarray,
+        positions: np.ndarray
     ) -> List[Dict[str, Any]]:
-        """生成参数组合"""
-        # 简化实现：均匀采样
-        combinations = []
-        
-        # 示例：生成几组测试参数
-        for i in range(min(max_count, 10)):
-            params = {}
-            for param_name, (min_val, max_val, step) in param_ranges.items():
-                # 均匀采样
-                value = min_val + (max_val - min_val) * (i / max_count)
-                params[param_name] = round(value / step) * step
-            
-            combinations.append(params)
-        
-        return combinations
+        """
+        根据持仓变化还原交易记录
+
+        与 vectorized_backtest 的盈亏口径一致：第 i 根K线的持仓取自第 i-1 根的信号，
+        其收益从第 i-1 根收盘价起算，因此成交的日期和价格都取第 i-1 根K线。
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        changes = np.flatnonzero(np.diff(positions[:-1], prepend=0.0))
+        trades = []
+        entry_price = None
+        for i in changes:
+            action = "buy" if positions[i] > 0 else "sell"
+            trade = {"action": action, "date": dates[i], "price": float(close[i])}
+            if action == "buy":
+                entry_price = trade["price"]
+            elif entry_price:
+                trade["profit_pct"] = float((trade["price"] / entry_price - 1) * 100)
+            trades.append(trade)
+        return trades
     
     def get_optimization_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """获取优化历史"""
@@ -0,0 +1,341 @@
+"""
+向量化回测与参数扫描
+- 指标列缓存（同一窗口的均线/动量在多组参数间共享）
+- 信号、持仓、盈亏全部用数组运算
+- 夏普、最大回撤、换手率一次遍历得到
+- 网格参数扫描：进程池分发 + 前段数据提前淘汰
+"""
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class IndicatorCache:
+    """指标列缓存：按 (指标, 窗口) 缓存整列结果"""
+
+    def __init__(self, close: np.ndarray):
+        self.close = np.asarray(close, dtype=np.float64)
+        self._cumsum = np.concatenate(([0.0], np.cumsum(self.close)))
+        self._cache: Dict[Tuple[str, int], np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Tuple[str, int], builder: Callable[[], np.ndarray]) -> np.ndarray:
+        column = self._cache.get(key)
+        if column is None:
+            self.misses += 1
+            column = builder()
+            self._cache[key] = column
+        else:
+            self.hits += 1
+        return column
+
+    def sma(self, window: int) -> np.ndarray:
+        """简单移动平均（前 window-1 个值为 NaN）"""
+        window = max(int(window), 1)
+
+        def build():
+            out = np.full(self.close.shape, np.nan)
+            if window <= len(self.close):
+                out[window - 1:] = (self._cumsum[window:] - self._cumsum[:-window]) / window
+            return out
+
+        return self._get(("sma", window), build)
+
+    def momentum(self, window: int) -> np.ndarray:
+        """N 期收益率"""
+        window = max(int(window), 1)
+
+        def build():
+            out = np.full(self.close.shape, np.nan)
+            if window < len(self.close):
+                out[window:] = self.close[window:] / self.close[:-window] - 1.0
+            return out
+
+        return self._get(("momentum", window), build)
+
+
+# ============ 策略信号（返回目标持仓：1 持有 / 0 空仓）============
+
+def _moving_average_positions(cache: IndicatorCache, params: Dict[str, Any]) -> np.ndarray:
+    short = cache.sma(params.get("ma_short", 5))
+    long = cache.sma(params.get("ma_long", 20))
+    with np.errstate(invalid="ignore"):
+        return (short > long).astype(np.float64)
+
+
+def _momentum_positions(cache: IndicatorCache, params: Dict[str, Any]) -> np.ndarray:
+    mom = cache.momentum(params.get("lookback", 20))
+    threshold = float(params.get("threshold", 0.0))
+    with np.errstate(invalid="ignore"):
+        return (mom > threshold).astype(np.float64)
+
+
+def _mean_reversion_positions(cache: IndicatorCache, params: Dict[str, Any]) -> np.ndarray:
+    ma = cache.sma(params.get("window", 20))
+    band = float(params.get("band", 0.02))
+    with np.errstate(invalid="ignore"):
+        deviation = cache.close / ma - 1.0
+    entries = deviation < -band
+    exits = deviation > 0
+    # 入场后持有直到回归均线：用“最近一次事件”前向填充
+    state = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+    idx = np.where(~np.isnan(state), np.arange(len(state)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    filled = state[idx]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+STRATEGY_SIGNALS: Dict[str, Callable[[IndicatorCache, Dict[str, Any]], np.ndarray]] = {
+    "moving_average": _moving_average_positions,
+    "momentum": _momentum_positions,
+    "mean_reversion": _mean_reversion_positions,
+}
+
+
+def strategy_positions(strategy_name: str, cache: IndicatorCache, params: Dict[str, Any]) -> np.ndarray:
+    """生成目标持仓序列；未知策略保持空仓"""
+    builder = STRATEGY_SIGNALS.get(strategy_name)
+    if builder is None:
+        return np.zeros(len(cache.close))
+    return builder(cache, params)
+
+
+# ============ 向量化回测 ============
+
+def vectorized_backtest(
+    close: np.ndarray,
+    positions: np.ndarray,
+    initial_capital: float = 1000000,
+    cost_rate: float = 0.0003,
+    periods_per_year: int = 252,
+    return_curve: bool = False,
+) -> Dict[str, Any]:
+    """
+    向量化回测
+
+    持仓在信号产生的下一根K线生效（避免未来函数），按持仓变动收取交易成本。
+
+    Args:
+        close: 收盘价序列
+        positions: 目标持仓（与 close 等长）
+        initial_capital: 初始资金
+        cost_rate: 单边交易成本率
+        periods_per_year: 年化周期数（日线252，分钟线约 252*240）
+        return_curve: 是否返回净值曲线
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    if n < 2:
+        result = {
+            "final_value": float(initial_capital),
+            "total_return": 0.0,
+            "sharpe_ratio": 0.0,
+            "max_drawdown": 0.0,
+            "turnover": 0.0,
+            "total_trades": 0,
+        }
+        if return_curve:
+            result["equity_curve"] = np.full(n, float(initial_capital))
+        return result
+
+    held = np.empty(n)
+    held[0] = 0.0
+    held[1:] = positions[:-1]
+    bar_returns = np.empty(n)
+    bar_returns[0] = 0.0
+    bar_returns[1:] = close[1:] / close[:-1] - 1.0
+
+    trades = np.abs(np.diff(held, prepend=0.0))
+    strategy_returns = held * bar_returns - trades * cost_rate
+    equity = initial_capital * np.cumprod(1.0 + strategy_returns)
+
+    running_max = np.maximum.accumulate(equity)
+    max_drawdown = float(np.max(1.0 - equity / running_max)) * 100
+
+    std = strategy_returns[1:].std()
+    sharpe = float(strategy_returns[1:].mean() / std * math.sqrt(periods_per_year)) if std > 0 else 0.0
+
+    result = {
+        "final_value": float(equity[-1]),
+        "total_return": float((equity[-1] - initial_capital) / initial_capital * 100),
+        "sharpe_ratio": sharpe,
+        "max_drawdown": max_drawdown,
+        "turnover": float(trades.sum() / n),
+        "total_trades": int(np.count_nonzero(trades)),
+    }
+    if return_curve:
+        result["equity_curve"] = equity
+    return result
+
+
+# ============ 参数扫描 ============
+
+# 越小越好的指标；其余指标（收益、夏普等）越大越好
+LOWER_IS_BETTER_METRICS = frozenset({"max_drawdown", "turnover"})
+
+
+def metric_is_lower_better(metric: str) -> bool:
+    return metric in LOWER_IS_BETTER_METRICS
+
+
+def rank_results(results: List[Dict[str, Any]], metric: str) -> List[Dict[str, Any]]:
+    """按指标方向原地排序（最优在前），缺失或 NaN 的结果排在最后"""
+    lower_better = metric_is_lower_better(metric)
+
+    def key(result: Dict[str, Any]) -> Tuple[int, float]:
+        value = result.get(metric)
+        if value is None or math.isnan(value):
+            return (1, 0.0)
+        return (0, value if lower_better else -value)
+
+    results.sort(key=key)
+    return results
+
+def expand_param_grid(param_ranges: Dict[str, tuple]) -> List[Dict[str, Any]]:
+    """展开完整网格 {"name": (min, max, step)}，区间两端均包含"""
+    axes = []
+    names = list(param_ranges)
+    for name in names:
+        min_val, max_val, step = param_ranges[name]
+        if step <= 0:
+            raise ValueError(f"参数 {name} 的步长必须为正数")
+        count = int(math.floor((max_val - min_val) / step + 1e-9)) + 1
+        values = [min_val + i * step for i in range(count)]
+        if all(isinstance(v, int) for v in (min_val, max_val, step)):
+            values = [int(v) for v in values]
+        else:
+            values = [round(v, 10) for v in values]
+        axes.append(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*axes)]
+
+
+def _evaluate_chunk(
+    close: np.ndarray,
+    strategy_name: str,
+    combos: List[Dict[str, Any]],
+    options: Dict[str, Any],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """在单个进程内评估一批参数（共享同一个指标缓存）"""
+    cache = IndicatorCache(close)
+    screen_len = int(len(close) * options["early_stop_fraction"])
+    results = []
+    pruned = 0
+    for params in combos:
+        positions = strategy_positions(strategy_name, cache, params)
+        if options["early_stop_fraction"] < 1 and screen_len >= 2:
+            screen = vectorized_backtest(
+                close[:screen_len], positions[:screen_len],
+                options["initial_capital"], options["cost_rate"], options["periods_per_year"],
+            )
+            if (
+                screen["sharpe_ratio"] < options["min_sharpe"]
+                or screen["max_drawdown"] > options["max_drawdown"]
+            ):
+                pruned += 1
+                continue
+        metrics = vectorized_backtest(
+            close, positions,
+            options["initial_capital"], options["cost_rate"], options["periods_per_year"],
+        )
+        results.append({"params": params, **metrics})
+    return results, pruned
+
+
+_worker_close: Optional[np.ndarray] = None
+
+
+def _init_worker(close: np.ndarray):
+    global _worker_close
+    _worker_close = close
+
+
+def _evaluate_chunk_in_worker(strategy_name: str, combos: List[Dict[str, Any]], options: Dict[str, Any]):
+    return _evaluate_chunk(_worker_close, strategy_name, combos, options)
+
+
+class ParameterSweep:
+    """
+    网格参数扫描
+
+    - 参数组合按指标窗口排序后分块，同一块内复用指标列
+    - 组合数超过 parallel_threshold 时用进程池并行（价格序列只在 worker 初始化时传一次）
+    - early_stop_fraction < 1 时先在前段数据上回测，夏普/回撤不达标的组合直接淘汰
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 64,
+        parallel_threshold: int = 128,
+        early_stop_fraction: float = 1.0,
+        min_sharpe: float = float("-inf"),
+        max_drawdown: float = 100.0,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.early_stop_fraction = early_stop_fraction
+        self.min_sharpe = min_sharpe
+        self.max_drawdown = max_drawdown
+
+    def run(
+        self,
+        strategy_name: str,
+        close: Iterable[float],
+        param_ranges: Dict[str, tuple],
+        initial_capital: float = 1000000,
+        cost_rate: float = 0.0003,
+        periods_per_year: int = 252,
+        metric: str = "total_return",
+        max_combinations: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """执行扫描，返回按 metric 排序的结果（max_drawdown/turnover 升序，其余降序）"""
+        close = np.asarray(list(close) if not isinstance(close, np.ndarray) else close, dtype=np.float64)
+        combos = expand_param_grid(param_ranges)
+        if max_combinations is not None:
+            combos = combos[:max_combinations]
+        # 相同参数值相邻，提升块内指标缓存命中率
+        combos.sort(key=lambda p: tuple(sorted(p.items())))
+
+        options = {
+            "initial_capital": initial_capital,
+            "cost_rate": cost_rate,
+            "periods_per_year": periods_per_year,
+            "early_stop_fraction": self.early_stop_fraction,
+            "min_sharpe": self.min_sharpe,
+            "max_drawdown": self.max_drawdown,
+        }
+        chunks = [combos[i:i + self.chunk_size] for i in range(0, len(combos), self.chunk_size)]
+
+        results: List[Dict[str, Any]] = []
+        pruned = 0
+        if len(combos) <= self.parallel_threshold or self.max_workers <= 1:
+            for chunk in chunks:
+                chunk_results, chunk_pruned = _evaluate_chunk(close, strategy_name, chunk, options)
+                results.extend(chunk_results)
+                pruned += chunk_pruned
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker, initargs=(close,)
+            ) as executor:
+                futures = [
+                    executor.submit(_evaluate_chunk_in_worker, strategy_name, chunk, options)
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    chunk_results, chunk_pruned = future.result()
+                    results.extend(chunk_results)
+                    pruned += chunk_pruned
+
+        rank_results(results, metric)
+        return {
+            "tested": len(combos),
+            "pruned": pruned,
+            "results": results,
+            "best": results[0] if results else None,
+        }
@@ -0,0 +1,102 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from strategies.strategy_optimizer import StrategyOptimizer
+from strategies.vectorized_backtest import (
+    IndicatorCache,
+    ParameterSweep,
+    strategy_positions,
+    vectorized_backtest,
+)
+
+
+def _prices(n=300, seed=7):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0.0005, 0.02, n))
+
+
+def _history(close):
+    return [{"date": f"d{i}", "close": float(c)} for i, c in enumerate(close)]
+
+
+def test_strategies_package_imports_in_a_fresh_interpreter():
+    code = "import strategies.strategy_optimizer as m; print(type(m.strategy_optimizer).__name__)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "StrategyOptimizer"
+
+
+def test_vectorized_backtest_matches_bar_by_bar_loop():
+    close = _prices()
+    positions = strategy_positions("moving_average", IndicatorCache(close), {"ma_short": 5, "ma_long": 20})
+    result = vectorized_backtest(close, positions, initial_capital=1000.0, cost_rate=0.001, return_curve=True)
+
+    equity, held = 1000.0, 0.0
+    for i in range(len(close)):
+        target = positions[i - 1] if i > 0 else 0.0
+        ret = target * (close[i] / close[i - 1] - 1) if i > 0 else 0.0
+        equity *= 1 + ret - abs(target - held) * 0.001
+        held = target
+    assert np.isclose(result["final_value"], equity)
+    assert np.isclose(result["equity_curve"][-1], equity)
+
+
+def test_sweep_picks_direction_per_metric():
+    close = _prices()
+    ranges = {"ma_short": (3, 9, 2), "ma_long": (15, 40, 5)}
+    sweep = ParameterSweep(max_workers=1)
+
+    by_drawdown = sweep.run("moving_average", close, ranges, metric="max_drawdown")
+    drawdowns = [r["max_drawdown"] for r in by_drawdown["results"]]
+    assert by_drawdown["best"]["max_drawdown"] == min(drawdowns)
+    assert drawdowns == sorted(drawdowns)
+
+    by_sharpe = sweep.run("moving_average", close, ranges, metric="sharpe_ratio")
+    sharpes = [r["sharpe_ratio"] for r in by_sharpe["results"]]
+    assert sharpes == sorted(sharpes, reverse=True)
+
+
+def test_parallel_sweep_matches_serial():
+    close = _prices()
+    ranges = {"lookback": (5, 40, 5), "threshold": (0.0, 0.02, 0.01)}
+    serial = ParameterSweep(max_workers=1).run("momentum", close, ranges, metric="sharpe_ratio")
+    parallel = ParameterSweep(max_workers=2, chunk_size=4, parallel_threshold=1).run(
+        "momentum", close, ranges, metric="sharpe_ratio"
+    )
+    assert [r["params"] for r in serial["results"]] == [r["params"] for r in parallel["results"]]
+    assert [r["final_value"] for r in serial["results"]] == [r["final_value"] for r in parallel["results"]]
+
+
+def test_optimizer_reports_the_chosen_metric():
+    close = _prices()
+    outcome = StrategyOptimizer().optimize_strategy_params(
+        "moving_average", {"ma_short": (3, 9, 2), "ma_long": (15, 40, 5)}, _history(close),
+        metric="max_drawdown", max_workers=1,
+    )
+    assert outcome["success"]
+    record = outcome["optimization"]
+    assert record["best_metric_value"] == min(r["max_drawdown"] for r in outcome["top_results"])
+    assert record["best_return"] == outcome["best_result"]["total_return"]
+    assert "max_drawdown" in outcome["message"]
+
+
+def test_trades_use_date_and_price_of_the_same_bar():
+    close = np.array([10.0, 11.0, 12.0, 13.0, 14.0, 15.0])
+    positions = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 0.0])
+    trades = StrategyOptimizer()._extract_trades([f"d{i}" for i in range(6)], close, positions)
+
+    assert trades == [
+        {"action": "buy", "date": "d1", "price": 11.0},
+        {"action": "sell", "date": "d3", "price": 13.0, "profit_pct": (13.0 / 11.0 - 1) * 100},
+    ]
+    # 成交价与回测盈亏口径一致（无成本时总收益即该笔交易收益）
+    result = vectorized_backtest(close, positions, initial_capital=1.0, cost_rate=0.0)
+    assert np.isclose(result["total_return"], trades[1]["profit_pct"])
@@ -9,15 +9,34 @@ Trend Analyzer
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from collections import Counter
-import re
+
+from analysis.trend_index import TrendIndex, tokenize, top_terms
 
 
 class TrendAnalyzer:
     """趋势分析器"""
     
-    def __init__(self):
-        """初始化趋势分析器"""
+    def __init__(self, index: Optional[TrendIndex] = None):
+        """
+        初始化趋势分析器
+        
+        Args:
+            index: 流式趋势索引（默认新建）
+        """
         self.analyzed_data = []
+        self.index = index or TrendIndex()
+    
+    def ingest(self, data: List[Dict[str, Any]]) -> int:
+        """
+        资讯入库（一次性分词并更新倒排索引与窗口统计，重复资讯自动忽略）
+        
+        Args:
+            data: 爬取的数据
+            
+        Returns:
+            新增条数
+        """
+        return self.index.add_many(data)
     
     def classify_content(
         self, 
@@ -56,25 +75,11 @@ class TrendAnalyzer:
             关键词列表
         """
         # 简单的关键词提取（实际可使用jieba等库）
-        # 去除标点符号
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # 分词（简化版）
-        words = text.split()
-        
-        # 过滤停用词和短词
-        stop_words = {'的', '是', '在', '了', '和', '与', '等', '及', '为'}
-        words = [w for w in words if len(w) > 1 and w not in stop_words]
-        
-        # 统计词频
-        word_counts = Counter(words)
-        
-        # 返回TOP K
-        return [word for word, count in word_counts.most_common(top_k)]
+        return top_terms(tokenize(text), top_k)
     
     def summarize_content(
         self, 
-        data: List[Dict[str, Any]]
+        data: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
         汇总分析内容
@@ -82,11 +87,13 @@ class TrendAnalyzer:
         根据需求6.3: 汇总、总结
         
         Args:
-            data: 数据列表
+            data: 数据列表（为 None 时汇总索引中的全部资讯）
             
         Returns:
             汇总结果
         """
+        if data is None:
+            return self.index.summary()
         if not data:
             return {"total": 0}
         
@@ -96,9 +103,11 @@ class TrendAnalyzer:
         # 按来源统计
         sources = Counter(item.get("source") for item in data)
         
-        # 提取所有内容的关键词
-        all_content = " ".join(item.get("content", "") for item in data)
-        keywords = self.extract_keywords(all_content, 20)
+        # 提取所有内容的关键词（复用索引中的分词结果）
+        content_counts = Counter()
+        for item in data:
+            content_counts.update(self.index.document(item).content_counts)
+        keywords = [word for word, count in content_counts.most_common(20)]
         
         # 时间分布
         dates = [item.get("publish_date", "")[:10] for item in data if item.get("publish_date")]
@@ -159,48 +168,62 @@ class TrendAnalyzer:
     
     def detect_hot_topics(
         self,
-        data: List[Dict[str, Any]],
-        threshold: int = 3
+        data: Optional[List[Dict[str, Any]]] = None,
+        threshold: int = 3,
+        windows: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         检测热点话题
         
         Args:
-            data: 数据列表
+            data: 数据列表（为 None 时直接查询索引）
             threshold: 热度阈值
+            windows: 查询索引时只统计最近 N 个时间窗口
             
         Returns:
             热点话题列表
         """
-        # 提取所有标题的关键词
-        all_keywords = []
-        for item in data:
-            title = item.get("title", "")
-            keywords = self.extract_keywords(title, 5)
-            all_keywords.extend(keywords)
+        if data is None:
+            return self.index.hot_topics(threshold=threshold, windows=windows)
         
-        # 统计词频
-        keyword_counts = Counter(all_keywords)
+        # 统计标题关键词（复用索引中的分词结果）
+        documents = [self.index.document(item) for item in data]
+        keyword_counts = Counter()
+        for document in documents:
+            keyword_counts.update(document.title_keywords)
         
         # 筛选热点
-        hot_topics = []
-        for keyword, count in keyword_counts.most_common(20):
-            if count >= threshold:
-                # 找到包含该关键词的文章
-                related_articles = [
-                    item for item in data
-                    if keyword in item.get("title", "") or keyword in item.get("content", "")
-                ]
-                
-                hot_topics.append({
-                    "keyword": keyword,
-                    "frequency": count,
-                    "hotness": min(count * 10, 100),
-                    "related_count": len(related_articles),
-                    "sample_articles": related_articles[:3],
-                })
-        
-        return hot_topics
+        top_keywords = [(k, c) for k, c in keyword_counts.most_common(20) if c >= threshold]
+        related_articles = {keyword: [] for keyword, _ in top_keywords}
+        
+        # 一次遍历建立热点关键词 -> 相关文章的倒排
+        for item, document in zip(data, documents):
+            for keyword in document.terms.intersection(related_articles):
+                related_articles[keyword].append(item)
+        
+        return [
+            {
+                "keyword": keyword,
+                "frequency": count,
+                "hotness": min(count * 10, 100),
+                "related_count": len(related_articles[keyword]),
+                "sample_articles": related_articles[keyword][:3],
+            }
+            for keyword, count in top_keywords
+        ]
+    
+    def detect_bursts(self, windows: int = 1, baseline_windows: int = 6) -> List[Dict[str, Any]]:
+        """
+        检测突发话题（最近窗口相对历史窗口的频次突增）
+        
+        Args:
+            windows: 当前窗口数
+            baseline_windows: 基线窗口数
+            
+        Returns:
+            突发话题列表
+        """
+        return self.index.detect_bursts(windows=windows, baseline_windows=baseline_windows)
 
 
 class ReportGenerator:
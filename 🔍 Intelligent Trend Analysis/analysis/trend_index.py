@@ -0,0 +1,572 @@
+"""
+Trend Index
+流式趋势索引
+
+根据需求6.3: 海量资讯的分类、汇总与热点识别
+- 入库时一次性分词，之后的查询不再重新分词
+- 倒排索引：关键词 -> 资讯编号
+- 按时间窗口维护 Count-Min Sketch 与 Space-Saving 高频词，窗口滑出后整体丢弃
+- 根据当前窗口相对历史窗口的增量检测突发话题
+- 资讯随最早的时间窗口一起过期，总条数超过上限时按入库顺序淘汰最早的资讯
+"""
+
+import bisect
+import heapq
+import math
+import re
+import time
+from array import array
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+STOP_WORDS = frozenset({'的', '是', '在', '了', '和', '与', '等', '及', '为'})
+
+# 每条标题参与热度统计的关键词数
+TITLE_KEYWORDS = 5
+
+
+def tokenize(text: str) -> List[str]:
+    """分词（简化版：去标点后按空白切分，过滤停用词和单字）"""
+    if not text:
+        return []
+    return [w for w in _PUNCTUATION.sub(' ', text).split() if len(w) > 1 and w not in STOP_WORDS]
+
+
+def top_terms(words: Iterable[str], top_k: int) -> List[str]:
+    """按词频返回前 top_k 个词"""
+    return [word for word, _ in Counter(words).most_common(top_k)]
+
+
+def _timestamp(item: Dict[str, Any]) -> Optional[float]:
+    value = item.get("publish_date")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def item_key(item: Dict[str, Any]) -> Tuple:
+    """资讯去重键：优先 URL，否则 标题+来源+发布时间"""
+    url = item.get("url")
+    if url:
+        return ("url", url)
+    return ("item", item.get("title", ""), item.get("source"), str(item.get("publish_date", "")))
+
+
+def _decrement(counter: Counter, key: Any, count: int = 1):
+    remaining = counter[key] - count
+    if remaining > 0:
+        counter[key] = remaining
+    else:
+        counter.pop(key, None)
+
+
+class CountMinSketch:
+    """
+    Count-Min Sketch（只高估、不低估的频次估计）
+
+    各行列号由 hash(key) 经不同的乘法哈希得到；sketch 只在进程内使用，
+    不需要跨进程稳定的哈希。
+
+    Args:
+        width: 每行计数器数
+        depth: 哈希行数
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+        seeds = np.random.default_rng(depth).integers(1, 2**63, size=(2, depth), dtype=np.uint64)
+        self._multipliers = seeds[0] | np.uint64(1)
+        self._offsets = seeds[1]
+
+    def columns(self, keys: List[str]) -> np.ndarray:
+        """各 key 在每一行的列号，形状 (len(keys), depth)"""
+        hashed = np.fromiter((hash(key) for key in keys), dtype=np.int64, count=len(keys)).view(np.uint64)
+        mixed = hashed[:, None] * self._multipliers + self._offsets
+        return ((mixed >> np.uint64(32)) % np.uint64(self.width)).astype(np.intp)
+
+    def add_columns(self, columns: np.ndarray, count: int = 1):
+        """按预先计算的列号批量累加（同一批内重复的 key 会分别计数）"""
+        np.add.at(self.table, (np.broadcast_to(self._rows, columns.shape), columns), count)
+
+    def add(self, key: str, count: int = 1):
+        self.add_columns(self.columns([key]), count)
+
+    def estimate_columns(self, columns: np.ndarray) -> np.ndarray:
+        return self.table[self._rows, columns].min(axis=-1)
+
+    def estimate(self, key: str) -> int:
+        return int(self.estimate_columns(self.columns([key]))[0])
+
+    def merge(self, other: "CountMinSketch"):
+        self.table += other.table
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频词统计
+
+    最多保留 capacity 个计数器；频次超过 N/capacity 的词一定在其中，
+    计数最多高估 error。计数器按计数值分桶，淘汰最小计数器为 O(log 不同计数值数)。
+    """
+
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._buckets: Dict[int, set] = {}
+        self._bucket_heap: List[int] = []
+
+    def _place(self, key: str, count: int):
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            bucket = self._buckets[count] = set()
+            heapq.heappush(self._bucket_heap, count)
+        bucket.add(key)
+        self.counts[key] = count
+
+    def _unplace(self, key: str, count: int):
+        bucket = self._buckets[count]
+        bucket.discard(key)
+        if not bucket:
+            del self._buckets[count]
+
+    def add(self, key: str, count: int = 1):
+        current = self.counts.get(key)
+        if current is not None:
+            self._unplace(key, current)
+            self._place(key, current + count)
+            return
+        if len(self.counts) < self.capacity:
+            self.errors[key] = 0
+            self._place(key, count)
+            return
+        # 堆中可能残留已清空的计数值，跳过即可
+        while self._bucket_heap[0] not in self._buckets:
+            heapq.heappop(self._bucket_heap)
+        minimum = self._bucket_heap[0]
+        victim = self._buckets[minimum].pop()
+        if not self._buckets[minimum]:
+            del self._buckets[minimum]
+        del self.counts[victim]
+        del self.errors[victim]
+        self.errors[key] = minimum
+        self._place(key, minimum + count)
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.counts
+
+    def __iter__(self):
+        return iter(self.counts)
+
+
+@dataclass
+class IndexedItem:
+    """入库资讯的分词结果"""
+
+    doc_id: int
+    item: Dict[str, Any]
+    timestamp: float
+    title_keywords: Tuple[str, ...]
+    terms: frozenset
+    content_counts: Dict[str, int] = field(default_factory=dict)
+
+
+class _Window:
+    """单个时间窗口：标题关键词频次与关键词文档频次的 sketch"""
+
+    def __init__(self, start: float, width: int, depth: int, heavy_hitters: int):
+        self.start = start
+        self.items = 0
+        self.keywords = CountMinSketch(width, depth)
+        self.documents = CountMinSketch(width, depth)
+        self.heavy = SpaceSaving(heavy_hitters)
+
+
+class TrendIndex:
+    """
+    流式趋势索引
+
+    Args:
+        window_seconds: 时间窗口长度（秒）
+        max_windows: 保留的窗口数，更早的窗口整体丢弃
+        sketch_width: Count-Min Sketch 宽度
+        sketch_depth: Count-Min Sketch 深度
+        heavy_hitters: 每个 Space-Saving 摘要的计数器数
+        cache_size: 未入库资讯的分词缓存条数
+        max_documents: 保留的资讯条数上限（None 表示不限），超出后淘汰到上限的 90%
+
+    资讯编号单调递增；淘汰只发生在最早入库的一端，documents 保存编号 >= _base 的资讯。
+    按时间过期时从最早入库的资讯开始，遇到仍在保留范围内的资讯即停止，
+    晚到的旧资讯由条数上限兜底淘汰。
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 3600,
+        max_windows: int = 168,
+        sketch_width: int = 4096,
+        sketch_depth: int = 4,
+        heavy_hitters: int = 512,
+        cache_size: int = 10000,
+        max_documents: Optional[int] = 100000,
+    ):
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.heavy_hitters = heavy_hitters
+        self.cache_size = cache_size
+        self.max_documents = max_documents
+
+        self.documents: List[IndexedItem] = []
+        self._base = 0
+        self.evicted = 0
+        self._keys: Dict[Tuple, int] = {}
+        self._cache: "OrderedDict[Tuple, IndexedItem]" = OrderedDict()
+        self.postings: Dict[str, array] = {}
+
+        self.keyword_counts: Counter = Counter()
+        self.content_counts: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.sources: Counter = Counter()
+        self.dates: Counter = Counter()
+        self._keyword_heavy = SpaceSaving(heavy_hitters)
+        self._content_top: Optional[List[str]] = None
+        self._windows: Dict[int, _Window] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    # ============ 入库 ============
+
+    def _tokenize(self, item: Dict[str, Any], doc_id: int = -1) -> IndexedItem:
+        title_words = tokenize(item.get("title", ""))
+        content_words = tokenize(item.get("content", ""))
+        timestamp = _timestamp(item)
+        return IndexedItem(
+            doc_id=doc_id,
+            item=item,
+            timestamp=timestamp if timestamp is not None else time.time(),
+            title_keywords=tuple(top_terms(title_words, TITLE_KEYWORDS)),
+            terms=frozenset(title_words) | frozenset(content_words),
+            content_counts=dict(Counter(content_words)),
+        )
+
+    def document(self, item: Dict[str, Any]) -> IndexedItem:
+        """取资讯的分词结果：已入库的直接复用，否则分词后放入 LRU 缓存（不计入统计）"""
+        key = item_key(item)
+        doc_id = self._keys.get(key)
+        if doc_id is not None:
+            return self._document(doc_id)
+        doc = self._cache.get(key)
+        if doc is None or doc.item is not item:
+            doc = self._tokenize(item)
+            self._cache[key] = doc
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return doc
+
+    def add(self, item: Dict[str, Any]) -> Optional[IndexedItem]:
+        """资讯入库（重复资讯返回 None）"""
+        key = item_key(item)
+        if key in self._keys:
+            return None
+        doc = self._tokenize(item, self._base + len(self.documents))
+        self._cache.pop(key, None)
+        self._keys[key] = doc.doc_id
+        self.documents.append(doc)
+
+        for term in doc.terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array('l')
+            postings.append(doc.doc_id)
+        for keyword in doc.title_keywords:
+            self.keyword_counts[keyword] += 1
+            self._keyword_heavy.add(keyword)
+        self.content_counts.update(doc.content_counts)
+        self._content_top = None
+
+        self.categories[doc.item.get("category")] += 1
+        self.sources[doc.item.get("source")] += 1
+        publish_date = doc.item.get("publish_date")
+        if isinstance(publish_date, str) and publish_date:
+            self.dates[publish_date[:10]] += 1
+
+        window = self._window(doc.timestamp)
+        if window is not None:
+            window.items += 1
+            for keyword in doc.title_keywords:
+                window.heavy.add(keyword)
+            if doc.title_keywords:
+                window.keywords.add_columns(window.keywords.columns(list(doc.title_keywords)))
+            if doc.terms:
+                window.documents.add_columns(window.documents.columns(list(doc.terms)))
+        if self.max_documents is not None and len(self.documents) > self.max_documents:
+            self._evict(len(self.documents) - self.max_documents * 9 // 10)
+        return doc
+
+    def add_many(self, items: Iterable[Dict[str, Any]]) -> int:
+        """批量入库，返回新增条数"""
+        return sum(1 for item in items if self.add(item) is not None)
+
+    def _window(self, timestamp: float) -> Optional[_Window]:
+        index = int(timestamp // self.window_seconds)
+        window = self._windows.get(index)
+        if window is not None:
+            return window
+        newest = max(self._windows, default=index)
+        if index <= newest - self.max_windows:
+            return None  # 早于保留范围
+        window = self._windows[index] = _Window(
+            index * self.window_seconds, self.sketch_width, self.sketch_depth, self.heavy_hitters
+        )
+        expired = [i for i in self._windows if i <= max(newest, index) - self.max_windows]
+        for i in expired:
+            del self._windows[i]
+        if expired:
+            self._expire_before(min(self._windows) * self.window_seconds)
+        return window
+
+    # ============ 淘汰 ============
+
+    def _document(self, doc_id: int) -> IndexedItem:
+        return self.documents[doc_id - self._base]
+
+    def _expire_before(self, cutoff: float):
+        """淘汰发布时间早于 cutoff 的最早一段资讯"""
+        count = 0
+        for doc in self.documents:
+            if doc.timestamp >= cutoff:
+                break
+            count += 1
+        if count:
+            self._evict(count)
+
+    def _evict(self, count: int):
+        """按入库顺序淘汰最早的 count 条资讯，同步扣减倒排索引与各项计数"""
+        removed = self.documents[:count]
+        if not removed:
+            return
+        del self.documents[:count]
+        self._base = removed[-1].doc_id + 1
+        self.evicted += len(removed)
+
+        terms = set()
+        for doc in removed:
+            self._keys.pop(item_key(doc.item), None)
+            terms.update(doc.terms)
+            for keyword in doc.title_keywords:
+                _decrement(self.keyword_counts, keyword)
+            for word, n in doc.content_counts.items():
+                _decrement(self.content_counts, word, n)
+            _decrement(self.categories, doc.item.get("category"))
+            _decrement(self.sources, doc.item.get("source"))
+            publish_date = doc.item.get("publish_date")
+            if isinstance(publish_date, str) and publish_date:
+                _decrement(self.dates, publish_date[:10])
+
+        # 倒排表按编号升序，被淘汰的编号都在表头
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            del postings[:bisect.bisect_left(postings, self._base)]
+            if not postings:
+                del self.postings[term]
+
+        # Space-Saving 不支持扣减，按精确计数重建高频词摘要
+        self._keyword_heavy = SpaceSaving(self.heavy_hitters)
+        for keyword, n in self.keyword_counts.most_common(self.heavy_hitters):
+            self._keyword_heavy.add(keyword, n)
+        self._content_top = None
+
+    def _window_counts(self, recent: List[_Window], keys: List[str]) -> Tuple[List[Tuple[str, int]], Dict[str, int]]:
+        """多个窗口内各 key 的标题频次与文档频次估计"""
+        if not keys or not recent:
+            return [], {}
+        columns = recent[0].keywords.columns(keys)
+        frequency = sum(w.keywords.estimate_columns(columns) for w in recent)
+        documents = sum(w.documents.estimate_columns(columns) for w in recent)
+        return (
+            [(k, int(c)) for k, c in zip(keys, frequency)],
+            {k: int(c) for k, c in zip(keys, documents)},
+        )
+
+    def _recent_windows(self, count: int, now: Optional[float], offset: int = 0) -> List[_Window]:
+        current = int((time.time() if now is None else now) // self.window_seconds) - offset
+        return [self._windows[i] for i in range(current - count + 1, current + 1) if i in self._windows]
+
+    # ============ 查询 ============
+
+    def _samples(self, keyword: str, limit: int, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        samples = []
+        if since is None:
+            for doc_id in self.postings.get(keyword, ())[:limit]:
+                samples.append(self._document(doc_id).item)
+            return samples
+        for doc_id in reversed(self.postings.get(keyword, ())):
+            doc = self._document(doc_id)
+            if doc.timestamp >= since:
+                samples.append(doc.item)
+                if len(samples) >= limit:
+                    break
+        return samples
+
+    def hot_topics(
+        self,
+        threshold: int = 3,
+        limit: int = 20,
+        windows: Optional[int] = None,
+        now: Optional[float] = None,
+        samples: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        热点话题
+
+        Args:
+            threshold: 最低频次
+            limit: 返回数量
+            windows: 只统计最近 N 个时间窗口（默认全部资讯，计数精确）
+            now: 当前时间戳（默认系统时间）
+            samples: 每个话题附带的示例资讯数
+
+        Returns:
+            热点话题列表（与 TrendAnalyzer.detect_hot_topics 结构一致）
+        """
+        if windows is None:
+            candidates = [(k, self.keyword_counts[k]) for k in self._keyword_heavy]
+            related = {k: len(self.postings.get(k, ())) for k, _ in candidates}
+            since = None
+        else:
+            recent = self._recent_windows(windows, now)
+            keys = set().union(*(w.heavy for w in recent)) if recent else set()
+            candidates, related = self._window_counts(recent, list(keys))
+            since = recent[0].start if recent else None
+
+        hot_topics = []
+        for keyword, count in heapq.nlargest(limit, candidates, key=lambda kv: kv[1]):
+            if count < threshold:
+                break
+            hot_topics.append({
+                "keyword": keyword,
+                "frequency": count,
+                "hotness": min(count * 10, 100),
+                "related_count": related[keyword],
+                "sample_articles": self._samples(keyword, samples, since),
+            })
+        return hot_topics
+
+    def detect_bursts(
+        self,
+        windows: int = 1,
+        baseline_windows: int = 6,
+        min_count: int = 3,
+        min_score: float = 3.0,
+        limit: int = 20,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        突发话题检测
+
+        比较最近 windows 个窗口与之前 baseline_windows 个窗口（按同等时长折算）的频次，
+        按泊松 z 分数 (当前 - 基线) / sqrt(基线 + 1) 排序。
+
+        Returns:
+            突发话题列表
+        """
+        recent = self._recent_windows(windows, now)
+        if not recent:
+            return []
+        history = self._recent_windows(baseline_windows, now, offset=windows)
+        scale = windows / baseline_windows if baseline_windows else 0.0
+
+        keys = list(set().union(*(w.heavy for w in recent)))
+        columns = recent[0].keywords.columns(keys) if keys else None
+        current_counts = sum(w.keywords.estimate_columns(columns) for w in recent) if keys else []
+        history_counts = (
+            sum(w.keywords.estimate_columns(columns) for w in history) if keys and history else np.zeros(len(keys))
+        )
+
+        bursts = []
+        for keyword, current, past in zip(keys, current_counts, history_counts):
+            current = int(current)
+            if current < min_count:
+                continue
+            expected = float(past) * scale
+            score = (current - expected) / math.sqrt(expected + 1.0)
+            if score < min_score:
+                continue
+            bursts.append({
+                "keyword": keyword,
+                "current_count": current,
+                "baseline_count": round(expected, 2),
+                "growth_rate": round(current / expected, 2) if expected > 0 else None,
+                "burst_score": round(score, 2),
+            })
+        bursts.sort(key=lambda b: b["burst_score"], reverse=True)
+        return bursts[:limit]
+
+    def top_content_keywords(self, top_k: int = 20) -> List[str]:
+        """正文高频词（结果缓存到下一次入库）"""
+        if self._content_top is None or len(self._content_top) < top_k:
+            self._content_top = [word for word, _ in self.content_counts.most_common(max(top_k, 20))]
+        return self._content_top[:top_k]
+
+    def summary(self, latest: int = 10) -> Dict[str, Any]:
+        """全量汇总（与 TrendAnalyzer.summarize_content 结构一致）"""
+        if not self.documents:
+            return {"total": 0}
+        return {
+            "total": len(self.documents),
+            "categories": dict(self.categories),
+            "sources": dict(self.sources),
+            "keywords": self.top_content_keywords(20),
+            "date_distribution": dict(self.dates),
+            "latest_items": [doc.item for doc in self.documents[-latest:]],
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """索引统计"""
+        return {
+            "documents": len(self.documents),
+            "vocabulary": len(self.postings),
+            "postings": sum(len(p) for p in self.postings.values()),
+            "windows": len(self._windows),
+            "window_seconds": self.window_seconds,
+            "max_documents": self.max_documents,
+            "evicted": self.evicted,
+        }
+
+
+__all__ = [
+    "CountMinSketch",
+    "IndexedItem",
+    "SpaceSaving",
+    "TrendIndex",
+    "item_key",
+    "tokenize",
+    "top_terms",
+]
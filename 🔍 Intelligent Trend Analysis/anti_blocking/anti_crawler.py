@@ -7,7 +7,8 @@
 """
 import random
 import time
-from typing import Dict, Any, List, Optional
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import asyncio
 
@@ -28,8 +29,11 @@ class AntiCrawlerSystem:
         # IP代理池（示例）
         self.proxy_pool = []
         
-        # 请求记录（用于频率控制）
-        self.request_history = {}
+        # 请求记录（用于频率控制）：域名 -> 单调时钟时间戳队列（按时间递增）
+        self.request_history: Dict[str, Deque[float]] = {}
+        
+        # 共享HTTP客户端（按代理区分，复用连接池）
+        self._clients: Dict[Optional[str], Any] = {}
         
         # 配置
         self.config = {
@@ -66,33 +70,32 @@ class AntiCrawlerSystem:
     
     # ============ 频率控制 ============
     
+    def _prune_history(self, domain: str, now: float) -> Deque[float]:
+        """丢弃1分钟前的记录（时间戳递增，只需从队首弹出）"""
+        history = self.request_history.setdefault(domain, deque())
+        one_minute_ago = now - 60
+        while history and history[0] <= one_minute_ago:
+            history.popleft()
+        return history
+    
     def can_request(self, domain: str) -> bool:
         """检查是否可以请求"""
-        now = datetime.now()
-        
-        # 获取该域名的请求历史
-        if domain not in self.request_history:
-            self.request_history[domain] = []
-        
-        # 清理1分钟前的记录
-        one_minute_ago = now - timedelta(minutes=1)
-        self.request_history[domain] = [
-            t for t in self.request_history[domain]
-            if t > one_minute_ago
-        ]
-        
-        # 检查是否超过限制
-        if len(self.request_history[domain]) >= self.config['max_requests_per_minute']:
-            return False
-        
-        return True
+        history = self._prune_history(domain, time.monotonic())
+        return len(history) < self.config['max_requests_per_minute']
+    
+    def wait_time(self, domain: str) -> float:
+        """距离该域名下一次允许请求的秒数"""
+        now = time.monotonic()
+        history = self._prune_history(domain, now)
+        if len(history) < self.config['max_requests_per_minute']:
+            return 0.0
+        # 窗口内第 (len - limit + 1) 条记录过期后即可请求
+        index = len(history) - self.config['max_requests_per_minute']
+        return max(0.0, history[index] + 60 - now)
     
     def record_request(self, domain: str):
         """记录请求"""
-        if domain not in self.request_history:
-            self.request_history[domain] = []
-        
-        self.request_history[domain].append(datetime.now())
+        self.request_history.setdefault(domain, deque()).append(time.monotonic())
     
     def get_delay(self) -> float:
         """获取随机延迟时间"""
@@ -138,16 +141,16 @@ class AntiCrawlerSystem:
         Returns:
             请求结果
         """
-        import httpx
         from urllib.parse import urlparse
         
         domain = urlparse(url).netloc
+        referer = kwargs.pop('referer', None)
         
         for attempt in range(self.config['retry_times']):
             try:
                 # 频率控制
-                if not self.can_request(domain):
-                    wait_time = 60 - (datetime.now().second)
+                wait_time = self.wait_time(domain)
+                if wait_time > 0:
                     await asyncio.sleep(wait_time)
                 
                 # 延迟
@@ -157,31 +160,22 @@ class AntiCrawlerSystem:
                     await asyncio.sleep(self.get_delay())
                 
                 # 准备请求
-                headers = self.get_request_headers(kwargs.get('referer'))
-                proxy = self.get_random_proxy()
+                headers = self.get_request_headers(referer)
+                headers.pop('Accept-Encoding', None)
+                client = self._get_client(self.get_random_proxy())
                 
                 # 发送请求
-                async with httpx.AsyncClient(
-                    headers=headers,
-                    proxies=proxy,
-                    timeout=30.0
-                ) as client:
-                    if method == "GET":
-                        response = await client.get(url, **kwargs)
-                    elif method == "POST":
-                        response = await client.post(url, **kwargs)
-                    else:
-                        raise ValueError(f"不支持的方法: {method}")
-                    
-                    # 记录请求
-                    self.record_request(domain)
-                    
-                    return {
-                        "success": True,
-                        "status_code": response.status_code,
-                        "content": response.text,
-                        "headers": dict(response.headers)
-                    }
+                if method not in ("GET", "POST"):
+                    raise ValueError(f"不支持的方法: {method}")
+                self.record_request(domain)
+                response = await client.request(method, url, headers=headers, **kwargs)
+                
+                return {
+                    "success": True,
+                    "status_code": response.status_code,
+                    "content": response.text,
+                    "headers": dict(response.headers)
+                }
             
             except Exception as e:
                 if attempt == self.config['retry_times'] - 1:
@@ -199,6 +193,27 @@ class AntiCrawlerSystem:
             "error": "所有重试均失败"
         }
     
+    def _get_client(self, proxy: Optional[str] = None):
+        """获取共享HTTP客户端（每个代理一个连接池）"""
+        import httpx
+        
+        client = self._clients.get(proxy)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                proxy=proxy,
+                timeout=30.0,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+            self._clients[proxy] = client
+        return client
+    
+    async def aclose(self):
+        """关闭共享HTTP客户端"""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+    
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
         total_requests = sum(len(v) for v in self.request_history.values())
@@ -172,19 +172,27 @@ async def generate_report(request: ReportRequest):
 
 
 @router.get("/hot-topics")
-async def get_hot_topics(limit: int = Query(10, description="返回数量")):
+async def get_hot_topics(
+    limit: int = Query(10, description="返回数量"),
+    windows: Optional[int] = Query(None, description="只统计最近N个时间窗口")
+):
     """
     获取热点话题
     
     Args:
         limit: 返回数量
+        windows: 时间窗口数
         
     Returns:
         热点话题列表
     """
     try:
-        data = default_crawler_manager.get_latest_results(100)
-        hot_topics = analyzer.detect_hot_topics(data)
+        if len(analyzer.index):
+            # 直接查询趋势索引（已入库的全部资讯）
+            hot_topics = analyzer.detect_hot_topics(windows=windows)
+        else:
+            data = default_crawler_manager.get_latest_results(100)
+            hot_topics = analyzer.detect_hot_topics(data)
         
         return {
             "hot_topics": hot_topics[:limit],
@@ -195,6 +203,34 @@ async def get_hot_topics(limit: int = Query(10, description="返回数量")):
         raise HTTPException(status_code=500, detail=f"获取热点失败: {str(e)}")
 
 
+@router.get("/hot-topics/bursts")
+async def get_burst_topics(
+    windows: int = Query(1, description="当前窗口数"),
+    baseline_windows: int = Query(6, description="基线窗口数")
+):
+    """
+    获取突发话题
+    
+    Args:
+        windows: 当前窗口数
+        baseline_windows: 基线窗口数
+        
+    Returns:
+        突发话题列表
+    """
+    try:
+        bursts = analyzer.detect_bursts(windows=windows, baseline_windows=baseline_windows)
+        
+        return {
+            "bursts": bursts,
+            "total": len(bursts),
+            "index": analyzer.index.get_statistics(),
+            "generated_at": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取突发话题失败: {str(e)}")
+
+
 @router.get("/dashboard")
 async def get_trend_dashboard():
     """
@@ -268,10 +304,13 @@ async def _execute_crawl_task(categories: List[str]):
     
     try:
         # 执行爬虫
-        results = default_crawler_manager.crawl_all()
+        results = await default_crawler_manager.crawl_all_async(categories)
         
         print(f"✅ 爬虫任务完成，获取 {len(results)} 条数据")
         
+        # 入库趋势索引
+        analyzer.ingest(results)
+        
         # TODO: 保存到数据库或RAG
         
     except Exception as e:
@@ -0,0 +1,607 @@
+"""
+Crawl Engine
+并发爬取引擎
+
+根据需求6.1/6.2: 大批量信息源定时刷新，同时遵守反爬规则
+- 共享连接池（单个 httpx.AsyncClient，keep-alive 复用）
+- 按域名的令牌桶限速 + 并发上限，不同域名之间互不阻塞
+- 优先级抓取队列（frontier），URL 规范化去重
+- 条件请求（ETag / Last-Modified），304 时直接复用上次解析结果
+- HTML 解析放到进程池/线程池执行，不占用事件循环
+- 失败重试通过 frontier 延后调度实现，不在 worker 内 sleep
+"""
+
+import asyncio
+import heapq
+import pickle
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+
+import httpx
+
+# 可重试的状态码（服务端繁忙/限流）
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """URL 规范化：去掉 fragment，scheme/host 小写，去掉默认端口"""
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    netloc = host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def domain_of(url: str) -> str:
+    """取 URL 的域名（含非默认端口），作为限速单位"""
+    return urlsplit(url).netloc.lower()
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _picklable(obj: Any) -> bool:
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+
+def _run_parser(parser: Callable[[str], List[Dict[str, Any]]], html: str) -> List[Dict[str, Any]]:
+    """在工作进程/线程中执行解析函数"""
+    return list(parser(html) or [])
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    Args:
+        rate: 每秒补充的令牌数
+        burst: 桶容量（允许的突发请求数）
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = max(rate, 1e-9)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """距离下一个可用令牌的秒数（0 表示立即可用）"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def consume(self, now: Optional[float] = None) -> bool:
+        """尝试取一个令牌"""
+        if self.delay(now) > 0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def penalize(self, seconds: float):
+        """退避：清空令牌并额外欠下 seconds 秒的额度"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+@dataclass
+class CrawlRequest:
+    """
+    抓取请求
+
+    priority 越小越先抓取；parser 接收 HTML 返回条目列表，
+    需要进程池解析时 parser 必须可 pickle（模块级函数或可序列化对象的方法）
+    """
+
+    url: str
+    priority: int = 0
+    parser: Optional[Callable[[str], List[Dict[str, Any]]]] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    attempt: int = 0
+
+    @property
+    def domain(self) -> str:
+        return domain_of(self.url)
+
+
+@dataclass
+class CrawlResult:
+    """抓取结果"""
+
+    url: str
+    success: bool
+    status_code: Optional[int] = None
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    content: Optional[str] = None
+    not_modified: bool = False
+    attempts: int = 1
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "success": self.success,
+            "status_code": self.status_code,
+            "items": self.items,
+            "not_modified": self.not_modified,
+            "attempts": self.attempts,
+            "elapsed": self.elapsed,
+            "error": self.error,
+        }
+
+
+@dataclass
+class _CacheEntry:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    items: List[Dict[str, Any]]
+    content: Optional[str]
+
+
+class ValidatorCache:
+    """条件请求缓存（LRU），保存 ETag/Last-Modified 及上次解析结果"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[_CacheEntry]:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def put(self, url: str, entry: _CacheEntry):
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.get(url)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CrawlFrontier:
+    """
+    抓取队列
+
+    每个域名一个按优先级排序的子队列；调度堆按"域名下次可请求时间"排序，
+    取出请求时即消耗该域名的令牌，因此等待限速的域名不会挡住其他域名。
+    """
+
+    def __init__(self, bucket_factory: Callable[[str], TokenBucket]):
+        self._bucket_factory = bucket_factory
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._queues: Dict[str, List[Tuple[int, int, CrawlRequest]]] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._scheduled: set = set()
+        self._seen: set = set()
+        self._sequence = 0
+        self._unfinished = 0
+        self._closed = False
+        self._changed = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+    def bucket(self, domain: str) -> TokenBucket:
+        bucket = self.buckets.get(domain)
+        if bucket is None:
+            bucket = self.buckets[domain] = self._bucket_factory(domain)
+        return bucket
+
+    def add(self, request: CrawlRequest, revisit: bool = False) -> bool:
+        """加入请求；已见过的 URL 被忽略（重试时 revisit=True）"""
+        request.url = normalize_url(request.url)
+        if not revisit:
+            if request.url in self._seen:
+                return False
+            self._seen.add(request.url)
+
+        domain = request.domain
+        self._sequence += 1
+        heapq.heappush(self._queues.setdefault(domain, []), (request.priority, self._sequence, request))
+        if domain not in self._scheduled:
+            self._scheduled.add(domain)
+            self._push_domain(domain, time.monotonic())
+        self._unfinished += 1
+        self._drained.clear()
+        self._changed.set()
+        return True
+
+    def _push_domain(self, domain: str, now: float):
+        ready_at = now + self.bucket(domain).delay(now)
+        head_priority = self._queues[domain][0][0]
+        heapq.heappush(self._schedule, (ready_at, head_priority, domain))
+
+    async def get(self) -> Optional[CrawlRequest]:
+        """取下一个可以发出的请求；队列关闭后返回 None"""
+        while not self._closed:
+            timeout = None
+            if self._schedule:
+                ready_at, _, domain = self._schedule[0]
+                now = time.monotonic()
+                if ready_at <= now:
+                    heapq.heappop(self._schedule)
+                    bucket = self.bucket(domain)
+                    if not bucket.consume(now):
+                        # 排队期间被退避，按新的时间重新排入
+                        self._push_domain(domain, now)
+                        continue
+                    queue = self._queues[domain]
+                    _, _, request = heapq.heappop(queue)
+                    if queue:
+                        self._push_domain(domain, now)
+                    else:
+                        del self._queues[domain]
+                        self._scheduled.discard(domain)
+                    return request
+                timeout = ready_at - now
+
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return None
+
+    def task_done(self):
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._drained.set()
+
+    async def join(self):
+        await self._drained.wait()
+
+    def close(self):
+        self._closed = True
+        self._changed.set()
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def seen(self, url: str) -> bool:
+        return normalize_url(url) in self._seen
+
+
+class CrawlEngine:
+    """
+    并发爬取引擎
+
+    Args:
+        max_connections: 连接池总连接数（同时也是 worker 数）
+        per_domain_concurrency: 单域名同时在途请求数
+        requests_per_minute: 单域名每分钟请求数（令牌桶速率）
+        burst: 单域名允许的突发请求数
+        timeout: 单次请求超时（秒）
+        max_retries: 可重试错误的最大重试次数
+        retry_backoff: 首次重试退避秒数（按 2 的幂增长，429/503 优先使用 Retry-After）
+        parse_workers: 解析工作进程/线程数
+        use_processes: 解析是否使用进程池（parser 不可 pickle 时自动退回线程池）
+        headers_factory: 生成请求头的函数（如 AntiCrawlerSystem.get_request_headers）
+        cache_size: 条件请求缓存条目上限
+        domain_paused: 判断域名是否暂停爬取的函数，暂停的域名直接返回失败
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        per_domain_concurrency: int = 2,
+        requests_per_minute: float = 10,
+        burst: float = 2,
+        timeout: float = 15.0,
+        max_retries: int = 2,
+        retry_backoff: float = 2.0,
+        parse_workers: Optional[int] = None,
+        use_processes: bool = True,
+        headers_factory: Optional[Callable[[], Dict[str, str]]] = None,
+        cache_size: int = 10000,
+        domain_paused: Optional[Callable[[str], bool]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_connections = max(1, int(max_connections))
+        self.per_domain_concurrency = max(1, int(per_domain_concurrency))
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.parse_workers = parse_workers
+        self.use_processes = use_processes
+        self.headers_factory = headers_factory
+        self.domain_paused = domain_paused
+        self.cache = ValidatorCache(cache_size)
+        self.domain_limits: Dict[str, Tuple[float, float]] = {}
+
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+        self.stats = {
+            "requests": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "not_modified": 0,
+            "retries": 0,
+            "duplicates": 0,
+            "bytes": 0,
+            "parse_seconds": 0.0,
+        }
+
+    # ============ 资源管理 ============
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """共享连接池（惰性创建）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    def _executor(self, process: bool) -> Executor:
+        if process:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+            return self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.parse_workers, thread_name_prefix="crawl-parse"
+            )
+        return self._thread_pool
+
+    async def aclose(self):
+        """关闭连接池和解析池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        for pool in (self._process_pool, self._thread_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._process_pool = None
+        self._thread_pool = None
+        self._semaphores.clear()
+
+    def copy(self) -> "CrawlEngine":
+        """同配置的新引擎：独立的连接池与解析池（可在另一个事件循环中使用），共享条件请求缓存"""
+        engine = CrawlEngine(
+            max_connections=self.max_connections,
+            per_domain_concurrency=self.per_domain_concurrency,
+            requests_per_minute=self.requests_per_minute,
+            burst=self.burst,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            retry_backoff=self.retry_backoff,
+            parse_workers=self.parse_workers,
+            use_processes=self.use_processes,
+            headers_factory=self.headers_factory,
+            domain_paused=self.domain_paused,
+            transport=self._transport,
+        )
+        engine.cache = self.cache
+        engine.domain_limits = dict(self.domain_limits)
+        return engine
+
+    async def __aenter__(self) -> "CrawlEngine":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    # ============ 限速 ============
+
+    def set_domain_limit(self, domain: str, requests_per_minute: float, burst: Optional[float] = None):
+        """为单个域名设置速率（如 robots.txt 的 Crawl-delay）"""
+        self.domain_limits[domain.lower()] = (requests_per_minute, burst if burst is not None else self.burst)
+        self._buckets.pop(domain.lower(), None)
+
+    def _bucket_for(self, domain: str) -> TokenBucket:
+        # 令牌桶跨多次 crawl() 保留，连续刷新时同样受限速约束
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            rpm, burst = self.domain_limits.get(domain, (self.requests_per_minute, self.burst))
+            bucket = self._buckets[domain] = TokenBucket(rpm / 60.0, burst)
+        return bucket
+
+    def _semaphore(self, domain: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(domain)
+        if semaphore is None:
+            semaphore = self._semaphores[domain] = asyncio.Semaphore(self.per_domain_concurrency)
+        return semaphore
+
+    # ============ 抓取 ============
+
+    async def crawl(self, requests: Iterable[CrawlRequest]) -> List[CrawlResult]:
+        """
+        并发抓取一批请求
+
+        Returns:
+            每个（去重后的）URL 一个结果，按完成顺序排列
+        """
+        frontier = CrawlFrontier(self._bucket_for)
+        for request in requests:
+            if not frontier.add(request):
+                self.stats["duplicates"] += 1
+
+        results: List[CrawlResult] = []
+        worker_count = min(self.max_connections, max(1, frontier.pending()))
+        workers = [asyncio.create_task(self._worker(frontier, results)) for _ in range(worker_count)]
+        try:
+            await frontier.join()
+        finally:
+            frontier.close()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return results
+
+    async def fetch(self, url: str, parser: Optional[Callable[[str], List[Dict[str, Any]]]] = None) -> CrawlResult:
+        """抓取单个 URL（同样经过限速、条件请求和解析池）"""
+        results = await self.crawl([CrawlRequest(url=url, parser=parser)])
+        return results[0]
+
+    async def _worker(self, frontier: CrawlFrontier, results: List[CrawlResult]):
+        while True:
+            request = await frontier.get()
+            if request is None:
+                return
+            try:
+                result = await self._process(request)
+                if result is None:
+                    self.stats["retries"] += 1
+                    request.attempt += 1
+                    frontier.add(request, revisit=True)
+                else:
+                    result.attempts = request.attempt + 1
+                    self.stats["succeeded" if result.success else "failed"] += 1
+                    results.append(result)
+            except Exception as e:
+                self.stats["failed"] += 1
+                results.append(CrawlResult(url=request.url, success=False, error=str(e),
+                                           attempts=request.attempt + 1, meta=request.meta))
+            finally:
+                frontier.task_done()
+
+    def _retry(self, request: CrawlRequest, delay: Optional[float]) -> bool:
+        """还有重试次数时对域名退避并返回 True"""
+        if request.attempt >= self.max_retries:
+            return False
+        backoff = delay if delay is not None else self.retry_backoff * (2 ** request.attempt)
+        self._bucket_for(request.domain).penalize(backoff)
+        return True
+
+    async def _process(self, request: CrawlRequest) -> Optional[CrawlResult]:
+        """执行一次请求；返回 None 表示已安排重试"""
+        domain = request.domain
+        if self.domain_paused and self.domain_paused(domain):
+            return CrawlResult(url=request.url, success=False, error="域名已暂停爬取", meta=request.meta)
+
+        headers = dict(self.headers_factory()) if self.headers_factory else {}
+        headers.update(self.cache.conditional_headers(request.url))
+
+        started = time.monotonic()
+        async with self._semaphore(domain):
+            self.stats["requests"] += 1
+            try:
+                response = await self.client.get(request.url, headers=headers)
+            except httpx.HTTPError as e:
+                if self._retry(request, None):
+                    return None
+                return CrawlResult(url=request.url, success=False, error=f"{type(e).__name__}: {e}",
+                                   elapsed=time.monotonic() - started, meta=request.meta)
+        elapsed = time.monotonic() - started
+
+        if response.status_code == 304:
+            entry = self.cache.get(request.url)
+            if entry is not None:
+                self.stats["not_modified"] += 1
+                return CrawlResult(url=request.url, success=True, status_code=304, items=entry.items,
+                                   content=entry.content, not_modified=True, elapsed=elapsed, meta=request.meta)
+
+        if response.status_code in RETRYABLE_STATUS:
+            if self._retry(request, _retry_after_seconds(response.headers.get("Retry-After"))):
+                return None
+
+        if response.status_code >= 400 or response.status_code == 304:
+            return CrawlResult(url=request.url, success=False, status_code=response.status_code,
+                               error=f"HTTP {response.status_code}", elapsed=elapsed, meta=request.meta)
+
+        html = response.text
+        self.stats["bytes"] += len(response.content)
+        items = await self._parse(request, html) if request.parser else []
+        content = None if request.parser else html
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.cache.put(request.url, _CacheEntry(etag, last_modified, items, content))
+
+        return CrawlResult(url=request.url, success=True, status_code=response.status_code, items=items,
+                           content=content, elapsed=elapsed, meta=request.meta)
+
+    async def _parse(self, request: CrawlRequest, html: str) -> List[Dict[str, Any]]:
+        """在解析池中执行 parser，进程池不可用或 parser 不可 pickle 时退回线程池"""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        try:
+            if self.use_processes and _picklable(request.parser):
+                try:
+                    return await loop.run_in_executor(self._executor(True), _run_parser, request.parser, html)
+                except BrokenProcessPool:
+                    self._process_pool = None
+            return await loop.run_in_executor(self._executor(False), _run_parser, request.parser, html)
+        finally:
+            self.stats["parse_seconds"] += time.monotonic() - started
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取引擎统计"""
+        return {
+            **self.stats,
+            "cached_urls": len(self.cache),
+            "domains": len(self._buckets),
+            "max_connections": self.max_connections,
+            "per_domain_concurrency": self.per_domain_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+        }
+
+
+__all__ = [
+    "CrawlEngine",
+    "CrawlFrontier",
+    "CrawlRequest",
+    "CrawlResult",
+    "TokenBucket",
+    "ValidatorCache",
+    "normalize_url",
+]
@@ -12,16 +12,27 @@ News Crawler
 - 热点资讯
 """
 
+import asyncio
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import time
 import random
 
+from anti_blocking.anti_crawler import anti_crawler
+from crawlers.crawl_engine import CrawlEngine, CrawlRequest, CrawlResult
+
 
 class NewsCrawler:
-    """新闻爬虫基类"""
+    """
+    新闻爬虫基类
+    
+    has_parser 为 False 的爬虫尚未实现真实解析，不会发起网络请求
+    """
+    
+    has_parser = False
     
     def __init__(self, name: str):
         """
@@ -39,6 +50,9 @@ class NewsCrawler:
         # 反爬策略配置
         self.request_delay = (1, 3)  # 请求延迟范围（秒）
         self.max_retries = 3
+        
+        # 信息源列表（子类覆盖）
+        self.sources: List[str] = []
     
     def fetch_page(self, url: str, retries: int = 0) -> Optional[str]:
         """
@@ -72,6 +86,43 @@ class NewsCrawler:
                 print(f"❌ 获取页面失败: {e}")
                 return None
     
+    async def fetch_page_async(self, url: str, engine: CrawlEngine) -> Optional[str]:
+        """
+        通过并发爬取引擎获取页面内容（限速、重试和条件请求由引擎负责）
+        
+        Args:
+            url: 页面URL
+            engine: 爬取引擎
+            
+        Returns:
+            页面HTML内容
+        """
+        result = await engine.fetch(url)
+        return result.content if result.success else None
+    
+    def build_requests(self, priority: int = 0, category: Optional[str] = None) -> List[CrawlRequest]:
+        """
+        为所有信息源生成抓取请求，页面由引擎的解析池调用 parse_content 解析
+        
+        Args:
+            priority: 优先级（越小越先抓取）
+            category: 所属类别
+            
+        Returns:
+            抓取请求列表（未实现真实解析的爬虫返回空列表）
+        """
+        if not self.has_parser:
+            return []
+        return [
+            CrawlRequest(
+                url=url,
+                priority=priority,
+                parser=self.parse_content,
+                meta={"crawler": self.name, "category": category},
+            )
+            for url in self.sources
+        ]
+    
     def parse_content(self, html: str) -> List[Dict[str, Any]]:
         """
         解析页面内容
@@ -201,36 +252,128 @@ class CrawlerManager:
     统一管理多个爬虫
     """
     
-    def __init__(self):
-        """初始化爬虫管理器"""
+    def __init__(self, engine: Optional[CrawlEngine] = None):
+        """
+        初始化爬虫管理器
+        
+        Args:
+            engine: 并发爬取引擎（默认按反爬配置创建）
+        """
         self.crawlers = {
             "policy": PolicyCrawler(),
             "tech": TechNewsCrawler(),
             "industry": IndustryNewsCrawler(),
             "hot": HotTopicCrawler(),
         }
+        # 类别抓取优先级（越小越先抓取）
+        self.priorities = {"hot": 0, "policy": 1, "tech": 2, "industry": 3}
         self.crawl_results = []
+        self.last_crawl_stats: Dict[str, Any] = {}
+        self._engine = engine
+    
+    @property
+    def engine(self) -> CrawlEngine:
+        """并发爬取引擎（惰性创建，单域名速率取反爬配置）"""
+        if self._engine is None:
+            self._engine = CrawlEngine(
+                requests_per_minute=anti_crawler.config["max_requests_per_minute"],
+                max_retries=anti_crawler.config["retry_times"],
+                headers_factory=self._request_headers,
+                domain_paused=anti_crawler.is_domain_paused,
+            )
+        return self._engine
     
-    def crawl_all(self) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _request_headers() -> Dict[str, str]:
+        headers = anti_crawler.get_request_headers()
+        # 压缩格式交给 httpx 协商，避免声明未安装解码器的 br
+        headers.pop("Accept-Encoding", None)
+        return headers
+    
+    async def crawl_all_async(self, categories: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
-        执行所有爬虫
+        并发执行爬虫：所有类别的信息源进入同一个抓取队列，
+        按域名限速、按类别优先级调度
         
+        Args:
+            categories: 爬取类别（默认全部）
+            
         Returns:
             所有爬取的数据
         """
-        all_results = []
+        return await self._crawl(categories, self.engine)
+    
+    async def _crawl(self, categories: Optional[List[str]], engine: CrawlEngine) -> List[Dict[str, Any]]:
+        selected = {
+            name: crawler for name, crawler in self.crawlers.items()
+            if categories is None or name in categories
+        }
         
-        for name, crawler in self.crawlers.items():
+        requests_batch = []
+        mocked = []
+        for name, crawler in selected.items():
+            if not crawler.has_parser:
+                # 解析器未实现的类别不访问网络，直接使用模拟数据
+                mocked.append(name)
+                continue
             print(f"🕷️ 正在执行 {crawler.name}...")
-            
-            # TODO: 实际爬取逻辑
-            # 这里使用模拟数据
-            results = self._mock_crawl_results(name)
-            all_results.extend(results)
+            requests_batch.extend(crawler.build_requests(self.priorities.get(name, 10), name))
+        
+        started = time.monotonic()
+        results: List[CrawlResult] = await engine.crawl(requests_batch) if requests_batch else []
+        
+        items_by_category: Dict[str, List[Dict[str, Any]]] = {
+            name: [] for name in selected if name not in mocked
+        }
+        for result in results:
+            if result.success:
+                items_by_category[result.meta["category"]].extend(result.items)
+        
+        all_results = []
+        for name, items in items_by_category.items():
+            all_results.extend(items)
+        for name in mocked:
+            all_results.extend(self._mock_crawl_results(name))
         
+        self.last_crawl_stats = {
+            "sources": len(requests_batch),
+            "mocked_categories": mocked,
+            "succeeded": sum(1 for r in results if r.success),
+            "not_modified": sum(1 for r in results if r.not_modified),
+            "failed": {r.url: r.error for r in results if not r.success},
+            "elapsed": time.monotonic() - started,
+            "engine": engine.get_statistics(),
+        }
         self.crawl_results = all_results
         return all_results
     
+    def crawl_all(self, categories: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        执行所有爬虫（同步入口，事件循环中请优先使用 crawl_all_async）
+        
+        在运行中的事件循环内调用时，改为在独立线程的新事件循环中用同配置的引擎副本执行，
+        不占用调用方循环上的共享连接池（调用方线程会阻塞到爬取完成）。
+        
+        Args:
+            categories: 爬取类别（默认全部）
+        
+        Returns:
+            所有爬取的数据
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._crawl_and_close(categories, self.engine))
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="crawl-sync") as pool:
+            return pool.submit(asyncio.run, self._crawl_and_close(categories, self.engine.copy())).result()
+    
+    async def _crawl_and_close(self, categories: Optional[List[str]], engine: CrawlEngine) -> List[Dict[str, Any]]:
+        # asyncio.run 每次新建事件循环，连接池不能跨循环复用
+        try:
+            return await self._crawl(categories, engine)
+        finally:
+            await engine.aclose()
+    
     def _mock_crawl_results(self, category: str) -> List[Dict[str, Any]]:
         """生成模拟爬取结果"""
         return [
@@ -0,0 +1,200 @@
+import asyncio
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from crawlers.crawl_engine import CrawlEngine, CrawlRequest
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """按 server.pages 返回固定页面；/flaky 前 N 次返回 503"""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] += 1
+            hits = server.hits[self.path]
+        if self.path == "/flaky" and hits <= server.flaky_failures:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        body = server.pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"{self.path}-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server(pages, flaky_failures=0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    server.pages = pages
+    server.hits = Counter()
+    server.lock = threading.Lock()
+    server.flaky_failures = flaky_failures
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server
+
+
+@pytest.fixture
+def servers():
+    started = [
+        _start_server({"/a": "alpha", "/b": "beta", "/flaky": "ok"}, flaky_failures=2),
+        _start_server({"/c": "gamma"}),
+    ]
+    yield started
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+def _engine(**kwargs):
+    options = dict(requests_per_minute=6000, burst=10, retry_backoff=0.01, use_processes=False, timeout=5)
+    options.update(kwargs)
+    return CrawlEngine(**options)
+
+
+def parse_words(html):
+    return [{"title": word} for word in html.split()]
+
+
+@pytest.mark.asyncio
+async def test_crawl_across_domains_with_dedup_and_parsing(servers):
+    first, second = servers
+    engine = _engine()
+    urls = [f"{first.base_url}/a", f"{first.base_url}/b", f"{second.base_url}/c", f"{first.base_url}/a#frag"]
+    try:
+        results = await engine.crawl([CrawlRequest(url=url, parser=parse_words) for url in urls])
+    finally:
+        await engine.aclose()
+
+    titles = sorted(item["title"] for result in results for item in result.items)
+    assert titles == ["alpha", "beta", "gamma"]
+    assert all(result.success for result in results)
+    assert engine.stats["duplicates"] == 1
+    assert first.hits["/a"] == 1
+    assert engine.get_statistics()["domains"] == 2
+
+
+@pytest.mark.asyncio
+async def test_second_crawl_uses_etag_and_reuses_parsed_items(servers):
+    first, _ = servers
+    engine = _engine()
+    try:
+        await engine.fetch(f"{first.base_url}/a", parse_words)
+        again = await engine.fetch(f"{first.base_url}/a", parse_words)
+    finally:
+        await engine.aclose()
+
+    assert again.status_code == 304
+    assert again.not_modified
+    assert again.items == [{"title": "alpha"}]
+    assert engine.stats["not_modified"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retryable_status_is_retried_until_success(servers):
+    first, _ = servers
+    engine = _engine(max_retries=3)
+    try:
+        result = await engine.fetch(f"{first.base_url}/flaky")
+    finally:
+        await engine.aclose()
+
+    assert result.success and result.content == "ok"
+    assert result.attempts == 3
+    assert engine.stats["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_exhausted_returns_failure(servers):
+    first, _ = servers
+    engine = _engine(max_retries=1)
+    try:
+        result = await engine.fetch(f"{first.base_url}/flaky")
+    finally:
+        await engine.aclose()
+
+    assert not result.success
+    assert result.status_code == 503
+
+
+# ============ CrawlerManager ============
+
+@pytest.fixture
+def news_crawler():
+    pytest.importorskip("bs4")
+    import crawlers.news_crawler as module
+    return module
+
+
+def _manager(module, base_url):
+    class FixtureCrawler(module.NewsCrawler):
+        has_parser = True
+
+        def __init__(self):
+            super().__init__("夹具爬虫")
+            self.sources = [f"{base_url}/a", f"{base_url}/b"]
+
+        def parse_content(self, html):
+            return parse_words(html)
+
+    manager = module.CrawlerManager(engine=_engine())
+    manager.crawlers["fixture"] = FixtureCrawler()
+    return manager
+
+
+def test_stub_categories_stay_off_the_network(news_crawler, servers):
+    first, _ = servers
+    manager = _manager(news_crawler, first.base_url)
+    for crawler in manager.crawlers.values():
+        if not crawler.has_parser:
+            crawler.sources = [f"{first.base_url}/c"]
+
+    results = manager.crawl_all()
+
+    assert sorted(item["title"] for item in results if item.get("title") in ("alpha", "beta")) == ["alpha", "beta"]
+    assert first.hits["/c"] == 0
+    assert set(manager.last_crawl_stats["mocked_categories"]) == {"policy", "tech", "industry", "hot"}
+    assert manager.last_crawl_stats["sources"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_crawl_all_works_inside_running_loop(news_crawler, servers):
+    first, _ = servers
+    manager = _manager(news_crawler, first.base_url)
+
+    results = manager.crawl_all(["fixture"])
+    assert sorted(item["title"] for item in results) == ["alpha", "beta"]
+
+    # 调用方循环上的共享引擎不受影响
+    again = await manager.crawl_all_async(["fixture"])
+    assert sorted(item["title"] for item in again) == ["alpha", "beta"]
+    await manager.engine.aclose()
+    await asyncio.sleep(0)
@@ -0,0 +1,107 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from analysis.trend_index import TrendIndex
+
+HOUR = 3600
+NOW = 1_000 * HOUR + 1800
+
+
+def _item(i, title, hours_ago=0.0, **extra):
+    return {
+        "url": f"https://example.com/{i}",
+        "title": title,
+        "content": extra.pop("content", ""),
+        "category": extra.pop("category", "科技"),
+        "source": extra.pop("source", "测试"),
+        "publish_date": NOW - hours_ago * HOUR,
+        **extra,
+    }
+
+
+def test_hot_topics_counts_title_keywords_exactly():
+    index = TrendIndex(window_seconds=HOUR)
+    items = [_item(i, "人工智能 芯片") for i in range(5)] + [_item(10 + i, "新能源 汽车") for i in range(2)]
+    assert index.add_many(items) == 7
+    assert index.add(items[0]) is None
+
+    topics = index.hot_topics(threshold=3)
+    assert {t["keyword"] for t in topics} == {"人工智能", "芯片"}
+    top = topics[0]
+    assert top["frequency"] == 5
+    assert top["related_count"] == 5
+    assert len(top["sample_articles"]) == 3
+
+
+def test_windowed_hot_topics_only_see_recent_windows():
+    index = TrendIndex(window_seconds=HOUR)
+    index.add_many(_item(i, "旧闻 话题", hours_ago=5) for i in range(4))
+    index.add_many(_item(100 + i, "最新 话题", hours_ago=0) for i in range(3))
+
+    recent = {t["keyword"]: t for t in index.hot_topics(threshold=1, windows=1, now=NOW)}
+    assert set(recent) == {"最新", "话题"}
+    assert recent["话题"]["frequency"] == 3
+    # 示例资讯也只取窗口内的
+    assert all(a["title"] == "最新 话题" for a in recent["话题"]["sample_articles"])
+
+    everything = {t["keyword"]: t["frequency"] for t in index.hot_topics(threshold=1)}
+    assert everything["话题"] == 7
+
+
+def test_detect_bursts_against_baseline():
+    index = TrendIndex(window_seconds=HOUR)
+    n = 0
+    for hours_ago in range(1, 7):
+        index.add(_item(n, "日常 新闻", hours_ago=hours_ago))
+        n += 1
+    for _ in range(8):
+        index.add(_item(n, "突发 地震", hours_ago=0))
+        n += 1
+    index.add(_item(n, "日常 新闻", hours_ago=0))
+
+    bursts = index.detect_bursts(windows=1, baseline_windows=6, now=NOW)
+    keywords = [b["keyword"] for b in bursts]
+    assert set(keywords) == {"突发", "地震"}
+    assert bursts[0]["current_count"] == 8
+    assert bursts[0]["baseline_count"] == 0
+    assert index.detect_bursts(windows=1, baseline_windows=6, now=NOW + 10 * HOUR) == []
+
+
+def test_size_limit_evicts_oldest_documents_and_counts():
+    index = TrendIndex(window_seconds=HOUR, max_documents=10)
+    for i in range(25):
+        index.add(_item(i, f"标题{i} 共同", content="正文 内容", category=f"c{i % 2}"))
+
+    assert len(index) <= 10
+    stats = index.get_statistics()
+    assert stats["evicted"] == 25 - len(index)
+    kept = [doc.item for doc in index.documents]
+    assert kept[-1]["title"] == "标题24 共同"
+
+    assert index.keyword_counts["共同"] == len(index)
+    assert "标题0" not in index.keyword_counts
+    assert "标题0" not in index.postings
+    assert len(index.postings["共同"]) == len(index)
+    assert index.content_counts["正文"] == len(index)
+    assert sum(index.categories.values()) == len(index)
+    assert index.hot_topics(threshold=1, limit=1)[0]["related_count"] == len(index)
+
+    # 被淘汰的资讯可以重新入库
+    assert index.add(_item(0, "标题0 共同")) is not None
+    assert index.document(kept[-1]).item is kept[-1]
+
+
+def test_documents_expire_with_their_windows():
+    index = TrendIndex(window_seconds=HOUR, max_windows=3, max_documents=None)
+    index.add_many(_item(i, "过期 话题", hours_ago=10) for i in range(3))
+    index.add_many(_item(10 + i, "当前 话题", hours_ago=0) for i in range(2))
+
+    assert len(index) == 2
+    assert index.evicted == 3
+    assert "过期" not in index.postings
+    assert index.keyword_counts["话题"] == 2
+    assert {t["keyword"] for t in index.hot_topics(threshold=2)} == {"当前", "话题"}
@@ -2,7 +2,12 @@
 超级Agent主界面API模块
 """
 
-from .super_agent_api import router
-
 __all__ = ['router']
 
+
+def __getattr__(name):
+    # 延迟导入：仅在访问 api.router 时才加载体量很大的 super_agent_api
+    if name == "router":
+        from .super_agent_api import router
+        return router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
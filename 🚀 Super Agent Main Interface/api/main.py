@@ -20,17 +20,17 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from api.super_agent_api import (
-    router as super_agent_router,
-    observability_system,
-    audit_pipeline,
-    risk_engine,
-    permission_guard,
-    crawler_compliance_service,
-)
+# super_agent_api 体量很大，不在启动时导入：由 register_domain_routers 按前缀懒注册
+from api.routers import load_lazy_domain_routers, register_domain_routers
+from core.lazy_loader import lazy_registry
 from core.observability_middleware import ObservabilityMiddleware
+from core.observability_system import get_observability_system
 from core.security.middleware import SecurityMiddleware
 from core.security.audit import get_audit_logger
+from core.security.audit_pipeline import get_audit_pipeline
+from core.security.crawler_compliance import get_crawler_compliance_service
+from core.security.permission_guard import get_permission_guard
+from core.security.risk_engine import get_risk_engine
 from core.tenant_middleware import TenantContextMiddleware
 
 # 配置日志
@@ -48,7 +48,13 @@ async def lifespan(app: FastAPI):
     # 启动时初始化
     logger.info("🚀 正在启动超级Agent主界面...")
     
-    # 初始化服务（服务已在super_agent_api.py中初始化）
+    # 懒加载子系统与懒注册的领域路由按 SUPER_AGENT_WARMUP 预热，其余在首次请求时初始化
+    routers = await load_lazy_domain_routers(app)
+    if routers:
+        logger.info(f"已预热领域路由: {routers}")
+    warmed = await lazy_registry.warm_up()
+    if warmed:
+        logger.info(f"已预热子系统: {warmed}")
     logger.info("✅ 服务初始化完成")
     
     yield
@@ -69,10 +75,10 @@ app = FastAPI(
 app.add_middleware(
     SecurityMiddleware,
     audit_logger=get_audit_logger(),
-    audit_pipeline=audit_pipeline,
-    risk_engine=risk_engine,
-    permission_guard=permission_guard,
-    crawler_compliance=crawler_compliance_service,
+    audit_pipeline=get_audit_pipeline(),
+    risk_engine=get_risk_engine(),
+    permission_guard=get_permission_guard(),
+    crawler_compliance=get_crawler_compliance_service(),
 )
 
 # 多租户上下文中间件
@@ -83,6 +89,7 @@ app.add_middleware(
 )
 
 # P0-018: 添加可观测性中间件（必须在CORS之前）
+observability_system = get_observability_system()
 if observability_system:
     app.add_middleware(
         ObservabilityMiddleware,
@@ -109,8 +116,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 注册API路由
-app.include_router(super_agent_router)
+# 注册API路由（super_agent 领域懒注册，首个 /api/super-agent 请求时加载）
+register_domain_routers(app)
 
 # 静态文件服务
 web_dir = Path(__file__).parent.parent / "web"
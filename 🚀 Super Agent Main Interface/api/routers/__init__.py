@@ -0,0 +1,238 @@
+"""
+领域路由注册表
+
+super_agent_api.py 中的大块领域路由逐步拆分到本包，每个领域模块只在注册时导入，
+其依赖的子系统通过 core.lazy_loader 在首次请求时才初始化。
+
+仍留在大模块中的领域按 URL 前缀懒注册：启动时只放一个占位路由，
+首个命中该前缀的请求才导入模块并把真实路由挂到应用上（之后占位路由移除）。
+启动预热可通过 SUPER_AGENT_WARMUP=super_agent 或 "*" 提前加载。
+
+可通过环境变量 SUPER_AGENT_DISABLED_ROUTERS=cursor,... 关闭指定领域。
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from starlette._utils import get_route_path
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.websockets import WebSocketClose
+
+logger = logging.getLogger(__name__)
+
+# 领域名 -> 模块路径（模块需暴露 router）
+DOMAIN_ROUTERS: Dict[str, str] = {
+    "cursor": "api.routers.cursor",
+    "tenants": "api.routers.tenants",
+    "lifecycle": "api.routers.lifecycle",
+    "reliability": "api.routers.reliability",
+}
+
+# 懒注册领域：领域名 -> (URL 前缀, 模块路径)
+LAZY_DOMAIN_ROUTERS: Dict[str, Tuple[str, str]] = {
+    "super_agent": ("/api/super-agent", "api.super_agent_api"),
+}
+
+
+class LazyDomainRoute(BaseRoute):
+    """
+    懒注册占位路由
+
+    匹配前缀下的所有请求；首次处理时导入模块，把其 router 插入到占位路由所在位置，
+    然后交回应用路由重新分发。导入在线程池中执行（并发的首批请求共用一次导入），
+    不阻塞事件循环；路由挂载和模块的 startup() 钩子回到事件循环中执行。
+    导入失败会被缓存，后续请求直接返回 503，只有显式 retry 才会重新导入。
+    """
+
+    def __init__(self, app: FastAPI, name: str, prefix: str, module_path: str):
+        self.app = app
+        self.name = name
+        self.prefix = prefix.rstrip("/")
+        self.module_path = module_path
+        self.loaded = False
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.failed_at: Optional[float] = None
+        self._module: Optional[ModuleType] = None
+        self._import_lock = threading.Lock()
+        self._mount_lock: Optional[asyncio.Lock] = None
+
+    def matches(self, scope: Dict[str, Any]) -> Tuple[Match, Dict[str, Any]]:
+        if scope["type"] in ("http", "websocket"):
+            path = get_route_path(scope)
+            if path == self.prefix or path.startswith(self.prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params: Any):
+        raise NoMatchFound(name, path_params)
+
+    def _cached_failure(self) -> RuntimeError:
+        return RuntimeError(f"领域模块导入失败（已缓存）: {self.error}")
+
+    def _import_module(self, retry: bool = False) -> ModuleType:
+        """在工作线程中导入模块；同一时刻只导入一次，失败结果被缓存"""
+        with self._import_lock:
+            if self._module is not None:
+                return self._module
+            if self.failed_at is not None and not retry:
+                raise self._cached_failure()
+            try:
+                self._module = importlib.import_module(self.module_path)
+            except Exception as exc:
+                logger.error(f"领域模块导入失败 {self.module_path}: {exc}", exc_info=True)
+                self.error = str(exc)
+                self.failed_at = time.time()
+                raise
+            self.error = None
+            self.failed_at = None
+            return self._module
+
+    def _mount(self, module: ModuleType) -> int:
+        routes = self.app.router.routes
+        position = routes.index(self) if self in routes else len(routes)
+        existing = len(routes)
+        self.app.include_router(module.router)
+        added = routes[existing:]
+        del routes[existing:]
+        if self in routes:
+            routes.remove(self)
+        routes[position:position] = added
+        # 新路由需要出现在 /docs 中
+        self.app.openapi_schema = None
+        return len(module.router.routes)
+
+    async def load(self, retry: bool = False):
+        """导入领域模块并挂载其路由（重复调用无副作用）"""
+        if self.loaded:
+            return
+        if self.failed_at is not None and not retry:
+            raise self._cached_failure()
+        if self._mount_lock is None:
+            self._mount_lock = asyncio.Lock()
+        async with self._mount_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            module = await asyncio.to_thread(self._import_module, retry)
+            added = self._mount(module)
+            self.loaded = True
+            self.load_seconds = time.perf_counter() - started
+            logger.info(f"领域路由已加载 {self.name}（{added}条，{self.load_seconds * 1000:.1f}ms）")
+            startup = getattr(module, "startup", None)
+            if startup is not None:
+                try:
+                    await startup()
+                except Exception as exc:
+                    logger.error(f"领域启动任务失败 {self.name}: {exc}", exc_info=True)
+
+    async def handle(self, scope, receive, send):
+        try:
+            await self.load()
+        except Exception as exc:
+            logger.warning(f"领域路由不可用 {self.name}: {exc}")
+            if scope["type"] == "websocket":
+                await WebSocketClose(code=1011)(scope, receive, send)
+            else:
+                response = JSONResponse(
+                    {"success": False, "error": f"领域路由加载失败: {self.name}"},
+                    status_code=503,
+                )
+                await response(scope, receive, send)
+            return
+        await self.app.router(scope, receive, send)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "prefix": self.prefix,
+            "loaded": self.loaded,
+            "load_ms": round(self.load_seconds * 1000, 2) if self.load_seconds is not None else None,
+            "error": self.error,
+            "failed_at": self.failed_at,
+        }
+
+
+def register_domain_routers(app: FastAPI, enabled: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    按领域注册路由
+
+    Args:
+        app: FastAPI应用
+        enabled: 需要注册的领域（None 表示全部，除去被环境变量禁用的）
+
+    Returns:
+        实际注册的领域列表
+    """
+    disabled = {n.strip() for n in os.getenv("SUPER_AGENT_DISABLED_ROUTERS", "").split(",") if n.strip()}
+    names = list(enabled) if enabled is not None else [*DOMAIN_ROUTERS, *LAZY_DOMAIN_ROUTERS]
+    registered: List[str] = []
+    for name in names:
+        if name in disabled:
+            logger.info(f"领域路由已禁用: {name}")
+            continue
+        if name in LAZY_DOMAIN_ROUTERS:
+            prefix, module_path = LAZY_DOMAIN_ROUTERS[name]
+            app.router.routes.append(LazyDomainRoute(app, name, prefix, module_path))
+            registered.append(name)
+            continue
+        module_path = DOMAIN_ROUTERS.get(name)
+        if module_path is None:
+            logger.warning(f"未知领域路由: {name}")
+            continue
+        try:
+            module = importlib.import_module(module_path)
+        except Exception as exc:
+            logger.error(f"领域路由加载失败 {name}: {exc}")
+            continue
+        app.include_router(module.router)
+        registered.append(name)
+    return registered
+
+
+def _lazy_routes(app: FastAPI) -> List[LazyDomainRoute]:
+    return [route for route in app.router.routes if isinstance(route, LazyDomainRoute)]
+
+
+async def load_lazy_domain_routers(
+    app: FastAPI,
+    names: Optional[Iterable[str]] = None,
+    retry: bool = False,
+) -> Dict[str, Any]:
+    """
+    预先加载懒注册的领域
+
+    Args:
+        names: 需要加载的领域；None 时读取 SUPER_AGENT_WARMUP（"*" 表示全部）
+        retry: 是否重新导入此前失败的领域
+    """
+    if names is None:
+        raw = os.getenv("SUPER_AGENT_WARMUP", "")
+        names = None if raw.strip() == "*" else [n.strip() for n in raw.split(",") if n.strip()]
+    wanted = set(names) if names is not None else None
+    results: Dict[str, Any] = {}
+    for route in _lazy_routes(app):
+        if wanted is not None and route.name not in wanted:
+            continue
+        try:
+            await route.load(retry=retry)
+        except Exception as exc:
+            logger.error(f"领域路由预热失败 {route.name}: {exc}")
+        results[route.name] = route.status()
+    return results
+
+
+__all__ = [
+    "DOMAIN_ROUTERS",
+    "LAZY_DOMAIN_ROUTERS",
+    "LazyDomainRoute",
+    "register_domain_routers",
+    "load_lazy_domain_routers",
+]
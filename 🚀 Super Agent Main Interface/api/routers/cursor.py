@@ -0,0 +1,440 @@
+"""
+P0-016: Cursor协议/插件/本地桥/授权系统路由，以及编程助手的 Cursor 桥接路由
+
+组件在首次请求（或启动预热 SUPER_AGENT_WARMUP=cursor）时才初始化，
+不再拖慢 super_agent_api 的导入。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from core.lazy_loader import lazy_singleton
+from core.security.auth import require_api_token
+from core.security.config import get_security_settings
+
+router_dependencies = [Depends(require_api_token)] if get_security_settings().api_token else []
+
+router = APIRouter(prefix="/api/super-agent", tags=["Super Agent"], dependencies=router_dependencies)
+
+
+@dataclass
+class CursorComponents:
+    """Cursor集成组件及其协议枚举"""
+    protocol: Any
+    plugin_system: Any
+    authorization: Any
+    local_bridge: Any
+    ProtocolCommand: Any
+    AuthorizationLevel: Any
+    AccessScope: Any
+
+
+def _build_cursor_components() -> CursorComponents:
+    from AI_Programming_Assistant.core import (
+        AccessScope,
+        AuthorizationLevel,
+        CursorAuthorization,
+        CursorLocalBridge,
+        CursorPluginSystem,
+        CursorProtocol,
+        ProtocolCommand,
+    )
+
+    protocol = CursorProtocol()
+    plugin_system = CursorPluginSystem()
+    authorization = CursorAuthorization()
+    local_bridge = CursorLocalBridge(
+        protocol=protocol,
+        plugin_system=plugin_system,
+        permission_manager=plugin_system.permission_manager
+    )
+    return CursorComponents(
+        protocol=protocol,
+        plugin_system=plugin_system,
+        authorization=authorization,
+        local_bridge=local_bridge,
+        ProtocolCommand=ProtocolCommand,
+        AuthorizationLevel=AuthorizationLevel,
+        AccessScope=AccessScope,
+    )
+
+
+cursor_components = lazy_singleton("cursor", _build_cursor_components)
+cursor_bridges = lazy_singleton("cursor_bridge", "AI_Programming_Assistant.core:CursorBridge")
+
+
+async def _cursor() -> CursorComponents:
+    try:
+        return await cursor_components.aget()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Cursor集成系统未初始化: {exc}")
+
+
+async def _cursor_bridge() -> Any:
+    try:
+        return await cursor_bridges.aget()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Cursor桥接未初始化: {exc}")
+
+
+@router.post("/cursor/protocol/start")
+async def start_cursor_protocol():
+    """启动Cursor协议服务器"""
+    cursor = await _cursor()
+    
+    await cursor.local_bridge.start()
+    return {"success": True, "message": "Cursor协议服务器已启动"}
+
+
+@router.post("/cursor/protocol/stop")
+async def stop_cursor_protocol():
+    """停止Cursor协议服务器"""
+    cursor = await _cursor()
+    
+    await cursor.local_bridge.stop()
+    return {"success": True, "message": "Cursor协议服务器已停止"}
+
+
+@router.post("/cursor/protocol/send")
+async def send_cursor_protocol_message(
+    command: str,
+    params: Dict[str, Any],
+    token_id: Optional[str] = None
+):
+    """
+    发送Cursor协议消息
+    
+    Args:
+        command: 命令名称
+        params: 命令参数
+        token_id: 授权令牌ID（可选）
+    """
+    cursor = await _cursor()
+    
+    # 验证授权
+    if token_id and not cursor.authorization.validate_token(token_id):
+        raise HTTPException(status_code=401, detail="无效的授权令牌")
+    
+    try:
+        cmd = cursor.ProtocolCommand(command)
+        message = await cursor.local_bridge.send_to_cursor(cmd, params)
+        
+        return {
+            "success": message.message_type.value != "error",
+            "message_type": message.message_type.value,
+            "result": message.result,
+            "error": message.error
+        }
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的命令: {command}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/cursor/plugins/load")
+async def load_cursor_plugin(
+    plugin_path: str,
+    config: Optional[Dict[str, Any]] = None
+):
+    """
+    加载Cursor插件
+    
+    Args:
+        plugin_path: 插件路径
+        config: 插件配置（可选）
+    """
+    cursor = await _cursor()
+    
+    try:
+        plugin = cursor.plugin_system.load_plugin(plugin_path, config)
+        return {
+            "success": True,
+            "plugin": {
+                "plugin_id": plugin.metadata.plugin_id,
+                "name": plugin.metadata.name,
+                "version": plugin.metadata.version,
+                "status": plugin.status.value
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cursor/plugins")
+async def list_cursor_plugins():
+    """列出所有Cursor插件"""
+    cursor = await _cursor()
+    
+    plugins = cursor.plugin_system.list_plugins()
+    return {"success": True, "plugins": plugins}
+
+
+@router.post("/cursor/plugins/{plugin_id}/enable")
+async def enable_cursor_plugin(plugin_id: str):
+    """启用Cursor插件"""
+    cursor = await _cursor()
+    
+    try:
+        cursor.plugin_system.enable_plugin(plugin_id)
+        return {"success": True, "message": f"插件已启用: {plugin_id}"}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/cursor/plugins/{plugin_id}/disable")
+async def disable_cursor_plugin(plugin_id: str):
+    """禁用Cursor插件"""
+    cursor = await _cursor()
+    
+    try:
+        cursor.plugin_system.disable_plugin(plugin_id)
+        return {"success": True, "message": f"插件已禁用: {plugin_id}"}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.delete("/cursor/plugins/{plugin_id}")
+async def unload_cursor_plugin(plugin_id: str):
+    """卸载Cursor插件"""
+    cursor = await _cursor()
+    
+    try:
+        cursor.plugin_system.unload_plugin(plugin_id)
+        return {"success": True, "message": f"插件已卸载: {plugin_id}"}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/cursor/authorization/create-token")
+async def create_cursor_token(
+    client_id: str,
+    authorization_level: str,
+    access_scope: str,
+    allowed_paths: Optional[List[str]] = None,
+    denied_paths: Optional[List[str]] = None,
+    expires_in_hours: Optional[int] = None
+):
+    """
+    创建Cursor授权令牌
+    
+    Args:
+        client_id: 客户端ID
+        authorization_level: 授权级别（none/read_only/limited/standard/full）
+        access_scope: 访问范围（single_file/project/workspace/system）
+        allowed_paths: 允许的路径列表（可选）
+        denied_paths: 拒绝的路径列表（可选）
+        expires_in_hours: 过期时间（小时，可选）
+    """
+    cursor = await _cursor()
+    
+    try:
+        level = cursor.AuthorizationLevel(authorization_level)
+        scope = cursor.AccessScope(access_scope)
+        
+        token = cursor.authorization.create_token(
+            client_id=client_id,
+            authorization_level=level,
+            access_scope=scope,
+            allowed_paths=allowed_paths,
+            denied_paths=denied_paths,
+            expires_in_hours=expires_in_hours
+        )
+        
+        return {
+            "success": True,
+            "token": {
+                "token_id": token.token_id,
+                "client_id": token.client_id,
+                "authorization_level": token.authorization_level.value,
+                "access_scope": token.access_scope.value,
+                "expires_at": token.expires_at.isoformat() if token.expires_at else None
+            }
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/cursor/authorization/validate")
+async def validate_cursor_token(token_id: str):
+    """验证Cursor授权令牌"""
+    cursor = await _cursor()
+    
+    is_valid = cursor.authorization.validate_token(token_id)
+    token = cursor.authorization.get_token(token_id)
+    
+    return {
+        "success": True,
+        "is_valid": is_valid,
+        "token": {
+            "token_id": token_id,
+            "authorization_level": token.authorization_level.value if token else None,
+            "expires_at": token.expires_at.isoformat() if token and token.expires_at else None
+        } if token else None
+    }
+
+
+@router.post("/cursor/authorization/check-permission")
+async def check_cursor_permission(
+    token_id: str,
+    resource_type: str,
+    resource_path: str,
+    action: str
+):
+    """
+    检查Cursor权限
+    
+    Args:
+        token_id: 令牌ID
+        resource_type: 资源类型
+        resource_path: 资源路径
+        action: 操作（read/write/execute）
+    """
+    cursor = await _cursor()
+    
+    has_permission = cursor.authorization.check_permission(
+        token_id, resource_type, resource_path, action
+    )
+    
+    return {
+        "success": True,
+        "has_permission": has_permission,
+        "resource_type": resource_type,
+        "resource_path": resource_path,
+        "action": action
+    }
+
+
+@router.delete("/cursor/authorization/tokens/{token_id}")
+async def revoke_cursor_token(token_id: str, reason: Optional[str] = None):
+    """撤销Cursor授权令牌"""
+    cursor = await _cursor()
+    
+    cursor.authorization.revoke_token(token_id, reason)
+    return {"success": True, "message": f"令牌已撤销: {token_id}"}
+
+
+@router.get("/cursor/authorization/tokens")
+async def list_cursor_tokens(client_id: Optional[str] = None):
+    """列出Cursor授权令牌"""
+    cursor = await _cursor()
+    
+    tokens = cursor.authorization.list_tokens(client_id)
+    return {"success": True, "tokens": tokens}
+
+
+@router.get("/cursor/authorization/audit-log")
+async def get_cursor_audit_log(
+    token_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    limit: int = 100
+):
+    """获取Cursor审计日志"""
+    cursor = await _cursor()
+    
+    logs = cursor.authorization.get_audit_log(token_id, event_type, limit)
+    return {"success": True, "logs": logs, "count": len(logs)}
+
+
+@router.get("/cursor/bridge/status")
+async def get_cursor_bridge_status():
+    """获取Cursor桥接状态"""
+    cursor = await _cursor()
+    
+    status = cursor.local_bridge.get_status()
+    return {"success": True, "status": status}
+
+
+@router.get("/cursor/bridge/connections")
+async def list_cursor_bridge_connections():
+    """列出Cursor桥接连接"""
+    cursor = await _cursor()
+    
+    connections = cursor.local_bridge.list_connections()
+    return {"success": True, "connections": connections}
+
+
+@router.get("/cursor/authorization/statistics")
+async def get_cursor_authorization_statistics():
+    """获取Cursor授权统计信息"""
+    cursor = await _cursor()
+    
+    stats = cursor.authorization.get_statistics()
+    return {"success": True, "statistics": stats}
+
+
+# ====== 编程助手：Cursor 桥接 ======
+@router.get("/coding/cursor/status")
+async def cursor_status():
+    cursor_bridge = await _cursor_bridge()
+    return cursor_bridge.get_status()
+
+class CursorOpenRequest(BaseModel):
+    file_path: str
+    line_number: Optional[int] = None
+
+@router.post("/coding/cursor/open-file")
+async def cursor_open_file(req: CursorOpenRequest):
+    cursor_bridge = await _cursor_bridge()
+    result = await cursor_bridge.open_in_cursor(req.file_path, req.line_number)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error", "打开失败"))
+    return result
+
+class CursorSyncRequest(BaseModel):
+    file_path: str
+    code: str
+
+@router.post("/coding/cursor/sync-code")
+async def cursor_sync_code(req: CursorSyncRequest):
+    cursor_bridge = await _cursor_bridge()
+    return await cursor_bridge.sync_code(req.file_path, req.code)
+
+class CursorEdit(BaseModel):
+    type: str
+    start_line: int
+    end_line: int
+    content: Optional[str] = ""
+
+class CursorEditRequest(BaseModel):
+    file_path: str
+    edits: List[CursorEdit]
+
+@router.post("/coding/cursor/edit-code")
+async def cursor_edit_code(req: CursorEditRequest):
+    cursor_bridge = await _cursor_bridge()
+    edits = [e.dict() for e in req.edits]
+    return await cursor_bridge.edit_code(req.file_path, edits)
+
+class CursorCompletionRequest(BaseModel):
+    file_path: str
+    line_number: int
+    column: int
+    context_lines: int = 5
+
+@router.post("/coding/cursor/completion")
+async def cursor_completion(req: CursorCompletionRequest):
+    cursor_bridge = await _cursor_bridge()
+    return await cursor_bridge.get_code_completion(req.file_path, req.line_number, req.column, req.context_lines)
+
+class CursorDetectRequest(BaseModel):
+    file_path: str
+
+@router.post("/coding/cursor/detect-errors")
+async def cursor_detect_errors(req: CursorDetectRequest):
+    cursor_bridge = await _cursor_bridge()
+    return await cursor_bridge.detect_errors(req.file_path)
+
+class CursorProjectRequest(BaseModel):
+    project_path: str
+    files: Optional[List[str]] = None
+
+@router.post("/coding/cursor/open-project")
+async def cursor_open_project(req: CursorProjectRequest):
+    cursor_bridge = await _cursor_bridge()
+    result = await cursor_bridge.sync_project(req.project_path, req.files)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error", "打开项目失败"))
+    return result
@@ -0,0 +1,445 @@
+"""
+P2-303: 智能任务/自我学习/资源管理路由
+
+任务生命周期、学习曲线和资源调度器各自是懒加载单例，
+首次请求（或 SUPER_AGENT_WARMUP 预热）时才在线程池中初始化。
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+import logging
+
+from core.lazy_loader import LazySingleton, lazy_singleton
+from core.security.auth import require_api_token
+from core.security.config import get_security_settings
+
+logger = logging.getLogger(__name__)
+
+router_dependencies = [Depends(require_api_token)] if get_security_settings().api_token else []
+
+router = APIRouter(prefix="/api/super-agent", tags=["Super Agent"], dependencies=router_dependencies)
+
+task_lifecycle_managers = lazy_singleton("task_lifecycle", "core.task_lifecycle_manager:get_task_lifecycle_manager")
+learning_curve_trackers = lazy_singleton("learning_curve", "core.learning_curve_tracker:get_learning_curve_tracker")
+resource_schedulers = lazy_singleton("resource_scheduler", "core.resource_scheduler_with_hints:get_resource_scheduler")
+
+
+async def _subsystem(item: LazySingleton, label: str) -> Any:
+    try:
+        return await item.aget()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"{label}未初始化: {exc}")
+
+
+async def _task_lifecycle():
+    return await _subsystem(task_lifecycle_managers, "任务生命周期管理")
+
+
+async def _learning_curves():
+    return await _subsystem(learning_curve_trackers, "学习曲线追踪")
+
+
+async def _resource_scheduler():
+    return await _subsystem(resource_schedulers, "资源调度")
+
+
+class TaskCreateRequest(BaseModel):
+    """创建任务请求"""
+    task_name: str
+    task_type: str
+    priority: str = "medium"
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class LearningPointRequest(BaseModel):
+    """添加学习点请求"""
+    curve_id: str
+    accuracy: float = Field(..., ge=0, le=100)
+    loss: Optional[float] = None
+    epoch: Optional[int] = None
+    dataset_size: Optional[int] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class ResourceAllocateRequest(BaseModel):
+    """资源分配请求"""
+    task_id: str
+    resource_type: str
+    requested_amount: float = Field(..., ge=0, le=100)
+    priority: int = Field(5, ge=1, le=10)
+    metadata: Optional[Dict[str, Any]] = None
+
+
+@router.post("/task-lifecycle/create")
+async def create_task(
+    request: TaskCreateRequest,
+) -> Dict[str, Any]:
+    """创建任务"""
+    from core.task_lifecycle_manager import TaskPriority
+
+    task_lifecycle_manager = await _task_lifecycle()
+    try:
+        priority = TaskPriority(request.priority)
+        lifecycle = task_lifecycle_manager.create_task(
+            task_name=request.task_name,
+            task_type=request.task_type,
+            priority=priority,
+            metadata=request.metadata,
+        )
+        return {
+            "success": True,
+            "task": lifecycle.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"创建任务失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"创建失败: {str(e)}")
+
+
+@router.post("/task-lifecycle/{task_id}/start")
+async def start_task(
+    task_id: str,
+) -> Dict[str, Any]:
+    """启动任务"""
+    task_lifecycle_manager = await _task_lifecycle()
+    try:
+        success = task_lifecycle_manager.start_task(task_id)
+        if not success:
+            raise HTTPException(status_code=400, detail="任务不存在或状态不正确")
+        
+        task = task_lifecycle_manager.get_task(task_id)
+        return {
+            "success": True,
+            "task": task.to_dict(),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"启动任务失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"启动失败: {str(e)}")
+
+
+@router.post("/task-lifecycle/{task_id}/update-progress")
+async def update_task_progress(
+    task_id: str,
+    progress: float = Query(..., ge=0, le=100),
+    current_step: Optional[str] = None,
+    completed_steps: Optional[int] = None,
+) -> Dict[str, Any]:
+    """更新任务进度"""
+    task_lifecycle_manager = await _task_lifecycle()
+    try:
+        success = task_lifecycle_manager.update_progress(
+            task_id=task_id,
+            progress=progress,
+            current_step=current_step,
+            completed_steps=completed_steps,
+        )
+        if not success:
+            raise HTTPException(status_code=400, detail="任务不存在")
+        
+        task = task_lifecycle_manager.get_task(task_id)
+        return {
+            "success": True,
+            "task": task.to_dict(),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"更新进度失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"更新失败: {str(e)}")
+
+
+@router.post("/task-lifecycle/{task_id}/complete")
+async def complete_task(
+    task_id: str,
+    result: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """完成任务"""
+    task_lifecycle_manager = await _task_lifecycle()
+    try:
+        success = task_lifecycle_manager.complete_task(task_id, result)
+        if not success:
+            raise HTTPException(status_code=400, detail="任务不存在或状态不正确")
+        
+        task = task_lifecycle_manager.get_task(task_id)
+        return {
+            "success": True,
+            "task": task.to_dict(),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"完成任务失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"完成失败: {str(e)}")
+
+
+@router.get("/task-lifecycle/list")
+async def list_tasks(
+    status: Optional[str] = None,
+    task_type: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """列出任务"""
+    from core.task_lifecycle_manager import TaskStatus
+
+    task_lifecycle_manager = await _task_lifecycle()
+    try:
+        task_status = TaskStatus(status) if status else None
+        tasks = task_lifecycle_manager.list_tasks(
+            status=task_status,
+            task_type=task_type,
+            limit=limit,
+        )
+        return {
+            "success": True,
+            "tasks": [t.to_dict() for t in tasks],
+            "total": len(tasks),
+        }
+    except Exception as e:
+        logger.error(f"列出任务失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"列出失败: {str(e)}")
+
+
+@router.get("/task-lifecycle/statistics")
+async def get_task_statistics() -> Dict[str, Any]:
+    """获取任务统计"""
+    task_lifecycle_manager = await _task_lifecycle()
+    try:
+        stats = task_lifecycle_manager.get_task_statistics()
+        return {
+            "success": True,
+            "statistics": stats,
+        }
+    except Exception as e:
+        logger.error(f"获取统计失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.post("/learning-curve/create")
+async def create_learning_curve(
+    model_name: str,
+    task_type: str,
+    curve_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """创建学习曲线"""
+    learning_curve_tracker = await _learning_curves()
+    try:
+        curve = learning_curve_tracker.create_curve(
+            model_name=model_name,
+            task_type=task_type,
+            curve_id=curve_id,
+        )
+        return {
+            "success": True,
+            "curve": curve.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"创建学习曲线失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"创建失败: {str(e)}")
+
+
+@router.post("/learning-curve/add-point")
+async def add_learning_point(
+    request: LearningPointRequest,
+) -> Dict[str, Any]:
+    """添加学习点"""
+    learning_curve_tracker = await _learning_curves()
+    try:
+        success = learning_curve_tracker.add_point(
+            curve_id=request.curve_id,
+            accuracy=request.accuracy,
+            loss=request.loss,
+            epoch=request.epoch,
+            dataset_size=request.dataset_size,
+            metadata=request.metadata,
+        )
+        if not success:
+            raise HTTPException(status_code=400, detail="学习曲线不存在")
+        
+        curve = learning_curve_tracker.get_curve(request.curve_id)
+        return {
+            "success": True,
+            "curve": curve.to_dict(),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"添加学习点失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"添加失败: {str(e)}")
+
+
+@router.get("/learning-curve/{curve_id}/data")
+async def get_learning_curve_data(
+    curve_id: str,
+    include_loss: bool = False,
+) -> Dict[str, Any]:
+    """获取学习曲线数据"""
+    learning_curve_tracker = await _learning_curves()
+    try:
+        data = learning_curve_tracker.get_curve_data(
+            curve_id=curve_id,
+            include_loss=include_loss,
+        )
+        if not data:
+            raise HTTPException(status_code=404, detail="学习曲线不存在")
+        
+        return {
+            "success": True,
+            "data": data,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取学习曲线数据失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.get("/learning-curve/list")
+async def list_learning_curves(
+    model_name: Optional[str] = None,
+    task_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """列出学习曲线"""
+    learning_curve_tracker = await _learning_curves()
+    try:
+        curves = learning_curve_tracker.list_curves(
+            model_name=model_name,
+            task_type=task_type,
+        )
+        return {
+            "success": True,
+            "curves": [c.to_dict() for c in curves],
+            "total": len(curves),
+        }
+    except Exception as e:
+        logger.error(f"列出学习曲线失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"列出失败: {str(e)}")
+
+
+@router.get("/learning-curve/statistics")
+async def get_learning_statistics() -> Dict[str, Any]:
+    """获取学习统计"""
+    learning_curve_tracker = await _learning_curves()
+    try:
+        stats = learning_curve_tracker.get_learning_statistics()
+        return {
+            "success": True,
+            "statistics": stats,
+        }
+    except Exception as e:
+        logger.error(f"获取学习统计失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.post("/resource/allocate")
+async def allocate_resource(
+    request: ResourceAllocateRequest,
+) -> Dict[str, Any]:
+    """分配资源"""
+    from core.resource_scheduler_with_hints import ResourceType
+
+    resource_scheduler = await _resource_scheduler()
+    try:
+        resource_type = ResourceType(request.resource_type)
+        allocation = await resource_scheduler.allocate_resource(
+            task_id=request.task_id,
+            resource_type=resource_type,
+            requested_amount=request.requested_amount,
+            priority=request.priority,
+            metadata=request.metadata,
+        )
+        return {
+            "success": True,
+            "allocation": allocation.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"分配资源失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"分配失败: {str(e)}")
+
+
+@router.post("/resource/release/{allocation_id}")
+async def release_resource(
+    allocation_id: str,
+) -> Dict[str, Any]:
+    """释放资源"""
+    resource_scheduler = await _resource_scheduler()
+    try:
+        success = await resource_scheduler.release_resource(allocation_id)
+        if not success:
+            raise HTTPException(status_code=400, detail="资源分配不存在")
+        
+        return {
+            "success": True,
+            "message": "资源已释放",
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"释放资源失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"释放失败: {str(e)}")
+
+
+@router.get("/resource/hints")
+async def get_resource_hints(
+    hint_type: Optional[str] = None,
+    unacknowledged_only: bool = False,
+    limit: int = Query(50, ge=1, le=200),
+) -> Dict[str, Any]:
+    """获取交互提示"""
+    from core.resource_scheduler_with_hints import HintType
+
+    resource_scheduler = await _resource_scheduler()
+    try:
+        hint_type_enum = HintType(hint_type) if hint_type else None
+        hints = resource_scheduler.get_hints(
+            hint_type=hint_type_enum,
+            unacknowledged_only=unacknowledged_only,
+            limit=limit,
+        )
+        return {
+            "success": True,
+            "hints": [h.to_dict() for h in hints],
+            "total": len(hints),
+        }
+    except Exception as e:
+        logger.error(f"获取交互提示失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.post("/resource/hints/{hint_id}/acknowledge")
+async def acknowledge_hint(
+    hint_id: str,
+) -> Dict[str, Any]:
+    """确认提示"""
+    resource_scheduler = await _resource_scheduler()
+    try:
+        success = resource_scheduler.acknowledge_hint(hint_id)
+        if not success:
+            raise HTTPException(status_code=400, detail="提示不存在")
+        
+        return {
+            "success": True,
+            "message": "提示已确认",
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"确认提示失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"确认失败: {str(e)}")
+
+
+@router.get("/resource/suggestions")
+async def get_scheduling_suggestions() -> Dict[str, Any]:
+    """获取调度建议"""
+    resource_scheduler = await _resource_scheduler()
+    try:
+        suggestions = resource_scheduler.get_scheduling_suggestions()
+        return {
+            "success": True,
+            "suggestions": suggestions,
+        }
+    except Exception as e:
+        logger.error(f"获取调度建议失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
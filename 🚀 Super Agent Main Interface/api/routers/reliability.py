@@ -0,0 +1,227 @@
+"""
+P3-403: 性能与可靠性路由（负载/压力测试、SLO 报表、混沌测试）
+
+性能测试套件与混沌测试运行器位于仓库根目录的 tests/performance 与
+scripts/chaos_engineering，只在首次请求时导入。
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+
+from core.lazy_loader import LazySingleton, lazy_singleton
+from core.security.auth import require_api_token
+from core.security.config import get_security_settings
+
+logger = logging.getLogger(__name__)
+
+router_dependencies = [Depends(require_api_token)] if get_security_settings().api_token else []
+
+router = APIRouter(prefix="/api/super-agent", tags=["Super Agent"], dependencies=router_dependencies)
+
+
+
+def _performance_suite_loader():
+    from tests.performance.test_performance_suite import PerformanceTestSuite
+    return PerformanceTestSuite
+
+
+def _chaos_runner_loader():
+    from scripts.chaos_engineering.chaos_test_runner import ChaosTestRunner
+    return ChaosTestRunner
+
+
+slo_report_generators = lazy_singleton("slo_report", "core.slo_report_generator:get_slo_report_generator")
+performance_suites = lazy_singleton("performance_suite", _performance_suite_loader)
+chaos_runners = lazy_singleton("chaos_runner", _chaos_runner_loader)
+
+
+async def _subsystem(item: LazySingleton, label: str) -> Any:
+    try:
+        return await item.aget()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"{label}未初始化: {exc}")
+
+
+async def _slo_report_generator():
+    return await _subsystem(slo_report_generators, "SLO报表")
+
+
+async def _performance_suite_class():
+    return await _subsystem(performance_suites, "性能测试套件")
+
+
+async def _chaos_runner_class():
+    return await _subsystem(chaos_runners, "混沌测试运行器")
+
+
+@router.post("/performance/test/load")
+async def run_load_test(
+    endpoint: str = "/health",
+    concurrent_users: int = Query(10, ge=1, le=1000),
+    requests_per_user: int = Query(10, ge=1, le=100),
+) -> Dict[str, Any]:
+    """运行负载测试"""
+    suite_class = await _performance_suite_class()
+    try:
+        suite = suite_class()
+        result = await suite.load_test(
+            endpoint=endpoint,
+            concurrent_users=concurrent_users,
+            requests_per_user=requests_per_user,
+        )
+        await suite.close()
+        return {
+            "success": True,
+            "result": result.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"负载测试失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
+
+
+@router.post("/performance/test/stress")
+async def run_stress_test(
+    endpoint: str = "/health",
+    initial_users: int = Query(10, ge=1),
+    max_users: int = Query(100, ge=1),
+    step: int = Query(10, ge=1),
+) -> Dict[str, Any]:
+    """运行压力测试"""
+    suite_class = await _performance_suite_class()
+    try:
+        suite = suite_class()
+        results = await suite.stress_test(
+            endpoint=endpoint,
+            initial_users=initial_users,
+            max_users=max_users,
+            step=step,
+        )
+        await suite.close()
+        return {
+            "success": True,
+            "results": [r.to_dict() for r in results],
+        }
+    except Exception as e:
+        logger.error(f"压力测试失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
+
+
+@router.get("/slo/report")
+async def get_slo_report(
+    measurement_period: Optional[str] = None,
+) -> Dict[str, Any]:
+    """获取SLO报告"""
+    generator = await _slo_report_generator()
+    try:
+        report = generator.generate_slo_report(measurement_period)
+        return {
+            "success": True,
+            "report": report,
+        }
+    except Exception as e:
+        logger.error(f"生成SLO报告失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"生成失败: {str(e)}")
+
+
+@router.post("/slo/target")
+async def set_slo_target(
+    name: str,
+    target_value: float,
+    measurement_window: str = "30d",
+    error_budget: float = Query(0.01, ge=0, le=1),
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """设置SLO目标"""
+    generator = await _slo_report_generator()
+    try:
+        target = generator.set_slo_target(
+            name=name,
+            target_value=target_value,
+            measurement_window=measurement_window,
+            error_budget=error_budget,
+            metadata=metadata,
+        )
+        return {
+            "success": True,
+            "target": {
+                "name": target.name,
+                "target_value": target.target_value,
+                "measurement_window": target.measurement_window,
+                "error_budget": target.error_budget,
+            },
+        }
+    except Exception as e:
+        logger.error(f"设置SLO目标失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"设置失败: {str(e)}")
+
+
+@router.post("/chaos/test/sidecar-down")
+async def run_chaos_test_sidecar_down(
+    sidecar_name: str = "rag-sidecar",
+    duration: int = Query(60, ge=10, le=300),
+) -> Dict[str, Any]:
+    """运行Sidecar宕机故障演练"""
+    runner_class = await _chaos_runner_class()
+    try:
+        runner = runner_class()
+        result = await runner.test_sidecar_down(
+            sidecar_name=sidecar_name,
+            duration=duration,
+        )
+        return {
+            "success": result.success,
+            "result": result.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"故障演练失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
+
+
+@router.post("/chaos/test/database-degraded")
+async def run_chaos_test_database_degraded(
+    database_name: str = "postgres",
+    degradation_type: str = Query("slow_queries", pattern="^(slow_queries|connection_limit|disk_full)$"),
+    duration: int = Query(60, ge=10, le=300),
+) -> Dict[str, Any]:
+    """运行数据库降级故障演练"""
+    runner_class = await _chaos_runner_class()
+    try:
+        runner = runner_class()
+        result = await runner.test_database_degraded(
+            database_name=database_name,
+            degradation_type=degradation_type,
+            duration=duration,
+        )
+        return {
+            "success": result.success,
+            "result": result.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"故障演练失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
+
+
+@router.post("/chaos/test/api-timeout")
+async def run_chaos_test_api_timeout(
+    endpoint: str = "/gateway/rag/search",
+    timeout_duration: int = Query(30, ge=5, le=300),
+    test_duration: int = Query(60, ge=10, le=600),
+) -> Dict[str, Any]:
+    """运行API超时故障演练"""
+    runner_class = await _chaos_runner_class()
+    try:
+        runner = runner_class()
+        result = await runner.test_api_timeout(
+            endpoint=endpoint,
+            timeout_duration=timeout_duration,
+            test_duration=test_duration,
+        )
+        return {
+            "success": result.success,
+            "result": result.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"故障演练失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
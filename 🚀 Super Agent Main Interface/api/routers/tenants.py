@@ -0,0 +1,414 @@
+"""
+P3-402: 多租户管理与深度隔离路由（租户、配额、存储统计、审计）
+
+租户注册表、配额管理器、数据隔离和审计日志各自是懒加载单例，
+首次请求（或 SUPER_AGENT_WARMUP 预热）时才在线程池中初始化。
+"""
+
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+import logging
+
+from core.lazy_loader import LazySingleton, lazy_singleton
+from core.security.auth import require_api_token
+from core.security.config import get_security_settings
+from core.security.permission_guard import get_permission_guard
+from core.tenant_context import get_current_tenant
+
+logger = logging.getLogger(__name__)
+
+router_dependencies = [Depends(require_api_token)] if get_security_settings().api_token else []
+
+router = APIRouter(prefix="/api/super-agent", tags=["Super Agent"], dependencies=router_dependencies)
+
+security_read_dep = get_permission_guard().require("security:read")
+security_write_dep = get_permission_guard().require("security:write")
+
+tenant_registry = lazy_singleton("tenant_manager", "core.tenant_manager:tenant_manager")
+quota_managers = lazy_singleton("tenant_quota", "core.tenant_quota_manager:get_quota_manager")
+data_isolations = lazy_singleton("tenant_data_isolation", "core.tenant_data_isolation:get_tenant_data_isolation")
+audit_loggers = lazy_singleton("tenant_audit", "core.tenant_audit_logger:get_audit_logger")
+
+
+async def _subsystem(item: LazySingleton, label: str) -> Any:
+    try:
+        return await item.aget()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"{label}未初始化: {exc}")
+
+
+async def _tenant_manager():
+    return await _subsystem(tenant_registry, "租户管理")
+
+
+async def _quota_manager():
+    return await _subsystem(quota_managers, "配额管理")
+
+
+async def _data_isolation():
+    return await _subsystem(data_isolations, "租户数据隔离")
+
+
+async def _audit_logger():
+    return await _subsystem(audit_loggers, "租户审计日志")
+
+
+class TenantCreateRequest(BaseModel):
+    tenant_id: str = Field(..., min_length=2, max_length=32, pattern=r"^[a-z0-9\-_]+$")
+    name: str
+    plan: Optional[str] = "enterprise"
+    active: Optional[bool] = True
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class TenantUpdateRequest(BaseModel):
+    name: Optional[str]
+    plan: Optional[str]
+    active: Optional[bool]
+    metadata: Optional[Dict[str, Any]]
+
+
+class QuotaSetRequest(BaseModel):
+    """设置配额请求"""
+    tenant_id: str
+    quota_type: str
+    limit: int
+    reset_period: str = "monthly"
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class QuotaUseRequest(BaseModel):
+    """使用配额请求"""
+    tenant_id: str
+    quota_type: str
+    amount: int
+
+
+# ==================== 多租户管理 ====================
+
+@router.get("/tenants")
+async def list_tenants(include_inactive: bool = False, _: Dict = security_read_dep):
+    """列出租户（需安全读权限）"""
+    tenant_manager = await _tenant_manager()
+    tenants = tenant_manager.list_tenants(include_inactive=include_inactive)
+    return {"success": True, "tenants": tenants}
+
+
+@router.get("/tenants/current")
+async def get_current_tenant_info(request: Request):
+    """获取当前请求所处租户"""
+    ctx = getattr(request.state, "tenant", None) or get_current_tenant()
+    return {
+        "success": True,
+        "tenant": {
+            "tenant_id": ctx.tenant_id,
+            "name": ctx.name,
+            "metadata": ctx.metadata,
+        },
+    }
+
+
+@router.post("/tenants")
+async def create_or_update_tenant(req: TenantCreateRequest, _: Dict = security_write_dep):
+    tenant_manager = await _tenant_manager()
+    tenant = tenant_manager.upsert_tenant(
+        tenant_id=req.tenant_id,
+        name=req.name,
+        plan=req.plan or "enterprise",
+        active=req.active if req.active is not None else True,
+        metadata=req.metadata or {},
+    )
+    return {"success": True, "tenant": asdict(tenant)}
+
+
+@router.put("/tenants/{tenant_id}")
+async def update_tenant(tenant_id: str, req: TenantUpdateRequest, _: Dict = security_write_dep):
+    tenant_manager = await _tenant_manager()
+    existing = tenant_manager.get_tenant(tenant_id)
+    if not existing:
+        raise HTTPException(status_code=404, detail="租户不存在")
+    tenant = tenant_manager.upsert_tenant(
+        tenant_id=tenant_id,
+        name=req.name or existing.name,
+        plan=req.plan or existing.plan,
+        active=req.active if req.active is not None else existing.active,
+        metadata=req.metadata or existing.metadata,
+    )
+    return {"success": True, "tenant": asdict(tenant)}
+
+
+@router.delete("/tenants/{tenant_id}")
+async def delete_tenant(tenant_id: str, _: Dict = security_write_dep):
+    tenant_manager = await _tenant_manager()
+    ok = tenant_manager.delete_tenant(tenant_id)
+    if not ok:
+        raise HTTPException(status_code=400, detail="无法删除租户（可能是默认租户或不存在）")
+    return {"success": True}
+
+
+# ============ 多租户深度隔离 ============
+
+@router.get("/tenant/quota/list")
+async def list_tenant_quotas(
+    tenant_id: str,
+) -> Dict[str, Any]:
+    """获取租户所有配额"""
+    quota_mgr = await _quota_manager()
+    try:
+        quotas = quota_mgr.get_all_quotas(tenant_id)
+        return {
+            "success": True,
+            "quotas": {k: v.to_dict() for k, v in quotas.items()},
+        }
+    except Exception as e:
+        logger.error(f"获取配额失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.get("/tenant/quota/usage")
+async def get_quota_usage(
+    tenant_id: str,
+    quota_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """获取配额使用情况"""
+    quota_mgr = await _quota_manager()
+    try:
+        usage = quota_mgr.get_usage(tenant_id, quota_type)
+        return {
+            "success": True,
+            "usage": usage,
+        }
+    except Exception as e:
+        logger.error(f"获取使用量失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.post("/tenant/quota/set")
+async def set_tenant_quota(
+    request: QuotaSetRequest,
+) -> Dict[str, Any]:
+    """设置租户配额"""
+    from core.tenant_quota_manager import QuotaType
+
+    quota_mgr = await _quota_manager()
+    try:
+        quota_type = QuotaType(request.quota_type)
+        quota = quota_mgr.set_quota(
+            tenant_id=request.tenant_id,
+            quota_type=quota_type,
+            limit=request.limit,
+            reset_period=request.reset_period,
+            metadata=request.metadata,
+        )
+        return {
+            "success": True,
+            "quota": quota.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"设置配额失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"设置失败: {str(e)}")
+
+
+@router.post("/tenant/quota/use")
+async def use_tenant_quota(
+    request: QuotaUseRequest,
+) -> Dict[str, Any]:
+    """使用配额"""
+    quota_mgr = await _quota_manager()
+    try:
+        success, error = quota_mgr.use_quota(
+            tenant_id=request.tenant_id,
+            quota_type=request.quota_type,
+            amount=request.amount,
+        )
+        if not success:
+            raise HTTPException(status_code=400, detail=error or "配额不足")
+        
+        return {
+            "success": True,
+            "message": "配额使用成功",
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"使用配额失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"使用失败: {str(e)}")
+
+
+@router.get("/tenant/storage/stats")
+async def get_tenant_storage_stats(
+    tenant_id: str,
+) -> Dict[str, Any]:
+    """获取租户存储统计"""
+    isolation = await _data_isolation()
+    try:
+        storage = isolation.get_tenant_storage_stats(tenant_id)
+        storage_size = storage["total_size_bytes"]
+        
+        return {
+            "success": True,
+            "stats": {
+                "storage_size": storage_size,
+                "storage_size_mb": round(storage_size / 1024 / 1024, 2),
+                "file_count": storage["file_count"],
+                "reconciled_at": storage["reconciled_at"],
+            },
+        }
+    except Exception as e:
+        logger.error(f"获取存储统计失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.get("/tenant/audit/query")
+async def query_audit_logs(
+    tenant_id: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    user_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """查询审计日志"""
+    from core.tenant_audit_logger import AuditAction
+
+    audit_logger = await _audit_logger()
+    try:
+        action_enum = AuditAction(action) if action else None
+        logs = audit_logger.query_logs(
+            tenant_id=tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+            action=action_enum,
+            resource_type=resource_type,
+            user_id=user_id,
+            limit=limit,
+        )
+        return {
+            "success": True,
+            "logs": [log.to_dict() for log in logs],
+            "total": len(logs),
+        }
+    except Exception as e:
+        logger.error(f"查询审计日志失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+
+@router.get("/tenant/audit/report")
+async def get_audit_report(
+    tenant_id: str,
+    start_date: str,
+    end_date: str,
+) -> Dict[str, Any]:
+    """生成审计报表"""
+    audit_logger = await _audit_logger()
+    try:
+        report = audit_logger.generate_audit_report(
+            tenant_id=tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return {
+            "success": True,
+            "report": report,
+        }
+    except Exception as e:
+        logger.error(f"生成审计报表失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"生成失败: {str(e)}")
+
+
+@router.get("/tenant/audit/export")
+async def export_audit_logs(
+    tenant_id: str,
+    start_date: str,
+    end_date: str,
+    format: str = Query("json", pattern="^(json|csv)$"),
+) -> Dict[str, Any]:
+    """导出审计日志"""
+    audit_logger = await _audit_logger()
+    try:
+        export_path = audit_logger.export_audit_logs(
+            tenant_id=tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+            format=format,
+        )
+        return {
+            "success": True,
+            "export_path": export_path,
+            "message": "审计日志已导出",
+        }
+    except Exception as e:
+        logger.error(f"导出审计日志失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+
+
+@router.get("/tenant/info")
+async def get_tenant_info(
+    tenant_id: str,
+) -> Dict[str, Any]:
+    """获取租户信息"""
+    tenant_manager = await _tenant_manager()
+    try:
+        tenant = tenant_manager.get_tenant(tenant_id)
+        if not tenant:
+            raise HTTPException(status_code=404, detail="租户不存在")
+        
+        return {
+            "success": True,
+            "tenant": {
+                "tenant_id": tenant.tenant_id,
+                "name": tenant.name,
+                "plan": tenant.plan,
+                "active": tenant.active,
+                "metadata": tenant.metadata,
+            },
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取租户信息失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
+
+
+@router.post("/tenant/audit/log")
+async def log_audit_event(
+    tenant_id: str,
+    action: str,
+    resource_type: str,
+    user_id: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    success: bool = True,
+    error_message: Optional[str] = None,
+) -> Dict[str, Any]:
+    """记录审计事件"""
+    from core.tenant_audit_logger import AuditAction
+
+    audit_logger = await _audit_logger()
+    try:
+        action_enum = AuditAction(action)
+        log = audit_logger.log(
+            tenant_id=tenant_id,
+            action=action_enum,
+            resource_type=resource_type,
+            user_id=user_id,
+            resource_id=resource_id,
+            details=details,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            success=success,
+            error_message=error_message,
+        )
+        return {
+            "success": True,
+            "log": log.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"记录审计事件失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"记录失败: {str(e)}")
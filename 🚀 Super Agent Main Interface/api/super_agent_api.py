@@ -1,169 +1,3 @@
-class StoryboardRequest(BaseModel):
-    concept: str
-    template: Optional[str] = "fast_promo"
-    duration: Optional[int] = Field(None, description="视频时长（秒）")
-    style: Optional[str] = Field("modern", description="风格（modern/classic/creative）")
-
-
-class StoryboardResponse(BaseModel):
-    concept: str
-    template: str
-    shots: List[Dict[str, Any]]
-
-
-class ResourceRollbackRequest(BaseModel):
-    suggestion_id: str
-    reason: Optional[str] = None
-
-
-class ResourceRollbackResponse(BaseModel):
-    suggestion_id: str
-    description: str
-    plan: str
-    requested_by: str
-    reason: Optional[str] = None
-    rolled_back_at: str
-    status: str
-
-
-class TrendScenarioRequest(BaseModel):
-    indicator: str = "EV_DEMAND"
-    scenario_name: Optional[str] = "政策刺激 + 需求走强"
-    demand_shift: float = 0.05
-    policy_intensity: float = 0.08
-    supply_shift: float = 0.02
-
-
-class TrendScenarioResponse(BaseModel):
-    indicator: str
-    scenario: str
-    assumptions: Dict[str, float]
-    forecast: Dict[str, Any]
-    timeline: List[Dict[str, Any]]
-    recommendations: List[str]
-
-
-class TrendBacktestResponse(BaseModel):
-    indicator: str
-    window: int
-    metrics: Dict[str, Any]
-    series: List[Dict[str, Any]]
-    events: List[Dict[str, Any]]
-
-
-class ExpertRouteSimulationRequest(BaseModel):
-    query: str
-    knowledge_hints: Optional[List[str]] = None
-    expected_domain: Optional[str] = None
-
-
-class ExpertParticipant(BaseModel):
-    expert_id: str
-    name: str
-    domain: str
-    role: Optional[str] = None
-
-
-class CollaborationSessionCreateRequest(BaseModel):
-    topic: str
-    initiator: str
-    goals: List[str] = Field(default_factory=list)
-    channel: Optional[str] = "multi"
-    experts: List[ExpertParticipant]
-
-
-class CollaborationContributionRequest(BaseModel):
-    expert_id: str
-    expert_name: str
-    channel: str
-    summary: str
-    action_items: List[str] = Field(default_factory=list)
-    impact_score: float = Field(0.5, ge=0.0, le=1.0)
-    references: List[str] = Field(default_factory=list)
-
-
-class CollaborationDecisionRequest(BaseModel):
-    owner: str
-    summary: str
-    kpis: List[str] = Field(default_factory=list)
-    followups: List[str] = Field(default_factory=list)
-
-
-class ConfigApplyRequest(BaseModel):
-    profile: str
-    overrides: Dict[str, str] = Field(default_factory=dict)
-
-
-class DeploymentRunRequest(BaseModel):
-    profile: str
-    dry_run: bool = True
-    steps: Optional[List[str]] = None
-    overrides: Dict[str, str] = Field(default_factory=dict)
-
-
-class ServiceRegisterRequest(BaseModel):
-    service: str
-    endpoint: str
-    version: str = "v1"
-    protocol: str = "http"
-    deployment_target: str = "monolith"
-    metadata: Dict[str, Any] = Field(default_factory=dict)
-
-
-class ServiceHeartbeatRequest(BaseModel):
-    service: str
-    instance_id: str
-    status: str = "healthy"
-
-
-class ServiceCallRequest(BaseModel):
-    service: str
-    operation: str
-    payload: Dict[str, Any] = Field(default_factory=dict)
-    prefer_internal: bool = True
-
-
-class CollaborationEventStreamManager:
-    """SSE 推送：监听统一事件总线的专家协同事件"""
-
-    def __init__(self):
-        self._queues: set[asyncio.Queue] = set()
-        self._bus = get_unified_event_bus()
-        self._subscriber_id = self._bus.subscribe(
-            self._handle_event,
-            EventFilter(category=EventCategory.WORKFLOW, source="expert_collaboration"),
-        )
-
-    async def register(self) -> asyncio.Queue:
-        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
-        self._queues.add(queue)
-        return queue
-
-    def unregister(self, queue: asyncio.Queue) -> None:
-        self._queues.discard(queue)
-
-    async def _handle_event(self, event) -> None:
-        payload = event.to_dict()
-        for queue in list(self._queues):
-            try:
-                queue.put_nowait(payload)
-            except asyncio.QueueFull:
-                try:
-                    queue.get_nowait()
-                except asyncio.QueueEmpty:
-                    pass
-                queue.put_nowait(payload)
-class CopyrightCheckRequest(BaseModel):
-    text: str
-    sources: Optional[List[str]] = None
-    platforms: Optional[List[str]] = None
-    threshold: float = 0.75
-
-
-class CopyrightCheckResponse(BaseModel):
-    matches: List[Dict[str, Any]]
-    summary: Dict[str, Any]
-    workflow: Dict[str, Any]
 """
 超级Agent主界面API
 提供RESTful API接口
@@ -183,7 +17,7 @@ from fastapi import (
 )
 from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 import asyncio
 import time
 from datetime import datetime
@@ -234,7 +68,7 @@ from core.resource_authorization import ResourceAuthorizationManager
 from core.resource_strategy_engine import ResourceStrategyEngine, ResourceStrategy, StrategyContext
 from core.resource_conflict_scheduler import ResourceConflictScheduler, ConflictType, ResolutionStrategy
 from core.security_compliance_baseline import SecurityComplianceBaseline, ComplianceCategory, SecurityLevel, ViolationType
-from core.observability_system import ObservabilitySystem, SpanType, SpanStatus
+from core.observability_system import ObservabilitySystem, SpanType, SpanStatus, get_observability_system
 from core.observability_middleware import ObservabilityMiddleware
 from core.observability_persistence import ObservabilityPersistence
 from core.observability_alerts import ObservabilityAlertSystem, AlertRule, AlertSeverity, AlertCondition
@@ -305,8 +139,6 @@ from core.database_persistence import DatabasePersistence, get_persistence
 from core.data_sync_manager import DataSyncManager, get_sync_manager
 from core.data_service import DataService, get_data_service
 from core.persistence_seed import PersistenceSeeder
-from core.tenant_manager import tenant_manager
-from core.tenant_context import get_current_tenant
 from core.module_registry import ModuleRegistry
 from core.module_chain import ModuleChainManager
 from core.function_hierarchy import FOUR_LEVEL_FUNCTIONS
@@ -326,89 +158,243 @@ except ModuleNotFoundError as exc:
     rag_clean = rag_standardize = rag_dedup = rag_validate = rag_auth_score = None
     print(f"[SuperAgentAPI] RAG modules未加载: {exc}")
 
-from AI_Programming_Assistant.core import (
-    CursorAuthorization,
-    CursorBridge,
-    CursorLocalBridge,
-    CursorPluginSystem,
-    CursorProtocol,
-    AuthorizationLevel,
-    AccessScope,
-    PluginPermission,
-    PluginStatus,
-    ProtocolCommand,
-)
 from datetime import timedelta
 from dataclasses import dataclass, asdict
 
-security_settings = get_security_settings()
-sensitive_filter = SensitiveContentFilter()
-router_dependencies = [Depends(require_api_token)] if security_settings.api_token else []
+class StoryboardRequest(BaseModel):
+    concept: str
+    template: Optional[str] = "fast_promo"
+    duration: Optional[int] = Field(None, description="视频时长（秒）")
+    style: Optional[str] = Field("modern", description="风格（modern/classic/creative）")
 
-router = APIRouter(prefix="/api/super-agent", tags=["Super Agent"], dependencies=router_dependencies)
-collaboration_event_stream = CollaborationEventStreamManager()
-env_config_manager = get_env_manager()
-deployment_manager = get_deployment_manager()
-service_registry = get_service_registry()
-service_gateway = get_service_gateway()
 
+class StoryboardResponse(BaseModel):
+    concept: str
+    template: str
+    shots: List[Dict[str, Any]]
 
-def _bootstrap_service_contracts():
-    services_dir = project_root.parent / "config/services"
-    if not services_dir.exists():
-        return
-    for path in services_dir.glob("*.yaml"):
-        try:
-            data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-        except Exception as exc:
-            logger.warning("读取服务契约失败 %s: %s", path, exc)
-            continue
-        service = data.get("service")
-        if not service:
-            continue
-        for operation in data.get("operations", []):
-            contract = ServiceContract(
-                service=service,
-                operation=operation.get("operation"),
-                method=operation.get("method", "POST"),
-                path=operation.get("path", "/"),
-                version=data.get("version", "v1"),
-                timeout=operation.get("timeout", 2.0),
-                description=data.get("description", ""),
-                schema=operation.get("schema", {}),
-            )
-            service_registry.register_contract(contract)
 
+class ResourceRollbackRequest(BaseModel):
+    suggestion_id: str
+    reason: Optional[str] = None
 
-_bootstrap_service_contracts()
 
-# 初始化服务
-super_agent = SuperAgent()
-memo_system = MemoSystem()
-task_planning = TaskPlanning(memo_system)
+class ResourceRollbackResponse(BaseModel):
+    suggestion_id: str
+    description: str
+    plan: str
+    requested_by: str
+    reason: Optional[str] = None
+    rolled_back_at: str
+    status: str
 
-# P0-003: 初始化数据持久化和同步服务
-data_persistence = get_persistence()
-data_sync_manager = get_sync_manager()
-data_service = get_data_service()
 
-# P1-003: 数据持久化种子管理
-persistence_seeder = PersistenceSeeder(data_service)
+class TrendScenarioRequest(BaseModel):
+    indicator: str = "EV_DEMAND"
+    scenario_name: Optional[str] = "政策刺激 + 需求走强"
+    demand_shift: float = 0.05
+    policy_intensity: float = 0.08
+    supply_shift: float = 0.02
 
-# P1-002: API 调用监控
-api_monitor = APIMonitor()
 
+class TrendScenarioResponse(BaseModel):
+    indicator: str
+    scenario: str
+    assumptions: Dict[str, float]
+    forecast: Dict[str, Any]
+    timeline: List[Dict[str, Any]]
+    recommendations: List[str]
 
-def _register_default_service_handlers():
-    async def rag_search(payload: Dict[str, Any]):
-        query = payload.get("query") or payload.get("text") or ""
-        top_k = max(1, min(int(payload.get("top_k", 5)), 10))
-        result = await super_agent.dual_rag_engine.first_rag_retrieval(user_input=query, top_k=top_k)
-        return result.to_dict()
 
-    async def rag_experience(payload: Dict[str, Any]):
-        query = payload.get("query") or ""
-        execution = payload.get("execution_result") or {"module": "rag", "result": {}}
+class TrendBacktestResponse(BaseModel):
+    indicator: str
+    window: int
+    metrics: Dict[str, Any]
+    series: List[Dict[str, Any]]
+    events: List[Dict[str, Any]]
+
+
+class ExpertRouteSimulationRequest(BaseModel):
+    query: str
+    knowledge_hints: Optional[List[str]] = None
+    expected_domain: Optional[str] = None
+
+
+class ExpertParticipant(BaseModel):
+    expert_id: str
+    name: str
+    domain: str
+    role: Optional[str] = None
+
+
+class CollaborationSessionCreateRequest(BaseModel):
+    topic: str
+    initiator: str
+    goals: List[str] = Field(default_factory=list)
+    channel: Optional[str] = "multi"
+    experts: List[ExpertParticipant]
+
+
+class CollaborationContributionRequest(BaseModel):
+    expert_id: str
+    expert_name: str
+    channel: str
+    summary: str
+    action_items: List[str] = Field(default_factory=list)
+    impact_score: float = Field(0.5, ge=0.0, le=1.0)
+    references: List[str] = Field(default_factory=list)
+
+
+class CollaborationDecisionRequest(BaseModel):
+    owner: str
+    summary: str
+    kpis: List[str] = Field(default_factory=list)
+    followups: List[str] = Field(default_factory=list)
+
+
+class ConfigApplyRequest(BaseModel):
+    profile: str
+    overrides: Dict[str, str] = Field(default_factory=dict)
+
+
+class DeploymentRunRequest(BaseModel):
+    profile: str
+    dry_run: bool = True
+    steps: Optional[List[str]] = None
+    overrides: Dict[str, str] = Field(default_factory=dict)
+
+
+class ServiceRegisterRequest(BaseModel):
+    service: str
+    endpoint: str
+    version: str = "v1"
+    protocol: str = "http"
+    deployment_target: str = "monolith"
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ServiceHeartbeatRequest(BaseModel):
+    service: str
+    instance_id: str
+    status: str = "healthy"
+
+
+class ServiceCallRequest(BaseModel):
+    service: str
+    operation: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    prefer_internal: bool = True
+
+
+class CollaborationEventStreamManager:
+    """SSE 推送：监听统一事件总线的专家协同事件"""
+
+    def __init__(self):
+        self._queues: set[asyncio.Queue] = set()
+        self._bus = get_unified_event_bus()
+        self._subscriber_id = self._bus.subscribe(
+            self._handle_event,
+            EventFilter(category=EventCategory.WORKFLOW, source="expert_collaboration"),
+        )
+
+    async def register(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._queues.add(queue)
+        return queue
+
+    def unregister(self, queue: asyncio.Queue) -> None:
+        self._queues.discard(queue)
+
+    async def _handle_event(self, event) -> None:
+        payload = event.to_dict()
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+                queue.put_nowait(payload)
+class CopyrightCheckRequest(BaseModel):
+    text: str
+    sources: Optional[List[str]] = None
+    platforms: Optional[List[str]] = None
+    threshold: float = 0.75
+
+
+class CopyrightCheckResponse(BaseModel):
+    matches: List[Dict[str, Any]]
+    summary: Dict[str, Any]
+    workflow: Dict[str, Any]
+security_settings = get_security_settings()
+sensitive_filter = SensitiveContentFilter()
+router_dependencies = [Depends(require_api_token)] if security_settings.api_token else []
+
+router = APIRouter(prefix="/api/super-agent", tags=["Super Agent"], dependencies=router_dependencies)
+collaboration_event_stream = CollaborationEventStreamManager()
+env_config_manager = get_env_manager()
+deployment_manager = get_deployment_manager()
+service_registry = get_service_registry()
+service_gateway = get_service_gateway()
+
+
+def _bootstrap_service_contracts():
+    services_dir = project_root.parent / "config/services"
+    if not services_dir.exists():
+        return
+    for path in services_dir.glob("*.yaml"):
+        try:
+            data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        except Exception as exc:
+            logger.warning("读取服务契约失败 %s: %s", path, exc)
+            continue
+        service = data.get("service")
+        if not service:
+            continue
+        for operation in data.get("operations", []):
+            contract = ServiceContract(
+                service=service,
+                operation=operation.get("operation"),
+                method=operation.get("method", "POST"),
+                path=operation.get("path", "/"),
+                version=data.get("version", "v1"),
+                timeout=operation.get("timeout", 2.0),
+                description=data.get("description", ""),
+                schema=operation.get("schema", {}),
+            )
+            service_registry.register_contract(contract)
+
+
+_bootstrap_service_contracts()
+
+# 初始化服务
+super_agent = SuperAgent()
+memo_system = MemoSystem()
+task_planning = TaskPlanning(memo_system)
+
+# P0-003: 初始化数据持久化和同步服务
+data_persistence = get_persistence()
+data_sync_manager = get_sync_manager()
+data_service = get_data_service()
+
+# P1-003: 数据持久化种子管理
+persistence_seeder = PersistenceSeeder(data_service)
+
+# P1-002: API 调用监控
+api_monitor = APIMonitor()
+
+
+def _register_default_service_handlers():
+    async def rag_search(payload: Dict[str, Any]):
+        query = payload.get("query") or payload.get("text") or ""
+        top_k = max(1, min(int(payload.get("top_k", 5)), 10))
+        result = await super_agent.dual_rag_engine.first_rag_retrieval(user_input=query, top_k=top_k)
+        return result.to_dict()
+
+    async def rag_experience(payload: Dict[str, Any]):
+        query = payload.get("query") or ""
+        execution = payload.get("execution_result") or {"module": "rag", "result": {}}
         rag1 = await super_agent.dual_rag_engine.first_rag_retrieval(user_input=query)
         rag2 = await super_agent.dual_rag_engine.second_rag_retrieval(
             user_input=query,
@@ -489,7 +475,7 @@ resource_conflict_scheduler = ResourceConflictScheduler(
 security_compliance_baseline = SecurityComplianceBaseline()
 
 # P0-018: 初始化可观测性系统
-observability_system = ObservabilitySystem()
+observability_system = get_observability_system()
 observability_persistence = ObservabilityPersistence()
 observability_alerts = ObservabilityAlertSystem(observability_system)
 observability_exporter = ObservabilityExporter(observability_system, observability_persistence)
@@ -1519,7 +1505,6 @@ stock_gateway = StockGateway(api_monitor=api_monitor)
 stock_sim = StockSimulator()
 stock_factor_engine = StockFactorEngine()
 douyin = DouyinIntegration(api_monitor=api_monitor)
-cursor_bridge = CursorBridge()
 storyboard_generator = StoryboardGenerator()
 
 # P1-202: 初始化 ERP 11 环节管理器和库存管理器
@@ -1559,24 +1544,6 @@ from core.security.compliance_audit_workflow import (
     AuditStatus,
 )
 
-# P2-303: 初始化三大系统
-from core.task_lifecycle_manager import (
-    TaskLifecycleManager,
-    get_task_lifecycle_manager,
-    TaskStatus,
-    TaskPriority,
-)
-from core.learning_curve_tracker import (
-    LearningCurveTracker,
-    get_learning_curve_tracker,
-)
-from core.resource_scheduler_with_hints import (
-    ResourceSchedulerWithHints,
-    get_resource_scheduler,
-    ResourceType,
-    HintType,
-)
-
 # P2-301: 初始化全局完成度矩阵和证据库
 from core.completion_matrix_manager import (
     CompletionMatrixManager,
@@ -1628,11 +1595,6 @@ dual_rag_engine = DualRAGExecutionEngine(
 compliance_manager = get_compliance_manager()
 compliance_audit_workflow = get_compliance_audit_workflow()
 
-# P2-303: 初始化三大系统
-task_lifecycle_manager = get_task_lifecycle_manager()
-learning_curve_tracker = get_learning_curve_tracker()
-resource_scheduler = get_resource_scheduler()
-
 # P2-301: 初始化全局完成度矩阵和证据库
 completion_matrix_manager = get_completion_matrix_manager()
 evidence_library = get_evidence_library()
@@ -1661,15 +1623,7 @@ module_registry = ModuleRegistry(
     inventory_manager=inventory_manager,
 )
 
-# P0-016: 初始化Cursor集成系统（协议/插件/本地桥/授权）
-cursor_protocol = CursorProtocol()
-cursor_plugin_system = CursorPluginSystem()
-cursor_authorization = CursorAuthorization()
-cursor_local_bridge = CursorLocalBridge(
-    protocol=cursor_protocol,
-    plugin_system=cursor_plugin_system,
-    permission_manager=cursor_plugin_system.permission_manager
-)
+# P0-016: Cursor集成系统（协议/插件/本地桥/授权）见 api/routers/cursor.py，按需懒加载
 backtest_engine = BacktestEngine()
 try:
     factory_data_source = FactoryDataSource()
@@ -1697,10 +1651,6 @@ super_agent.set_task_planning(task_planning)
 # 初始化文件生成服务（注入RAG服务）
 file_generation = FileGenerationService(rag_service=super_agent.rag_service)
 
-# 启动资源监控（后台任务）
-import asyncio
-asyncio.create_task(resource_monitor.start_monitoring(interval=5))
-
 # 启动ERP监听（轻量轮询对比）
 _erp_last_order_count = {"count": 0}
 async def _erp_listener():
@@ -1731,7 +1681,11 @@ async def _erp_listener():
         except Exception:
             await asyncio.sleep(20)
 
-asyncio.create_task(_erp_listener())
+
+async def startup():
+    """领域路由挂载后在事件循环中调用：启动资源监控与ERP监听后台任务"""
+    asyncio.create_task(resource_monitor.start_monitoring(interval=5))
+    asyncio.create_task(_erp_listener())
 
 bpmn_dir = Path(project_root) / "data" / "bpmn"
 bpmn_dir.mkdir(parents=True, exist_ok=True)
@@ -1741,6 +1695,14 @@ rag_store_path = rag_dir / "documents.jsonl"
 RAG_ACTIVITY_LOG = deque(maxlen=200)
 RAG_SEARCH_HISTORY = deque(maxlen=200)
 
+# Cursor 桥接由 api.routers.cursor 懒加载，这里只复用同一实例
+try:
+    from api.routers.cursor import cursor_bridges
+    cursor_bridge = cursor_bridges.get()
+except Exception as exc:
+    logger.warning(f"Cursor桥接不可用: {exc}")
+    cursor_bridge = None
+
 module_chain_manager = ModuleChainManager(
     data_service=data_service,
     service_registry=service_registry,
@@ -2164,18 +2126,29 @@ async def chat_stream(request: ChatRequest):
 async def get_memos(
     type: Optional[str] = None,
     importance: Optional[int] = None,
-    tags: Optional[str] = None
+    tags: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
 ):
-    """获取备忘录列表"""
+    """获取备忘录列表（q 为全文检索词）"""
+    if q:
+        memos = await memo_system.search_memos(q, limit=limit or 20, type=type)
+        return {"memos": memos, "total": len(memos)}
     tag_list = tags.split(",") if tags else None
-    memos = await memo_system.get_memos(type=type, importance=importance, tags=tag_list)
+    memos = await memo_system.get_memos(
+        type=type, importance=importance, tags=tag_list, limit=limit, offset=offset
+    )
     return {"memos": memos, "total": len(memos)}
 
 
 @router.post("/memos")
 async def add_memo(memo_data: Dict):
-    """添加备忘录"""
-    memo = await memo_system.add_memo(memo_data)
+    """添加备忘录（字段不合法时返回 400）"""
+    try:
+        memo = await memo_system.add_memo(memo_data)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     return {"success": True, "memo": memo}
 
 
@@ -3440,65 +3413,6 @@ async def get_evolution_phases():
     }
 
 
-# ==================== 多租户管理 ====================
-
-
-@router.get("/tenants")
-async def list_tenants(include_inactive: bool = False, _: Dict = Depends(security_read_dep)):
-    """列出租户（需安全读权限）"""
-    tenants = tenant_manager.list_tenants(include_inactive=include_inactive)
-    return {"success": True, "tenants": tenants}
-
-
-@router.get("/tenants/current")
-async def get_current_tenant_info(request: Request):
-    """获取当前请求所处租户"""
-    ctx = getattr(request.state, "tenant", None) or get_current_tenant()
-    return {
-        "success": True,
-        "tenant": {
-            "tenant_id": ctx.tenant_id,
-            "name": ctx.name,
-            "metadata": ctx.metadata,
-        },
-    }
-
-
-@router.post("/tenants")
-async def create_or_update_tenant(req: TenantCreateRequest, _: Dict = Depends(security_write_dep)):
-    tenant = tenant_manager.upsert_tenant(
-        tenant_id=req.tenant_id,
-        name=req.name,
-        plan=req.plan or "enterprise",
-        active=req.active if req.active is not None else True,
-        metadata=req.metadata or {},
-    )
-    return {"success": True, "tenant": asdict(tenant)}
-
-
-@router.put("/tenants/{tenant_id}")
-async def update_tenant(tenant_id: str, req: TenantUpdateRequest, _: Dict = Depends(security_write_dep)):
-    existing = tenant_manager.get_tenant(tenant_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="租户不存在")
-    tenant = tenant_manager.upsert_tenant(
-        tenant_id=tenant_id,
-        name=req.name or existing.name,
-        plan=req.plan or existing.plan,
-        active=req.active if req.active is not None else existing.active,
-        metadata=req.metadata or existing.metadata,
-    )
-    return {"success": True, "tenant": asdict(tenant)}
-
-
-@router.delete("/tenants/{tenant_id}")
-async def delete_tenant(tenant_id: str, _: Dict = Depends(security_write_dep)):
-    ok = tenant_manager.delete_tenant(tenant_id)
-    if not ok:
-        raise HTTPException(status_code=400, detail="无法删除租户（可能是默认租户或不存在）")
-    return {"success": True}
-
-
 @router.post("/slo/performance/vector-index/benchmark")
 async def record_vector_index_benchmark(benchmark: VectorIndexBenchmark):
     """
@@ -6554,6 +6468,34 @@ async def get_performance_stats():
         "strategy": await strategy_engine.get_stats()
     }
 
+
+@router.get("/performance/sketches")
+async def export_performance_sketches():
+    """导出响应时间分位数草图（供集群级合并）"""
+    return {
+        "success": True,
+        "sketches": performance_monitor.export_sketches()
+    }
+
+
+@router.post("/performance/sketches/merge")
+async def merge_performance_sketches(payload: Dict[str, Any] = Body(...)):
+    """合并其他 worker 导出的分位数草图，返回集群级分位数（不改变本地统计）"""
+    sketches = payload.get("workers") or payload.get("sketches", payload)
+    return {
+        "success": True,
+        "cluster": performance_monitor.merge_sketches(sketches)
+    }
+
+
+@router.get("/performance/semantic-cache")
+async def get_semantic_cache_stats():
+    """获取语义近似缓存统计（命中率/节省时延）"""
+    return {
+        "success": True,
+        **super_agent.get_semantic_cache_stats()
+    }
+
 @router.get("/dashboard/overview")
 async def get_dashboard_overview():
     """统一遥测总览：性能/策略/资源/学习/工作流统计"""
@@ -7104,21 +7046,6 @@ class DouyinPublishRequest(DouyinDraftRequest):
     deai_intensity: float = Field(0.5, ge=0.0, le=1.0, description="去AI化强度（0.0-1.0）")
 
 
-class TenantCreateRequest(BaseModel):
-    tenant_id: str = Field(..., min_length=2, max_length=32, regex=r"^[a-z0-9\-_]+$")
-    name: str
-    plan: Optional[str] = "enterprise"
-    active: Optional[bool] = True
-    metadata: Optional[Dict[str, Any]] = None
-
-
-class TenantUpdateRequest(BaseModel):
-    name: Optional[str]
-    plan: Optional[str]
-    active: Optional[bool]
-    metadata: Optional[Dict[str, Any]]
-
-
 class DouyinWebhookPayload(BaseModel):
     event: str
     job_id: Optional[str] = None
@@ -7628,67 +7555,7 @@ async def rag_pipeline_search(q: str, limit: int = 10):
         raise HTTPException(status_code=500, detail=str(e))
     return {"results": results, "count": len(results)}
 
-# ====== 编程助手：Cursor 桥接 ======
-@router.get("/coding/cursor/status")
-async def cursor_status():
-    return cursor_bridge.get_status()
-
-class CursorOpenRequest(BaseModel):
-    file_path: str
-    line_number: Optional[int] = None
-
-@router.post("/coding/cursor/open-file")
-async def cursor_open_file(req: CursorOpenRequest):
-    result = await cursor_bridge.open_in_cursor(req.file_path, req.line_number)
-    if not result.get("success"):
-        raise HTTPException(status_code=400, detail=result.get("error", "打开失败"))
-    return result
-
-class CursorSyncRequest(BaseModel):
-    file_path: str
-    code: str
-
-@router.post("/coding/cursor/sync-code")
-async def cursor_sync_code(req: CursorSyncRequest):
-    return await cursor_bridge.sync_code(req.file_path, req.code)
-
-class CursorEdit(BaseModel):
-    type: str
-    start_line: int
-    end_line: int
-    content: Optional[str] = ""
-
-class CursorEditRequest(BaseModel):
-    file_path: str
-    edits: List[CursorEdit]
-
-@router.post("/coding/cursor/edit-code")
-async def cursor_edit_code(req: CursorEditRequest):
-    edits = [e.dict() for e in req.edits]
-    return await cursor_bridge.edit_code(req.file_path, edits)
-
-class CursorCompletionRequest(BaseModel):
-    file_path: str
-    line_number: int
-    column: int
-    context_lines: int = 5
-
-@router.post("/coding/cursor/completion")
-async def cursor_completion(req: CursorCompletionRequest):
-    return await cursor_bridge.get_code_completion(req.file_path, req.line_number, req.column, req.context_lines)
-
-class CursorDetectRequest(BaseModel):
-    file_path: str
-
-@router.post("/coding/cursor/detect-errors")
-async def cursor_detect_errors(req: CursorDetectRequest):
-    return await cursor_bridge.detect_errors(req.file_path)
-
-class CursorProjectRequest(BaseModel):
-    project_path: str
-    files: Optional[List[str]] = None
-
-# ==================== P3-014: AI 编程助手 + Cursor 集成 ====================
+# ==================== P3-014: AI 编程助手 + Cursor 集成 ====================
 
 @router.post("/coding/documentation/generate-docstring")
 async def generate_docstring(
@@ -7941,318 +7808,6 @@ async def optimize_code(
         }
 
 
-@router.post("/coding/cursor/open-project")
-async def cursor_open_project(req: CursorProjectRequest):
-    result = await cursor_bridge.sync_project(req.project_path, req.files)
-    if not result.get("success"):
-        raise HTTPException(status_code=400, detail=result.get("error", "打开项目失败"))
-    return result
-
-
-# ============ P0-016: Cursor协议/插件/本地桥/授权系统 ============
-
-@router.post("/cursor/protocol/start")
-async def start_cursor_protocol():
-    """启动Cursor协议服务器"""
-    if not cursor_protocol:
-        raise HTTPException(status_code=503, detail="Cursor协议未初始化")
-    
-    await cursor_local_bridge.start()
-    return {"success": True, "message": "Cursor协议服务器已启动"}
-
-
-@router.post("/cursor/protocol/stop")
-async def stop_cursor_protocol():
-    """停止Cursor协议服务器"""
-    if not cursor_protocol:
-        raise HTTPException(status_code=503, detail="Cursor协议未初始化")
-    
-    await cursor_local_bridge.stop()
-    return {"success": True, "message": "Cursor协议服务器已停止"}
-
-
-@router.post("/cursor/protocol/send")
-async def send_cursor_protocol_message(
-    command: str,
-    params: Dict[str, Any],
-    token_id: Optional[str] = None
-):
-    """
-    发送Cursor协议消息
-    
-    Args:
-        command: 命令名称
-        params: 命令参数
-        token_id: 授权令牌ID（可选）
-    """
-    if not cursor_protocol:
-        raise HTTPException(status_code=503, detail="Cursor协议未初始化")
-    
-    # 验证授权
-    if token_id and not cursor_authorization.validate_token(token_id):
-        raise HTTPException(status_code=401, detail="无效的授权令牌")
-    
-    try:
-        cmd = ProtocolCommand(command)
-        message = await cursor_local_bridge.send_to_cursor(cmd, params)
-        
-        return {
-            "success": message.message_type.value != "error",
-            "message_type": message.message_type.value,
-            "result": message.result,
-            "error": message.error
-        }
-    except ValueError:
-        raise HTTPException(status_code=400, detail=f"无效的命令: {command}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.post("/cursor/plugins/load")
-async def load_cursor_plugin(
-    plugin_path: str,
-    config: Optional[Dict[str, Any]] = None
-):
-    """
-    加载Cursor插件
-    
-    Args:
-        plugin_path: 插件路径
-        config: 插件配置（可选）
-    """
-    if not cursor_plugin_system:
-        raise HTTPException(status_code=503, detail="插件系统未初始化")
-    
-    try:
-        plugin = cursor_plugin_system.load_plugin(plugin_path, config)
-        return {
-            "success": True,
-            "plugin": {
-                "plugin_id": plugin.metadata.plugin_id,
-                "name": plugin.metadata.name,
-                "version": plugin.metadata.version,
-                "status": plugin.status.value
-            }
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/cursor/plugins")
-async def list_cursor_plugins():
-    """列出所有Cursor插件"""
-    if not cursor_plugin_system:
-        raise HTTPException(status_code=503, detail="插件系统未初始化")
-    
-    plugins = cursor_plugin_system.list_plugins()
-    return {"success": True, "plugins": plugins}
-
-
-@router.post("/cursor/plugins/{plugin_id}/enable")
-async def enable_cursor_plugin(plugin_id: str):
-    """启用Cursor插件"""
-    if not cursor_plugin_system:
-        raise HTTPException(status_code=503, detail="插件系统未初始化")
-    
-    try:
-        cursor_plugin_system.enable_plugin(plugin_id)
-        return {"success": True, "message": f"插件已启用: {plugin_id}"}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-
-@router.post("/cursor/plugins/{plugin_id}/disable")
-async def disable_cursor_plugin(plugin_id: str):
-    """禁用Cursor插件"""
-    if not cursor_plugin_system:
-        raise HTTPException(status_code=503, detail="插件系统未初始化")
-    
-    try:
-        cursor_plugin_system.disable_plugin(plugin_id)
-        return {"success": True, "message": f"插件已禁用: {plugin_id}"}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-
-@router.delete("/cursor/plugins/{plugin_id}")
-async def unload_cursor_plugin(plugin_id: str):
-    """卸载Cursor插件"""
-    if not cursor_plugin_system:
-        raise HTTPException(status_code=503, detail="插件系统未初始化")
-    
-    try:
-        cursor_plugin_system.unload_plugin(plugin_id)
-        return {"success": True, "message": f"插件已卸载: {plugin_id}"}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-
-@router.post("/cursor/authorization/create-token")
-async def create_cursor_token(
-    client_id: str,
-    authorization_level: str,
-    access_scope: str,
-    allowed_paths: Optional[List[str]] = None,
-    denied_paths: Optional[List[str]] = None,
-    expires_in_hours: Optional[int] = None
-):
-    """
-    创建Cursor授权令牌
-    
-    Args:
-        client_id: 客户端ID
-        authorization_level: 授权级别（none/read_only/limited/standard/full）
-        access_scope: 访问范围（single_file/project/workspace/system）
-        allowed_paths: 允许的路径列表（可选）
-        denied_paths: 拒绝的路径列表（可选）
-        expires_in_hours: 过期时间（小时，可选）
-    """
-    if not cursor_authorization:
-        raise HTTPException(status_code=503, detail="授权系统未初始化")
-    
-    try:
-        level = AuthorizationLevel(authorization_level)
-        scope = AccessScope(access_scope)
-        
-        token = cursor_authorization.create_token(
-            client_id=client_id,
-            authorization_level=level,
-            access_scope=scope,
-            allowed_paths=allowed_paths,
-            denied_paths=denied_paths,
-            expires_in_hours=expires_in_hours
-        )
-        
-        return {
-            "success": True,
-            "token": {
-                "token_id": token.token_id,
-                "client_id": token.client_id,
-                "authorization_level": token.authorization_level.value,
-                "access_scope": token.access_scope.value,
-                "expires_at": token.expires_at.isoformat() if token.expires_at else None
-            }
-        }
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-
-@router.post("/cursor/authorization/validate")
-async def validate_cursor_token(token_id: str):
-    """验证Cursor授权令牌"""
-    if not cursor_authorization:
-        raise HTTPException(status_code=503, detail="授权系统未初始化")
-    
-    is_valid = cursor_authorization.validate_token(token_id)
-    token = cursor_authorization.get_token(token_id)
-    
-    return {
-        "success": True,
-        "is_valid": is_valid,
-        "token": {
-            "token_id": token_id,
-            "authorization_level": token.authorization_level.value if token else None,
-            "expires_at": token.expires_at.isoformat() if token and token.expires_at else None
-        } if token else None
-    }
-
-
-@router.post("/cursor/authorization/check-permission")
-async def check_cursor_permission(
-    token_id: str,
-    resource_type: str,
-    resource_path: str,
-    action: str
-):
-    """
-    检查Cursor权限
-    
-    Args:
-        token_id: 令牌ID
-        resource_type: 资源类型
-        resource_path: 资源路径
-        action: 操作（read/write/execute）
-    """
-    if not cursor_authorization:
-        raise HTTPException(status_code=503, detail="授权系统未初始化")
-    
-    has_permission = cursor_authorization.check_permission(
-        token_id, resource_type, resource_path, action
-    )
-    
-    return {
-        "success": True,
-        "has_permission": has_permission,
-        "resource_type": resource_type,
-        "resource_path": resource_path,
-        "action": action
-    }
-
-
-@router.delete("/cursor/authorization/tokens/{token_id}")
-async def revoke_cursor_token(token_id: str, reason: Optional[str] = None):
-    """撤销Cursor授权令牌"""
-    if not cursor_authorization:
-        raise HTTPException(status_code=503, detail="授权系统未初始化")
-    
-    cursor_authorization.revoke_token(token_id, reason)
-    return {"success": True, "message": f"令牌已撤销: {token_id}"}
-
-
-@router.get("/cursor/authorization/tokens")
-async def list_cursor_tokens(client_id: Optional[str] = None):
-    """列出Cursor授权令牌"""
-    if not cursor_authorization:
-        raise HTTPException(status_code=503, detail="授权系统未初始化")
-    
-    tokens = cursor_authorization.list_tokens(client_id)
-    return {"success": True, "tokens": tokens}
-
-
-@router.get("/cursor/authorization/audit-log")
-async def get_cursor_audit_log(
-    token_id: Optional[str] = None,
-    event_type: Optional[str] = None,
-    limit: int = 100
-):
-    """获取Cursor审计日志"""
-    if not cursor_authorization:
-        raise HTTPException(status_code=503, detail="授权系统未初始化")
-    
-    logs = cursor_authorization.get_audit_log(token_id, event_type, limit)
-    return {"success": True, "logs": logs, "count": len(logs)}
-
-
-@router.get("/cursor/bridge/status")
-async def get_cursor_bridge_status():
-    """获取Cursor桥接状态"""
-    if not cursor_local_bridge:
-        raise HTTPException(status_code=503, detail="本地桥接未初始化")
-    
-    status = cursor_local_bridge.get_status()
-    return {"success": True, "status": status}
-
-
-@router.get("/cursor/bridge/connections")
-async def list_cursor_bridge_connections():
-    """列出Cursor桥接连接"""
-    if not cursor_local_bridge:
-        raise HTTPException(status_code=503, detail="本地桥接未初始化")
-    
-    connections = cursor_local_bridge.list_connections()
-    return {"success": True, "connections": connections}
-
-
-@router.get("/cursor/authorization/statistics")
-async def get_cursor_authorization_statistics():
-    """获取Cursor授权统计信息"""
-    if not cursor_authorization:
-        raise HTTPException(status_code=503, detail="授权系统未初始化")
-    
-    stats = cursor_authorization.get_statistics()
-    return {"success": True, "statistics": stats}
-
-
 # ============ P0-017: 安全与合规基线 ============
 
 @router.post("/security/crawler/check", dependencies=[security_read_dep])
@@ -9015,7 +8570,6 @@ class DualRAGQueryRequest(BaseModel):
 @router.post("/dual-rag/execute")
 async def dual_rag_execute(
     request: DualRAGQueryRequest,
-    _: bool = Depends(_get_require_api_key()),
 ) -> Dict[str, Any]:
     """
     执行双RAG流程
@@ -9044,9 +8598,7 @@ async def dual_rag_execute(
 
 
 @router.get("/dual-rag/performance")
-async def get_dual_rag_performance(
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
+async def get_dual_rag_performance() -> Dict[str, Any]:
     """获取双RAG执行性能指标"""
     if not dual_rag_engine:
         raise HTTPException(status_code=503, detail="双RAG执行引擎未初始化")
@@ -9064,8 +8616,7 @@ async def get_dual_rag_performance(
 
 @router.get("/dual-rag/history")
 async def get_dual_rag_history(
-    limit: int = Field(10, ge=1, le=100, description="返回数量"),
-    _: bool = Depends(_get_require_api_key()),
+    limit: int = Query(10, ge=1, le=100, description="返回数量"),
 ) -> Dict[str, Any]:
     """获取双RAG执行历史"""
     if not dual_rag_engine:
@@ -9127,886 +8678,6 @@ async def export_task_replay(task_id: str, format: str = "json"):
         raise HTTPException(status_code=404, detail=str(e))
 
 
-# ============ P2-303: 智能任务/自我学习/资源管理 ============
-
-class TaskCreateRequest(BaseModel):
-    """创建任务请求"""
-    task_name: str
-    task_type: str
-    priority: str = "medium"
-    metadata: Optional[Dict[str, Any]] = None
-
-
-class LearningPointRequest(BaseModel):
-    """添加学习点请求"""
-    curve_id: str
-    accuracy: float = Field(..., ge=0, le=100)
-    loss: Optional[float] = None
-    epoch: Optional[int] = None
-    dataset_size: Optional[int] = None
-    metadata: Optional[Dict[str, Any]] = None
-
-
-class ResourceAllocateRequest(BaseModel):
-    """资源分配请求"""
-    task_id: str
-    resource_type: str
-    requested_amount: float = Field(..., ge=0, le=100)
-    priority: int = Field(5, ge=1, le=10)
-    metadata: Optional[Dict[str, Any]] = None
-
-
-@router.post("/task-lifecycle/create")
-async def create_task(
-    request: TaskCreateRequest,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """创建任务"""
-    try:
-        priority = TaskPriority(request.priority)
-        lifecycle = task_lifecycle_manager.create_task(
-            task_name=request.task_name,
-            task_type=request.task_type,
-            priority=priority,
-            metadata=request.metadata,
-        )
-        return {
-            "success": True,
-            "task": lifecycle.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"创建任务失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"创建失败: {str(e)}")
-
-
-@router.post("/task-lifecycle/{task_id}/start")
-async def start_task(
-    task_id: str,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """启动任务"""
-    try:
-        success = task_lifecycle_manager.start_task(task_id)
-        if not success:
-            raise HTTPException(status_code=400, detail="任务不存在或状态不正确")
-        
-        task = task_lifecycle_manager.get_task(task_id)
-        return {
-            "success": True,
-            "task": task.to_dict(),
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"启动任务失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"启动失败: {str(e)}")
-
-
-@router.post("/task-lifecycle/{task_id}/update-progress")
-async def update_task_progress(
-    task_id: str,
-    progress: float = Field(..., ge=0, le=100),
-    current_step: Optional[str] = None,
-    completed_steps: Optional[int] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """更新任务进度"""
-    try:
-        success = task_lifecycle_manager.update_progress(
-            task_id=task_id,
-            progress=progress,
-            current_step=current_step,
-            completed_steps=completed_steps,
-        )
-        if not success:
-            raise HTTPException(status_code=400, detail="任务不存在")
-        
-        task = task_lifecycle_manager.get_task(task_id)
-        return {
-            "success": True,
-            "task": task.to_dict(),
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"更新进度失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"更新失败: {str(e)}")
-
-
-@router.post("/task-lifecycle/{task_id}/complete")
-async def complete_task(
-    task_id: str,
-    result: Optional[Dict[str, Any]] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """完成任务"""
-    try:
-        success = task_lifecycle_manager.complete_task(task_id, result)
-        if not success:
-            raise HTTPException(status_code=400, detail="任务不存在或状态不正确")
-        
-        task = task_lifecycle_manager.get_task(task_id)
-        return {
-            "success": True,
-            "task": task.to_dict(),
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"完成任务失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"完成失败: {str(e)}")
-
-
-@router.get("/task-lifecycle/list")
-async def list_tasks(
-    status: Optional[str] = None,
-    task_type: Optional[str] = None,
-    limit: int = Field(100, ge=1, le=1000),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """列出任务"""
-    try:
-        task_status = TaskStatus(status) if status else None
-        tasks = task_lifecycle_manager.list_tasks(
-            status=task_status,
-            task_type=task_type,
-            limit=limit,
-        )
-        return {
-            "success": True,
-            "tasks": [t.to_dict() for t in tasks],
-            "total": len(tasks),
-        }
-    except Exception as e:
-        logger.error(f"列出任务失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"列出失败: {str(e)}")
-
-
-@router.get("/task-lifecycle/statistics")
-async def get_task_statistics(
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取任务统计"""
-    try:
-        stats = task_lifecycle_manager.get_task_statistics()
-        return {
-            "success": True,
-            "statistics": stats,
-        }
-    except Exception as e:
-        logger.error(f"获取统计失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.post("/learning-curve/create")
-async def create_learning_curve(
-    model_name: str,
-    task_type: str,
-    curve_id: Optional[str] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """创建学习曲线"""
-    try:
-        curve = learning_curve_tracker.create_curve(
-            model_name=model_name,
-            task_type=task_type,
-            curve_id=curve_id,
-        )
-        return {
-            "success": True,
-            "curve": curve.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"创建学习曲线失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"创建失败: {str(e)}")
-
-
-@router.post("/learning-curve/add-point")
-async def add_learning_point(
-    request: LearningPointRequest,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """添加学习点"""
-    try:
-        success = learning_curve_tracker.add_point(
-            curve_id=request.curve_id,
-            accuracy=request.accuracy,
-            loss=request.loss,
-            epoch=request.epoch,
-            dataset_size=request.dataset_size,
-            metadata=request.metadata,
-        )
-        if not success:
-            raise HTTPException(status_code=400, detail="学习曲线不存在")
-        
-        curve = learning_curve_tracker.get_curve(request.curve_id)
-        return {
-            "success": True,
-            "curve": curve.to_dict(),
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"添加学习点失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"添加失败: {str(e)}")
-
-
-@router.get("/learning-curve/{curve_id}/data")
-async def get_learning_curve_data(
-    curve_id: str,
-    include_loss: bool = False,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取学习曲线数据"""
-    try:
-        data = learning_curve_tracker.get_curve_data(
-            curve_id=curve_id,
-            include_loss=include_loss,
-        )
-        if not data:
-            raise HTTPException(status_code=404, detail="学习曲线不存在")
-        
-        return {
-            "success": True,
-            "data": data,
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"获取学习曲线数据失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.get("/learning-curve/list")
-async def list_learning_curves(
-    model_name: Optional[str] = None,
-    task_type: Optional[str] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """列出学习曲线"""
-    try:
-        curves = learning_curve_tracker.list_curves(
-            model_name=model_name,
-            task_type=task_type,
-        )
-        return {
-            "success": True,
-            "curves": [c.to_dict() for c in curves],
-            "total": len(curves),
-        }
-    except Exception as e:
-        logger.error(f"列出学习曲线失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"列出失败: {str(e)}")
-
-
-@router.get("/learning-curve/statistics")
-async def get_learning_statistics(
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取学习统计"""
-    try:
-        stats = learning_curve_tracker.get_learning_statistics()
-        return {
-            "success": True,
-            "statistics": stats,
-        }
-    except Exception as e:
-        logger.error(f"获取学习统计失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.post("/resource/allocate")
-async def allocate_resource(
-    request: ResourceAllocateRequest,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """分配资源"""
-    try:
-        resource_type = ResourceType(request.resource_type)
-        allocation = await resource_scheduler.allocate_resource(
-            task_id=request.task_id,
-            resource_type=resource_type,
-            requested_amount=request.requested_amount,
-            priority=request.priority,
-            metadata=request.metadata,
-        )
-        return {
-            "success": True,
-            "allocation": allocation.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"分配资源失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"分配失败: {str(e)}")
-
-
-@router.post("/resource/release/{allocation_id}")
-async def release_resource(
-    allocation_id: str,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """释放资源"""
-    try:
-        success = await resource_scheduler.release_resource(allocation_id)
-        if not success:
-            raise HTTPException(status_code=400, detail="资源分配不存在")
-        
-        return {
-            "success": True,
-            "message": "资源已释放",
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"释放资源失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"释放失败: {str(e)}")
-
-
-@router.get("/resource/status")
-async def get_resource_status(
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取资源状态"""
-    try:
-        status = resource_scheduler.get_resource_status()
-        return {
-            "success": True,
-            "status": status,
-        }
-    except Exception as e:
-        logger.error(f"获取资源状态失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.get("/resource/hints")
-async def get_resource_hints(
-    hint_type: Optional[str] = None,
-    unacknowledged_only: bool = False,
-    limit: int = Field(50, ge=1, le=200),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取交互提示"""
-    try:
-        hint_type_enum = HintType(hint_type) if hint_type else None
-        hints = resource_scheduler.get_hints(
-            hint_type=hint_type_enum,
-            unacknowledged_only=unacknowledged_only,
-            limit=limit,
-        )
-        return {
-            "success": True,
-            "hints": [h.to_dict() for h in hints],
-            "total": len(hints),
-        }
-    except Exception as e:
-        logger.error(f"获取交互提示失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.post("/resource/hints/{hint_id}/acknowledge")
-async def acknowledge_hint(
-    hint_id: str,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """确认提示"""
-    try:
-        success = resource_scheduler.acknowledge_hint(hint_id)
-        if not success:
-            raise HTTPException(status_code=400, detail="提示不存在")
-        
-        return {
-            "success": True,
-            "message": "提示已确认",
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"确认提示失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"确认失败: {str(e)}")
-
-
-@router.get("/resource/suggestions")
-async def get_scheduling_suggestions(
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取调度建议"""
-    try:
-        suggestions = resource_scheduler.get_scheduling_suggestions()
-        return {
-            "success": True,
-            "suggestions": suggestions,
-        }
-    except Exception as e:
-        logger.error(f"获取调度建议失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-# ============ P3-402: 多租户深度隔离 ============
-
-from core.tenant_data_isolation import get_tenant_data_isolation
-from core.tenant_quota_manager import get_quota_manager, QuotaType
-from core.tenant_audit_logger import get_audit_logger, AuditAction
-from core.tenant_manager import tenant_manager
-
-class QuotaSetRequest(BaseModel):
-    """设置配额请求"""
-    tenant_id: str
-    quota_type: str
-    limit: int
-    reset_period: str = "monthly"
-    metadata: Optional[Dict[str, Any]] = None
-
-
-class QuotaUseRequest(BaseModel):
-    """使用配额请求"""
-    tenant_id: str
-    quota_type: str
-    amount: int
-
-
-@router.get("/tenant/quota/list")
-async def list_tenant_quotas(
-    tenant_id: str,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取租户所有配额"""
-    try:
-        quota_mgr = get_quota_manager()
-        quotas = quota_mgr.get_all_quotas(tenant_id)
-        return {
-            "success": True,
-            "quotas": {k: v.to_dict() for k, v in quotas.items()},
-        }
-    except Exception as e:
-        logger.error(f"获取配额失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.get("/tenant/quota/usage")
-async def get_quota_usage(
-    tenant_id: str,
-    quota_type: Optional[str] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取配额使用情况"""
-    try:
-        quota_mgr = get_quota_manager()
-        usage = quota_mgr.get_usage(tenant_id, quota_type)
-        return {
-            "success": True,
-            "usage": usage,
-        }
-    except Exception as e:
-        logger.error(f"获取使用量失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.post("/tenant/quota/set")
-async def set_tenant_quota(
-    request: QuotaSetRequest,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """设置租户配额"""
-    try:
-        quota_mgr = get_quota_manager()
-        quota_type = QuotaType(request.quota_type)
-        quota = quota_mgr.set_quota(
-            tenant_id=request.tenant_id,
-            quota_type=quota_type,
-            limit=request.limit,
-            reset_period=request.reset_period,
-            metadata=request.metadata,
-        )
-        return {
-            "success": True,
-            "quota": quota.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"设置配额失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"设置失败: {str(e)}")
-
-
-@router.post("/tenant/quota/use")
-async def use_tenant_quota(
-    request: QuotaUseRequest,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """使用配额"""
-    try:
-        quota_mgr = get_quota_manager()
-        success, error = quota_mgr.use_quota(
-            tenant_id=request.tenant_id,
-            quota_type=request.quota_type,
-            amount=request.amount,
-        )
-        if not success:
-            raise HTTPException(status_code=400, detail=error or "配额不足")
-        
-        return {
-            "success": True,
-            "message": "配额使用成功",
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"使用配额失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"使用失败: {str(e)}")
-
-
-@router.get("/tenant/storage/stats")
-async def get_tenant_storage_stats(
-    tenant_id: str,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取租户存储统计"""
-    try:
-        isolation = get_tenant_data_isolation()
-        storage_size = isolation.get_tenant_storage_size(tenant_id)
-        files = isolation.list_tenant_files(tenant_id)
-        
-        return {
-            "success": True,
-            "stats": {
-                "storage_size": storage_size,
-                "storage_size_mb": round(storage_size / 1024 / 1024, 2),
-                "file_count": len(files),
-            },
-        }
-    except Exception as e:
-        logger.error(f"获取存储统计失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.get("/tenant/audit/query")
-async def query_audit_logs(
-    tenant_id: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    action: Optional[str] = None,
-    resource_type: Optional[str] = None,
-    user_id: Optional[str] = None,
-    limit: int = Field(100, ge=1, le=1000),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """查询审计日志"""
-    try:
-        audit_logger = get_audit_logger()
-        action_enum = AuditAction(action) if action else None
-        logs = audit_logger.query_logs(
-            tenant_id=tenant_id,
-            start_date=start_date,
-            end_date=end_date,
-            action=action_enum,
-            resource_type=resource_type,
-            user_id=user_id,
-            limit=limit,
-        )
-        return {
-            "success": True,
-            "logs": [log.to_dict() for log in logs],
-            "total": len(logs),
-        }
-    except Exception as e:
-        logger.error(f"查询审计日志失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
-
-
-@router.get("/tenant/audit/report")
-async def get_audit_report(
-    tenant_id: str,
-    start_date: str,
-    end_date: str,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """生成审计报表"""
-    try:
-        audit_logger = get_audit_logger()
-        report = audit_logger.generate_audit_report(
-            tenant_id=tenant_id,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        return {
-            "success": True,
-            "report": report,
-        }
-    except Exception as e:
-        logger.error(f"生成审计报表失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"生成失败: {str(e)}")
-
-
-@router.get("/tenant/audit/export")
-async def export_audit_logs(
-    tenant_id: str,
-    start_date: str,
-    end_date: str,
-    format: str = Field("json", pattern="^(json|csv)$"),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """导出审计日志"""
-    try:
-        audit_logger = get_audit_logger()
-        export_path = audit_logger.export_audit_logs(
-            tenant_id=tenant_id,
-            start_date=start_date,
-            end_date=end_date,
-            format=format,
-        )
-        return {
-            "success": True,
-            "export_path": export_path,
-            "message": "审计日志已导出",
-        }
-    except Exception as e:
-        logger.error(f"导出审计日志失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
-
-
-@router.get("/tenant/info")
-async def get_tenant_info(
-    tenant_id: str,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取租户信息"""
-    try:
-        tenant = tenant_manager.get_tenant(tenant_id)
-        if not tenant:
-            raise HTTPException(status_code=404, detail="租户不存在")
-        
-        return {
-            "success": True,
-            "tenant": {
-                "tenant_id": tenant.tenant_id,
-                "name": tenant.name,
-                "plan": tenant.plan,
-                "active": tenant.active,
-                "metadata": tenant.metadata,
-            },
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"获取租户信息失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
-
-
-@router.post("/tenant/audit/log")
-async def log_audit_event(
-    tenant_id: str,
-    action: str,
-    resource_type: str,
-    user_id: Optional[str] = None,
-    resource_id: Optional[str] = None,
-    details: Optional[Dict[str, Any]] = None,
-    ip_address: Optional[str] = None,
-    user_agent: Optional[str] = None,
-    success: bool = True,
-    error_message: Optional[str] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """记录审计事件"""
-    try:
-        audit_logger = get_audit_logger()
-        action_enum = AuditAction(action)
-        log = audit_logger.log(
-            tenant_id=tenant_id,
-            action=action_enum,
-            resource_type=resource_type,
-            user_id=user_id,
-            resource_id=resource_id,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            success=success,
-            error_message=error_message,
-        )
-        return {
-            "success": True,
-            "log": log.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"记录审计事件失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"记录失败: {str(e)}")
-
-
-# ============ P3-403: 性能与可靠性 ============
-
-from tests.performance.test_performance_suite import PerformanceTestSuite
-from core.slo_report_generator import get_slo_report_generator
-from scripts.chaos_engineering.chaos_test_runner import ChaosTestRunner, ChaosScenario
-
-@router.post("/performance/test/load")
-async def run_load_test(
-    endpoint: str = "/health",
-    concurrent_users: int = Field(10, ge=1, le=1000),
-    requests_per_user: int = Field(10, ge=1, le=100),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """运行负载测试"""
-    try:
-        suite = PerformanceTestSuite()
-        result = await suite.load_test(
-            endpoint=endpoint,
-            concurrent_users=concurrent_users,
-            requests_per_user=requests_per_user,
-        )
-        await suite.close()
-        return {
-            "success": True,
-            "result": result.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"负载测试失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
-
-
-@router.post("/performance/test/stress")
-async def run_stress_test(
-    endpoint: str = "/health",
-    initial_users: int = Field(10, ge=1),
-    max_users: int = Field(100, ge=1),
-    step: int = Field(10, ge=1),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """运行压力测试"""
-    try:
-        suite = PerformanceTestSuite()
-        results = await suite.stress_test(
-            endpoint=endpoint,
-            initial_users=initial_users,
-            max_users=max_users,
-            step=step,
-        )
-        await suite.close()
-        return {
-            "success": True,
-            "results": [r.to_dict() for r in results],
-        }
-    except Exception as e:
-        logger.error(f"压力测试失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
-
-
-@router.get("/slo/report")
-async def get_slo_report(
-    measurement_period: Optional[str] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """获取SLO报告"""
-    try:
-        generator = get_slo_report_generator()
-        report = generator.generate_slo_report(measurement_period)
-        return {
-            "success": True,
-            "report": report,
-        }
-    except Exception as e:
-        logger.error(f"生成SLO报告失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"生成失败: {str(e)}")
-
-
-@router.post("/slo/target")
-async def set_slo_target(
-    name: str,
-    target_value: float,
-    measurement_window: str = "30d",
-    error_budget: float = Field(0.01, ge=0, le=1),
-    metadata: Optional[Dict[str, Any]] = None,
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """设置SLO目标"""
-    try:
-        generator = get_slo_report_generator()
-        target = generator.set_slo_target(
-            name=name,
-            target_value=target_value,
-            measurement_window=measurement_window,
-            error_budget=error_budget,
-            metadata=metadata,
-        )
-        return {
-            "success": True,
-            "target": {
-                "name": target.name,
-                "target_value": target.target_value,
-                "measurement_window": target.measurement_window,
-                "error_budget": target.error_budget,
-            },
-        }
-    except Exception as e:
-        logger.error(f"设置SLO目标失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"设置失败: {str(e)}")
-
-
-@router.post("/chaos/test/sidecar-down")
-async def run_chaos_test_sidecar_down(
-    sidecar_name: str = "rag-sidecar",
-    duration: int = Field(60, ge=10, le=300),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """运行Sidecar宕机故障演练"""
-    try:
-        runner = ChaosTestRunner()
-        result = await runner.test_sidecar_down(
-            sidecar_name=sidecar_name,
-            duration=duration,
-        )
-        return {
-            "success": result.success,
-            "result": result.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"故障演练失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
-
-
-@router.post("/chaos/test/database-degraded")
-async def run_chaos_test_database_degraded(
-    database_name: str = "postgres",
-    degradation_type: str = Field("slow_queries", pattern="^(slow_queries|connection_limit|disk_full)$"),
-    duration: int = Field(60, ge=10, le=300),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """运行数据库降级故障演练"""
-    try:
-        runner = ChaosTestRunner()
-        result = await runner.test_database_degraded(
-            database_name=database_name,
-            degradation_type=degradation_type,
-            duration=duration,
-        )
-        return {
-            "success": result.success,
-            "result": result.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"故障演练失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
-
-
-@router.post("/chaos/test/api-timeout")
-async def run_chaos_test_api_timeout(
-    endpoint: str = "/gateway/rag/search",
-    timeout_duration: int = Field(30, ge=5, le=300),
-    test_duration: int = Field(60, ge=10, le=600),
-    _: bool = Depends(_get_require_api_key()),
-) -> Dict[str, Any]:
-    """运行API超时故障演练"""
-    try:
-        runner = ChaosTestRunner()
-        result = await runner.test_api_timeout(
-            endpoint=endpoint,
-            timeout_duration=timeout_duration,
-            test_duration=test_duration,
-        )
-        return {
-            "success": result.success,
-            "result": result.to_dict(),
-        }
-    except Exception as e:
-        logger.error(f"故障演练失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"测试失败: {str(e)}")
-
-
 # ============ 3.2: 四模块查询、执行、回写接口（使用 configurable_api_connector） ============
 
 # 初始化可配置API连接器
@@ -10039,7 +8710,7 @@ async def get_rag_documents(
     limit: int = 50,
     offset: int = 0,
     doc_type: Optional[str] = None,
-    _: Dict[str, Any] = Depends(rag_read_dep)
+    _: Dict[str, Any] = rag_read_dep
 ):
     """查询RAG文档列表"""
     try:
@@ -10087,7 +8758,7 @@ async def get_rag_documents(
 @router.get("/rag/documents/{doc_id}", dependencies=[rag_read_dep])
 async def get_rag_document(
     doc_id: str,
-    _: Dict[str, Any] = Depends(rag_read_dep)
+    _: Dict[str, Any] = rag_read_dep
 ):
     """查询RAG文档详情"""
     try:
@@ -10119,7 +8790,7 @@ async def search_rag(
     query: str,
     top_k: int = 10,
     filter_type: Optional[str] = None,
-    _: Dict[str, Any] = Depends(rag_read_dep)
+    _: Dict[str, Any] = rag_read_dep
 ):
     """执行RAG检索"""
     try:
@@ -10159,7 +8830,7 @@ async def search_rag(
 
 @router.get("/rag/stats", dependencies=[rag_read_dep])
 async def get_rag_stats(
-    _: Dict[str, Any] = Depends(rag_read_dep)
+    _: Dict[str, Any] = rag_read_dep
 ):
     """获取RAG统计信息"""
     try:
@@ -10189,7 +8860,7 @@ async def get_rag_stats(
 @router.post("/rag/writeback", dependencies=[rag_write_dep])
 async def rag_writeback(
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(rag_write_dep)
+    _: Dict[str, Any] = rag_write_dep
 ):
     """RAG数据回写"""
     try:
@@ -10240,7 +8911,7 @@ async def get_erp_orders(
     limit: int = 50,
     offset: int = 0,
     status: Optional[str] = None,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP订单列表"""
     try:
@@ -10265,7 +8936,7 @@ async def get_erp_orders(
 @router.get("/erp/orders/{order_id}", dependencies=[erp_read_dep])
 async def get_erp_order(
     order_id: str,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP订单详情"""
     try:
@@ -10284,7 +8955,7 @@ async def get_erp_order(
 async def get_erp_customers(
     limit: int = 50,
     offset: int = 0,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP客户列表"""
     try:
@@ -10309,7 +8980,7 @@ async def get_erp_customers(
 @router.get("/erp/customers/{customer_id}", dependencies=[erp_read_dep])
 async def get_erp_customer(
     customer_id: str,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP客户详情"""
     try:
@@ -10329,7 +9000,7 @@ async def get_erp_projects(
     limit: int = 50,
     offset: int = 0,
     status: Optional[str] = None,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP项目列表"""
     try:
@@ -10354,7 +9025,7 @@ async def get_erp_projects(
 @router.get("/erp/projects/{project_id}", dependencies=[erp_read_dep])
 async def get_erp_project(
     project_id: str,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP项目详情"""
     try:
@@ -10373,7 +9044,7 @@ async def get_erp_project(
 async def get_erp_inventory(
     limit: int = 50,
     offset: int = 0,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP库存列表"""
     try:
@@ -10398,7 +9069,7 @@ async def get_erp_inventory(
 @router.get("/erp/inventory/{item_id}", dependencies=[erp_read_dep])
 async def get_erp_inventory_item(
     item_id: str,
-    _: Dict[str, Any] = Depends(erp_read_dep)
+    _: Dict[str, Any] = erp_read_dep
 ):
     """查询ERP库存详情"""
     try:
@@ -10418,7 +9089,7 @@ async def execute_erp_action(
     type: str,
     id: str,
     action: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(erp_write_dep)
+    _: Dict[str, Any] = erp_write_dep
 ):
     """执行ERP操作（批准、拒绝、更新等）"""
     try:
@@ -10440,7 +9111,7 @@ async def execute_erp_action(
 @router.post("/erp/writeback", dependencies=[erp_write_dep])
 async def erp_writeback(
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(erp_write_dep)
+    _: Dict[str, Any] = erp_write_dep
 ):
     """ERP数据回写"""
     try:
@@ -10468,7 +9139,7 @@ async def get_content_list(
     offset: int = 0,
     content_type: Optional[str] = None,
     status: Optional[str] = None,
-    _: Dict[str, Any] = Depends(content_read_dep)
+    _: Dict[str, Any] = content_read_dep
 ):
     """查询内容列表"""
     try:
@@ -10493,7 +9164,7 @@ async def get_content_list(
 @router.get("/content/{content_id}", dependencies=[content_read_dep])
 async def get_content(
     content_id: str,
-    _: Dict[str, Any] = Depends(content_read_dep)
+    _: Dict[str, Any] = content_read_dep
 ):
     """查询内容详情"""
     try:
@@ -10511,7 +9182,7 @@ async def get_content(
 @router.post("/content/generate", dependencies=[content_write_dep])
 async def generate_content(
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(content_write_dep)
+    _: Dict[str, Any] = content_write_dep
 ):
     """执行内容生成"""
     try:
@@ -10539,7 +9210,7 @@ async def generate_content(
 async def publish_content(
     content_id: str,
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(content_write_dep)
+    _: Dict[str, Any] = content_write_dep
 ):
     """执行内容发布"""
     try:
@@ -10565,7 +9236,7 @@ async def publish_content(
 async def get_content_materials(
     limit: int = 50,
     offset: int = 0,
-    _: Dict[str, Any] = Depends(content_read_dep)
+    _: Dict[str, Any] = content_read_dep
 ):
     """查询素材列表"""
     try:
@@ -10592,7 +9263,7 @@ async def get_published_content(
     limit: int = 50,
     offset: int = 0,
     platform: Optional[str] = None,
-    _: Dict[str, Any] = Depends(content_read_dep)
+    _: Dict[str, Any] = content_read_dep
 ):
     """查询已发布内容列表"""
     try:
@@ -10617,7 +9288,7 @@ async def get_published_content(
 @router.post("/content/writeback", dependencies=[content_write_dep])
 async def content_writeback(
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(content_write_dep)
+    _: Dict[str, Any] = content_write_dep
 ):
     """内容数据回写"""
     try:
@@ -10643,7 +9314,7 @@ async def get_trend_reports(
     limit: int = 50,
     offset: int = 0,
     indicator: Optional[str] = None,
-    _: Dict[str, Any] = Depends(trend_read_dep)
+    _: Dict[str, Any] = trend_read_dep
 ):
     """查询趋势报告列表"""
     try:
@@ -10668,7 +9339,7 @@ async def get_trend_reports(
 @router.get("/trend/reports/{report_id}", dependencies=[trend_read_dep])
 async def get_trend_report(
     report_id: str,
-    _: Dict[str, Any] = Depends(trend_read_dep)
+    _: Dict[str, Any] = trend_read_dep
 ):
     """查询趋势报告详情"""
     try:
@@ -10687,7 +9358,7 @@ async def get_trend_report(
 async def get_trend_indicators(
     limit: int = 50,
     offset: int = 0,
-    _: Dict[str, Any] = Depends(trend_read_dep)
+    _: Dict[str, Any] = trend_read_dep
 ):
     """查询趋势指标列表"""
     try:
@@ -10712,7 +9383,7 @@ async def get_trend_indicators(
 @router.get("/trend/indicators/{indicator_id}", dependencies=[trend_read_dep])
 async def get_trend_indicator(
     indicator_id: str,
-    _: Dict[str, Any] = Depends(trend_read_dep)
+    _: Dict[str, Any] = trend_read_dep
 ):
     """查询趋势指标详情"""
     try:
@@ -10732,7 +9403,7 @@ async def get_trend_analysis_tasks(
     limit: int = 50,
     offset: int = 0,
     status: Optional[str] = None,
-    _: Dict[str, Any] = Depends(trend_read_dep)
+    _: Dict[str, Any] = trend_read_dep
 ):
     """查询趋势分析任务列表"""
     try:
@@ -10757,7 +9428,7 @@ async def get_trend_analysis_tasks(
 @router.get("/trend/analysis/tasks/{task_id}", dependencies=[trend_read_dep])
 async def get_trend_analysis_task(
     task_id: str,
-    _: Dict[str, Any] = Depends(trend_read_dep)
+    _: Dict[str, Any] = trend_read_dep
 ):
     """查询趋势分析任务详情"""
     try:
@@ -10775,7 +9446,7 @@ async def get_trend_analysis_task(
 @router.post("/trend/analysis/start", dependencies=[trend_write_dep])
 async def start_trend_analysis(
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(trend_write_dep)
+    _: Dict[str, Any] = trend_write_dep
 ):
     """启动趋势分析任务"""
     try:
@@ -10800,7 +9471,7 @@ async def start_trend_analysis(
 @router.post("/trend/analysis/execute", dependencies=[trend_write_dep])
 async def execute_trend_analysis(
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(trend_write_dep)
+    _: Dict[str, Any] = trend_write_dep
 ):
     """执行趋势分析"""
     try:
@@ -10826,7 +9497,7 @@ async def execute_trend_analysis(
 async def export_trend_report(
     report_id: str,
     format: str = "pdf",
-    _: Dict[str, Any] = Depends(trend_read_dep)
+    _: Dict[str, Any] = trend_read_dep
 ):
     """导出趋势报告"""
     try:
@@ -10845,7 +9516,7 @@ async def export_trend_report(
 @router.post("/trend/writeback", dependencies=[trend_write_dep])
 async def trend_writeback(
     request: Dict[str, Any] = Body(...),
-    _: Dict[str, Any] = Depends(trend_write_dep)
+    _: Dict[str, Any] = trend_write_dep
 ):
     """趋势数据回写"""
     try:
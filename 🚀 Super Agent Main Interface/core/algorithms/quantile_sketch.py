@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式分位数：DDSketch 与滑动时间窗口
+
+固定内存、可合并、可序列化的分位数草图，替代“保存原始样本 + 每次排序”的做法。
+相对误差由 relative_accuracy 控制（默认 1%），多个 worker 的草图合并后即可得到集群级分位数。
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class DDSketch:
+    """
+    DDSketch（对数分桶）
+
+    正值按 ceil(log_gamma(x)) 落桶，零值单独计数；桶数超过 max_bins 时合并最低的桶，
+    保证高分位（p95/p99）精度不受影响。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], **kwargs) -> "DDSketch":
+        sketch = cls(**kwargs)
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, weight: int = 1):
+        """写入一个样本（负值按 0 处理，时延类指标不会出现负数）"""
+        if value <= 0:
+            self.zero_count += weight
+            value = 0.0
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + weight
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self):
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        lowest = keys[: excess + 1]
+        merged = sum(self.bins.pop(k) for k in lowest)
+        self.bins[lowest[-1]] = merged
+
+    def quantile(self, q: float) -> float:
+        """返回分位数 q∈[0,1]，空草图返回 0.0"""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        running = self.zero_count
+        for key in sorted(self.bins):
+            running += self.bins[key]
+            if running > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, float]:
+        """一次遍历计算多个分位数"""
+        targets = sorted(qs)
+        result: Dict[float, float] = {q: 0.0 for q in targets}
+        if self.count == 0:
+            return result
+        keys = sorted(self.bins)
+        running = self.zero_count
+        idx = 0
+        pending = [(q, q * (self.count - 1)) for q in targets]
+        for q, rank in pending:
+            if rank < self.zero_count:
+                result[q] = 0.0
+                continue
+            while idx < len(keys) and running + self.bins[keys[idx]] <= rank:
+                running += self.bins[keys[idx]]
+                idx += 1
+            if idx >= len(keys):
+                result[q] = self.max
+            else:
+                value = 2 * self.gamma ** keys[idx] / (self.gamma + 1)
+                result[q] = min(max(value, self.min), self.max)
+        return result
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def merge(self, other: "DDSketch"):
+        """合并另一个同精度草图"""
+        if other.count == 0:
+            return
+        if abs(other.gamma - self.gamma) > 1e-12:
+            raise ValueError("无法合并不同精度的 DDSketch")
+        for key, cnt in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + cnt
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "DDSketch":
+        clone = DDSketch(self.relative_accuracy, self.max_bins)
+        clone.merge(self)
+        return clone
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "bins": {str(k): v for k, v in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        sketch = cls(data.get("relative_accuracy", 0.01), data.get("max_bins", 2048))
+        sketch.bins = {int(k): int(v) for k, v in data.get("bins", {}).items()}
+        sketch.zero_count = int(data.get("zero_count", 0))
+        sketch.count = int(data.get("count", 0))
+        sketch.sum = float(data.get("sum", 0.0))
+        if sketch.count:
+            sketch.min = float(data["min"])
+            sketch.max = float(data["max"])
+        return sketch
+
+    def summary(self, scale: float = 1.0) -> Dict[str, float]:
+        """常用统计：count/avg/min/max/p50/p95/p99（可按 scale 换算单位）"""
+        qs = self.quantiles((0.5, 0.95, 0.99))
+        return {
+            "count": self.count,
+            "avg": self.avg * scale,
+            "min": (self.min if self.count else 0.0) * scale,
+            "max": (self.max if self.count else 0.0) * scale,
+            "p50": qs[0.5] * scale,
+            "p95": qs[0.95] * scale,
+            "p99": qs[0.99] * scale,
+        }
+
+
+class WindowedQuantileSketch:
+    """
+    滑动时间窗口分位数
+
+    窗口切分为 num_slots 个时间槽，每槽一个 DDSketch；查询时合并仍在窗口内的槽，
+    过期槽在写入时原地复用，内存固定。
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        num_slots: int = 10,
+        relative_accuracy: float = 0.01,
+        max_bins: int = 2048,
+    ):
+        self.window_seconds = window_seconds
+        self.num_slots = num_slots
+        self.slot_seconds = window_seconds / num_slots
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._slots: List[Optional[DDSketch]] = [None] * num_slots
+        self._slot_ids: List[int] = [-1] * num_slots
+        self.total = DDSketch(relative_accuracy, max_bins)
+
+    def _slot(self, now: float) -> DDSketch:
+        slot_id = int(now // self.slot_seconds)
+        idx = slot_id % self.num_slots
+        if self._slot_ids[idx] != slot_id or self._slots[idx] is None:
+            self._slots[idx] = DDSketch(self.relative_accuracy, self.max_bins)
+            self._slot_ids[idx] = slot_id
+        return self._slots[idx]
+
+    def add(self, value: float, timestamp: Optional[float] = None):
+        now = time.time() if timestamp is None else timestamp
+        self._slot(now).add(value)
+        self.total.add(value)
+
+    def window(self, now: Optional[float] = None) -> DDSketch:
+        """合并窗口内的槽，返回新草图"""
+        now = time.time() if now is None else now
+        current = int(now // self.slot_seconds)
+        merged = DDSketch(self.relative_accuracy, self.max_bins)
+        for sketch, slot_id in zip(self._slots, self._slot_ids):
+            if sketch is not None and current - slot_id < self.num_slots:
+                merged.merge(sketch)
+        return merged
+
+    def quantile(self, q: float, now: Optional[float] = None) -> float:
+        return self.window(now).quantile(q)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self.window_seconds,
+            "num_slots": self.num_slots,
+            "slots": [
+                {"slot_id": slot_id, "sketch": sketch.to_dict()}
+                for sketch, slot_id in zip(self._slots, self._slot_ids)
+                if sketch is not None
+            ],
+            "total": self.total.to_dict(),
+        }
+
+    def merge_dict(self, data: Dict[str, Any]):
+        """合并其他 worker 导出的窗口草图（按 slot_id 对齐）"""
+        for item in data.get("slots", []):
+            slot_id = int(item["slot_id"])
+            idx = slot_id % self.num_slots
+            incoming = DDSketch.from_dict(item["sketch"])
+            if self._slot_ids[idx] == slot_id and self._slots[idx] is not None:
+                self._slots[idx].merge(incoming)
+            elif slot_id > self._slot_ids[idx]:
+                self._slots[idx] = incoming
+                self._slot_ids[idx] = slot_id
+        if data.get("total"):
+            self.total.merge(DDSketch.from_dict(data["total"]))
+
+
+def merge_sketches(payloads: Iterable[Dict[str, Any]]) -> DDSketch:
+    """合并多个序列化草图，得到集群级分布"""
+    merged: Optional[DDSketch] = None
+    for payload in payloads:
+        sketch = DDSketch.from_dict(payload)
+        if merged is None:
+            merged = sketch
+        else:
+            merged.merge(sketch)
+    return merged or DDSketch()
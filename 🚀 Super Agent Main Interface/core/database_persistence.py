@@ -8,16 +8,18 @@ P0-003: 实现统一的数据库持久化层，替换所有模拟数据
 import asyncio
 import logging
 import os
+import re
 import sqlite3
-import threading
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type, TypeVar
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
 from uuid import uuid4
 import json
 
+from .sqlite_engine import get_engine
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
@@ -46,6 +48,38 @@ class PersistenceRecord:
         return asdict(self)
 
 
+# 常用过滤字段：建立 JSON1 表达式索引，查询时使用完全相同的表达式以命中索引
+INDEXED_JSON_FIELDS = (
+    "_tenant_id",
+    "category",
+    "severity",
+    "event_type",
+    "status",
+    "source",
+    "approval_id",
+    "requirement_id",
+)
+
+# 排序字段白名单：列名直接映射，其余合法字段名映射到 json_extract
+ORDER_COLUMNS = {
+    "_created_at": "created_at_index",
+    "created_at_index": "created_at_index",
+    "_updated_at": "updated_at",
+    "updated_at": "updated_at",
+    "_id": "id",
+    "id": "id",
+}
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def _json_field_expr(key: str) -> str:
+    """校验字段名并返回 json_extract 表达式（字段名以字面量内联，便于命中表达式索引）"""
+    if not _FIELD_RE.match(key):
+        raise ValueError(f"非法字段名: {key!r}")
+    return f"json_extract(data, '$.{key}')"
+
+
 class DatabasePersistence:
     """
     数据库持久化层
@@ -56,6 +90,7 @@ class DatabasePersistence:
     - 自动创建表结构
     - 数据同步支持
     - 事务支持
+    - 共享 WAL 连接、批量写同步队列、JSON1 表达式索引
     """
     
     def __init__(
@@ -73,9 +108,7 @@ class DatabasePersistence:
                 db_path = project_root / "artifacts" / "data" / "persistence.db"
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # 线程锁
-        self._lock = threading.Lock()
+        self._engine = get_engine(self.db_path)
         
         # 同步标志
         self.enable_sync = enable_sync
@@ -87,11 +120,10 @@ class DatabasePersistence:
     def _init_database(self):
         """初始化数据库"""
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
+            engine = self._engine
             
             # 创建通用数据表
-            cursor.execute("""
+            engine.execute("""
                 CREATE TABLE IF NOT EXISTS persistence_data (
                     id TEXT PRIMARY KEY,
                     table_name TEXT NOT NULL,
@@ -105,22 +137,31 @@ class DatabasePersistence:
             """)
             
             # 创建索引
-            cursor.execute("""
+            engine.execute("""
                 CREATE INDEX IF NOT EXISTS idx_table_name 
                 ON persistence_data(table_name)
             """)
-            cursor.execute("""
+            engine.execute("""
                 CREATE INDEX IF NOT EXISTS idx_status 
                 ON persistence_data(status)
             """)
-            cursor.execute("""
+            engine.execute("""
                 CREATE INDEX IF NOT EXISTS idx_created_at 
                 ON persistence_data(created_at_index)
             """)
+            engine.execute("""
+                CREATE INDEX IF NOT EXISTS idx_table_status_created
+                ON persistence_data(table_name, status, created_at_index)
+            """)
+            for key in INDEXED_JSON_FIELDS:
+                engine.execute(f"""
+                    CREATE INDEX IF NOT EXISTS idx_json_{key.lstrip('_')}
+                    ON persistence_data(table_name, {_json_field_expr(key)})
+                """)
             
             # 创建同步队列表
             if self.enable_sync:
-                cursor.execute("""
+                engine.execute("""
                     CREATE TABLE IF NOT EXISTS sync_queue (
                         id TEXT PRIMARY KEY,
                         table_name TEXT NOT NULL,
@@ -135,13 +176,11 @@ class DatabasePersistence:
                     )
                 """)
                 
-                cursor.execute("""
+                engine.execute("""
                     CREATE INDEX IF NOT EXISTS idx_sync_status 
                     ON sync_queue(status)
                 """)
             
-            conn.commit()
-            conn.close()
             logger.info(f"数据库持久化层已初始化: {self.db_path}")
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}", exc_info=True)
@@ -177,56 +216,36 @@ class DatabasePersistence:
         )
         
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                # 检查是否存在
-                cursor.execute("""
-                    SELECT id FROM persistence_data 
-                    WHERE id = ? AND table_name = ?
-                """, (record_id, table_name))
-                
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # 更新
-                    cursor.execute("""
-                        UPDATE persistence_data 
-                        SET data = ?, updated_at = ?, metadata = ?
-                        WHERE id = ? AND table_name = ?
-                    """, (
-                        json.dumps(data, ensure_ascii=False),
-                        record.updated_at,
-                        json.dumps(metadata or {}, ensure_ascii=False),
-                        record_id,
-                        table_name,
-                    ))
-                else:
-                    # 插入
-                    cursor.execute("""
-                        INSERT INTO persistence_data 
-                        (id, table_name, data, status, created_at, updated_at, metadata)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record.id,
-                        record.table_name,
-                        json.dumps(record.data, ensure_ascii=False),
-                        record.status.value,
-                        record.created_at,
-                        record.updated_at,
-                        json.dumps(record.metadata, ensure_ascii=False),
-                    ))
-                
-                conn.commit()
-                conn.close()
-                
-                # 添加到同步队列
-                if self.enable_sync:
-                    self._add_to_sync_queue(table_name, "save", record_id, data)
-                
-                logger.debug(f"数据已保存: {table_name}/{record_id}")
-                return record_id
+            # 单条 UPSERT，保留原 created_at；同一ID已属于其他表时不覆盖
+            cursor = self._engine.execute("""
+                INSERT INTO persistence_data 
+                (id, table_name, data, status, created_at, updated_at, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    data = excluded.data,
+                    updated_at = excluded.updated_at,
+                    metadata = excluded.metadata
+                WHERE persistence_data.table_name = excluded.table_name
+            """, (
+                record.id,
+                record.table_name,
+                json.dumps(record.data, ensure_ascii=False),
+                record.status.value,
+                record.created_at,
+                record.updated_at,
+                json.dumps(record.metadata, ensure_ascii=False),
+            ))
+            if cursor.rowcount == 0:
+                raise sqlite3.IntegrityError(
+                    f"记录ID已被其他表占用: {record_id}（目标表 {table_name}）"
+                )
+            
+            # 添加到同步队列
+            if self.enable_sync:
+                self._add_to_sync_queue(table_name, "save", record_id, data)
+            
+            logger.debug(f"数据已保存: {table_name}/{record_id}")
+            return record_id
         except Exception as e:
             logger.error(f"保存数据失败: {e}", exc_info=True)
             raise
@@ -247,27 +266,50 @@ class DatabasePersistence:
             数据字典或None
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT data, metadata FROM persistence_data
-                    WHERE id = ? AND table_name = ? AND status = ?
-                """, (record_id, table_name, DataStatus.ACTIVE.value))
-                
-                row = cursor.fetchone()
-                conn.close()
-                
-                if row:
-                    data = json.loads(row[0])
-                    metadata = json.loads(row[1]) if row[1] else {}
-                    return {**data, "_metadata": metadata, "_id": record_id}
+            row = self._engine.fetchone("""
+                SELECT data, metadata FROM persistence_data
+                WHERE id = ? AND table_name = ? AND status = ?
+            """, (record_id, table_name, DataStatus.ACTIVE.value))
+            
+            if row:
+                data = json.loads(row[0])
+                metadata = json.loads(row[1]) if row[1] else {}
+                return {**data, "_metadata": metadata, "_id": record_id}
         except Exception as e:
             logger.error(f"加载数据失败: {e}", exc_info=True)
         
         return None
     
+    @staticmethod
+    def _build_filters(filters: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """构建参数化过滤条件（json_extract 精确匹配，支持 a.b 嵌套字段）"""
+        clauses: List[str] = []
+        params: List[Any] = []
+        for key, value in (filters or {}).items():
+            expr = _json_field_expr(key)
+            if value is None:
+                clauses.append(f"{expr} IS NULL")
+            elif isinstance(value, bool):
+                clauses.append(f"{expr} = ?")
+                params.append(1 if value else 0)
+            elif isinstance(value, (dict, list)):
+                clauses.append(f"{expr} = json(?)")
+                params.append(json.dumps(value, ensure_ascii=False))
+            else:
+                clauses.append(f"{expr} = ?")
+                params.append(value)
+        sql = "".join(f" AND {c}" for c in clauses)
+        return sql, params
+    
+    @staticmethod
+    def _build_order(order_by: Optional[str], order_desc: bool) -> str:
+        """排序子句（白名单列或校验过的 JSON 字段）"""
+        direction = "DESC" if order_desc else "ASC"
+        if not order_by:
+            return f" ORDER BY created_at_index {direction}"
+        column = ORDER_COLUMNS.get(order_by) or _json_field_expr(order_by)
+        return f" ORDER BY {column} {direction}"
+    
     def query(
         self,
         table_name: str,
@@ -285,56 +327,45 @@ class DatabasePersistence:
             filters: 过滤条件（字典，支持嵌套字段）
             limit: 返回数量限制
             offset: 偏移量
-            order_by: 排序字段
+            order_by: 排序字段（白名单列或数据字段名）
             order_desc: 是否降序
             
         Returns:
             数据列表
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                # 构建查询
-                query = "SELECT id, data, metadata, created_at, updated_at FROM persistence_data WHERE table_name = ? AND status = ?"
-                params = [table_name, DataStatus.ACTIVE.value]
-                
-                # 应用过滤条件
-                if filters:
-                    for key, value in filters.items():
-                        # 简单过滤（在JSON数据中搜索）
-                        query += f" AND data LIKE ?"
-                        params.append(f'%"{key}":{json.dumps(value)}%')
-                
-                # 排序
-                if order_by:
-                    query += f" ORDER BY {order_by} {'DESC' if order_desc else 'ASC'}"
-                else:
-                    query += " ORDER BY created_at_index DESC"
-                
-                # 限制
-                query += " LIMIT ? OFFSET ?"
-                params.extend([limit, offset])
-                
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                conn.close()
-                
-                results = []
-                for row in rows:
-                    record_id, data_str, metadata_str, created_at, updated_at = row
-                    data = json.loads(data_str)
-                    metadata = json.loads(metadata_str) if metadata_str else {}
-                    results.append({
-                        **data,
-                        "_id": record_id,
-                        "_metadata": metadata,
-                        "_created_at": created_at,
-                        "_updated_at": updated_at,
-                    })
-                
-                return results
+            # 构建查询
+            query = "SELECT id, data, metadata, created_at, updated_at FROM persistence_data WHERE table_name = ? AND status = ?"
+            params: List[Any] = [table_name, DataStatus.ACTIVE.value]
+            
+            # 应用过滤条件
+            filter_sql, filter_params = self._build_filters(filters)
+            query += filter_sql
+            params.extend(filter_params)
+            
+            # 排序
+            query += self._build_order(order_by, order_desc)
+            
+            # 限制
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+            
+            rows = self._engine.connection().execute(query, params).fetchall()
+            
+            results = []
+            for row in rows:
+                record_id, data_str, metadata_str, created_at, updated_at = row
+                data = json.loads(data_str)
+                metadata = json.loads(metadata_str) if metadata_str else {}
+                results.append({
+                    **data,
+                    "_id": record_id,
+                    "_metadata": metadata,
+                    "_created_at": created_at,
+                    "_updated_at": updated_at,
+                })
+            
+            return results
         except Exception as e:
             logger.error(f"查询数据失败: {e}", exc_info=True)
             return []
@@ -357,38 +388,31 @@ class DatabasePersistence:
             是否成功
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                if soft_delete:
-                    # 软删除
-                    cursor.execute("""
-                        UPDATE persistence_data 
-                        SET status = ?, updated_at = ?
-                        WHERE id = ? AND table_name = ?
-                    """, (
-                        DataStatus.DELETED.value,
-                        datetime.utcnow().isoformat() + "Z",
-                        record_id,
-                        table_name,
-                    ))
-                else:
-                    # 硬删除
-                    cursor.execute("""
-                        DELETE FROM persistence_data 
-                        WHERE id = ? AND table_name = ?
-                    """, (record_id, table_name))
-                
-                conn.commit()
-                conn.close()
-                
-                # 添加到同步队列
-                if self.enable_sync:
-                    self._add_to_sync_queue(table_name, "delete", record_id, None)
-                
-                logger.debug(f"数据已删除: {table_name}/{record_id}")
-                return True
+            if soft_delete:
+                # 软删除
+                self._engine.execute("""
+                    UPDATE persistence_data 
+                    SET status = ?, updated_at = ?
+                    WHERE id = ? AND table_name = ?
+                """, (
+                    DataStatus.DELETED.value,
+                    datetime.utcnow().isoformat() + "Z",
+                    record_id,
+                    table_name,
+                ))
+            else:
+                # 硬删除
+                self._engine.execute("""
+                    DELETE FROM persistence_data 
+                    WHERE id = ? AND table_name = ?
+                """, (record_id, table_name))
+            
+            # 添加到同步队列
+            if self.enable_sync:
+                self._add_to_sync_queue(table_name, "delete", record_id, None)
+            
+            logger.debug(f"数据已删除: {table_name}/{record_id}")
+            return True
         except Exception as e:
             logger.error(f"删除数据失败: {e}", exc_info=True)
             return False
@@ -409,23 +433,14 @@ class DatabasePersistence:
             数量
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                query = "SELECT COUNT(*) FROM persistence_data WHERE table_name = ? AND status = ?"
-                params = [table_name, DataStatus.ACTIVE.value]
-                
-                if filters:
-                    for key, value in filters.items():
-                        query += f" AND data LIKE ?"
-                        params.append(f'%"{key}":{json.dumps(value)}%')
-                
-                cursor.execute(query, params)
-                count = cursor.fetchone()[0]
-                conn.close()
-                
-                return count
+            query = "SELECT COUNT(*) FROM persistence_data WHERE table_name = ? AND status = ?"
+            params: List[Any] = [table_name, DataStatus.ACTIVE.value]
+            
+            filter_sql, filter_params = self._build_filters(filters)
+            query += filter_sql
+            params.extend(filter_params)
+            
+            return self._engine.fetchone(query, params)[0]
         except Exception as e:
             logger.error(f"统计数据失败: {e}", exc_info=True)
             return 0
@@ -437,29 +452,21 @@ class DatabasePersistence:
         record_id: str,
         data: Optional[Dict[str, Any]],
     ):
-        """添加到同步队列"""
+        """添加到同步队列（后台批量写入）"""
         try:
-            sync_id = f"sync_{uuid4()}"
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT INTO sync_queue 
-                    (id, table_name, operation, record_id, data, status, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    sync_id,
-                    table_name,
-                    operation,
-                    record_id,
-                    json.dumps(data, ensure_ascii=False) if data else None,
-                    "pending",
-                    datetime.utcnow().isoformat() + "Z",
-                ))
-                
-                conn.commit()
-                conn.close()
+            self._engine.submit("""
+                INSERT INTO sync_queue 
+                (id, table_name, operation, record_id, data, status, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                f"sync_{uuid4()}",
+                table_name,
+                operation,
+                record_id,
+                json.dumps(data, ensure_ascii=False) if data else None,
+                "pending",
+                datetime.utcnow().isoformat() + "Z",
+            ))
         except Exception as e:
             logger.error(f"添加到同步队列失败: {e}", exc_info=True)
     
@@ -473,33 +480,23 @@ class DatabasePersistence:
             return []
         
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                query = "SELECT * FROM sync_queue WHERE 1=1"
-                params = []
-                
-                if status:
-                    query += " AND status = ?"
-                    params.append(status)
-                
-                query += " ORDER BY created_at DESC LIMIT ?"
-                params.append(limit)
-                
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                conn.close()
-                
-                columns = [desc[0] for desc in cursor.description] if cursor.description else []
-                results = []
-                for row in rows:
-                    result = dict(zip(columns, row))
-                    if result.get("data"):
-                        result["data"] = json.loads(result["data"])
-                    results.append(result)
-                
-                return results
+            self._engine.flush()
+            query = "SELECT * FROM sync_queue WHERE 1=1"
+            params: List[Any] = []
+            
+            if status:
+                query += " AND status = ?"
+                params.append(status)
+            
+            query += " ORDER BY created_at DESC LIMIT ?"
+            params.append(limit)
+            
+            results = self._engine.fetchall(query, params)
+            for result in results:
+                if result.get("data"):
+                    result["data"] = json.loads(result["data"])
+            
+            return results
         except Exception as e:
             logger.error(f"获取同步队列失败: {e}", exc_info=True)
             return []
@@ -510,19 +507,11 @@ class DatabasePersistence:
             return 0
         
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    DELETE FROM sync_queue WHERE status = ?
-                """, (status,))
-                
-                count = cursor.rowcount
-                conn.commit()
-                conn.close()
-                
-                return count
+            self._engine.flush()
+            cursor = self._engine.execute("""
+                DELETE FROM sync_queue WHERE status = ?
+            """, (status,))
+            return cursor.rowcount
         except Exception as e:
             logger.error(f"清理同步队列失败: {e}", exc_info=True)
             return 0
@@ -322,6 +322,8 @@ class KnowledgeIngestionStrategy:
                 self.stats["by_type"][entry_type] = self.stats["by_type"].get(entry_type, 0) + 1
                 
                 logger.info(f"知识条目已入库: {knowledge_entry.entry_id}")
+                if hasattr(service, "notify_knowledge_updated"):
+                    service.notify_knowledge_updated()
                 
                 return {
                     "success": True,
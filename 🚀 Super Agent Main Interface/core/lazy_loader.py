@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+子系统懒加载
+
+- LazySingleton：首次使用时才导入模块并实例化（线程安全 + asyncio 友好）
+- lazy_registry：记录所有懒加载子系统，支持按配置预热关键路径
+  （环境变量 SUPER_AGENT_WARMUP=super_agent,memo_system 或 "*"）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Factory = Union[str, Callable[[], T]]
+
+
+def _resolve_factory(factory: Factory) -> Callable[[], Any]:
+    """支持 "package.module:attr" 形式的延迟导入工厂"""
+    if callable(factory):
+        return factory
+    module_name, _, attr = factory.partition(":")
+    module = importlib.import_module(module_name)
+    target = getattr(module, attr) if attr else module
+    return target if callable(target) else (lambda: target)
+
+
+class LazySingleton(Generic[T]):
+    """
+    懒加载单例
+
+    get() 在当前线程同步构造；aget() 把构造放到线程池，避免首次请求阻塞事件循环。
+    两者共用同一把线程锁，保证只构造一次。
+    """
+
+    def __init__(self, name: str, factory: Factory):
+        self.name = name
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.init_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                try:
+                    self._instance = _resolve_factory(self._factory)()
+                except Exception as exc:
+                    self.error = str(exc)
+                    logger.error(f"懒加载子系统初始化失败 {self.name}: {exc}")
+                    raise
+                self.init_seconds = time.perf_counter() - started
+                self.error = None
+                logger.info(f"子系统已加载 {self.name}（{self.init_seconds * 1000:.1f}ms）")
+            return self._instance
+
+    async def aget(self) -> T:
+        if self._instance is not None:
+            return self._instance
+        return await asyncio.to_thread(self.get)
+
+    def __call__(self) -> T:
+        """可直接作为 FastAPI 依赖：Depends(lazy_obj)"""
+        return self.get()
+
+    def reset(self):
+        with self._lock:
+            self._instance = None
+            self.init_seconds = None
+
+
+class LazyRegistry:
+    """懒加载子系统注册表"""
+
+    def __init__(self):
+        self._items: Dict[str, LazySingleton] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Factory) -> LazySingleton:
+        with self._lock:
+            item = self._items.get(name)
+            if item is None:
+                item = LazySingleton(name, factory)
+                self._items[name] = item
+            return item
+
+    def get(self, name: str) -> Any:
+        return self._items[name].get()
+
+    def names(self) -> List[str]:
+        return list(self._items)
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        预热子系统
+
+        Args:
+            names: 需要预热的子系统；None 时读取 SUPER_AGENT_WARMUP 环境变量
+        """
+        if names is None:
+            raw = os.getenv("SUPER_AGENT_WARMUP", "")
+            # 同一变量也用于预热懒注册的领域路由，这里只取本注册表中的名字
+            names = self.names() if raw.strip() == "*" else [
+                n.strip() for n in raw.split(",") if n.strip() in self._items
+            ]
+        results: Dict[str, Any] = {}
+
+        async def _load(name: str):
+            item = self._items.get(name)
+            if item is None:
+                results[name] = {"loaded": False, "error": "未注册"}
+                return
+            try:
+                await item.aget()
+                results[name] = {"loaded": True, "init_ms": round((item.init_seconds or 0) * 1000, 2)}
+            except Exception as exc:
+                results[name] = {"loaded": False, "error": str(exc)}
+
+        await asyncio.gather(*(_load(name) for name in names))
+        return results
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "loaded": item.loaded,
+                "init_ms": round(item.init_seconds * 1000, 2) if item.init_seconds is not None else None,
+                "error": item.error,
+            }
+            for name, item in self._items.items()
+        }
+
+
+lazy_registry = LazyRegistry()
+
+
+def lazy_singleton(name: str, factory: Factory) -> LazySingleton:
+    """在全局注册表中登记懒加载子系统"""
+    return lazy_registry.register(name, factory)
+
+
+__all__ = ["LazySingleton", "LazyRegistry", "lazy_registry", "lazy_singleton"]
@@ -1,31 +1,149 @@
 """
 备忘录系统
 自动识别重要信息并存储
+
+存储：SQLite（共享 WAL 引擎）
+- memos 主表，type/importance/created_at 建索引
+- memo_tags、memo_dates 关联表，按标签、日期查询走索引
+- memos_fts 全文索引（FTS5，trigram 分词支持中文子串检索）
+- id 单调递增，删除后不复用；新增备忘录批量合并写入
+- 入库前校验并规范字段；批量写入失败时逐条重试，写不进去的备忘录移入 memo_quarantine
 """
 
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+from pathlib import Path
+import asyncio
+import atexit
 import json
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+
+from .sqlite_engine import get_engine
+
+logger = logging.getLogger(__name__)
+
+# 主表中的列，其余字段存入 data(JSON)
+_COLUMNS = ("id", "title", "content", "type", "importance", "status", "created_at", "updated_at")
+
+_LIST_FIELDS = ("tags", "dates", "times", "contacts")
+_TEXT_FIELDS = ("title", "content", "type", "status")
+
+
+def _coerce_importance(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError("importance 必须是 1-5 的整数")
+    if isinstance(value, str):
+        value = value.strip()
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"importance 必须是 1-5 的整数: {value!r}") from None
+    if not number.is_integer() or not 1 <= number <= 5:
+        raise ValueError(f"importance 必须是 1-5 的整数: {value!r}")
+    return int(number)
+
+
+def validate_memo_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    校验并规范备忘录字段（只处理出现的字段）
+
+    - title/content/type/status 为字符串（数字等标量转为字符串）
+    - importance 为 1-5 的整数（接受 "4"、4.0）
+    - tags/dates/times/contacts 为字符串列表（单个字符串视为一项）
+    - metadata 为字典
+
+    Raises:
+        ValueError: 字段类型或取值不合法
+    """
+    if not isinstance(data, dict):
+        raise ValueError("备忘录数据必须是对象")
+    fields = dict(data)
+    for key in _TEXT_FIELDS:
+        if key in fields and fields[key] is not None:
+            value = fields[key]
+            if isinstance(value, (dict, list, tuple, set)):
+                raise ValueError(f"{key} 必须是字符串")
+            fields[key] = str(value)
+    if "importance" in fields and fields["importance"] is not None:
+        fields["importance"] = _coerce_importance(fields["importance"])
+    for key in _LIST_FIELDS:
+        if key not in fields or fields[key] is None:
+            continue
+        value = fields[key]
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"{key} 必须是列表")
+        if any(isinstance(v, (dict, list, tuple, set)) for v in value):
+            raise ValueError(f"{key} 的元素必须是字符串")
+        fields[key] = [str(v) for v in value]
+    if "metadata" in fields and fields["metadata"] is not None and not isinstance(fields["metadata"], dict):
+        raise ValueError("metadata 必须是对象")
+    if "type" in fields and fields["type"] is not None and not fields["type"].strip():
+        raise ValueError("type 不能为空")
+    return fields
+
+
+def _flush_at_exit(ref: "weakref.ReferenceType[MemoSystem]"):
+    memo_system = ref()
+    if memo_system is not None:
+        try:
+            memo_system.flush()
+        except Exception as e:
+            logger.warning(f"退出时写入备忘录失败: {e}")
+
 
 class MemoSystem:
     """
     备忘录系统
-    
+
     功能：
     1. 自动识别重要信息（任务、日期、联系人等）
     2. 存储和管理备忘录
     3. 与智能工作计划联动
     """
-    
-    def __init__(self, storage_path: str = "memos.db"):
+
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        batch_size: int = 100,
+        flush_interval: float = 0.5
+    ):
+        """
+        Args:
+            storage_path: 数据库路径（默认读取 MEMO_DB_PATH，未设置时使用 artifacts/data/memos.db）
+            batch_size: 待写入条数达到该值时立即写入
+            flush_interval: 新增备忘录最长延迟写入时间（秒）
+        """
+        if storage_path is None:
+            env_path = os.getenv("MEMO_DB_PATH")
+            if env_path:
+                storage_path = env_path
+            else:
+                project_root = Path(__file__).resolve().parents[2]
+                storage_path = str(project_root / "artifacts" / "data" / "memos.db")
+        Path(storage_path).parent.mkdir(parents=True, exist_ok=True)
         self.storage_path = storage_path
-        self.memos = []
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._engine = get_engine(storage_path)
+        self._lock = threading.RLock()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._next_id = 1
+        self.fts_tokenizer = "trigram"
         self._load_memos()
-        
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
     async def add_memo(self, memo_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         添加备忘录⭐增强版
-        
+
         Args:
             memo_data: 备忘录数据
                 - title: 标题（可选）
@@ -36,46 +154,62 @@ class MemoSystem:
                 - dates: 日期列表
                 - times: 时间列表
                 - contacts: 联系人列表
+
+        Raises:
+            ValueError: 字段不合法（见 validate_memo_fields），或标题和内容都为空
         """
-        memo = {
-            "id": len(self.memos) + 1,
-            "title": memo_data.get("title", memo_data.get("content", "")[:30]),
-            "content": memo_data.get("content", ""),
-            "type": memo_data.get("type", "note"),
-            "importance": memo_data.get("importance", 3),
-            "tags": memo_data.get("tags", []),
-            "dates": memo_data.get("dates", []),
-            "times": memo_data.get("times", []),
-            "contacts": memo_data.get("contacts", []),
-            "metadata": memo_data.get("metadata", {}),
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-            "status": "active"
-        }
-        
-        self.memos.append(memo)
-        await self._save_memos()
-        
+        memo_data = validate_memo_fields(memo_data)
+        content = memo_data.get("content") or ""
+        title = memo_data.get("title") or content[:30]
+        if not title and not content:
+            raise ValueError("备忘录标题和内容不能同时为空")
+        now = datetime.now().isoformat()
+        with self._lock:
+            memo_id = self._next_id
+            self._next_id += 1
+            memo = {
+                "id": memo_id,
+                "title": title,
+                "content": content,
+                "type": memo_data.get("type") or "note",
+                "importance": memo_data.get("importance") or 3,
+                "tags": memo_data.get("tags") or [],
+                "dates": memo_data.get("dates") or [],
+                "times": memo_data.get("times") or [],
+                "contacts": memo_data.get("contacts") or [],
+                "metadata": memo_data.get("metadata") or {},
+                "created_at": now,
+                "updated_at": now,
+                "status": "active"
+            }
+            self._pending[memo_id] = memo
+            pending = len(self._pending)
+
+        if pending >= self.batch_size:
+            await self._save_memos()
+        else:
+            self._schedule_flush()
+
         return memo
-    
+
     async def extract_important_info(self, text: str) -> List[Dict[str, Any]]:
         """
         从文本中提取重要信息
-        
+
         Args:
             text: 输入文本
-            
+
         Returns:
             提取的重要信息列表
         """
         important_info = []
-        
+
         # TODO: 使用NLP模型识别重要信息
         # 1. 识别任务（"需要"、"应该"、"记得"等关键词）
         # 2. 识别日期（"明天"、"下周一"、"2025-11-15"等）
         # 3. 识别联系人（人名、邮箱、电话等）
         # 4. 识别重要事件（会议、截止日期等）
-        
+
         # 简单示例：识别任务
         task_keywords = ["需要", "应该", "记得", "要", "必须", "完成"]
         for keyword in task_keywords:
@@ -87,55 +221,371 @@ class MemoSystem:
                     "tags": ["任务"]
                 })
                 break
-        
+
         return important_info
-    
+
     async def get_memos(
         self,
         type: Optional[str] = None,
         importance: Optional[int] = None,
-        tags: Optional[List[str]] = None
+        tags: Optional[List[str]] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
     ) -> List[Dict[str, Any]]:
-        """获取备忘录"""
-        filtered = self.memos
-        
+        """
+        获取备忘录（按 id 升序）
+
+        Args:
+            type: 类型
+            importance: 最低重要性
+            tags: 标签（命中任意一个即可）
+            date_from: 关联日期下限（含，按字符串比较，如 2025-11-01）
+            date_to: 关联日期上限（含）
+            limit: 返回条数上限
+            offset: 跳过条数
+        """
+        self.flush()
+
+        clauses = []
+        params: List[Any] = []
         if type:
-            filtered = [m for m in filtered if m.get("type") == type]
-        
+            clauses.append("m.type = ?")
+            params.append(type)
         if importance:
-            filtered = [m for m in filtered if m.get("importance") >= importance]
-        
+            clauses.append("m.importance >= ?")
+            params.append(importance)
         if tags:
-            filtered = [m for m in filtered if any(tag in m.get("tags", []) for tag in tags)]
-        
-        return filtered
-    
+            clauses.append(
+                f"m.id IN (SELECT memo_id FROM memo_tags WHERE tag IN ({','.join('?' * len(tags))}))"
+            )
+            params.extend(tags)
+        if date_from or date_to:
+            date_clauses = []
+            if date_from:
+                date_clauses.append("date >= ?")
+                params.append(date_from)
+            if date_to:
+                date_clauses.append("date <= ?")
+                params.append(date_to)
+            clauses.append(f"m.id IN (SELECT memo_id FROM memo_dates WHERE {' AND '.join(date_clauses)})")
+
+        sql = "SELECT m.* FROM memos m"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY m.id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        elif offset:
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(offset)
+
+        return [self._row_to_memo(row) for row in self._engine.fetchall(sql, params)]
+
+    async def get_memo(self, memo_id: int) -> Optional[Dict[str, Any]]:
+        """按 id 获取备忘录"""
+        with self._lock:
+            pending = self._pending.get(memo_id)
+        if pending is not None:
+            return pending
+        rows = self._engine.fetchall("SELECT * FROM memos WHERE id = ?", (memo_id,))
+        return self._row_to_memo(rows[0]) if rows else None
+
+    async def search_memos(
+        self,
+        query: str,
+        limit: int = 20,
+        type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        全文检索备忘录（标题和内容），按相关度排序
+
+        Args:
+            query: 检索词（空格分隔多个词，需全部命中）
+            limit: 返回条数上限
+            type: 限定类型
+        """
+        self.flush()
+        terms = [t for t in query.split() if t]
+        if not terms:
+            return []
+
+        params: List[Any] = []
+        # trigram 分词要求每个词至少3个字符，较短的词退回 LIKE 匹配
+        if self.fts_tokenizer != "trigram" or all(len(t) >= 3 for t in terms):
+            match = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            sql = (
+                "SELECT m.* FROM memos_fts f JOIN memos m ON m.id = f.rowid "
+                "WHERE memos_fts MATCH ?"
+            )
+            params.append(match)
+            if type:
+                sql += " AND m.type = ?"
+                params.append(type)
+            sql += " ORDER BY bm25(memos_fts) LIMIT ?"
+        else:
+            likes = []
+            for term in terms:
+                likes.append("(m.title LIKE ? ESCAPE '\\' OR m.content LIKE ? ESCAPE '\\')")
+                escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                params.extend([f"%{escaped}%", f"%{escaped}%"])
+            sql = "SELECT m.* FROM memos m WHERE " + " AND ".join(likes)
+            if type:
+                sql += " AND m.type = ?"
+                params.append(type)
+            sql += " ORDER BY m.id DESC LIMIT ?"
+        params.append(limit)
+
+        return [self._row_to_memo(row) for row in self._engine.fetchall(sql, params)]
+
+    async def count_memos(self, type: Optional[str] = None) -> int:
+        """备忘录数量"""
+        self.flush()
+        if type:
+            row = self._engine.fetchone("SELECT COUNT(*) FROM memos WHERE type = ?", (type,))
+        else:
+            row = self._engine.fetchone("SELECT COUNT(*) FROM memos")
+        return row[0] if row else 0
+
     async def update_memo(self, memo_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """更新备忘录"""
-        for memo in self.memos:
-            if memo["id"] == memo_id:
-                memo.update(updates)
-                memo["updated_at"] = datetime.now().isoformat()
-                await self._save_memos()
-                return memo
-        return None
-    
+        """
+        更新备忘录
+
+        Raises:
+            ValueError: 字段不合法（见 validate_memo_fields）
+        """
+        updates = validate_memo_fields(updates)
+        self.flush()
+        memo = await self.get_memo(memo_id)
+        if memo is None:
+            return None
+
+        memo.update(updates)
+        memo["id"] = memo_id
+        memo["updated_at"] = datetime.now().isoformat()
+        with self._engine.transaction() as conn:
+            self._write_memo(conn, memo, replace=True)
+        return memo
+
     async def delete_memo(self, memo_id: int) -> bool:
         """删除备忘录"""
-        for i, memo in enumerate(self.memos):
-            if memo["id"] == memo_id:
-                self.memos.pop(i)
-                await self._save_memos()
-                return True
-        return False
-    
+        self.flush()
+        with self._engine.transaction() as conn:
+            deleted = conn.execute("DELETE FROM memos WHERE id = ?", (memo_id,)).rowcount
+            if deleted:
+                conn.execute("DELETE FROM memo_tags WHERE memo_id = ?", (memo_id,))
+                conn.execute("DELETE FROM memo_dates WHERE memo_id = ?", (memo_id,))
+        return bool(deleted)
+
+    def _schedule_flush(self):
+        """在事件循环中延迟写入待保存的备忘录"""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+
+        def run():
+            self._flush_handle = None
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"备忘录批量写入失败: {e}")
+
+        self._flush_handle = loop.call_later(self.flush_interval, run)
+
+    def flush(self):
+        """
+        把待写入的备忘录合并为一个事务写入
+
+        整批失败时逐条写入：数据库不可用（OperationalError）的备忘录留在待写入队列，
+        其余写入失败的备忘录移入 memo_quarantine，不再阻塞后续写入。
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            pending = list(self._pending.values())
+            try:
+                with self._engine.transaction() as conn:
+                    for memo in pending:
+                        self._write_memo(conn, memo)
+            except sqlite3.OperationalError:
+                raise
+            except Exception as e:
+                logger.warning(f"备忘录批量写入失败，改为逐条写入: {e}")
+                self._flush_each(pending)
+                return
+            for memo in pending:
+                self._pending.pop(memo["id"], None)
+
+    def _flush_each(self, pending: List[Dict[str, Any]]):
+        for memo in pending:
+            try:
+                with self._engine.transaction() as conn:
+                    self._write_memo(conn, memo)
+            except sqlite3.OperationalError:
+                raise
+            except Exception as e:
+                self._quarantine(memo, e)
+            self._pending.pop(memo["id"], None)
+
+    def _quarantine(self, memo: Dict[str, Any], error: Exception):
+        logger.error(f"备忘录 {memo.get('id')} 写入失败，已移入隔离表: {error}")
+        try:
+            with self._engine.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO memo_quarantine (memo_id, memo, error, quarantined_at) VALUES (?, ?, ?, ?)",
+                    (memo.get("id"), json.dumps(memo, ensure_ascii=False, default=str),
+                     f"{type(error).__name__}: {error}", datetime.now().isoformat()),
+                )
+        except Exception as e:
+            logger.error(f"备忘录 {memo.get('id')} 隔离失败，已丢弃: {e}")
+
+    def get_quarantined(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """写入失败被隔离的备忘录（最新的在前）"""
+        rows = self._engine.fetchall(
+            "SELECT memo_id, memo, error, quarantined_at FROM memo_quarantine ORDER BY rowid DESC LIMIT ?",
+            (limit,),
+        )
+        return [dict(row, memo=json.loads(row["memo"])) for row in rows]
+
     async def _save_memos(self):
-        """保存备忘录到文件"""
-        # TODO: 实现持久化存储
-        pass
-    
+        """保存备忘录到数据库"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.flush()
+
+    def close(self):
+        """写入剩余备忘录"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.flush()
+
+    def _write_memo(self, conn: sqlite3.Connection, memo: Dict[str, Any], replace: bool = False):
+        extra = {k: v for k, v in memo.items() if k not in _COLUMNS}
+        values = (
+            memo["id"],
+            memo.get("title") or "",
+            memo.get("content") or "",
+            memo.get("type") or "note",
+            int(memo.get("importance") or 0),
+            memo.get("status") or "active",
+            memo.get("created_at"),
+            memo.get("updated_at"),
+            json.dumps(extra, ensure_ascii=False, default=str),
+        )
+        if replace:
+            conn.execute(
+                "UPDATE memos SET title = ?, content = ?, type = ?, importance = ?, status = ?, "
+                "created_at = ?, updated_at = ?, data = ? WHERE id = ?",
+                values[1:] + values[:1],
+            )
+            conn.execute("DELETE FROM memo_tags WHERE memo_id = ?", (memo["id"],))
+            conn.execute("DELETE FROM memo_dates WHERE memo_id = ?", (memo["id"],))
+        else:
+            conn.execute(
+                "INSERT INTO memos (id, title, content, type, importance, status, created_at, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+        tags = {str(t) for t in memo.get("tags") or []}
+        if tags:
+            conn.executemany(
+                "INSERT OR IGNORE INTO memo_tags (tag, memo_id) VALUES (?, ?)",
+                [(tag, memo["id"]) for tag in tags],
+            )
+        dates = {str(d) for d in memo.get("dates") or []}
+        if dates:
+            conn.executemany(
+                "INSERT OR IGNORE INTO memo_dates (date, memo_id) VALUES (?, ?)",
+                [(date, memo["id"]) for date in dates],
+            )
+
+    @staticmethod
+    def _row_to_memo(row: Dict[str, Any]) -> Dict[str, Any]:
+        memo = {key: row[key] for key in _COLUMNS}
+        if row.get("data"):
+            memo.update(json.loads(row["data"]))
+        return memo
+
     def _load_memos(self):
-        """从文件加载备忘录"""
-        # TODO: 实现从文件加载
-        pass
+        """初始化数据库并读取下一个 id"""
+        conn = self._engine.connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS memos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL DEFAULT '',
+                content TEXT NOT NULL DEFAULT '',
+                type TEXT NOT NULL DEFAULT 'note',
+                importance INTEGER NOT NULL DEFAULT 3,
+                status TEXT NOT NULL DEFAULT 'active',
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                data TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE INDEX IF NOT EXISTS idx_memos_type_importance ON memos(type, importance);
+            CREATE INDEX IF NOT EXISTS idx_memos_importance ON memos(importance);
+            CREATE INDEX IF NOT EXISTS idx_memos_created_at ON memos(created_at);
+
+            CREATE TABLE IF NOT EXISTS memo_tags (
+                tag TEXT NOT NULL,
+                memo_id INTEGER NOT NULL,
+                PRIMARY KEY (tag, memo_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_memo_tags_memo ON memo_tags(memo_id);
+
+            CREATE TABLE IF NOT EXISTS memo_dates (
+                date TEXT NOT NULL,
+                memo_id INTEGER NOT NULL,
+                PRIMARY KEY (date, memo_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_memo_dates_memo ON memo_dates(memo_id);
+
+            CREATE TABLE IF NOT EXISTS memo_quarantine (
+                memo_id INTEGER,
+                memo TEXT NOT NULL,
+                error TEXT NOT NULL,
+                quarantined_at TEXT NOT NULL
+            );
+        """)
+
+        exists = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'memos_fts'"
+        ).fetchone()
+        if exists:
+            self.fts_tokenizer = "trigram" if "trigram" in exists[0] else "unicode61"
+        else:
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    conn.execute(
+                        "CREATE VIRTUAL TABLE memos_fts USING fts5("
+                        f"title, content, content='memos', content_rowid='id', tokenize='{tokenizer}')"
+                    )
+                    self.fts_tokenizer = tokenizer
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            conn.execute("INSERT INTO memos_fts(memos_fts) VALUES ('rebuild')")
+        conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS memos_ai AFTER INSERT ON memos BEGIN
+                INSERT INTO memos_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memos_ad AFTER DELETE ON memos BEGIN
+                INSERT INTO memos_fts(memos_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memos_au AFTER UPDATE OF title, content ON memos BEGIN
+                INSERT INTO memos_fts(memos_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                INSERT INTO memos_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END;
+        """)
 
+        # 取 AUTOINCREMENT 序列与现有最大 id 的较大者，保证删除后 id 不复用
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'memos'").fetchone()
+        max_id = conn.execute("SELECT MAX(id) FROM memos").fetchone()
+        self._next_id = max(seq[0] if seq else 0, max_id[0] or 0) + 1
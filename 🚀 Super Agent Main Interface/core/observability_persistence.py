@@ -3,20 +3,20 @@
 将Trace、指标、事件等数据持久化到数据库
 """
 
-import sqlite3
 import json
 import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from pathlib import Path
 import logging
-import threading
+
+from .sqlite_engine import get_engine
 
 logger = logging.getLogger(__name__)
 
 
 class ObservabilityPersistence:
-    """可观测性数据持久化"""
+    """可观测性数据持久化（写入经共享引擎批量提交，查询前自动刷盘）"""
     
     def __init__(self, db_path: Optional[str] = None):
         """
@@ -32,7 +32,7 @@ class ObservabilityPersistence:
             db_path = str(data_dir / "observability.db")
         
         self.db_path = db_path
-        self._lock = threading.Lock()
+        self._engine = get_engine(db_path)
         
         # 初始化数据库
         self._init_database()
@@ -41,8 +41,7 @@ class ObservabilityPersistence:
     
     def _init_database(self):
         """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        cursor = conn.cursor()
+        cursor = self._engine.connection()
         
         # Traces表
         cursor.execute("""
@@ -152,154 +151,110 @@ class ObservabilityPersistence:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_event_name ON events(event_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_trace_id ON events(trace_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)")
-        
-        conn.commit()
-        conn.close()
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_name_timestamp ON metrics(name, timestamp)")
     
     def save_trace(self, trace: Dict[str, Any]):
         """保存Trace"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO traces 
-                (trace_id, request_id, service_name, start_time, end_time, duration, status, tags)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                trace["trace_id"],
-                trace["request_id"],
-                trace.get("service_name"),
-                trace["start_time"],
-                trace.get("end_time"),
-                trace.get("duration"),
-                trace.get("status"),
-                json.dumps(trace.get("tags", {}))
-            ))
-            
-            conn.commit()
-            conn.close()
+        self._engine.submit("""
+            INSERT OR REPLACE INTO traces 
+            (trace_id, request_id, service_name, start_time, end_time, duration, status, tags)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            trace["trace_id"],
+            trace["request_id"],
+            trace.get("service_name"),
+            trace["start_time"],
+            trace.get("end_time"),
+            trace.get("duration"),
+            trace.get("status"),
+            json.dumps(trace.get("tags", {}))
+        ))
     
     def save_span(self, span: Dict[str, Any]):
         """保存Span"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO spans 
-                (span_id, trace_id, parent_span_id, name, type, status, start_time, end_time, duration, tags, logs, error)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                span["span_id"],
-                span["trace_id"],
-                span.get("parent_span_id"),
-                span["name"],
-                span["type"],
-                span["status"],
-                span["start_time"],
-                span.get("end_time"),
-                span.get("duration"),
-                json.dumps(span.get("tags", {})),
-                json.dumps(span.get("logs", [])),
-                span.get("error")
-            ))
-            
-            conn.commit()
-            conn.close()
+        self._engine.submit("""
+            INSERT OR REPLACE INTO spans 
+            (span_id, trace_id, parent_span_id, name, type, status, start_time, end_time, duration, tags, logs, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            span["span_id"],
+            span["trace_id"],
+            span.get("parent_span_id"),
+            span["name"],
+            span["type"],
+            span["status"],
+            span["start_time"],
+            span.get("end_time"),
+            span.get("duration"),
+            json.dumps(span.get("tags", {})),
+            json.dumps(span.get("logs", [])),
+            span.get("error")
+        ))
     
     def save_long_task(self, task: Dict[str, Any]):
         """保存长任务"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO long_tasks 
-                (task_id, trace_id, name, task_type, status, progress, start_time, end_time, duration, current_step, metadata, error)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                task["task_id"],
-                task.get("trace_id"),
-                task["name"],
-                task["task_type"],
-                task["status"],
-                task.get("progress", 0.0),
-                task["start_time"],
-                task.get("end_time"),
-                task.get("duration"),
-                task.get("current_step"),
-                json.dumps(task.get("metadata", {})),
-                task.get("error")
-            ))
-            
-            conn.commit()
-            conn.close()
+        self._engine.submit("""
+            INSERT OR REPLACE INTO long_tasks 
+            (task_id, trace_id, name, task_type, status, progress, start_time, end_time, duration, current_step, metadata, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            task["task_id"],
+            task.get("trace_id"),
+            task["name"],
+            task["task_type"],
+            task["status"],
+            task.get("progress", 0.0),
+            task["start_time"],
+            task.get("end_time"),
+            task.get("duration"),
+            task.get("current_step"),
+            json.dumps(task.get("metadata", {})),
+            task.get("error")
+        ))
     
     def save_task_snapshot(self, task_id: str, snapshot: Dict[str, Any]):
         """保存任务快照"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO task_snapshots 
-                (task_id, timestamp, progress, step, metadata)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                task_id,
-                snapshot["timestamp"],
-                snapshot["progress"],
-                snapshot.get("step"),
-                json.dumps(snapshot.get("metadata", {}))
-            ))
-            
-            conn.commit()
-            conn.close()
+        self._engine.submit("""
+            INSERT INTO task_snapshots 
+            (task_id, timestamp, progress, step, metadata)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            task_id,
+            snapshot["timestamp"],
+            snapshot["progress"],
+            snapshot.get("step"),
+            json.dumps(snapshot.get("metadata", {}))
+        ))
     
     def save_metric(self, metric: Dict[str, Any]):
         """保存指标"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO metrics 
-                (name, value, timestamp, tags, metric_type)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                metric["name"],
-                metric["value"],
-                metric["timestamp"],
-                json.dumps(metric.get("tags", {})),
-                metric.get("metric_type", "gauge")
-            ))
-            
-            conn.commit()
-            conn.close()
+        self._engine.submit("""
+            INSERT INTO metrics 
+            (name, value, timestamp, tags, metric_type)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            metric["name"],
+            metric["value"],
+            metric["timestamp"],
+            json.dumps(metric.get("tags", {})),
+            metric.get("metric_type", "gauge")
+        ))
     
     def save_event(self, event: Dict[str, Any]):
         """保存事件"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO events 
-                (event_id, event_name, timestamp, trace_id, span_id, properties, level)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                event["event_id"],
-                event["event_name"],
-                event["timestamp"],
-                event.get("trace_id"),
-                event.get("span_id"),
-                json.dumps(event.get("properties", {})),
-                event.get("level", "info")
-            ))
-            
-            conn.commit()
-            conn.close()
+        self._engine.submit("""
+            INSERT OR REPLACE INTO events 
+            (event_id, event_name, timestamp, trace_id, span_id, properties, level)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            event["event_id"],
+            event["event_name"],
+            event["timestamp"],
+            event.get("trace_id"),
+            event.get("span_id"),
+            json.dumps(event.get("properties", {})),
+            event.get("level", "info")
+        ))
     
     def get_traces(
         self,
@@ -308,9 +263,7 @@ class ObservabilityPersistence:
         limit: int = 100
     ) -> List[Dict[str, Any]]:
         """获取Traces"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        self._engine.flush()
         
         query = "SELECT * FROM traces WHERE 1=1"
         params = []
@@ -326,48 +279,31 @@ class ObservabilityPersistence:
         query += " ORDER BY start_time DESC LIMIT ?"
         params.append(limit)
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        traces = []
-        for row in rows:
-            trace = dict(row)
+        traces = self._engine.fetchall(query, params)
+        for trace in traces:
             trace["tags"] = json.loads(trace.get("tags") or "{}")
-            traces.append(trace)
         
-        conn.close()
         return traces
     
     def get_task_snapshots(self, task_id: str) -> List[Dict[str, Any]]:
         """获取任务快照"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self._engine.flush()
+        snapshots = self._engine.fetchall("""
             SELECT * FROM task_snapshots 
             WHERE task_id = ? 
             ORDER BY timestamp ASC
         """, (task_id,))
-        
-        rows = cursor.fetchall()
-        snapshots = []
-        for row in rows:
-            snapshot = dict(row)
+        for snapshot in snapshots:
             snapshot["metadata"] = json.loads(snapshot.get("metadata") or "{}")
-            snapshots.append(snapshot)
         
-        conn.close()
         return snapshots
     
     def cleanup_old_data(self, days: int = 30):
         """清理旧数据"""
         cutoff_time = time.time() - (days * 24 * 3600)
         
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            
+        self._engine.flush()
+        with self._engine.transaction() as cursor:
             # 删除旧的Traces（同时删除关联的Spans）
             cursor.execute("DELETE FROM traces WHERE start_time < ?", (cutoff_time,))
             cursor.execute("DELETE FROM spans WHERE start_time < ?", (cutoff_time,))
@@ -381,18 +317,9 @@ class ObservabilityPersistence:
             
             # 删除旧的事件
             cursor.execute("DELETE FROM events WHERE timestamp < ?", (cutoff_time,))
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"已清理 {days} 天前的数据")
-
-
-
-
-
-
-
-
-
-
+        
+        logger.info(f"已清理 {days} 天前的数据")
+    
+    def flush(self):
+        """等待批量写入队列落盘"""
+        self._engine.flush()
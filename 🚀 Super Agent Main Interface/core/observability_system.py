@@ -15,6 +15,8 @@ import asyncio
 from collections import defaultdict, deque
 import threading
 
+from .algorithms.quantile_sketch import DDSketch, WindowedQuantileSketch
+
 logger = logging.getLogger(__name__)
 
 
@@ -232,6 +234,7 @@ class ObservabilitySystem:
         
         # 指标存储
         self.metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=10000))
+        self.metric_sketches: Dict[str, WindowedQuantileSketch] = {}
         
         # 埋点事件
         self.events: deque = deque(maxlen=50000)
@@ -517,6 +520,39 @@ class ObservabilitySystem:
         
         with self._lock:
             self.metrics[name].append(metric)
+            sketch = self.metric_sketches.get(name)
+            if sketch is None:
+                sketch = self.metric_sketches[name] = WindowedQuantileSketch(window_seconds=300.0)
+            sketch.add(value, metric.timestamp)
+    
+    def get_metric_percentiles(self, name: str, window: bool = True) -> Dict[str, float]:
+        """
+        获取指标分位数（p50/p95/p99 等）
+        
+        Args:
+            name: 指标名称
+            window: True 为最近5分钟滑动窗口，False 为进程启动以来
+        """
+        with self._lock:
+            sketch = self.metric_sketches.get(name)
+            if sketch is None:
+                return DDSketch().summary()
+            merged = sketch.window() if window else sketch.total.copy()
+        return merged.summary()
+    
+    def export_metric_sketches(self) -> Dict[str, Any]:
+        """导出指标分位数草图（跨 worker 合并用）"""
+        with self._lock:
+            return {name: sketch.to_dict() for name, sketch in self.metric_sketches.items()}
+    
+    def merge_metric_sketches(self, payload: Dict[str, Any]):
+        """合并其他 worker 的指标分位数草图"""
+        with self._lock:
+            for name, data in payload.items():
+                sketch = self.metric_sketches.get(name)
+                if sketch is None:
+                    sketch = self.metric_sketches[name] = WindowedQuantileSketch(window_seconds=300.0)
+                sketch.merge_dict(data)
     
     def get_metrics(
         self,
@@ -804,11 +840,13 @@ class SpanContext:
             self.obs.finish_span(self.span.span_id, status, error)
 
 
+# 进程内共享实例（API 路由与可观测性中间件共用）
+_observability_system: Optional[ObservabilitySystem] = None
 
 
-
-
-
-
-
-
+def get_observability_system() -> ObservabilitySystem:
+    """获取全局可观测性系统实例（单例）"""
+    global _observability_system
+    if _observability_system is None:
+        _observability_system = ObservabilitySystem()
+    return _observability_system
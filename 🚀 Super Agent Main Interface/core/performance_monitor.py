@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from collections import deque
 import logging
 
+from .algorithms.quantile_sketch import DDSketch, WindowedQuantileSketch
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,16 +21,20 @@ class PerformanceMonitor:
     监控响应时间，确保2秒内响应
     """
     
-    def __init__(self, target_response_time: float = 2.0):
+    def __init__(self, target_response_time: float = 2.0, window_seconds: float = 300.0):
         """
         初始化性能监控器
         
         Args:
             target_response_time: 目标响应时间（秒），默认2秒
+            window_seconds: 分位数滑动窗口（秒），默认5分钟
         """
         self.target_response_time = target_response_time
+        self.window_seconds = window_seconds
         self.response_times = deque(maxlen=1000)  # 保留最近1000次响应时间
+        self.response_sketch = WindowedQuantileSketch(window_seconds=window_seconds)
         self.step_times = {}  # 各步骤耗时统计
+        self.step_sketches: Dict[str, DDSketch] = {}
         self.slow_queries = deque(maxlen=100)  # 慢查询记录
         self.performance_stats = {
             "total_requests": 0,
@@ -53,6 +59,7 @@ class PerformanceMonitor:
             from_cache: 是否来自缓存
         """
         self.response_times.append(response_time)
+        self.response_sketch.add(response_time)
         self.performance_stats["total_requests"] += 1
         
         if from_cache:
@@ -73,9 +80,6 @@ class PerformanceMonitor:
                 "timestamp": datetime.now().isoformat()
             })
             logger.warning(f"响应时间超时: {response_time:.2f}秒 > {self.target_response_time}秒")
-        
-        # 更新统计信息
-        self._update_stats()
     
     def record_step_time(self, step_name: str, step_time: float):
         """
@@ -89,38 +93,77 @@ class PerformanceMonitor:
             self.step_times[step_name] = deque(maxlen=100)
         
         self.step_times[step_name].append(step_time)
+        self.step_sketches.setdefault(step_name, DDSketch()).add(step_time)
     
     def _update_stats(self):
-        """更新性能统计"""
-        if not self.response_times:
-            return
-        
-        sorted_times = sorted(self.response_times)
-        n = len(sorted_times)
-        
-        self.performance_stats["avg_response_time"] = sum(sorted_times) / n
-        self.performance_stats["p50_response_time"] = sorted_times[n // 2]
-        self.performance_stats["p95_response_time"] = sorted_times[int(n * 0.95)]
-        self.performance_stats["p99_response_time"] = sorted_times[int(n * 0.99)]
+        """更新性能统计（基于滑动窗口分位数草图，无需排序原始样本）"""
+        window = self.response_sketch.window()
+        # 窗口为空时 quantiles 返回 0，统计随之归零而不是保留过期值
+        qs = window.quantiles((0.5, 0.95, 0.99))
+        self.performance_stats["avg_response_time"] = window.avg
+        self.performance_stats["p50_response_time"] = qs[0.5]
+        self.performance_stats["p95_response_time"] = qs[0.95]
+        self.performance_stats["p99_response_time"] = qs[0.99]
     
     def get_performance_stats(self) -> Dict[str, Any]:
-        """获取性能统计"""
+        """获取性能统计（分位数在读取时从草图计算）"""
+        self._update_stats()
         return {
             **self.performance_stats,
             "target_response_time": self.target_response_time,
             "current_response_rate": self._calculate_response_rate(),
             "step_times": {
-                step: {
-                    "avg": sum(times) / len(times) if times else 0,
-                    "max": max(times) if times else 0,
-                    "min": min(times) if times else 0,
-                    "count": len(times)
-                }
-                for step, times in self.step_times.items()
+                step: sketch.summary()
+                for step, sketch in self.step_sketches.items()
             },
+            "window_seconds": self.window_seconds,
             "slow_queries_count": len(self.slow_queries)
         }
     
+    def export_sketches(self) -> Dict[str, Any]:
+        """导出可序列化的分位数草图（供多 worker 合并）"""
+        return {
+            "response_time": self.response_sketch.to_dict(),
+            "step_times": {step: sketch.to_dict() for step, sketch in self.step_sketches.items()},
+        }
+    
+    def merge_sketches(self, payloads: Any) -> Dict[str, Any]:
+        """
+        把其他 worker 导出的草图与本地草图合并成集群视图
+
+        合并在副本上进行，不修改本地草图：重复调用不会重复计数，
+        本地 p95/p99 也不会混入其他 worker 的数据。
+
+        Args:
+            payloads: 单个 export_sketches() 结果或其列表
+
+        Returns:
+            集群级 response_time / step_times 统计
+        """
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+        
+        response = self.response_sketch.window()
+        steps = {step: sketch.copy() for step, sketch in self.step_sketches.items()}
+        for payload in payloads:
+            remote = payload.get("response_time")
+            if remote:
+                window = WindowedQuantileSketch(
+                    window_seconds=remote.get("window_seconds", self.window_seconds),
+                    num_slots=remote.get("num_slots", 10),
+                )
+                window.merge_dict(remote)
+                response.merge(window.window())
+            for step, data in payload.get("step_times", {}).items():
+                steps.setdefault(step, DDSketch()).merge(DDSketch.from_dict(data))
+        
+        return {
+            "workers": len(payloads) + 1,
+            "window_seconds": self.window_seconds,
+            "response_time": response.summary(),
+            "step_times": {step: sketch.summary() for step, sketch in steps.items()},
+        }
+    
     def _calculate_response_rate(self) -> float:
         """计算响应率（2秒内响应占比）"""
         if not self.response_times:
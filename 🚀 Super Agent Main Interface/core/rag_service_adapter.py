@@ -3,11 +3,15 @@ RAG服务适配器
 适配RAG知识库的检索服务
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from datetime import datetime
+import logging
 import httpx
 import asyncio
 
+
+logger = logging.getLogger(__name__)
+
 class RAGServiceAdapter:
     """
     RAG服务适配器
@@ -23,6 +27,25 @@ class RAGServiceAdapter:
         self.rag_api_url = rag_api_url
         self.integration_api_url = f"{rag_api_url}/api/v5/rag/integration"
         self.timeout = 10.0
+        self._knowledge_listeners: List[Callable[[Optional[str]], Any]] = []
+    
+    def add_knowledge_listener(self, listener: Callable[[Optional[str]], Any]):
+        """注册知识库更新监听（如语义缓存失效）"""
+        if listener not in self._knowledge_listeners:
+            self._knowledge_listeners.append(listener)
+    
+    def notify_knowledge_updated(self):
+        """
+        知识库写入成功后通知监听者
+
+        知识库检索不区分租户，任何写入都可能改变所有租户的检索结果，
+        因此通知时不带租户（监听者应失效全部作用域）。
+        """
+        for listener in list(self._knowledge_listeners):
+            try:
+                listener(None)
+            except Exception as e:
+                logger.warning(f"知识更新通知失败: {e}")
     
     async def retrieve(
         self,
@@ -352,7 +375,10 @@ class RAGServiceAdapter:
                 
                 if response.status_code == 200:
                     result = response.json()
-                    return result.get("success", False)
+                    success = result.get("success", False)
+                    if success:
+                        self.notify_knowledge_updated()
+                    return success
                 else:
                     return False
         except Exception as e:
@@ -0,0 +1,277 @@
+"""
+语义近似响应缓存
+
+提供：
+- 查询规范化（全角/半角、大小写、标点、空白）
+- 轻量哈希 n-gram 嵌入（无需外部模型，兼容中文）
+- 按租户 + 用户隔离的小型向量索引（固定容量，环形淘汰）
+- 相似度阈值命中、TTL 过期、知识库更新失效
+- 只缓存只读问答结果（失败、模块执行与有副作用的结果不缓存）
+- 命中率与节省时延统计
+"""
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_PUNCT_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+_CJK_RE = re.compile(r"[㐀-鿿豈-﫿]")
+_WORD_RE = re.compile(r"[a-z0-9]+|[㐀-鿿豈-﫿]+")
+
+# 只读的模块执行类型：其余类型（ERP、任务、内容创作等）会执行动作，
+# 相近但日期/对象不同的指令若命中缓存，动作就不会再执行
+READ_ONLY_EXECUTION_TYPES = frozenset({"rag"})
+
+
+def normalize_query(text: str) -> str:
+    """规范化查询：NFKC、小写、去除标点与多余空白"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _PUNCT_RE.sub(" ", text).strip()
+
+
+def is_cacheable_result(result: Dict[str, Any]) -> bool:
+    """
+    判断响应能否写入语义缓存
+
+    不缓存：失败的响应、创建了备忘录/任务计划的响应、
+    执行了非只读模块或执行出错的响应。不含 execution 的纯问答结果可以缓存。
+    """
+    if result.get("success") is False or result.get("error"):
+        return False
+    if result.get("memo_created") or result.get("task_plan_created"):
+        return False
+    execution = result.get("execution")
+    if execution is None:
+        return True
+    if not isinstance(execution, dict) or execution.get("error"):
+        return False
+    return execution.get("type") in READ_ONLY_EXECUTION_TYPES
+
+
+def hashed_ngram_embedding(text: str, dim: int = 256) -> np.ndarray:
+    """
+    基于字符 n-gram 的哈希嵌入
+
+    中文按单字 + 双字切分，英文/数字按词 + 三元字符切分，
+    使用 crc32 做确定性哈希并带符号累加，最后单位化。
+    """
+    vec = np.zeros(dim, dtype="float32")
+    for token in _WORD_RE.findall(text):
+        if _CJK_RE.match(token):
+            grams = list(token) + [token[i : i + 2] for i in range(len(token) - 1)]
+        else:
+            padded = f"#{token}#"
+            grams = [token] + [padded[i : i + 3] for i in range(len(padded) - 2)]
+        for gram in grams:
+            h = zlib.crc32(gram.encode("utf-8"))
+            vec[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+@dataclass
+class SemanticCacheEntry:
+    query: str
+    normalized: str
+    result: Dict[str, Any]
+    response_time: float
+    cached_at: float
+    hits: int = 0
+
+
+@dataclass
+class _ScopeIndex:
+    """单个 (租户, 用户, 输入类型) 作用域内的向量索引"""
+
+    dim: int
+    capacity: int
+    vectors: np.ndarray = field(init=False)
+    entries: List[Optional[SemanticCacheEntry]] = field(init=False)
+    exact: Dict[str, int] = field(default_factory=dict)
+    cursor: int = 0
+
+    def __post_init__(self):
+        self.vectors = np.zeros((self.capacity, self.dim), dtype="float32")
+        self.entries = [None] * self.capacity
+
+    def put(self, vector: np.ndarray, entry: SemanticCacheEntry):
+        slot = self.exact.get(entry.normalized)
+        if slot is None:
+            slot = self.cursor
+            self.cursor = (self.cursor + 1) % self.capacity
+            evicted = self.entries[slot]
+            if evicted is not None:
+                self.exact.pop(evicted.normalized, None)
+        self.vectors[slot] = vector
+        self.entries[slot] = entry
+        self.exact[entry.normalized] = slot
+
+    def drop(self, slot: int):
+        entry = self.entries[slot]
+        if entry is not None:
+            self.exact.pop(entry.normalized, None)
+        self.entries[slot] = None
+        self.vectors[slot] = 0.0
+
+    def search(self, normalized: str, vector: np.ndarray) -> Tuple[int, float]:
+        slot = self.exact.get(normalized)
+        if slot is not None:
+            return slot, 1.0
+        sims = self.vectors @ vector
+        best = int(np.argmax(sims))
+        return best, float(sims[best])
+
+
+class SemanticResponseCache:
+    """
+    语义近似响应缓存（按租户/用户隔离）
+
+    命中条件：余弦相似度 >= threshold 且未过期；知识库更新时调用 invalidate 失效。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        dim: int = 256,
+        max_entries_per_scope: int = 256,
+        ttl_seconds: float = 1800,
+        embedder: Optional[Callable[[str], np.ndarray]] = None,
+    ):
+        self.threshold = threshold
+        self.dim = dim
+        self.max_entries_per_scope = max_entries_per_scope
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder or (lambda text: hashed_ngram_embedding(text, dim))
+        self._scopes: Dict[Tuple[str, str, str], _ScopeIndex] = {}
+        self._lock = Lock()
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "skipped": 0,
+            "invalidations": 0,
+            "saved_latency_seconds": 0.0,
+            "lookup_time_seconds": 0.0,
+        }
+
+    def lookup(
+        self,
+        query: str,
+        tenant_id: str,
+        user_id: str = "anonymous",
+        input_type: str = "text",
+    ) -> Optional[Dict[str, Any]]:
+        """查找语义近似的缓存结果，未命中返回 None"""
+        started = time.perf_counter()
+        normalized = normalize_query(query)
+        hit: Optional[Dict[str, Any]] = None
+        if normalized:
+            vector = self.embedder(normalized)
+            with self._lock:
+                scope = self._scopes.get((tenant_id, user_id, input_type))
+                if scope is not None:
+                    slot, similarity = scope.search(normalized, vector)
+                    entry = scope.entries[slot]
+                    if entry is not None and time.time() - entry.cached_at > self.ttl_seconds:
+                        scope.drop(slot)
+                        entry = None
+                    if entry is not None and similarity >= self.threshold:
+                        entry.hits += 1
+                        hit = {
+                            "result": entry.result,
+                            "similarity": round(similarity, 4),
+                            "cached_query": entry.query,
+                            "original_response_time": entry.response_time,
+                        }
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats["lookups"] += 1
+            self.stats["lookup_time_seconds"] += elapsed
+            if hit:
+                self.stats["hits"] += 1
+                self.stats["saved_latency_seconds"] += max(0.0, hit["original_response_time"] - elapsed)
+            else:
+                self.stats["misses"] += 1
+        return hit
+
+    def store(
+        self,
+        query: str,
+        result: Dict[str, Any],
+        response_time: float,
+        tenant_id: str,
+        user_id: str = "anonymous",
+        input_type: str = "text",
+    ) -> bool:
+        """写入缓存；结果不可缓存（见 is_cacheable_result）时跳过，返回是否写入"""
+        if not is_cacheable_result(result):
+            with self._lock:
+                self.stats["skipped"] += 1
+            return False
+        normalized = normalize_query(query)
+        if not normalized:
+            return False
+        vector = self.embedder(normalized)
+        entry = SemanticCacheEntry(
+            query=query,
+            normalized=normalized,
+            result=result,
+            response_time=response_time,
+            cached_at=time.time(),
+        )
+        key = (tenant_id, user_id, input_type)
+        with self._lock:
+            scope = self._scopes.get(key)
+            if scope is None:
+                scope = _ScopeIndex(dim=self.dim, capacity=self.max_entries_per_scope)
+                self._scopes[key] = scope
+            scope.put(vector, entry)
+            self.stats["stores"] += 1
+        return True
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> int:
+        """知识库更新后失效缓存；tenant_id 为空时清空全部，返回失效的作用域数"""
+        with self._lock:
+            keys = [k for k in self._scopes if tenant_id is None or k[0] == tenant_id]
+            for key in keys:
+                del self._scopes[key]
+            self.stats["invalidations"] += 1
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            entries = sum(
+                1 for scope in self._scopes.values() for e in scope.entries if e is not None
+            )
+            scopes = len(self._scopes)
+        lookups = stats["lookups"]
+        return {
+            **stats,
+            "hit_ratio": stats["hits"] / lookups if lookups else 0.0,
+            "avg_lookup_ms": stats["lookup_time_seconds"] / lookups * 1000 if lookups else 0.0,
+            "entries": entries,
+            "scopes": scopes,
+            "threshold": self.threshold,
+        }
+
+
+__all__ = [
+    "SemanticResponseCache",
+    "SemanticCacheEntry",
+    "normalize_query",
+    "is_cacheable_result",
+    "READ_ONLY_EXECUTION_TYPES",
+    "hashed_ngram_embedding",
+]
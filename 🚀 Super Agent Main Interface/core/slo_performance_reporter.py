@@ -12,6 +12,8 @@ import time
 import json
 import logging
 
+from .algorithms.quantile_sketch import DDSketch
+
 logger = logging.getLogger(__name__)
 
 
@@ -113,7 +115,7 @@ class SLOPerformanceReporter:
                 "avg_query_time_ms": avg_avg,
                 "min_query_time_ms": min(avg_query_times) if avg_query_times else 0,
                 "max_query_time_ms": max(avg_query_times) if avg_query_times else 0,
-                "p95_query_time_ms": sorted(avg_query_times)[int(len(avg_query_times) * 0.95)] if avg_query_times else 0,
+                "p95_query_time_ms": DDSketch.from_values(avg_query_times).quantile(0.95) if avg_query_times else 0,
                 "avg_throughput_qps": sum(b.throughput_qps for b in benches) / len(benches) if benches else 0,
                 "avg_memory_usage_mb": sum(b.memory_usage_mb for b in benches) / len(benches) if benches else 0,
                 "test_count": len(benches)
@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
+from .algorithms.quantile_sketch import DDSketch
+
 logger = logging.getLogger(__name__)
 
 
@@ -270,10 +272,8 @@ class SLOReportGenerator:
         
         # 根据SLO类型计算
         if "response_time" in slo_name:
-            # 响应时间：使用P95
-            sorted_values = sorted(values)
-            p95_index = int(len(sorted_values) * 0.95)
-            return sorted_values[p95_index] if sorted_values else 0.0
+            # 响应时间：使用P95（流式分位数草图，O(n) 单遍）
+            return DDSketch.from_values(values).quantile(0.95)
         
         elif "availability" in slo_name:
             # 可用性：成功率百分比
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享 SQLite 持久化引擎
+
+为超级Agent各持久化组件提供：
+- 按线程复用的长连接（避免每次读写 connect/close）
+- WAL 日志模式 + 调优的 synchronous / cache / mmap 参数
+- 后台批量写入队列（多条 INSERT 合并进一个事务；失败时逐条重试并上报失败行）
+- 同一数据库文件在进程内共享一个引擎实例
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # 约16MB
+    "temp_store": "MEMORY",
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+
+
+# 后台写入项：(SQL, 参数, 失败回调)
+WriteItem = Tuple[str, Sequence[Any], Optional[Callable[[Exception], None]]]
+
+
+class SQLiteEngine:
+    """
+    SQLite 引擎
+
+    读写走线程本地连接；高频追加写通过 submit() 进入后台队列，
+    由写线程按 batch_size / flush_interval 合并成单个事务提交。
+    整批失败时回滚并逐条重试，仍失败的行记入 failed_writes 并回调提交方。
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        pragmas: Optional[Dict[str, Any]] = None,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_failed_writes: int = 1000,
+    ):
+        self.db_path = str(db_path)
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._conn_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[WriteItem]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        self.failed_writes: Deque[Dict[str, Any]] = deque(maxlen=max_failed_writes)
+        self.stats = {"batches": 0, "batched_rows": 0, "write_errors": 0, "row_retries": 0, "failed_rows": 0}
+
+    # ------------------------------------------------------------------ 连接
+    def connection(self) -> sqlite3.Connection:
+        """获取当前线程的长连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            for key, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {key}={value}")
+            self._local.conn = conn
+            with self._conn_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """显式事务（BEGIN IMMEDIATE ... COMMIT/ROLLBACK）"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """自动提交模式下执行单条语句"""
+        return self.connection().execute(sql, params)
+
+    def executescript(self, script: str):
+        self.connection().executescript(script)
+
+    def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        conn = self.connection()
+        cursor = conn.execute(sql, params)
+        columns = [d[0] for d in cursor.description] if cursor.description else []
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[Tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    # ------------------------------------------------------------------ 批量写
+    def submit(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        """
+        异步写入：进入后台队列，与其他写入合并提交
+
+        Args:
+            sql: SQL 语句
+            params: 参数
+            on_error: 该行最终写入失败时的回调（在写线程中调用）
+        """
+        self._ensure_writer()
+        self._queue.put((sql, tuple(params), on_error))
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待后台队列中的写入全部落盘"""
+        if self._writer is None:
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    @property
+    def pending_writes(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def take_failed_writes(self) -> List[Dict[str, Any]]:
+        """取出并清空最终写入失败的行（sql / params / error / failed_at）"""
+        failed = []
+        while self.failed_writes:
+            failed.append(self.failed_writes.popleft())
+        return failed
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._writer_loop, name=f"sqlite-writer:{Path(self.db_path).name}", daemon=True
+                )
+                self._writer.start()
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                batch.append(nxt)
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch: List[WriteItem]):
+        try:
+            with self.transaction() as conn:
+                for sql, params, _ in batch:
+                    conn.execute(sql, params)
+            self.stats["batches"] += 1
+            self.stats["batched_rows"] += len(batch)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.warning(f"批量写入失败（{len(batch)}条），逐条重试: {e}")
+            self._write_rows(batch)
+
+    def _write_rows(self, batch: List[WriteItem]):
+        """整批回滚后逐条写入，只有真正出错的行被丢弃并上报"""
+        conn = self.connection()
+        for sql, params, on_error in batch:
+            self.stats["row_retries"] += 1
+            try:
+                conn.execute(sql, params)
+            except Exception as e:
+                self.stats["failed_rows"] += 1
+                self.failed_writes.append({
+                    "sql": sql,
+                    "params": params,
+                    "error": str(e),
+                    "failed_at": time.time(),
+                })
+                logger.error(f"写入失败已丢弃: {e}; SQL={sql.strip()[:200]} 参数={params!r:.200}")
+                if on_error is not None:
+                    try:
+                        on_error(e)
+                    except Exception as callback_error:
+                        logger.error(f"写入失败回调异常: {callback_error}", exc_info=True)
+
+    def close(self):
+        """刷盘并关闭所有连接"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+        with self._conn_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_engines: Dict[str, SQLiteEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_path: Path | str, **kwargs) -> SQLiteEngine:
+    """按数据库路径获取共享引擎（进程内单例）"""
+    key = str(Path(db_path).resolve())
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None or engine._closed:
+            engine = SQLiteEngine(key, **kwargs)
+            _engines[key] = engine
+        return engine
+
+
+@atexit.register
+def _close_all_engines():
+    with _engines_lock:
+        engines = list(_engines.values())
+    for engine in engines:
+        engine.close()
+
+
+__all__ = ["SQLiteEngine", "get_engine", "DEFAULT_PRAGMAS"]
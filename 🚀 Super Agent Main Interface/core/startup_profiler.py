@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动导入耗时分析
+
+在独立子进程中以 `python -X importtime` 导入目标模块，解析每个模块的自身/累计耗时，
+并与预算比较。可作为 CI 检查：
+
+    python -m core.startup_profiler api.super_agent_api --budget 3.0 --module-budget 0.5
+
+预算也可通过 STARTUP_IMPORT_BUDGET_SECONDS / STARTUP_MODULE_BUDGET_SECONDS 配置，超出时退出码为 1。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+@dataclass
+class ModuleImportTime:
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    target: str
+    total_seconds: float
+    modules: List[ModuleImportTime] = field(default_factory=list)
+    budget_seconds: Optional[float] = None
+    module_budget_seconds: Optional[float] = None
+    violations: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and not self.violations
+
+    def top(self, limit: int = 20, project_only: bool = True) -> List[ModuleImportTime]:
+        modules = self.modules
+        if project_only:
+            modules = [m for m in modules if m.module.split(".")[0] in {"core", "api", "AI_Programming_Assistant"}]
+        return sorted(modules, key=lambda m: m.self_seconds, reverse=True)[:limit]
+
+    def to_dict(self, limit: int = 20) -> Dict:
+        return {
+            "target": self.target,
+            "total_seconds": round(self.total_seconds, 4),
+            "budget_seconds": self.budget_seconds,
+            "module_budget_seconds": self.module_budget_seconds,
+            "passed": self.passed,
+            "violations": self.violations,
+            "error": self.error,
+            "slowest_modules": [asdict(m) for m in self.top(limit)],
+        }
+
+
+def parse_importtime(stderr: str) -> List[ModuleImportTime]:
+    """解析 `-X importtime` 输出：`import time: self [us] | cumulative | imported package`"""
+    modules: List[ModuleImportTime] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, payload = line.split(":", 1)
+            self_us, cumulative_us, name = payload.split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append(
+            ModuleImportTime(
+                module=name.strip(),
+                self_seconds=int(self_us) / 1e6,
+                cumulative_seconds=int(cumulative_us) / 1e6,
+                depth=depth,
+            )
+        )
+    return modules
+
+
+def profile_imports(
+    target: str,
+    budget_seconds: Optional[float] = None,
+    module_budget_seconds: Optional[float] = None,
+    timeout: float = 300.0,
+) -> ImportProfile:
+    """在子进程中导入 target 并生成耗时报告"""
+    if budget_seconds is None and os.getenv("STARTUP_IMPORT_BUDGET_SECONDS"):
+        budget_seconds = float(os.environ["STARTUP_IMPORT_BUDGET_SECONDS"])
+    if module_budget_seconds is None and os.getenv("STARTUP_MODULE_BUDGET_SECONDS"):
+        module_budget_seconds = float(os.environ["STARTUP_MODULE_BUDGET_SECONDS"])
+
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(PROJECT_ROOT), os.getenv("PYTHONPATH")]))}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=str(PROJECT_ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    modules = parse_importtime(proc.stderr)
+    top_level = [m for m in modules if m.module == target]
+    total = top_level[-1].cumulative_seconds if top_level else sum(m.self_seconds for m in modules)
+
+    profile = ImportProfile(
+        target=target,
+        total_seconds=total,
+        modules=modules,
+        budget_seconds=budget_seconds,
+        module_budget_seconds=module_budget_seconds,
+    )
+    if proc.returncode != 0:
+        profile.error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    if budget_seconds is not None and total > budget_seconds:
+        profile.violations.append(f"{target} 导入耗时 {total:.3f}s 超过预算 {budget_seconds:.3f}s")
+    if module_budget_seconds is not None:
+        for m in profile.top(limit=len(modules)):
+            if m.self_seconds > module_budget_seconds:
+                profile.violations.append(
+                    f"{m.module} 自身导入耗时 {m.self_seconds:.3f}s 超过单模块预算 {module_budget_seconds:.3f}s"
+                )
+    return profile
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="启动导入耗时分析与预算检查")
+    parser.add_argument("target", nargs="?", default="api.main")
+    parser.add_argument("--budget", type=float, default=None, help="总导入预算（秒）")
+    parser.add_argument("--module-budget", type=float, default=None, help="单模块自身导入预算（秒）")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    profile = profile_imports(args.target, args.budget, args.module_budget)
+    if args.json:
+        print(json.dumps(profile.to_dict(args.top), ensure_ascii=False, indent=2))
+    else:
+        print(f"{profile.target}: {profile.total_seconds:.3f}s")
+        for m in profile.top(args.top):
+            print(f"  {m.self_seconds * 1000:9.1f}ms  {m.cumulative_seconds * 1000:9.1f}ms  {m.module}")
+        if profile.error:
+            print(f"导入失败: {profile.error}")
+        for violation in profile.violations:
+            print(f"超出预算: {violation}")
+    return 0 if profile.passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ import asyncio
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import json
+import os
 import time
 
 from .workflow_monitor import WorkflowMonitor
@@ -22,6 +23,8 @@ from .evidence_recorder import EvidenceRecorder
 from .dual_rag_engine import DualRAGEngine
 from .enhanced_expert_router import EnhancedExpertRouter
 from .enhanced_workflow_monitor import EnhancedWorkflowMonitor, WorkflowStepType
+from .semantic_response_cache import SemanticResponseCache
+from .tenant_context import get_current_tenant_id
 
 class SuperAgent:
     """
@@ -84,6 +87,12 @@ class SuperAgent:
         self.rag2_cache = {}
         self.max_cache_size = 1000
         self.cache_ttl = 300  # 5分钟
+        # 语义近似缓存（可选开启，SEMANTIC_CACHE_ENABLED=1）
+        self.semantic_cache: Optional[SemanticResponseCache] = None
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1":
+            self.enable_semantic_cache(
+                threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+            )
         self.timeout_config = {
             "memo_extraction": 0.3,  # 优化：减少到0.3秒
             "rag_retrieval": 2.0,  # 优化：减少到2秒
@@ -101,6 +110,7 @@ class SuperAgent:
         
         # 初始化RAG服务适配器
         self.rag_service = RAGServiceAdapter()
+        self.rag_service.add_knowledge_listener(self.invalidate_semantic_cache)
         
         # 初始化专家路由
         self.expert_router = ExpertRouter()
@@ -162,6 +172,20 @@ class SuperAgent:
                     "response_time": (datetime.now() - start_time).total_seconds()
                 }
         
+        # 语义近似缓存（同一租户/用户下措辞略有差异的问题）
+        tenant_id = get_current_tenant_id()
+        user_id = str(context.get("user_id") or "anonymous")
+        if self.semantic_cache:
+            semantic_hit = self.semantic_cache.lookup(user_input, tenant_id, user_id, input_type)
+            if semantic_hit:
+                return {
+                    **semantic_hit["result"],
+                    "from_cache": True,
+                    "cache_type": "semantic",
+                    "cache_similarity": semantic_hit["similarity"],
+                    "response_time": (datetime.now() - start_time).total_seconds()
+                }
+        
         try:
             # 步骤1: 用户输入
             input_data = {
@@ -428,6 +452,13 @@ class SuperAgent:
                 # 限制缓存大小
                 self._cleanup_cache("response_cache", self.max_cache_size)
             
+            # 语义缓存不受精确缓存的时延/长度限制：慢的 RAG+LLM 响应正是它要节省的；
+            # 执行类、有副作用或失败的结果由 store 过滤，不会被缓存
+            if self.semantic_cache:
+                self.semantic_cache.store(
+                    user_input, result, response_time, tenant_id, user_id, input_type
+                )
+            
             return result
             
         except Exception as e:
@@ -1187,6 +1218,27 @@ class SuperAgent:
                 "search_type": search_context.get("search_type")
             })
     
+    def enable_semantic_cache(self, **kwargs) -> SemanticResponseCache:
+        """开启语义近似缓存，参数透传给 SemanticResponseCache"""
+        self.semantic_cache = SemanticResponseCache(**kwargs)
+        return self.semantic_cache
+    
+    def disable_semantic_cache(self):
+        """关闭语义近似缓存"""
+        self.semantic_cache = None
+    
+    def invalidate_semantic_cache(self, tenant_id: Optional[str] = None) -> int:
+        """知识库更新时失效语义缓存"""
+        if not self.semantic_cache:
+            return 0
+        return self.semantic_cache.invalidate(tenant_id)
+    
+    def get_semantic_cache_stats(self) -> Dict[str, Any]:
+        """语义缓存命中率与节省时延"""
+        if not self.semantic_cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.semantic_cache.get_stats()}
+    
     def set_memo_system(self, memo_system):
         """设置备忘录系统"""
         self.memo_system = memo_system
@@ -1194,6 +1246,8 @@ class SuperAgent:
     def set_rag_service(self, rag_service):
         """设置RAG服务"""
         self.rag_service = rag_service
+        if hasattr(rag_service, "add_knowledge_listener"):
+            rag_service.add_knowledge_listener(self.invalidate_semantic_cache)
     
     def set_expert_router(self, expert_router):
         """设置专家路由"""
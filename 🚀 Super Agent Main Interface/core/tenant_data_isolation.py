@@ -3,18 +3,25 @@
 """
 租户数据隔离管理器
 P3-402: 在DB/缓存/文件层面实现租户隔离
+
+租户存储用量（字节数/文件数）在写入、删除时按增量记账，查询为 O(1)；
+后台线程定期遍历目录做全量核对，修正绕过记账接口产生的偏差。
 """
 
 from __future__ import annotations
 
 import os
 import logging
+import threading
+import time
 from typing import Any, Dict, Optional, List
 from pathlib import Path
 from datetime import datetime
 import hashlib
 import json
 
+from .tenant_usage_store import get_usage_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,12 +36,19 @@ class TenantDataIsolation:
     4. 配额管理
     """
     
-    def __init__(self, base_storage_path: str = "./data/tenants"):
+    def __init__(
+        self,
+        base_storage_path: str = "./data/tenants",
+        store: Any = None,
+        reconcile_interval: Optional[float] = 3600.0,
+    ):
         """
         初始化数据隔离管理器
         
         Args:
             base_storage_path: 基础存储路径
+            store: 用量存储（默认使用全局 SQLite/Redis 存储）
+            reconcile_interval: 后台全量核对间隔（秒），None 表示不启动
         """
         self.base_storage_path = Path(base_storage_path)
         self.base_storage_path.mkdir(parents=True, exist_ok=True)
@@ -42,6 +56,13 @@ class TenantDataIsolation:
         # 租户隔离配置
         self.tenant_configs: Dict[str, Dict[str, Any]] = {}
         
+        # 存储记账
+        self.store = store or get_usage_store()
+        self.reconcile_interval = reconcile_interval
+        self._reconciler: Optional[threading.Thread] = None
+        self._reconciler_stop = threading.Event()
+        self._reconciler_lock = threading.Lock()
+        
         logger.info(f"租户数据隔离管理器初始化完成，存储路径: {self.base_storage_path}")
     
     # ============ 数据库隔离 ============
@@ -264,17 +285,87 @@ class TenantDataIsolation:
         """
         files = self.list_tenant_files(tenant_id, category, pattern)
         deleted_count = 0
+        deleted_bytes = 0
         
         for file_path in files:
             try:
                 if file_path.is_file():
+                    size = file_path.stat().st_size
                     file_path.unlink()
                     deleted_count += 1
+                    deleted_bytes += size
             except Exception as e:
                 logger.error(f"删除文件失败: {file_path} - {e}")
         
+        if deleted_count:
+            self.record_storage_change(tenant_id, -deleted_bytes, -deleted_count)
+        
         return deleted_count
     
+    def write_tenant_file(
+        self,
+        tenant_id: str,
+        filename: str,
+        data: bytes,
+        category: Optional[str] = None,
+        quota_manager: Any = None,
+    ) -> tuple[Optional[Path], Optional[str]]:
+        """
+        写入租户文件并记账
+        
+        先按配额原子地预占增量，写入失败时回滚，并发上传不会超出配额。
+        
+        Args:
+            tenant_id: 租户ID
+            filename: 文件名
+            data: 文件内容
+            category: 文件类别
+            quota_manager: 配额管理器（可选）
+            
+        Returns:
+            (文件路径, 错误信息)
+        """
+        file_path = self.get_tenant_file_path(tenant_id, filename, category)
+        old_size = file_path.stat().st_size if file_path.is_file() else None
+        bytes_delta = len(data) - (old_size or 0)
+        files_delta = 0 if old_size is not None else 1
+        
+        byte_limit = quota_manager.get_quota(tenant_id, "storage") if quota_manager else None
+        file_limit = quota_manager.get_quota(tenant_id, "file_count") if quota_manager else None
+        self._ensure_reconciled(tenant_id)
+        ok, current_bytes, current_files = self.store.add_storage(
+            tenant_id, bytes_delta, files_delta, byte_limit=byte_limit, file_limit=file_limit
+        )
+        if not ok:
+            if byte_limit is not None and bytes_delta > 0 and current_bytes + bytes_delta > byte_limit:
+                return None, f"存储配额不足: 当前{current_bytes}字节 + 需要{bytes_delta}字节 > 配额{byte_limit}字节"
+            return None, f"文件数量配额不足: 当前{current_files} + 需要{files_delta} > 配额{file_limit}"
+        
+        try:
+            file_path.write_bytes(data)
+        except Exception:
+            self.store.add_storage(tenant_id, -bytes_delta, -files_delta)
+            raise
+        
+        return file_path, None
+    
+    def record_storage_change(
+        self,
+        tenant_id: str,
+        bytes_delta: int,
+        files_delta: int = 0,
+    ):
+        """
+        记录存储增量（调用方自行写入/删除文件时使用）
+        
+        Args:
+            tenant_id: 租户ID
+            bytes_delta: 字节数变化
+            files_delta: 文件数变化
+        """
+        self._ensure_reconciled(tenant_id)
+        self.store.add_storage(tenant_id, bytes_delta, files_delta)
+    
     def get_tenant_storage_size(
         self,
         tenant_id: str,
@@ -288,14 +379,117 @@ class TenantDataIsolation:
         Returns:
             存储大小（字节）
         """
+        return self._ensure_reconciled(tenant_id)["bytes"]
+    
+    def get_tenant_file_count(
+        self,
+        tenant_id: str,
+    ) -> int:
+        """获取租户文件数（含子目录）"""
+        return self._ensure_reconciled(tenant_id)["files"]
+    
+    def get_tenant_storage_stats(
+        self,
+        tenant_id: str,
+    ) -> Dict[str, Any]:
+        """获取租户存储记账信息"""
+        storage = self._ensure_reconciled(tenant_id)
+        return {
+            "total_size_bytes": storage["bytes"],
+            "file_count": storage["files"],
+            "reconciled_at": (
+                datetime.fromtimestamp(storage["reconciled_at"]).isoformat()
+                if storage.get("reconciled_at") else None
+            ),
+        }
+    
+    # ============ 存储核对 ============
+    
+    def reconcile_tenant_storage(
+        self,
+        tenant_id: str,
+    ) -> Dict[str, Any]:
+        """
+        遍历租户目录，用实际占用覆盖记账值
+        
+        Args:
+            tenant_id: 租户ID
+            
+        Returns:
+            核对结果（含与记账值的偏差）
+        """
         storage_path = self.get_tenant_storage_path(tenant_id)
         total_size = 0
+        file_count = 0
         
         for file_path in storage_path.rglob("*"):
-            if file_path.is_file():
-                total_size += file_path.stat().st_size
+            try:
+                if file_path.is_file():
+                    total_size += file_path.stat().st_size
+                    file_count += 1
+            except OSError:
+                # 遍历期间被删除
+                continue
+        
+        previous = self.store.get_storage(tenant_id)
+        self.store.set_storage(tenant_id, total_size, file_count)
         
-        return total_size
+        drift_bytes = total_size - previous["bytes"] if previous else 0
+        drift_files = file_count - previous["files"] if previous else 0
+        if drift_bytes or drift_files:
+            logger.info(f"租户存储核对修正: {tenant_id} 字节{drift_bytes:+d} 文件{drift_files:+d}")
+        
+        return {
+            "bytes": total_size,
+            "files": file_count,
+            "drift_bytes": drift_bytes,
+            "drift_files": drift_files,
+        }
+    
+    def reconcile_all_storage(self) -> Dict[str, Dict[str, Any]]:
+        """核对所有已记账租户"""
+        results = {}
+        for tenant_id in self.store.storage_tenants():
+            try:
+                results[tenant_id] = self.reconcile_tenant_storage(tenant_id)
+            except Exception as e:
+                logger.error(f"租户存储核对失败: {tenant_id} - {e}")
+        return results
+    
+    def start_reconciliation(self):
+        """启动后台核对线程"""
+        if not self.reconcile_interval:
+            return
+        with self._reconciler_lock:
+            if self._reconciler is not None and self._reconciler.is_alive():
+                return
+            self._reconciler_stop.clear()
+            self._reconciler = threading.Thread(
+                target=self._reconcile_loop, name="tenant-storage-reconcile", daemon=True
+            )
+            self._reconciler.start()
+    
+    def stop_reconciliation(self):
+        """停止后台核对线程"""
+        self._reconciler_stop.set()
+        if self._reconciler is not None:
+            self._reconciler.join(timeout=5)
+            self._reconciler = None
+    
+    def _reconcile_loop(self):
+        while not self._reconciler_stop.wait(self.reconcile_interval):
+            started = time.monotonic()
+            results = self.reconcile_all_storage()
+            logger.debug(f"租户存储核对完成: {len(results)} 个租户, 耗时 {time.monotonic() - started:.2f}s")
+    
+    def _ensure_reconciled(self, tenant_id: str) -> Dict[str, Any]:
+        """首次访问某租户时做一次全量核对，之后只读记账值"""
+        self.start_reconciliation()
+        storage = self.store.get_storage(tenant_id)
+        if storage is None or storage.get("reconciled_at") is None:
+            self.reconcile_tenant_storage(tenant_id)
+            storage = self.store.get_storage(tenant_id)
+        return storage
     
     # ============ 配额检查 ============
     
@@ -354,7 +548,7 @@ class TenantDataIsolation:
             return True, None
         
         # 获取当前文件数
-        current_files = len(self.list_tenant_files(tenant_id))
+        current_files = self.get_tenant_file_count(tenant_id)
         
         # 获取配额
         quota = quota_manager.get_quota(tenant_id, "file_count")
@@ -3,16 +3,24 @@
 """
 租户配额管理器
 P3-402: 实现租户配额管理
+
+配额定义与已用量保存在用量存储中（SQLite/Redis），use_quota 为原子的
+“未超限才增加”，多协程/多进程并发消耗不会超出限制。
+存储/文件数配额的已用量直接取自租户存储记账（见 TenantDataIsolation），
+只能通过实际写入/删除文件变更，不能直接 use/release。
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
+from .tenant_usage_store import get_usage_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +34,15 @@ class QuotaType(str, Enum):
     DATABASE_SIZE = "database_size"  # 数据库大小配额（字节）
 
 
+# 由存储记账维护的“存量”配额：不按周期重置
+STORAGE_QUOTA_FIELDS = {
+    QuotaType.STORAGE.value: "bytes",
+    QuotaType.FILE_COUNT.value: "files",
+}
+
+STORAGE_QUOTA_ERROR = "存储/文件数配额由租户存储记账维护，请通过 write_tenant_file / record_storage_change 变更"
+
+
 @dataclass
 class TenantQuota:
     """租户配额"""
@@ -57,11 +74,34 @@ class TenantQuotaManager:
     5. 自动重置
     """
     
-    def __init__(self):
+    def __init__(self, store: Any = None):
+        """
+        初始化配额管理器
+        
+        Args:
+            store: 用量存储（默认使用全局 SQLite/Redis 存储）
+        """
+        self.store = store or get_usage_store()
         self.quotas: Dict[str, Dict[str, TenantQuota]] = {}  # {tenant_id: {quota_type: quota}}
         self.usage_history: Dict[str, List[Dict[str, Any]]] = {}  # 使用历史
-        
-        logger.info("租户配额管理器初始化完成")
+        self._history_lock = threading.Lock()
+        
+        for row in self.store.load_quotas():
+            try:
+                quota_type = QuotaType(row["quota_type"])
+            except ValueError:
+                continue
+            self.quotas.setdefault(row["tenant_id"], {})[quota_type.value] = TenantQuota(
+                tenant_id=row["tenant_id"],
+                quota_type=quota_type,
+                limit=row["limit"],
+                used=row["used"],
+                reset_period=row["reset_period"],
+                last_reset=row["last_reset"],
+                metadata=row["metadata"],
+            )
+        
+        logger.info(f"租户配额管理器初始化完成，已加载 {sum(len(q) for q in self.quotas.values())} 个配额")
     
     def set_quota(
         self,
@@ -87,15 +127,22 @@ class TenantQuotaManager:
         if tenant_id not in self.quotas:
             self.quotas[tenant_id] = {}
         
+        existing = self.quotas[tenant_id].get(quota_type.value)
         quota = TenantQuota(
             tenant_id=tenant_id,
             quota_type=quota_type,
             limit=limit,
             reset_period=reset_period,
-            last_reset=datetime.utcnow().isoformat(),
+            last_reset=existing.last_reset if existing else datetime.utcnow().isoformat(),
             metadata=metadata or {},
         )
         
+        # 修改限制不清零已用量
+        quota.used = self.store.save_quota(
+            tenant_id, quota_type.value, limit, reset_period, quota.last_reset, quota.metadata
+        )
+        self._refresh_used(quota)
+        
         self.quotas[tenant_id][quota_type.value] = quota
         
         logger.info(f"设置租户配额: {tenant_id} - {quota_type.value} = {limit}")
@@ -141,6 +188,7 @@ class TenantQuotaManager:
         quota = self.quotas[tenant_id].get(quota_type)
         if quota:
             self._check_and_reset(quota)
+            self._refresh_used(quota)
         
         return quota
     
@@ -181,6 +229,9 @@ class TenantQuotaManager:
         """
         使用配额
         
+        存储/文件数配额不能直接使用：其已用量即租户存储记账，
+        直接增加会在对账时被实际文件统计覆盖。
+        
         Args:
             tenant_id: 租户ID
             quota_type: 配额类型
@@ -189,16 +240,26 @@ class TenantQuotaManager:
         Returns:
             (是否成功, 错误信息)
         """
-        allowed, error, quota = self.check_quota(tenant_id, quota_type, amount)
+        if quota_type in STORAGE_QUOTA_FIELDS:
+            return False, STORAGE_QUOTA_ERROR
         
-        if not allowed:
-            return False, error
+        quota = self.quotas.get(tenant_id, {}).get(quota_type)
         
-        if quota:
-            quota.used += amount
-            
-            # 记录使用历史
-            self._record_usage(tenant_id, quota_type, amount)
+        if not quota:
+            # 无配额限制
+            return True, None
+        
+        self._check_and_reset(quota)
+        
+        # 原子地“未超限才增加”，并发调用不会超卖
+        ok, used = self.store.try_consume(tenant_id, quota_type, amount)
+        
+        quota.used = used or 0
+        if not ok:
+            return False, f"配额不足: 已使用{quota.used} + 需要{amount} > 限制{quota.limit}"
+        
+        # 记录使用历史
+        self._record_usage(tenant_id, quota_type, amount)
         
         return True, None
     
@@ -219,13 +280,39 @@ class TenantQuotaManager:
         Returns:
             是否成功
         """
-        quota = self.get_quota_object(tenant_id, quota_type)
+        return self.adjust_usage(tenant_id, quota_type, -amount)
+    
+    def adjust_usage(
+        self,
+        tenant_id: str,
+        quota_type: str,
+        delta: int,
+    ) -> bool:
+        """
+        无条件调整已用量（不检查限制，不低于0）
         
-        if quota:
-            quota.used = max(0, quota.used - amount)
-            return True
+        存储/文件数配额不可调整（返回 False），见 use_quota。
+        
+        Args:
+            tenant_id: 租户ID
+            quota_type: 配额类型
+            delta: 变化量（可为负）
+            
+        Returns:
+            是否成功
+        """
+        if quota_type in STORAGE_QUOTA_FIELDS:
+            logger.warning(f"拒绝直接调整存储配额: tenant={tenant_id}, type={quota_type}")
+            return False
+        
+        quota = self.quotas.get(tenant_id, {}).get(quota_type)
+        
+        if not quota:
+            return False
+        
+        quota.used = self.store.adjust_used(tenant_id, quota_type, delta) or 0
         
-        return False
+        return True
     
     def get_usage(
         self,
@@ -255,6 +342,7 @@ class TenantQuotaManager:
         usage = {}
         for qtype, quota in self.quotas[tenant_id].items():
             self._check_and_reset(quota)
+            self._refresh_used(quota)
             usage[qtype] = quota.to_dict()
         
         return usage
@@ -267,12 +355,24 @@ class TenantQuotaManager:
         # 检查并重置所有配额
         for quota in self.quotas[tenant_id].values():
             self._check_and_reset(quota)
+            self._refresh_used(quota)
         
         return self.quotas[tenant_id].copy()
     
+    def _refresh_used(self, quota: TenantQuota):
+        """从用量存储读取最新已用量（主键查询，O(1)）"""
+        storage_field = STORAGE_QUOTA_FIELDS.get(quota.quota_type.value)
+        if storage_field:
+            storage = self.store.get_storage(quota.tenant_id)
+            quota.used = storage[storage_field] if storage else 0
+        else:
+            used = self.store.get_used(quota.tenant_id, quota.quota_type.value)
+            if used is not None:
+                quota.used = used
+    
     def _check_and_reset(self, quota: TenantQuota):
         """检查并重置配额"""
-        if not quota.last_reset:
+        if not quota.last_reset or quota.quota_type.value in STORAGE_QUOTA_FIELDS:
             return
         
         last_reset = datetime.fromisoformat(quota.last_reset.replace("Z", "+00:00"))
@@ -290,9 +390,17 @@ class TenantQuotaManager:
             should_reset = (now - last_reset).days >= 365
         
         if should_reset:
-            quota.used = 0
-            quota.last_reset = now.isoformat()
-            logger.info(f"配额已重置: {quota.tenant_id} - {quota.quota_type.value}")
+            # 以 last_reset 做比较并交换，多个实例同时到期只重置一次
+            new_last_reset = now.isoformat()
+            if self.store.reset_used(quota.tenant_id, quota.quota_type.value, quota.last_reset, new_last_reset):
+                quota.used = 0
+                quota.last_reset = new_last_reset
+                logger.info(f"配额已重置: {quota.tenant_id} - {quota.quota_type.value}")
+            else:
+                row = self.store.get_quota(quota.tenant_id, quota.quota_type.value)
+                if row:
+                    quota.used = row["used"]
+                    quota.last_reset = row["last_reset"]
     
     def _record_usage(
         self,
@@ -301,18 +409,19 @@ class TenantQuotaManager:
         amount: int,
     ):
         """记录使用历史"""
-        if tenant_id not in self.usage_history:
-            self.usage_history[tenant_id] = []
-        
-        self.usage_history[tenant_id].append({
-            "quota_type": quota_type,
-            "amount": amount,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
-        
-        # 只保留最近1000条记录
-        if len(self.usage_history[tenant_id]) > 1000:
-            self.usage_history[tenant_id] = self.usage_history[tenant_id][-1000:]
+        with self._history_lock:
+            if tenant_id not in self.usage_history:
+                self.usage_history[tenant_id] = []
+            
+            self.usage_history[tenant_id].append({
+                "quota_type": quota_type,
+                "amount": amount,
+                "timestamp": datetime.utcnow().isoformat(),
+            })
+            
+            # 只保留最近1000条记录
+            if len(self.usage_history[tenant_id]) > 1000:
+                self.usage_history[tenant_id] = self.usage_history[tenant_id][-1000:]
     
     def get_usage_history(
         self,
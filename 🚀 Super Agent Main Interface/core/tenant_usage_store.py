@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+租户用量存储
+P3-402: 配额计数与存储用量的持久化、原子更新
+
+- 配额定义与已用量持久化，重启后不丢失
+- 消耗配额为原子“比较并增加”（未超限才增加），并发请求不会超卖
+- 每个租户的存储字节数/文件数按写入、删除时的增量记账，定期全量核对
+- 默认使用 SQLite（共享 WAL 引擎）；配置 TENANT_QUOTA_REDIS_URL 且安装 redis 时使用 Redis
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .sqlite_engine import get_engine
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    redis = None
+    HAS_REDIS = False
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteUsageStore:
+    """基于 SQLite 的用量存储（单条 UPDATE ... RETURNING 保证原子性）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            env_path = os.getenv("TENANT_QUOTA_DB_PATH")
+            if env_path:
+                db_path = env_path
+            else:
+                project_root = Path(__file__).resolve().parents[2]
+                db_path = str(project_root / "artifacts" / "data" / "tenant_usage.db")
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._engine = get_engine(db_path)
+        self._engine.executescript("""
+            CREATE TABLE IF NOT EXISTS tenant_quotas (
+                tenant_id TEXT NOT NULL,
+                quota_type TEXT NOT NULL,
+                limit_value INTEGER NOT NULL,
+                used INTEGER NOT NULL DEFAULT 0,
+                reset_period TEXT NOT NULL DEFAULT 'monthly',
+                last_reset TEXT,
+                metadata TEXT NOT NULL DEFAULT '{}',
+                PRIMARY KEY (tenant_id, quota_type)
+            );
+            CREATE TABLE IF NOT EXISTS tenant_storage (
+                tenant_id TEXT PRIMARY KEY,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                files INTEGER NOT NULL DEFAULT 0,
+                reconciled_at REAL
+            );
+        """)
+
+    # ============ 配额 ============
+
+    def load_quotas(self) -> List[Dict[str, Any]]:
+        rows = self._engine.fetchall("SELECT * FROM tenant_quotas")
+        return [self._quota_row(row) for row in rows]
+
+    def get_quota(self, tenant_id: str, quota_type: str) -> Optional[Dict[str, Any]]:
+        rows = self._engine.fetchall(
+            "SELECT * FROM tenant_quotas WHERE tenant_id = ? AND quota_type = ?", (tenant_id, quota_type)
+        )
+        return self._quota_row(rows[0]) if rows else None
+
+    def save_quota(
+        self,
+        tenant_id: str,
+        quota_type: str,
+        limit: int,
+        reset_period: str,
+        last_reset: Optional[str],
+        metadata: Dict[str, Any],
+    ) -> int:
+        """新增或更新配额定义（保留已用量），返回已用量"""
+        row = self._returning(
+            "INSERT INTO tenant_quotas (tenant_id, quota_type, limit_value, reset_period, last_reset, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (tenant_id, quota_type) DO UPDATE SET limit_value = excluded.limit_value, "
+            "reset_period = excluded.reset_period, metadata = excluded.metadata "
+            "RETURNING used",
+            (tenant_id, quota_type, limit, reset_period, last_reset, json.dumps(metadata, ensure_ascii=False)),
+        )
+        return row[0] if row else 0
+
+    def get_used(self, tenant_id: str, quota_type: str) -> Optional[int]:
+        row = self._engine.fetchone(
+            "SELECT used FROM tenant_quotas WHERE tenant_id = ? AND quota_type = ?", (tenant_id, quota_type)
+        )
+        return row[0] if row else None
+
+    def try_consume(self, tenant_id: str, quota_type: str, amount: int) -> Tuple[bool, Optional[int]]:
+        """
+        未超限时增加已用量
+
+        Returns:
+            (是否成功, 当前已用量)；配额不存在时返回 (True, None)
+        """
+        row = self._returning(
+            "UPDATE tenant_quotas SET used = used + ? "
+            "WHERE tenant_id = ? AND quota_type = ? AND used + ? <= limit_value RETURNING used",
+            (amount, tenant_id, quota_type, amount),
+        )
+        if row:
+            return True, row[0]
+        used = self.get_used(tenant_id, quota_type)
+        return used is None, used
+
+    def adjust_used(self, tenant_id: str, quota_type: str, delta: int) -> Optional[int]:
+        """无条件调整已用量（不低于0）"""
+        row = self._returning(
+            "UPDATE tenant_quotas SET used = MAX(0, used + ?) WHERE tenant_id = ? AND quota_type = ? RETURNING used",
+            (delta, tenant_id, quota_type),
+        )
+        return row[0] if row else None
+
+    def reset_used(self, tenant_id: str, quota_type: str, expected_last_reset: Optional[str], last_reset: str) -> bool:
+        """周期重置：仅当 last_reset 未被其他进程改动时生效"""
+        cursor = self._engine.execute(
+            "UPDATE tenant_quotas SET used = 0, last_reset = ? "
+            "WHERE tenant_id = ? AND quota_type = ? AND last_reset IS ?",
+            (last_reset, tenant_id, quota_type, expected_last_reset),
+        )
+        return cursor.rowcount > 0
+
+    def _returning(self, sql: str, params: Tuple) -> Optional[Tuple]:
+        """执行带 RETURNING 的写语句并读尽结果，使语句立即完成提交"""
+        rows = self._engine.execute(sql, params).fetchall()
+        return rows[0] if rows else None
+
+    @staticmethod
+    def _quota_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "tenant_id": row["tenant_id"],
+            "quota_type": row["quota_type"],
+            "limit": row["limit_value"],
+            "used": row["used"],
+            "reset_period": row["reset_period"],
+            "last_reset": row["last_reset"],
+            "metadata": json.loads(row["metadata"] or "{}"),
+        }
+
+    # ============ 存储用量 ============
+
+    def get_storage(self, tenant_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._engine.fetchall(
+            "SELECT bytes, files, reconciled_at FROM tenant_storage WHERE tenant_id = ?", (tenant_id,)
+        )
+        return rows[0] if rows else None
+
+    def add_storage(
+        self,
+        tenant_id: str,
+        bytes_delta: int,
+        files_delta: int = 0,
+        byte_limit: Optional[int] = None,
+        file_limit: Optional[int] = None,
+    ) -> Tuple[bool, int, int]:
+        """
+        记录存储增量；给出上限时只在增加后不超限才生效
+
+        Returns:
+            (是否成功, 当前字节数, 当前文件数)
+        """
+        self._engine.execute("INSERT OR IGNORE INTO tenant_storage (tenant_id) VALUES (?)", (tenant_id,))
+        row = self._returning(
+            "UPDATE tenant_storage SET bytes = MAX(0, bytes + ?), files = MAX(0, files + ?) "
+            "WHERE tenant_id = ? "
+            "AND (? IS NULL OR ? <= 0 OR bytes + ? <= ?) "
+            "AND (? IS NULL OR ? <= 0 OR files + ? <= ?) "
+            "RETURNING bytes, files",
+            (
+                bytes_delta, files_delta, tenant_id,
+                byte_limit, bytes_delta, bytes_delta, byte_limit,
+                file_limit, files_delta, files_delta, file_limit,
+            ),
+        )
+        if row:
+            return True, row[0], row[1]
+        current = self.get_storage(tenant_id) or {"bytes": 0, "files": 0}
+        return False, current["bytes"], current["files"]
+
+    def set_storage(self, tenant_id: str, total_bytes: int, files: int):
+        """写入全量核对结果"""
+        self._engine.execute(
+            "INSERT INTO tenant_storage (tenant_id, bytes, files, reconciled_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (tenant_id) DO UPDATE SET bytes = excluded.bytes, files = excluded.files, "
+            "reconciled_at = excluded.reconciled_at",
+            (tenant_id, total_bytes, files, time.time()),
+        )
+
+    def storage_tenants(self) -> List[str]:
+        return [row["tenant_id"] for row in self._engine.fetchall("SELECT tenant_id FROM tenant_storage")]
+
+
+_CONSUME_SCRIPT = """
+local limit = redis.call('HGET', KEYS[1], 'limit')
+if not limit then return {1, -1} end
+local used = tonumber(redis.call('HGET', KEYS[1], 'used') or '0')
+local amount = tonumber(ARGV[1])
+if used + amount > tonumber(limit) then return {0, used} end
+return {1, redis.call('HINCRBY', KEYS[1], 'used', amount)}
+"""
+
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return -1 end
+local used = tonumber(redis.call('HGET', KEYS[1], 'used') or '0') + tonumber(ARGV[1])
+if used < 0 then used = 0 end
+redis.call('HSET', KEYS[1], 'used', used)
+return used
+"""
+
+_RESET_SCRIPT = """
+if (redis.call('HGET', KEYS[1], 'last_reset') or '') ~= ARGV[1] then return 0 end
+redis.call('HSET', KEYS[1], 'used', 0, 'last_reset', ARGV[2])
+return 1
+"""
+
+_STORAGE_SCRIPT = """
+local bytes = tonumber(redis.call('HGET', KEYS[1], 'bytes') or '0')
+local files = tonumber(redis.call('HGET', KEYS[1], 'files') or '0')
+local db, df = tonumber(ARGV[1]), tonumber(ARGV[2])
+local bl, fl = tonumber(ARGV[3]), tonumber(ARGV[4])
+if (bl and db > 0 and bytes + db > bl) or (fl and df > 0 and files + df > fl) then
+    return {0, bytes, files}
+end
+bytes = math.max(0, bytes + db)
+files = math.max(0, files + df)
+redis.call('HSET', KEYS[1], 'bytes', bytes, 'files', files)
+redis.call('SADD', KEYS[2], ARGV[5])
+return {1, bytes, files}
+"""
+
+
+class RedisUsageStore:
+    """基于 Redis 的用量存储（Lua 脚本保证原子性），适合多实例部署"""
+
+    def __init__(self, url: str, prefix: str = "tenant_usage:"):
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._consume = self.client.register_script(_CONSUME_SCRIPT)
+        self._adjust = self.client.register_script(_ADJUST_SCRIPT)
+        self._reset = self.client.register_script(_RESET_SCRIPT)
+        self._storage = self.client.register_script(_STORAGE_SCRIPT)
+
+    def _quota_key(self, tenant_id: str, quota_type: str) -> str:
+        return f"{self.prefix}quota:{tenant_id}:{quota_type}"
+
+    def _storage_key(self, tenant_id: str) -> str:
+        return f"{self.prefix}storage:{tenant_id}"
+
+    # ============ 配额 ============
+
+    def load_quotas(self) -> List[Dict[str, Any]]:
+        quotas = []
+        for member in self.client.smembers(f"{self.prefix}quotas"):
+            tenant_id, _, quota_type = member.rpartition(":")
+            quota = self.get_quota(tenant_id, quota_type)
+            if quota:
+                quotas.append(quota)
+        return quotas
+
+    def get_quota(self, tenant_id: str, quota_type: str) -> Optional[Dict[str, Any]]:
+        data = self.client.hgetall(self._quota_key(tenant_id, quota_type))
+        if not data:
+            return None
+        return {
+            "tenant_id": tenant_id,
+            "quota_type": quota_type,
+            "limit": int(data.get("limit", 0)),
+            "used": int(data.get("used", 0)),
+            "reset_period": data.get("reset_period", "monthly"),
+            "last_reset": data.get("last_reset") or None,
+            "metadata": json.loads(data.get("metadata") or "{}"),
+        }
+
+    def save_quota(
+        self,
+        tenant_id: str,
+        quota_type: str,
+        limit: int,
+        reset_period: str,
+        last_reset: Optional[str],
+        metadata: Dict[str, Any],
+    ) -> int:
+        key = self._quota_key(tenant_id, quota_type)
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={
+            "limit": limit,
+            "reset_period": reset_period,
+            "metadata": json.dumps(metadata, ensure_ascii=False),
+        })
+        pipe.hsetnx(key, "used", 0)
+        pipe.hsetnx(key, "last_reset", last_reset or "")
+        pipe.sadd(f"{self.prefix}quotas", f"{tenant_id}:{quota_type}")
+        pipe.hget(key, "used")
+        return int(pipe.execute()[-1] or 0)
+
+    def get_used(self, tenant_id: str, quota_type: str) -> Optional[int]:
+        used = self.client.hget(self._quota_key(tenant_id, quota_type), "used")
+        return int(used) if used is not None else None
+
+    def try_consume(self, tenant_id: str, quota_type: str, amount: int) -> Tuple[bool, Optional[int]]:
+        ok, used = self._consume(keys=[self._quota_key(tenant_id, quota_type)], args=[amount])
+        return bool(ok), (None if used == -1 else int(used))
+
+    def adjust_used(self, tenant_id: str, quota_type: str, delta: int) -> Optional[int]:
+        used = self._adjust(keys=[self._quota_key(tenant_id, quota_type)], args=[delta])
+        return None if used == -1 else int(used)
+
+    def reset_used(self, tenant_id: str, quota_type: str, expected_last_reset: Optional[str], last_reset: str) -> bool:
+        return bool(self._reset(
+            keys=[self._quota_key(tenant_id, quota_type)], args=[expected_last_reset or "", last_reset]
+        ))
+
+    # ============ 存储用量 ============
+
+    def get_storage(self, tenant_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.hgetall(self._storage_key(tenant_id))
+        if not data:
+            return None
+        reconciled_at = data.get("reconciled_at")
+        return {
+            "bytes": int(data.get("bytes", 0)),
+            "files": int(data.get("files", 0)),
+            "reconciled_at": float(reconciled_at) if reconciled_at else None,
+        }
+
+    def add_storage(
+        self,
+        tenant_id: str,
+        bytes_delta: int,
+        files_delta: int = 0,
+        byte_limit: Optional[int] = None,
+        file_limit: Optional[int] = None,
+    ) -> Tuple[bool, int, int]:
+        ok, total_bytes, files = self._storage(
+            keys=[self._storage_key(tenant_id), f"{self.prefix}storage_tenants"],
+            args=[
+                bytes_delta, files_delta,
+                byte_limit if byte_limit is not None else "", file_limit if file_limit is not None else "",
+                tenant_id,
+            ],
+        )
+        return bool(ok), int(total_bytes), int(files)
+
+    def set_storage(self, tenant_id: str, total_bytes: int, files: int):
+        pipe = self.client.pipeline()
+        pipe.hset(self._storage_key(tenant_id), mapping={
+            "bytes": total_bytes, "files": files, "reconciled_at": time.time(),
+        })
+        pipe.sadd(f"{self.prefix}storage_tenants", tenant_id)
+        pipe.execute()
+
+    def storage_tenants(self) -> List[str]:
+        return list(self.client.smembers(f"{self.prefix}storage_tenants"))
+
+
+_usage_store = None
+
+
+def get_usage_store():
+    """获取用量存储实例（配置 TENANT_QUOTA_REDIS_URL 时使用 Redis）"""
+    global _usage_store
+    if _usage_store is None:
+        redis_url = os.getenv("TENANT_QUOTA_REDIS_URL")
+        if redis_url and HAS_REDIS:
+            _usage_store = RedisUsageStore(redis_url)
+            logger.info("租户用量存储: Redis")
+        else:
+            if redis_url:
+                logger.warning("未安装 redis，租户用量存储使用 SQLite")
+            _usage_store = SQLiteUsageStore()
+    return _usage_store
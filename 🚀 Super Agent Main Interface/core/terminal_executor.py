@@ -11,12 +11,6 @@ import asyncio
 import os
 import platform
 import shutil
-
-# resource模块仅在Unix系统上可用
-try:
-    import resource
-except ImportError:
-    resource = None
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, List, Optional, TYPE_CHECKING
@@ -26,6 +20,7 @@ import json
 from pathlib import Path
 
 from core.security.command_policy import CommandSecurityPolicy, CommandPolicyResult
+from core.sandbox_pool import SandboxLimits, SandboxPool
 
 if TYPE_CHECKING:
     from .workflow_monitor import WorkflowMonitor
@@ -149,11 +144,21 @@ class TerminalExecutor:
         self.max_output_chars = 10_000
         self.max_output_lines = 400
         self.max_runtime = 30
-        self.max_concurrent_commands = 2
+        self.max_concurrent_commands = int(os.environ.get("TERMINAL_MAX_CONCURRENCY", "4"))
         self.max_memory_mb = 512  # 最大内存512MB
         self.max_cpu_time = 30  # 最大CPU时间30秒
-        
-        self._semaphore = asyncio.Semaphore(self.max_concurrent_commands)
+        self.max_output_bytes = 256 * 1024  # 每个输出流最多保留256KB
+        
+        # 沙箱进程池（常驻工作进程 + rlimit，首次执行命令时启动）
+        self.sandbox_pool = SandboxPool(
+            size=self.max_concurrent_commands,
+            limits=SandboxLimits(
+                memory_mb=self.max_memory_mb,
+                cpu_seconds=self.max_cpu_time,
+                file_size_mb=100
+            ) if self.sandbox_enabled else None,
+            max_output_bytes=self.max_output_bytes
+        )
         self.workflow_monitor: Optional["WorkflowMonitor"] = workflow_monitor
         self.audit_logger: Optional["TerminalAuditLogger"] = audit_logger
         
@@ -369,119 +374,106 @@ class TerminalExecutor:
         )
         
         try:
-            async with self._semaphore:
-                # 执行命令（在沙箱中）
-                # Windows不支持preexec_fn，需要平台检查
-                preexec_fn = None
-                if self.sandbox_enabled and platform.system() in ['Linux', 'Darwin']:
-                    preexec_fn = self._set_resource_limits
-                
-                process = await asyncio.create_subprocess_shell(
-                    command,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
+            exec_timeout = min(timeout, self.max_runtime)
+            sandbox_result = await self.sandbox_pool.run_command(
+                command,
+                cwd=work_dir,
+                env=exec_env,
+                timeout=exec_timeout
+            )
+            if sandbox_result.error:
+                raise RuntimeError(sandbox_result.error)
+            
+            if sandbox_result.timed_out:
+                record.success = False
+                record.error = f"命令执行超时（{exec_timeout}秒）"
+                record.duration = (datetime.now() - datetime.fromisoformat(record.timestamp)).total_seconds()
+                await self._record_terminal_event(
+                    command_id=command_id,
+                    command=command,
+                    phase="timeout",
+                    success=False,
+                    severity="medium",
                     cwd=work_dir,
-                    env=exec_env,
-                    preexec_fn=preexec_fn
+                    metadata={"timeout": exec_timeout},
+                    error=record.error
                 )
-                
-                # 等待执行完成（带超时）
-                exec_timeout = min(timeout, self.max_runtime)
-                try:
-                    stdout, stderr = await asyncio.wait_for(
-                        process.communicate(),
-                        timeout=exec_timeout
-                    )
-                except asyncio.TimeoutError:
-                    process.kill()
-                    await process.wait()
-                    record.success = False
-                    record.error = f"命令执行超时（{exec_timeout}秒）"
-                    record.duration = (datetime.now() - datetime.fromisoformat(record.timestamp)).total_seconds()
-                    await self._record_terminal_event(
-                        command_id=command_id,
-                        command=command,
-                        phase="timeout",
-                        success=False,
-                        severity="medium",
-                        cwd=work_dir,
-                        metadata={"timeout": exec_timeout},
-                        error=record.error
-                    )
-                    return {
-                        "success": False,
-                        "error": record.error,
-                        "command": command,
-                        "timestamp": record.timestamp,
-                        "command_id": command_id
-                    }
-                
-                # 解码输出
-                stdout_text = self._safe_decode(stdout)
-                stderr_text = self._safe_decode(stderr)
-                
-                # 截断输出
-                stdout_text, stdout_truncated = self._truncate_output(stdout_text)
-                stderr_text, stderr_truncated = self._truncate_output(stderr_text)
-                
-                record.duration = (datetime.now() - datetime.fromisoformat(record.timestamp)).total_seconds()
-                record.return_code = process.returncode
-                record.success = process.returncode == 0
-                if not record.success:
-                    record.error = stderr_text or "命令执行失败"
-                
-                result = {
-                    "success": process.returncode == 0,
+                return {
+                    "success": False,
+                    "error": record.error,
                     "command": command,
-                    "command_id": command_id,
-                    "stdout": stdout_text,
-                    "stderr": stderr_text,
-                    "stdout_truncated": stdout_truncated,
-                    "stderr_truncated": stderr_truncated,
-                    "return_code": process.returncode,
-                    "timestamp": datetime.now().isoformat(),
-                    "work_directory": work_dir,
-                    "duration": record.duration,
-                    "sandbox": self.sandbox_enabled
+                    "timestamp": record.timestamp,
+                    "command_id": command_id
                 }
-                
-                # 记录审计日志（命令完成/失败）
-                if self.audit_logger:
-                    event_type = _COMMAND_COMPLETED if record.success else _COMMAND_FAILED
-                    severity = _SEVERITY_INFO if record.success else _SEVERITY_MEDIUM
-                    await self.audit_logger.log_event(
-                        event_type=event_type,
-                        severity=severity,
-                        command_id=command_id,
-                        command=command,
-                        cwd=work_dir,
-                        return_code=process.returncode,
-                        duration=record.duration,
-                        success=record.success,
-                        error=None if record.success else record.error,
-                        metadata={
-                            "stdout_truncated": stdout_truncated,
-                            "stderr_truncated": stderr_truncated
-                        }
-                    )
-                
-                await self._record_terminal_event(
+            
+            # 解码输出
+            stdout_text = self._safe_decode(sandbox_result.stdout)
+            stderr_text = self._safe_decode(sandbox_result.stderr)
+            
+            # 截断输出
+            stdout_text, stdout_truncated = self._truncate_output(stdout_text)
+            stderr_text, stderr_truncated = self._truncate_output(stderr_text)
+            stdout_truncated = stdout_truncated or sandbox_result.stdout_truncated
+            stderr_truncated = stderr_truncated or sandbox_result.stderr_truncated
+            
+            record.duration = (datetime.now() - datetime.fromisoformat(record.timestamp)).total_seconds()
+            record.return_code = sandbox_result.returncode
+            record.success = sandbox_result.returncode == 0
+            if not record.success:
+                record.error = stderr_text or "命令执行失败"
+            
+            result = {
+                "success": sandbox_result.returncode == 0,
+                "command": command,
+                "command_id": command_id,
+                "stdout": stdout_text,
+                "stderr": stderr_text,
+                "stdout_truncated": stdout_truncated,
+                "stderr_truncated": stderr_truncated,
+                "return_code": sandbox_result.returncode,
+                "timestamp": datetime.now().isoformat(),
+                "work_directory": work_dir,
+                "duration": record.duration,
+                "sandbox": self.sandbox_enabled
+            }
+            
+            # 记录审计日志（命令完成/失败）
+            if self.audit_logger:
+                event_type = _COMMAND_COMPLETED if record.success else _COMMAND_FAILED
+                severity = _SEVERITY_INFO if record.success else _SEVERITY_MEDIUM
+                await self.audit_logger.log_event(
+                    event_type=event_type,
+                    severity=severity,
                     command_id=command_id,
                     command=command,
-                    phase="completed" if record.success else "failed",
-                    success=record.success,
-                    severity="info" if record.success else "medium",
                     cwd=work_dir,
+                    return_code=sandbox_result.returncode,
+                    duration=record.duration,
+                    success=record.success,
+                    error=None if record.success else record.error,
                     metadata={
-                        "return_code": process.returncode,
-                        "duration": record.duration,
                         "stdout_truncated": stdout_truncated,
                         "stderr_truncated": stderr_truncated
-                    },
-                    error=None if record.success else record.error
+                    }
                 )
-                return result
             
+            await self._record_terminal_event(
+                command_id=command_id,
+                command=command,
+                phase="completed" if record.success else "failed",
+                success=record.success,
+                severity="info" if record.success else "medium",
+                cwd=work_dir,
+                metadata={
+                    "return_code": sandbox_result.returncode,
+                    "duration": record.duration,
+                    "stdout_truncated": stdout_truncated,
+                    "stderr_truncated": stderr_truncated
+                },
+                error=None if record.success else record.error
+            )
+            return result
+        
         except Exception as e:
             logger.error(f"命令执行失败: {e}")
             record.success = False
@@ -570,92 +562,106 @@ class TerminalExecutor:
         )
         
         try:
-            async with self._semaphore:
-                process = await asyncio.create_subprocess_shell(
-                    command,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=work_dir
-                )
-                
-                exec_timeout = min(timeout, self.max_runtime)
-                # 流式读取输出
-                lines_read = 0
-                start_time = datetime.now()
-                while True:
-                    try:
-                        line = await asyncio.wait_for(
-                            process.stdout.readline(),
-                            timeout=exec_timeout
-                        )
-                    except asyncio.TimeoutError:
-                        process.kill()
-                        record.success = False
-                        record.error = f"命令执行超时（{exec_timeout}秒）"
-                        yield {
-                            "type": "error",
-                            "data": record.error
-                        }
-                        await self._record_terminal_event(
-                            command_id=command_id,
-                            command=command,
-                            phase="timeout",
-                            success=False,
-                            severity="medium",
-                            cwd=work_dir,
-                            metadata={"timeout": exec_timeout, "mode": "stream"},
-                            error=record.error
-                        )
-                        return
-                    
-                    if not line:
+            exec_timeout = min(timeout, self.max_runtime)
+            lines_read = 0
+            pending = b""
+            sandbox_result = None
+            events = self.sandbox_pool.stream_command(
+                command,
+                cwd=work_dir,
+                env=self._sanitize_environment(),
+                timeout=exec_timeout
+            )
+            try:
+                # 流式读取输出（按行切分）
+                async for kind, payload in events:
+                    if kind == "result":
+                        sandbox_result = payload
                         break
+                    if kind != "stdout":
+                        continue
                     
-                    decoded_line = self._safe_decode(line)
-                    lines_read += 1
-                    truncated_line, truncated = self._truncate_output(decoded_line, single_line=True)
-                    yield {
-                        "type": "stdout",
-                        "data": truncated_line,
-                        "truncated": truncated
-                    }
+                    pending += payload
+                    *lines, pending = pending.split(b"\n")
+                    for line in lines:
+                        decoded_line = self._safe_decode(line + b"\n")
+                        lines_read += 1
+                        truncated_line, truncated = self._truncate_output(decoded_line, single_line=True)
+                        yield {
+                            "type": "stdout",
+                            "data": truncated_line,
+                            "truncated": truncated
+                        }
+                        if lines_read >= self.max_output_lines:
+                            break
                     
                     if lines_read >= self.max_output_lines:
                         yield {
                             "type": "warning",
                             "data": f"输出超过{self.max_output_lines}行，剩余内容已截断"
                         }
-                        process.kill()
                         break
-                
-                # 等待进程结束
-                await process.wait()
-                record.duration = (datetime.now() - start_time).total_seconds()
-                record.return_code = process.returncode
-                record.success = process.returncode == 0
-                
+            finally:
+                # 提前结束时关闭迭代器会终止命令
+                await events.aclose()
+            
+            if sandbox_result is not None and pending and lines_read < self.max_output_lines:
+                truncated_line, truncated = self._truncate_output(self._safe_decode(pending), single_line=True)
+                yield {
+                    "type": "stdout",
+                    "data": truncated_line,
+                    "truncated": truncated
+                }
+            
+            if sandbox_result is not None and sandbox_result.error:
+                raise RuntimeError(sandbox_result.error)
+            
+            if sandbox_result is not None and sandbox_result.timed_out:
+                record.success = False
+                record.error = f"命令执行超时（{exec_timeout}秒）"
                 yield {
-                    "type": "done",
-                    "return_code": process.returncode,
-                    "command_id": command_id,
-                    "duration": record.duration
+                    "type": "error",
+                    "data": record.error
                 }
                 await self._record_terminal_event(
                     command_id=command_id,
                     command=command,
-                    phase="completed" if record.success else "failed",
-                    success=record.success,
-                    severity="info" if record.success else "medium",
+                    phase="timeout",
+                    success=False,
+                    severity="medium",
                     cwd=work_dir,
-                    metadata={
-                        "return_code": process.returncode,
-                        "duration": record.duration,
-                        "lines_read": lines_read,
-                        "mode": "stream"
-                    },
-                    error=None if record.success else record.error
+                    metadata={"timeout": exec_timeout, "mode": "stream"},
+                    error=record.error
                 )
+                return
+            
+            return_code = sandbox_result.returncode if sandbox_result is not None else -9
+            record.duration = (datetime.now() - datetime.fromisoformat(record.timestamp)).total_seconds()
+            record.return_code = return_code
+            record.success = return_code == 0
             
+            yield {
+                "type": "done",
+                "return_code": return_code,
+                "command_id": command_id,
+                "duration": record.duration
+            }
+            await self._record_terminal_event(
+                command_id=command_id,
+                command=command,
+                phase="completed" if record.success else "failed",
+                success=record.success,
+                severity="info" if record.success else "medium",
+                cwd=work_dir,
+                metadata={
+                    "return_code": return_code,
+                    "duration": record.duration,
+                    "lines_read": lines_read,
+                    "mode": "stream"
+                },
+                error=None if record.success else record.error
+            )
+        
         except Exception as e:
             record.success = False
             record.error = str(e)
@@ -766,7 +772,8 @@ class TerminalExecutor:
             "processor": platform.processor(),
             "python_version": platform.python_version(),
             "current_directory": self.current_directory,
-            "home_directory": os.path.expanduser("~")
+            "home_directory": os.path.expanduser("~"),
+            "sandbox_pool": self.sandbox_pool.get_stats()
         }
     
     def change_directory(self, path: str) -> Dict[str, Any]:
@@ -893,25 +900,6 @@ class TerminalExecutor:
         """设置审计日志系统"""
         self.audit_logger = audit_logger
     
-    def _set_resource_limits(self):
-        """设置资源限制（仅Linux/macOS）"""
-        if resource is None:
-            return
-        
-        if platform.system() in ['Linux', 'Darwin']:
-            try:
-                # 限制内存使用（MB转字节）
-                max_memory_bytes = self.max_memory_mb * 1024 * 1024
-                resource.setrlimit(resource.RLIMIT_AS, (max_memory_bytes, max_memory_bytes))
-                
-                # 限制CPU时间（秒）
-                resource.setrlimit(resource.RLIMIT_CPU, (self.max_cpu_time, self.max_cpu_time))
-                
-                # 限制文件大小
-                resource.setrlimit(resource.RLIMIT_FSIZE, (100 * 1024 * 1024, 100 * 1024 * 1024))  # 100MB
-            except Exception as e:
-                logger.warning(f"设置资源限制失败: {e}")
-    
     def get_whitelist(self) -> Dict[str, Any]:
         """获取当前白名单配置"""
         return {
@@ -6,15 +6,21 @@ P0-001: 实现统一的事件发布/订阅系统，支持异步、持久化、
 """
 
 import asyncio
+import atexit
 import json
 import logging
+import time
+from collections import defaultdict, deque
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Callable, Awaitable
+from typing import Any, Deque, Dict, List, Optional, Callable, Awaitable
 from uuid import uuid4
 import threading
+import weakref
+
+from .algorithms.quantile_sketch import WindowedQuantileSketch
 
 logger = logging.getLogger(__name__)
 
@@ -103,17 +109,191 @@ class EventFilter:
         return True
 
 
+class OverflowPolicy(str, Enum):
+    """订阅者队列溢出策略"""
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+
+# 进程退出时统一刷盘：只注册一个钩子，写入器以弱引用登记，不阻止回收
+_live_writers: "weakref.WeakSet[_BatchedEventWriter]" = weakref.WeakSet()
+
+
+def _flush_live_writers():
+    for writer in list(_live_writers):
+        writer.flush_sync()
+
+
+atexit.register(_flush_live_writers)
+
+
+class _BatchedEventWriter:
+    """
+    批量持久化写入器
+
+    事件先进入内存缓冲，由后台任务按批量大小或时间间隔刷盘，
+    文件写入在线程池中执行，避免阻塞事件循环；超过大小上限时滚动文件。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_file_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.backup_count = backup_count
+        self._buffer: List[str] = []
+        self._buffer_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"batches": 0, "written": 0, "rotations": 0, "errors": 0}
+        _live_writers.add(self)
+
+    def enqueue(self, line: str):
+        with self._buffer_lock:
+            self._buffer.append(line)
+            pending = len(self._buffer)
+        self._ensure_task()
+        if pending >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_task(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        wakeup = self._wakeup
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            await self.flush()
+
+    def _drain(self) -> List[str]:
+        with self._buffer_lock:
+            lines, self._buffer = self._buffer, []
+        return lines
+
+    async def flush(self):
+        lines = self._drain()
+        if lines:
+            await asyncio.to_thread(self._write, lines)
+
+    def flush_sync(self):
+        lines = self._drain()
+        if lines:
+            self._write(lines)
+
+    def _write(self, lines: List[str]):
+        try:
+            with self._file_lock:
+                self._rotate_if_needed()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            self.stats["batches"] += 1
+            self.stats["written"] += len(lines)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"事件持久化失败: {e}")
+
+    def _rotate_if_needed(self):
+        try:
+            if self.path.stat().st_size < self.max_file_bytes:
+                return
+        except FileNotFoundError:
+            return
+        for idx in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{idx}")
+            if src.exists():
+                src.replace(self.path.with_name(f"{self.path.name}.{idx + 1}"))
+        self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        self.stats["rotations"] += 1
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+
+class _QueuedSubscriber:
+    """带有界队列的订阅者，由独立任务消费，慢订阅者不拖慢发布方"""
+
+    def __init__(self, bus: "UnifiedEventBus", info: Dict[str, Any], queue_size: int, overflow: OverflowPolicy):
+        self.bus = bus
+        self.info = info
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dropped = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop = loop
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
+            self.task = loop.create_task(self._run())
+
+    async def put(self, event: UnifiedEvent, published_at: float):
+        self._ensure_worker()
+        item = (event, published_at)
+        if self.overflow == OverflowPolicy.BLOCK:
+            await self.queue.put(item)
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self.bus._stats["total_dropped"] += 1
+            if self.overflow == OverflowPolicy.DROP_OLDEST:
+                try:
+                    self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+                self.queue.put_nowait(item)
+
+    async def _run(self):
+        queue = self.queue
+        while True:
+            event, published_at = await queue.get()
+            await self.bus._deliver(self.info, event, published_at)
+
+    def cancel(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
 class UnifiedEventBus:
     """
     统一事件总线
     
     特性：
-    - 异步发布/订阅
-    - 事件持久化
+    - 异步发布/订阅（并发扇出，可选每订阅者有界队列 + 溢出策略）
+    - 事件持久化（后台批量写入 + 文件滚动）
     - 事件过滤和路由
-    - 事件关联追踪
+    - 事件关联追踪（环形缓冲 + event_id / correlation_id 哈希索引）
     - 线程安全
-    - 事件统计和查询
+    - 事件统计和查询（含发布到送达时延）
     """
     
     def __init__(
@@ -121,13 +301,23 @@ class UnifiedEventBus:
         max_events: int = 10000,
         persist_events: bool = True,
         persist_path: Optional[Path] = None,
+        persist_batch_size: int = 200,
+        persist_flush_interval: float = 0.5,
+        max_file_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+        subscriber_queue_size: Optional[int] = None,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
     ):
         self.max_events = max_events
         self.persist_events = persist_events
+        self.subscriber_queue_size = subscriber_queue_size
+        self.overflow_policy = overflow_policy
         
-        # 事件存储
-        self._events: List[UnifiedEvent] = []
-        self._lock = asyncio.Lock()
+        # 事件存储（环形缓冲 + 索引）
+        self._events: Deque[UnifiedEvent] = deque()
+        self._by_id: Dict[str, UnifiedEvent] = {}
+        self._by_correlation: Dict[str, List[str]] = defaultdict(list)
+        self._by_parent: Dict[str, List[str]] = defaultdict(list)
         self._thread_lock = threading.Lock()
         
         # 订阅者（支持过滤）
@@ -139,11 +329,21 @@ class UnifiedEventBus:
             persist_path = project_root / "artifacts" / "evidence" / "unified_events.jsonl"
         self.persist_path = Path(persist_path)
         self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = _BatchedEventWriter(
+            self.persist_path,
+            batch_size=persist_batch_size,
+            flush_interval=persist_flush_interval,
+            max_file_bytes=max_file_bytes,
+            backup_count=backup_count,
+        )
         
         # 统计
+        # 送达时延：最近 5 分钟滑动窗口草图，查询时不排序原始样本
+        self._delivery_latency = WindowedQuantileSketch(window_seconds=300.0, num_slots=10)
         self._stats = {
             "total_published": 0,
             "total_delivered": 0,
+            "total_dropped": 0,
             "by_category": {},
             "by_severity": {},
             "by_source": {},
@@ -176,6 +376,7 @@ class UnifiedEventBus:
         Returns:
             发布的事件
         """
+        published_at = time.perf_counter()
         event = UnifiedEvent(
             event_id=f"ue_{uuid4()}",
             category=category,
@@ -188,10 +389,8 @@ class UnifiedEventBus:
             metadata=metadata or {},
         )
         
-        async with self._lock:
-            self._events.append(event)
-            if len(self._events) > self.max_events:
-                self._events = self._events[-self.max_events:]
+        with self._thread_lock:
+            self._append(event)
             
             # 更新统计
             self._stats["total_published"] += 1
@@ -199,49 +398,84 @@ class UnifiedEventBus:
             self._stats["by_severity"][severity.value] = self._stats["by_severity"].get(severity.value, 0) + 1
             self._stats["by_source"][source] = self._stats["by_source"].get(source, 0) + 1
         
-        # 持久化
+        # 持久化（后台批量写入）
         if self.persist_events:
-            await self._persist_event(event)
+            self._writer.enqueue(event.to_json())
         
         # 通知订阅者
-        await self._notify_subscribers(event)
+        await self._notify_subscribers(event, published_at)
         
         logger.debug(f"事件已发布: {event.event_id} ({category.value}/{event_type})")
         
         return event
     
-    async def _persist_event(self, event: UnifiedEvent):
-        """持久化事件到文件"""
-        try:
-            with self._thread_lock:
-                with open(self.persist_path, "a", encoding="utf-8") as f:
-                    f.write(event.to_json() + "\n")
-        except Exception as e:
-            logger.error(f"事件持久化失败: {e}")
+    def _append(self, event: UnifiedEvent):
+        """写入环形缓冲并维护索引（调用方持有锁）"""
+        if len(self._events) >= self.max_events:
+            self._evict(self._events.popleft())
+        self._events.append(event)
+        self._by_id[event.event_id] = event
+        if event.correlation_id:
+            self._by_correlation[event.correlation_id].append(event.event_id)
+        if event.parent_event_id:
+            self._by_parent[event.parent_event_id].append(event.event_id)
     
-    async def _notify_subscribers(self, event: UnifiedEvent):
-        """通知订阅者"""
-        for subscriber_info in self._subscribers:
-            callback = subscriber_info["callback"]
+    def _evict(self, event: UnifiedEvent):
+        self._by_id.pop(event.event_id, None)
+        for index, key in (
+            (self._by_correlation, event.correlation_id),
+            (self._by_parent, event.parent_event_id),
+        ):
+            if not key:
+                continue
+            ids = index.get(key)
+            if ids:
+                # 环形缓冲按时间淘汰，被淘汰的总是最早写入的那个
+                if ids[0] == event.event_id:
+                    ids.pop(0)
+                else:
+                    ids.remove(event.event_id)
+                if not ids:
+                    del index[key]
+    
+    async def _notify_subscribers(self, event: UnifiedEvent, published_at: float):
+        """通知订阅者（队列订阅者异步投递，其余并发执行）"""
+        inline = []
+        for subscriber_info in list(self._subscribers):
             event_filter = subscriber_info.get("filter")
             
             # 应用过滤器
             if event_filter and not event_filter.matches(event):
                 continue
             
-            try:
-                result = callback(event)
-                if asyncio.iscoroutine(result):
-                    await result
-                self._stats["total_delivered"] += 1
-            except Exception as e:
-                logger.error(f"订阅者处理事件失败: {e}", exc_info=True)
+            queued: Optional[_QueuedSubscriber] = subscriber_info.get("queue")
+            if queued is not None:
+                await queued.put(event, published_at)
+            else:
+                inline.append(self._deliver(subscriber_info, event, published_at))
+        
+        if len(inline) == 1:
+            await inline[0]
+        elif inline:
+            await asyncio.gather(*inline)
+    
+    async def _deliver(self, subscriber_info: Dict[str, Any], event: UnifiedEvent, published_at: float):
+        try:
+            result = subscriber_info["callback"](event)
+            if asyncio.iscoroutine(result):
+                await result
+            self._stats["total_delivered"] += 1
+            self._delivery_latency.add(time.perf_counter() - published_at)
+        except Exception as e:
+            logger.error(f"订阅者处理事件失败: {e}", exc_info=True)
     
     def subscribe(
         self,
         callback: Callable[[UnifiedEvent], Awaitable[None] | None],
         event_filter: Optional[EventFilter] = None,
         subscriber_id: Optional[str] = None,
+        queue_size: Optional[int] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
     ) -> str:
         """
         订阅事件
@@ -250,6 +484,8 @@ class UnifiedEventBus:
             callback: 回调函数
             event_filter: 事件过滤器（可选）
             subscriber_id: 订阅者ID（可选）
+            queue_size: 有界队列长度（可选，设置后异步投递，不阻塞发布方）
+            overflow_policy: 队列满时的处理策略
             
         Returns:
             订阅者ID
@@ -257,11 +493,17 @@ class UnifiedEventBus:
         if subscriber_id is None:
             subscriber_id = f"sub_{uuid4()}"
         
-        self._subscribers.append({
+        info: Dict[str, Any] = {
             "subscriber_id": subscriber_id,
             "callback": callback,
             "filter": event_filter,
-        })
+        }
+        queue_size = queue_size or self.subscriber_queue_size
+        if queue_size:
+            info["queue"] = _QueuedSubscriber(
+                self, info, queue_size, overflow_policy or self.overflow_policy
+            )
+        self._subscribers.append(info)
         
         logger.debug(f"订阅者已注册: {subscriber_id}")
         
@@ -269,12 +511,15 @@ class UnifiedEventBus:
     
     def unsubscribe(self, subscriber_id: str) -> bool:
         """取消订阅"""
-        original_count = len(self._subscribers)
-        self._subscribers = [
-            s for s in self._subscribers
-            if s["subscriber_id"] != subscriber_id
-        ]
-        removed = len(self._subscribers) < original_count
+        remaining = []
+        for s in self._subscribers:
+            if s["subscriber_id"] == subscriber_id:
+                if s.get("queue") is not None:
+                    s["queue"].cancel()
+            else:
+                remaining.append(s)
+        removed = len(remaining) < len(self._subscribers)
+        self._subscribers = remaining
         if removed:
             logger.debug(f"订阅者已取消: {subscriber_id}")
         return removed
@@ -300,65 +545,82 @@ class UnifiedEventBus:
             correlation_id: 关联ID过滤
             
         Returns:
-            事件列表
+            事件列表（最近的在前）
         """
-        events = self._events
+        with self._thread_lock:
+            if correlation_id:
+                candidates = [self._by_id[eid] for eid in self._by_correlation.get(correlation_id, [])]
+            else:
+                candidates = list(self._events)
         
-        # 应用过滤器
-        if category:
-            events = [e for e in events if e.category == category]
-        if event_type:
-            events = [e for e in events if e.event_type == event_type]
-        if source:
-            events = [e for e in events if e.source == source]
-        if severity:
-            events = [e for e in events if e.severity == severity]
-        if correlation_id:
-            events = [e for e in events if e.correlation_id == correlation_id]
-        
-        # 返回最近的
-        return list(reversed(events[-limit:]))
+        results = []
+        for e in reversed(candidates):
+            if len(results) >= limit:
+                break
+            if category and e.category != category:
+                continue
+            if event_type and e.event_type != event_type:
+                continue
+            if source and e.source != source:
+                continue
+            if severity and e.severity != severity:
+                continue
+            results.append(e)
+        return results
     
     def get_event_by_id(self, event_id: str) -> Optional[UnifiedEvent]:
         """根据ID获取事件"""
-        for event in self._events:
-            if event.event_id == event_id:
-                return event
-        return None
+        return self._by_id.get(event_id)
     
     def get_related_events(self, event_id: str) -> List[UnifiedEvent]:
         """获取相关事件（通过correlation_id或parent_event_id）"""
-        event = self.get_event_by_id(event_id)
-        if not event:
-            return []
-        
-        related = []
-        correlation_id = event.correlation_id or event.event_id
-        
-        for e in self._events:
-            if (e.correlation_id == correlation_id or 
-                e.parent_event_id == event_id or
-                e.event_id == event.parent_event_id):
-                related.append(e)
+        with self._thread_lock:
+            event = self._by_id.get(event_id)
+            if not event:
+                return []
+            
+            correlation_id = event.correlation_id or event.event_id
+            related_ids = set(self._by_correlation.get(correlation_id, []))
+            related_ids.update(self._by_parent.get(event_id, []))
+            if event.parent_event_id and event.parent_event_id in self._by_id:
+                related_ids.add(event.parent_event_id)
+            related = [self._by_id[eid] for eid in related_ids if eid in self._by_id]
         
+        related.sort(key=lambda e: e.timestamp)
         return related
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
+        latency = self._delivery_latency.window().summary(scale=1000)
+        
         return {
             **self._stats,
             "current_events": len(self._events),
             "subscribers": len(self._subscribers),
+            "delivery_latency_ms": {
+                "p50": latency["p50"],
+                "p95": latency["p95"],
+                "p99": latency["p99"],
+            },
+            "persistence": dict(self._writer.stats),
         }
     
+    async def flush(self):
+        """立即将缓冲中的事件刷盘"""
+        await self._writer.flush()
+    
+    async def close(self):
+        """停止后台写入任务与订阅队列，并刷盘"""
+        for s in self._subscribers:
+            if s.get("queue") is not None:
+                s["queue"].cancel()
+        await self._writer.close()
+    
     def clear_events(self, keep_recent: int = 1000):
         """清理旧事件（保留最近的）"""
-        async def _clear():
-            async with self._lock:
-                if len(self._events) > keep_recent:
-                    self._events = self._events[-keep_recent:]
-        
-        asyncio.create_task(_clear())
+        with self._thread_lock:
+            while len(self._events) > keep_recent:
+                self._evict(self._events.popleft())
 
 
 # 全局事件总线实例
@@ -11,6 +11,7 @@ from core.algorithms.exponential_smoothing import (
     HoltWintersParams,
     simple_exponential_smoothing,
 )
+from core.algorithms.quantile_sketch import DDSketch, WindowedQuantileSketch
 
 
 def test_simple_exponential_smoothing_monotonic():
@@ -27,3 +28,21 @@ def test_holt_winters_forecast_reasonable():
     assert len(forecasts) == 6
     assert 0 <= mape < 20
 
+
+def test_ddsketch_quantiles_within_relative_accuracy_and_mergeable():
+    values = [i / 1000 for i in range(1, 10001)]
+    left = DDSketch.from_values(values[::2])
+    right = DDSketch.from_dict(DDSketch.from_values(values[1::2]).to_dict())
+    left.merge(right)
+    assert left.count == len(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(left.quantile(q) - exact) / exact <= 0.011
+
+
+def test_windowed_sketch_drops_expired_slots():
+    sketch = WindowedQuantileSketch(window_seconds=10, num_slots=5)
+    sketch.add(100.0, timestamp=0)
+    sketch.add(1.0, timestamp=20)
+    assert sketch.window(now=20).count == 1
+    assert sketch.total.count == 2
@@ -0,0 +1,185 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import httpx
+
+from api.routers import LAZY_DOMAIN_ROUTERS, load_lazy_domain_routers, register_domain_routers
+from core.lazy_loader import LazyRegistry, lazy_registry
+from core.startup_profiler import parse_importtime, profile_imports
+
+# 导入 api.main 的总预算（秒）；可用 STARTUP_IMPORT_BUDGET_SECONDS 收紧
+MAIN_IMPORT_BUDGET_SECONDS = 5.0
+
+
+def test_lazy_singleton_builds_once_and_warm_up_reports():
+    calls = []
+    registry = LazyRegistry()
+    item = registry.register("demo", lambda: calls.append(1) or object())
+    assert not item.loaded
+
+    async def run():
+        return await asyncio.gather(item.aget(), item.aget(), registry.warm_up(["demo", "missing"]))
+
+    first, second, warmed = asyncio.run(run())
+    assert first is second is item.get()
+    assert calls == [1]
+    assert warmed["demo"]["loaded"] is True
+    assert warmed["missing"]["loaded"] is False
+
+
+def test_parse_importtime_output():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   core.memo_system\n"
+        "import time:      3000 |       3120 | core\n"
+    )
+    modules = parse_importtime(stderr)
+    assert [m.module for m in modules] == ["core.memo_system", "core"]
+    assert modules[0].depth == 1
+    assert modules[1].cumulative_seconds == 0.00312
+
+
+def test_main_import_stays_within_budget_and_skips_super_agent_api():
+    profile = profile_imports("api.main", budget_seconds=MAIN_IMPORT_BUDGET_SECONDS)
+    assert profile.passed, profile.error or profile.violations
+    imported = {m.module for m in profile.modules}
+    assert "api.main" in imported
+    assert "api.super_agent_api" not in imported
+
+
+def test_lazy_domain_loads_on_first_request(tmp_path, monkeypatch):
+    (tmp_path / "lazy_demo_api.py").write_text(
+        "from fastapi import APIRouter\n"
+        "LOADS = []\n"
+        "LOADS.append(1)\n"
+        "router = APIRouter(prefix='/api/demo')\n"
+        "@router.get('/ping')\n"
+        "def ping():\n"
+        "    return {'pong': True}\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(LAZY_DOMAIN_ROUTERS, "demo", ("/api/demo", "lazy_demo_api"))
+    monkeypatch.delitem(sys.modules, "lazy_demo_api", raising=False)
+
+    app = FastAPI()
+    assert register_domain_routers(app, ["demo"]) == ["demo"]
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+    assert "lazy_demo_api" not in sys.modules
+    assert "/api/demo/ping" not in client.get("/openapi.json").json()["paths"]
+
+    assert client.get("/api/demo/ping").json() == {"pong": True}
+    assert client.get("/api/demo/ping").json() == {"pong": True}
+    assert sys.modules["lazy_demo_api"].LOADS == [1]
+    assert client.get("/api/demo/missing").status_code == 404
+    assert "/api/demo/ping" in client.get("/openapi.json").json()["paths"]
+    assert asyncio.run(load_lazy_domain_routers(app, ["demo"])) == {}
+
+
+def test_lazy_domain_load_failure_is_cached(tmp_path, monkeypatch):
+    (tmp_path / "lazy_attempts.py").write_text("ATTEMPTS = []\n", encoding="utf-8")
+    (tmp_path / "lazy_broken_api.py").write_text(
+        "import lazy_attempts\n"
+        "lazy_attempts.ATTEMPTS.append(1)\n"
+        "raise NameError('StoryboardRequest')\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(LAZY_DOMAIN_ROUTERS, "broken", ("/api/broken", "lazy_broken_api"))
+    monkeypatch.delitem(sys.modules, "lazy_attempts", raising=False)
+    app = FastAPI()
+    register_domain_routers(app, ["broken"])
+
+    client = TestClient(app)
+    assert client.get("/api/broken/anything").status_code == 503
+    assert client.get("/api/broken/other").status_code == 503
+    attempts = sys.modules["lazy_attempts"].ATTEMPTS
+    assert attempts == [1]
+
+    status = asyncio.run(load_lazy_domain_routers(app, ["broken"]))["broken"]
+    assert status["loaded"] is False
+    assert "StoryboardRequest" in status["error"] and status["failed_at"]
+    assert attempts == [1]
+    # 显式 retry 才会重新导入
+    asyncio.run(load_lazy_domain_routers(app, ["broken"], retry=True))
+    assert attempts == [1, 1]
+
+
+def test_lazy_domain_imports_off_loop_once_and_runs_startup(tmp_path, monkeypatch):
+    (tmp_path / "lazy_slow_api.py").write_text(
+        "import threading, time\n"
+        "from fastapi import APIRouter\n"
+        "IMPORT_THREADS = [threading.get_ident()]\n"
+        "STARTUP_THREADS = []\n"
+        "time.sleep(0.3)\n"
+        "router = APIRouter(prefix='/api/slow')\n"
+        "@router.get('/ping')\n"
+        "async def ping():\n"
+        "    return {'pong': True}\n"
+        "async def startup():\n"
+        "    STARTUP_THREADS.append(threading.get_ident())\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(LAZY_DOMAIN_ROUTERS, "slow", ("/api/slow", "lazy_slow_api"))
+    monkeypatch.delitem(sys.modules, "lazy_slow_api", raising=False)
+    app = FastAPI()
+    register_domain_routers(app, ["slow"])
+
+    async def run():
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(5):
+                ticks.append(1)
+                await asyncio.sleep(0.02)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            results = await asyncio.gather(
+                *(client.get("/api/slow/ping") for _ in range(3)),
+                heartbeat(),
+            )
+        return results[:3], ticks, threading.get_ident()
+
+    responses, ticks, loop_thread = asyncio.run(run())
+    assert [r.json() for r in responses] == [{"pong": True}] * 3
+    # 导入期间事件循环仍在运行
+    assert len(ticks) == 5
+    module = sys.modules["lazy_slow_api"]
+    assert len(module.IMPORT_THREADS) == 1 and module.IMPORT_THREADS[0] != loop_thread
+    assert module.STARTUP_THREADS == [loop_thread]
+
+
+def test_split_domain_routers_register_without_building_subsystems():
+    app = FastAPI()
+    assert register_domain_routers(app, ["tenants", "lifecycle", "reliability"]) == [
+        "tenants", "lifecycle", "reliability",
+    ]
+    paths = TestClient(app).get("/openapi.json").json()["paths"]
+    for path in (
+        "/api/super-agent/tenants",
+        "/api/super-agent/tenant/quota/usage",
+        "/api/super-agent/task-lifecycle/create",
+        "/api/super-agent/resource/hints",
+        "/api/super-agent/slo/report",
+        "/api/super-agent/chaos/test/api-timeout",
+    ):
+        assert path in paths
+    status = lazy_registry.status()
+    for name in ("tenant_quota", "task_lifecycle", "resource_scheduler", "slo_report", "chaos_runner"):
+        assert status[name]["loaded"] is False
@@ -0,0 +1,120 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memo_system import MemoSystem
+
+
+def test_memos_persist_with_monotonic_ids_and_indexed_filters(tmp_path):
+    db_path = str(tmp_path / "memos.db")
+
+    async def write():
+        memos = MemoSystem(storage_path=db_path)
+        first = await memos.add_memo({"content": "明天下午提交季度报告", "type": "task", "importance": 5,
+                                      "tags": ["任务", "报告"], "dates": ["2025-11-15"]})
+        second = await memos.add_memo({"content": "张三的电话", "type": "contact", "importance": 2})
+        third = await memos.add_memo({"content": "记得给客户发送合同", "type": "task", "importance": 4,
+                                      "tags": ["任务"], "dates": ["2025-11-20"]})
+        assert await memos.delete_memo(third["id"])
+        updated = await memos.update_memo(second["id"], {"importance": 4, "tags": ["联系人"]})
+        assert updated["importance"] == 4
+        memos.close()
+        return first, second, third
+
+    async def read():
+        memos = MemoSystem(storage_path=db_path)
+        fourth = await memos.add_memo({"content": "季度报告需要补充数据", "type": "note"})
+        return memos, fourth, {
+            "tasks": await memos.get_memos(type="task"),
+            "important": await memos.get_memos(importance=4),
+            "tagged": await memos.get_memos(tags=["联系人", "报告"]),
+            "dated": await memos.get_memos(date_from="2025-11-10", date_to="2025-11-16"),
+            "search": await memos.search_memos("季度报告"),
+            "short_search": await memos.search_memos("电话"),
+            "count": await memos.count_memos(),
+        }
+
+    first, second, third = asyncio.run(write())
+    memos, fourth, result = asyncio.run(read())
+
+    assert fourth["id"] == third["id"] + 1
+    assert [m["id"] for m in result["tasks"]] == [first["id"]]
+    assert [m["id"] for m in result["important"]] == [first["id"], second["id"]]
+    assert [m["id"] for m in result["tagged"]] == [first["id"], second["id"]]
+    assert result["tagged"][0]["tags"] == ["任务", "报告"]
+    assert [m["id"] for m in result["dated"]] == [first["id"]]
+    assert {m["id"] for m in result["search"]} == {first["id"], fourth["id"]}
+    assert [m["id"] for m in result["short_search"]] == [second["id"]]
+    assert result["count"] == 3
+    memos.close()
+
+
+def test_pending_memos_are_batched_and_visible_to_reads(tmp_path):
+    async def run():
+        memos = MemoSystem(storage_path=str(tmp_path / "batch.db"), batch_size=1000, flush_interval=60)
+        added = [await memos.add_memo({"content": f"memo {i}", "importance": i % 5 + 1}) for i in range(50)]
+        assert len(memos._pending) == 50
+        assert (await memos.get_memo(added[10]["id"]))["content"] == "memo 10"
+        high = await memos.get_memos(importance=5, limit=3)
+        assert not memos._pending
+        memos.close()
+        return added, high
+
+    added, high = asyncio.run(run())
+    assert [m["id"] for m in added] == list(range(1, 51))
+    assert [m["content"] for m in high] == ["memo 4", "memo 9", "memo 14"]
+
+
+def test_add_memo_validates_and_coerces_fields(tmp_path):
+    async def run():
+        memos = MemoSystem(storage_path=str(tmp_path / "valid.db"), flush_interval=60)
+        for bad in ({"content": "x", "importance": "high"}, {"content": "x", "importance": 9},
+                    {"content": "x", "tags": {"a": 1}}, {"content": "x", "metadata": []}, {}):
+            with pytest.raises(ValueError):
+                await memos.add_memo(bad)
+        assert not memos._pending
+
+        memo = await memos.add_memo({"content": 123, "importance": "4", "tags": "报告", "dates": ["2025-11-15"]})
+        assert memo["id"] == 1
+        assert (memo["content"], memo["importance"], memo["tags"]) == ("123", 4, ["报告"])
+        with pytest.raises(ValueError):
+            await memos.update_memo(memo["id"], {"importance": "urgent"})
+        stored = await memos.get_memos(importance=4)
+        memos.close()
+        return stored
+
+    stored = asyncio.run(run())
+    assert [m["content"] for m in stored] == ["123"]
+
+
+def test_flush_quarantines_rows_that_cannot_be_written(tmp_path, monkeypatch):
+    async def run():
+        memos = MemoSystem(storage_path=str(tmp_path / "quarantine.db"), batch_size=1000, flush_interval=60)
+        for i in range(5):
+            await memos.add_memo({"content": f"memo {i}"})
+        write = memos._write_memo
+
+        def failing_write(conn, memo, replace=False):
+            if memo["content"] == "memo 2":
+                raise TypeError("无法写入")
+            return write(conn, memo, replace)
+
+        monkeypatch.setattr(memos, "_write_memo", failing_write)
+        memos.flush()
+        assert not memos._pending
+        stored = await memos.get_memos()
+        quarantined = memos.get_quarantined()
+        memos.close()
+        return stored, quarantined
+
+    stored, quarantined = asyncio.run(run())
+    assert [m["content"] for m in stored] == ["memo 0", "memo 1", "memo 3", "memo 4"]
+    assert len(quarantined) == 1
+    assert quarantined[0]["memo"]["content"] == "memo 2"
+    assert quarantined[0]["error"].startswith("TypeError")
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.performance_monitor import PerformanceMonitor
+
+
+def test_merge_returns_cluster_view_without_touching_local_sketches():
+    local = PerformanceMonitor()
+    remote = PerformanceMonitor()
+    for _ in range(100):
+        local.record_response_time(0.1)
+        local.record_step_time("rag", 0.05)
+        remote.record_response_time(3.0)
+        remote.record_step_time("rag", 1.0)
+    before = local.get_performance_stats()
+    payload = remote.export_sketches()
+
+    first = local.merge_sketches(payload)
+    second = local.merge_sketches([payload])
+
+    assert first == second
+    assert first["workers"] == 2
+    assert first["response_time"]["count"] == 200
+    assert first["response_time"]["p99"] > 2.9
+    assert first["step_times"]["rag"]["count"] == 200
+    assert local.get_performance_stats() == before
+    assert before["p99_response_time"] < 0.2
+
+
+def test_stats_reset_when_window_is_empty():
+    monitor = PerformanceMonitor(window_seconds=10)
+    monitor.record_response_time(1.0)
+    assert monitor.get_performance_stats()["p95_response_time"] > 0
+
+    for slot in range(monitor.response_sketch.num_slots):
+        monitor.response_sketch._slot_ids[slot] -= monitor.response_sketch.num_slots
+    stats = monitor.get_performance_stats()
+    assert stats["avg_response_time"] == 0.0
+    assert stats["p95_response_time"] == 0.0
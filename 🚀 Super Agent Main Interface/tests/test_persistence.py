@@ -2,6 +2,7 @@ import asyncio
 import importlib
 import json
 import os
+import sqlite3
 import sys
 from pathlib import Path
 
@@ -17,6 +18,7 @@ if str(APP_ROOT) not in sys.path:
 from core.database_persistence import DatabasePersistence  # noqa: E402
 from core.data_service import DataService  # noqa: E402
 from core.persistence_seed import PersistenceSeeder  # noqa: E402
+from core.sqlite_engine import SQLiteEngine  # noqa: E402
 
 
 class DummySyncManager:
@@ -50,6 +52,47 @@ async def test_persistence_seeder_idempotent(tmp_path, monkeypatch):
     assert rows[0]["id"] == "demo_1"
 
 
+def test_query_filters_and_whitelisted_ordering(tmp_path):
+    persistence = DatabasePersistence(db_path=tmp_path / "query.db", enable_sync=True)
+    for idx in range(4):
+        persistence.save("events", {"category": "a" if idx % 2 else "b", "timestamp": idx, "ok": True})
+
+    rows = persistence.query("events", filters={"category": "b", "ok": True}, order_by="timestamp", order_desc=False)
+    assert [r["timestamp"] for r in rows] == [0, 2]
+    assert persistence.count("events", {"category": "a"}) == 2
+    assert persistence.query("events", order_by="timestamp; DROP TABLE persistence_data") == []
+    assert persistence.count("events") == 4
+    assert len(persistence.get_sync_queue()) == 4
+
+
+def test_save_rejects_id_owned_by_another_table(tmp_path):
+    persistence = DatabasePersistence(db_path=tmp_path / "conflict.db", enable_sync=False)
+    persistence.save("orders", {"v": 1}, record_id="shared")
+    with pytest.raises(sqlite3.IntegrityError):
+        persistence.save("invoices", {"v": 2}, record_id="shared")
+    assert persistence.load("orders", "shared")["v"] == 1
+
+
+def test_failed_batch_retries_rows_and_reports_the_bad_one(tmp_path):
+    engine = SQLiteEngine(tmp_path / "batch.db", flush_interval=0.05)
+    engine.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    errors = []
+
+    for i in range(10):
+        name = None if i == 4 else f"item-{i}"
+        engine.submit("INSERT INTO items (id, name) VALUES (?, ?)", (i, name), on_error=errors.append)
+    engine.flush()
+
+    assert [row[0] for row in engine.connection().execute("SELECT id FROM items ORDER BY id")] == [
+        0, 1, 2, 3, 5, 6, 7, 8, 9
+    ]
+    assert len(errors) == 1 and isinstance(errors[0], sqlite3.IntegrityError)
+    failed = engine.take_failed_writes()
+    assert [f["params"] for f in failed] == [(4, None)]
+    assert engine.stats["failed_rows"] == 1
+    engine.close()
+
+
 def _reload_app(monkeypatch, tmp_path):
     pytest.importorskip("sqlalchemy", reason="ERP API 依赖 SQLAlchemy")
     tenants_path = tmp_path / "tenants.json"
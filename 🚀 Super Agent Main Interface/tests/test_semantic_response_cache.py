@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.rag_service_adapter import RAGServiceAdapter
+from core.semantic_response_cache import SemanticResponseCache, normalize_query
+from core.tenant_context import tenant_scope
+
+
+def test_normalize_query_ignores_punctuation_and_width():
+    assert normalize_query("今天天气怎么样？") == normalize_query("  今天天气怎么样 ")
+    assert normalize_query("ＨＥＬＬＯ, World!") == "hello world"
+
+
+def test_semantic_hit_is_scoped_per_tenant_and_user():
+    cache = SemanticResponseCache(threshold=0.8)
+    cache.store("帮我查一下本月的销售额", {"response": "100万"}, 1.2, "tenant-a", "u1")
+
+    hit = cache.lookup("请帮我查一下本月销售额", "tenant-a", "u1")
+    assert hit is not None
+    assert hit["result"]["response"] == "100万"
+    assert cache.lookup("请帮我查一下本月销售额", "tenant-b", "u1") is None
+    assert cache.lookup("请帮我查一下本月销售额", "tenant-a", "u2") is None
+    assert cache.lookup("明天上海会下雨吗", "tenant-a", "u1") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["saved_latency_seconds"] > 0
+
+
+def test_invalidate_on_knowledge_update():
+    cache = SemanticResponseCache()
+    cache.store("什么是RAG", {"response": "检索增强生成"}, 0.8, "tenant-a")
+    cache.store("什么是RAG", {"response": "检索增强生成"}, 0.8, "tenant-b")
+    assert cache.invalidate("tenant-a") == 1
+    assert cache.lookup("什么是RAG", "tenant-a") is None
+    assert cache.lookup("什么是RAG", "tenant-b") is not None
+
+
+def test_knowledge_update_invalidates_every_tenant():
+    # 知识库不按租户划分，任一写入都会改变所有租户的检索结果
+    cache = SemanticResponseCache()
+    adapter = RAGServiceAdapter()
+    adapter.add_knowledge_listener(cache.invalidate)
+    for tenant in ("tenant-a", "tenant-b", "tenant-c"):
+        cache.store("什么是RAG", {"response": "检索增强生成"}, 3.5, tenant)
+
+    with tenant_scope("tenant-b", "B"):
+        adapter.notify_knowledge_updated()
+
+    for tenant in ("tenant-a", "tenant-b", "tenant-c"):
+        assert cache.lookup("什么是RAG", tenant) is None
+
+
+def _agent_result(execution_type, **extra):
+    return {
+        "success": True,
+        "response": "回答",
+        "execution": {"type": execution_type, "message": "完成"},
+        "memo_created": False,
+        "task_plan_created": False,
+        **extra,
+    }
+
+
+def test_only_read_only_results_are_stored():
+    cache = SemanticResponseCache()
+    assert cache.store("什么是向量检索", _agent_result("rag"), 4.0, "t")
+    assert cache.lookup("什么是向量检索？", "t") is not None
+
+    rejected = [
+        _agent_result("task"),
+        _agent_result("erp"),
+        _agent_result("complex"),
+        _agent_result("rag", memo_created=True),
+        _agent_result("rag", task_plan_created=True),
+        {**_agent_result("rag"), "execution": {"type": "rag", "error": "超时"}},
+        {"success": False, "error": "失败"},
+    ]
+    for index, result in enumerate(rejected):
+        assert not cache.store(f"明天下午三点提醒我开会{index}", result, 4.0, "t")
+    assert cache.lookup("明天下午三点提醒我开会0", "t") is None
+    assert cache.get_stats()["skipped"] == len(rejected)
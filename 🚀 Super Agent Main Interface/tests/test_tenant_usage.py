@@ -0,0 +1,75 @@
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.tenant_data_isolation import TenantDataIsolation
+from core.tenant_quota_manager import QuotaType, TenantQuotaManager
+from core.tenant_usage_store import SQLiteUsageStore
+
+
+def test_concurrent_quota_use_never_oversells_and_persists(tmp_path):
+    store = SQLiteUsageStore(str(tmp_path / "usage.db"))
+    manager = TenantQuotaManager(store=store)
+    manager.set_quota("t1", QuotaType.API_CALLS, 50, reset_period="daily")
+
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        outcomes = [manager.use_quota("t1", "api_calls", 1)[0] for _ in range(20)]
+        with lock:
+            results.extend(outcomes)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 50
+    assert manager.get_usage("t1", "api_calls")["used"] == 50
+
+    assert manager.release_quota("t1", "api_calls", 10)
+    manager.set_quota("t1", QuotaType.API_CALLS, 60, reset_period="daily")
+    reloaded = TenantQuotaManager(store=store)
+    quota = reloaded.get_quota_object("t1", "api_calls")
+    assert (quota.limit, quota.used) == (60, 40)
+    assert reloaded.use_quota("t1", "api_calls", 21) == (False, "配额不足: 已使用40 + 需要21 > 限制60")
+
+
+def test_storage_accounting_tracks_writes_deletes_and_reconciles(tmp_path):
+    store = SQLiteUsageStore(str(tmp_path / "usage.db"))
+    isolation = TenantDataIsolation(str(tmp_path / "tenants"), store=store, reconcile_interval=None)
+    manager = TenantQuotaManager(store=store)
+    manager.set_quota("t1", QuotaType.STORAGE, 100)
+    manager.set_quota("t1", QuotaType.FILE_COUNT, 3)
+
+    (isolation.get_tenant_storage_path("t1") / "existing.bin").write_bytes(b"x" * 10)
+    assert isolation.get_tenant_storage_size("t1") == 10
+
+    path, error = isolation.write_tenant_file("t1", "a.bin", b"a" * 40, category="docs", quota_manager=manager)
+    assert error is None and path.read_bytes() == b"a" * 40
+    assert isolation.write_tenant_file("t1", "a.bin", b"a" * 60, category="docs", quota_manager=manager)[1] is None
+    assert isolation.write_tenant_file("t1", "b.bin", b"b" * 31, quota_manager=manager)[0] is None
+    assert isolation.get_tenant_storage_size("t1") == 70
+    assert manager.get_usage("t1", "storage")["used"] == 70
+    assert isolation.check_file_count_quota("t1", 2, manager)[0] is False
+
+    assert isolation.delete_tenant_files("t1", category="docs") == 1
+    assert (isolation.get_tenant_storage_size("t1"), isolation.get_tenant_file_count("t1")) == (10, 1)
+
+    # 绕过记账接口写入的文件由核对修正
+    (isolation.get_tenant_storage_path("t1") / "sideloaded.bin").write_bytes(b"s" * 5)
+    assert isolation.reconcile_all_storage()["t1"]["drift_bytes"] == 5
+    assert isolation.get_tenant_storage_stats("t1")["total_size_bytes"] == 15
+
+    # 存储配额只能通过存储记账变更，直接使用/释放被拒绝且不改变计数
+    assert manager.use_quota("t1", "storage", 50)[0] is False
+    assert manager.use_quota("t1", "file_count", 1)[0] is False
+    assert manager.release_quota("t1", "storage", 15) is False
+    assert manager.get_usage("t1", "storage")["used"] == 15
+    assert isolation.get_tenant_file_count("t1") == 2
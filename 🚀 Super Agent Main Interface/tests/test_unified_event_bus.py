@@ -0,0 +1,110 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.unified_event_bus import (
+    EventCategory,
+    OverflowPolicy,
+    UnifiedEventBus,
+    _live_writers,
+)
+
+
+def _read_events(path: Path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+@pytest.mark.asyncio
+async def test_events_are_persisted_in_batches(tmp_path):
+    path = tmp_path / "events.jsonl"
+    bus = UnifiedEventBus(persist_path=path, persist_batch_size=5, persist_flush_interval=60)
+
+    for i in range(5):
+        await bus.publish(EventCategory.TASK, "created", "test", payload={"i": i})
+    # 达到批量大小即唤醒后台任务刷盘
+    await asyncio.sleep(0.05)
+    assert len(_read_events(path)) == 5
+
+    # 不足一批且未到间隔时留在缓冲
+    for i in range(5, 8):
+        await bus.publish(EventCategory.TASK, "created", "test", payload={"i": i})
+    await asyncio.sleep(0.05)
+    assert len(_read_events(path)) == 5
+
+    await bus.close()
+    assert [e["payload"]["i"] for e in _read_events(path)] == list(range(8))
+    assert bus.get_statistics()["persistence"]["written"] == 8
+
+
+@pytest.mark.asyncio
+async def test_interval_flush_and_single_exit_hook(tmp_path):
+    path = tmp_path / "events.jsonl"
+    buses = [UnifiedEventBus(persist_path=path, persist_flush_interval=0.05) for _ in range(3)]
+    assert all(bus._writer in _live_writers for bus in buses)
+
+    await buses[0].publish(EventCategory.TASK, "created", "test")
+    await asyncio.sleep(0.2)
+    assert len(_read_events(path)) == 1
+    for bus in buses:
+        await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_queued_subscriber_drops_oldest_without_blocking_publisher(tmp_path):
+    bus = UnifiedEventBus(persist_events=False, persist_path=tmp_path / "e.jsonl")
+    release = asyncio.Event()
+    received = []
+
+    async def slow(event):
+        await release.wait()
+        received.append(event.payload["i"])
+
+    bus.subscribe(slow, queue_size=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+    for i in range(6):
+        await asyncio.wait_for(bus.publish(EventCategory.TASK, "t", "test", payload={"i": i}), 0.5)
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.sleep(0.05)
+    # 第一个事件已被消费者取走，其余只保留最新的两个
+    assert received == [0, 4, 5]
+    stats = bus.get_statistics()
+    assert stats["total_dropped"] == 3
+    assert stats["total_delivered"] == 3
+    assert stats["delivery_latency_ms"]["p99"] > 0
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_queued_subscriber_drop_newest(tmp_path):
+    bus = UnifiedEventBus(persist_events=False, persist_path=tmp_path / "e.jsonl")
+    received = []
+    bus.subscribe(lambda e: received.append(e.payload["i"]), queue_size=2, overflow_policy=OverflowPolicy.DROP_NEWEST)
+
+    for i in range(5):
+        await bus.publish(EventCategory.TASK, "t", "test", payload={"i": i})
+    await asyncio.sleep(0.05)
+    assert received == [0, 1]
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_ring_buffer_keeps_indexes_consistent(tmp_path):
+    bus = UnifiedEventBus(max_events=4, persist_events=False, persist_path=tmp_path / "e.jsonl")
+    root = await bus.publish(EventCategory.TASK, "root", "test", correlation_id="c1")
+    child = await bus.publish(EventCategory.TASK, "child", "test", correlation_id="c1", parent_event_id=root.event_id)
+    assert {e.event_id for e in bus.get_related_events(root.event_id)} == {root.event_id, child.event_id}
+
+    for _ in range(4):
+        await bus.publish(EventCategory.TASK, "other", "test", correlation_id="c2")
+    assert bus.get_event_by_id(root.event_id) is None
+    assert bus.get_events(correlation_id="c1") == []
+    assert len(bus.get_events(correlation_id="c2")) == 4
+    assert not bus._by_parent
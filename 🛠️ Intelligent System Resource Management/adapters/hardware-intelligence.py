@@ -22,6 +22,8 @@ from typing import Any, Dict, List
 
 import psutil
 
+from resource_manager.host_metrics_sampler import get_host_sampler
+
 from . import BaseSystemAdapter, HardwareMonitoringError, SystemAdapterFactory
 
 logger = logging.getLogger(__name__)
@@ -77,6 +79,7 @@ class HardwareIntelligence(BaseSystemAdapter):
         self._hardware_metrics_history = {}
         self._component_health = {}
         self._prediction_models = {}
+        self._sampler = get_host_sampler()
 
     async def _setup_adapter(self):
         """设置硬件监控器"""
@@ -92,7 +95,8 @@ class HardwareIntelligence(BaseSystemAdapter):
             # 初始化性能基准
             await self._establish_performance_baselines()
 
-            # 启动监控任务
+            # 启动监控任务（与其他监控器共用同一个采样线程）
+            self._sampler.acquire()
             self._is_monitoring = True
             self._monitoring_task = asyncio.create_task(self._continuous_monitoring())
 
@@ -288,28 +292,24 @@ class HardwareIntelligence(BaseSystemAdapter):
         return metrics
 
     async def _get_cpu_metrics(self) -> Dict[str, Any]:
-        """获取CPU指标"""
+        """获取CPU指标（取自共享采样器快照，不再阻塞采样）"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            cpu_times = psutil.cpu_times()
+            snapshot = self._sampler.latest()
             cpu_freq = psutil.cpu_freq()
-            load_avg = (
-                psutil.getloadavg() if hasattr(psutil, "getloadavg") else (0, 0, 0)
-            )
 
             return {
-                "usage_percent": cpu_percent,
-                "user_time": cpu_times.user,
-                "system_time": cpu_times.system,
-                "idle_time": cpu_times.idle,
-                "core_count": psutil.cpu_count(logical=False),
-                "logical_core_count": psutil.cpu_count(logical=True),
+                "usage_percent": snapshot.cpu_percent,
+                "user_time": snapshot.cpu_times.get("user", 0.0),
+                "system_time": snapshot.cpu_times.get("system", 0.0),
+                "idle_time": snapshot.cpu_times.get("idle", 0.0),
+                "core_count": snapshot.cpu_count_physical,
+                "logical_core_count": snapshot.cpu_count_logical,
                 "frequency_current": cpu_freq.current if cpu_freq else None,
                 "frequency_min": cpu_freq.min if cpu_freq else None,
                 "frequency_max": cpu_freq.max if cpu_freq else None,
-                "load_1min": load_avg[0],
-                "load_5min": load_avg[1],
-                "load_15min": load_avg[2],
+                "load_1min": snapshot.load_avg[0],
+                "load_5min": snapshot.load_avg[1],
+                "load_15min": snapshot.load_avg[2],
             }
         except Exception as e:
             logger.error(f"获取CPU指标失败: {str(e)}")
@@ -318,17 +318,16 @@ class HardwareIntelligence(BaseSystemAdapter):
     async def _get_memory_metrics(self) -> Dict[str, Any]:
         """获取内存指标"""
         try:
-            virtual_memory = psutil.virtual_memory()
-            swap_memory = psutil.swap_memory()
+            snapshot = self._sampler.latest()
 
             return {
-                "total_gb": virtual_memory.total / (1024**3),
-                "available_gb": virtual_memory.available / (1024**3),
-                "used_gb": virtual_memory.used / (1024**3),
-                "usage_percent": virtual_memory.percent,
-                "swap_total_gb": swap_memory.total / (1024**3),
-                "swap_used_gb": swap_memory.used / (1024**3),
-                "swap_usage_percent": swap_memory.percent,
+                "total_gb": snapshot.memory_total / (1024**3),
+                "available_gb": snapshot.memory_available / (1024**3),
+                "used_gb": snapshot.memory_used / (1024**3),
+                "usage_percent": snapshot.memory_percent,
+                "swap_total_gb": snapshot.swap_total / (1024**3),
+                "swap_used_gb": snapshot.swap_used / (1024**3),
+                "swap_usage_percent": snapshot.swap_percent,
             }
         except Exception as e:
             logger.error(f"获取内存指标失败: {str(e)}")
@@ -337,18 +336,18 @@ class HardwareIntelligence(BaseSystemAdapter):
     async def _get_disk_metrics(self) -> Dict[str, Any]:
         """获取磁盘指标"""
         try:
-            disk_usage = psutil.disk_usage("/")
-            disk_io = psutil.disk_io_counters()
+            snapshot = self._sampler.latest()
+            disk_io = snapshot.disk_io
 
             return {
-                "total_gb": disk_usage.total / (1024**3),
-                "used_gb": disk_usage.used / (1024**3),
-                "free_gb": disk_usage.free / (1024**3),
-                "usage_percent": (disk_usage.used / disk_usage.total) * 100,
-                "read_bytes": disk_io.read_bytes if disk_io else 0,
-                "write_bytes": disk_io.write_bytes if disk_io else 0,
-                "read_count": disk_io.read_count if disk_io else 0,
-                "write_count": disk_io.write_count if disk_io else 0,
+                "total_gb": snapshot.disk_total / (1024**3),
+                "used_gb": snapshot.disk_used / (1024**3),
+                "free_gb": snapshot.disk_free / (1024**3),
+                "usage_percent": snapshot.disk_percent,
+                "read_bytes": disk_io.get("read_bytes", 0),
+                "write_bytes": disk_io.get("write_bytes", 0),
+                "read_count": disk_io.get("read_count", 0),
+                "write_count": disk_io.get("write_count", 0),
             }
         except Exception as e:
             logger.error(f"获取磁盘指标失败: {str(e)}")
@@ -357,15 +356,15 @@ class HardwareIntelligence(BaseSystemAdapter):
     async def _get_network_metrics(self) -> Dict[str, Any]:
         """获取网络指标"""
         try:
-            net_io = psutil.net_io_counters()
-            net_connections = len(psutil.net_connections())
+            snapshot = self._sampler.latest()
+            net_io = snapshot.net_io
 
             return {
-                "bytes_sent": net_io.bytes_sent,
-                "bytes_recv": net_io.bytes_recv,
-                "packets_sent": net_io.packets_sent,
-                "packets_recv": net_io.packets_recv,
-                "active_connections": net_connections,
+                "bytes_sent": net_io.get("bytes_sent", 0),
+                "bytes_recv": net_io.get("bytes_recv", 0),
+                "packets_sent": net_io.get("packets_sent", 0),
+                "packets_recv": net_io.get("packets_recv", 0),
+                "active_connections": snapshot.connection_count,
             }
         except Exception as e:
             logger.error(f"获取网络指标失败: {str(e)}")
@@ -643,6 +642,7 @@ class HardwareIntelligence(BaseSystemAdapter):
                 await self._monitoring_task
             except asyncio.CancelledError:
                 pass
+            self._sampler.release()
 
         await super().cleanup()
         logger.info("硬件智能监控器资源清理完成")
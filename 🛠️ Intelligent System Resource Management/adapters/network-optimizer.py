@@ -17,6 +17,8 @@ from typing import Dict, List, Optional, Tuple
 import psutil
 import speedtest
 
+from resource_manager.host_metrics_sampler import get_host_sampler
+
 logger = logging.getLogger(__name__)
 
 
@@ -93,6 +95,7 @@ class NetworkOptimizer:
         # 网络接口缓存
         self.network_interfaces: Dict[str, NetworkInterface] = {}
         self.network_usage: Dict[str, NetworkUsage] = {}
+        self.sampler = get_host_sampler()
 
         # 性能指标
         self.performance_metrics = {
@@ -189,7 +192,8 @@ class NetworkOptimizer:
             # 获取网络接口信息
             addrs = psutil.net_if_addrs()
             stats = psutil.net_if_stats()
-            io_counters = psutil.net_io_counters(pernic=True)
+            # 流量计数取自共享采样器，避免重复读取网卡统计
+            io_counters = self.sampler.latest().net_per_nic
 
             for interface_name, addresses in addrs.items():
                 # 获取接口状态
@@ -220,14 +224,14 @@ class NetworkOptimizer:
                 io_counter = io_counters.get(interface_name)
                 if io_counter:
                     self.network_usage[interface_name] = NetworkUsage(
-                        bytes_sent=io_counter.bytes_sent,
-                        bytes_recv=io_counter.bytes_recv,
-                        packets_sent=io_counter.packets_sent,
-                        packets_recv=io_counter.packets_recv,
-                        errin=io_counter.errin,
-                        errout=io_counter.errout,
-                        dropin=io_counter.dropin,
-                        dropout=io_counter.dropout,
+                        bytes_sent=io_counter.get("bytes_sent", 0),
+                        bytes_recv=io_counter.get("bytes_recv", 0),
+                        packets_sent=io_counter.get("packets_sent", 0),
+                        packets_recv=io_counter.get("packets_recv", 0),
+                        errin=io_counter.get("errin", 0),
+                        errout=io_counter.get("errout", 0),
+                        dropin=io_counter.get("dropin", 0),
+                        dropout=io_counter.get("dropout", 0),
                     )
 
                 # 创建网络接口对象
@@ -671,9 +675,9 @@ class NetworkOptimizer:
 
     async def monitor_bandwidth_usage(self, duration: int = 60) -> Dict:
         """监控带宽使用情况"""
-        start_counters = psutil.net_io_counters(pernic=True)
+        start_counters = self.sampler.latest(max_age=0).net_per_nic
         await asyncio.sleep(duration)
-        end_counters = psutil.net_io_counters(pernic=True)
+        end_counters = self.sampler.latest(max_age=0).net_per_nic
 
         usage = {}
         for interface in self.network_interfaces.keys():
@@ -681,8 +685,8 @@ class NetworkOptimizer:
                 start = start_counters[interface]
                 end = end_counters[interface]
 
-                download_speed = (end.bytes_recv - start.bytes_recv) / duration
-                upload_speed = (end.bytes_sent - start.bytes_sent) / duration
+                download_speed = (end["bytes_recv"] - start["bytes_recv"]) / duration
+                upload_speed = (end["bytes_sent"] - start["bytes_sent"]) / duration
 
                 usage[interface] = {
                     "download_mbps": download_speed * 8 / 1_000_000,  # 转换为Mbps
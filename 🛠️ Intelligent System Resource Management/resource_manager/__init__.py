@@ -3,11 +3,27 @@ Intelligent System Resource Management - Resource Manager Package
 对应需求: 8.1/8.2/8.5 - 资源监控、冲突弹窗、动态调度、健康自适应
 """
 
-from .conflict_resolver import ConflictResolver
-from .dynamic_allocator import DynamicAllocator
-from .intelligent_resource_monitor import IntelligentResourceMonitor
-
-__all__ = ["IntelligentResourceMonitor", "DynamicAllocator", "ConflictResolver"]
+from .host_metrics_sampler import HostMetricsSampler, HostSnapshot, get_host_sampler
+from .metric_timeseries_store import MetricFrame, MetricTimeSeriesStore
+
+try:
+    from .conflict_resolver import ConflictResolver
+    from .dynamic_allocator import DynamicAllocator
+    from .intelligent_resource_monitor import IntelligentResourceMonitor
+except ImportError:
+    # 模块文件以连字符命名时无法按包路径导入，由调用方按文件加载
+    ConflictResolver = DynamicAllocator = IntelligentResourceMonitor = None
+
+__all__ = [
+    "IntelligentResourceMonitor",
+    "DynamicAllocator",
+    "ConflictResolver",
+    "HostMetricsSampler",
+    "HostSnapshot",
+    "get_host_sampler",
+    "MetricFrame",
+    "MetricTimeSeriesStore",
+]
 
 # 版本信息
 __version__ = "1.0.0"
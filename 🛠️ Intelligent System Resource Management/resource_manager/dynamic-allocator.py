@@ -219,20 +219,20 @@ class DynamicAllocator:
         }
 
     async def _discover_system_resources(self):
-        """发现系统资源"""
-        import psutil
+        """发现系统资源（读取共享采样器的最新快照）"""
+        from resource_manager.host_metrics_sampler import get_host_sampler
+
+        snapshot = get_host_sampler().latest()
 
         # CPU资源
-        cpu_cores = psutil.cpu_count(logical=False)
-        cpu_threads = psutil.cpu_count(logical=True)
+        cpu_cores = snapshot.cpu_count_physical
+        cpu_threads = snapshot.cpu_count_logical
 
         # 内存资源
-        memory = psutil.virtual_memory()
-        total_memory_gb = memory.total / (1024**3)
+        total_memory_gb = snapshot.memory_total / (1024**3)
 
         # 磁盘资源
-        disk = psutil.disk_usage("/")
-        total_disk_gb = disk.total / (1024**3)
+        total_disk_gb = snapshot.disk_total / (1024**3)
 
         self.total_resources = {
             "cpu_cores": cpu_cores,
@@ -0,0 +1,565 @@
+"""
+主机指标共享采样器
+对应需求: 8.1/8.5 - 资源监控、健康自适应
+对应开发规则: 性能与资源管理优化
+
+进程内只保留一个采样线程，每个周期生成一份一致的主机快照：
+- Linux 下直接读取 /proc（CPU 使用率由两次 /proc/stat 差值得到，无需 sleep）
+- 其他平台回退到 psutil 的非阻塞调用
+- 连接数、磁盘容量等较贵的指标按 slow_every 降频采集
+- 快照写入环形缓冲区，监控器/分配器/告警通过 latest()/history()/next_snapshot() 读取
+- 可选把标量指标发布到共享内存（seqlock），供同机其他进程零拷贝读取
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+PROC_ROOT = "/proc"
+
+
+@dataclass
+class HostSnapshot:
+    """单次采样的主机快照"""
+
+    seq: int
+    timestamp: float
+    cpu_percent: float
+    per_cpu_percent: List[float]
+    cpu_times: Dict[str, float]
+    cpu_count_logical: int
+    cpu_count_physical: int
+    load_avg: Tuple[float, float, float]
+    memory_total: int
+    memory_available: int
+    memory_used: int
+    memory_percent: float
+    swap_total: int
+    swap_used: int
+    swap_percent: float
+    disk_total: int
+    disk_used: int
+    disk_free: int
+    disk_percent: float
+    disk_io: Dict[str, int]
+    net_io: Dict[str, int]
+    net_per_nic: Dict[str, Dict[str, int]]
+    net_send_rate: float  # bytes/s
+    net_recv_rate: float  # bytes/s
+    connection_count: int
+    sample_cost_ms: float = 0.0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+# ============ /proc 读取 ============
+
+_CPU_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+
+def _read_proc_stat() -> Dict[str, List[int]]:
+    cpus = {}
+    with open(f"{PROC_ROOT}/stat", "r") as f:
+        for line in f:
+            if not line.startswith("cpu"):
+                break
+            parts = line.split()
+            cpus[parts[0]] = [int(v) for v in parts[1:9]]
+    return cpus
+
+
+def _cpu_busy_percent(prev: List[int], cur: List[int]) -> float:
+    total = sum(cur) - sum(prev)
+    if total <= 0:
+        return 0.0
+    idle = (cur[3] + cur[4]) - (prev[3] + prev[4])
+    return max(0.0, min(100.0, (total - idle) / total * 100.0))
+
+
+def _read_meminfo() -> Dict[str, int]:
+    info = {}
+    with open(f"{PROC_ROOT}/meminfo", "r") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            value = rest.split()
+            if value:
+                info[key] = int(value[0]) * 1024
+    return info
+
+
+def _read_loadavg() -> Tuple[float, float, float]:
+    with open(f"{PROC_ROOT}/loadavg", "r") as f:
+        parts = f.read().split()
+    return float(parts[0]), float(parts[1]), float(parts[2])
+
+
+def _read_net_dev() -> Dict[str, Dict[str, int]]:
+    nics = {}
+    with open(f"{PROC_ROOT}/net/dev", "r") as f:
+        for line in f.readlines()[2:]:
+            name, _, data = line.partition(":")
+            values = [int(v) for v in data.split()]
+            nics[name.strip()] = {
+                "bytes_recv": values[0],
+                "packets_recv": values[1],
+                "errin": values[2],
+                "dropin": values[3],
+                "bytes_sent": values[8],
+                "packets_sent": values[9],
+                "errout": values[10],
+                "dropout": values[11],
+            }
+    return nics
+
+
+def _block_devices() -> List[str]:
+    try:
+        return [d for d in os.listdir("/sys/block") if not d.startswith(("loop", "ram", "zram"))]
+    except OSError:
+        return []
+
+
+def _read_diskstats(devices: List[str]) -> Dict[str, int]:
+    wanted = set(devices)
+    totals = {"read_count": 0, "write_count": 0, "read_bytes": 0, "write_bytes": 0}
+    with open(f"{PROC_ROOT}/diskstats", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 10 or parts[2] not in wanted:
+                continue
+            totals["read_count"] += int(parts[3])
+            totals["read_bytes"] += int(parts[5]) * 512
+            totals["write_count"] += int(parts[7])
+            totals["write_bytes"] += int(parts[9]) * 512
+    return totals
+
+
+def _count_connections() -> int:
+    count = 0
+    for name in ("tcp", "tcp6", "udp", "udp6"):
+        try:
+            with open(f"{PROC_ROOT}/net/{name}", "rb") as f:
+                count += max(0, sum(1 for _ in f) - 1)
+        except OSError:
+            continue
+    return count
+
+
+def _sum_nics(nics: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for name, counters in nics.items():
+        if name == "lo":
+            continue
+        for key, value in counters.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+# ============ 共享内存发布 ============
+
+SHARED_FIELDS = (
+    "timestamp",
+    "cpu_percent",
+    "load_1",
+    "load_5",
+    "load_15",
+    "memory_total",
+    "memory_used",
+    "memory_percent",
+    "swap_percent",
+    "disk_total",
+    "disk_used",
+    "disk_percent",
+    "net_send_rate",
+    "net_recv_rate",
+    "connection_count",
+)
+_SHARED_HEADER = struct.Struct("<Q")
+_SHARED_BODY = struct.Struct("<" + "d" * len(SHARED_FIELDS))
+SHARED_SIZE = _SHARED_HEADER.size + _SHARED_BODY.size
+
+
+def _shared_values(snapshot: HostSnapshot) -> Tuple[float, ...]:
+    return (
+        snapshot.timestamp,
+        snapshot.cpu_percent,
+        *snapshot.load_avg,
+        float(snapshot.memory_total),
+        float(snapshot.memory_used),
+        snapshot.memory_percent,
+        snapshot.swap_percent,
+        float(snapshot.disk_total),
+        float(snapshot.disk_used),
+        snapshot.disk_percent,
+        snapshot.net_send_rate,
+        snapshot.net_recv_rate,
+        float(snapshot.connection_count),
+    )
+
+
+class SharedHostMetricsReader:
+    """读取其他进程发布到共享内存的最新快照（seqlock，写入中会重试）"""
+
+    def __init__(self, name: str):
+        from multiprocessing import shared_memory
+
+        self._shm = shared_memory.SharedMemory(name=name)
+
+    def read(self, retries: int = 10) -> Optional[Dict[str, float]]:
+        buf = self._shm.buf
+        for _ in range(retries):
+            (seq_before,) = _SHARED_HEADER.unpack_from(buf, 0)
+            if seq_before == 0 or seq_before % 2:
+                time.sleep(0)
+                continue
+            values = _SHARED_BODY.unpack_from(buf, _SHARED_HEADER.size)
+            (seq_after,) = _SHARED_HEADER.unpack_from(buf, 0)
+            if seq_before == seq_after:
+                return dict(zip(SHARED_FIELDS, values))
+        return None
+
+    def close(self):
+        self._shm.close()
+
+
+# ============ 采样器 ============
+
+
+class HostMetricsSampler:
+    """
+    共享主机指标采样器
+
+    通过 acquire()/release() 引用计数控制采样线程生命周期，
+    所有使用方共享同一份环形缓冲区。
+    """
+
+    def __init__(
+        self,
+        interval: float = 2.0,
+        capacity: int = 1800,
+        slow_every: int = 5,
+        disk_path: str = "/",
+        shared_memory_name: Optional[str] = None,
+    ):
+        self.interval = interval
+        self.slow_every = max(1, slow_every)
+        self.disk_path = disk_path
+        self.shared_memory_name = shared_memory_name or os.getenv("HOST_METRICS_SHM") or None
+        self._buffer: Deque[HostSnapshot] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._refcount = 0
+        self._listeners: List[Callable[[HostSnapshot], None]] = []
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._seq = 0
+        self._use_proc = os.path.exists(f"{PROC_ROOT}/stat")
+        self._block_devices = _block_devices() if self._use_proc else []
+        self._prev_cpu: Optional[Dict[str, List[int]]] = None
+        self._prev_net: Optional[Tuple[float, Dict[str, int]]] = None
+        self._slow_cache: Dict[str, Any] = {}
+        self._cpu_count_logical = psutil.cpu_count(logical=True) or 1
+        self._cpu_count_physical = psutil.cpu_count(logical=False) or self._cpu_count_logical
+        self._shm = None
+        self.stats = {"samples": 0, "errors": 0, "total_cost_ms": 0.0}
+
+    # ------------------------------------------------------------ 生命周期
+    def acquire(self) -> "HostMetricsSampler":
+        """登记一个使用方，首个使用方启动采样线程"""
+        with self._lock:
+            self._refcount += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="host-metrics-sampler", daemon=True)
+                self._thread.start()
+        return self
+
+    def release(self):
+        """注销使用方，最后一个使用方退出时停止采样线程"""
+        with self._lock:
+            self._refcount = max(0, self._refcount - 1)
+            if self._refcount:
+                return
+            thread = self._thread
+            self._thread = None
+        self._stop_event.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.interval + 1)
+        self._close_shared_memory()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_now()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"主机指标采样失败: {e}")
+            self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    # ------------------------------------------------------------ 采样
+    def sample_now(self) -> HostSnapshot:
+        """立即采集一次并写入缓冲区（采样线程与按需调用共用）"""
+        with self._sample_lock:
+            started = time.perf_counter()
+            snapshot = self._collect()
+            snapshot.sample_cost_ms = (time.perf_counter() - started) * 1000
+            self.stats["samples"] += 1
+            self.stats["total_cost_ms"] += snapshot.sample_cost_ms
+        self._publish(snapshot)
+        return snapshot
+
+    def _collect(self) -> HostSnapshot:
+        now = time.time()
+        self._seq += 1
+        slow = self._seq == 1 or self._seq % self.slow_every == 0
+
+        if self._use_proc:
+            cpu = _read_proc_stat()
+            prev = self._prev_cpu or {}
+            self._prev_cpu = cpu
+            if prev:
+                cpu_percent = _cpu_busy_percent(prev["cpu"], cpu["cpu"])
+                per_cpu = [
+                    _cpu_busy_percent(prev[name], values)
+                    for name, values in cpu.items()
+                    if name != "cpu" and name in prev
+                ]
+            else:
+                cpu_percent, per_cpu = 0.0, []
+            hz = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+            cpu_times = {k: v / hz for k, v in zip(_CPU_FIELDS, cpu["cpu"])}
+
+            mem = _read_meminfo()
+            memory_total = mem.get("MemTotal", 0)
+            memory_available = mem.get("MemAvailable", mem.get("MemFree", 0))
+            memory_used = memory_total - memory_available
+            memory_percent = memory_used / memory_total * 100 if memory_total else 0.0
+            swap_total = mem.get("SwapTotal", 0)
+            swap_used = swap_total - mem.get("SwapFree", 0)
+            swap_percent = swap_used / swap_total * 100 if swap_total else 0.0
+
+            load_avg = _read_loadavg()
+            per_nic = _read_net_dev()
+            disk_io = _read_diskstats(self._block_devices)
+        else:
+            cpu_percent = psutil.cpu_percent(interval=None)
+            per_cpu = psutil.cpu_percent(interval=None, percpu=True)
+            cpu_times = psutil.cpu_times()._asdict()
+            vm = psutil.virtual_memory()
+            sm = psutil.swap_memory()
+            memory_total, memory_available, memory_used, memory_percent = vm.total, vm.available, vm.used, vm.percent
+            swap_total, swap_used, swap_percent = sm.total, sm.used, sm.percent
+            load_avg = psutil.getloadavg() if hasattr(psutil, "getloadavg") else (0.0, 0.0, 0.0)
+            per_nic = {name: c._asdict() for name, c in psutil.net_io_counters(pernic=True).items()}
+            io = psutil.disk_io_counters()
+            disk_io = {
+                "read_count": io.read_count,
+                "write_count": io.write_count,
+                "read_bytes": io.read_bytes,
+                "write_bytes": io.write_bytes,
+            } if io else {}
+
+        net_io = _sum_nics(per_nic)
+        send_rate = recv_rate = 0.0
+        if self._prev_net is not None:
+            prev_ts, prev_io = self._prev_net
+            elapsed = now - prev_ts
+            if elapsed > 0:
+                send_rate = max(0.0, (net_io.get("bytes_sent", 0) - prev_io.get("bytes_sent", 0)) / elapsed)
+                recv_rate = max(0.0, (net_io.get("bytes_recv", 0) - prev_io.get("bytes_recv", 0)) / elapsed)
+        self._prev_net = (now, net_io)
+
+        if slow:
+            usage = os.statvfs(self.disk_path) if hasattr(os, "statvfs") else None
+            if usage is not None:
+                total = usage.f_blocks * usage.f_frsize
+                free = usage.f_bavail * usage.f_frsize
+                used = (usage.f_blocks - usage.f_bfree) * usage.f_frsize
+            else:
+                du = psutil.disk_usage(self.disk_path)
+                total, used, free = du.total, du.used, du.free
+            self._slow_cache["disk"] = (total, used, free)
+            if self._use_proc:
+                self._slow_cache["connections"] = _count_connections()
+            else:
+                try:
+                    self._slow_cache["connections"] = len(psutil.net_connections())
+                except (psutil.AccessDenied, OSError):
+                    self._slow_cache.setdefault("connections", 0)
+
+        disk_total, disk_used, disk_free = self._slow_cache.get("disk", (0, 0, 0))
+        disk_percent = disk_used / (disk_used + disk_free) * 100 if (disk_used + disk_free) else 0.0
+
+        return HostSnapshot(
+            seq=self._seq,
+            timestamp=now,
+            cpu_percent=cpu_percent,
+            per_cpu_percent=per_cpu,
+            cpu_times=cpu_times,
+            cpu_count_logical=self._cpu_count_logical,
+            cpu_count_physical=self._cpu_count_physical,
+            load_avg=tuple(load_avg),
+            memory_total=memory_total,
+            memory_available=memory_available,
+            memory_used=memory_used,
+            memory_percent=memory_percent,
+            swap_total=swap_total,
+            swap_used=swap_used,
+            swap_percent=swap_percent,
+            disk_total=disk_total,
+            disk_used=disk_used,
+            disk_free=disk_free,
+            disk_percent=disk_percent,
+            disk_io=disk_io,
+            net_io=net_io,
+            net_per_nic=per_nic,
+            net_send_rate=send_rate,
+            net_recv_rate=recv_rate,
+            connection_count=self._slow_cache.get("connections", 0),
+        )
+
+    def _publish(self, snapshot: HostSnapshot):
+        with self._lock:
+            self._buffer.append(snapshot)
+            listeners = list(self._listeners)
+            waiters, self._waiters = self._waiters, []
+
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future, snapshot)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"主机指标订阅回调失败: {e}")
+        if self.shared_memory_name:
+            self._write_shared_memory(snapshot)
+
+    def _write_shared_memory(self, snapshot: HostSnapshot):
+        if self._shm is None:
+            from multiprocessing import shared_memory
+
+            try:
+                self._shm = shared_memory.SharedMemory(name=self.shared_memory_name, create=True, size=SHARED_SIZE)
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name=self.shared_memory_name)
+            self._shm_seq = 0
+        buf = self._shm.buf
+        self._shm_seq += 1
+        _SHARED_HEADER.pack_into(buf, 0, self._shm_seq * 2 - 1)  # 奇数：写入中
+        _SHARED_BODY.pack_into(buf, _SHARED_HEADER.size, *_shared_values(snapshot))
+        _SHARED_HEADER.pack_into(buf, 0, self._shm_seq * 2)
+
+    def _close_shared_memory(self):
+        if self._shm is not None:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except (FileNotFoundError, OSError):
+                pass
+            self._shm = None
+
+    # ------------------------------------------------------------ 读取
+    def latest(self, max_age: Optional[float] = None) -> HostSnapshot:
+        """
+        最新快照
+
+        缓冲区为空或快照比 max_age（默认两个采样周期）更旧时就地采集一次，
+        未启动采样线程的调用方也能拿到数据。
+        """
+        max_age = self.interval * 2 if max_age is None else max_age
+        with self._lock:
+            snapshot = self._buffer[-1] if self._buffer else None
+        if snapshot is None or time.time() - snapshot.timestamp > max_age:
+            snapshot = self.sample_now()
+        return snapshot
+
+    def history(self, seconds: Optional[float] = None) -> List[HostSnapshot]:
+        """缓冲区中最近 seconds 秒的快照（按时间升序）"""
+        with self._lock:
+            snapshots = list(self._buffer)
+        if seconds is None:
+            return snapshots
+        cutoff = time.time() - seconds
+        return [s for s in snapshots if s.timestamp >= cutoff]
+
+    async def next_snapshot(self, timeout: Optional[float] = None) -> HostSnapshot:
+        """等待下一次采样结果（不占用线程）"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._waiters.append((loop, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+
+    def add_listener(self, callback: Callable[[HostSnapshot], None]):
+        """在采样线程中回调（用于告警等需要逐帧处理的场景）"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[HostSnapshot], None]):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        samples = self.stats["samples"]
+        return {
+            "running": self.running,
+            "consumers": self._refcount,
+            "interval": self.interval,
+            "buffered": len(self._buffer),
+            "samples": samples,
+            "errors": self.stats["errors"],
+            "avg_sample_cost_ms": self.stats["total_cost_ms"] / samples if samples else 0.0,
+            "source": "proc" if self._use_proc else "psutil",
+            "shared_memory": self.shared_memory_name,
+        }
+
+
+def _resolve_future(future: asyncio.Future, snapshot: HostSnapshot):
+    if not future.done():
+        future.set_result(snapshot)
+
+
+_sampler: Optional[HostMetricsSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_host_sampler(**kwargs) -> HostMetricsSampler:
+    """获取进程内共享的主机指标采样器"""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = HostMetricsSampler(**kwargs)
+        return _sampler
+
+
+__all__ = [
+    "HostSnapshot",
+    "HostMetricsSampler",
+    "SharedHostMetricsReader",
+    "SHARED_FIELDS",
+    "get_host_sampler",
+]
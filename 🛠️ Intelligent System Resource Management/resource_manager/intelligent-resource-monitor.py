@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, List
 
-import psutil
+from resource_manager.host_metrics_sampler import HostSnapshot, get_host_sampler
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +67,7 @@ class IntelligentResourceMonitor:
         }
         self.monitoring_interval = 5  # 监控间隔(秒)
         self.is_monitoring = False
+        self.sampler = get_host_sampler()
 
     async def initialize(self, config: Dict = None, core_services: Dict = None):
         """
@@ -89,17 +90,10 @@ class IntelligentResourceMonitor:
             return
 
         self.is_monitoring = True
-        self.monitoring_tasks["cpu_monitor"] = asyncio.create_task(
-            self._monitor_cpu_usage()
-        )
-        self.monitoring_tasks["memory_monitor"] = asyncio.create_task(
-            self._monitor_memory_usage()
-        )
-        self.monitoring_tasks["disk_monitor"] = asyncio.create_task(
-            self._monitor_disk_usage()
-        )
-        self.monitoring_tasks["network_monitor"] = asyncio.create_task(
-            self._monitor_network_usage()
+        # 四类指标共用共享采样器的一份快照，不再各自轮询 psutil
+        self.sampler.acquire()
+        self.monitoring_tasks["sampler_monitor"] = asyncio.create_task(
+            self._monitor_snapshots()
         )
 
         logger.info("资源监控已启动")
@@ -117,6 +111,8 @@ class IntelligentResourceMonitor:
                 except asyncio.CancelledError:
                     pass
 
+        if self.monitoring_tasks:
+            self.sampler.release()
         self.monitoring_tasks.clear()
         logger.info("资源监控已停止")
 
@@ -138,164 +134,73 @@ class IntelligentResourceMonitor:
         }
 
     async def get_current_metrics(self) -> Dict[str, ResourceMetric]:
-        """获取当前资源指标"""
-        tasks = [
-            self._get_cpu_metric(),
-            self._get_memory_metric(),
-            self._get_disk_metric(),
-            self._get_network_metric(),
-        ]
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        metrics = {}
-        resource_types = [
-            ResourceType.CPU,
-            ResourceType.MEMORY,
-            ResourceType.DISK,
-            ResourceType.NETWORK,
-        ]
-
-        for i, resource_type in enumerate(resource_types):
-            if not isinstance(results[i], Exception):
-                metrics[resource_type.value] = results[i]
-
-        return metrics
-
-    async def _monitor_cpu_usage(self):
-        """监控CPU使用率"""
-        while self.is_monitoring:
-            try:
-                cpu_metric = await self._get_cpu_metric()
-                self._record_metric(cpu_metric)
-
-                # 检查预警
-                await self._check_resource_alert(cpu_metric)
-
-            except Exception as e:
-                logger.error(f"CPU监控异常: {e}")
-
-            await asyncio.sleep(self.monitoring_interval)
-
-    async def _monitor_memory_usage(self):
-        """监控内存使用率"""
-        while self.is_monitoring:
-            try:
-                memory_metric = await self._get_memory_metric()
-                self._record_metric(memory_metric)
-
-                # 检查预警
-                await self._check_resource_alert(memory_metric)
-
-            except Exception as e:
-                logger.error(f"内存监控异常: {e}")
-
-            await asyncio.sleep(self.monitoring_interval)
-
-    async def _monitor_disk_usage(self):
-        """监控磁盘使用率"""
-        while self.is_monitoring:
-            try:
-                disk_metric = await self._get_disk_metric()
-                self._record_metric(disk_metric)
-
-                # 检查预警
-                await self._check_resource_alert(disk_metric)
-
-            except Exception as e:
-                logger.error(f"磁盘监控异常: {e}")
-
-            await asyncio.sleep(self.monitoring_interval)
-
-    async def _monitor_network_usage(self):
-        """监控网络使用率"""
+        """获取当前资源指标（读取共享采样器的最新快照）"""
+        snapshot = self.sampler.latest()
+        metrics = self._metrics_from_snapshot(snapshot)
+        return {metric.resource_type.value: metric for metric in metrics}
+
+    async def _monitor_snapshots(self):
+        """按采样器节奏处理快照：记录历史并检查预警"""
+        last_processed = 0.0
         while self.is_monitoring:
             try:
-                network_metric = await self._get_network_metric()
-                self._record_metric(network_metric)
-
-                # 检查预警
-                await self._check_resource_alert(network_metric)
-
+                snapshot = await self.sampler.next_snapshot(
+                    timeout=self.sampler.interval * 5
+                )
+                # 采样频率高于监控间隔时按监控间隔降采样
+                if snapshot.timestamp - last_processed < self.monitoring_interval:
+                    continue
+                last_processed = snapshot.timestamp
+
+                for metric in self._metrics_from_snapshot(snapshot):
+                    self._record_metric(metric)
+                    await self._check_resource_alert(metric)
+
+            except asyncio.TimeoutError:
+                logger.warning("主机指标采样器无新快照")
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"网络监控异常: {e}")
-
-            await asyncio.sleep(self.monitoring_interval)
-
-    async def _get_cpu_metric(self) -> ResourceMetric:
-        """获取CPU指标 - 非阻塞实现"""
-        loop = asyncio.get_event_loop()
-        cpu_percent = await loop.run_in_executor(
-            None, lambda: psutil.cpu_percent(interval=0.5)
-        )
-
-        status = self._evaluate_resource_status(ResourceType.CPU, cpu_percent)
-
-        return ResourceMetric(
-            resource_type=ResourceType.CPU,
-            usage_percent=cpu_percent,
-            usage_value=cpu_percent,
-            total_value=100.0,
-            unit="percent",
-            timestamp=datetime.utcnow(),
-            status=status,
-        )
-
-    async def _get_memory_metric(self) -> ResourceMetric:
-        """获取内存指标"""
-        loop = asyncio.get_event_loop()
-        memory_info = await loop.run_in_executor(None, psutil.virtual_memory)
-
-        usage_percent = memory_info.percent
-        status = self._evaluate_resource_status(ResourceType.MEMORY, usage_percent)
-
-        return ResourceMetric(
-            resource_type=ResourceType.MEMORY,
-            usage_percent=usage_percent,
-            usage_value=memory_info.used,
-            total_value=memory_info.total,
-            unit="bytes",
-            timestamp=datetime.utcnow(),
-            status=status,
-        )
-
-    async def _get_disk_metric(self) -> ResourceMetric:
-        """获取磁盘指标"""
-        loop = asyncio.get_event_loop()
-        disk_info = await loop.run_in_executor(None, lambda: psutil.disk_usage("/"))
-
-        usage_percent = (disk_info.used / disk_info.total) * 100
-        status = self._evaluate_resource_status(ResourceType.DISK, usage_percent)
-
-        return ResourceMetric(
-            resource_type=ResourceType.DISK,
-            usage_percent=usage_percent,
-            usage_value=disk_info.used,
-            total_value=disk_info.total,
-            unit="bytes",
-            timestamp=datetime.utcnow(),
-            status=status,
-        )
-
-    async def _get_network_metric(self) -> ResourceMetric:
-        """获取网络指标"""
-        loop = asyncio.get_event_loop()
-        net_io = await loop.run_in_executor(None, psutil.net_io_counters)
-
-        # 计算网络使用率 (基于历史数据)
-        usage_percent = 0.0  # 简化实现，实际需要基于历史数据计算
-
-        status = self._evaluate_resource_status(ResourceType.NETWORK, usage_percent)
-
-        return ResourceMetric(
-            resource_type=ResourceType.NETWORK,
-            usage_percent=usage_percent,
-            usage_value=net_io.bytes_sent + net_io.bytes_recv if net_io else 0,
-            total_value=0,  # 网络无总容量概念
-            unit="bytes",
-            timestamp=datetime.utcnow(),
-            status=status,
+                logger.error(f"资源监控异常: {e}")
+                await asyncio.sleep(self.monitoring_interval)
+
+    def _metrics_from_snapshot(self, snapshot: HostSnapshot) -> List[ResourceMetric]:
+        """把主机快照转换为各类资源指标"""
+        timestamp = datetime.utcfromtimestamp(snapshot.timestamp)
+        net_total = snapshot.net_io.get("bytes_sent", 0) + snapshot.net_io.get(
+            "bytes_recv", 0
         )
+        rows = [
+            (ResourceType.CPU, snapshot.cpu_percent, snapshot.cpu_percent, 100.0, "percent"),
+            (
+                ResourceType.MEMORY,
+                snapshot.memory_percent,
+                snapshot.memory_used,
+                snapshot.memory_total,
+                "bytes",
+            ),
+            (
+                ResourceType.DISK,
+                snapshot.disk_percent,
+                snapshot.disk_used,
+                snapshot.disk_total,
+                "bytes",
+            ),
+            # 网络无总容量概念，使用率暂记为0
+            (ResourceType.NETWORK, 0.0, net_total, 0, "bytes"),
+        ]
+        return [
+            ResourceMetric(
+                resource_type=resource_type,
+                usage_percent=usage_percent,
+                usage_value=usage_value,
+                total_value=total_value,
+                unit=unit,
+                timestamp=timestamp,
+                status=self._evaluate_resource_status(resource_type, usage_percent),
+            )
+            for resource_type, usage_percent, usage_value, total_value, unit in rows
+        ]
 
     def _evaluate_resource_status(
         self, resource_type: ResourceType, usage_percent: float
@@ -0,0 +1,423 @@
+"""
+列式指标时序存储
+对应需求: 8.3/9.1 - 智能预警、预测性维护
+对应开发规则: 性能与资源管理优化
+
+每个模块一张定长列式帧（时间戳列 + 每个指标一列 NumPy 环形缓冲区）：
+- 追加 O(1)，写满后覆盖最旧数据，不再重建列表
+- 按时间过期只移动起点（时间戳单调，二分定位）
+- 窗口聚合（均值、斜率、EWMA、分位数）全部向量化
+- 分钟/小时降采样层保存长期数据（桶均值 + 桶峰值），各层按自己的保留期过期
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (桶宽秒数, 容量[, 保留秒数])；未给出保留期时为 桶宽 × 容量
+DEFAULT_TIERS: Tuple[Tuple[int, ...], ...] = ((60, 1440), (3600, 24 * 90))
+
+
+# ============ 向量化统计 ============
+
+def trend_slope(values: np.ndarray, x: Optional[np.ndarray] = None) -> float:
+    """最小二乘斜率（忽略 NaN）；x 缺省为样本序号"""
+    values = np.asarray(values, dtype=np.float64)
+    if x is None:
+        x = np.arange(len(values), dtype=np.float64)
+    mask = ~np.isnan(values)
+    if mask.sum() < 2:
+        return 0.0
+    x = x[mask]
+    y = values[mask]
+    x_centered = x - x.mean()
+    denominator = float(np.dot(x_centered, x_centered))
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(x_centered, y - y.mean()) / denominator)
+
+
+def ewma(values: np.ndarray, alpha: float = 0.3) -> float:
+    """指数加权均值（最新样本权重最大，忽略 NaN）"""
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    if not mask.any():
+        return math.nan
+    weights = (1.0 - alpha) ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+    weights = weights * mask
+    return float(np.dot(weights, np.nan_to_num(values)) / weights.sum())
+
+
+def summarize(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    quantiles: Sequence[float] = (0.5, 0.95),
+    alpha: float = 0.3,
+) -> Dict[str, float]:
+    """窗口汇总：count/last/mean/min/max/slope/slope_per_second/ewma/pXX"""
+    valid = values[~np.isnan(values)]
+    result: Dict[str, float] = {"count": int(valid.size)}
+    if valid.size == 0:
+        return result
+    result.update(
+        {
+            "last": float(valid[-1]),
+            "mean": float(valid.mean()),
+            "min": float(valid.min()),
+            "max": float(valid.max()),
+            "slope": trend_slope(values),
+            "slope_per_second": trend_slope(values, timestamps),
+            "ewma": ewma(values, alpha),
+        }
+    )
+    for q, value in zip(quantiles, np.quantile(valid, quantiles)):
+        result[f"p{int(round(q * 100))}"] = float(value)
+    return result
+
+
+# ============ 环形列式帧 ============
+
+class MetricFrame:
+    """定长列式环形缓冲区：一列时间戳 + 按需创建的指标列（缺失值为 NaN）"""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity 必须为正数")
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.columns: Dict[str, np.ndarray] = {}
+        self._head = 0  # 下一次写入位置
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return float(self.timestamps[(self._head - 1) % self.capacity])
+
+    @property
+    def first_timestamp(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return float(self.timestamps[(self._head - self._size) % self.capacity])
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        """写入一行；时间戳回退时钳制到上一行，保证列有序"""
+        last = self.last_timestamp
+        if last is not None and timestamp < last:
+            timestamp = last
+        pos = self._head
+        self.timestamps[pos] = timestamp
+        for name, value in values.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = np.full(self.capacity, np.nan)
+                self.columns[name] = column
+            column[pos] = value
+        if len(values) != len(self.columns):
+            for name, column in self.columns.items():
+                if name not in values:
+                    column[pos] = np.nan
+        self._head = (pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _take(self, array: np.ndarray, n: int) -> np.ndarray:
+        """最近 n 行（未跨越缓冲区末尾时返回视图）"""
+        n = min(n, self._size)
+        start = (self._head - n) % self.capacity
+        if start + n <= self.capacity:
+            return array[start:start + n]
+        return np.concatenate((array[start:], array[:self._head]))
+
+    def count_since(self, cutoff: float) -> int:
+        """时间戳 >= cutoff 的行数（两段二分查找）"""
+        if not self._size:
+            return 0
+        start = (self._head - self._size) % self.capacity
+        if start + self._size <= self.capacity:
+            segment = self.timestamps[start:start + self._size]
+            return self._size - int(np.searchsorted(segment, cutoff, side="left"))
+        older = self.timestamps[start:]
+        newer = self.timestamps[:self._head]
+        if newer.size and newer[0] < cutoff:
+            return newer.size - int(np.searchsorted(newer, cutoff, side="left"))
+        return newer.size + older.size - int(np.searchsorted(older, cutoff, side="left"))
+
+    def expire(self, cutoff: float) -> int:
+        """丢弃早于 cutoff 的行，返回丢弃数量"""
+        keep = self.count_since(cutoff)
+        dropped = self._size - keep
+        self._size = keep
+        return dropped
+
+    def tail(self, column: str, n: int) -> np.ndarray:
+        data = self.columns.get(column)
+        if data is None:
+            return np.full(min(n, self._size), np.nan)
+        return self._take(data, n)
+
+    def window(
+        self,
+        column: str,
+        seconds: Optional[float] = None,
+        last_n: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """按时间窗口或最近 N 行取 (timestamps, values)"""
+        n = self._size
+        if seconds is not None:
+            n = self.count_since((now if now is not None else time.time()) - seconds)
+        if last_n is not None:
+            n = min(n, last_n)
+        return self._take(self.timestamps, n), self.tail(column, n)
+
+    def rows(self, columns: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """按时间顺序返回 (timestamps, 矩阵[行, 列])"""
+        columns = list(columns)
+        matrix = np.empty((self._size, len(columns)))
+        for j, name in enumerate(columns):
+            matrix[:, j] = self.tail(name, self._size)
+        return self._take(self.timestamps, self._size).copy(), matrix
+
+
+class DownsampleTier:
+    """降采样层：按固定桶宽累计，桶结束时写入均值与峰值（列名 "<metric>:max"）"""
+
+    def __init__(self, bucket_seconds: int, capacity: int, retention_seconds: Optional[float] = None):
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = (
+            float(bucket_seconds * capacity) if retention_seconds is None else retention_seconds
+        )
+        self.frame = MetricFrame(capacity)
+        self._bucket: Optional[int] = None
+        self._sums: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._maxima: Dict[str, float] = {}
+
+    def add(self, timestamp: float, values: Dict[str, float]):
+        bucket = int(timestamp // self.bucket_seconds)
+        if self._bucket is not None and bucket > self._bucket:
+            self.flush()
+        if self._bucket is None or bucket > self._bucket:
+            self._bucket = bucket
+        for name, value in values.items():
+            self._sums[name] = self._sums.get(name, 0.0) + value
+            self._counts[name] = self._counts.get(name, 0) + 1
+            previous = self._maxima.get(name)
+            if previous is None or value > previous:
+                self._maxima[name] = value
+
+    def flush(self):
+        """把当前桶写入帧（时间戳为桶起点）"""
+        if self._bucket is None or not self._counts:
+            return
+        row: Dict[str, float] = {}
+        for name, count in self._counts.items():
+            row[name] = self._sums[name] / count
+            row[f"{name}:max"] = self._maxima[name]
+        self.frame.append(float(self._bucket * self.bucket_seconds), row)
+        self._sums.clear()
+        self._counts.clear()
+        self._maxima.clear()
+
+
+@dataclass
+class _ModuleSeries:
+    raw: MetricFrame
+    tiers: List[DownsampleTier]
+    latest: Dict[str, Any]
+    total_records: int = 0
+
+
+class MetricTimeSeriesStore:
+    """
+    按模块组织的内存列式时序存储
+
+    record() 只做数值列写入与降采样累计；查询时按窗口切片后用 NumPy 聚合。
+    窗口超出原始数据覆盖范围时自动改用能覆盖该窗口的最细降采样层。
+    retention_seconds 只约束原始帧，降采样层使用各自的保留期（不短于原始帧）。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        tiers: Sequence[Tuple[int, ...]] = DEFAULT_TIERS,
+        retention_seconds: Optional[float] = None,
+    ):
+        self.capacity = capacity
+        self.tier_specs = tuple(sorted(tuple(spec) for spec in tiers))
+        self.retention_seconds = retention_seconds
+        self._series: Dict[str, _ModuleSeries] = {}
+        self._lock = threading.Lock()
+
+    def _get_series(self, module: str) -> _ModuleSeries:
+        series = self._series.get(module)
+        if series is None:
+            series = _ModuleSeries(
+                raw=MetricFrame(self.capacity),
+                tiers=[self._new_tier(*spec) for spec in self.tier_specs],
+                latest={},
+            )
+            self._series[module] = series
+        return series
+
+    def _new_tier(self, bucket_seconds: int, capacity: int, retention_seconds: Optional[float] = None) -> DownsampleTier:
+        tier = DownsampleTier(bucket_seconds, capacity, retention_seconds)
+        if retention_seconds is None and self.retention_seconds is not None:
+            tier.retention_seconds = max(tier.retention_seconds, self.retention_seconds)
+        return tier
+
+    def record(self, module: str, metrics: Dict[str, Any], timestamp: Optional[float] = None):
+        """写入一行指标；非数值字段只保留在 latest() 中"""
+        timestamp = time.time() if timestamp is None else timestamp
+        numeric = {
+            name: float(value)
+            for name, value in metrics.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        with self._lock:
+            series = self._get_series(module)
+            series.raw.append(timestamp, numeric)
+            for tier in series.tiers:
+                tier.add(timestamp, numeric)
+            series.latest = metrics
+            series.total_records += 1
+
+    def modules(self) -> List[str]:
+        return list(self._series)
+
+    def __contains__(self, module: str) -> bool:
+        return module in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def count(self, module: str) -> int:
+        series = self._series.get(module)
+        return len(series.raw) if series else 0
+
+    def latest(self, module: str) -> Dict[str, Any]:
+        series = self._series.get(module)
+        return series.latest if series else {}
+
+    def frame(self, module: str, bucket_seconds: Optional[int] = None) -> Optional[MetricFrame]:
+        """原始帧或指定桶宽的降采样帧"""
+        series = self._series.get(module)
+        if series is None:
+            return None
+        if bucket_seconds is None:
+            return series.raw
+        for tier in series.tiers:
+            if tier.bucket_seconds == bucket_seconds:
+                return tier.frame
+        raise KeyError(f"未配置 {bucket_seconds}s 降采样层")
+
+    def tail(self, module: str, metric: str, n: int) -> np.ndarray:
+        with self._lock:
+            frame = self.frame(module)
+            return frame.tail(metric, n).copy() if frame else np.empty(0)
+
+    def window(
+        self,
+        module: str,
+        metric: str,
+        seconds: Optional[float] = None,
+        last_n: Optional[int] = None,
+        bucket_seconds: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """取窗口数据；未指定层级且原始数据不足以覆盖 seconds 时自动选择降采样层"""
+        now = time.time() if now is None else now
+        with self._lock:
+            series = self._series.get(module)
+            if series is None:
+                return np.empty(0), np.empty(0)
+            frame = series.raw
+            if bucket_seconds is not None:
+                frame = self.frame(module, bucket_seconds)
+            elif seconds is not None and series.tiers:
+                frame = self._frame_covering(series, now - seconds)
+            timestamps, values = frame.window(metric, seconds, last_n, now)
+            return timestamps.copy(), values.copy()
+
+    @staticmethod
+    def _frame_covering(series: _ModuleSeries, start: float) -> MetricFrame:
+        first = series.raw.first_timestamp
+        if first is None or first <= start:
+            return series.raw
+        for tier in series.tiers:
+            tier_first = tier.frame.first_timestamp
+            if tier_first is not None and tier_first <= start:
+                return tier.frame
+        # 没有层级完整覆盖时，取已有数据最久远的一层
+        candidates = [series.raw] + [t.frame for t in series.tiers if len(t.frame)]
+        return min(candidates, key=lambda f: f.first_timestamp)
+
+    def aggregate(
+        self,
+        module: str,
+        metric: str,
+        seconds: Optional[float] = None,
+        last_n: Optional[int] = None,
+        bucket_seconds: Optional[int] = None,
+        quantiles: Sequence[float] = (0.5, 0.95),
+        alpha: float = 0.3,
+        now: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """窗口聚合：均值、极值、斜率、EWMA、分位数"""
+        timestamps, values = self.window(module, metric, seconds, last_n, bucket_seconds, now)
+        return summarize(timestamps, values, quantiles, alpha)
+
+    def rows(self, module: str, metrics: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """原始帧中指定指标的 (timestamps, 矩阵)"""
+        with self._lock:
+            series = self._series.get(module)
+            if series is None:
+                return np.empty(0), np.empty((0, len(list(metrics))))
+            return series.raw.rows(metrics)
+
+    def expire(self, cutoff: Optional[float] = None, now: Optional[float] = None) -> int:
+        """
+        按保留期丢弃过期行，返回丢弃总数
+
+        Args:
+            cutoff: 原始帧的截止时间（缺省为 now - retention_seconds，未配置保留期则不清理原始帧）
+            now: 当前时间；各降采样层按 now - 该层保留期 独立过期
+        """
+        now = time.time() if now is None else now
+        if cutoff is None and self.retention_seconds is not None:
+            cutoff = now - self.retention_seconds
+        dropped = 0
+        with self._lock:
+            for series in self._series.values():
+                if cutoff is not None:
+                    dropped += series.raw.expire(cutoff)
+                for tier in series.tiers:
+                    dropped += tier.frame.expire(now - tier.retention_seconds)
+        return dropped
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "modules": len(self._series),
+                "capacity_per_module": self.capacity,
+                "tiers": [bucket for bucket, *_ in self.tier_specs],
+                "rows": {name: len(s.raw) for name, s in self._series.items()},
+                "total_records": sum(s.total_records for s in self._series.values()),
+                "memory_bytes": sum(
+                    s.raw.timestamps.nbytes
+                    + sum(c.nbytes for c in s.raw.columns.values())
+                    + sum(
+                        t.frame.timestamps.nbytes + sum(c.nbytes for c in t.frame.columns.values())
+                        for t in s.tiers
+                    )
+                    for s in self._series.values()
+                ),
+            }
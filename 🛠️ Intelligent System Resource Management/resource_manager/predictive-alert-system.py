@@ -15,6 +15,8 @@ from typing import Any, Dict, List, Optional
 
 import numpy as np
 
+from resource_manager.metric_timeseries_store import MetricTimeSeriesStore, trend_slope
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,7 +66,7 @@ class PredictionModel:
     name: str
     features: List[str]
     thresholds: Dict[str, float]
-    training_data: List[Dict[str, Any]]
+    training_data: Dict[str, np.ndarray]  # features / labels / timestamps / modules 列
     last_trained: datetime
 
 
@@ -93,10 +95,14 @@ class PredictiveAlertSystem:
             "alert_retention_days": 30,  # 预警保留天数
             "confidence_threshold": 0.7,  # 置信度阈值
             "escalation_timeout": 300,  # 升级超时（秒）
+            "history_capacity": 4096,  # 每个模块保留的原始指标行数
         }
 
-        # 监控指标历史
-        self.metric_history = {}
+        # 监控指标历史（列式环形缓冲区 + 分钟/小时降采样层）
+        self.metric_store = MetricTimeSeriesStore(
+            capacity=self.alert_config["history_capacity"],
+            retention_seconds=self.alert_config["alert_retention_days"] * 86400,
+        )
 
         # 预警规则
         self.alert_rules = self._initialize_alert_rules()
@@ -135,6 +141,14 @@ class PredictiveAlertSystem:
         """加载预警配置"""
         alert_config = config.get("predictive_alert_system", {})
         self.alert_config.update(alert_config)
+        self.metric_store.retention_seconds = self.alert_config["alert_retention_days"] * 86400
+        if self.alert_config["history_capacity"] != self.metric_store.capacity and not len(
+            self.metric_store
+        ):
+            self.metric_store = MetricTimeSeriesStore(
+                capacity=self.alert_config["history_capacity"],
+                retention_seconds=self.metric_store.retention_seconds,
+            )
 
         # 加载自定义规则
         if "custom_rules" in config:
@@ -190,7 +204,7 @@ class PredictiveAlertSystem:
             name="resource_usage_predictor",
             features=["cpu_usage", "memory_usage", "disk_io", "time_of_day"],
             thresholds={"cpu_usage": 0.75, "memory_usage": 0.8},
-            training_data=[],
+            training_data={},
             last_trained=datetime.now(),
         )
         self.prediction_models["resource_usage"] = resource_model
@@ -200,7 +214,7 @@ class PredictiveAlertSystem:
             name="performance_degradation_predictor",
             features=["response_time", "throughput", "error_rate", "concurrent_users"],
             thresholds={"response_time": 1.5, "throughput": 60},
-            training_data=[],
+            training_data={},
             last_trained=datetime.now(),
         )
         self.prediction_models["performance"] = performance_model
@@ -210,7 +224,7 @@ class PredictiveAlertSystem:
             name="capacity_planning_predictor",
             features=["user_growth", "data_volume", "request_pattern"],
             thresholds={"capacity_remaining": 0.2},
-            training_data=[],
+            training_data={},
             last_trained=datetime.now(),
         )
         self.prediction_models["capacity"] = capacity_model
@@ -220,19 +234,8 @@ class PredictiveAlertSystem:
         try:
             timestamp = datetime.now()
 
-            if module_name not in self.metric_history:
-                self.metric_history[module_name] = []
-
-            metric_record = {
-                "timestamp": timestamp,
-                "module": module_name,
-                "metrics": metrics,
-            }
-
-            self.metric_history[module_name].append(metric_record)
-
-            # 保持历史数据在时间窗口内
-            self._cleanup_old_metrics(module_name)
+            # O(1) 写入列式存储；过期数据由监控循环统一清理
+            self.metric_store.record(module_name, metrics, timestamp.timestamp())
 
             # 实时分析指标
             await self._analyze_realtime_metrics(module_name, metrics, timestamp)
@@ -240,19 +243,11 @@ class PredictiveAlertSystem:
         except Exception as e:
             self.logger.error(f"收集指标失败 {module_name}: {e}")
 
-    def _cleanup_old_metrics(self, module_name: str):
-        """清理过期指标"""
-        if module_name not in self.metric_history:
-            return
-
+    def _cleanup_old_metrics(self):
+        """清理过期指标（按时间戳二分移动各环形缓冲区起点）"""
         retention_days = self.alert_config["alert_retention_days"]
         cutoff_time = datetime.now() - timedelta(days=retention_days)
-
-        self.metric_history[module_name] = [
-            record
-            for record in self.metric_history[module_name]
-            if record["timestamp"] > cutoff_time
-        ]
+        self.metric_store.expire(cutoff_time.timestamp())
 
     async def _analyze_realtime_metrics(
         self, module_name: str, metrics: Dict[str, Any], timestamp: datetime
@@ -428,19 +423,15 @@ class PredictiveAlertSystem:
     ) -> Dict[str, Any]:
         """预测资源使用趋势"""
         # 简化实现 - 实际应使用机器学习模型
-        if (
-            module_name not in self.metric_history
-            or len(self.metric_history[module_name]) < 10
-        ):
+        if self.metric_store.count(module_name) < 10:
             return {"needs_alert": False}
 
         # 分析历史趋势
-        recent_metrics = self.metric_history[module_name][-10:]
         cpu_trend = await self._calculate_trend(
-            [m["metrics"].get("cpu_usage", 0) for m in recent_metrics]
+            self.metric_store.tail(module_name, "cpu_usage", 10)
         )
         memory_trend = await self._calculate_trend(
-            [m["metrics"].get("memory_usage", 0) for m in recent_metrics]
+            self.metric_store.tail(module_name, "memory_usage", 10)
         )
 
         current_cpu = current_metrics.get("cpu_usage", 0)
@@ -493,19 +484,15 @@ class PredictiveAlertSystem:
         self, module_name: str, current_metrics: Dict[str, Any]
     ) -> Dict[str, Any]:
         """预测性能趋势"""
-        if (
-            module_name not in self.metric_history
-            or len(self.metric_history[module_name]) < 10
-        ):
+        if self.metric_store.count(module_name) < 10:
             return {"needs_alert": False}
 
         # 分析性能趋势
-        recent_metrics = self.metric_history[module_name][-10:]
         response_trend = await self._calculate_trend(
-            [m["metrics"].get("response_time", 0) for m in recent_metrics]
+            self.metric_store.tail(module_name, "response_time", 10)
         )
         throughput_trend = await self._calculate_trend(
-            [m["metrics"].get("throughput", 0) for m in recent_metrics]
+            self.metric_store.tail(module_name, "throughput", 10)
         )
 
         current_response = current_metrics.get("response_time", 0)
@@ -550,24 +537,21 @@ class PredictiveAlertSystem:
             "suggested_actions": ["优化性能关键路径", "检查数据库索引", "增加缓存层级"],
         }
 
-    async def _calculate_trend(self, values: List[float]) -> float:
-        """计算数值趋势（简单线性回归）"""
-        if len(values) < 2:
-            return 0.0
-
-        x = list(range(len(values)))
-        x_mean = sum(x) / len(x)
-        y_mean = sum(values) / len(values)
+    async def _calculate_trend(self, values: np.ndarray) -> float:
+        """计算数值趋势（向量化最小二乘，忽略缺失值）"""
+        return trend_slope(values)
 
-        numerator = sum(
-            (x[i] - x_mean) * (values[i] - y_mean) for i in range(len(values))
+    async def get_metric_summary(
+        self,
+        module_name: str,
+        metric: str,
+        window_seconds: Optional[float] = None,
+        bucket_seconds: Optional[int] = None,
+    ) -> Dict[str, float]:
+        """获取指标窗口汇总（均值、斜率、EWMA、分位数）；长窗口自动使用降采样数据"""
+        return self.metric_store.aggregate(
+            module_name, metric, seconds=window_seconds, bucket_seconds=bucket_seconds
         )
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(len(values)))
-
-        if denominator == 0:
-            return 0.0
-
-        return numerator / denominator
 
     async def _create_alert(
         self,
@@ -756,17 +740,15 @@ class PredictiveAlertSystem:
         while self.monitoring_enabled:
             try:
                 # 检查所有模块的指标历史，进行批量预测
-                for module_name in list(self.metric_history.keys()):
-                    if (
-                        module_name in self.metric_history
-                        and self.metric_history[module_name]
-                    ):
-                        latest_metrics = self.metric_history[module_name][-1]["metrics"]
+                for module_name in self.metric_store.modules():
+                    if self.metric_store.count(module_name):
+                        latest_metrics = self.metric_store.latest(module_name)
                         await self._run_predictive_analysis(
                             module_name, latest_metrics, datetime.now()
                         )
 
-                # 清理过期预警
+                # 清理过期指标与预警
+                self._cleanup_old_metrics()
                 await self._cleanup_expired_alerts()
 
                 # 等待下一次监控
@@ -803,81 +785,68 @@ class PredictiveAlertSystem:
                 model.last_trained = datetime.now()
 
                 self.logger.info(
-                    f"模型 {model_name} 训练完成，数据量: {len(training_data)}"
+                    f"模型 {model_name} 训练完成，数据量: {len(training_data.get('labels', ()))}"
                 )
 
             except Exception as e:
                 self.logger.error(f"训练模型 {model_name} 失败: {e}")
 
-    async def _collect_training_data(self, model_name: str) -> List[Dict[str, Any]]:
-        """收集训练数据"""
-        training_data = []
+    # 各模型的特征列（缺失值的默认值）与标签列
+    TRAINING_FEATURES = {
+        "resource_usage": {"cpu_usage": 0.0, "memory_usage": 0.0, "disk_io": 0.0},
+        "performance": {
+            "response_time": 0.0,
+            "throughput": 0.0,
+            "error_rate": 0.0,
+            "concurrent_users": 1.0,
+        },
+    }
+    TRAINING_LABELS = {"resource_usage": "cpu_usage", "performance": "response_time"}
+
+    async def _collect_training_data(self, model_name: str) -> Dict[str, np.ndarray]:
+        """收集训练数据（直接在列上切片：特征取第 i 行，标签为第 i+1 行与第 i 行之差）"""
+        feature_defaults = self.TRAINING_FEATURES.get(model_name)
+        label_column = self.TRAINING_LABELS.get(model_name)
+        if not feature_defaults or not label_column:
+            return {}
 
-        for module_name, metrics_list in self.metric_history.items():
-            if len(metrics_list) < 10:
+        columns = list(feature_defaults)
+        if label_column not in columns:
+            columns.append(label_column)
+        defaults = np.array([feature_defaults.get(c, 0.0) for c in columns])
+        label_index = columns.index(label_column)
+        utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+
+        features, labels, timestamps, modules = [], [], [], []
+        for module_name in self.metric_store.modules():
+            ts, matrix = self.metric_store.rows(module_name, columns)
+            if len(ts) < 10:
                 continue
 
-            # 提取特征和标签
-            for i in range(len(metrics_list) - 1):
-                current = metrics_list[i]
-                next_point = metrics_list[i + 1]
+            matrix = np.where(np.isnan(matrix), defaults, matrix)
+            current = matrix[:-1, : len(feature_defaults)]
+            if model_name == "resource_usage":
+                hours = np.floor(((ts[:-1] + utc_offset) % 86400) / 3600)
+                current = np.column_stack((current, hours / 24.0))
 
-                features = self._extract_features(current["metrics"], model_name)
-                label = self._extract_label(
-                    current["metrics"], next_point["metrics"], model_name
-                )
-
-                if features and label is not None:
-                    training_data.append(
-                        {
-                            "features": features,
-                            "label": label,
-                            "timestamp": current["timestamp"],
-                            "module": module_name,
-                        }
-                    )
+            features.append(current)
+            labels.append(np.diff(matrix[:, label_index]))
+            timestamps.append(ts[:-1])
+            modules.append(np.full(len(ts) - 1, module_name, dtype=object))
 
-        return training_data
-
-    def _extract_features(
-        self, metrics: Dict[str, Any], model_name: str
-    ) -> Dict[str, Any]:
-        """提取特征"""
-        if model_name == "resource_usage":
-            return {
-                "cpu_usage": metrics.get("cpu_usage", 0),
-                "memory_usage": metrics.get("memory_usage", 0),
-                "disk_io": metrics.get("disk_io", 0),
-                "time_of_day": datetime.now().hour / 24.0,
-            }
-        elif model_name == "performance":
-            return {
-                "response_time": metrics.get("response_time", 0),
-                "throughput": metrics.get("throughput", 0),
-                "error_rate": metrics.get("error_rate", 0),
-                "concurrent_users": metrics.get("concurrent_users", 1),
-            }
-        else:
+        if not labels:
             return {}
 
-    def _extract_label(
-        self,
-        current_metrics: Dict[str, Any],
-        next_metrics: Dict[str, Any],
-        model_name: str,
-    ) -> Optional[float]:
-        """提取标签"""
+        feature_names = list(feature_defaults)
         if model_name == "resource_usage":
-            # 预测CPU使用率变化
-            current_cpu = current_metrics.get("cpu_usage", 0)
-            next_cpu = next_metrics.get("cpu_usage", 0)
-            return next_cpu - current_cpu
-        elif model_name == "performance":
-            # 预测响应时间变化
-            current_response = current_metrics.get("response_time", 0)
-            next_response = next_metrics.get("response_time", 0)
-            return next_response - current_response
-        return None
+            feature_names.append("time_of_day")
+        return {
+            "feature_names": np.array(feature_names),
+            "features": np.vstack(features),
+            "labels": np.concatenate(labels),
+            "timestamps": np.concatenate(timestamps),
+            "modules": np.concatenate(modules),
+        }
 
     async def _cleanup_expired_alerts(self):
         """清理过期预警"""
@@ -896,10 +865,14 @@ class PredictiveAlertSystem:
         return {
             "status": "healthy" if self.initialized else "initializing",
             "monitoring_enabled": self.monitoring_enabled,
-            "modules_monitored": len(self.metric_history),
+            "modules_monitored": len(self.metric_store),
             "active_alerts": len(self.active_alerts),
             "models_trained": len(
-                [m for m in self.prediction_models.values() if m.training_data]
+                [
+                    m
+                    for m in self.prediction_models.values()
+                    if len(m.training_data.get("labels", ()))
+                ]
             ),
             "prediction_accuracy": await self._calculate_prediction_accuracy(),
             "last_training": (
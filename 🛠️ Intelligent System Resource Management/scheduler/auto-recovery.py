@@ -7,11 +7,19 @@
 
 import asyncio
 import logging
+import uuid
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
+from scheduler.health_check_engine import (
+    DEGRADED,
+    UNHEALTHY,
+    HealthCheckEngine,
+    HealthEvent,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,6 +68,9 @@ class AutoRecovery:
         self.recovery_history: List[Dict[str, Any]] = []
         self.issue_patterns: Dict[str, Any] = {}
         self.recovery_strategies: Dict[str, RecoveryPlan] = {}
+        self.health_engine: Optional[HealthCheckEngine] = None
+        self._unsubscribe_health = None
+        self.owner_id = f"auto-recovery-{uuid.uuid4().hex[:8]}"
 
         # 恢复配置
         self.recovery_config = {
@@ -68,6 +79,7 @@ class AutoRecovery:
             "auto_recovery_enabled": True,
             "alert_on_recovery": True,
             "backoff_strategy": "exponential",  # exponential, linear, fixed
+            "recover_on_health_event": True,  # 收到不健康事件时立即恢复
         }
 
         # 问题模式库
@@ -83,9 +95,51 @@ class AutoRecovery:
 
         if core_services:
             self.system_manager = core_services.get("system_manager")
+            if core_services.get("health_engine"):
+                self.attach_health_engine(core_services["health_engine"])
 
         logger.info("自动恢复引擎启动完成")
 
+    def attach_health_engine(self, engine: HealthCheckEngine):
+        """订阅健康检查引擎：服务状态由事件推送，不再轮询各模块健康"""
+        if self._unsubscribe_health:
+            self._unsubscribe_health()
+        self.health_engine = engine
+        self._unsubscribe_health = engine.subscribe(self._on_health_event, owner=self.owner_id)
+
+    def _owns_recovery(self, health_info: Dict) -> bool:
+        """已有负责方（如调度器）的服务由负责方恢复，这里只处理无负责方的服务"""
+        return health_info.get("recovery_owner") in (None, self.owner_id)
+
+    async def _on_health_event(self, event: HealthEvent):
+        """无其他负责方的服务判定为不健康时立即执行恢复"""
+        if event.status != UNHEALTHY:
+            return
+        if event.recovery_owner not in (None, self.owner_id):
+            return
+        if not (
+            self.recovery_config["auto_recovery_enabled"]
+            and self.recovery_config["recover_on_health_event"]
+        ):
+            return
+
+        issue = self._service_issue(event.service, event.state)
+        result = await self._execute_recovery(issue)
+        report = await self._generate_recovery_report([issue], [result])
+        await self._record_recovery_history(report)
+
+    def _service_issue(self, service_name: str, health_info: Dict) -> Dict[str, Any]:
+        """把服务异常映射到“服务无响应”恢复策略"""
+        status = health_info.get("status", "unknown")
+        return {
+            "id": "service_unresponsive",
+            "description": f"服务 {service_name} 状态异常: {status}",
+            "severity": IssueSeverity.HIGH.value,
+            "detected_at": datetime.utcnow(),
+            "service": service_name,
+            "health_status": health_info,
+        }
+
     def _initialize_issue_patterns(self):
         """初始化问题模式库"""
         self.issue_patterns = {
@@ -398,7 +452,12 @@ class AutoRecovery:
         service_issues = []
 
         try:
-            if self.system_manager:
+            if self.health_engine is not None and self.health_engine.services:
+                # 直接读取引擎维护的最新状态，不产生额外探测
+                for service_name, state in self.health_engine.snapshot().items():
+                    if state["status"] in (DEGRADED, UNHEALTHY) and self._owns_recovery(state):
+                        service_issues.append(self._service_issue(service_name, state))
+            elif self.system_manager:
                 modules_health = await self.system_manager.get_modules_health()
 
                 for module_name, health_info in modules_health.items():
@@ -690,7 +749,12 @@ class AutoRecovery:
         logger.info("自动恢复已禁用")
 
     async def stop(self):
-        """停止自动恢复引擎"""
+        """停止自动恢复引擎（只撤销自己的订阅，共享健康引擎由最后一个使用方停止）"""
+        if self._unsubscribe_health:
+            self._unsubscribe_health()
+            self._unsubscribe_health = None
+        if self.health_engine is not None:
+            await self.health_engine.release(self.owner_id)
         logger.info("自动恢复引擎停止")
 
     async def get_health_status(self) -> Dict[str, Any]:
@@ -0,0 +1,335 @@
+"""
+DAG 就绪队列启动执行器
+负责在依赖图上并发启动服务，并统计关键路径
+对应需求: 8.3/8.4 - 启动顺序控制、并发启动
+
+依赖图的边方向为 依赖 -> 被依赖方（与 DependencyIntelligence 一致）：
+- 服务的全部依赖就绪后立即进入就绪队列，不再按"波次"等待整组完成
+- 同时启动的服务数受 max_concurrency 限制，就绪队列按到终点的最长预估耗时优先
+- 必需依赖失败时跳过所有下游；可选依赖失败不阻塞；弱依赖不参与排序
+- 结束后按实测耗时计算关键路径，冷启动总耗时应接近关键路径长度而不是各波次之和
+"""
+
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import networkx as nx
+
+from . import DependencyType, logger
+
+PENDING = "pending"
+STARTING = "starting"
+STARTED = "started"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+def build_service_graph(services: Dict[str, Any]) -> nx.DiGraph:
+    """由调度器的服务表构建依赖图，边上记录 dependency_type"""
+    graph = nx.DiGraph()
+    graph.add_nodes_from(services)
+    for service_name, scheduled_service in services.items():
+        for dependency in scheduled_service.info.dependencies:
+            if dependency.service_name in services:
+                graph.add_edge(
+                    dependency.service_name,
+                    service_name,
+                    dependency_type=dependency.dependency_type,
+                )
+    return graph
+
+
+def _dependency_type(graph: nx.DiGraph, source: str, target: str) -> DependencyType:
+    return graph.edges[source, target].get("dependency_type", DependencyType.REQUIRED)
+
+
+def startup_dag(graph: nx.DiGraph, targets: Optional[Iterable[str]] = None) -> nx.DiGraph:
+    """
+    生成参与启动排序的 DAG
+
+    去掉弱依赖边；指定 targets 时只保留目标及其（非弱）传递依赖；
+    循环依赖的强连通分量内按入度/出度排成一条链串行启动。
+    """
+    dag = graph.copy()
+    dag.remove_edges_from(
+        [(u, v) for u, v in graph.edges if _dependency_type(graph, u, v) == DependencyType.WEAK]
+    )
+
+    if targets is not None:
+        nodes = set()
+        for target in targets:
+            if target not in dag:
+                continue
+            nodes.add(target)
+            nodes.update(nx.ancestors(dag, target))
+        dag = dag.subgraph(nodes).copy()
+
+    if not nx.is_directed_acyclic_graph(dag):
+        for component in nx.strongly_connected_components(dag):
+            if len(component) < 2:
+                continue
+            ordered = sorted(
+                component, key=lambda s: (graph.in_degree(s), graph.out_degree(s), s)
+            )
+            dag.remove_edges_from(
+                [(u, v) for u, v in list(dag.edges(component)) if v in component]
+            )
+            for source, target in zip(ordered, ordered[1:]):
+                dag.add_edge(source, target, dependency_type=DependencyType.REQUIRED)
+            logger.warning(f"检测到循环依赖，分量内串行启动: {ordered}")
+    return dag
+
+
+def bottom_levels(dag: nx.DiGraph, estimates: Dict[str, float], default: float = 1.0) -> Dict[str, float]:
+    """各节点到终点的最长预估耗时（含自身），用作就绪队列优先级"""
+    levels: Dict[str, float] = {}
+    for node in reversed(list(nx.topological_sort(dag))):
+        tail = max((levels[s] for s in dag.successors(node)), default=0.0)
+        levels[node] = estimates.get(node, default) + tail
+    return levels
+
+
+def critical_path(dag: nx.DiGraph, durations: Dict[str, float]) -> Tuple[List[str], float]:
+    """按节点耗时计算关键路径，返回 (路径, 总耗时)"""
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for node in nx.topological_sort(dag):
+        start, best = 0.0, None
+        for pred in dag.predecessors(node):
+            if finish[pred] > start:
+                start, best = finish[pred], pred
+        finish[node] = start + durations.get(node, 0.0)
+        previous[node] = best
+    if not finish:
+        return [], 0.0
+
+    node = max(finish, key=finish.get)
+    length = finish[node]
+    path = []
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+    path.reverse()
+    return path, length
+
+
+@dataclass
+class ServiceStartRecord:
+    """单个服务的启动记录（时间为相对执行开始的秒数）"""
+
+    name: str
+    status: str = PENDING
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == STARTED
+
+
+@dataclass
+class DAGStartupReport:
+    """一次 DAG 启动的结果与关键路径统计"""
+
+    records: Dict[str, ServiceStartRecord]
+    start_order: List[str]
+    total_time: float
+    critical_path: List[str] = field(default_factory=list)
+    critical_path_seconds: float = 0.0
+    max_concurrency: int = 1
+
+    def _names(self, status: str) -> List[str]:
+        return [name for name, record in self.records.items() if record.status == status]
+
+    @property
+    def started(self) -> List[str]:
+        return self._names(STARTED)
+
+    @property
+    def failed(self) -> List[str]:
+        return self._names(FAILED)
+
+    @property
+    def skipped(self) -> List[str]:
+        return self._names(SKIPPED)
+
+    @property
+    def success(self) -> bool:
+        return not self.failed and not self.skipped
+
+    def to_dict(self) -> Dict[str, Any]:
+        serial_time = sum(record.duration for record in self.records.values())
+        return {
+            "success": self.success,
+            "total_time": self.total_time,
+            "critical_path": self.critical_path,
+            "critical_path_seconds": self.critical_path_seconds,
+            "serial_time": serial_time,
+            "parallel_speedup": serial_time / self.total_time if self.total_time > 0 else 1.0,
+            "max_concurrency": self.max_concurrency,
+            "start_order": self.start_order,
+            "started": self.started,
+            "failed": {name: self.records[name].error for name in self.failed},
+            "skipped": self.skipped,
+            "durations": {name: record.duration for name, record in self.records.items()},
+        }
+
+
+class DAGStartupExecutor:
+    """
+    就绪队列启动执行器
+
+    Args:
+        graph: 依赖图（依赖 -> 被依赖方）
+        start_fn: 启动单个服务的协程，返回是否成功（调用方负责就绪探测）
+        max_concurrency: 同时启动的服务数上限
+        timeouts: 各服务的启动超时（秒）
+        default_timeout: 未单独配置时的启动超时
+        estimates: 各服务的预估启动耗时（通常取上次实测值），用于优先级
+        before_start: 每个服务启动前等待的钩子（暂停/中止检查），抛出异常即终止执行
+        on_complete: 每个服务结束（成功/失败/跳过）后的回调
+    """
+
+    def __init__(
+        self,
+        graph: nx.DiGraph,
+        start_fn: Callable[[str], Awaitable[bool]],
+        max_concurrency: int = 3,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: Optional[float] = None,
+        estimates: Optional[Dict[str, float]] = None,
+        before_start: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_complete: Optional[Callable[[ServiceStartRecord], Awaitable[None]]] = None,
+    ):
+        self.graph = graph
+        self.start_fn = start_fn
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.estimates = estimates or {}
+        self.before_start = before_start
+        self.on_complete = on_complete
+
+    async def run(self, targets: Optional[Iterable[str]] = None) -> DAGStartupReport:
+        """启动 targets 及其依赖（默认全部服务）"""
+        dag = startup_dag(self.graph, targets)
+        records = {name: ServiceStartRecord(name=name) for name in dag}
+        waiting = {name: dag.in_degree(name) for name in dag}
+        priority = bottom_levels(dag, self.estimates)
+
+        ready: List[Tuple[float, int, str]] = []
+        sequence = 0
+        for name in nx.topological_sort(dag):
+            if waiting[name] == 0:
+                heapq.heappush(ready, (-priority[name], sequence, name))
+                sequence += 1
+
+        running: Dict[asyncio.Task, str] = {}
+        start_order: List[str] = []
+        origin = time.monotonic()
+
+        async def settle(name: str, succeeded: bool):
+            """服务结束后释放下游；必需依赖失败时级联跳过"""
+            nonlocal sequence
+            stack = [(name, succeeded)]
+            while stack:
+                current, ok = stack.pop()
+                if self.on_complete:
+                    await self.on_complete(records[current])
+                for successor in dag.successors(current):
+                    record = records[successor]
+                    if record.status != PENDING:
+                        continue
+                    required = _dependency_type(dag, current, successor) == DependencyType.REQUIRED
+                    if not ok and required:
+                        record.status = SKIPPED
+                        record.error = f"依赖服务未就绪: {current}"
+                        stack.append((successor, False))
+                        continue
+                    waiting[successor] -= 1
+                    if waiting[successor] == 0:
+                        heapq.heappush(ready, (-priority[successor], sequence, successor))
+                        sequence += 1
+
+        try:
+            while ready or running:
+                while ready and len(running) < self.max_concurrency:
+                    _, _, name = heapq.heappop(ready)
+                    if records[name].status != PENDING:
+                        continue
+                    if self.before_start:
+                        await self.before_start(name)
+                    records[name].status = STARTING
+                    records[name].started_at = time.monotonic() - origin
+                    start_order.append(name)
+                    running[asyncio.create_task(self._start(name))] = name
+
+                if not running:
+                    continue
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    succeeded, error = task.result()
+                    record = records[name]
+                    record.finished_at = time.monotonic() - origin
+                    record.status = STARTED if succeeded else FAILED
+                    record.error = error
+                    if not succeeded:
+                        logger.debug(f"服务启动失败 {name}: {error}")
+                    await settle(name, succeeded)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        durations = {name: record.duration for name, record in records.items()}
+        path, path_seconds = critical_path(dag, durations)
+        report = DAGStartupReport(
+            records=records,
+            start_order=start_order,
+            total_time=time.monotonic() - origin,
+            critical_path=path,
+            critical_path_seconds=path_seconds,
+            max_concurrency=self.max_concurrency,
+        )
+        logger.info(
+            f"DAG 启动完成: {len(report.started)}/{len(records)} 成功，总耗时 {report.total_time:.2f} 秒，"
+            f"关键路径 {path_seconds:.2f} 秒: {' -> '.join(path)}"
+        )
+        return report
+
+    async def _start(self, name: str) -> Tuple[bool, Optional[str]]:
+        timeout = self.timeouts.get(name, self.default_timeout)
+        try:
+            if timeout:
+                async with asyncio.timeout(timeout):
+                    succeeded = await self.start_fn(name)
+            else:
+                succeeded = await self.start_fn(name)
+            return bool(succeeded), None if succeeded else "服务启动失败"
+        except asyncio.TimeoutError:
+            return False, f"服务启动超时 (> {timeout} 秒)"
+        except Exception as e:
+            return False, str(e)
+
+
+__all__ = [
+    "DAGStartupExecutor",
+    "DAGStartupReport",
+    "ServiceStartRecord",
+    "build_service_graph",
+    "startup_dag",
+    "critical_path",
+]
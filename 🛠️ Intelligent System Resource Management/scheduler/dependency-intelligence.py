@@ -334,6 +334,16 @@ class DependencyIntelligence:
             )
             return services_by_deps
 
+    async def get_startup_graph(self) -> nx.DiGraph:
+        """
+        获取用于并发启动调度的依赖图（边方向: 依赖 -> 被依赖方，边属性 dependency_type）
+
+        Returns:
+            nx.DiGraph: 依赖图
+        """
+        await self._build_dependency_graph()
+        return self.dependency_graph
+
     async def detect_circular_dependencies(self) -> List[List[str]]:
         """
         检测循环依赖
@@ -445,7 +455,9 @@ class DependencyIntelligence:
             for dependency in scheduled_service.info.dependencies:
                 if dependency.service_name in self.dependency_graph.nodes():
                     self.dependency_graph.add_edge(
-                        dependency.service_name, service_name
+                        dependency.service_name,
+                        service_name,
+                        dependency_type=dependency.dependency_type,
                     )
 
         logger.debug(
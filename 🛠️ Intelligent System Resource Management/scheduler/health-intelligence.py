@@ -11,9 +11,10 @@ import statistics
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-import psutil
+from resource_manager.host_metrics_sampler import get_host_sampler
+from scheduler.health_check_engine import HealthCheckEngine
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +52,8 @@ class HealthIntelligence:
         self.anomaly_detection_enabled = True
         self.trend_analysis_window = 300  # 5分钟窗口
         self.health_scores: Dict[str, float] = {}
+        self.sampler = get_host_sampler()
+        self.health_engine: Optional[HealthCheckEngine] = None
 
         # 健康阈值配置
         self.thresholds = {
@@ -70,6 +73,7 @@ class HealthIntelligence:
 
         if core_services:
             self.system_manager = core_services.get("system_manager")
+            self.health_engine = core_services.get("health_engine")
 
         logger.info("健康智能监控器启动完成")
 
@@ -124,61 +128,58 @@ class HealthIntelligence:
         metrics = {}
 
         try:
+            # 所有指标取自共享采样器的同一份快照
+            snapshot = self.sampler.latest()
+            timestamp = datetime.utcfromtimestamp(snapshot.timestamp)
+
             # CPU 使用率
-            cpu_percent = await self._get_cpu_usage_intelligent()
             metrics["cpu_usage"] = HealthMetric(
                 name="cpu_usage",
-                value=cpu_percent,
+                value=snapshot.cpu_percent,
                 unit="percent",
                 threshold_warning=self.thresholds["cpu_usage"]["warning"],
                 threshold_critical=self.thresholds["cpu_usage"]["critical"],
-                timestamp=datetime.utcnow(),
+                timestamp=timestamp,
             )
 
             # 内存使用率
-            memory = psutil.virtual_memory()
             metrics["memory_usage"] = HealthMetric(
                 name="memory_usage",
-                value=memory.percent,
+                value=snapshot.memory_percent,
                 unit="percent",
                 threshold_warning=self.thresholds["memory_usage"]["warning"],
                 threshold_critical=self.thresholds["memory_usage"]["critical"],
-                timestamp=datetime.utcnow(),
+                timestamp=timestamp,
             )
 
             # 磁盘使用率
-            disk = psutil.disk_usage("/")
-            disk_percent = (disk.used / disk.total) * 100
             metrics["disk_usage"] = HealthMetric(
                 name="disk_usage",
-                value=disk_percent,
+                value=snapshot.disk_percent,
                 unit="percent",
                 threshold_warning=self.thresholds["disk_usage"]["warning"],
                 threshold_critical=self.thresholds["disk_usage"]["critical"],
-                timestamp=datetime.utcnow(),
+                timestamp=timestamp,
             )
 
-            # 系统负载（仅Linux/Mac）
-            if hasattr(psutil, "getloadavg"):
-                load_avg = psutil.getloadavg()
-                metrics["system_load"] = HealthMetric(
-                    name="system_load",
-                    value=load_avg[0],  # 1分钟平均负载
-                    unit="load",
-                    threshold_warning=psutil.cpu_count() * 0.7,
-                    threshold_critical=psutil.cpu_count() * 1.5,
-                    timestamp=datetime.utcnow(),
-                )
+            # 系统负载（1分钟平均负载）
+            metrics["system_load"] = HealthMetric(
+                name="system_load",
+                value=snapshot.load_avg[0],
+                unit="load",
+                threshold_warning=snapshot.cpu_count_logical * 0.7,
+                threshold_critical=snapshot.cpu_count_logical * 1.5,
+                timestamp=timestamp,
+            )
 
             # 网络连接数
-            connections = len(psutil.net_connections())
             metrics["network_connections"] = HealthMetric(
                 name="network_connections",
-                value=connections,
+                value=snapshot.connection_count,
                 unit="count",
                 threshold_warning=1000,
                 threshold_critical=5000,
-                timestamp=datetime.utcnow(),
+                timestamp=timestamp,
             )
 
         except Exception as e:
@@ -187,14 +188,9 @@ class HealthIntelligence:
         return metrics
 
     async def _get_cpu_usage_intelligent(self) -> float:
-        """智能获取CPU使用率"""
+        """智能获取CPU使用率（共享采样器，无阻塞采样）"""
         try:
-            # 使用非阻塞方式获取CPU使用率
-            loop = asyncio.get_event_loop()
-            cpu_percent = await loop.run_in_executor(
-                None, lambda: psutil.cpu_percent(interval=0.5)
-            )
-            return cpu_percent
+            return self.sampler.latest().cpu_percent
         except Exception as e:
             logger.error(f"获取CPU使用率失败: {str(e)}")
             return 0.0
@@ -411,6 +407,17 @@ class HealthIntelligence:
         """获取各组件健康状态"""
         components_health = {}
 
+        # 有健康检查引擎时直接读取其推送维护的状态，不再逐个模块轮询
+        if self.health_engine is not None and self.health_engine.services:
+            for service_name, state in self.health_engine.snapshot().items():
+                components_health[service_name] = {
+                    "status": state["status"],
+                    "response_time": state["last_latency"] or 0,
+                    "last_check": state["last_probe_at"] or "",
+                    "passive": state["passive"],
+                }
+            return components_health
+
         if self.system_manager:
             try:
                 modules_health = await self.system_manager.get_modules_health()
@@ -0,0 +1,580 @@
+"""
+事件驱动健康检查引擎
+负责所有服务的主动探测、被动信号汇总和健康事件推送
+对应需求: 8.5/8.6 - 健康自适应、自动恢复
+
+- 所有服务共用一个调度循环：到期的探测并发执行（限流 + 单次探测超时）
+- 探测方式：协程/函数、HTTP（共享 httpx 连接池）、TCP 建连
+- 自适应间隔：持续健康时逐步拉长，失败或抖动（短时间内频繁切换状态）时缩到最短
+- 被动信号：网关等调用方上报的请求成败与延迟计入健康证据；
+  近期有成功流量时跳过主动探测，错误率超标时立即补一次探测
+- 状态变化推送给订阅者（回调或队列），调度器、自动恢复、健康分析不再各自轮询
+- 每个服务登记一个恢复负责方（recovery_owner），事件中携带该字段，只有负责方执行恢复
+- 订阅按 owner 登记，release(owner) 只撤销该使用方的订阅与服务，最后一个使用方退出时才停止引擎
+"""
+
+import asyncio
+import heapq
+import inspect
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from . import logger
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - 仅在未安装 httpx 时不支持 HTTP 探测
+    httpx = None
+
+UNKNOWN = "unknown"
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+UNHEALTHY = "unhealthy"
+
+ProbeTarget = Union[Callable[[], Any], str, Tuple[str, int]]
+
+
+@dataclass
+class HealthEvent:
+    """健康状态变化事件"""
+
+    service: str
+    previous_status: str
+    status: str
+    reason: str
+    timestamp: float
+    state: Dict[str, Any]
+    recovery_owner: Optional[str] = None
+
+
+@dataclass
+class ServiceHealthState:
+    """单个服务的健康状态"""
+
+    name: str
+    target: ProbeTarget
+    timeout: float
+    interval: float
+    recovery_owner: Optional[str] = None
+    status: str = UNKNOWN
+    consecutive_successes: int = 0
+    consecutive_failures: int = 0
+    next_probe_at: float = 0.0
+    last_probe_at: Optional[float] = None
+    last_latency: Optional[float] = None
+    last_error: Optional[str] = None
+    probes_sent: int = 0
+    probes_skipped: int = 0
+    transitions: Deque[float] = field(default_factory=lambda: deque(maxlen=16))
+    passive: Deque[Tuple[float, bool, float]] = field(default_factory=lambda: deque(maxlen=512))
+    last_passive_success: Optional[float] = None
+    passive_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def healthy(self) -> bool:
+        return self.status == HEALTHY
+
+    def add_passive(self, now: float, success: bool, latency: float):
+        """记录一次被动信号（网关线程与事件循环线程并发访问，需加锁）"""
+        with self.passive_lock:
+            self.passive.append((now, success, latency))
+            if success:
+                self.last_passive_success = now
+
+    def passive_stats(self, window: float, now: float) -> Dict[str, float]:
+        with self.passive_lock:
+            while self.passive and self.passive[0][0] < now - window:
+                self.passive.popleft()
+            total = len(self.passive)
+            if not total:
+                return {"requests": 0, "error_rate": 0.0, "avg_latency": 0.0}
+            errors = sum(1 for _, ok, _ in self.passive if not ok)
+            latency = sum(latency for _, _, latency in self.passive)
+        return {
+            "requests": total,
+            "error_rate": errors / total,
+            "avg_latency": latency / total,
+        }
+
+    def to_dict(self, passive_window: float = 60.0) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "service": self.name,
+            "recovery_owner": self.recovery_owner,
+            "status": self.status,
+            "healthy": self.healthy,
+            "interval": self.interval,
+            "consecutive_failures": self.consecutive_failures,
+            "last_probe_at": self.last_probe_at,
+            "last_latency": self.last_latency,
+            "last_error": self.last_error,
+            "probes_sent": self.probes_sent,
+            "probes_skipped": self.probes_skipped,
+            "passive": self.passive_stats(passive_window, now),
+            "timestamp": now,
+        }
+
+
+class HealthCheckEngine:
+    """
+    健康检查引擎
+
+    Args:
+        max_concurrency: 同时进行的探测数上限
+        base_interval: 新服务/恢复后的探测间隔（秒）
+        min_interval: 失败或抖动时的探测间隔
+        max_interval: 持续健康时的最长探测间隔
+        failure_threshold: 连续失败多少次判定为不健康（之前为降级）
+        flap_threshold: flap_window 内状态切换达到该次数视为抖动
+        passive_window: 被动信号统计窗口（秒）
+        passive_error_rate: 被动错误率超过该值时判定降级并立即探测
+        passive_min_requests: 被动信号参与判定的最少请求数
+        latency_threshold: 被动平均延迟超过该值（秒）时判定降级
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        base_interval: float = 10.0,
+        min_interval: float = 1.0,
+        max_interval: float = 120.0,
+        failure_threshold: int = 2,
+        flap_threshold: int = 4,
+        flap_window: float = 300.0,
+        passive_window: float = 60.0,
+        passive_error_rate: float = 0.5,
+        passive_min_requests: int = 10,
+        latency_threshold: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.failure_threshold = failure_threshold
+        self.flap_threshold = flap_threshold
+        self.flap_window = flap_window
+        self.passive_window = passive_window
+        self.passive_error_rate = passive_error_rate
+        self.passive_min_requests = passive_min_requests
+        self.latency_threshold = latency_threshold
+
+        self.services: Dict[str, ServiceHealthState] = {}
+        self._schedule: List[Tuple[float, str]] = []
+        self._subscribers: List[Tuple[Callable[[HealthEvent], Any], Optional[str]]] = []
+        self._callback_tasks: Set[asyncio.Task] = set()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._http_client = None
+        self._running = False
+
+    # ========== 注册与订阅 ==========
+
+    def register(
+        self,
+        name: str,
+        target: ProbeTarget,
+        timeout: float = 3.0,
+        interval: Optional[float] = None,
+        recovery_owner: Optional[str] = None,
+    ):
+        """
+        注册服务探测
+
+        Args:
+            name: 服务名称
+            target: 探测目标：返回 bool/健康字典的函数或协程函数、http(s) URL、(host, port)
+            timeout: 单次探测超时（秒）
+            interval: 初始探测间隔，默认 base_interval
+            recovery_owner: 负责该服务恢复的使用方；为空时由通用自动恢复处理
+        """
+        state = ServiceHealthState(
+            name=name,
+            target=target,
+            timeout=timeout,
+            interval=interval or self.base_interval,
+            recovery_owner=recovery_owner,
+        )
+        self.services[name] = state
+        self._reschedule(state, time.time())
+
+    def unregister(self, name: str):
+        self.services.pop(name, None)
+        task = self._inflight.pop(name, None)
+        if task:
+            task.cancel()
+
+    def recovery_owner(self, name: str) -> Optional[str]:
+        state = self.services.get(name)
+        return state.recovery_owner if state else None
+
+    def subscribe(
+        self, callback: Callable[[HealthEvent], Any], owner: Optional[str] = None
+    ) -> Callable[[], None]:
+        """订阅状态变化事件（同步或异步回调），返回取消订阅函数"""
+        entry = (callback, owner)
+        self._subscribers.append(entry)
+
+        def unsubscribe():
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    async def release(self, owner: str):
+        """
+        撤销某个使用方的订阅与其登记恢复的服务
+
+        其他使用方仍在使用时引擎继续运行；没有任何订阅者和服务时才停止。
+        """
+        self._subscribers = [entry for entry in self._subscribers if entry[1] != owner]
+        for name in [n for n, s in self.services.items() if s.recovery_owner == owner]:
+            self.unregister(name)
+        if not self._subscribers and not self.services:
+            await self.stop()
+
+    def subscribe_queue(self, maxsize: int = 1000, owner: Optional[str] = None) -> asyncio.Queue:
+        """以队列形式订阅事件（队列满时丢弃最旧事件）"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+        def put(event: HealthEvent):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+        self.subscribe(put, owner)
+        return queue
+
+    # ========== 生命周期 ==========
+
+    async def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info(f"健康检查引擎启动: {len(self.services)} 个服务")
+
+    async def stop(self):
+        self._running = False
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._inflight:
+            await asyncio.gather(*self._inflight.values(), return_exceptions=True)
+        self._inflight.clear()
+        if self._callback_tasks:
+            await asyncio.gather(*self._callback_tasks, return_exceptions=True)
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        logger.info("健康检查引擎已停止")
+
+    # ========== 查询接口 ==========
+
+    async def check_now(self, name: str) -> Dict[str, Any]:
+        """立即探测（同一服务的并发请求合并为一次探测）"""
+        if name not in self.services:
+            return {"service": name, "status": UNKNOWN, "healthy": False, "error": "未注册"}
+        task = self._inflight.get(name)
+        if task is None:
+            task = self._launch(name)
+        await asyncio.shield(task)
+        return self.services[name].to_dict(self.passive_window)
+
+    async def check_service_health(self, name: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """获取服务健康状态；结果比 max_age 更旧（或从未探测）时先探测"""
+        state = self.services.get(name)
+        if state is None:
+            return {"service": name, "status": UNKNOWN, "healthy": False, "error": "未注册"}
+        max_age = state.interval if max_age is None else max_age
+        if state.last_probe_at is None or time.time() - state.last_probe_at > max_age:
+            return await self.check_now(name)
+        return state.to_dict(self.passive_window)
+
+    def get_state(self, name: str) -> Optional[Dict[str, Any]]:
+        state = self.services.get(name)
+        return state.to_dict(self.passive_window) if state else None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: state.to_dict(self.passive_window) for name, state in self.services.items()}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        states = list(self.services.values())
+        return {
+            "services": len(states),
+            "by_status": {
+                status: sum(1 for s in states if s.status == status)
+                for status in (HEALTHY, DEGRADED, UNHEALTHY, UNKNOWN)
+            },
+            "probes_sent": sum(s.probes_sent for s in states),
+            "probes_skipped": sum(s.probes_skipped for s in states),
+            "inflight": len(self._inflight),
+            "subscribers": len(self._subscribers),
+            "pending_callbacks": len(self._callback_tasks),
+        }
+
+    # ========== 被动信号 ==========
+
+    def record_request(self, name: str, success: bool, latency: float = 0.0):
+        """
+        上报一次真实请求的结果（网关/调用方被动信号）
+
+        成功流量可替代主动探测；错误率或延迟超标时标记降级并立即补一次探测。
+        可在事件循环线程外调用。
+        """
+        state = self.services.get(name)
+        if state is None:
+            return
+        now = time.time()
+        state.add_passive(now, success, latency)
+
+        stats = state.passive_stats(self.passive_window, now)
+        if stats["requests"] < self.passive_min_requests:
+            return
+        too_slow = self.latency_threshold is not None and stats["avg_latency"] > self.latency_threshold
+        if stats["error_rate"] >= self.passive_error_rate or too_slow:
+            reason = (
+                f"被动错误率 {stats['error_rate']:.0%}"
+                if not too_slow
+                else f"被动平均延迟 {stats['avg_latency']:.2f}s"
+            )
+            self._call_in_loop(self._on_passive_degradation, name, reason)
+
+    def _on_passive_degradation(self, name: str, reason: str):
+        state = self.services.get(name)
+        if state is None:
+            return
+        if state.status == HEALTHY or state.status == UNKNOWN:
+            self._set_status(state, DEGRADED, reason)
+        # 立即补一次主动探测确认
+        state.interval = self.min_interval
+        self._reschedule(state, time.time(), delay=0.0)
+
+    def _call_in_loop(self, func: Callable, *args):
+        loop = self._loop_task.get_loop() if self._loop_task else None
+        if loop is None or not loop.is_running():
+            func(*args)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            func(*args)
+        else:
+            loop.call_soon_threadsafe(func, *args)
+
+    # ========== 调度循环 ==========
+
+    def _reschedule(self, state: ServiceHealthState, now: float, delay: Optional[float] = None):
+        state.next_probe_at = now + (state.interval if delay is None else delay)
+        heapq.heappush(self._schedule, (state.next_probe_at, state.name))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while self._running:
+            try:
+                now = time.time()
+                while self._schedule and self._schedule[0][0] <= now:
+                    due_at, name = heapq.heappop(self._schedule)
+                    state = self.services.get(name)
+                    # 过期条目（服务已注销或已重新排期）直接丢弃
+                    if state is None or due_at != state.next_probe_at or name in self._inflight:
+                        continue
+                    if self._fresh_passive_evidence(state, now):
+                        state.probes_skipped += 1
+                        self._reschedule(state, now)
+                        continue
+                    self._launch(name)
+
+                timeout = self._schedule[0][0] - time.time() if self._schedule else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"健康检查调度循环异常: {str(e)}")
+                await asyncio.sleep(1)
+
+    def _fresh_passive_evidence(self, state: ServiceHealthState, now: float) -> bool:
+        """健康服务在一个探测周期内有成功的真实流量且错误率正常时，可跳过主动探测"""
+        if state.status != HEALTHY or state.last_passive_success is None:
+            return False
+        if now - state.last_passive_success > state.interval:
+            return False
+        stats = state.passive_stats(self.passive_window, now)
+        return stats["error_rate"] < self.passive_error_rate
+
+    def _launch(self, name: str) -> asyncio.Task:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        task = asyncio.create_task(self._probe(name))
+        self._inflight[name] = task
+        task.add_done_callback(lambda _t, n=name: self._inflight.pop(n, None))
+        return task
+
+    async def _probe(self, name: str):
+        state = self.services.get(name)
+        if state is None:
+            return
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with asyncio.timeout(state.timeout):
+                    healthy, detail = await self._execute_probe(state.target)
+            except asyncio.TimeoutError:
+                healthy, detail = False, f"探测超时 (> {state.timeout} 秒)"
+            except Exception as e:
+                healthy, detail = False, str(e)
+            latency = time.perf_counter() - started
+
+        now = time.time()
+        state.probes_sent += 1
+        state.last_probe_at = now
+        state.last_latency = latency
+        state.last_error = None if healthy else detail
+        self._apply_probe_result(state, healthy, detail, now)
+        if name in self.services:
+            self._reschedule(state, now)
+
+    async def _execute_probe(self, target: ProbeTarget) -> Tuple[bool, Optional[str]]:
+        if isinstance(target, str):
+            return await self._http_probe(target)
+        if isinstance(target, tuple):
+            host, port = target
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            await writer.wait_closed()
+            return True, None
+
+        result = target()
+        if inspect.isawaitable(result):
+            result = await result
+        if isinstance(result, dict):
+            healthy = bool(result.get("healthy", result.get("status") == HEALTHY))
+            return healthy, None if healthy else str(result.get("error") or result.get("status"))
+        return bool(result), None if result else "健康检查未通过"
+
+    async def _http_probe(self, url: str) -> Tuple[bool, Optional[str]]:
+        if httpx is None:
+            raise RuntimeError("HTTP 探测需要安装 httpx")
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                timeout=httpx.Timeout(self.max_interval),
+            )
+        response = await self._http_client.get(url)
+        if response.status_code < 400:
+            return True, None
+        return False, f"HTTP {response.status_code}"
+
+    # ========== 状态判定 ==========
+
+    def _apply_probe_result(
+        self, state: ServiceHealthState, healthy: bool, detail: Optional[str], now: float
+    ):
+        if healthy:
+            state.consecutive_successes += 1
+            state.consecutive_failures = 0
+            new_status = HEALTHY
+        else:
+            state.consecutive_failures += 1
+            state.consecutive_successes = 0
+            new_status = (
+                UNHEALTHY if state.consecutive_failures >= self.failure_threshold else DEGRADED
+            )
+
+        changed = new_status != state.status
+        if changed:
+            self._set_status(state, new_status, detail or "探测通过")
+
+        # 自适应间隔：抖动或失败时最短；刚恢复回到基准；持续健康时逐步拉长
+        flapping = sum(1 for t in state.transitions if t >= now - self.flap_window) >= self.flap_threshold
+        if not healthy or flapping:
+            state.interval = self.min_interval
+        elif changed:
+            state.interval = self.base_interval
+        else:
+            state.interval = min(state.interval * 1.5, self.max_interval)
+
+    def _set_status(self, state: ServiceHealthState, status: str, reason: str):
+        previous = state.status
+        if previous == status:
+            return
+        state.status = status
+        now = time.time()
+        if previous != UNKNOWN:
+            state.transitions.append(now)
+        logger.info(f"服务健康状态变化 {state.name}: {previous} -> {status} ({reason})")
+        self._publish(
+            HealthEvent(
+                service=state.name,
+                previous_status=previous,
+                status=status,
+                reason=reason,
+                timestamp=now,
+                state=state.to_dict(self.passive_window),
+                recovery_owner=state.recovery_owner,
+            )
+        )
+
+    def _publish(self, event: HealthEvent):
+        for callback, _owner in list(self._subscribers):
+            try:
+                result = callback(event)
+                if inspect.isawaitable(result):
+                    # 保留任务引用，避免被回收；stop() 时等待其结束
+                    task = asyncio.ensure_future(result)
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._on_callback_done)
+            except Exception as e:
+                logger.error(f"健康事件订阅者处理失败: {str(e)}")
+
+    def _on_callback_done(self, task: asyncio.Task):
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"健康事件订阅者处理失败: {task.exception()}")
+
+
+_engine: Optional[HealthCheckEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_health_engine(**kwargs) -> HealthCheckEngine:
+    """获取进程内共享的健康检查引擎"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = HealthCheckEngine(**kwargs)
+        return _engine
+
+
+__all__ = [
+    "HealthCheckEngine",
+    "HealthEvent",
+    "ServiceHealthState",
+    "get_health_engine",
+    "HEALTHY",
+    "DEGRADED",
+    "UNHEALTHY",
+    "UNKNOWN",
+]
@@ -10,7 +10,7 @@ import time
 import uuid
 from collections import defaultdict, deque
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
 
 from . import (
     DependencyType,
@@ -20,6 +20,20 @@ from . import (
     ServiceStatus,
     logger,
 )
+from .dag_startup_executor import (
+    DAGStartupExecutor,
+    DAGStartupReport,
+    ServiceStartRecord,
+    build_service_graph,
+)
+from .health_check_engine import (
+    DEGRADED,
+    HEALTHY,
+    UNHEALTHY,
+    HealthCheckEngine,
+    HealthEvent,
+    get_health_engine,
+)
 
 
 @dataclass
@@ -51,9 +65,18 @@ class IntelligentServiceScheduler:
     实现基于资源感知、依赖分析和优先级的多维度调度
     """
 
-    def __init__(self, resource_manager=None, health_monitor=None):
+    def __init__(
+        self,
+        resource_manager=None,
+        health_monitor=None,
+        dependency_intelligence=None,
+        health_engine: Optional[HealthCheckEngine] = None,
+    ):
         self.resource_manager = resource_manager
         self.health_monitor = health_monitor
+        self.dependency_intelligence = dependency_intelligence
+        self.health_engine = health_engine or get_health_engine()
+        self._restart_tasks: Dict[str, asyncio.Task] = {}
         self.services: Dict[str, ScheduledService] = {}
         self.service_graph: Dict[str, Set[str]] = defaultdict(set)  # 依赖图
         self.reverse_dependencies: Dict[str, Set[str]] = defaultdict(set)  # 反向依赖
@@ -62,6 +85,8 @@ class IntelligentServiceScheduler:
         self.scheduling_lock = asyncio.Lock()
         self.is_running = False
         self.scheduler_id = f"scheduler-{uuid.uuid4().hex[:8]}"
+        self.startup_durations: Dict[str, float] = {}  # 最近一次实测启动耗时
+        self.last_startup_report: Optional[DAGStartupReport] = None
 
         # 调度策略配置
         self.scheduling_strategies = {
@@ -77,6 +102,8 @@ class IntelligentServiceScheduler:
             "resource_threshold": 0.8,  # 资源使用率阈值
             "health_check_frequency": 30,  # 健康检查频率(秒)
             "priority_recalc_interval": 60,  # 优先级重计算间隔(秒)
+            "readiness_poll_interval": 0.05,  # 就绪探测初始间隔(秒)，逐次翻倍
+            "readiness_poll_max_interval": 1.0,  # 就绪探测最大间隔(秒)
         }
 
         logger.info(f"智能服务调度器初始化完成: {self.scheduler_id}")
@@ -86,8 +113,11 @@ class IntelligentServiceScheduler:
         logger.info("开始初始化智能服务调度器")
         self.is_running = True
 
+        # 健康检查由共享引擎统一调度，状态变化通过事件推送（按调度器 ID 登记，关闭时只撤销自己的订阅）
+        self.health_engine.subscribe(self._on_health_event, owner=self.scheduler_id)
+        await self.health_engine.start()
+
         # 启动后台任务
-        asyncio.create_task(self._health_monitoring_loop())
         asyncio.create_task(self._priority_recalculation_loop())
         asyncio.create_task(self._resource_optimization_loop())
 
@@ -146,16 +176,11 @@ class IntelligentServiceScheduler:
                 if service_name not in self.services:
                     raise ServiceStartupError(f"服务未注册: {service_name}")
 
-                # 解析依赖启动顺序
-                startup_sequence = await self._resolve_dependency_sequence(service_name)
-                logger.info(f"服务启动顺序解析完成: {startup_sequence}")
-
-                # 按顺序启动服务
-                for service_to_start in startup_sequence:
-                    if not await self._start_single_service(service_to_start):
-                        raise ServiceStartupError(
-                            f"依赖服务启动失败: {service_to_start}"
-                        )
+                # 目标服务及其依赖按 DAG 并发启动（已运行的依赖直接视为就绪）
+                report = await self.start_services([service_name])
+                if not report.records[service_name].succeeded:
+                    failed = report.failed or [service_name]
+                    raise ServiceStartupError(f"依赖服务启动失败: {failed}")
 
                 logger.info(f"服务启动完成: {service_name}")
                 return True
@@ -175,30 +200,16 @@ class IntelligentServiceScheduler:
         results = {}
 
         try:
-            # 计算全局启动顺序
-            global_sequence = await self._calculate_global_startup_sequence()
-            logger.info(f"全局启动顺序计算完成: {global_sequence}")
-
-            # 使用混合调度策略启动服务
-            scheduled_sequence = await self.scheduling_strategies["hybrid"](
-                global_sequence
+            # 依赖就绪即启动，并发数受资源自适应参数限制
+            report = await self.start_services()
+            results = {
+                name: record.succeeded for name, record in report.records.items()
+            }
+
+            logger.info(
+                f"所有服务启动完成，关键路径: {' -> '.join(report.critical_path)} "
+                f"({report.critical_path_seconds:.2f} 秒)"
             )
-
-            # 并发启动（受资源限制）
-            semaphore = asyncio.Semaphore(
-                self.adaptive_params["max_concurrent_startups"]
-            )
-
-            async def start_with_limits(service_name):
-                async with semaphore:
-                    results[service_name] = await self._start_single_service(
-                        service_name
-                    )
-
-            tasks = [start_with_limits(service) for service in scheduled_sequence]
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-            logger.info("所有服务启动完成")
             return results
 
         except Exception as e:
@@ -209,6 +220,45 @@ class IntelligentServiceScheduler:
                     results[service_name] = False
             return results
 
+    async def start_services(
+        self,
+        services: Optional[Iterable[str]] = None,
+        before_start: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_complete: Optional[Callable[[ServiceStartRecord], Awaitable[None]]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ) -> DAGStartupReport:
+        """
+        按依赖图并发启动服务（就绪队列调度）
+
+        Args:
+            services: 目标服务（自动包含其传递依赖），默认全部服务
+            before_start: 每个服务启动前的钩子（暂停/中止检查）
+            on_complete: 每个服务结束后的回调
+            timeouts: 各服务的启动超时（秒），默认使用 ServiceInfo.startup_timeout
+
+        Returns:
+            DAGStartupReport: 启动结果与关键路径
+        """
+        graph = await self._get_dependency_graph()
+        if timeouts is None:
+            timeouts = {
+                name: service.info.startup_timeout
+                for name, service in self.services.items()
+            }
+
+        executor = DAGStartupExecutor(
+            graph,
+            self._start_if_needed,
+            max_concurrency=self.adaptive_params["max_concurrent_startups"],
+            timeouts=timeouts,
+            estimates=self.startup_durations,
+            before_start=before_start,
+            on_complete=on_complete,
+        )
+        report = await executor.run(services)
+        self.last_startup_report = report
+        return report
+
     async def stop_service(self, service_name: str, force: bool = False) -> bool:
         """
         停止服务（考虑依赖关系）
@@ -299,6 +349,10 @@ class IntelligentServiceScheduler:
             "avg_startup_time": await self._calculate_average_startup_time(),
             "success_rate": await self._calculate_success_rate(),
             "resource_efficiency": await self._calculate_resource_efficiency(),
+            "health": self.health_engine.get_statistics(),
+            "last_startup": (
+                self.last_startup_report.to_dict() if self.last_startup_report else None
+            ),
         }
 
     # ========== 调度策略实现 ==========
@@ -403,25 +457,17 @@ class IntelligentServiceScheduler:
 
     # ========== 核心调度逻辑 ==========
 
-    async def _resolve_dependency_sequence(self, target_service: str) -> List[str]:
-        """解析服务依赖启动顺序"""
-        visited = set()
-        sequence = []
+    async def _get_dependency_graph(self):
+        """依赖图：优先使用 DependencyIntelligence 维护的 NetworkX 图"""
+        if self.dependency_intelligence is not None:
+            return await self.dependency_intelligence.get_startup_graph()
+        return build_service_graph(self.services)
 
-        async def dfs(service_name):
-            if service_name in visited:
-                return
-            visited.add(service_name)
-
-            # 先启动依赖服务
-            for dependency in self.services[service_name].info.dependencies:
-                if dependency.dependency_type != DependencyType.WEAK:
-                    await dfs(dependency.service_name)
-
-            sequence.append(service_name)
-
-        await dfs(target_service)
-        return sequence
+    async def _start_if_needed(self, service_name: str) -> bool:
+        """已运行的服务直接视为就绪，其余执行启动"""
+        if self.services[service_name].status == ServiceStatus.RUNNING:
+            return True
+        return await self._start_single_service(service_name)
 
     async def _calculate_global_startup_sequence(self) -> List[str]:
         """计算全局启动顺序"""
@@ -448,12 +494,16 @@ class IntelligentServiceScheduler:
                 else:
                     service.instance.start()
 
-            # 验证服务健康状态
-            if not await self._verify_service_health(service_name):
+            # 就绪探测：在启动超时内轮询健康状态
+            if not await self._wait_until_ready(
+                service_name, service.info.startup_timeout
+            ):
                 raise ServiceStartupError("服务启动后健康检查失败")
 
             # 更新状态
             service.status = ServiceStatus.RUNNING
+            self.startup_durations[service_name] = time.time() - service.startup_time
+            self._register_health_probe(service_name)
             service.restart_attempts = 0
             service.last_error = None
 
@@ -473,7 +523,7 @@ class IntelligentServiceScheduler:
                 and service.restart_attempts < service.info.max_restart_attempts
             ):
                 logger.info(f"准备自动重启服务: {service_name}")
-                asyncio.create_task(self._schedule_service_restart(service_name))
+                self._spawn_restart(service_name)
 
             return False
 
@@ -483,6 +533,7 @@ class IntelligentServiceScheduler:
 
         try:
             service.status = ServiceStatus.STOPPING
+            self.health_engine.unregister(service_name)
 
             # 执行服务停止
             if hasattr(service.instance, "stop"):
@@ -548,28 +599,80 @@ class IntelligentServiceScheduler:
 
     # ========== 健康监控 ==========
 
-    async def _health_monitoring_loop(self):
-        """健康监控循环"""
-        while self.is_running:
-            try:
-                for service_name, service in self.services.items():
-                    if service.status == ServiceStatus.RUNNING:
-                        is_healthy = await self._verify_service_health(service_name)
-                        if not is_healthy:
-                            service.status = ServiceStatus.DEGRADED
-                            logger.warning(f"服务健康状态异常: {service_name}")
+    def _register_health_probe(self, service_name: str):
+        """服务运行后加入健康检查引擎（按服务配置的检查间隔起步），由本调度器负责其恢复"""
+        service = self.services[service_name]
+        self.health_engine.register(
+            service_name,
+            lambda: self._verify_service_health(service_name),
+            timeout=min(10.0, float(service.info.startup_timeout)),
+            interval=service.info.health_check_interval
+            or self.adaptive_params["health_check_frequency"],
+            recovery_owner=self.scheduler_id,
+        )
 
-                            # 触发自动恢复
-                            if service.info.auto_restart:
-                                asyncio.create_task(
-                                    self._schedule_service_restart(service_name)
-                                )
+    async def _on_health_event(self, event: HealthEvent):
+        """健康状态变化：降级标记、恢复运行、不健康时触发自动重启"""
+        if event.recovery_owner != self.scheduler_id:
+            return
+        service = self.services.get(event.service)
+        if service is None or service.status not in (
+            ServiceStatus.RUNNING,
+            ServiceStatus.DEGRADED,
+        ):
+            return
+
+        if event.status == HEALTHY:
+            service.status = ServiceStatus.RUNNING
+            return
+
+        if event.status in (DEGRADED, UNHEALTHY):
+            service.status = ServiceStatus.DEGRADED
+            service.last_error = event.reason
+            logger.warning(f"服务健康状态异常: {event.service} ({event.reason})")
+
+        # 连续探测失败后触发自动恢复
+        if event.status == UNHEALTHY and service.info.auto_restart:
+            self._spawn_restart(event.service)
+
+    def _spawn_restart(self, service_name: str) -> asyncio.Task:
+        """同一服务同时只保留一个待执行的重启任务"""
+        task = self._restart_tasks.get(service_name)
+        if task is None or task.done():
+            task = asyncio.create_task(self._schedule_service_restart(service_name))
+            self._restart_tasks[service_name] = task
+            task.add_done_callback(
+                lambda t, n=service_name: self._restart_tasks.pop(n, None)
+                if self._restart_tasks.get(n) is t
+                else None
+            )
+        return task
 
-                await asyncio.sleep(self.adaptive_params["health_check_frequency"])
+    def record_service_request(
+        self, service_name: str, success: bool, latency: float = 0.0
+    ):
+        """
+        上报服务的真实请求结果（网关等调用方的被动健康信号）
 
-            except Exception as e:
-                logger.error(f"健康监控循环异常: {str(e)}")
-                await asyncio.sleep(10)  # 异常时短暂等待
+        Args:
+            service_name: 服务名称
+            success: 请求是否成功
+            latency: 请求耗时（秒）
+        """
+        self.health_engine.record_request(service_name, success, latency)
+
+    async def _wait_until_ready(self, service_name: str, timeout: float) -> bool:
+        """就绪探测：健康检查通过即返回，未通过则指数退避重试直到超时"""
+        deadline = time.monotonic() + timeout
+        interval = self.adaptive_params["readiness_poll_interval"]
+        while True:
+            if await self._verify_service_health(service_name):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.adaptive_params["readiness_poll_max_interval"])
 
     async def _verify_service_health(self, service_name: str) -> bool:
         """验证服务健康状态"""
@@ -757,12 +860,7 @@ class IntelligentServiceScheduler:
 
     async def _calculate_average_startup_time(self) -> float:
         """计算平均启动时间"""
-        startup_times = []
-        for service in self.services.values():
-            if service.startup_time and service.status == ServiceStatus.RUNNING:
-                # 这里需要实际的计算逻辑
-                startup_times.append(10.0)  # 示例值
-
+        startup_times = list(self.startup_durations.values())
         return sum(startup_times) / len(startup_times) if startup_times else 0.0
 
     async def _calculate_success_rate(self) -> float:
@@ -788,6 +886,15 @@ class IntelligentServiceScheduler:
         for service_name in list(self.services.keys()):
             await self.stop_service(service_name, force=True)
 
+        for task in list(self._restart_tasks.values()):
+            task.cancel()
+        if self._restart_tasks:
+            await asyncio.gather(*self._restart_tasks.values(), return_exceptions=True)
+        self._restart_tasks.clear()
+
+        # 只撤销本调度器的订阅和服务，其他使用方仍可继续使用共享引擎
+        await self.health_engine.release(self.scheduler_id)
+
         logger.info("智能服务调度器关闭完成")
 
 
@@ -10,6 +10,7 @@ from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional
 
 from . import ServiceStartupError, ServiceStatus, logger
+from .dag_startup_executor import DAGStartupReport, ServiceStartRecord
 
 
 @dataclass
@@ -62,6 +63,10 @@ class StartupController:
         self.dependency_intelligence = dependency_intelligence
         self.resource_manager = resource_manager
 
+        # 调度器按 DependencyIntelligence 维护的依赖图做并发启动
+        if getattr(service_scheduler, "dependency_intelligence", False) is None:
+            service_scheduler.dependency_intelligence = dependency_intelligence
+
         self.startup_config: Optional[StartupConfig] = None
         self.current_progress: Optional[StartupProgress] = None
         self.phase_handlers: Dict[str, Callable] = {}
@@ -75,6 +80,7 @@ class StartupController:
 
         self.phase_start_times: Dict[str, float] = {}
         self.phase_metrics: Dict[str, Dict[str, Any]] = {}
+        self.last_startup_report: Optional[DAGStartupReport] = None
 
         # 启动策略
         self.startup_strategies = {
@@ -160,6 +166,11 @@ class StartupController:
                 "phases_completed": len(self.current_progress.completed_phases),
                 "services_started": await self._count_running_services(),
                 "metrics": self.phase_metrics,
+                "startup_report": (
+                    self.last_startup_report.to_dict()
+                    if self.last_startup_report
+                    else None
+                ),
             }
 
         except Exception as e:
@@ -329,14 +340,7 @@ class StartupController:
 
         results = {}
         for phase in self.startup_config.phases:
-            # 等待暂停信号
-            if self.pause_event.is_set():
-                await self.resume_event.wait()
-                self.resume_event.clear()
-
-            # 检查停止信号
-            if self.shutdown_event.is_set():
-                raise ServiceStartupError("启动流程被中止")
+            await self._wait_if_paused_or_stopped()
 
             phase_result = await self._execute_phase_conservative(phase)
             results[phase.name] = phase_result
@@ -349,35 +353,96 @@ class StartupController:
         return results
 
     async def _balanced_startup(self) -> Dict[str, Any]:
-        """平衡启动策略"""
+        """
+        平衡启动策略
+
+        所有阶段的服务放到同一张依赖图上按就绪队列并发启动：服务的依赖就绪后立即启动，
+        不再等待整组阶段完成；阶段仅用于进度统计和超时配置。
+        """
         logger.info("执行平衡启动策略")
 
-        # 识别可以并行执行的阶段
-        parallel_groups = await self._identify_parallel_phases()
-        results = {}
+        phase_of: Dict[str, StartupPhase] = {}
+        timeouts: Dict[str, float] = {}
+        for phase in self.startup_config.phases:
+            for service_name in phase.services:
+                phase_of[service_name] = phase
+                timeouts[service_name] = phase.timeout
+        unfinished = {
+            phase.name: set(phase.services) for phase in self.startup_config.phases
+        }
+        outcomes: Dict[str, Dict[str, bool]] = {
+            phase.name: {} for phase in self.startup_config.phases
+        }
+        results: Dict[str, Any] = {}
+
+        async def before_start(service_name: str):
+            await self._wait_if_paused_or_stopped()
+            phase = phase_of.get(service_name)
+            if phase:
+                self.phase_start_times.setdefault(phase.name, time.time())
+                self.current_progress.current_phase = phase.name
+
+        async def on_complete(record: ServiceStartRecord):
+            phase = phase_of.get(record.name)
+            if not phase:
+                return
+            outcomes[phase.name][record.name] = record.succeeded
+            unfinished[phase.name].discard(record.name)
+            if not unfinished[phase.name]:
+                results[phase.name] = self._finish_phase(phase, outcomes[phase.name])
+
+        report = await self.service_scheduler.start_services(
+            list(phase_of),
+            before_start=before_start,
+            on_complete=on_complete,
+            timeouts=timeouts,
+        )
+        self.last_startup_report = report
 
-        for group in parallel_groups:
-            # 等待暂停信号
-            if self.pause_event.is_set():
-                await self.resume_event.wait()
-                self.resume_event.clear()
+        # 没有服务的阶段直接视为完成
+        for phase in self.startup_config.phases:
+            if phase.name not in results:
+                results[phase.name] = self._finish_phase(phase, outcomes[phase.name])
 
-            # 检查停止信号
-            if self.shutdown_event.is_set():
-                raise ServiceStartupError("启动流程被中止")
+        failed_phases = [
+            name for name, result in results.items() if not result["success"]
+        ]
+        if failed_phases:
+            raise ServiceStartupError(f"阶段启动失败: {failed_phases}")
 
-            # 并行执行阶段组
-            group_results = await self._execute_phase_group_parallel(group)
-            results.update(group_results)
+        return results
 
-            # 检查组内失败
-            failed_phases = [
-                name for name, result in group_results.items() if not result["success"]
-            ]
-            if failed_phases:
-                raise ServiceStartupError(f"并行阶段组启动失败: {failed_phases}")
+    def _finish_phase(
+        self, phase: StartupPhase, outcomes: Dict[str, bool]
+    ) -> Dict[str, Any]:
+        """阶段内所有服务结束后记录阶段指标并更新进度"""
+        started_at = self.phase_start_times.setdefault(phase.name, time.time())
+        phase_time = time.time() - started_at
+        successful = sum(1 for ok in outcomes.values() if ok)
+        success_rate = successful / len(outcomes) if outcomes else 1.0
+        success = success_rate >= 0.8  # 80%服务运行即认为阶段完成
+
+        self.phase_metrics[phase.name] = {
+            "success": success,
+            "duration": phase_time,
+            "services_started": successful,
+            "success_rate": success_rate,
+            "completed_at" if success else "failed_at": time.time(),
+        }
+        if success:
+            self.current_progress.completed_phases.append(phase.name)
+            if phase.name in self.current_progress.pending_phases:
+                self.current_progress.pending_phases.remove(phase.name)
+            logger.info(f"阶段执行完成: {phase.name}, 耗时: {phase_time:.2f} 秒")
+        else:
+            logger.error(f"阶段执行失败 {phase.name}: 成功率 {success_rate:.0%}")
 
-        return results
+        return {
+            "success": success,
+            "duration": phase_time,
+            "success_rate": success_rate,
+            "service_results": outcomes,
+        }
 
     async def _aggressive_startup(self) -> Dict[str, Any]:
         """激进启动策略"""
@@ -392,14 +457,7 @@ class StartupController:
 
         results = {}
         for group in phase_groups:
-            # 等待暂停信号
-            if self.pause_event.is_set():
-                await self.resume_event.wait()
-                self.resume_event.clear()
-
-            # 检查停止信号
-            if self.shutdown_event.is_set():
-                raise ServiceStartupError("启动流程被中止")
+            await self._wait_if_paused_or_stopped()
 
             # 并行执行阶段组
             group_results = await self._execute_phase_group_parallel(
@@ -421,6 +479,15 @@ class StartupController:
 
     # ========== 阶段执行逻辑 ==========
 
+    async def _wait_if_paused_or_stopped(self):
+        """暂停时等待恢复；收到停止信号时中止启动"""
+        if self.pause_event.is_set():
+            await self.resume_event.wait()
+            self.resume_event.clear()
+
+        if self.shutdown_event.is_set():
+            raise ServiceStartupError("启动流程被中止")
+
     async def _execute_phase_conservative(self, phase: StartupPhase) -> Dict[str, Any]:
         """保守执行单个阶段"""
         logger.info(f"开始执行阶段: {phase.name}")
@@ -642,7 +709,7 @@ class StartupController:
                 name=f"phase_{service_name}",
                 description=f"启动服务 {service_name}",
                 services=[service_name],
-                dependencies=phases[-1].name if phases else [],
+                dependencies=[phases[-1].name] if phases else [],
                 timeout=60,
             )
             phases.append(phase)
@@ -667,7 +734,7 @@ class StartupController:
                     name=f"phase_{len(phases)+1}",
                     description=f"启动服务组 {len(phases)+1}",
                     services=current_group.copy(),
-                    dependencies=phases[-1].name if phases else [],
+                    dependencies=[phases[-1].name] if phases else [],
                     timeout=120,
                 )
                 phases.append(phase)
@@ -679,7 +746,7 @@ class StartupController:
                 name=f"phase_{len(phases)+1}",
                 description=f"启动最终服务组",
                 services=current_group,
-                dependencies=phases[-1].name if phases else [],
+                dependencies=[phases[-1].name] if phases else [],
                 timeout=120,
             )
             phases.append(phase)
@@ -701,34 +768,6 @@ class StartupController:
             )
         ]
 
-    async def _identify_parallel_phases(self) -> List[List[StartupPhase]]:
-        """识别可以并行执行的阶段"""
-        parallel_groups = []
-        remaining_phases = self.startup_config.phases.copy()
-
-        while remaining_phases:
-            # 找到没有前置依赖或前置依赖已完成的阶段
-            executable_phases = []
-            for phase in remaining_phases:
-                if not phase.dependencies or all(
-                    dep in [p.name for p in self.current_progress.completed_phases]
-                    for dep in phase.dependencies
-                ):
-                    executable_phases.append(phase)
-
-            if not executable_phases:
-                break
-
-            # 分组并行执行
-            group = executable_phases[: self.startup_config.parallel_phase_limit]
-            parallel_groups.append(group)
-
-            # 移除已分组的阶段
-            for phase in group:
-                remaining_phases.remove(phase)
-
-        return parallel_groups
-
     # ========== 进度跟踪和管理 ==========
 
     async def _initialize_progress_tracking(self):
@@ -778,8 +817,10 @@ class StartupController:
                 running_services = sum(
                     1
                     for service_name in phase_services
-                    if self.service_scheduler.services.get(service_name, {}).get(
-                        "status"
+                    if getattr(
+                        self.service_scheduler.services.get(service_name),
+                        "status",
+                        None,
                     )
                     == ServiceStatus.RUNNING
                 )
@@ -884,6 +925,13 @@ class StartupController:
             "services_started": await self._count_running_services(),
             "completed_at": time.time(),
         }
+        if self.last_startup_report:
+            self.phase_metrics["startup_overall"].update(
+                {
+                    "critical_path": self.last_startup_report.critical_path,
+                    "critical_path_seconds": self.last_startup_report.critical_path_seconds,
+                }
+            )
 
     async def _check_service_scheduler(self) -> Dict[str, Any]:
         """检查服务调度器"""
@@ -0,0 +1,137 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import networkx as nx
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scheduler import DependencyType
+from scheduler.dag_startup_executor import DAGStartupExecutor, critical_path, startup_dag
+
+REQUIRED, OPTIONAL, WEAK = DependencyType.REQUIRED, DependencyType.OPTIONAL, DependencyType.WEAK
+
+
+def _graph(edges, nodes=()):
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes)
+    for source, target, kind in edges:
+        graph.add_edge(source, target, dependency_type=kind)
+    return graph
+
+
+class FakeServices:
+    """按预设耗时启动服务，记录启动/结束事件与并发峰值"""
+
+    def __init__(self, durations, failures=()):
+        self.durations = durations
+        self.failures = set(failures)
+        self.events = []
+        self.running = 0
+        self.peak = 0
+
+    async def start(self, name):
+        self.events.append(("start", name))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.durations.get(name, 0.01))
+        finally:
+            self.running -= 1
+        self.events.append(("done", name))
+        return name not in self.failures
+
+    def index(self, kind, name):
+        return self.events.index((kind, name))
+
+
+@pytest.mark.asyncio
+async def test_services_start_after_their_dependencies_without_waves():
+    # db -> api -> web ；cache（慢）-> worker
+    graph = _graph([("db", "api", REQUIRED), ("api", "web", REQUIRED), ("cache", "worker", REQUIRED)])
+    services = FakeServices({"db": 0.01, "api": 0.01, "web": 0.01, "cache": 0.2, "worker": 0.01})
+    report = await DAGStartupExecutor(graph, services.start, max_concurrency=4).run()
+
+    assert report.success
+    for dep, svc in graph.edges:
+        assert services.index("done", dep) < services.index("start", svc)
+    # 不按波次等待：web 在慢服务 cache 结束前就已完成
+    assert services.index("done", "web") < services.index("done", "cache")
+    assert report.total_time < 0.3
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_and_longest_path_first():
+    graph = _graph([("a", "a2", REQUIRED)], nodes=["a", "b", "c"])
+    services = FakeServices({"a": 0.02, "a2": 0.02, "b": 0.02, "c": 0.02})
+    executor = DAGStartupExecutor(graph, services.start, max_concurrency=1, estimates={"a": 1, "a2": 5})
+    report = await executor.run()
+    assert services.peak == 1
+    assert report.start_order[0] == "a"  # 下游最长的链优先
+
+
+@pytest.mark.asyncio
+async def test_required_failure_skips_downstream_optional_does_not():
+    graph = _graph([
+        ("db", "api", REQUIRED),
+        ("api", "web", REQUIRED),
+        ("metrics", "api2", OPTIONAL),
+    ])
+    services = FakeServices({}, failures={"db", "metrics"})
+    report = await DAGStartupExecutor(graph, services.start, max_concurrency=4).run()
+
+    assert set(report.failed) == {"db", "metrics"}
+    assert set(report.skipped) == {"api", "web"}
+    assert "api2" in report.started
+    assert ("start", "api") not in services.events
+    assert report.records["web"].error.endswith("api")
+
+
+@pytest.mark.asyncio
+async def test_timeouts_fail_the_service():
+    graph = _graph([("slow", "after", REQUIRED)])
+    services = FakeServices({"slow": 1.0})
+    report = await DAGStartupExecutor(graph, services.start, timeouts={"slow": 0.05}).run()
+    assert report.failed == ["slow"]
+    assert report.skipped == ["after"]
+    assert "超时" in report.records["slow"].error
+
+
+@pytest.mark.asyncio
+async def test_targets_include_only_non_weak_ancestors():
+    graph = _graph([("db", "api", REQUIRED), ("logs", "api", WEAK), ("other", "x", REQUIRED)])
+    services = FakeServices({})
+    report = await DAGStartupExecutor(graph, services.start).run(targets=["api"])
+    assert set(report.records) == {"db", "api"}
+
+
+def test_weak_edges_are_dropped_and_cycles_become_chains():
+    graph = _graph([("a", "b", REQUIRED), ("b", "a", REQUIRED), ("b", "c", WEAK)])
+    dag = startup_dag(graph)
+    assert nx.is_directed_acyclic_graph(dag)
+    assert not dag.has_edge("b", "c")
+    assert dag.number_of_edges() == 1
+
+
+def test_critical_path_uses_measured_durations():
+    dag = _graph([("db", "api", REQUIRED), ("api", "web", REQUIRED), ("cache", "web", REQUIRED)])
+    path, length = critical_path(dag, {"db": 1.0, "api": 2.0, "cache": 5.0, "web": 1.0})
+    assert path == ["cache", "web"]
+    assert length == 6.0
+
+    path, length = critical_path(dag, {"db": 3.0, "api": 3.0, "cache": 1.0, "web": 1.0})
+    assert path == ["db", "api", "web"]
+    assert length == 7.0
+
+
+@pytest.mark.asyncio
+async def test_report_critical_path_matches_wall_time():
+    graph = _graph([("db", "api", REQUIRED), ("cache", "api", REQUIRED)])
+    services = FakeServices({"db": 0.1, "cache": 0.02, "api": 0.05})
+    report = await DAGStartupExecutor(graph, services.start, max_concurrency=4).run()
+    assert report.critical_path == ["db", "api"]
+    assert report.critical_path_seconds == pytest.approx(report.total_time, abs=0.05)
+    assert report.to_dict()["parallel_speedup"] > 1.0
@@ -0,0 +1,186 @@
+import asyncio
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scheduler import ServiceInfo, ServiceStatus
+from scheduler.health_check_engine import DEGRADED, HEALTHY, UNHEALTHY, HealthCheckEngine
+
+
+def _load(filename, module_name):
+    """按文件加载连字符命名的模块"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, PROJECT_ROOT / "scheduler" / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+scheduler_module = _load("intelligent-service-scheduler.py", "scheduler.intelligent_service_scheduler")
+recovery_module = _load("auto-recovery.py", "scheduler.auto_recovery")
+
+
+def _engine(**kwargs):
+    kwargs.setdefault("base_interval", 0.01)
+    kwargs.setdefault("min_interval", 0.01)
+    return HealthCheckEngine(failure_threshold=2, **kwargs)
+
+
+async def _wait_for(predicate, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "条件未在超时内满足"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_failures_go_degraded_then_unhealthy_and_recover():
+    engine = _engine()
+    healthy = {"value": True}
+    events = []
+    engine.subscribe(lambda e: events.append((e.previous_status, e.status)))
+    engine.register("svc", lambda: healthy["value"])
+    await engine.start()
+    try:
+        await _wait_for(lambda: engine.services["svc"].status == HEALTHY)
+        healthy["value"] = False
+        await _wait_for(lambda: engine.services["svc"].status == UNHEALTHY)
+        healthy["value"] = True
+        await _wait_for(lambda: engine.services["svc"].status == HEALTHY)
+    finally:
+        await engine.stop()
+    assert events[:4] == [("unknown", HEALTHY), (HEALTHY, DEGRADED), (DEGRADED, UNHEALTHY), (UNHEALTHY, HEALTHY)]
+
+
+@pytest.mark.asyncio
+async def test_only_the_recovery_owner_acts_on_unhealthy_services():
+    engine = _engine()
+    scheduler = scheduler_module.IntelligentServiceScheduler(health_engine=engine)
+    recovery = recovery_module.AutoRecovery()
+    recovery.attach_health_engine(engine)
+    recovered = []
+
+    async def fake_recovery(issue):
+        recovered.append(issue["service"])
+        return {"success": True, "actions_executed": []}
+
+    recovery._execute_recovery = fake_recovery
+    restarts = []
+    scheduler._spawn_restart = restarts.append
+    engine.subscribe(scheduler._on_health_event, owner=scheduler.scheduler_id)
+
+    scheduler.services["managed"] = scheduler_module.ScheduledService(
+        info=ServiceInfo(name="managed", version="1", description="", dependencies=[]),
+        status=ServiceStatus.RUNNING,
+        instance=object(),
+    )
+    engine.register("managed", lambda: False, recovery_owner=scheduler.scheduler_id)
+    engine.register("standalone", lambda: False)
+
+    await engine.start()
+    try:
+        await _wait_for(lambda: restarts and recovered)
+        await asyncio.sleep(0.05)
+    finally:
+        await engine.stop()
+
+    assert set(restarts) == {"managed"}
+    assert set(recovered) == {"standalone"}
+    issues = await recovery._check_service_health()
+    assert [issue["service"] for issue in issues] == ["standalone"]
+
+
+@pytest.mark.asyncio
+async def test_release_only_drops_the_owners_subscriptions_and_services():
+    engine = _engine()
+    a_events, b_events = [], []
+    engine.subscribe(a_events.append, owner="a")
+    engine.subscribe(b_events.append, owner="b")
+    engine.register("a-svc", lambda: True, recovery_owner="a")
+    engine.register("b-svc", lambda: True, recovery_owner="b")
+    await engine.start()
+
+    await engine.release("a")
+    assert engine._running
+    assert set(engine.services) == {"b-svc"}
+    assert engine.get_statistics()["subscribers"] == 1
+
+    await _wait_for(lambda: b_events)
+    assert not a_events
+
+    await engine.release("b")
+    assert not engine._running
+
+
+@pytest.mark.asyncio
+async def test_scheduler_shutdown_keeps_shared_engine_for_other_owners():
+    engine = _engine()
+    other = []
+    engine.subscribe(other.append, owner="auto-recovery")
+    engine.register("other", lambda: True)
+    scheduler = scheduler_module.IntelligentServiceScheduler(health_engine=engine)
+    engine.subscribe(scheduler._on_health_event, owner=scheduler.scheduler_id)
+    await engine.start()
+
+    await scheduler.shutdown()
+    assert engine._running
+    assert engine.get_statistics()["subscribers"] == 1
+    await engine.stop()
+
+
+@pytest.mark.asyncio
+async def test_async_subscriber_tasks_are_tracked_until_done():
+    engine = _engine()
+    release = asyncio.Event()
+    seen = []
+
+    async def slow(event):
+        await release.wait()
+        seen.append(event.status)
+
+    engine.subscribe(slow)
+    engine.register("svc", lambda: True)
+    await engine.start()
+    await _wait_for(lambda: engine.get_statistics()["pending_callbacks"] == 1)
+    release.set()
+    await _wait_for(lambda: engine.get_statistics()["pending_callbacks"] == 0)
+    await engine.stop()
+    assert seen == [HEALTHY]
+
+
+def test_record_request_is_safe_across_threads():
+    engine = HealthCheckEngine(passive_min_requests=10**9)
+    engine.register("svc", lambda: True)
+    state = engine.services["svc"]
+    errors = []
+
+    def report():
+        try:
+            for i in range(5000):
+                engine.record_request("svc", i % 3 != 0, 0.01)
+        except Exception as e:  # pragma: no cover - 失败时记录
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(2000):
+                state.passive_stats(engine.passive_window, 0.0)
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=report) for _ in range(3)] + [threading.Thread(target=read)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(state.passive) == 512
@@ -0,0 +1,141 @@
+import asyncio
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from resource_manager import host_metrics_sampler as hms
+from resource_manager.host_metrics_sampler import HostMetricsSampler, SharedHostMetricsReader
+
+
+def _write_proc(root: Path, cpu=(100, 0, 100, 800, 0, 0, 0, 0), rx=1000, tx=2000, connections=2):
+    (root / "net").mkdir(parents=True, exist_ok=True)
+    user, nice, system, idle, *rest = cpu
+    (root / "stat").write_text(
+        "cpu  " + " ".join(map(str, cpu)) + "\n"
+        + "cpu0 " + " ".join(map(str, cpu)) + "\n"
+        + "intr 0\n"
+    )
+    (root / "meminfo").write_text(
+        "MemTotal:       1000 kB\nMemFree:         100 kB\nMemAvailable:    250 kB\n"
+        "SwapTotal:       400 kB\nSwapFree:        300 kB\n"
+    )
+    (root / "loadavg").write_text("0.50 0.40 0.30 1/100 42\n")
+    header = "Inter-|   Receive\n face |bytes packets errs drop fifo frame compressed multicast|bytes\n"
+    (root / "net" / "dev").write_text(
+        header
+        + f"  eth0: {rx} 10 0 0 0 0 0 0 {tx} 20 0 0 0 0 0 0\n"
+        + "    lo: 999 1 0 0 0 0 0 0 999 1 0 0 0 0 0 0\n"
+    )
+    (root / "diskstats").write_text("   8       0 sda 10 0 4 0 20 0 8 0 0 0 0\n")
+    (root / "net" / "tcp").write_text("header\n" + "conn\n" * connections)
+    for name in ("tcp6", "udp", "udp6"):
+        (root / "net" / name).write_text("header\n")
+
+
+@pytest.fixture
+def fake_proc(tmp_path, monkeypatch):
+    monkeypatch.setattr(hms, "PROC_ROOT", str(tmp_path))
+    _write_proc(tmp_path)
+    return tmp_path
+
+
+def _sampler(**kwargs):
+    sampler = HostMetricsSampler(**kwargs)
+    sampler._block_devices = ["sda"]
+    return sampler
+
+
+def test_snapshot_is_derived_from_proc_deltas(fake_proc):
+    sampler = _sampler(interval=60)
+    first = sampler.sample_now()
+    assert sampler.get_statistics()["source"] == "proc"
+    assert first.cpu_percent == 0.0  # 首次采样没有差值
+    assert first.memory_total == 1000 * 1024
+    assert first.memory_used == 750 * 1024
+    assert first.memory_percent == pytest.approx(75.0)
+    assert first.swap_percent == pytest.approx(25.0)
+    assert first.load_avg == (0.5, 0.4, 0.3)
+    assert first.net_io["bytes_recv"] == 1000  # 不含 lo
+    assert first.disk_io == {"read_count": 10, "write_count": 20, "read_bytes": 4 * 512, "write_bytes": 8 * 512}
+    assert first.connection_count == 2
+
+    # 100 个时钟周期中 idle 增加 25 => 75% 繁忙
+    _write_proc(fake_proc, cpu=(150, 0, 125, 825, 0, 0, 0, 0), rx=3000, tx=6000)
+    second = sampler.sample_now()
+    assert second.cpu_percent == pytest.approx(75.0)
+    assert second.per_cpu_percent == [pytest.approx(75.0)]
+    assert second.net_recv_rate > 0 and second.net_send_rate > second.net_recv_rate
+
+
+def test_slow_metrics_are_refreshed_every_n_samples(fake_proc):
+    sampler = _sampler(interval=60, slow_every=3)
+    assert sampler.sample_now().connection_count == 2  # 第一次总是采集
+
+    _write_proc(fake_proc, connections=7)
+    assert sampler.sample_now().connection_count == 2  # seq 2 使用缓存
+    assert sampler.sample_now().connection_count == 7  # seq 3 刷新
+
+
+def test_history_is_a_bounded_ring_buffer(fake_proc):
+    sampler = _sampler(interval=60, capacity=3)
+    for _ in range(5):
+        sampler.sample_now()
+    assert [s.seq for s in sampler.history()] == [3, 4, 5]
+    assert sampler.latest().seq == 5  # 新鲜快照直接复用
+    assert sampler.latest(max_age=-1).seq == 6  # 过期时就地采集
+
+
+def test_sampling_thread_follows_consumer_refcount(fake_proc):
+    sampler = _sampler(interval=0.01)
+    sampler.acquire()
+    sampler.acquire()
+    assert sampler.running
+    sampler.release()
+    assert sampler.running  # 仍有一个使用方
+    sampler.release()
+    assert not sampler.running
+    assert sampler.get_statistics()["consumers"] == 0
+    assert sampler.get_statistics()["samples"] > 0
+
+
+def test_listeners_run_for_each_sample(fake_proc):
+    sampler = _sampler(interval=60)
+    seen = []
+    sampler.add_listener(lambda s: seen.append(s.seq))
+    sampler.sample_now()
+    sampler.add_listener(lambda s: 1 / 0)  # 回调异常不影响采样
+    sampler.sample_now()
+    assert seen == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_next_snapshot_is_resolved_from_the_sampling_thread(fake_proc):
+    sampler = _sampler(interval=60)
+    waiter = asyncio.ensure_future(sampler.next_snapshot(timeout=2))
+    await asyncio.sleep(0)
+    threading.Thread(target=sampler.sample_now).start()
+    snapshot = await waiter
+    assert snapshot.seq == 1
+    assert not sampler._waiters
+
+
+def test_shared_memory_publish_and_read(fake_proc):
+    name = f"hms_test_{uuid.uuid4().hex[:8]}"
+    sampler = _sampler(interval=60, shared_memory_name=name)
+    sampler.sample_now()
+    reader = SharedHostMetricsReader(name)
+    try:
+        values = reader.read()
+        assert values["memory_percent"] == pytest.approx(75.0)
+        assert values["connection_count"] == 2.0
+        assert values["load_1"] == 0.5
+    finally:
+        reader.close()
+        sampler._close_shared_memory()
@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from resource_manager.metric_timeseries_store import MetricFrame, MetricTimeSeriesStore
+
+HOUR = 3600.0
+DAY = 86400.0
+
+
+def _fill(store, start, end, step, module="svc"):
+    for ts in np.arange(start, end, step):
+        store.record(module, {"cpu": float(ts % 100), "status": "ok"}, timestamp=float(ts))
+
+
+def test_frame_ring_buffer_and_expire():
+    frame = MetricFrame(4)
+    for i in range(6):
+        frame.append(float(i), {"v": float(i)})
+    assert len(frame) == 4
+    assert frame.first_timestamp == 2.0
+    assert list(frame.tail("v", 10)) == [2.0, 3.0, 4.0, 5.0]
+    assert frame.count_since(3.5) == 2
+    assert frame.expire(4.0) == 2
+    assert list(frame.window("v")[1]) == [4.0, 5.0]
+
+
+def test_tiers_keep_their_own_retention():
+    store = MetricTimeSeriesStore(
+        capacity=10_000,
+        tiers=((60, 10_000), (3600, 10_000, 30 * DAY)),
+        retention_seconds=HOUR,
+    )
+    now = 3 * DAY
+    _fill(store, 0, now, 60)
+
+    store.expire(now=now)
+    raw = store.frame("svc")
+    minute = store.frame("svc", 60)
+    hour = store.frame("svc", 3600)
+    assert raw.first_timestamp >= now - HOUR
+    # 分钟层未显式配置保留期：容量跨度（约 7 天）覆盖全部数据，不随原始帧一起过期
+    assert minute.first_timestamp == 0.0
+    assert hour.first_timestamp == 0.0
+
+    # 降采样层仍能回答原始帧已不覆盖的窗口
+    ts, values = store.window("svc", "cpu", seconds=2 * DAY, now=now)
+    assert ts[0] <= now - 2 * DAY + 60
+    assert len(values) > 0
+
+
+def test_explicit_cutoff_only_applies_to_raw_frame():
+    store = MetricTimeSeriesStore(capacity=1000, tiers=((60, 100, 2 * HOUR),))
+    now = 4 * HOUR
+    _fill(store, 0, now, 30)
+
+    store.expire(now - 10 * 60, now=now)
+    assert store.frame("svc").first_timestamp >= now - 10 * 60
+    tier = store.frame("svc", 60)
+    assert tier.first_timestamp >= now - 2 * HOUR
+    assert tier.first_timestamp < now - HOUR
+
+
+def test_tier_retention_defaults_to_at_least_raw_retention():
+    store = MetricTimeSeriesStore(capacity=100, tiers=((60, 10),), retention_seconds=DAY)
+    store.record("svc", {"cpu": 1.0}, timestamp=0.0)
+    assert store._series["svc"].tiers[0].retention_seconds == DAY
+
+
+def test_aggregate_uses_downsample_tier_for_long_windows():
+    store = MetricTimeSeriesStore(capacity=60, tiers=((60, 1000),))
+    now = 2 * HOUR
+    _fill(store, 0, now, 10)
+    summary = store.aggregate("svc", "cpu", seconds=HOUR, now=now)
+    assert summary["count"] == pytest.approx(60, abs=1)
+    assert store.latest("svc")["status"] == "ok"
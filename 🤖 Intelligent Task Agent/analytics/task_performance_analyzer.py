@@ -4,8 +4,9 @@
 """
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
 import statistics
+import time
 
 
 class TaskPerformanceAnalyzer:
@@ -16,6 +17,10 @@ class TaskPerformanceAnalyzer:
         self.task_metrics = []
         self.bottleneck_records = []
         self.efficiency_trends = {}
+        
+        # 执行指标：任务完成时间（吞吐量）与各步骤耗时（延迟分布）
+        self.task_completions = deque(maxlen=10000)
+        self.step_latencies = defaultdict(lambda: deque(maxlen=1000))
     
     def analyze_task_efficiency(
         self,
@@ -456,6 +461,89 @@ class TaskPerformanceAnalyzer:
             "estimated_total_improvement": sum(o["estimated_improvement"] for o in opportunities)
         }
     
+    def record_execution(
+        self,
+        task_id: str,
+        execution: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        记录一次任务执行的吞吐量与步骤延迟，并生成效率与瓶颈分析
+        
+        Args:
+            task_id: 任务ID
+            execution: {
+                "status": 任务状态,
+                "duration": 实际耗时（秒）,
+                "planned_duration": 计划耗时（秒，可选）,
+                "steps": [{"step_id", "name", "status", "duration"（秒）, "resumed"}],
+                "errors": [{"type", "message"}]
+            }
+        
+        Returns:
+            效率分析报告
+        """
+        now = time.time()
+        self.task_completions.append((now, execution.get("status")))
+        
+        steps = execution.get("steps", [])
+        for step in steps:
+            if not step.get("resumed") and step.get("duration") is not None:
+                self.step_latencies[step.get("name") or step.get("step_id")].append(step["duration"])
+        
+        # 效率分析以分钟为单位
+        to_minutes = lambda seconds: round((seconds or 0) / 60, 4)
+        analysis = self.analyze_task_efficiency(task_id, {
+            "planned_duration": to_minutes(execution.get("planned_duration")),
+            "actual_duration": to_minutes(execution.get("duration")),
+            "steps": [
+                dict(step, duration=to_minutes(step.get("duration")))
+                for step in steps
+            ]
+        })
+        self.identify_bottlenecks(task_id, {
+            "steps": steps,
+            "errors": execution.get("errors", [])
+        })
+        return analysis
+    
+    def get_execution_metrics(self, window_seconds: int = 3600) -> Dict[str, Any]:
+        """
+        获取执行指标：窗口内吞吐量与各步骤延迟分位数
+        
+        Args:
+            window_seconds: 吞吐量统计窗口（秒）
+        
+        Returns:
+            执行指标
+        """
+        since = time.time() - window_seconds
+        recent = [status for timestamp, status in self.task_completions if timestamp >= since]
+        
+        step_metrics = {}
+        for name, latencies in self.step_latencies.items():
+            values = sorted(latencies)
+            if not values:
+                continue
+            step_metrics[name] = {
+                "count": len(values),
+                "avg_seconds": round(statistics.mean(values), 4),
+                "p50_seconds": round(values[len(values) // 2], 4),
+                "p95_seconds": round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+                "max_seconds": round(values[-1], 4)
+            }
+        
+        return {
+            "success": True,
+            "window_seconds": window_seconds,
+            "throughput": {
+                "tasks": len(recent),
+                "tasks_per_minute": round(len(recent) / (window_seconds / 60), 4),
+                "completed": sum(1 for status in recent if status == "已完成"),
+                "failed": sum(1 for status in recent if status == "执行失败")
+            },
+            "step_latency": step_metrics
+        }
+    
     def _calculate_performance_grade(
         self,
         efficiency_ratio: float,
@@ -1,15 +1,28 @@
 """
 高级任务执行器
 - 任务自动分解
-- 并行执行
+- 并行执行（步骤依赖DAG，全局/按资源并发上限）
 - 依赖管理
 - 执行监控
+- 断点恢复（步骤结果SQLite检查点）
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 from datetime import datetime
+from pathlib import Path
 import asyncio
+import os
+import time
 from enum import Enum
 
+from analytics.task_performance_analyzer import TaskPerformanceAnalyzer, default_task_analyzer
+from execution.task_engine import StepDAGRunner, TaskCheckpointStore, TaskIndex
+
+# 检查点数据库默认位置（可通过环境变量覆盖）
+DEFAULT_DB_PATH = os.getenv(
+    "TASK_EXECUTOR_DB",
+    str(Path(__file__).resolve().parent.parent / "data" / "task_executor.db")
+)
+
 
 class TaskStatus(Enum):
     """任务状态"""
@@ -24,15 +37,70 @@ class TaskStatus(Enum):
 class AdvancedTaskExecutor:
     """高级任务执行器"""
     
-    def __init__(self):
-        # 任务队列
-        self.tasks = []
-        
-        # 正在执行的任务
-        self.running_tasks = {}
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        max_concurrent_tasks: int = 4,
+        max_concurrent_steps: int = 8,
+        resource_limits: Optional[Dict[str, int]] = None,
+        analyzer: Optional[TaskPerformanceAnalyzer] = None
+    ):
+        """
+        Args:
+            db_path: 检查点数据库路径（":memory:" 表示不落盘）
+            max_concurrent_tasks: 同时执行的任务数
+            max_concurrent_steps: 所有任务同时执行的步骤总数
+            resource_limits: 资源名 -> 同时使用该资源的步骤数
+            analyzer: 接收吞吐量与步骤延迟指标的性能分析器
+        """
+        # 任务索引（按ID、按状态）
+        self.index = TaskIndex()
         
         # 执行历史
         self.execution_history = []
+        
+        # 步骤执行器与并发控制
+        self.runner = StepDAGRunner(max_concurrent_steps, resource_limits)
+        self.max_concurrent_tasks = max(1, int(max_concurrent_tasks))
+        self._task_slots = asyncio.Semaphore(self.max_concurrent_tasks)
+        self._active: Dict[str, asyncio.Task] = {}
+        
+        # 步骤类型 -> 处理函数
+        self.step_handlers: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {}
+        
+        self.analyzer = analyzer or default_task_analyzer
+        self.store = TaskCheckpointStore(db_path)
+        self._next_task_number = 1
+        self._load_tasks()
+    
+    @property
+    def tasks(self) -> List[Dict[str, Any]]:
+        """任务列表（创建顺序）"""
+        return list(self.index)
+    
+    @property
+    def running_tasks(self) -> Dict[str, Dict[str, Any]]:
+        """正在执行的任务"""
+        return {t['task_id']: t for t in self.index.with_status(TaskStatus.RUNNING.value)}
+    
+    def _load_tasks(self):
+        """从检查点恢复任务；上次退出时仍在执行的任务标记为暂停，等待 resume_interrupted"""
+        for task in self.store.load_tasks():
+            if task['status'] == TaskStatus.RUNNING.value:
+                task['status'] = TaskStatus.PAUSED.value
+                task['interrupted'] = True
+            self.index.add(task)
+            number = task['task_id'][4:]
+            if number.isdigit():
+                self._next_task_number = max(self._next_task_number, int(number) + 1)
+    
+    def register_step_handler(
+        self,
+        step_type: str,
+        handler: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]]
+    ):
+        """注册步骤处理函数 handler(step, params) -> {"success": bool, ...}"""
+        self.step_handlers[step_type] = handler
     
     # ============ 任务创建 ============
     
@@ -44,9 +112,10 @@ class AdvancedTaskExecutor:
             task_data: {
                 "name": "任务名称",
                 "type": "任务类型",
-                "steps": [任务步骤],
+                "steps": [任务步骤，可用 depends_on 声明步骤依赖、resource 声明占用资源],
                 "dependencies": [依赖的任务ID],
                 "priority": "优先级（低/中/高/紧急）",
+                "parallel": 未声明依赖的步骤是否并行,
                 "auto_execute": True/False,
                 "params": {任务参数}
             }
@@ -55,7 +124,8 @@ class AdvancedTaskExecutor:
             任务信息
         """
         try:
-            task_id = f"TASK{len(self.tasks) + 1:04d}"
+            task_id = f"TASK{self._next_task_number:04d}"
+            self._next_task_number += 1
             
             task = {
                 "task_id": task_id,
@@ -64,6 +134,7 @@ class AdvancedTaskExecutor:
                 "steps": task_data.get('steps', []),
                 "dependencies": task_data.get('dependencies', []),
                 "priority": task_data.get('priority', '中'),
+                "parallel": task_data.get('parallel', False),
                 "auto_execute": task_data.get('auto_execute', False),
                 "params": task_data.get('params', {}),
                 "status": TaskStatus.PENDING.value,
@@ -76,11 +147,12 @@ class AdvancedTaskExecutor:
                 "error": None
             }
             
-            self.tasks.append(task)
+            self.index.add(task)
+            self.store.save_task(task)
             
             # 如果设置自动执行，加入执行队列
             if task['auto_execute']:
-                asyncio.create_task(self.execute_task(task_id))
+                self._spawn(task_id)
             
             return {
                 "success": True,
@@ -96,24 +168,42 @@ class AdvancedTaskExecutor:
     
     # ============ 任务执行 ============
     
+    def _spawn(self, task_id: str) -> asyncio.Task:
+        """在后台执行任务（同一任务只保留一个执行协程）"""
+        active = self._active.get(task_id)
+        if active is not None and not active.done():
+            return active
+        runner = asyncio.create_task(self._execute(task_id))
+        self._active[task_id] = runner
+        runner.add_done_callback(lambda _: self._active.pop(task_id, None) if self._active.get(task_id) is runner else None)
+        return runner
+    
     async def execute_task(self, task_id: str) -> Dict[str, Any]:
         """
         执行任务
         
+        步骤按依赖DAG并发执行；已有检查点的步骤直接复用结果，
+        暂停/取消后不再启动新步骤，恢复时从断点继续。
+        同一任务已在执行时等待该次执行的结果，不会重复执行。
+        
         Args:
             task_id: 任务ID
         
         Returns:
             执行结果
         """
+        # shield：调用方被取消时不影响共享的执行协程
+        return await asyncio.shield(self._spawn(task_id))
+    
+    async def _execute(self, task_id: str) -> Dict[str, Any]:
+        task = self._get_task(task_id)
+        if not task:
+            return {
+                "success": False,
+                "error": f"任务 {task_id} 不存在"
+            }
+        
         try:
-            task = self._get_task(task_id)
-            if not task:
-                return {
-                    "success": False,
-                    "error": f"任务 {task_id} 不存在"
-                }
-            
             # 检查依赖
             if not await self._check_dependencies(task):
                 return {
@@ -121,65 +211,150 @@ class AdvancedTaskExecutor:
                     "error": "任务依赖未满足"
                 }
             
-            # 更新状态
-            task['status'] = TaskStatus.RUNNING.value
-            task['start_time'] = datetime.now().isoformat()
-            self.running_tasks[task_id] = task
-            
-            # 执行步骤
-            step_results = []
-            for i, step in enumerate(task['steps']):
-                # 更新进度
-                task['progress'] = int((i / len(task['steps'])) * 100)
-                
-                # 执行步骤
-                step_result = await self._execute_step(step, task['params'])
-                step_results.append(step_result)
-                
-                if not step_result.get('success'):
-                    # 步骤失败
-                    task['status'] = TaskStatus.FAILED.value
-                    task['error'] = step_result.get('error')
-                    break
-            
-            # 完成
-            if task['status'] == TaskStatus.RUNNING.value:
-                task['status'] = TaskStatus.COMPLETED.value
-                task['progress'] = 100
-            
-            task['end_time'] = datetime.now().isoformat()
-            task['result'] = step_results
-            task['updated_at'] = datetime.now().isoformat()
-            
-            # 从运行列表移除
-            if task_id in self.running_tasks:
-                del self.running_tasks[task_id]
-            
-            # 记录历史
-            self.execution_history.append({
-                "task_id": task_id,
-                "name": task['name'],
-                "status": task['status'],
-                "start_time": task['start_time'],
-                "end_time": task['end_time'],
-                "duration": self._calculate_duration(task['start_time'], task['end_time'])
-            })
-            
-            return {
-                "success": task['status'] == TaskStatus.COMPLETED.value,
-                "task": task,
-                "message": f"任务执行{'成功' if task['status'] == TaskStatus.COMPLETED.value else '失败'}"
-            }
+            async with self._task_slots:
+                return await self._run_task(task)
         
         except Exception as e:
-            task['status'] = TaskStatus.FAILED.value
+            self.index.set_status(task, TaskStatus.FAILED.value)
             task['error'] = str(e)
+            task['end_time'] = datetime.now().isoformat()
+            await self._persist(task)
             
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    async def _persist(
+        self,
+        task: Dict[str, Any],
+        step: Optional[tuple] = None,
+        clear_steps: bool = False
+    ):
+        """在事件循环中生成快照，SQLite 写入交给线程执行"""
+        step_rows = [self.store.step_row(task['task_id'], *step)] if step else []
+        await asyncio.to_thread(
+            self.store.write,
+            [self.store.task_row(task)],
+            step_rows,
+            [task['task_id']] if clear_steps else [],
+        )
+    
+    async def _run_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        task_id = task['task_id']
+        
+        # 已完成的任务重新执行时从头开始，不复用上一轮的检查点
+        rerun = task['status'] == TaskStatus.COMPLETED.value
+        if rerun:
+            task['start_time'] = None
+            task['end_time'] = None
+            task['progress'] = 0
+        
+        # 更新状态
+        self.index.set_status(task, TaskStatus.RUNNING.value)
+        task.pop('interrupted', None)
+        task['start_time'] = task.get('start_time') or datetime.now().isoformat()
+        task['error'] = None
+        await self._persist(task, clear_steps=rerun)
+        
+        total_steps = len(task['steps'])
+        checkpoints = await asyncio.to_thread(self.store.load_steps, task_id)
+        finished = {'count': 0}
+        started = time.monotonic()
+        
+        async def on_step_done(step_id: str, result: Dict[str, Any]):
+            # 检查点与进度在同一事务中写入
+            if result.get('success'):
+                finished['count'] += 1
+                task['progress'] = int((len(checkpoints) + finished['count']) / total_steps * 100)
+            await self._persist(task, step=(step_id, result))
+        
+        async def run_step(step_id: str, step: Dict[str, Any]) -> Dict[str, Any]:
+            return await self._execute_step(step, task['params'])
+        
+        results = await self.runner.run(
+            task['steps'],
+            run_step,
+            completed=checkpoints,
+            parallel=task.get('parallel', False),
+            should_continue=lambda: task['status'] == TaskStatus.RUNNING.value,
+            on_step_done=on_step_done
+        )
+        step_results = list(results.values())
+        failed_steps = [r for r in step_results if not r.get('success')]
+        
+        task['result'] = step_results
+        task['updated_at'] = datetime.now().isoformat()
+        
+        if task['status'] != TaskStatus.RUNNING.value:
+            # 暂停或取消：已完成的步骤保留在检查点中
+            await self._persist(task)
+            return {
+                "success": False,
+                "task": task,
+                "message": f"任务{task['status']}，已完成 {len(step_results) - len(failed_steps)}/{total_steps} 个步骤"
+            }
+        
+        if failed_steps:
+            # 步骤失败
+            self.index.set_status(task, TaskStatus.FAILED.value)
+            task['error'] = failed_steps[0].get('error')
+        else:
+            # 完成
+            self.index.set_status(task, TaskStatus.COMPLETED.value)
+            task['progress'] = 100
+        
+        task['end_time'] = datetime.now().isoformat()
+        # 完成后清除检查点（失败时保留，重试从断点继续）
+        await self._persist(task, clear_steps=task['status'] == TaskStatus.COMPLETED.value)
+        duration = time.monotonic() - started
+        
+        # 记录历史
+        self.execution_history.append({
+            "task_id": task_id,
+            "name": task['name'],
+            "status": task['status'],
+            "start_time": task['start_time'],
+            "end_time": task['end_time'],
+            "duration": duration
+        })
+        
+        # 吞吐量与步骤延迟指标
+        self.analyzer.record_execution(task_id, {
+            "status": task['status'],
+            "duration": duration,
+            "planned_duration": task['params'].get('planned_duration'),
+            "steps": [
+                {
+                    "step_id": r['step_id'],
+                    "name": r.get('step_name'),
+                    "status": "completed" if r.get('success') else "failed",
+                    "duration": r.get('duration', 0),
+                    "resumed": r.get('resumed', False)
+                }
+                for r in step_results
+            ],
+            "errors": [{"type": r.get('step_name'), "message": r.get('error')} for r in failed_steps]
+        })
+        
+        return {
+            "success": task['status'] == TaskStatus.COMPLETED.value,
+            "task": task,
+            "message": f"任务执行{'成功' if task['status'] == TaskStatus.COMPLETED.value else '失败'}"
+        }
+    
+    async def resume_interrupted(self) -> Dict[str, Any]:
+        """恢复上次进程退出时中断的任务（从检查点继续）"""
+        interrupted = [t['task_id'] for t in self.index.with_status(TaskStatus.PAUSED.value) if t.get('interrupted')]
+        for task_id in interrupted:
+            self._spawn(task_id)
+        
+        return {
+            "success": True,
+            "resumed": interrupted,
+            "count": len(interrupted)
+        }
+    
     # ============ 任务监控 ============
     
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
@@ -203,10 +378,8 @@ class AdvancedTaskExecutor:
         priority: Optional[str] = None
     ) -> Dict[str, Any]:
         """获取任务列表"""
-        tasks = self.tasks
+        tasks = self.index.with_status(status) if status else self.tasks
         
-        if status:
-            tasks = [t for t in tasks if t['status'] == status]
         if priority:
             tasks = [t for t in tasks if t['priority'] == priority]
         
@@ -236,8 +409,9 @@ class AdvancedTaskExecutor:
         if task['status'] != TaskStatus.RUNNING.value:
             return {"success": False, "error": "任务未在运行"}
         
-        task['status'] = TaskStatus.PAUSED.value
-        task['updated_at'] = datetime.now().isoformat()
+        # 不再启动新步骤，正在执行的步骤完成后写入检查点
+        self.index.set_status(task, TaskStatus.PAUSED.value)
+        self.store.save_task(task)
         
         return {
             "success": True,
@@ -255,8 +429,14 @@ class AdvancedTaskExecutor:
         if task['status'] != TaskStatus.PAUSED.value:
             return {"success": False, "error": "任务未暂停"}
         
-        # 重新执行
-        asyncio.create_task(self.execute_task(task_id))
+        active = self._active.get(task_id)
+        if active is not None and not active.done():
+            # 执行协程仍在等待已启动的步骤，恢复状态即可继续调度
+            self.index.set_status(task, TaskStatus.RUNNING.value)
+            self.store.save_task(task)
+        else:
+            # 从检查点继续执行
+            self._spawn(task_id)
         
         return {
             "success": True,
@@ -270,13 +450,9 @@ class AdvancedTaskExecutor:
         if not task:
             return {"success": False, "error": "任务不存在"}
         
-        task['status'] = TaskStatus.CANCELLED.value
+        self.index.set_status(task, TaskStatus.CANCELLED.value)
         task['end_time'] = datetime.now().isoformat()
-        task['updated_at'] = datetime.now().isoformat()
-        
-        # 从运行列表移除
-        if task_id in self.running_tasks:
-            del self.running_tasks[task_id]
+        self.store.save_task(task)
         
         return {
             "success": True,
@@ -313,7 +489,8 @@ class AdvancedTaskExecutor:
                 "completed": completed,
                 "failed": failed,
                 "success_rate": (completed / total * 100) if total > 0 else 0,
-                "average_duration": float(avg_duration)
+                "average_duration": float(avg_duration),
+                "execution_metrics": self.analyzer.get_execution_metrics()
             }
         }
     
@@ -321,7 +498,7 @@ class AdvancedTaskExecutor:
     
     def _get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """获取任务"""
-        return next((t for t in self.tasks if t['task_id'] == task_id), None)
+        return self.index.get(task_id)
     
     async def _check_dependencies(self, task: Dict[str, Any]) -> bool:
         """检查任务依赖"""
@@ -337,8 +514,13 @@ class AdvancedTaskExecutor:
         step: Dict[str, Any],
         params: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """执行单个步骤"""
+        """执行单个步骤（按 step['type'] 查找处理函数，未注册时模拟执行）"""
         try:
+            handler = self.step_handlers.get(step.get('type'))
+            if handler is not None:
+                result = await handler(step, params)
+                return {"step_name": step.get('name', 'unknown'), **result}
+            
             # 模拟步骤执行
             await asyncio.sleep(0.5)
             
@@ -365,8 +547,23 @@ class AdvancedTaskExecutor:
             return 0.0
 
 
-# 全局实例
-task_executor = AdvancedTaskExecutor()
+# 全局实例（首次使用时创建，导入模块不读写检查点数据库）
+_task_executor: Optional[AdvancedTaskExecutor] = None
+
+
+def get_task_executor() -> AdvancedTaskExecutor:
+    """获取全局任务执行器"""
+    global _task_executor
+    if _task_executor is None:
+        _task_executor = AdvancedTaskExecutor()
+    return _task_executor
+
+
+def __getattr__(name: str):
+    # 兼容旧的 task_executor 模块属性
+    if name == "task_executor":
+        return get_task_executor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
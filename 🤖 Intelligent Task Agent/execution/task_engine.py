@@ -0,0 +1,399 @@
+"""
+任务引擎
+- 任务索引（按ID、按状态）
+- 步骤依赖DAG并发执行（全局/按资源并发上限）
+- 步骤结果SQLite检查点，中断后从断点恢复
+"""
+import asyncio
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class TaskIndex:
+    """任务索引：ID -> 任务，状态 -> 任务ID集合（保持创建顺序）"""
+
+    def __init__(self):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_status: Dict[str, Dict[str, None]] = {}
+
+    def add(self, task: Dict[str, Any]):
+        self.by_id[task['task_id']] = task
+        self.by_status.setdefault(task['status'], {})[task['task_id']] = None
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(task_id)
+
+    def set_status(self, task: Dict[str, Any], status: str):
+        """更新任务状态并同步状态索引"""
+        old = task['status']
+        if old == status:
+            return
+        bucket = self.by_status.get(old)
+        if bucket is not None:
+            bucket.pop(task['task_id'], None)
+            if not bucket:
+                del self.by_status[old]
+        task['status'] = status
+        task['updated_at'] = datetime.now().isoformat()
+        self.by_status.setdefault(status, {})[task['task_id']] = None
+
+    def with_status(self, status: str) -> List[Dict[str, Any]]:
+        return [self.by_id[task_id] for task_id in self.by_status.get(status, ())]
+
+    def count(self, status: str) -> int:
+        return len(self.by_status.get(status, ()))
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+
+class TaskCheckpointStore:
+    """
+    任务与步骤结果的SQLite检查点
+
+    每个步骤结束即写入一行，任务重新执行时跳过已成功的步骤；
+    连接在首次使用时创建，同一连接由锁保护，可在线程池中调用。
+    task_row/step_row 在事件循环中生成快照，write 可交给线程执行。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+                CREATE TABLE IF NOT EXISTS step_checkpoints (
+                    task_id TEXT NOT NULL,
+                    step_id TEXT NOT NULL,
+                    success INTEGER NOT NULL,
+                    result TEXT NOT NULL,
+                    finished_at TEXT NOT NULL,
+                    PRIMARY KEY (task_id, step_id)
+                );
+            """)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def task_row(task: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        """任务快照行（在调用方线程序列化，避免与事件循环中的修改并发）"""
+        return (task['task_id'], task['status'], json.dumps(task, ensure_ascii=False, default=str),
+                task.get('updated_at') or datetime.now().isoformat())
+
+    @staticmethod
+    def step_row(task_id: str, step_id: str, result: Dict[str, Any]) -> Tuple[str, str, int, str, str]:
+        return (task_id, step_id, 1 if result.get('success') else 0,
+                json.dumps(result, ensure_ascii=False, default=str), datetime.now().isoformat())
+
+    def write(
+        self,
+        task_rows: Iterable[Tuple] = (),
+        step_rows: Iterable[Tuple] = (),
+        clear_steps: Iterable[str] = (),
+    ):
+        """在一个事务中写入任务快照、步骤结果并清除指定任务的检查点"""
+        with self._lock:
+            conn = self.conn
+            with conn:
+                conn.executemany("DELETE FROM step_checkpoints WHERE task_id = ?", [(t,) for t in clear_steps])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO step_checkpoints (task_id, step_id, success, result, finished_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    list(step_rows),
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO tasks (task_id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                    list(task_rows),
+                )
+
+    def save_task(self, task: Dict[str, Any]):
+        self.write(task_rows=[self.task_row(task)])
+
+    def load_tasks(self) -> List[Dict[str, Any]]:
+        if self._conn is None and self.db_path != ":memory:" and not Path(self.db_path).exists():
+            return []  # 尚无检查点，不提前创建数据库文件
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM tasks ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save_step(self, task_id: str, step_id: str, result: Dict[str, Any]):
+        self.write(step_rows=[self.step_row(task_id, step_id, result)])
+
+    def load_steps(self, task_id: str) -> Dict[str, Dict[str, Any]]:
+        """已成功步骤的结果（失败的步骤重新执行）"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT step_id, result FROM step_checkpoints WHERE task_id = ? AND success = 1", (task_id,)
+            ).fetchall()
+        return {step_id: json.loads(result) for step_id, result in rows}
+
+    def clear_steps(self, task_id: str):
+        self.write(clear_steps=[task_id])
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def step_id_of(step: Dict[str, Any], index: int) -> str:
+    """步骤ID：step_id / id / name，都没有时用序号"""
+    return str(step.get('step_id') or step.get('id') or step.get('name') or f"step{index + 1}")
+
+
+def build_step_graph(steps: List[Dict[str, Any]], parallel: bool = False) -> Tuple[List[str], Dict[str, Set[str]]]:
+    """
+    生成步骤依赖图
+
+    步骤通过 depends_on 声明依赖（步骤ID列表）；任务中没有任何步骤声明依赖且未设置
+    parallel 时按原顺序串行（与旧行为一致），parallel=True 时互相独立。
+
+    Returns:
+        (步骤ID列表, 步骤ID -> 依赖的步骤ID集合)
+    """
+    ids: List[str] = []
+    for index, step in enumerate(steps):
+        step_id = step_id_of(step, index)
+        if step_id in ids:
+            step_id = f"{step_id}#{index + 1}"
+        ids.append(step_id)
+
+    declared = any('depends_on' in step for step in steps)
+    dependencies: Dict[str, Set[str]] = {}
+    for index, (step_id, step) in enumerate(zip(ids, steps)):
+        if declared:
+            deps = step.get('depends_on') or []
+            if isinstance(deps, str):
+                deps = [deps]
+            unknown = [d for d in deps if d not in ids]
+            if unknown:
+                raise ValueError(f"步骤 {step_id} 依赖不存在的步骤: {unknown}")
+            dependencies[step_id] = set(deps)
+        elif parallel or index == 0:
+            dependencies[step_id] = set()
+        else:
+            dependencies[step_id] = {ids[index - 1]}
+
+    # 环检测（Kahn）
+    remaining = {step_id: len(deps) for step_id, deps in dependencies.items()}
+    children: Dict[str, List[str]] = {step_id: [] for step_id in ids}
+    for step_id, deps in dependencies.items():
+        for dep in deps:
+            children[dep].append(step_id)
+    queue = [step_id for step_id, count in remaining.items() if count == 0]
+    visited = 0
+    while queue:
+        current = queue.pop()
+        visited += 1
+        for child in children[current]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                queue.append(child)
+    if visited != len(ids):
+        raise ValueError("步骤依赖存在循环")
+    return ids, dependencies
+
+
+class StepDAGRunner:
+    """
+    步骤DAG执行器
+
+    依赖全部成功的步骤立即进入就绪队列（按步骤原顺序优先），
+    同时受全局步骤并发和按资源（step['resource'] / step['resources']）并发限制；
+    某一步骤失败后不再启动新步骤，已在执行的步骤完成后返回。
+
+    Args:
+        max_concurrent_steps: 全局同时执行的步骤数
+        resource_limits: 资源名 -> 并发上限
+        default_resource_limit: 未配置资源的并发上限
+    """
+
+    def __init__(
+        self,
+        max_concurrent_steps: int = 8,
+        resource_limits: Optional[Dict[str, int]] = None,
+        default_resource_limit: int = 2,
+    ):
+        self.max_concurrent_steps = max(1, int(max_concurrent_steps))
+        self.resource_limits = dict(resource_limits or {})
+        self.default_resource_limit = max(1, int(default_resource_limit))
+        self._global = asyncio.Semaphore(self.max_concurrent_steps)
+        self._resources: Dict[str, asyncio.Semaphore] = {}
+
+    def _resource_semaphores(self, step: Dict[str, Any]) -> List[asyncio.Semaphore]:
+        resources = step.get('resources') or ([step['resource']] if step.get('resource') else [])
+        semaphores = []
+        # 固定顺序获取，避免多资源步骤互相等待
+        for name in sorted(set(resources)):
+            semaphore = self._resources.get(name)
+            if semaphore is None:
+                limit = self.resource_limits.get(name, self.default_resource_limit)
+                semaphore = self._resources[name] = asyncio.Semaphore(max(1, int(limit)))
+            semaphores.append(semaphore)
+        return semaphores
+
+    async def _run_step(
+        self,
+        step_id: str,
+        step: Dict[str, Any],
+        step_fn: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        should_continue: Optional[Callable[[], bool]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """执行单个步骤；拿到并发名额时任务已暂停/取消则不执行，返回 None"""
+        semaphores = [self._global] + self._resource_semaphores(step)
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except asyncio.CancelledError:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        if should_continue is not None and not should_continue():
+            for semaphore in reversed(acquired):
+                semaphore.release()
+            return None
+        started = time.monotonic()
+        started_at = datetime.now().isoformat()
+        try:
+            timeout = step.get('timeout')
+            if timeout:
+                async with asyncio.timeout(timeout):
+                    result = await step_fn(step_id, step)
+            else:
+                result = await step_fn(step_id, step)
+        except asyncio.TimeoutError:
+            result = {"success": False, "error": f"步骤执行超时 (> {step.get('timeout')} 秒)"}
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+        result = dict(result)
+        result.setdefault('step_name', step.get('name', step_id))
+        result['step_id'] = step_id
+        result['started_at'] = started_at
+        result['finished_at'] = datetime.now().isoformat()
+        result['duration'] = time.monotonic() - started
+        return result
+
+    async def run(
+        self,
+        steps: List[Dict[str, Any]],
+        step_fn: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        completed: Optional[Dict[str, Dict[str, Any]]] = None,
+        parallel: bool = False,
+        should_continue: Optional[Callable[[], bool]] = None,
+        on_step_done: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        执行步骤DAG
+
+        Args:
+            steps: 步骤列表
+            step_fn: 执行单个步骤的协程 (step_id, step) -> 结果
+            completed: 已完成步骤的检查点结果（跳过执行）
+            parallel: 未声明依赖时是否视为相互独立
+            should_continue: 启动新步骤前的检查（暂停/取消时返回 False）
+            on_step_done: 每个步骤结束后的回调（写检查点、更新进度）
+
+        Returns:
+            步骤ID -> 结果（按步骤原顺序）
+        """
+        ids, dependencies = build_step_graph(steps, parallel)
+        step_by_id = dict(zip(ids, steps))
+        order = {step_id: index for index, step_id in enumerate(ids)}
+        results: Dict[str, Dict[str, Any]] = {}
+        for step_id, result in (completed or {}).items():
+            if step_id in step_by_id:
+                results[step_id] = dict(result, resumed=True)
+
+        children: Dict[str, List[str]] = {step_id: [] for step_id in ids}
+        for step_id, deps in dependencies.items():
+            for dep in deps:
+                children[dep].append(step_id)
+        waiting = {
+            step_id: {d for d in deps if d not in results}
+            for step_id, deps in dependencies.items() if step_id not in results
+        }
+        ready = [(order[step_id], step_id) for step_id, deps in waiting.items() if not deps]
+        heapq.heapify(ready)
+
+        running: Dict[asyncio.Task, str] = {}
+        failed = False
+        try:
+            while ready or running:
+                while ready and not failed and (should_continue is None or should_continue()):
+                    _, step_id = heapq.heappop(ready)
+                    task = asyncio.create_task(
+                        self._run_step(step_id, step_by_id[step_id], step_fn, should_continue)
+                    )
+                    running[task] = step_id
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    result = task.result()
+                    if result is None:
+                        # 等待名额期间被暂停，放回就绪队列
+                        heapq.heappush(ready, (order[step_id], step_id))
+                        continue
+                    results[step_id] = result
+                    if on_step_done is not None:
+                        outcome = on_step_done(step_id, result)
+                        if asyncio.iscoroutine(outcome):
+                            await outcome
+                    if not result.get('success'):
+                        failed = True
+                        continue
+                    for child in children[step_id]:
+                        pending = waiting.get(child)
+                        if pending is None:
+                            continue
+                        pending.discard(step_id)
+                        if not pending:
+                            heapq.heappush(ready, (order[child], child))
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return {step_id: results[step_id] for step_id in ids if step_id in results}
+
+
+__all__ = [
+    "StepDAGRunner",
+    "TaskCheckpointStore",
+    "TaskIndex",
+    "build_step_graph",
+    "step_id_of",
+]
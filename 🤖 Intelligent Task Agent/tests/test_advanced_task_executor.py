@@ -0,0 +1,158 @@
+import asyncio
+import importlib
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from analytics.task_performance_analyzer import TaskPerformanceAnalyzer
+from execution import advanced_task_executor
+from execution.advanced_task_executor import AdvancedTaskExecutor, TaskStatus
+
+
+def _executor(tmp_path, **kwargs):
+    executor = AdvancedTaskExecutor(
+        db_path=str(tmp_path / "tasks.db"), analyzer=TaskPerformanceAnalyzer(), **kwargs
+    )
+    calls = Counter()
+
+    async def handler(step, params):
+        calls[step['name']] += 1
+        await asyncio.sleep(step.get('delay', 0))
+        if step['name'] in params.get('fail', ()):
+            return {"success": False, "error": f"{step['name']} 失败"}
+        return {"success": True}
+
+    executor.register_step_handler("work", handler)
+    return executor, calls
+
+
+def _steps(*names, **extra):
+    return [{"name": name, "type": "work", **extra} for name in names]
+
+
+@pytest.mark.asyncio
+async def test_rerunning_completed_task_executes_every_step_again(tmp_path):
+    executor, calls = _executor(tmp_path)
+    task_id = executor.create_task({"name": "t", "steps": _steps("a", "b", "c")})["task"]["task_id"]
+
+    first = await executor.execute_task(task_id)
+    assert first["success"]
+    assert executor.store.load_steps(task_id) == {}
+
+    second = await executor.execute_task(task_id)
+    assert second["success"]
+    assert calls == Counter({"a": 2, "b": 2, "c": 2})
+    assert not any(r.get("resumed") for r in second["task"]["result"])
+    executor.store.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_task_resumes_from_checkpoint(tmp_path):
+    executor, calls = _executor(tmp_path)
+    task = executor.create_task({
+        "name": "t", "steps": _steps("a", "b", "c"), "params": {"fail": ["b"]}
+    })["task"]
+
+    result = await executor.execute_task(task["task_id"])
+    assert not result["success"]
+    assert task["status"] == TaskStatus.FAILED.value
+    assert set(executor.store.load_steps(task["task_id"])) == {"a"}
+
+    task["params"]["fail"] = []
+    result = await executor.execute_task(task["task_id"])
+    assert result["success"]
+    assert calls == Counter({"a": 1, "b": 2, "c": 1})
+    assert result["task"]["result"][0]["resumed"]
+    executor.store.close()
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_survive_restart(tmp_path):
+    executor, _ = _executor(tmp_path)
+    task = executor.create_task({
+        "name": "t", "steps": _steps("a", "b"), "params": {"fail": ["b"]}
+    })["task"]
+    await executor.execute_task(task["task_id"])
+    executor.store.close()
+
+    restored, calls = _executor(tmp_path)
+    restored_task = restored.get_task_status(task["task_id"])["task"]
+    assert restored_task["status"] == TaskStatus.FAILED.value
+    restored_task["params"]["fail"] = []
+    assert (await restored.execute_task(task["task_id"]))["success"]
+    assert calls == Counter({"b": 1})
+    restored.store.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_execute_calls_share_one_run(tmp_path):
+    executor, calls = _executor(tmp_path)
+    task_id = executor.create_task({"name": "t", "steps": _steps("a", "b", delay=0.02)})["task"]["task_id"]
+
+    spawned = executor._spawn(task_id)
+    results = await asyncio.gather(executor.execute_task(task_id), executor.execute_task(task_id), spawned)
+
+    assert all(r["success"] for r in results)
+    assert calls == Counter({"a": 1, "b": 1})
+    assert len(executor.execution_history) == 1
+    executor.store.close()
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_writes_run_off_the_event_loop(tmp_path):
+    executor, _ = _executor(tmp_path)
+    loop_thread = threading.get_ident()
+    writer_threads = set()
+    write = executor.store.write
+
+    def recording_write(*args, **kwargs):
+        writer_threads.add(threading.get_ident())
+        return write(*args, **kwargs)
+
+    executor.store.write = recording_write
+    task_id = executor.create_task({"name": "t", "steps": _steps("a", "b")})["task"]["task_id"]
+    writer_threads.clear()  # create_task 是同步接口
+
+    assert (await executor.execute_task(task_id))["success"]
+    assert writer_threads and loop_thread not in writer_threads
+    executor.store.close()
+
+
+@pytest.mark.asyncio
+async def test_parallel_steps_respect_resource_limits(tmp_path):
+    executor, _ = _executor(tmp_path, resource_limits={"gpu": 1})
+    active = {"now": 0, "peak": 0}
+
+    async def gpu_step(step, params):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return {"success": True}
+
+    executor.register_step_handler("gpu", gpu_step)
+    steps = [{"name": f"g{i}", "type": "gpu", "resource": "gpu"} for i in range(4)]
+    task_id = executor.create_task({"name": "t", "steps": steps, "parallel": True})["task"]["task_id"]
+
+    assert (await executor.execute_task(task_id))["success"]
+    assert active["peak"] == 1
+    executor.store.close()
+
+
+def test_import_does_not_create_executor(tmp_path, monkeypatch):
+    db_path = tmp_path / "default.db"
+    monkeypatch.setenv("TASK_EXECUTOR_DB", str(db_path))
+    module = importlib.reload(advanced_task_executor)
+
+    assert module._task_executor is None
+    executor = module.get_task_executor()
+    assert module.task_executor is executor
+    assert executor.store.db_path == str(db_path)
+    assert not db_path.exists()
@@ -7,13 +7,12 @@
 """
 import asyncio
 import httpx
-import subprocess
-import tempfile
-import os
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import json
 
+from core.sandbox_pool import SandboxLimits, SandboxPool
+
 
 class AutoCodeFixer:
     """
@@ -27,6 +26,14 @@ class AutoCodeFixer:
         
         # 修复历史记录
         self.fix_history = []
+        
+        # 代码执行沙箱（预热的解释器进程池，首次执行时启动）
+        self.sandbox_timeout = 30
+        self.sandbox = SandboxPool(
+            size=4,
+            limits=SandboxLimits(memory_mb=512, cpu_seconds=self.sandbox_timeout, file_size_mb=16),
+            max_output_bytes=256 * 1024
+        )
     
     async def diagnose_problem(self, error_info: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -247,27 +254,15 @@ class AutoCodeFixer:
             }
         
         try:
-            # 1. 在临时文件中保存代码
-            with tempfile.NamedTemporaryFile(
-                mode='w', 
-                suffix='.py', 
-                delete=False
-            ) as f:
-                f.write(fix_proposal['code'])
-                temp_file = f.name
-            
-            # 2. 在沙箱环境中执行
-            result = await self._execute_in_sandbox(temp_file)
+            # 1. 在沙箱环境中执行（每次执行使用独立的临时目录）
+            result = await self._execute_in_sandbox(fix_proposal['code'])
             
-            # 3. 验证修复效果
+            # 2. 验证修复效果
             verification = await self._verify_fix_effect(
                 fix_proposal['diagnosis']['error_info']
             )
             
-            # 4. 清理临时文件
-            os.remove(temp_file)
-            
-            # 5. 记录修复历史
+            # 3. 记录修复历史
             fix_record = {
                 "timestamp": datetime.now().isoformat(),
                 "problem": fix_proposal['diagnosis']['error_info'],
@@ -279,7 +274,7 @@ class AutoCodeFixer:
             
             self.fix_history.append(fix_record)
             
-            # 6. 存入RAG供未来参考
+            # 4. 存入RAG供未来参考
             await self._save_to_rag(fix_record)
             
             return {
@@ -414,35 +409,41 @@ class AutoCodeFixer:
         
         return code, explanation, steps
     
-    async def _execute_in_sandbox(self, code_file: str) -> Dict[str, Any]:
-        """在沙箱环境中执行代码"""
+    async def _execute_in_sandbox(self, code: str) -> Dict[str, Any]:
+        """在沙箱环境中执行代码（不阻塞事件循环，受CPU/内存/文件大小限制）"""
         try:
-            # 使用subprocess在隔离环境中执行
-            result = subprocess.run(
-                ['python3', code_file],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            result = await self.sandbox.run_python(code, timeout=self.sandbox_timeout)
+            
+            if result.timed_out:
+                return {
+                    "success": False,
+                    "error": f"执行超时（{self.sandbox_timeout}秒）"
+                }
+            if result.error:
+                return {
+                    "success": False,
+                    "error": result.error
+                }
             
             return {
                 "success": result.returncode == 0,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "returncode": result.returncode
+                "stdout": result.stdout.decode('utf-8', errors='replace'),
+                "stderr": result.stderr.decode('utf-8', errors='replace'),
+                "returncode": result.returncode,
+                "output_truncated": result.stdout_truncated or result.stderr_truncated,
+                "duration": result.duration
             }
         
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "执行超时（30秒）"
-            }
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    async def verify_fixes(self, codes: List[str]) -> List[Dict[str, Any]]:
+        """并发在沙箱中执行多段修复代码（并发度由进程池大小控制）"""
+        return await asyncio.gather(*(self._execute_in_sandbox(code) for code in codes))
+    
     async def _verify_fix_effect(self, original_error: Dict[str, Any]) -> Dict[str, Any]:
         """验证修复效果"""
         try:
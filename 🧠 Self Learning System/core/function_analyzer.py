@@ -5,8 +5,10 @@
 
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
 import logging
+import os
+
+from core.telemetry import TelemetryPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +16,12 @@ logger = logging.getLogger(__name__)
 class FunctionAnalyzer:
     """功能分析器"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None, flush_interval: float = 1.0):
+        """
+        Args:
+            db_path: 遥测汇总数据库路径（默认读取 LEARNING_TELEMETRY_DB，未设置则只保存在内存）
+            flush_interval: 遥测缓冲合并间隔（秒）
+        """
         # 功能模块列表
         self.modules = [
             "RAG和知识图谱",
@@ -28,16 +35,11 @@ class FunctionAnalyzer:
             "自我学习"
         ]
         
-        # 功能运行数据
-        self.function_metrics = defaultdict(lambda: {
-            "usage_count": 0,
-            "success_count": 0,
-            "failure_count": 0,
-            "avg_response_time": 0,
-            "total_response_time": 0,
-            "error_types": defaultdict(int),
-            "last_used": None
-        })
+        # 功能运行数据（按线程缓冲，后台合并为预聚合统计）
+        self.telemetry = TelemetryPipeline(
+            db_path=db_path or os.getenv("LEARNING_TELEMETRY_DB"),
+            flush_interval=flush_interval
+        )
         
         # 问题记录
         self.problems = []
@@ -62,27 +64,19 @@ class FunctionAnalyzer:
             response_time: 响应时间（秒）
             error: 错误信息
         """
-        key = f"{module_name}::{function_name}"
-        metrics = self.function_metrics[key]
-        
-        # 更新统计
-        metrics["usage_count"] += 1
-        if success:
-            metrics["success_count"] += 1
-        else:
-            metrics["failure_count"] += 1
-            if error:
-                metrics["error_types"][error] += 1
-        
-        # 更新响应时间
-        metrics["total_response_time"] += response_time
-        metrics["avg_response_time"] = (
-            metrics["total_response_time"] / metrics["usage_count"]
-        )
-        
-        metrics["last_used"] = datetime.now().isoformat()
+        self.telemetry.record(module_name, function_name, success, response_time, error)
+    
+    @property
+    def function_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        功能运行指标（键为 "模块::功能"）
         
-        logger.debug(f"记录功能使用: {key}, 成功={success}, 耗时={response_time:.2f}s")
+        error_types 以错误指纹为键，同类错误（仅数字、路径等不同）合并计数
+        """
+        return {
+            f"{module_name}::{function_name}": stats.to_metrics()
+            for (module_name, function_name), stats in self.telemetry.snapshot().items()
+        }
     
     def analyze_module_performance(self, module_name: str) -> Dict[str, Any]:
         """
@@ -96,8 +90,9 @@ class FunctionAnalyzer:
         """
         # 获取该模块的所有功能
         module_functions = {
-            k: v for k, v in self.function_metrics.items()
-            if k.startswith(f"{module_name}::")
+            f"{module_name}::{function_name}": stats.to_metrics()
+            for (module, function_name), stats in self.telemetry.snapshot().items()
+            if module == module_name
         }
         
         if not module_functions:
@@ -180,13 +175,14 @@ class FunctionAnalyzer:
             results[module] = self.analyze_module_performance(module)
         
         # 计算总体指标
-        all_metrics = list(self.function_metrics.values())
+        function_metrics = self.function_metrics
+        all_metrics = list(function_metrics.values())
         if all_metrics:
             total_usage = sum(m["usage_count"] for m in all_metrics)
             total_success = sum(m["success_count"] for m in all_metrics)
             
             overall = {
-                "total_functions": len(self.function_metrics),
+                "total_functions": len(function_metrics),
                 "total_usage": total_usage,
                 "overall_success_rate": total_success / total_usage if total_usage > 0 else 0,
                 "modules_analyzed": len(self.modules)
@@ -300,15 +296,15 @@ class FunctionAnalyzer:
         Returns:
             功能详情
         """
-        key = f"{module_name}::{function_name}"
+        stats = self.telemetry.snapshot().get((module_name, function_name))
         
-        if key not in self.function_metrics:
+        if stats is None:
             return {
                 "exists": False,
                 "message": "功能不存在或未被使用"
             }
         
-        metrics = self.function_metrics[key]
+        metrics = stats.to_metrics()
         
         success_rate = (
             metrics["success_count"] / metrics["usage_count"]
@@ -325,6 +321,9 @@ class FunctionAnalyzer:
                 "failure_count": metrics["failure_count"],
                 "success_rate": success_rate,
                 "avg_response_time": metrics["avg_response_time"],
+                "p50_response_time": metrics["p50_response_time"],
+                "p95_response_time": metrics["p95_response_time"],
+                "p99_response_time": metrics["p99_response_time"],
                 "last_used": metrics["last_used"]
             },
             "errors": dict(metrics["error_types"]),
@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from collections import Counter
 import logging
 
+from core.telemetry import ErrorPatternMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,6 +67,7 @@ class ProblemDetector:
                 "severity": "medium"
             }
         }
+        self._pattern_matcher: Optional[ErrorPatternMatcher] = None
         
         logger.info("问题检测引擎初始化完成")
     
@@ -131,6 +134,19 @@ class ProblemDetector:
                     "detected_at": datetime.now().isoformat()
                 })
             
+            # 检查尾延迟（平均值正常但少数请求很慢）
+            p95 = metrics.get("p95_response_time", 0)
+            if metrics["avg_response_time"] <= 2.0 and p95 > 5.0:
+                problems.append({
+                    "id": f"prob_{len(problems)}",
+                    "function": func_key,
+                    "type": "performance",
+                    "severity": "medium",
+                    "description": f"尾延迟过高 (P95 {p95:.2f}秒)",
+                    "impact": "部分请求等待时间长",
+                    "detected_at": datetime.now().isoformat()
+                })
+            
             # 检查错误模式
             for error_msg, count in metrics.get("error_types", {}).items():
                 if count > 5:  # 同一错误出现多次
@@ -150,13 +166,29 @@ class ProblemDetector:
         
         return problems
     
+    def add_problem_pattern(
+        self,
+        name: str,
+        keywords: List[str],
+        problem_type: str = "other",
+        severity: str = "medium"
+    ):
+        """添加问题模式（关键词忽略大小写）"""
+        self.problem_patterns[name] = {
+            "keywords": keywords,
+            "type": problem_type,
+            "severity": severity
+        }
+        self._pattern_matcher = None
+    
     def _match_error_pattern(self, error_msg: str) -> Dict[str, str]:
-        """匹配错误模式"""
-        error_lower = error_msg.lower()
+        """匹配错误模式（所有关键词预编译为一个正则，按模式定义顺序取第一个命中）"""
+        if self._pattern_matcher is None:
+            self._pattern_matcher = ErrorPatternMatcher(self.problem_patterns)
         
-        for pattern_name, pattern in self.problem_patterns.items():
-            if any(keyword in error_lower for keyword in pattern["keywords"]):
-                return pattern
+        pattern_name = self._pattern_matcher.match(error_msg)
+        if pattern_name is not None:
+            return self.problem_patterns[pattern_name]
         
         return {"type": "other", "severity": "medium"}
     
@@ -0,0 +1,688 @@
+"""
+沙箱进程池
+预先启动常驻的 Python 工作进程，每个任务由工作进程 fork 出子进程执行：
+
+- 子进程独立进程组，设置 CPU / 内存 / 文件大小 / 文件句柄上限（rlimit）
+- Python 代码直接在已预热的解释器中运行，命令通过 exec 启动，不再每次冷启动解释器
+- 每个任务一个临时工作目录（优先放在 /dev/shm 内存文件系统），结束后删除
+- 未指定 env 时只传入白名单环境变量，HOME/TMPDIR 指向临时目录
+- 标准输出/错误以分帧方式流式回传，超过上限的部分丢弃并标记截断
+- 空闲工作进程队列控制并发，排队任务数超过上限时直接拒绝
+
+不支持 fork 的平台（如 Windows）退化为每个任务单独启动子进程。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HEADER_SIZE = 5
+_FRAME_STDOUT = b"o"
+_FRAME_STDERR = b"e"
+_FRAME_STARTED = b"p"
+_FRAME_RESULT = b"r"
+
+# 未指定 env 的任务只继承这些变量，服务进程中的密钥、令牌等不会带入沙箱
+SANDBOX_ENV_PASSTHROUGH = ("PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ")
+
+
+class SandboxBusyError(RuntimeError):
+    """排队任务过多"""
+
+
+@dataclass
+class SandboxLimits:
+    """子进程资源上限（None 表示不限制）"""
+    memory_mb: Optional[int] = 512
+    cpu_seconds: Optional[int] = 30
+    file_size_mb: Optional[int] = 100
+    max_open_files: Optional[int] = 256
+
+
+@dataclass
+class SandboxResult:
+    """任务执行结果"""
+    returncode: Optional[int]
+    stdout: bytes = b""
+    stderr: bytes = b""
+    timed_out: bool = False
+    stdout_truncated: bool = False
+    stderr_truncated: bool = False
+    duration: float = 0.0
+    cpu_time: float = 0.0
+    max_rss_kb: int = 0
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and self.error is None
+
+
+@dataclass
+class _Job:
+    kind: str  # python / shell / exec
+    timeout: float
+    cwd: Optional[str] = None
+    env: Optional[Dict[str, str]] = None
+    code: Optional[str] = None
+    command: Optional[str] = None
+    argv: Optional[List[str]] = None
+    limits: Optional[SandboxLimits] = None
+    max_output_bytes: int = 1024 * 1024
+    scratch_dir: Optional[str] = field(default=None, repr=False)
+
+    def payload(self) -> Dict[str, Any]:
+        data = {
+            "kind": self.kind,
+            "timeout": self.timeout,
+            "cwd": self.cwd,
+            "env": self.env,
+            "command": self.command,
+            "argv": self.argv,
+            "limits": asdict(self.limits) if self.limits else None,
+            "max_output_bytes": self.max_output_bytes,
+        }
+        if self.kind == "python":
+            data["script"] = os.path.join(self.scratch_dir, "main.py")
+        return data
+
+
+# ==================== 工作进程（在子解释器中运行） ====================
+
+def _send_frame(fd: int, kind: bytes, payload: bytes):
+    data = kind + len(payload).to_bytes(4, "big") + payload
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _apply_limits(limits: Optional[Dict[str, Any]]):
+    import resource
+
+    def setlimit(name: str, value: int):
+        limit = getattr(resource, name, None)
+        if limit is None:
+            return
+        try:
+            resource.setrlimit(limit, (value, value))
+        except (ValueError, OSError):
+            pass
+
+    setlimit("RLIMIT_CORE", 0)
+    if not limits:
+        return
+    if limits.get("memory_mb"):
+        setlimit("RLIMIT_AS", limits["memory_mb"] * 1024 * 1024)
+    if limits.get("cpu_seconds"):
+        setlimit("RLIMIT_CPU", limits["cpu_seconds"])
+    if limits.get("file_size_mb"):
+        setlimit("RLIMIT_FSIZE", limits["file_size_mb"] * 1024 * 1024)
+    if limits.get("max_open_files"):
+        setlimit("RLIMIT_NOFILE", limits["max_open_files"])
+
+
+def minimal_environment(scratch_dir: str) -> Dict[str, str]:
+    """沙箱默认环境：白名单变量 + 指向临时目录的 HOME/TMPDIR"""
+    env = {key: os.environ[key] for key in SANDBOX_ENV_PASSTHROUGH if key in os.environ}
+    env.setdefault("PATH", os.defpath)
+    env["HOME"] = scratch_dir
+    env["TMPDIR"] = scratch_dir
+    env["PYTHONIOENCODING"] = "utf-8"
+    return env
+
+
+def _run_child(job: Dict[str, Any], out_w: int, err_w: int):
+    """fork 出的子进程：隔离、限制资源后执行任务，不返回"""
+    code = 1
+    try:
+        os.setsid()
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)
+        signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+        if job.get("cwd"):
+            os.chdir(job["cwd"])
+        _apply_limits(job.get("limits"))
+
+        env = job.get("env")
+        if job["kind"] == "python":
+            import runpy
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+            sys.stdin = open(os.devnull)
+            sys.stdout = open(1, "w", buffering=1, encoding="utf-8", errors="replace", closefd=False)
+            sys.stderr = open(2, "w", buffering=1, encoding="utf-8", errors="replace", closefd=False)
+            sys.argv = [job["script"]]
+            sys.path.insert(0, os.path.dirname(job["script"]))
+            try:
+                runpy.run_path(job["script"], run_name="__main__")
+                code = 0
+            except SystemExit as exc:
+                if exc.code is None:
+                    code = 0
+                elif isinstance(exc.code, int):
+                    code = exc.code
+                else:
+                    print(exc.code, file=sys.stderr)
+                    code = 1
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                code = 1
+            finally:
+                try:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                except Exception:
+                    pass
+        else:
+            argv = ["/bin/sh", "-c", job["command"]] if job["kind"] == "shell" else job["argv"]
+            if env is None:
+                os.execvp(argv[0], argv)
+            os.execvpe(argv[0], argv, env)
+    except BaseException as exc:
+        try:
+            os.write(2, f"sandbox: {exc}\n".encode("utf-8", "replace"))
+        except OSError:
+            pass
+        code = 127
+    os._exit(code & 0xFF)
+
+
+def _run_job(job: Dict[str, Any], channel: int):
+    """在工作进程中执行一个任务并回传输出与结果"""
+    import select
+
+    start = time.monotonic()
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(out_r)
+        os.close(err_r)
+        os.close(channel)
+        _run_child(job, out_w, err_w)
+    os.close(out_w)
+    os.close(err_w)
+    _send_frame(channel, _FRAME_STARTED, str(pid).encode())
+
+    max_output = job.get("max_output_bytes") or 0
+    streams = {out_r: [_FRAME_STDOUT, 0, False], err_r: [_FRAME_STDERR, 0, False]}
+    open_fds = [out_r, err_r]
+    deadline = start + job["timeout"]
+    hard_deadline = None
+    timed_out = False
+    exited = None
+
+    while open_fds:
+        now = time.monotonic()
+        if not timed_out and exited is None and now >= deadline:
+            timed_out = True
+            hard_deadline = now + 2.0
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        if hard_deadline is not None and now >= hard_deadline:
+            # 后台进程仍持有管道，不再等待
+            break
+        if exited is None:
+            # 主进程已退出但管道未关闭（有后台进程），稍等后结束整个进程组
+            waited = os.wait4(pid, os.WNOHANG)
+            if waited[0]:
+                exited = waited
+                hard_deadline = now + 0.2
+        wait = (deadline - now) if hard_deadline is None else (hard_deadline - now)
+        ready, _, _ = select.select(open_fds, [], [], min(max(0.0, wait), 0.25))
+        for fd in ready:
+            data = os.read(fd, 65536)
+            if not data:
+                open_fds.remove(fd)
+                continue
+            state = streams[fd]
+            room = max_output - state[1]
+            if room > 0:
+                chunk = data[:room]
+                state[1] += len(chunk)
+                _send_frame(channel, state[0], chunk)
+            if len(data) > room:
+                state[2] = True
+
+    for fd in (out_r, err_r):
+        os.close(fd)
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    _, status, usage = exited or os.wait4(pid, 0)
+    result = {
+        "returncode": os.waitstatus_to_exitcode(status),
+        "timed_out": timed_out,
+        "stdout_truncated": streams[out_r][2],
+        "stderr_truncated": streams[err_r][2],
+        "duration": time.monotonic() - start,
+        "cpu_time": usage.ru_utime + usage.ru_stime,
+        "max_rss_kb": usage.ru_maxrss,
+    }
+    _send_frame(channel, _FRAME_RESULT, json.dumps(result).encode())
+
+
+def _worker_main():
+    """工作进程入口：从标准输入逐行读取任务"""
+    # 脚本所在目录（core/）不应出现在任务的导入路径中
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+    # 预先导入子进程执行代码时要用到的模块，fork 后直接复用
+    import runpy  # noqa: F401
+    import traceback  # noqa: F401
+    import resource  # noqa: F401
+    import select  # noqa: F401
+
+    channel = os.dup(1)
+    null = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(null, 1)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        _run_job(json.loads(line), channel)
+
+
+# ==================== 进程池（在服务进程中运行） ====================
+
+def _default_work_root() -> str:
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+class _Worker:
+    """常驻工作进程"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.jobs = 0
+        self.broken = False
+
+    @property
+    def alive(self) -> bool:
+        return not self.broken and self.process.returncode is None
+
+    async def _read_frame(self, timeout: float) -> Tuple[bytes, bytes]:
+        header = await asyncio.wait_for(self.process.stdout.readexactly(_HEADER_SIZE), timeout)
+        length = int.from_bytes(header[1:], "big")
+        payload = await asyncio.wait_for(self.process.stdout.readexactly(length), timeout) if length else b""
+        return header[:1], payload
+
+    async def run(self, job: _Job) -> AsyncIterator[Tuple[str, Any]]:
+        """执行任务，依次产出 ("stdout"/"stderr", bytes) 与最终的 ("result", dict)"""
+        self.jobs += 1
+        self.process.stdin.write(json.dumps(job.payload()).encode() + b"\n")
+        await self.process.stdin.drain()
+
+        # 工作进程自己负责超时，这里只防止工作进程本身卡死
+        guard = job.timeout + 10
+        child_pid = None
+        finished = False
+        try:
+            while True:
+                kind, payload = await self._read_frame(guard)
+                if kind == _FRAME_STARTED:
+                    child_pid = int(payload)
+                elif kind == _FRAME_STDOUT:
+                    yield "stdout", payload
+                elif kind == _FRAME_STDERR:
+                    yield "stderr", payload
+                elif kind == _FRAME_RESULT:
+                    finished = True
+                    yield "result", json.loads(payload)
+                    return
+        finally:
+            if not finished and self.alive:
+                # 调用方提前结束：终止子进程并读完剩余帧，保持工作进程可复用
+                if child_pid:
+                    try:
+                        os.killpg(child_pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+                try:
+                    while True:
+                        kind, _ = await self._read_frame(5)
+                        if kind == _FRAME_RESULT:
+                            break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+                    self.kill()
+
+    def kill(self):
+        if self.alive:
+            self.broken = True
+            try:
+                os.kill(self.process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+class SandboxPool:
+    """
+    沙箱进程池
+
+    Args:
+        size: 常驻工作进程数（即最大并发任务数）
+        limits: 默认资源上限
+        max_pending: 允许排队等待的任务数
+        max_output_bytes: 每个输出流保留的最大字节数
+        work_root: 任务临时目录的父目录（默认 /dev/shm，不可用时使用系统临时目录）
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        limits: Optional[SandboxLimits] = None,
+        max_pending: int = 64,
+        max_output_bytes: int = 1024 * 1024,
+        work_root: Optional[str] = None
+    ):
+        self.size = max(1, size)
+        self.limits = limits
+        self.max_pending = max_pending
+        self.max_output_bytes = max_output_bytes
+        self.work_root = work_root or _default_work_root()
+        self.forking = hasattr(os, "fork") and sys.platform != "win32"
+
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._cold_slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._stats = {"completed": 0, "timed_out": 0, "rejected": 0, "respawned": 0, "total_duration": 0.0}
+
+    # ============ 生命周期 ============
+
+    async def _spawn(self) -> _Worker:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", os.path.abspath(__file__), "--sandbox-worker",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        worker = _Worker(process)
+        self._workers.append(worker)
+        return worker
+
+    async def start(self):
+        """启动工作进程（首次提交任务时自动调用）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._idle is not None:
+            return
+        if self._start_lock is None or self._loop is not loop:
+            # 事件循环已更换：旧循环上的工作进程无法再使用
+            for worker in self._workers:
+                worker.kill()
+            self._start_lock = asyncio.Lock()
+            self._loop = loop
+            self._idle = None
+            self._workers = []
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            if not self.forking:
+                self._cold_slots = asyncio.Semaphore(self.size)
+                self._idle = asyncio.Queue()
+                return
+            idle = asyncio.Queue()
+            for worker in await asyncio.gather(*(self._spawn() for _ in range(self.size))):
+                idle.put_nowait(worker)
+            self._idle = idle
+            logger.info(f"沙箱进程池已启动: {self.size} 个工作进程")
+
+    async def close(self):
+        """关闭所有工作进程"""
+        workers, self._workers = self._workers, []
+        self._idle = None
+        for worker in workers:
+            if worker.alive:
+                worker.process.stdin.close()
+                worker.kill()
+            await worker.process.wait()
+
+    # ============ 任务执行 ============
+
+    def _prepare(self, job: _Job):
+        job.limits = job.limits if job.limits is not None else self.limits
+        job.max_output_bytes = self.max_output_bytes
+        job.scratch_dir = tempfile.mkdtemp(prefix="sandbox-", dir=self.work_root)
+        if job.kind == "python":
+            with open(os.path.join(job.scratch_dir, "main.py"), "w", encoding="utf-8") as f:
+                f.write(job.code)
+        if job.cwd is None:
+            job.cwd = job.scratch_dir
+        if job.env is None:
+            job.env = minimal_environment(job.scratch_dir)
+        else:
+            job.env = {**job.env, "TMPDIR": job.scratch_dir}
+
+    async def _acquire(self) -> Optional[_Worker]:
+        if self._cold_slots is not None:
+            await self._cold_slots.acquire()
+            return None
+        worker = await self._idle.get()
+        if not worker.alive:
+            self._workers.remove(worker)
+            worker = await self._spawn()
+            self._stats["respawned"] += 1
+        return worker
+
+    def _release(self, worker: Optional[_Worker]):
+        if worker is None:
+            self._cold_slots.release()
+            return
+        if worker.alive:
+            self._idle.put_nowait(worker)
+            return
+        # 工作进程异常退出：异步补一个新的
+        self._workers.remove(worker)
+        self._stats["respawned"] += 1
+        idle = self._idle
+
+        async def replace():
+            try:
+                fresh = await self._spawn()
+            except Exception as exc:
+                logger.error(f"沙箱工作进程重启失败: {exc}")
+                return
+            if idle is self._idle:
+                idle.put_nowait(fresh)
+
+        asyncio.get_running_loop().create_task(replace())
+
+    async def _run_cold(self, job: _Job) -> AsyncIterator[Tuple[str, Any]]:
+        """不支持 fork 时：每个任务单独启动子进程"""
+        if job.kind == "python":
+            argv = [sys.executable, os.path.join(job.scratch_dir, "main.py")]
+        elif job.kind == "exec":
+            argv = job.argv
+        else:
+            argv = None
+        start = time.monotonic()
+        if argv is None:
+            process = await asyncio.create_subprocess_shell(
+                job.command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=job.cwd, env=job.env,
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=job.cwd, env=job.env,
+            )
+
+        queue: asyncio.Queue = asyncio.Queue()
+        truncated = {"stdout": False, "stderr": False}
+
+        async def pump(stream: asyncio.StreamReader, name: str):
+            kept = 0
+            while True:
+                data = await stream.read(65536)
+                if not data:
+                    break
+                room = job.max_output_bytes - kept
+                if room > 0:
+                    kept += min(room, len(data))
+                    await queue.put((name, data[:room]))
+                if len(data) > room:
+                    truncated[name] = True
+
+        pumps = asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"))
+        pumps.add_done_callback(lambda _: queue.put_nowait(None))
+        timed_out = False
+        try:
+            deadline = start + job.timeout
+            while True:
+                item = await asyncio.wait_for(queue.get(), max(0.0, deadline - time.monotonic()))
+                if item is None:
+                    break
+                yield item
+            await asyncio.wait_for(process.wait(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            pumps.cancel()
+        yield "result", {
+            "returncode": process.returncode,
+            "timed_out": timed_out,
+            "stdout_truncated": truncated["stdout"],
+            "stderr_truncated": truncated["stderr"],
+            "duration": time.monotonic() - start,
+        }
+
+    async def _submit(self, job: _Job) -> AsyncIterator[Tuple[str, Any]]:
+        if self._pending >= self.size + self.max_pending:
+            self._stats["rejected"] += 1
+            raise SandboxBusyError(f"沙箱任务排队过多（{self._pending}）")
+        await self.start()
+        self._pending += 1
+        worker = None
+        acquired = False
+        try:
+            self._prepare(job)
+            worker = await self._acquire()
+            acquired = True
+            events = self._run_cold(job) if worker is None else worker.run(job)
+            try:
+                async for event in events:
+                    if event[0] == "result":
+                        self._stats["completed"] += 1
+                        self._stats["total_duration"] += event[1].get("duration", 0.0)
+                        if event[1].get("timed_out"):
+                            self._stats["timed_out"] += 1
+                    yield event
+            finally:
+                await events.aclose()
+        finally:
+            self._pending -= 1
+            if acquired:
+                self._release(worker)
+            if job.scratch_dir:
+                shutil.rmtree(job.scratch_dir, ignore_errors=True)
+
+    async def _collect(self, job: _Job) -> SandboxResult:
+        stdout, stderr = bytearray(), bytearray()
+        events = self._submit(job)
+        try:
+            async for kind, payload in events:
+                if kind == "stdout":
+                    stdout += payload
+                elif kind == "stderr":
+                    stderr += payload
+                else:
+                    return SandboxResult(stdout=bytes(stdout), stderr=bytes(stderr), **payload)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError) as exc:
+            return SandboxResult(returncode=None, stdout=bytes(stdout), stderr=bytes(stderr), error=f"沙箱执行失败: {exc}")
+        finally:
+            await events.aclose()
+        return SandboxResult(returncode=None, stdout=bytes(stdout), stderr=bytes(stderr), error="沙箱未返回结果")
+
+    async def run_python(
+        self,
+        code: str,
+        timeout: float = 30,
+        env: Optional[Dict[str, str]] = None,
+        limits: Optional[SandboxLimits] = None
+    ) -> SandboxResult:
+        """在预热的解释器中执行 Python 代码（独立临时目录）"""
+        return await self._collect(_Job(kind="python", code=code, timeout=timeout, env=env, limits=limits))
+
+    async def run_command(
+        self,
+        command: str,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        timeout: float = 30,
+        limits: Optional[SandboxLimits] = None
+    ) -> SandboxResult:
+        """执行 shell 命令"""
+        return await self._collect(_Job(kind="shell", command=command, cwd=cwd, env=env, timeout=timeout, limits=limits))
+
+    async def stream_command(
+        self,
+        command: str,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        timeout: float = 30,
+        limits: Optional[SandboxLimits] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        流式执行 shell 命令
+
+        依次产出 ("stdout", bytes)、("stderr", bytes)，最后产出 ("result", SandboxResult)；
+        提前关闭迭代器会终止命令。
+        """
+        job = _Job(kind="shell", command=command, cwd=cwd, env=env, timeout=timeout, limits=limits)
+        events = self._submit(job)
+        try:
+            async for kind, payload in events:
+                if kind == "result":
+                    yield kind, SandboxResult(**payload)
+                else:
+                    yield kind, payload
+        finally:
+            await events.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """运行统计"""
+        completed = self._stats["completed"]
+        return {
+            "size": self.size,
+            "mode": "forkserver" if self.forking else "subprocess",
+            "workers_alive": sum(1 for w in self._workers if w.alive),
+            "idle": self._idle.qsize() if self._idle is not None and self._cold_slots is None else None,
+            "pending": self._pending,
+            "completed": completed,
+            "timed_out": self._stats["timed_out"],
+            "rejected": self._stats["rejected"],
+            "respawned": self._stats["respawned"],
+            "avg_duration": self._stats["total_duration"] / completed if completed else 0.0,
+            "work_root": self.work_root,
+        }
+
+
+if __name__ == "__main__" and "--sandbox-worker" in sys.argv:
+    _worker_main()
@@ -0,0 +1,482 @@
+"""
+功能遥测管道
+低开销地采集功能调用数据，供功能分析器、问题检测引擎读取预聚合结果
+
+- 每个线程一个事件缓冲（deque，append/popleft 线程安全），记录时不加锁、不打日志
+- 后台线程定期把缓冲合并为按功能的计数与固定内存的延迟直方图
+- 错误信息归一化为指纹（数字、地址、路径、引号内容替换为占位符），同类错误合并计数
+- 多关键词模式预编译为一个正则，一次扫描完成匹配
+- 按小时汇总写入 SQLite（直方图以稀疏数组压缩存储），重启后恢复累计数据
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """
+    固定内存的对数分桶延迟直方图
+
+    覆盖 [min_value, max_value] 秒，每个 2 倍区间 sub_buckets 个桶，
+    相对误差约 2^(1/sub_buckets) - 1（默认 8 个子桶约 9%）。
+    """
+
+    MIN_VALUE = 1e-6
+    MAX_VALUE = 3600.0
+    SUB_BUCKETS = 8
+
+    def __init__(self):
+        self._scale = self.SUB_BUCKETS / math.log(2)
+        self.size = int(math.log(self.MAX_VALUE / self.MIN_VALUE) * self._scale) + 2
+        self.counts = array('Q', bytes(8 * self.size))
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.MIN_VALUE:
+            return 0
+        return min(self.size - 1, int(math.log(value / self.MIN_VALUE) * self._scale) + 1)
+
+    def _upper_bound(self, index: int) -> float:
+        return self.MIN_VALUE * math.exp(index / self._scale)
+
+    def record(self, value: float):
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """分位数（q 取 0-100），返回所在桶的上界，并截断在观测到的最小/最大值之间"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(max(self._upper_bound(index), self.min), self.max)
+        return self.max
+
+    def to_bytes(self) -> bytes:
+        """稀疏编码：非零桶的 (下标, 计数) 对"""
+        pairs = array('Q')
+        for index, count in enumerate(self.counts):
+            if count:
+                pairs.append(index)
+                pairs.append(count)
+        return pairs.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, total: float = 0.0, minimum: float = math.inf, maximum: float = 0.0) -> "LatencyHistogram":
+        histogram = cls()
+        pairs = array('Q')
+        pairs.frombytes(data)
+        for index, count in zip(pairs[::2], pairs[1::2]):
+            if index < histogram.size:
+                histogram.counts[index] += count
+                histogram.count += count
+        histogram.total = total
+        histogram.min = minimum
+        histogram.max = maximum
+        return histogram
+
+
+_FINGERPRINT_RULES = [
+    (re.compile(r'0x[0-9a-fA-F]+'), '<hex>'),
+    (re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'), '<uuid>'),
+    (re.compile(r'(?:[A-Za-z]:)?(?:[\\/][\w.\-]+){2,}'), '<path>'),
+    (re.compile(r'\'[^\']*\'|"[^"]*"'), '<str>'),
+    (re.compile(r'\d+(?:\.\d+)?'), '<num>'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint_error(message: str, max_length: int = 200) -> str:
+    """错误信息归一化：把易变部分替换为占位符，使同类错误得到相同指纹"""
+    text = message.strip()
+    for pattern, replacement in _FINGERPRINT_RULES:
+        text = pattern.sub(replacement, text)
+    return text[:max_length]
+
+
+class ErrorPatternMatcher:
+    """
+    预编译的多关键词模式匹配器
+
+    所有模式的关键词合并为一个忽略大小写的正则，一次扫描找出命中的模式；
+    多个模式命中时按模式定义顺序取第一个。结果按消息缓存（LRU）。
+    """
+
+    def __init__(self, patterns: Dict[str, Dict[str, Any]], cache_size: int = 4096):
+        self.patterns = patterns
+        self.cache_size = cache_size
+        self._names = list(patterns)
+        self._cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        alternatives = []
+        for index, name in enumerate(self._names):
+            keywords = sorted(patterns[name].get("keywords", []), key=len, reverse=True)
+            if keywords:
+                alternatives.append(f"(?P<p{index}>{'|'.join(re.escape(k) for k in keywords)})")
+        self._regex = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def match(self, message: str) -> Optional[str]:
+        """返回命中的模式名（未命中返回 None）"""
+        if message in self._cache:
+            self._cache.move_to_end(message)
+            return self._cache[message]
+
+        best = None
+        if self._regex is not None:
+            for found in self._regex.finditer(message):
+                index = int(found.lastgroup[1:])
+                if best is None or index < best:
+                    best = index
+                    if best == 0:
+                        break
+        name = self._names[best] if best is not None else None
+
+        self._cache[message] = name
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return name
+
+
+class FunctionStats:
+    """单个功能的聚合数据"""
+
+    __slots__ = ("usage_count", "success_count", "failure_count", "histogram", "errors", "error_samples", "last_used")
+
+    def __init__(self):
+        self.usage_count = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.histogram = LatencyHistogram()
+        self.errors: Counter = Counter()
+        self.error_samples: Dict[str, str] = {}
+        self.last_used: Optional[float] = None
+
+    def add(self, success: bool, response_time: float, error: Optional[str], timestamp: float):
+        self.usage_count += 1
+        if success:
+            self.success_count += 1
+        else:
+            self.failure_count += 1
+            if error:
+                fingerprint = fingerprint_error(error)
+                self.errors[fingerprint] += 1
+                self.error_samples.setdefault(fingerprint, error)
+        self.histogram.record(response_time)
+        if self.last_used is None or timestamp > self.last_used:
+            self.last_used = timestamp
+
+    def merge(self, other: "FunctionStats"):
+        self.usage_count += other.usage_count
+        self.success_count += other.success_count
+        self.failure_count += other.failure_count
+        self.histogram.merge(other.histogram)
+        self.errors.update(other.errors)
+        for fingerprint, sample in other.error_samples.items():
+            self.error_samples.setdefault(fingerprint, sample)
+        if other.last_used is not None and (self.last_used is None or other.last_used > self.last_used):
+            self.last_used = other.last_used
+
+    def to_metrics(self) -> Dict[str, Any]:
+        """转换为功能分析器使用的指标字典"""
+        histogram = self.histogram
+        return {
+            "usage_count": self.usage_count,
+            "success_count": self.success_count,
+            "failure_count": self.failure_count,
+            "avg_response_time": histogram.mean,
+            "total_response_time": histogram.total,
+            "p50_response_time": histogram.percentile(50),
+            "p95_response_time": histogram.percentile(95),
+            "p99_response_time": histogram.percentile(99),
+            "max_response_time": histogram.max,
+            "error_types": dict(self.errors),
+            "error_samples": dict(self.error_samples),
+            "last_used": datetime.fromtimestamp(self.last_used).isoformat() if self.last_used else None,
+        }
+
+
+class TelemetryPipeline:
+    """
+    功能遥测管道
+
+    Args:
+        db_path: 汇总数据库路径（None 表示只保存在内存）
+        flush_interval: 后台合并间隔（秒）
+        rollup_seconds: 持久化汇总的时间粒度（秒）
+    """
+
+    def __init__(self, db_path: Optional[str] = None, flush_interval: float = 1.0, rollup_seconds: int = 3600):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.rollup_seconds = rollup_seconds
+
+        self.stats: Dict[Tuple[str, str], FunctionStats] = {}
+        self._pending: Dict[Tuple[int, str, str], FunctionStats] = {}
+        self._buffers: List[Tuple[threading.Thread, Deque[tuple]]] = []
+        self._local = threading.local()
+        self._register_lock = threading.Lock()
+        self._flush_lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if db_path and Path(db_path).exists():
+            self._load()
+
+    # ============ 采集（热路径） ============
+
+    def _buffer(self) -> Deque[tuple]:
+        buffer = deque()
+        with self._register_lock:
+            self._buffers.append((threading.current_thread(), buffer))
+        self._local.buffer = buffer
+        return buffer
+
+    def record(
+        self,
+        module_name: str,
+        function_name: str,
+        success: bool,
+        response_time: float,
+        error: Optional[str] = None
+    ):
+        """记录一次调用（只写入当前线程的缓冲）"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            # 空 deque 为假值，不能用 or 判断
+            buffer = self._buffer()
+        buffer.append((module_name, function_name, success, response_time, error, time.time()))
+        if self._thread is None and self.flush_interval:
+            self.start()
+
+    # ============ 合并与持久化 ============
+
+    def flush(self) -> int:
+        """合并所有线程缓冲，返回合并的事件数；已退出线程的缓冲合并后移除"""
+        with self._flush_lock:
+            with self._register_lock:
+                # 先判断线程是否存活再合并：已退出的线程不会再写入，合并完即可丢弃
+                entries = [(thread.is_alive(), buffer) for thread, buffer in self._buffers]
+            merged = 0
+            for _, buffer in entries:
+                popleft = buffer.popleft
+                while True:
+                    try:
+                        module_name, function_name, success, response_time, error, timestamp = popleft()
+                    except IndexError:
+                        break
+                    key = (module_name, function_name)
+                    stats = self.stats.get(key)
+                    if stats is None:
+                        stats = self.stats[key] = FunctionStats()
+                    stats.add(success, response_time, error, timestamp)
+
+                    if self.db_path:
+                        period = int(timestamp // self.rollup_seconds) * self.rollup_seconds
+                        pending_key = (period, module_name, function_name)
+                        pending = self._pending.get(pending_key)
+                        if pending is None:
+                            pending = self._pending[pending_key] = FunctionStats()
+                        pending.add(success, response_time, error, timestamp)
+                    merged += 1
+
+            dead = {id(buffer) for alive, buffer in entries if not alive}
+            if dead:
+                with self._register_lock:
+                    self._buffers = [entry for entry in self._buffers if id(entry[1]) not in dead]
+
+            if self._pending:
+                try:
+                    self._persist()
+                except sqlite3.Error as e:
+                    logger.warning(f"遥测汇总写入失败，下次重试: {e}")
+            return merged
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS function_rollup (
+                    period_start INTEGER NOT NULL,
+                    module_name TEXT NOT NULL,
+                    function_name TEXT NOT NULL,
+                    usage_count INTEGER NOT NULL,
+                    success_count INTEGER NOT NULL,
+                    failure_count INTEGER NOT NULL,
+                    total_time REAL NOT NULL,
+                    min_time REAL,
+                    max_time REAL,
+                    histogram BLOB NOT NULL,
+                    errors TEXT NOT NULL,
+                    last_used REAL,
+                    PRIMARY KEY (period_start, module_name, function_name)
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _persist(self):
+        """把待写入的增量合并进对应时段的汇总行"""
+        pending, self._pending = self._pending, {}
+        conn = self.conn
+        try:
+            with conn:
+                for (period, module_name, function_name), delta in pending.items():
+                    row = conn.execute(
+                        "SELECT usage_count, success_count, failure_count, total_time, min_time, max_time, "
+                        "histogram, errors, last_used FROM function_rollup "
+                        "WHERE period_start = ? AND module_name = ? AND function_name = ?",
+                        (period, module_name, function_name),
+                    ).fetchone()
+                    if row is not None:
+                        delta.merge(self._stats_from_row(row))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO function_rollup VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            period, module_name, function_name,
+                            delta.usage_count, delta.success_count, delta.failure_count,
+                            delta.histogram.total,
+                            delta.histogram.min if delta.histogram.count else None,
+                            delta.histogram.max if delta.histogram.count else None,
+                            delta.histogram.to_bytes(),
+                            json.dumps({"counts": delta.errors, "samples": delta.error_samples}, ensure_ascii=False),
+                            delta.last_used,
+                        ),
+                    )
+        except sqlite3.Error:
+            # 写入失败时保留增量
+            for key, delta in pending.items():
+                existing = self._pending.get(key)
+                if existing is None:
+                    self._pending[key] = delta
+                else:
+                    existing.merge(delta)
+            raise
+
+    @staticmethod
+    def _stats_from_row(row: Iterable[Any]) -> FunctionStats:
+        usage, success, failure, total, minimum, maximum, histogram, errors, last_used = row
+        stats = FunctionStats()
+        stats.usage_count = usage
+        stats.success_count = success
+        stats.failure_count = failure
+        stats.histogram = LatencyHistogram.from_bytes(
+            histogram, total, minimum if minimum is not None else math.inf, maximum or 0.0
+        )
+        decoded = json.loads(errors)
+        stats.errors = Counter(decoded.get("counts", {}))
+        stats.error_samples = decoded.get("samples", {})
+        stats.last_used = last_used
+        return stats
+
+    def _load(self):
+        """从汇总表恢复累计数据"""
+        rows = self.conn.execute(
+            "SELECT module_name, function_name, usage_count, success_count, failure_count, total_time, "
+            "min_time, max_time, histogram, errors, last_used FROM function_rollup"
+        ).fetchall()
+        for row in rows:
+            key = (row[0], row[1])
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = FunctionStats()
+            stats.merge(self._stats_from_row(row[2:]))
+
+    def rollups(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """按时段读取持久化汇总"""
+        if not self.db_path:
+            return []
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT period_start, module_name, function_name, usage_count, success_count, failure_count, "
+            "total_time, min_time, max_time, histogram, errors, last_used FROM function_rollup "
+            "WHERE period_start >= ? ORDER BY period_start",
+            (since or 0,),
+        ).fetchall()
+        return [
+            {"period_start": row[0], "module": row[1], "function": row[2], **self._stats_from_row(row[3:]).to_metrics()}
+            for row in rows
+        ]
+
+    # ============ 读取 ============
+
+    def snapshot(self) -> Dict[Tuple[str, str], FunctionStats]:
+        """合并缓冲后返回按 (模块, 功能) 聚合的数据（字典副本，可安全遍历）"""
+        with self._flush_lock:
+            self.flush()
+            return dict(self.stats)
+
+    # ============ 后台合并 ============
+
+    def start(self):
+        with self._register_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"遥测合并失败: {e}")
+
+    def stop(self):
+        """停止后台线程并写入剩余数据"""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+__all__ = [
+    "ErrorPatternMatcher",
+    "FunctionStats",
+    "LatencyHistogram",
+    "TelemetryPipeline",
+    "fingerprint_error",
+]
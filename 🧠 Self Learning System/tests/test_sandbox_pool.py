@@ -0,0 +1,95 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.sandbox_pool import SandboxBusyError, SandboxLimits, SandboxPool
+
+
+def test_python_jobs_run_in_isolated_scratch_dirs(tmp_path):
+    pool = SandboxPool(size=2, limits=SandboxLimits(memory_mb=256, cpu_seconds=5), work_root=str(tmp_path))
+
+    async def run():
+        try:
+            return await asyncio.gather(*(
+                pool.run_python(f"import os\nprint({i}, os.getcwd() == os.environ['TMPDIR'])")
+                for i in range(6)
+            ))
+        finally:
+            await pool.close()
+
+    results = asyncio.run(run())
+    assert [r.stdout for r in results] == [f"{i} True\n".encode() for i in range(6)]
+    assert all(r.success for r in results)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_timeout_output_cap_and_failures(tmp_path):
+    pool = SandboxPool(size=1, max_output_bytes=100, work_root=str(tmp_path))
+
+    async def run():
+        try:
+            looping = await pool.run_python("while True: pass", timeout=0.5)
+            noisy = await pool.run_command("yes | head -c 5000; echo oops >&2; exit 3")
+            raising = await pool.run_python("raise ValueError('boom')")
+            after = await pool.run_command("echo ok")
+            return looping, noisy, raising, after
+        finally:
+            await pool.close()
+
+    looping, noisy, raising, after = asyncio.run(run())
+    assert looping.timed_out and not looping.success
+    assert len(noisy.stdout) == 100 and noisy.stdout_truncated
+    assert noisy.stderr == b"oops\n" and noisy.returncode == 3
+    assert raising.returncode == 1 and raising.stderr.startswith(b"Traceback")
+    assert after.success and after.stdout == b"ok\n"
+
+
+def test_stream_can_be_closed_early_and_queue_is_bounded(tmp_path):
+    pool = SandboxPool(size=1, max_pending=0, work_root=str(tmp_path))
+
+    async def run():
+        try:
+            stream = pool.stream_command("for i in 1 2 3 4 5 6 7 8 9; do echo $i; sleep 0.2; done")
+            async for kind, payload in stream:
+                assert kind == "stdout" and payload == b"1\n"
+                break
+            await stream.aclose()
+
+            blocker = asyncio.ensure_future(pool.run_command("echo slow; sleep 0.3"))
+            await asyncio.sleep(0.05)
+            with pytest.raises(SandboxBusyError):
+                await pool.run_command("echo rejected")
+            return await blocker, pool.get_stats()
+        finally:
+            await pool.close()
+
+    blocked, stats = asyncio.run(run())
+    assert blocked.success and blocked.stdout == b"slow\n"
+    assert stats["rejected"] == 1
+    assert stats["workers_alive"] == 1
+
+
+def test_jobs_without_env_do_not_inherit_service_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("SANDBOX_TEST_SECRET", "s3cret")
+    pool = SandboxPool(size=1, work_root=str(tmp_path))
+
+    async def run():
+        try:
+            code = "import os\nprint(os.environ.get('SANDBOX_TEST_SECRET'), os.environ['HOME'] == os.getcwd())"
+            default = await pool.run_python(code)
+            explicit = await pool.run_python(code, env={"SANDBOX_TEST_SECRET": "given", "HOME": "/"})
+            shell = await pool.run_command("echo ${SANDBOX_TEST_SECRET:-unset}; command -v sh >/dev/null && echo path")
+            return default, explicit, shell
+        finally:
+            await pool.close()
+
+    default, explicit, shell = asyncio.run(run())
+    assert default.stdout == b"None True\n"
+    assert explicit.stdout == b"given False\n"
+    assert shell.stdout == b"unset\npath\n"
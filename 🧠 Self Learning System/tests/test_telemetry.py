@@ -0,0 +1,103 @@
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.telemetry import LatencyHistogram, TelemetryPipeline, fingerprint_error
+
+HOUR = 3600
+
+
+def _record_in_threads(pipeline, threads=4, calls=250):
+    def worker(index):
+        for i in range(calls):
+            pipeline.record("mod", f"f{index % 2}", i % 10 != 0, 0.01 * (i % 5 + 1),
+                            None if i % 10 else f"timeout after {i} ms")
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+
+def test_per_thread_buffers_merge_without_loss():
+    pipeline = TelemetryPipeline(flush_interval=0)
+    _record_in_threads(pipeline)
+
+    stats = pipeline.snapshot()
+    assert sum(s.usage_count for s in stats.values()) == 1000
+    f0 = stats[("mod", "f0")]
+    assert f0.usage_count == 500
+    assert f0.failure_count == 50
+    # 数值不同的同类错误合并为一个指纹
+    assert dict(f0.errors) == {"timeout after <num> ms": 50}
+
+
+def test_dead_thread_buffers_are_dropped_after_flush():
+    pipeline = TelemetryPipeline(flush_interval=0)
+    pipeline.record("mod", "main", True, 0.01)
+    _record_in_threads(pipeline, threads=3, calls=10)
+    assert len(pipeline._buffers) == 4
+
+    assert pipeline.flush() == 31
+    assert [thread for thread, _ in pipeline._buffers] == [threading.current_thread()]
+
+    # 存活线程的缓冲继续复用
+    pipeline.record("mod", "main", True, 0.01)
+    assert len(pipeline._buffers) == 1
+    assert pipeline.snapshot()[("mod", "main")].usage_count == 2
+
+
+def test_rollups_persist_and_reload(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "telemetry.db")
+    clock = {"now": 100 * HOUR + 10}
+    monkeypatch.setattr("core.telemetry.time.time", lambda: clock["now"])
+
+    pipeline = TelemetryPipeline(db_path=db_path, flush_interval=0)
+    for i in range(5):
+        pipeline.record("mod", "f", True, 0.1)
+    pipeline.record("mod", "f", False, 2.0, "bad id 42")
+    pipeline.flush()
+    clock["now"] += HOUR
+    for i in range(4):
+        pipeline.record("mod", "f", True, 0.2)
+    pipeline.stop()
+
+    reloaded = TelemetryPipeline(db_path=db_path, flush_interval=0)
+    stats = reloaded.snapshot()[("mod", "f")]
+    assert stats.usage_count == 10
+    assert stats.failure_count == 1
+    assert stats.errors == {"bad id <num>": 1}
+    assert stats.histogram.max == 2.0
+    assert abs(stats.histogram.total - (0.5 + 2.0 + 0.8)) < 1e-9
+
+    rollups = reloaded.rollups()
+    assert [r["period_start"] for r in rollups] == [100 * HOUR, 101 * HOUR]
+    assert [r["usage_count"] for r in rollups] == [6, 4]
+
+    # 同一时段再次写入时与已有汇总行合并
+    clock["now"] = 101 * HOUR + 5
+    reloaded.record("mod", "f", True, 0.2)
+    assert [r["usage_count"] for r in reloaded.rollups()] == [6, 5]
+    reloaded.stop()
+
+
+def test_histogram_percentiles_and_round_trip():
+    histogram = LatencyHistogram()
+    for value in [0.01] * 90 + [1.0] * 10:
+        histogram.record(value)
+
+    assert abs(histogram.percentile(50) - 0.01) / 0.01 < 0.1
+    assert abs(histogram.percentile(99) - 1.0) / 1.0 < 0.1
+    restored = LatencyHistogram.from_bytes(histogram.to_bytes(), histogram.total, histogram.min, histogram.max)
+    assert restored.count == 100
+    assert restored.percentile(95) == histogram.percentile(95)
+
+
+def test_fingerprint_normalizes_variable_parts():
+    assert fingerprint_error("File /tmp/a/b.txt not found") == fingerprint_error("File /var/x/y.log not found")
+    assert fingerprint_error("user 'alice' id 0x1f") == "user <str> id <hex>"